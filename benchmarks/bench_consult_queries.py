@@ -0,0 +1,170 @@
+"""
+Benchmark: SQL statements per oracle consultation, before and after the
+single-round-trip pipeline.
+
+Consultations run through OracleService against an in-memory SQLite
+database with a three-level branch lineage. A fake LLM answers instantly
+and the LLM response cache is disabled, so only database work is
+measured. Every statement the engine sends is counted.
+
+  before  the previous pipeline, reproduced in LegacyOracleService:
+          branch and vessel selected separately, the branch selected again
+          before writing, and the dialogue read back with its messages and
+          branch (get_dialogue), as MultiProviderService._query_provider did
+  after   consult_oracle as it is now: branch, vessel and ancestors in one
+          joined query (none while the context cache is warm), one write,
+          and the dialogue returned from the identity map
+
+Each run does --consults sequential single-provider consults on one branch,
+then --multi multi-consults, each fanning out to --providers concurrent
+providers that share the service's session.
+
+Usage: python benchmarks/bench_consult_queries.py [--consults 200] [--providers 3]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import StaticPool
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import dryad.core.llm_cache as llm_cache
+from dryad.core.consultation_context import get_consultation_context_cache
+from dryad.core.llm_cache import LLMResponseCache
+from dryad.database.models import Branch, Dialogue, Grove, MessageRole, Vessel
+from dryad.infrastructure.database import Base
+from dryad.schemas.dialogue_schemas import ConsultationRequest, ConsultationResponse, ProcessResponseRequest
+from dryad.services.oracle_service import OracleService
+
+
+class FakeLLM:
+    model_name = "fake"
+
+    async def ainvoke(self, prompt):
+        return f"Consider the branch from a new angle ({len(prompt)} characters of context)."
+
+
+class LegacyOracleService(OracleService):
+    """The consult path before the context prefetch and the returned dialogue"""
+
+    async def get_consultation_context(self, branch_id):
+        async with self._db_lock:
+            branch = (await self.db.execute(select(Branch).where(Branch.id == branch_id))).scalar_one_or_none()
+            vessel = (await self.db.execute(select(Vessel).where(Vessel.branch_id == branch_id))).scalar_one_or_none()
+        return branch, vessel
+
+    async def prepare_consultation(self, request):
+        branch, vessel = await self.get_consultation_context(request.branch_id)
+        return ConsultationResponse(
+            formatted_prompt=f"Current Query: {request.query}",
+            metadata={"provider": request.provider_id, "branch_id": request.branch_id, "vessel_id": vessel.id,
+                      "timestamp": datetime.utcnow()}
+        )
+
+    async def consult_oracle(self, request):
+        consultation = await self.prepare_consultation(request)
+        raw_response = await self.llm.ainvoke(consultation.formatted_prompt)
+        result = await self.process_response(ProcessResponseRequest(
+            branch_id=request.branch_id, provider_id=request.provider_id,
+            raw_response=raw_response, original_query=request.query
+        ))
+        return result.model_copy(update={"dialogue": None})
+
+
+async def query_provider(service, provider_id, branch_id, query):
+    """What MultiProviderService._query_provider does with the result"""
+    result = await service.consult_oracle(ConsultationRequest(branch_id=branch_id, query=query, provider_id=provider_id))
+    dialogue = result.dialogue
+    if dialogue is None:
+        async with service._db_lock:
+            dialogue = (await service.db.execute(
+                select(Dialogue).options(selectinload(Dialogue.messages), selectinload(Dialogue.branch))
+                .where(Dialogue.id == result.dialogue_id)
+            )).scalar_one_or_none()
+    oracle = [m for m in dialogue.messages if m.role == MessageRole.ORACLE]
+    assert oracle and oracle[-1].content.startswith("Consider"), "oracle message missing"
+
+
+async def setup(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        db.add(Grove(id="grove", name="bench"))
+        parent = None
+        for depth, name in enumerate(["root", "design", "storage"]):
+            branch = Branch(id=name, grove_id="grove", parent_id=parent, name=name.title(),
+                            description=f"{name} exploration", path_depth=depth)
+            db.add(branch)
+            db.add(Vessel(id=f"vessel-{name}", branch_id=name, storage_path=f"vessels/{name}",
+                          file_references={f"{name}.md": f"files/{name}.md"}))
+            parent = name
+        await db.commit()
+
+
+async def run(label, service_class, args):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    await setup(engine)
+    statements = Counter()
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements[statement.split(None, 1)[0].upper()] += 1
+
+    get_consultation_context_cache().invalidate()
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        service = service_class(db)
+        service.llm = FakeLLM()
+
+        statements.clear()
+        started = time.perf_counter()
+        for i in range(args.consults):
+            await query_provider(service, "llamacpp", "storage", f"question {i}")
+        single = sum(statements.values()) / args.consults
+        single_ms = (time.perf_counter() - started) / args.consults * 1000
+        single_kinds = {kind: n / args.consults for kind, n in statements.items()}
+
+        statements.clear()
+        for i in range(args.multi):
+            await asyncio.gather(*(
+                query_provider(service, f"provider-{p}", "storage", f"multi question {i}") for p in range(args.providers)
+            ))
+        multi = sum(statements.values()) / args.multi
+
+    print(f"{label:<7} single consult: {single:4.1f} statements "
+          f"({', '.join(f'{kind} {n:.1f}' for kind, n in sorted(single_kinds.items()))}), {single_ms:.2f} ms   "
+          f"multi-consult x{args.providers}: {multi:4.1f} statements")
+    await engine.dispose()
+    return single, multi
+
+
+async def bench(args):
+    # Measure database work only
+    llm_cache._cache = LLMResponseCache(enabled=False)
+    before = await run("before", LegacyOracleService, args)
+    after = await run("after", OracleService, args)
+    print(f"statements per single consult {before[0]:.1f} -> {after[0]:.1f}, "
+          f"per multi-consult {before[1]:.1f} -> {after[1]:.1f}  (context cache {get_consultation_context_cache().get_stats()})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--consults", type=int, default=200)
+    parser.add_argument("--multi", type=int, default=50)
+    parser.add_argument("--providers", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
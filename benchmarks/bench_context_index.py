@@ -0,0 +1,202 @@
+"""
+Benchmark: indexed learning-context retrieval for AgentMemoryManager.
+
+Generates one agent with N learning contexts (Zipfian vocabulary,
+update_learning-shaped context_data, a few applicable_scenarios, random
+confidence and age) in an on-disk SQLite database, then compares:
+
+  legacy   the previous get_relevant_context: top limit*3 rows by confidence
+           and recency, json.dumps + word overlap in Python
+  indexed  get_relevant_context through the per-agent BM25 index (ranking
+           plus loading the winning ORM rows)
+  search   ContextRetrievalIndex.search alone
+
+Each query is three distinctive words taken from a random target context;
+hit rate is how often that target appears in the top results.
+
+Usage: python benchmarks/bench_context_index.py [--contexts 100000] [--queries 500]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from dryad.university.database.database import Base
+from dryad.university.database.models_university import LearningContext
+from dryad.university.services.agent_memory_service import AgentMemoryManager
+from dryad.university.services.context_index import ContextIndexRegistry
+
+CONTEXT_TYPES = ["problem_solving", "decision_making", "skill_learning", "insight"]
+
+
+def make_vocabulary(size, rng):
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters, rng.integers(4, 10))))
+    return np.array(sorted(words))
+
+
+def make_rows(agent_id, n, vocab_size, seed=11):
+    rng = np.random.default_rng(seed)
+    vocab = make_vocabulary(vocab_size, rng)
+    ranks = np.arange(1, vocab_size + 1)
+    probs = 1.0 / ranks ** 1.1
+    probs /= probs.sum()
+    lengths = rng.integers(12, 40, n)
+    words = rng.choice(vocab_size, size=int(lengths.sum()), p=probs)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    ages = rng.exponential(60.0, n)
+    confidences = rng.random(n).round(3)
+    rows, offset = [], 0
+    for i in range(n):
+        text = vocab[words[offset:offset + lengths[i]]]
+        offset += lengths[i]
+        split = len(text) * 2 // 3
+        rows.append({
+            "id": str(uuid.UUID(int=int(rng.integers(0, 2 ** 63)) << 64 | i)),
+            "agent_id": agent_id,
+            "context_type": CONTEXT_TYPES[i % len(CONTEXT_TYPES)],
+            "context_data": {
+                "outcome": {"status": "ok" if i % 3 else "failed", "summary": " ".join(text[:split])},
+                "context": {"type": CONTEXT_TYPES[i % len(CONTEXT_TYPES)], "task": f"task {i}"},
+                "additional_context": " ".join(text[split:]),
+            },
+            "success_patterns": [],
+            "failure_patterns": [],
+            "applicable_scenarios": [" ".join(text[split:split + 3])],
+            "confidence_score": float(confidences[i]),
+            "created_at": now - timedelta(days=float(ages[i])),
+            "updated_at": now - timedelta(days=float(ages[i])),
+        })
+    return rows, vocab, words, lengths
+
+
+def legacy_get_relevant_context(db, agent_id, query_context, limit=5):
+    """The previous implementation, kept verbatim for comparison"""
+    query = db.query(LearningContext).filter(LearningContext.agent_id == agent_id)
+    contexts = query.order_by(
+        LearningContext.confidence_score.desc(),
+        LearningContext.updated_at.desc()
+    ).limit(limit * 3).all()
+    relevant_contexts = []
+    query_words = set(query_context.lower().split())
+    for context in contexts:
+        context_text = json.dumps(context.context_data).lower()
+        scenario_text = " ".join(context.applicable_scenarios).lower()
+        context_words = set(context_text.split() + scenario_text.split())
+        if len(query_words.intersection(context_words)) > 0:
+            relevant_contexts.append(context)
+            if len(relevant_contexts) >= limit:
+                break
+    return relevant_contexts
+
+
+def make_queries(rows, vocab, words, lengths, n_queries, seed=5):
+    """Three least-frequent distinct words of random target contexts"""
+    rng = np.random.default_rng(seed)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    queries = []
+    for target in rng.choice(len(rows), n_queries, replace=False):
+        ids = np.unique(words[offsets[target]:offsets[target + 1]])
+        chosen = np.sort(ids)[-3:]
+        queries.append((rows[target]["id"], " ".join(vocab[chosen])))
+    return queries
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):.3f} ms  p95 {np.percentile(ms, 95):.3f} ms  p99 {np.percentile(ms, 99):.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contexts", type=int, default=100000)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    agent_id = "agent-bench"
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'memory.db')}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+
+        start = time.perf_counter()
+        rows, vocab, words, lengths = make_rows(agent_id, args.contexts, args.vocabulary)
+        for chunk in range(0, len(rows), 5000):
+            db.execute(insert(LearningContext.__table__), rows[chunk:chunk + 5000])
+        db.commit()
+        print(f"generated and stored {args.contexts:,} contexts in {time.perf_counter() - start:.1f}s")
+        queries = make_queries(rows, vocab, words, lengths, args.queries)
+
+        registry = ContextIndexRegistry(refresh_interval=3600)
+        memory = AgentMemoryManager(db, registry)
+        start = time.perf_counter()
+        memory.get_relevant_context(agent_id, "warmup")
+        index = registry.peek(agent_id)
+        stats = index.get_stats()
+        print(f"index build (first query)  {time.perf_counter() - start:.2f}s  "
+              f"{stats['terms']:,} terms, {stats['postings']:,} postings")
+
+        for label, run in (
+            ("legacy", lambda q: [c.id for c in legacy_get_relevant_context(db, agent_id, q, args.limit)]),
+            ("indexed", lambda q: [c.id for c in memory.get_relevant_context(agent_id, q, limit=args.limit)]),
+            ("search", lambda q: [cid for cid, _ in index.search(q, limit=args.limit)]),
+        ):
+            latencies, hits = [], 0
+            for target, text in queries:
+                db.expunge_all()
+                t = time.perf_counter()
+                ids = run(text)
+                latencies.append(time.perf_counter() - t)
+                hits += target in ids
+            print(f"{label:<8} hit@{args.limit} {hits / len(queries):.3f}  {percentiles(latencies)}")
+
+        latencies = []
+        for _, text in queries:
+            t = time.perf_counter()
+            index.search(text, limit=args.limit, context_types=["problem_solving", "insight"], min_confidence=0.5)
+            latencies.append(time.perf_counter() - t)
+        print(f"search with type + confidence filters  {percentiles(latencies)}")
+
+        # Broad queries: any three words of a context, so frequent terms with long postings
+        rng = np.random.default_rng(3)
+        latencies = []
+        for _ in range(len(queries)):
+            text = " ".join(vocab[rng.choice(words[:10000], 3)])
+            t = time.perf_counter()
+            index.search(text, limit=args.limit)
+            latencies.append(time.perf_counter() - t)
+        print(f"search, broad queries                  {percentiles(latencies)}")
+
+        # Incremental maintenance through the manager
+        latencies = []
+        for i in range(200):
+            t = time.perf_counter()
+            memory.update_learning(agent_id, {"status": "ok"}, {"type": "skill_learning", "task": f"bench {i}"},
+                                   success=i % 2 == 0, additional_context=f"incremental scenario {i}")
+            latencies.append(time.perf_counter() - t)
+        found = memory.get_relevant_context(agent_id, "incremental scenario 199")
+        print(f"update_learning incl. commit + index  {percentiles(latencies)}  "
+              f"(new context retrievable: {any('199' in str(c.applicable_scenarios) for c in found)})")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
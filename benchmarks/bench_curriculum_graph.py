@@ -0,0 +1,240 @@
+"""
+Benchmark: compiled curriculum skill graphs and cached agent progress.
+
+Engine (in memory): a random prerequisite DAG of N skills (after a few roots,
+each skill needs one to three skills from the preceding window), compiled
+once. Then A agents each get a prerequisite-closed set of completed skills
+(the closure of a few random skills in the first tenth of the tree), and the
+benchmark measures complete_skill updates, "% complete" and "unlocked next
+skills" lookups against the cached bitmaps. Unlocked sets are checked against
+a brute-force scan for a sample of agents.
+
+Database (on-disk SQLite): the same tree as SkillNode rows and D agents with
+SkillProgress rows. Compares the previous get_curriculum_progress (agent,
+curriculum and two count queries per call) and generate_learning_path
+(order_index only) with CurriculumEngine on a warm registry.
+
+Usage: python benchmarks/bench_curriculum_graph.py [--skills 10000] [--agents 100000] [--db-agents 2000]
+"""
+
+import argparse
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from dryad.university.database.database import Base
+from dryad.university.database.models_university import (
+    CurriculumPath,
+    SkillNode,
+    SkillProgress,
+    SkillTree,
+    UniversityAgent
+)
+from dryad.university.services.curriculum_engine import CurriculumEngine
+from dryad.university.services.curriculum_graph import CurriculumGraphRegistry, SkillGraph, bit_positions
+
+
+def make_tree(n, window, roots=20, seed=1):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        # A few root skills, then one to three prerequisites from the preceding window
+        lo = max(0, i - window)
+        prereqs = [f"s{p}" for p in rng.sample(range(lo, i), min(i - lo, rng.randint(1, 3)))] if i >= roots else []
+        rows.append((f"s{i}", f"skill {i}", prereqs, rng.choice([0.5, 1.0, 2.0]), rng.randint(0, 9), "conceptual"))
+    # Shuffle so the compiler cannot rely on input order
+    rng.shuffle(rows)
+    return rows
+
+
+def completed_sets(graph, agents, targets, seed=2):
+    """Prerequisite-closed completed sets: the closure of a few random target skills each"""
+    rng = random.Random(seed)
+    limit = max(targets, len(graph) // 10)
+    for _ in range(agents):
+        bits = 0
+        for target in rng.sample(range(limit), targets):
+            bits |= graph.closure[target] | 1 << target
+        yield [graph.ids[i] for i in bit_positions(bits)]
+
+
+def percentiles(samples):
+    us = np.array(samples) * 1e6
+    return f"p50 {np.percentile(us, 50):.1f} us  p95 {np.percentile(us, 95):.1f} us  p99 {np.percentile(us, 99):.1f} us"
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_engine(args):
+    rows = make_tree(args.skills, args.window)
+    start = time.perf_counter()
+    graph = SkillGraph("tree", rows)
+    depth = max(c.bit_count() for c in graph.closure)
+    print(f"compiled {len(graph):,} skills in {(time.perf_counter() - start) * 1000:.0f} ms  "
+          f"(largest prerequisite closure {depth:,} skills)")
+
+    position = {row[0]: row for row in rows}
+    for index, skill_id in enumerate(graph.ids):
+        assert all(graph.position[p] < index for p in position[skill_id][2])
+
+    registry = CurriculumGraphRegistry(max_agents=args.agents, refresh_interval=3600, progress_ttl=3600)
+    registry.graph("tree", lambda: None, lambda: rows)
+    before = rss_mb()
+    start = time.perf_counter()
+    for agent, completed in enumerate(completed_sets(graph, args.agents, args.targets)):
+        registry.progress(graph, f"agent-{agent}", lambda completed=completed: completed)
+    elapsed = time.perf_counter() - start
+    print(f"loaded progress for {args.agents:,} agents in {elapsed:.1f}s "
+          f"({elapsed / args.agents * 1e6:.0f} us each), max RSS +{rss_mb() - before:.0f} MB")
+
+    rng = random.Random(3)
+    sample = [f"agent-{rng.randrange(args.agents)}" for _ in range(args.operations)]
+    latencies = []
+    for agent in sample:
+        progress = registry.progress(graph, agent, list)
+        skill_id = graph.ids[rng.choice(bit_positions(progress.unlocked))]
+        t = time.perf_counter()
+        registry.record_completion("tree", agent, skill_id)
+        latencies.append(time.perf_counter() - t)
+    print(f"complete_skill cache update         {percentiles(latencies)}")
+
+    for label, query in (
+        ("% complete", lambda p: p.percentage),
+        ("next 5 unlocked skills", lambda p: p.next_skills(limit=5)),
+        ("path to a random skill", lambda p: p.missing_prerequisites(rng.randrange(len(graph)))),
+    ):
+        latencies = []
+        for agent in sample:
+            t = time.perf_counter()
+            query(registry.progress(graph, agent, list))
+            latencies.append(time.perf_counter() - t)
+        print(f"{label:<35} {percentiles(latencies)}")
+
+    # Unlocked sets must match a full scan
+    for agent in sample[:200]:
+        progress = registry.progress(graph, agent, list)
+        expected = [
+            i for i in range(len(graph))
+            if not progress.completed >> i & 1 and progress.completed & graph.direct[i] == graph.direct[i]
+        ]
+        assert bit_positions(progress.unlocked) == expected, agent
+    print("unlocked sets match a full scan for 200 agents")
+
+
+def legacy_get_curriculum_progress(db, agent_id):
+    """The previous queries (agent, curriculum, two counts), without the missing duration column"""
+    agent = db.query(UniversityAgent).filter(UniversityAgent.id == agent_id).first()
+    curriculum = db.query(CurriculumPath).filter(CurriculumPath.id == agent.current_curriculum_id).first()
+    total_skills = db.query(SkillNode).filter(SkillNode.skill_tree_id == curriculum.skill_tree_id).count()
+    completed_skills = db.query(SkillProgress).filter(
+        SkillProgress.agent_id == agent_id, SkillProgress.status == "completed"
+    ).count()
+    return completed_skills / total_skills * 100
+
+
+def legacy_generate_learning_path(db, curriculum_id):
+    curriculum = db.query(CurriculumPath).filter(CurriculumPath.id == curriculum_id).first()
+    return [
+        node.id for node in db.query(SkillNode).filter(
+            SkillNode.skill_tree_id == curriculum.skill_tree_id
+        ).order_by(SkillNode.order_index).all()
+    ]
+
+
+def bench_database(args):
+    rows = make_tree(args.skills, args.window)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'curriculum.db')}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        now = datetime.now(timezone.utc)
+        db.add(SkillTree(id="tree", university_id="uni", name="Bench tree"))
+        db.add(CurriculumPath(id="curriculum", university_id="uni", name="Bench", skill_tree_id="tree"))
+        db.execute(insert(SkillNode.__table__), [
+            {"id": r[0], "skill_tree_id": "tree", "name": r[1], "prerequisites": r[2],
+             "estimated_duration_hours": r[3], "order_index": r[4], "created_at": now, "updated_at": now}
+            for r in rows
+        ])
+        db.execute(insert(UniversityAgent.__table__), [
+            {"id": f"agent-{a}", "university_id": "uni", "name": f"agent {a}", "current_curriculum_id": "curriculum"}
+            for a in range(args.db_agents)
+        ])
+        graph = SkillGraph("tree", rows)
+        progress_rows = [
+            {"id": str(uuid.uuid4()), "agent_id": f"agent-{a}", "skill_node_id": skill_id,
+             "status": "completed", "completed_at": now}
+            for a, completed in enumerate(completed_sets(graph, args.db_agents, args.targets))
+            for skill_id in completed
+        ]
+        for start in range(0, len(progress_rows), 10000):
+            db.execute(insert(SkillProgress.__table__), progress_rows[start:start + 10000])
+        db.commit()
+        print(f"database: {args.skills:,} skills, {args.db_agents:,} agents, {len(progress_rows):,} progress rows")
+
+        registry = CurriculumGraphRegistry(refresh_interval=30, progress_ttl=300)
+        curriculum_engine = CurriculumEngine(db, registry)
+        agents = [f"agent-{a}" for a in range(args.db_agents)]
+        start = time.perf_counter()
+        for agent in agents:
+            curriculum_engine.get_curriculum_progress(agent)
+        print(f"first get_curriculum_progress for every agent (compile + load)  "
+              f"{(time.perf_counter() - start) / len(agents) * 1000:.2f} ms/agent")
+
+        sample = random.Random(4).choices(agents, k=1000)
+        for label, call in (
+            ("legacy   get_curriculum_progress", lambda a: legacy_get_curriculum_progress(db, a)),
+            ("engine   get_curriculum_progress", curriculum_engine.get_curriculum_progress),
+            ("engine   get_next_skills", curriculum_engine.get_next_skills),
+        ):
+            latencies = []
+            for agent in sample:
+                t = time.perf_counter()
+                call(agent)
+                latencies.append(time.perf_counter() - t)
+            print(f"{label:<35} {percentiles(latencies)}")
+
+        for label, call in (
+            ("legacy   generate_learning_path", lambda: legacy_generate_learning_path(db, "curriculum")),
+            ("engine   generate_learning_path", lambda: curriculum_engine.generate_learning_path("curriculum")),
+        ):
+            latencies = []
+            for _ in range(5):
+                db.expunge_all()
+                t = time.perf_counter()
+                call()
+                latencies.append(time.perf_counter() - t)
+            print(f"{label:<35} {percentiles(latencies)}")
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skills", type=int, default=10000)
+    parser.add_argument("--window", type=int, default=200, help="prerequisites come from this many preceding skills")
+    parser.add_argument("--agents", type=int, default=100000)
+    parser.add_argument("--targets", type=int, default=3, help="random skills whose closures each agent completed")
+    parser.add_argument("--operations", type=int, default=20000)
+    parser.add_argument("--db-agents", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    bench_engine(args)
+    bench_database(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: thumbnail-first image analysis on synthetic 4K images.
+
+Compares the legacy full-resolution path (KMeans over every pixel on the
+calling thread) with ImageAnalysisEngine, and reports p50/p99 latency plus
+event-loop responsiveness while analyses run.
+
+Usage: python benchmarks/bench_image_analysis.py [--images 20]
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import numpy as np
+from PIL import Image
+
+from dryad.university.services.image_analysis import ImageAnalysisEngine
+
+
+def make_4k_jpeg(seed: int) -> bytes:
+    """Synthetic 3840x2160 image: gradients, blocks of color and noise"""
+    rng = np.random.default_rng(seed)
+    h, w = 2160, 3840
+    y, x = np.mgrid[0:h, 0:w]
+    img = np.stack([
+        (x / w * 255),
+        (y / h * 255),
+        ((x + y) % 512 / 2),
+    ], axis=-1)
+    for _ in range(20):
+        x0, y0 = rng.integers(0, w - 400), rng.integers(0, h - 400)
+        img[y0:y0 + 400, x0:x0 + 400] = rng.integers(0, 256, size=3)
+    img += rng.normal(0, 8, size=img.shape)
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(img, 0, 255).astype(np.uint8)).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def legacy_analyze(image_bytes: bytes):
+    """Previous behaviour: decode full image, KMeans over every pixel"""
+    from sklearn.cluster import KMeans
+
+    pixels = np.array(Image.open(io.BytesIO(image_bytes)).convert("RGB")).reshape(-1, 3)
+    KMeans(n_clusters=5, random_state=42, n_init=1).fit(pixels)
+
+
+async def measure_loop_lag(stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        samples.append(time.perf_counter() - start - 0.01)
+
+
+async def run(images: int, legacy: bool):
+    print(f"Generating {images} synthetic 4K JPEGs...")
+    payloads = [make_4k_jpeg(i) for i in range(images)]
+
+    if legacy:
+        latencies = []
+        for payload in payloads[:3]:
+            start = time.perf_counter()
+            legacy_analyze(payload)
+            latencies.append(time.perf_counter() - start)
+        print(f"legacy full-resolution KMeans: p50={percentile(latencies, 0.5) * 1000:.0f}ms "
+              f"(3 images, blocks the event loop for the whole call)")
+
+    engine = ImageAnalysisEngine()
+    lag_samples = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop, lag_samples))
+
+    async def timed(payload):
+        start = time.perf_counter()
+        await engine.analyze(payload)
+        return time.perf_counter() - start
+
+    cold = await asyncio.gather(*(timed(p) for p in payloads))
+    warm = await asyncio.gather(*(timed(p) for p in payloads))
+    stop.set()
+    await lag_task
+    engine.shutdown()
+
+    print(f"engine cold: p50={percentile(cold, 0.5) * 1000:.0f}ms p99={percentile(cold, 0.99) * 1000:.0f}ms")
+    print(f"engine warm (cache hits): p50={percentile(warm, 0.5) * 1e6:.0f}us p99={percentile(warm, 0.99) * 1e6:.0f}us")
+    print(f"event loop lag during analysis: mean={statistics.mean(lag_samples) * 1000:.2f}ms "
+          f"max={max(lag_samples) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args.images, not args.skip_legacy))
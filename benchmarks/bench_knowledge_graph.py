@@ -0,0 +1,265 @@
+"""
+Benchmark: materialized knowledge graphs.
+
+Domain linking: a domain of N KnowledgeNode rows (Zipfian topic words and
+prerequisites) in an on-disk SQLite database, then M new nodes stored through
+KnowledgeManagementSystem.store_expert_knowledge. Compares
+
+  legacy   the previous _create_knowledge_relationships: ten arbitrary active
+           same-domain nodes scored with the previous
+           _calculate_knowledge_similarity (legacy_similarity below)
+  indexed  the topic/prerequisite candidate index over the whole domain
+
+and reports how many of the links a brute-force scan over the whole domain
+finds each approach recovers.
+
+Agent graphs: an agent with E knowledge entities and random connections.
+Compares the previous build_knowledge_graph (reload everything, rebuild the
+histogram and connection list) with the materialized read, plus the cost of
+create_knowledge_entity on a materialized graph and 2-hop neighborhood
+queries.
+
+Usage: python benchmarks/bench_knowledge_graph.py [--domain-nodes 100000] [--entities 20000]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from dryad.university.database.database import Base
+from dryad.university.database.models_university import KnowledgeEntity, KnowledgeNode
+from dryad.university.services.agent_memory_service import AgentMemoryManager
+from dryad.university.services.knowledge_graph_store import _candidate_indexes
+from dryad.university.services.knowledge_management import (
+    KnowledgeManagementSystem,
+    KnowledgeType,
+    QualityLevel
+)
+
+
+def zipf_choice(rng, size, count, n):
+    probs = 1.0 / np.arange(1, size + 1) ** 1.1
+    probs /= probs.sum()
+    return [rng.choice(size, rng.integers(1, count + 1), replace=False, p=probs) for _ in range(n)]
+
+
+def make_features(rng, n, vocabulary, prerequisites):
+    topics = zipf_choice(rng, vocabulary, 4, n)
+    prereqs = zipf_choice(rng, prerequisites, 3, n)
+    return (
+        [" ".join(f"w{w}" for w in t) for t in topics],
+        [[f"p{p}" for p in ps] for ps in prereqs]
+    )
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):.3f} ms  p95 {np.percentile(ms, 95):.3f} ms  p99 {np.percentile(ms, 99):.3f} ms"
+
+
+def jaccard(a, b):
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def legacy_similarity(node1, node2):
+    """The previous KnowledgeManagementSystem._calculate_knowledge_similarity"""
+    topic_similarity = 0.0
+    if node1.topic and node2.topic:
+        topic_similarity = jaccard(node1.topic.lower().split(), node2.topic.lower().split())
+    prerequisite_similarity = 0.0
+    if node1.prerequisites and node2.prerequisites:
+        prerequisite_similarity = jaccard(node1.prerequisites, node2.prerequisites)
+    return (topic_similarity + prerequisite_similarity) / 2
+
+
+async def bench_domain(db, args):
+    rng = np.random.default_rng(7)
+    topics, prereqs = make_features(rng, args.domain_nodes, args.vocabulary, args.prerequisites)
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "id": f"k{i}", "domain": "math", "topic": topics[i], "concept_name": f"concept {i}",
+            "concept_data": {}, "status": "active", "confidence_level": 0.8, "prerequisites": prereqs[i],
+            "difficulty_level": "intermediate", "connections": [], "created_at": now, "updated_at": now
+        }
+        for i in range(args.domain_nodes)
+    ]
+    for start in range(0, len(rows), 5000):
+        db.execute(insert(KnowledgeNode.__table__), rows[start:start + 5000])
+    db.commit()
+    features = [(t.split(), p) for t, p in zip(topics, prereqs)]
+
+    system = KnowledgeManagementSystem(db)
+    start = time.perf_counter()
+    system._ensure_domain_graph("math")
+    db.commit()
+    print(f"domain of {args.domain_nodes:,} nodes materialized in {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    system.knowledge_graph.candidate_index("domain:math")
+    print(f"candidate index loaded in {time.perf_counter() - start:.2f}s")
+
+    new_topics, new_prereqs = make_features(rng, args.new_nodes, args.vocabulary, args.prerequisites)
+    legacy_links = indexed_links = expected_links = recovered_legacy = 0
+    legacy_latency, indexed_latency = [], []
+    for i in range(args.new_nodes):
+        content = {"topic": new_topics[i], "concept_name": f"new {i}", "prerequisites": new_prereqs[i]}
+
+        # Legacy scoring, timed on its own against the same node
+        node = KnowledgeNode(id=str(uuid.uuid4()), domain="math", topic=new_topics[i], prerequisites=new_prereqs[i])
+        t = time.perf_counter()
+        related = db.query(KnowledgeNode).filter(
+            KnowledgeNode.domain == "math", KnowledgeNode.id != node.id, KnowledgeNode.status == "active"
+        ).limit(10).all()
+        legacy = set()
+        for other in related:
+            if legacy_similarity(node, other) > 0.6:
+                legacy.add(other.id)
+        legacy_latency.append(time.perf_counter() - t)
+
+        expected = {
+            f"k{j}" for j, (words, ps) in enumerate(features)
+            if (jaccard(new_topics[i].split(), words) + jaccard(new_prereqs[i], ps)) / 2 > 0.6
+        }
+
+        t = time.perf_counter()
+        result = await system.store_expert_knowledge(
+            "expert", "math", KnowledgeType.CONCEPTUAL, content, QualityLevel.INTERMEDIATE, validation_required=False
+        )
+        indexed_latency.append(time.perf_counter() - t)
+        linked = {
+            c["related_knowledge_id"] for c in db.get(KnowledgeNode, result["knowledge_id"]).connections
+            if c["related_knowledge_id"].startswith("k")
+        }
+        assert linked == expected, (linked ^ expected)
+        legacy_links += len(legacy)
+        indexed_links += len(linked)
+        expected_links += len(expected)
+        recovered_legacy += len(legacy & expected)
+        db.expunge_all()
+
+    print(f"links over the whole domain (brute force): {expected_links}")
+    print(f"legacy   10-node scan      {percentiles(legacy_latency)}  links {legacy_links} "
+          f"({recovered_legacy}/{expected_links} recovered)")
+    print(f"indexed  store_expert_knowledge incl. commits  {percentiles(indexed_latency)}  "
+          f"links {indexed_links} ({indexed_links}/{expected_links} recovered)")
+
+
+def legacy_build_knowledge_graph(memory, agent_id):
+    """The previous implementation (without its 100-entity cap), kept for comparison"""
+    entities = memory.get_agent_knowledge_entities(agent_id, min_confidence=0.5, limit=None)
+    graph = {"total_entities": len(entities), "entity_types": {}, "connections": [], "high_confidence_entities": []}
+    for entity in entities:
+        graph["entity_types"][entity.entity_type] = graph["entity_types"].get(entity.entity_type, 0) + 1
+        if entity.confidence >= 0.8:
+            graph["high_confidence_entities"].append({
+                "id": entity.id, "name": entity.entity_name, "type": entity.entity_type,
+                "confidence": entity.confidence, "connections_count": len(entity.connections)
+            })
+        for connection in entity.connections:
+            graph["connections"].append({
+                "source": entity.id, "source_name": entity.entity_name, "target": connection.get("target"),
+                "relationship": connection.get("relationship", "related_to"), "strength": connection.get("strength", 0.5)
+            })
+    return graph
+
+
+def bench_agent(db, args):
+    rng = np.random.default_rng(3)
+    agent_id = "agent-bench"
+    ids = [f"e{i}" for i in range(args.entities)]
+    types = ["concept", "skill", "fact", "procedure", "insight"]
+    confidences = rng.random(args.entities).round(3)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(args.entities):
+        targets = rng.choice(args.entities, rng.integers(0, 4), replace=False)
+        rows.append({
+            "id": ids[i], "agent_id": agent_id, "entity_type": types[i % len(types)], "entity_name": f"entity {i}",
+            "entity_data": {}, "confidence": float(confidences[i]), "created_at": now, "updated_at": now,
+            "connections": [{"target": ids[t], "relationship": "related_to", "strength": 0.5} for t in targets]
+        })
+    for start in range(0, len(rows), 5000):
+        db.execute(insert(KnowledgeEntity.__table__), rows[start:start + 5000])
+    db.commit()
+
+    memory = AgentMemoryManager(db)
+    latencies = []
+    for _ in range(5):
+        db.expunge_all()
+        t = time.perf_counter()
+        legacy = legacy_build_knowledge_graph(memory, agent_id)
+        latencies.append(time.perf_counter() - t)
+    print(f"agent with {args.entities:,} entities, {sum(len(r['connections']) for r in rows):,} connections")
+    print(f"legacy   build_knowledge_graph              {percentiles(latencies)}  "
+          f"({len(legacy['connections']):,} connections returned)")
+
+    t = time.perf_counter()
+    memory._ensure_knowledge_graph(agent_id)
+    print(f"first materialization                       {(time.perf_counter() - t) * 1000:.0f} ms")
+
+    for label, limit in (("summary, 1000 connections", 1000), ("all connections", None)):
+        latencies = []
+        for _ in range(5):
+            db.expunge_all()
+            t = time.perf_counter()
+            graph = memory.build_knowledge_graph(agent_id, max_connections=limit)
+            latencies.append(time.perf_counter() - t)
+        assert graph["total_entities"] == legacy["total_entities"]
+        assert graph["entity_types"] == legacy["entity_types"]
+        print(f"indexed  build_knowledge_graph {label:<26} {percentiles(latencies)}")
+
+    latencies = []
+    for i in range(200):
+        targets = rng.choice(args.entities, 2, replace=False)
+        t = time.perf_counter()
+        memory.create_knowledge_entity(agent_id, "concept", f"new {i}", {}, [{"target": ids[x]} for x in targets], 0.9)
+        latencies.append(time.perf_counter() - t)
+    graph = memory.build_knowledge_graph(agent_id, max_connections=0)
+    print(f"create_knowledge_entity incl. graph writes  {percentiles(latencies)}  "
+          f"(total_entities now {graph['total_entities']:,})")
+
+    latencies, sizes = [], []
+    for center in rng.choice(args.entities, 200, replace=False):
+        t = time.perf_counter()
+        neighborhood = memory.get_knowledge_neighborhood(agent_id, ids[center], hops=2)
+        latencies.append(time.perf_counter() - t)
+        sizes.append(len(neighborhood["nodes"]))
+    print(f"2-hop neighborhood                          {percentiles(latencies)}  (mean {np.mean(sizes):.1f} nodes)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--domain-nodes", type=int, default=100000)
+    parser.add_argument("--new-nodes", type=int, default=200)
+    parser.add_argument("--vocabulary", type=int, default=2000)
+    parser.add_argument("--prerequisites", type=int, default=500)
+    parser.add_argument("--entities", type=int, default=20000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'graph.db')}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        asyncio.run(bench_domain(db, args))
+        _candidate_indexes.clear()
+        bench_agent(db, args)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Benchmark: concurrent, deduplicated literature review pipeline.
+
+Serves a synthetic corpus from local fake sources (paged, with simulated
+latency and per-source rate limits):
+
+  primary    N papers with DOIs
+  mirror     40% of primary, DOIs as resolver URLs in upper case
+  preprints  30% of N: half are primary papers without a DOI and with a
+             re-punctuated title, half are new
+
+and runs search -> dedup -> inclusion -> theme extraction through
+LiteratureReviewPipeline, checking the deduplicated count. The legacy path
+(sequential search, list-membership exclusion, per-paper substring theme
+assignment) is timed on a smaller corpus since it is quadratic.
+
+Usage: python benchmarks/bench_literature_review.py [--papers 100000] [--legacy-papers 5000]
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dryad.university.services.literature_engine import LiteratureReviewPipeline, LiteratureSource
+
+TOPICS = ["learning", "assessment", "curriculum", "feedback", "motivation", "tutoring", "retention",
+          "collaboration", "simulation", "analytics", "engagement", "literacy", "mathematics", "language"]
+FILLER = ["study", "results", "students", "effects", "approach", "evidence", "outcomes", "design",
+          "online", "classroom", "teachers", "practice", "model", "survey", "trial", "cohort"]
+
+
+def make_corpus(n_papers, seed=7):
+    rng = np.random.default_rng(seed)
+    topics = rng.choice(TOPICS, size=(n_papers, 2))
+    filler = rng.choice(FILLER, size=(n_papers, 12))
+    papers = []
+    for i in range(n_papers):
+        a, b = topics[i]
+        papers.append({
+            "title": f"Paper {i}: {a.title()} and {b} in adaptive education",
+            "abstract": f"This {filler[i, 0]} examines {a} with {' '.join(filler[i, 1:])}.",
+            "authors": [f"Author {i % 997}", f"Author {(i * 7) % 991}"],
+            "year": 2010 + i % 15,
+            "doi": f"10.1000/paper.{i}",
+        })
+    return papers
+
+
+def make_sources(n_papers, page_size, latency):
+    corpus = make_corpus(n_papers)
+    mirror = [
+        dict(p, doi=f"HTTPS://DOI.ORG/{p['doi'].upper()}")
+        for p in corpus[: int(n_papers * 0.4)]
+    ]
+    half = int(n_papers * 0.15)
+    preprints = [
+        dict(p, doi=None, title=p["title"].upper().replace(":", " -"))
+        for p in corpus[-half:]
+    ] + [
+        {"title": f"Preprint {i} on {TOPICS[i % len(TOPICS)]}", "abstract": "Early results.", "year": 2024}
+        for i in range(half)
+    ]
+    expected_unique = n_papers + half
+
+    def paged(papers):
+        async def fetch(query, cursor):
+            await asyncio.sleep(latency)
+            start = cursor or 0
+            end = start + page_size
+            return {"papers": papers[start:end], "next_cursor": end if end < len(papers) else None}
+        return fetch
+
+    return {
+        "primary": (paged(corpus), corpus),
+        "mirror": (paged(mirror), mirror),
+        "preprints": (paged(preprints), preprints),
+    }, expected_unique
+
+
+async def run_pipeline(n_papers, page_size, latency, rate_limit, query):
+    sources, expected_unique = make_sources(n_papers, page_size, latency)
+    pipeline = LiteratureReviewPipeline([
+        LiteratureSource(name=name, fetch=fetch, rate_limit=rate_limit, burst=4)
+        for name, (fetch, _) in sources.items()
+    ])
+
+    start = time.perf_counter()
+    index, reports = await pipeline.search(query)
+    searched = time.perf_counter()
+    included_ids, _ = pipeline.select(index, query)
+    excluded = len(index) - len(included_ids)
+    selected = time.perf_counter()
+    themes = index.themes(20)
+    done = time.perf_counter()
+
+    print(f"Pipeline, {sum(len(p) for _, p in sources.values()):,} papers returned by {len(sources)} sources")
+    for name, report in reports.items():
+        print(f"  {name:<10} {report['pages']:>4} pages  {report['papers']:>7,} papers  "
+              f"{report['new_papers']:>7,} new  {report['elapsed_seconds']:.2f}s")
+    print(f"  unique papers     {len(index):,} (expected {expected_unique:,}, {index.duplicates:,} duplicates)")
+    print(f"  included/excluded {len(included_ids):,}/{excluded:,}")
+    print(f"  top themes        {', '.join(t for t, _ in themes['top_keywords'][:5])}")
+    print(f"  search+dedup      {searched - start:.2f}s")
+    print(f"  inclusion         {(selected - searched) * 1000:.1f} ms")
+    print(f"  themes            {(done - selected) * 1000:.1f} ms")
+    assert len(index) == expected_unique, "deduplication mismatch"
+
+
+async def run_legacy(n_papers, page_size, latency, query):
+    sources, _ = make_sources(n_papers, page_size, latency)
+    start = time.perf_counter()
+    all_papers = []
+    for fetch, _ in sources.values():
+        cursor = None
+        while True:
+            page = await fetch(None, cursor)
+            all_papers.extend(page["papers"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+    searched = time.perf_counter()
+
+    words = query.lower().split()
+    included = [
+        p for p in all_papers
+        if sum(1 for w in words if w in p.get("title", "").lower() or w in p.get("abstract", "").lower()) >= 1
+    ]
+    excluded = [p for p in all_papers if p not in included]
+    selected = time.perf_counter()
+
+    frequency = Counter()
+    for p in included:
+        text = (p.get("title", "") + " " + p.get("abstract", "")).lower()
+        frequency.update(w for w in re.findall(r"\b\w+\b", text) if len(w) > 3)
+    themes = [k for k, _ in frequency.most_common(20)]
+    for p in included:
+        text = (p.get("title", "") + " " + p.get("abstract", "")).lower()
+        p["themes"] = [k for k in themes if k in text]
+    done = time.perf_counter()
+
+    print(f"Legacy, {len(all_papers):,} papers (no deduplication)")
+    print(f"  included/excluded {len(included):,}/{len(excluded):,}")
+    print(f"  search            {searched - start:.2f}s")
+    print(f"  inclusion         {(selected - searched) * 1000:.1f} ms")
+    print(f"  themes            {(done - selected) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--papers", type=int, default=100000)
+    parser.add_argument("--legacy-papers", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated seconds per page")
+    parser.add_argument("--rate-limit", type=float, default=20.0, help="requests per second per source")
+    parser.add_argument("--query", default="feedback motivation")
+    args = parser.parse_args()
+
+    asyncio.run(run_legacy(args.legacy_papers, args.page_size, args.latency, args.query))
+    print()
+    asyncio.run(run_pipeline(args.legacy_papers, args.page_size, args.latency, args.rate_limit, args.query))
+    print()
+    asyncio.run(run_pipeline(args.papers, args.page_size, args.latency, args.rate_limit, args.query))
+
+
+if __name__ == "__main__":
+    main()
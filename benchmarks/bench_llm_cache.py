@@ -0,0 +1,210 @@
+"""
+Benchmark: LLM calls, tokens and latency with and without the response cache.
+
+A fake chat model answers after a lognormal delay and bills prompt plus
+completion tokens. A Zipf-distributed stream of consultations over a set of
+topics is replayed through LLMResponseCache.get_or_compute, with a share of
+the requests reworded (extra whitespace and line breaks, or a polite "please")
+the way users repeat themselves:
+
+  none      every request calls the model
+  exact     L1 + SQLite L2, exact keys over the normalized prompt
+  semantic  exact tiers plus the semantic tier. sentence-transformers is not
+            assumed here, so a hashed bag-of-words embedder stands in for
+            the embedding model. "wrong" counts semantic hits that returned
+            another topic's answer
+
+Two more runs check the cache contract:
+
+  stampede  N concurrent identical prompts must reach the model once
+  restart   a new cache on the same SQLite file answers from L2; lookup
+            latency for L1 and L2 hits is reported
+
+Usage: python benchmarks/bench_llm_cache.py [--requests 2000] [--topics 200]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dryad.core.llm_cache import LLMResponseCache
+
+SUBJECTS = ["billing", "search", "auth", "ingest", "gateway", "scheduler", "storage", "reports", "alerts", "exports"]
+ASPECTS = ["latency", "error budget", "schema migration", "capacity plan", "rollback", "cost", "on-call load",
+           "data retention", "test coverage", "dependency upgrade"]
+VERBS = ["summarize", "review", "assess", "explain"]
+TEMPLATE = "Vessel context: {subject} service.\nQuestion: {verb} the {aspect} of the {subject} service for release {n}."
+
+
+class FakeChatModel:
+    """Lognormal latency, 4 characters per token"""
+
+    model_name = "fake-gpt"
+
+    def __init__(self, latency, rng):
+        self.latency = latency
+        self.rng = rng
+        self.calls = 0
+        self.tokens = 0
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.latency * self.rng.lognormvariate(0, 0.3))
+        answer = f"Answer for: {' '.join(prompt.split())}"
+        self.tokens += (len(prompt) + 4 * len(answer)) // 4
+        return answer
+
+
+def embed(text, dim=512):
+    """Hashed bag-of-words, standing in for a sentence embedding model"""
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in re.findall(r"[a-z0-9-]+", text.lower()):
+        vector[int(hashlib.md5(word.encode()).hexdigest()[:8], 16) % dim] += 1.0
+    return vector
+
+
+def make_workload(args, rng):
+    topics = [
+        dict(subject=rng.choice(SUBJECTS), aspect=rng.choice(ASPECTS), verb=rng.choice(VERBS), n=rng.randint(1, 99))
+        for _ in range(args.topics)
+    ]
+    weights = [1 / (i + 1) ** args.zipf for i in range(args.topics)]
+    workload = []
+    for _ in range(args.requests):
+        i = rng.choices(range(args.topics), weights)[0]
+        prompt = TEMPLATE.format(**topics[i])
+        roll = rng.random()
+        if roll < args.reworded / 2:
+            prompt = prompt.replace(" the ", "  the ").replace("Question:", "Question:\n")
+        elif roll < args.reworded:
+            prompt = prompt.replace("Question: ", "Question: please ")
+        workload.append(("{aspect} of the {subject} service for release {n}.".format(**topics[i]), prompt))
+    return workload
+
+
+async def replay(args, workload, cache):
+    model = FakeChatModel(args.latency, random.Random(7))
+    latencies = []
+    wrong = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(topic, prompt):
+        """topic is the phrase that identifies the right answer"""
+        nonlocal wrong
+        async with semaphore:
+            started = time.perf_counter()
+            if cache is None:
+                answer = await model.ainvoke(prompt)
+            else:
+                answer = await cache.get_or_compute(
+                    model=model.model_name, prompt=prompt, compute=lambda: model.ainvoke(prompt),
+                    params={"provider": "fake", "temperature": 0.7}, namespace="oracle_consultation"
+                )
+            latencies.append(time.perf_counter() - started)
+            if topic not in answer:
+                wrong += 1
+
+    await asyncio.gather(*(one(topic, prompt) for topic, prompt in workload))
+    return model, np.array(latencies) * 1000, wrong
+
+
+async def bench_workload(args, directory):
+    workload = make_workload(args, random.Random(1))
+    distinct = len({" ".join(prompt.split()) for _, prompt in workload})
+    print(f"{args.requests} consultations over {args.topics} topics (zipf {args.zipf}), "
+          f"{args.reworded:.0%} reworded, {distinct} distinct normalized prompts, "
+          f"model latency {args.latency * 1000:.0f} ms, concurrency {args.concurrency}")
+    baseline_tokens = None
+    for label in ("none", "exact", "semantic"):
+        cache = None
+        if label != "none":
+            cache = LLMResponseCache(
+                path=os.path.join(directory, f"{label}.db"),
+                embed=embed if label == "semantic" else None,
+                semantic_threshold=args.threshold
+            )
+        model, latencies, wrong = await replay(args, workload, cache)
+        baseline_tokens = baseline_tokens or model.tokens
+        line = (f"{label:<9} LLM calls {model.calls:5d}  tokens {model.tokens:8d} "
+                f"({1 - model.tokens / baseline_tokens:5.1%} saved)  "
+                f"latency p50 {np.percentile(latencies, 50):6.1f} ms  p95 {np.percentile(latencies, 95):6.1f} ms")
+        if cache is not None:
+            metrics = cache.get_metrics()
+            line += (f"  hit rate {metrics['hit_rate']:.1%} (l1 {metrics['hits_l1']}, l2 {metrics['hits_l2']}, "
+                     f"semantic {metrics['hits_semantic']}, coalesced {metrics['coalesced']})  wrong {wrong}")
+            cache.close()
+        print(line)
+
+
+async def bench_stampede(args, directory):
+    model = FakeChatModel(args.latency, random.Random(3))
+    cache = LLMResponseCache(path=os.path.join(directory, "stampede.db"))
+    prompt = TEMPLATE.format(subject="billing", aspect="cost", verb="review", n=1)
+    await asyncio.gather(*(
+        cache.get_or_compute(model=model.model_name, prompt=prompt, compute=lambda: model.ainvoke(prompt))
+        for _ in range(args.stampede)
+    ))
+    print(f"stampede: {args.stampede} concurrent identical prompts -> {model.calls} LLM call(s), "
+          f"{cache.get_metrics()['coalesced']} coalesced")
+    cache.close()
+
+
+async def bench_restart(args, directory):
+    path = os.path.join(directory, "restart.db")
+    model = FakeChatModel(0.0, random.Random(4))
+    prompts = [TEMPLATE.format(subject=s, aspect=a, verb="review", n=1) for s in SUBJECTS for a in ASPECTS]
+    cache = LLMResponseCache(path=path)
+    for prompt in prompts:
+        await cache.get_or_compute(model=model.model_name, prompt=prompt, compute=lambda: model.ainvoke(prompt))
+    started = time.perf_counter()
+    for prompt in prompts:
+        await cache.get_or_compute(model=model.model_name, prompt=prompt, compute=lambda: model.ainvoke(prompt))
+    l1_us = (time.perf_counter() - started) / len(prompts) * 1e6
+    cache.close()
+
+    calls = model.calls
+    cache = LLMResponseCache(path=path)
+    started = time.perf_counter()
+    for prompt in prompts:
+        await cache.get_or_compute(model=model.model_name, prompt=prompt, compute=lambda: model.ainvoke(prompt))
+    l2_us = (time.perf_counter() - started) / len(prompts) * 1e6
+    print(f"restart: {len(prompts)} prompts answered by a fresh cache with {model.calls - calls} LLM calls "
+          f"({cache.get_metrics()['hits_l2']} L2 hits); lookup L1 {l1_us:.0f} us, L2 {l2_us:.0f} us")
+    cache.close()
+
+
+async def bench(args):
+    with tempfile.TemporaryDirectory() as directory:
+        await bench_workload(args, directory)
+        await bench_stampede(args, directory)
+        await bench_restart(args, directory)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--zipf", type=float, default=1.0, help="topic popularity skew")
+    parser.add_argument("--reworded", type=float, default=0.3, help="share of requests reworded")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per LLM call")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--threshold", type=float, default=0.97, help="semantic tier cosine threshold")
+    parser.add_argument("--stampede", type=int, default=100)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
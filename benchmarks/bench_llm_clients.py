@@ -0,0 +1,190 @@
+"""
+Benchmark: per-request LLM client construction vs the model registry.
+
+Measures the setup cost an agent chat turn paid before and after the model
+registry and the agent configuration cache:
+
+  client    building a chat model per turn vs a registry lookup. With
+            langchain-openai installed this is LLMFactory.create_model vs
+            LLMFactory.get_model. Without it, it is the httpx client that
+            each ChatOpenAI builds (openai.AsyncOpenAI creates its own
+            client, SSL context included) vs a lookup that returns a model
+            on the shared pool.
+  request   one POST to a local keep-alive HTTP server, either on a fresh
+            client per turn (new TCP connection, client torn down after)
+            or on the shared pooled client
+  config    loading the Agent row with a SELECT per turn (in-memory SQLite)
+            vs an AgentConfigCache hit
+
+Usage: python benchmarks/bench_llm_clients.py [--turns 2000]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dryad.infrastructure.llm.providers import LLMConfig
+from dryad.infrastructure.llm.registry import HTTPClientPool, ModelRegistry, model_key
+
+RESPONSE = b'{"choices": [{"message": {"role": "assistant", "content": "hi"}}]}'
+
+
+async def handle(reader, writer):
+    """Minimal HTTP/1.1 keep-alive server that answers every request with RESPONSE"""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            if length:
+                await reader.readexactly(length)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(RESPONSE)).encode() + b"\r\n\r\n" + RESPONSE
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+def timed(n, fn):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+async def atimed(n, fn):
+    start = time.perf_counter()
+    for _ in range(n):
+        await fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def report(label, before_us, after_us):
+    print(f"{label:<8} per turn: before {before_us:9.1f} us   after {after_us:7.1f} us   "
+          f"({before_us / max(after_us, 1e-9):,.0f}x)")
+
+
+async def bench_clients(args):
+    config = LLMConfig(provider="openai", model_name="gpt-4o", temperature=0.7, api_key="sk-bench")
+    try:
+        from dryad.infrastructure.llm.factory import LLMFactory
+    except ImportError:
+        LLMFactory = None
+
+    if LLMFactory is not None:
+        n = max(1, args.turns // 10)
+        before = timed(n, lambda: LLMFactory.create_model(config))
+        LLMFactory.get_model(config)
+        after = timed(args.turns, lambda: LLMFactory.get_model(config))
+        report("client", before, after)
+        return
+
+    print("langchain-openai not installed; timing the httpx client each ChatOpenAI builds")
+    clients = []
+    n = max(1, args.turns // 10)
+    before = timed(n, lambda: clients.append(httpx.AsyncClient()))
+    for client in clients:
+        await client.aclose()
+    registry = ModelRegistry(pool=HTTPClientPool())
+    build = lambda pool: pool.async_client
+    registry.get(model_key(config), build)
+    after = timed(args.turns, lambda: registry.get(model_key(config), build))
+    report("client", before, after)
+    await registry.aclose()
+
+
+async def bench_requests(args):
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/v1/chat/completions"
+    body = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}]}
+
+    async def fresh():
+        async with httpx.AsyncClient() as client:
+            (await client.post(url, json=body)).raise_for_status()
+
+    pool = HTTPClientPool()
+
+    async def pooled():
+        (await pool.async_client.post(url, json=body)).raise_for_status()
+
+    n = max(1, args.turns // 4)
+    before = await atimed(n, fresh)
+    await pooled()
+    after = await atimed(n, pooled)
+    report("request", before, after)
+    await pool.aclose()
+    server.close()
+    await server.wait_closed()
+
+
+async def bench_config(args):
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import StaticPool
+
+    from dryad.core.agent_config_cache import AgentConfigCache
+    from dryad.domain.agent.models import Agent
+    from dryad.domain.user.models import User  # noqa: F401 (agents.created_by references users)
+    from dryad.infrastructure.database import Base
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessions() as db:
+        agent = Agent(name="bench", system_prompt="You are helpful.", model_provider="mock", model_name="mock",
+                      created_by="bench-user")
+        db.add(agent)
+        await db.commit()
+        agent_id = agent.id
+
+    uncached = AgentConfigCache(ttl_seconds=0)
+    cache = AgentConfigCache(ttl_seconds=60)
+    async with sessions() as db:
+        before = await atimed(args.turns, lambda: uncached.get(db, agent_id))
+        await cache.get(db, agent_id)
+        after = await atimed(args.turns, lambda: cache.get(db, agent_id))
+    report("config", before, after)
+
+    # An update through any session invalidates the cached snapshot
+    import dryad.core.agent_config_cache as agent_config_cache
+    agent_config_cache._cache = cache
+    async with sessions() as db:
+        row = await db.get(Agent, agent_id)
+        row.system_prompt = "You are terse."
+        await db.commit()
+    async with sessions() as db:
+        refreshed = await cache.get(db, agent_id)
+    print(f"after an update the cache returns the new prompt: {refreshed.system_prompt == 'You are terse.'}  "
+          f"(stats {cache.get_stats()})")
+    await engine.dispose()
+
+
+async def bench(args):
+    await bench_clients(args)
+    await bench_requests(args)
+    await bench_config(args)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
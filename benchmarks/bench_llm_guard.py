@@ -0,0 +1,178 @@
+"""
+Benchmark: LLM call guard under latency spikes and error bursts.
+
+A fake chat model answers after a log-normal latency (about 50 ms). Past its
+capacity, the latency grows with the number of calls in flight. An
+open-loop stream of requests, each with a one-second deadline, runs through
+two scenarios. Each scenario has three phases: normal, the incident, then
+recovered. The incidents are:
+
+  errors     an error burst: 70% of calls fail fast with a 503
+  spike      a latency spike: latency x15, so the provider saturates
+
+The benchmark compares
+
+  naive    wait_for with a per-attempt timeout and two immediate retries,
+           which is how the call sites behaved before
+  guarded  LLMCallGuard with a circuit breaker, retry budget, AIMD
+           concurrency limit and deadline propagation
+
+and reports per phase the success rate, the share answered within the
+deadline, request latency (successes and failures alike), provider calls per request (retry amplification) and the
+peak number of calls in flight at the provider.
+
+Usage: python benchmarks/bench_llm_guard.py [--rate 150] [--phase-seconds 2]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dryad.core.llm_error_handler import LLMCallGuard, llm_deadline
+from dryad.core.provider_telemetry import CircuitBreaker, ProviderTelemetry
+
+SCENARIOS = ("errors", "spike")
+
+
+class ProviderError(Exception):
+    """Stands in for an HTTP error from a provider SDK"""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeChatModel:
+    """A chat model with a capacity, a latency distribution and scripted incidents"""
+
+    def __init__(self, phase_of, phases, capacity, rng):
+        self.phase_of = phase_of
+        self.capacity = capacity
+        self.rng = rng
+        self.in_flight = 0
+        self.peak = {phase: 0 for phase in phases}
+        self.calls = {phase: 0 for phase in phases}
+
+    async def ainvoke(self, messages):
+        phase = self.phase_of()
+        self.calls[phase] += 1
+        self.in_flight += 1
+        self.peak[phase] = max(self.peak[phase], self.in_flight)
+        try:
+            if phase == "errors" and self.rng.random() < 0.7:
+                await asyncio.sleep(0.02)
+                raise ProviderError(503)
+            latency = 0.05 * self.rng.lognormvariate(0, 0.3)
+            latency *= 1 + max(0, self.in_flight - self.capacity) / self.capacity
+            if phase == "spike":
+                latency *= 15
+            await asyncio.sleep(latency)
+            return "answer"
+        finally:
+            self.in_flight -= 1
+
+
+async def naive_call(model, timeout, retries):
+    for attempt in range(retries + 1):
+        try:
+            return await asyncio.wait_for(model.ainvoke("hi"), timeout)
+        except Exception:
+            if attempt == retries:
+                raise
+
+
+async def run(label, args, incident, make_call):
+    rng = random.Random(3)
+    phases = ("normal", incident, "recovered")
+    started = time.monotonic()
+
+    def phase_of():
+        return phases[min(len(phases) - 1, int((time.monotonic() - started) / args.phase_seconds))]
+
+    model = FakeChatModel(phase_of, phases, args.capacity, random.Random(5))
+    call = make_call(model)
+    results = {phase: [] for phase in phases}
+    requests = {phase: 0 for phase in phases}
+
+    async def request():
+        phase = phase_of()
+        requests[phase] += 1
+        t = time.monotonic()
+        with llm_deadline(args.deadline):
+            try:
+                await call()
+                ok = True
+            except Exception:
+                ok = False
+        results[phase].append((time.monotonic() - t, ok))
+
+    tasks = []
+    end = started + args.phase_seconds * len(phases)
+    while time.monotonic() < end:
+        tasks.append(asyncio.ensure_future(request()))
+        await asyncio.sleep(rng.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+
+    for phase in phases:
+        latencies = np.array([r[0] for r in results[phase]]) * 1000
+        ok = sum(1 for r in results[phase] if r[1])
+        on_time = sum(1 for r in results[phase] if r[1] and r[0] <= args.deadline)
+        print(f"{label:<8} {phase:<9} success {ok / len(results[phase]):6.1%}  "
+              f"within deadline {on_time / len(results[phase]):6.1%}  "
+              f"p50 {np.percentile(latencies, 50):6.0f} ms  p99 {np.percentile(latencies, 99):6.0f} ms  "
+              f"calls/request {model.calls[phase] / requests[phase]:.2f}  peak in flight {model.peak[phase]:3d}")
+
+
+def make_guard(args):
+    # Cooldowns scaled to the phase length, as 30s-300s cooldowns are to incidents lasting minutes
+    telemetry = ProviderTelemetry(breaker_factory=lambda name: CircuitBreaker(
+        name, cooldown_seconds=args.phase_seconds / 20, max_cooldown_seconds=args.phase_seconds / 5
+    ))
+    return LLMCallGuard(telemetry=telemetry, config={
+        "LLM_CALL_TIMEOUT_SECONDS": args.deadline,
+        "LLM_MAX_RETRIES": args.retries,
+        "LLM_RETRY_BACKOFF_SECONDS": 0.02,
+        "LLM_CONCURRENCY_INITIAL": 8,
+        "LLM_CONCURRENCY_MAX": 128,
+        "LLM_QUEUE_TIMEOUT_SECONDS": 0.5
+    })
+
+
+async def bench(args):
+    print(f"{args.rate:g} requests/s, {args.phase_seconds:g}s per phase, provider capacity {args.capacity}, "
+          f"deadline {args.deadline}s, up to {args.retries} retries")
+    for incident in SCENARIOS:
+        await run("naive", args, incident, lambda model: lambda: naive_call(model, args.deadline, args.retries))
+        guard = make_guard(args)
+        await run("guarded", args, incident, lambda model: lambda: guard.call("fake", lambda: model.ainvoke("hi")))
+        metrics = guard.get_metrics()["fake"]
+        print("guard counters: " + ", ".join(
+            f"{key} {metrics[key]}" for key in (
+                "calls", "successes", "failures", "timeouts", "retries", "retry_budget_exhausted",
+                "circuit_rejected", "limit_rejected", "deadline_exceeded"
+            ) if key in metrics
+        ) + f", final concurrency limit {metrics['concurrency_limit']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=150.0, help="requests per second")
+    parser.add_argument("--phase-seconds", type=float, default=2.0)
+    parser.add_argument("--capacity", type=int, default=16, help="calls in flight before the fake provider slows down")
+    parser.add_argument("--deadline", type=float, default=1.0)
+    parser.add_argument("--retries", type=int, default=2)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark: hedged, quorum-aware multi-provider consultation.
+
+Fake providers sleep for a latency drawn from a log-normal distribution. A
+configurable share of calls hit a slow mode that takes many times longer (a
+cold model, a queueing spike), and a small share fail. Each consultation asks
+a panel of P providers for K successful answers. The benchmark compares
+
+  gather    the previous multi_consult: asyncio.gather under one wait_for;
+            a timeout discards every response
+  quorum    ConsultScheduler with early quorum only (no hedging)
+  hedged    ConsultScheduler with early quorum and p95 hedging
+
+and reports consultation latency percentiles, how many consultations
+returned without enough answers, and how many extra provider calls
+hedging cost.
+
+Usage: python benchmarks/bench_multi_consult.py [--consultations 2000] [--providers 5] [--quorum 3]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dryad.core.consult_scheduler import ConsultScheduler, LatencyWindow, SUCCEEDED, TIMED_OUT
+
+
+class FakeProvider:
+    """A provider whose latency is log-normal around median_ms, with a slow mode and failures"""
+
+    def __init__(self, provider_id, median_ms, sigma, slow_share, slow_factor, fail_share, rng):
+        self.provider_id = provider_id
+        self.median = median_ms / 1000
+        self.sigma = sigma
+        self.slow_share = slow_share
+        self.slow_factor = slow_factor
+        self.fail_share = fail_share
+        self.rng = rng
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        latency = self.median * self.rng.lognormvariate(0, self.sigma)
+        if self.rng.random() < self.slow_share:
+            latency *= self.slow_factor
+        await asyncio.sleep(latency)
+        if self.rng.random() < self.fail_share:
+            raise RuntimeError(f"{self.provider_id} failed")
+        return self.provider_id
+
+
+def make_providers(args, seed):
+    rng = random.Random(seed)
+    return {
+        f"p{i}": FakeProvider(
+            f"p{i}", args.median_ms * (1 + 0.25 * i), args.sigma, args.slow_share, args.slow_factor, args.fail_share, rng
+        )
+        for i in range(args.providers)
+    }
+
+
+async def gather_consult(providers, args):
+    tasks = [provider() for provider in providers.values()]
+    try:
+        responses = await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=args.timeout)
+    except asyncio.TimeoutError:
+        responses = []
+    return sum(1 for r in responses if not isinstance(r, BaseException)), False
+
+
+async def scheduled_consult(providers, args, scheduler):
+    outcome = await scheduler.run(
+        list(providers),
+        lambda provider_id: providers[provider_id](),
+        timeout=args.timeout,
+        decided=lambda successes, pending: len(successes) >= args.quorum or len(successes) + pending < args.quorum
+    )
+    return outcome.count(SUCCEEDED), outcome.count(TIMED_OUT) > 0
+
+
+async def run(label, args, consult):
+    providers = make_providers(args, seed=11)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, short = [], 0
+
+    async def one():
+        nonlocal short
+        async with semaphore:
+            t = time.perf_counter()
+            succeeded, _ = await consult(providers)
+            latencies.append(time.perf_counter() - t)
+            if succeeded < args.quorum:
+                short += 1
+
+    await asyncio.gather(*(one() for _ in range(args.consultations)))
+    ms = np.array(latencies) * 1000
+    calls = sum(p.calls for p in providers.values())
+    print(f"{label:<8} p50 {np.percentile(ms, 50):7.1f} ms  p95 {np.percentile(ms, 95):7.1f} ms  "
+          f"p99 {np.percentile(ms, 99):7.1f} ms  max {ms.max():7.1f} ms  "
+          f"short of quorum {short:4d}  provider calls/consult {calls / args.consultations:.2f}")
+
+
+async def bench(args):
+    print(f"{args.consultations} consultations, {args.providers} providers, quorum {args.quorum}, "
+          f"median {args.median_ms:.0f}-{args.median_ms * (1 + 0.25 * (args.providers - 1)):.0f} ms, "
+          f"{args.slow_share:.0%} slow x{args.slow_factor:g}, {args.fail_share:.0%} failures, timeout {args.timeout}s")
+    await run("gather", args, lambda providers: gather_consult(providers, args))
+
+    scheduler = ConsultScheduler(hedging_enabled=False)
+    await run("quorum", args, lambda providers: scheduled_consult(providers, args, scheduler))
+
+    # Warm the latency windows so hedge thresholds reflect each provider's p95
+    scheduler = ConsultScheduler(LatencyWindow(size=args.window, min_samples=20))
+    warm = make_providers(args, seed=5)
+    for _ in range(max(1, args.window // args.providers)):
+        await asyncio.gather(*(
+            scheduled_consult({pid: p}, argparse.Namespace(**{**vars(args), "quorum": 1}), scheduler)
+            for pid, p in warm.items()
+        ))
+    thresholds = ", ".join(f"{pid} {s['p95_ms']:.0f}" for pid, s in scheduler.latencies.get_stats().items())
+    print(f"hedge thresholds (rolling p95, ms): {thresholds}")
+    await run("hedged", args, lambda providers: scheduled_consult(providers, args, scheduler))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--consultations", type=int, default=2000)
+    parser.add_argument("--providers", type=int, default=5)
+    parser.add_argument("--quorum", type=int, default=3, help="successful answers a consultation needs")
+    parser.add_argument("--median-ms", type=float, default=20.0)
+    parser.add_argument("--sigma", type=float, default=0.3)
+    parser.add_argument("--slow-share", type=float, default=0.05)
+    parser.add_argument("--slow-factor", type=float, default=20.0)
+    parser.add_argument("--fail-share", type=float, default=0.02)
+    parser.add_argument("--timeout", type=float, default=0.5)
+    parser.add_argument("--window", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Benchmark: sliding-window provider telemetry and latency-aware routing.
+
+A discrete-event simulation on a virtual clock (nothing sleeps). Requests
+arrive as a Poisson stream and each goes to one of P providers. Every
+provider has a capacity, and its latency grows with the calls it has in
+flight. Partway through, the fastest provider fails most of its calls for a
+while and then recovers. The simulation compares
+
+  lifetime  the previous select_provider scoring: priority, health from the
+            lifetime error rate, lifetime success rate and average latency
+  p2c       ProviderTelemetry.choose: power-of-two-choices on decayed
+            peak-EWMA latency x in-flight, adjusted for errors, with
+            circuit breakers
+  scan      the same scores compared across every provider (best_of_all,
+            used by select_provider for fast-response requests)
+
+and reports latency percentiles and error rate before, during and after the
+outage. It also reports what the old lifetime counters and the 5-minute
+window say about the provider an hour after it recovered, and the per-call
+cost of record() and choose().
+
+Usage: python benchmarks/bench_provider_routing.py [--requests 200000] [--rate 10]
+"""
+
+import argparse
+import heapq
+import logging
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dryad.core.provider_telemetry import ProviderTelemetry
+
+# provider id, base latency ms, capacity (calls in flight before latency doubles), priority
+PROVIDERS = [("fast", 300.0, 8, 20), ("medium", 600.0, 20, 15), ("slow", 1200.0, 40, 10)]
+
+
+class LifetimeRouter:
+    """The previous select_provider scoring, over lifetime counters"""
+
+    def __init__(self):
+        self.stats = {p[0]: [0, 0, 0.0] for p in PROVIDERS}  # requests, failures, average latency
+        self.priority = {p[0]: p[3] for p in PROVIDERS}
+
+    def choose(self, now):
+        def score(provider_id):
+            requests, failures, average = self.stats[provider_id]
+            error_rate = failures / requests if requests else 0.0
+            score = self.priority[provider_id] * 10
+            score += 50 if error_rate < 0.1 else 25 if error_rate < 0.3 else 0
+            if requests:
+                score += (1 - error_rate) * 30
+                if average > 0:
+                    score += max(0, 20 - average / 100)
+            return score
+        return max(self.stats, key=score)
+
+    def record(self, provider_id, success, latency_ms, now):
+        stats = self.stats[provider_id]
+        stats[0] += 1
+        stats[1] += 0 if success else 1
+        stats[2] += (latency_ms - stats[2]) / stats[0]
+
+    def acquire(self, provider_id, now):
+        return True
+
+
+class TelemetryRouter:
+    def __init__(self, clock, best_of_all=False):
+        self.telemetry = ProviderTelemetry(clock=clock, rng=random.Random(7))
+        self.best_of_all = best_of_all
+
+    def choose(self, now):
+        return self.telemetry.choose([p[0] for p in PROVIDERS], best_of_all=self.best_of_all)
+
+    def record(self, provider_id, success, latency_ms, now):
+        self.telemetry.record(provider_id, success, latency_ms)
+
+    def acquire(self, provider_id, now):
+        return self.telemetry.acquire(provider_id)
+
+
+def simulate(router_factory, args):
+    now = [0.0]
+    router = router_factory(lambda: now[0])
+    rng = random.Random(42)
+    base = {p[0]: p[1] for p in PROVIDERS}
+    capacity = {p[0]: p[2] for p in PROVIDERS}
+    in_flight = {p[0]: 0 for p in PROVIDERS}
+    duration = args.requests / args.rate
+    outage = (duration * 0.3, duration * 0.5)
+    phases = {"before": [], "outage": [], "after": []}
+    errors = {"before": 0, "outage": 0, "after": 0}
+    events = []
+    arrival = 0.0
+    for i in range(args.requests):
+        arrival += rng.expovariate(args.rate)
+        heapq.heappush(events, (arrival, 0, i, None))
+
+    while events:
+        now[0], kind, i, payload = heapq.heappop(events)
+        if kind == 0:
+            phase = "before" if now[0] < outage[0] else "outage" if now[0] < outage[1] else "after"
+            provider_id = router.choose(now[0])
+            if provider_id is None or not router.acquire(provider_id, now[0]):
+                errors[phase] += 1
+                phases[phase].append(0.0)
+                continue
+            in_flight[provider_id] += 1
+            failing = provider_id == "fast" and outage[0] <= now[0] < outage[1] and rng.random() < 0.8
+            load = 1 + in_flight[provider_id] / capacity[provider_id]
+            latency = base[provider_id] * load * rng.lognormvariate(0, 0.25)
+            if failing:
+                latency = min(latency, 100.0)  # fails fast with an error
+            heapq.heappush(events, (now[0] + latency / 1000, 1, i, (provider_id, latency, not failing, phase)))
+        else:
+            provider_id, latency, success, phase = payload
+            in_flight[provider_id] -= 1
+            router.record(provider_id, success, latency, now[0])
+            if success:
+                phases[phase].append(latency)
+            else:
+                errors[phase] += 1
+                phases[phase].append(latency)
+    return router, phases, errors, now[0]
+
+
+def report(label, phases, errors):
+    for phase, latencies in phases.items():
+        ms = np.array(latencies)
+        print(f"{label:<9} {phase:<7} p50 {np.percentile(ms, 50):7.0f} ms  p95 {np.percentile(ms, 95):7.0f} ms  "
+              f"p99 {np.percentile(ms, 99):7.0f} ms  errors {errors[phase] / len(ms):6.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--rate", type=float, default=10.0, help="requests per second")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{args.requests:,} requests at {args.rate:g}/s over {args.requests / args.rate / 60:.0f} simulated minutes; "
+          f"'fast' fails 80% of calls between 30% and 50% of the run")
+    lifetime, phases, errors, _ = simulate(lambda clock: LifetimeRouter(), args)
+    report("lifetime", phases, errors)
+    telemetry, phases, errors, _ = simulate(TelemetryRouter, args)
+    report("p2c", phases, errors)
+    _, phases, errors, _ = simulate(lambda clock: TelemetryRouter(clock, best_of_all=True), args)
+    report("scan", phases, errors)
+
+    requests, failures, _ = lifetime.stats["fast"]
+    print(f"'fast' at the end of the run: lifetime error rate {failures / requests:.1%}; "
+          f"5m window error rate {telemetry.telemetry.window_summary('fast', '5m')['error_rate']:.1%}")
+
+    clock = [0.0]
+    bench = ProviderTelemetry(clock=lambda: clock[0])
+    ids = [f"p{i}" for i in range(5)]
+    n = 200000
+    start = time.perf_counter()
+    for i in range(n):
+        clock[0] += 0.01
+        bench.record(ids[i % 5], i % 17 != 0, 100.0 + i % 300)
+    record_us = (time.perf_counter() - start) / n * 1e6
+    start = time.perf_counter()
+    for _ in range(n):
+        bench.choose(ids)
+    choose_us = (time.perf_counter() - start) / n * 1e6
+    start = time.perf_counter()
+    for _ in range(1000):
+        bench.window_summary("p0", "1h")
+    summary_us = (time.perf_counter() - start) / 1000 * 1e6
+    print(f"record {record_us:.1f} us, choose over 5 providers {choose_us:.1f} us, 1h window summary {summary_us:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
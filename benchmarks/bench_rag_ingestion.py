@@ -0,0 +1,192 @@
+"""
+Benchmark: chunk ingestion throughput, one chunk at a time vs IngestionPipeline.
+
+A synthetic document (--pages pages of prose) is ingested into the
+in-memory fallback store, InMemoryVectorStore. A fake embedder models a
+local embedding model: a fixed cost per call plus a cost per text, with the
+GIL released while it "computes". It returns hashed bag-of-words vectors.
+The store runs in two modes:
+
+  local   InMemoryVectorStore as is
+  remote  each write_chunks call also waits --rtt, plus a small cost per
+          object, like a round trip to Weaviate
+
+Ingestion paths:
+
+  sequential  what RAGSystem._add_document_chunks did: chunk_text into a
+              list, then one embedding call and one single-object write
+              per chunk
+  pipeline    IngestionPipeline.ingest: streamed chunks, batched embeddings
+              on a bounded worker pool, batched writes
+
+Extra runs: re-ingesting the unchanged document, re-ingesting it with 1% of
+its pages edited, and a store that rejects 1% of objects (per-object errors
+are reported while the rest are written).
+
+Usage: python benchmarks/bench_rag_ingestion.py [--pages 500] [--rtt 0.002]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dryad.infrastructure.ingestion import IngestionPipeline, chunk_uuid, content_hash, iter_chunks
+from dryad.infrastructure.vector_store import ChunkRecord, ChunkWriteError, InMemoryVectorStore
+
+WORDS = ("vessel branch oracle dialogue context memory agent guardian workflow schema index vector "
+         "embedding latency throughput request session provider cache model batch chunk document").split()
+
+
+def make_document(pages, rng, chars_per_page=3000):
+    out = []
+    for _ in range(pages):
+        page = []
+        length = 0
+        while length < chars_per_page:
+            sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18))).capitalize() + "."
+            page.append(sentence)
+            length += len(sentence) + 1
+        out.append(" ".join(page))
+    return out
+
+
+class FakeEmbedder:
+    """Fixed cost per call plus a cost per text; sleeping releases the GIL like native inference"""
+
+    def __init__(self, per_call, per_text, dim=384):
+        self.per_call = per_call
+        self.per_text = per_text
+        self.dim = dim
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += 1
+        time.sleep(self.per_call + self.per_text * len(texts))
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"[a-z]+", text.lower()):
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest()[:8], 16) % self.dim] += 1.0
+        return vectors
+
+
+class RemoteStore(InMemoryVectorStore):
+    """InMemoryVectorStore behind a simulated network round trip"""
+
+    def __init__(self, rtt, per_object=0.00002, reject_rate=0.0):
+        super().__init__()
+        self.rtt = rtt
+        self.per_object = per_object
+        self.reject_rate = reject_rate
+        self.requests = 0
+
+    def _wait(self, objects=0):
+        self.requests += 1
+        time.sleep(self.rtt + self.per_object * objects)
+
+    def chunk_ids(self, document_id):
+        self._wait()
+        return super().chunk_ids(document_id)
+
+    def write_chunks(self, records):
+        self._wait(len(records))
+        rejected = [r for r in records if int(r.content_hash[:8], 16) / 0xFFFFFFFF < self.reject_rate]
+        errors = super().write_chunks([r for r in records if r not in rejected])
+        return errors + [ChunkWriteError(r.uuid, r.chunk_index, "simulated rejection") for r in rejected]
+
+    def delete_chunks(self, uuids):
+        self._wait(len(uuids))
+        return super().delete_chunks(uuids)
+
+
+def sequential(store, embed, document_id, text, args):
+    """One embedding call and one single-object write per chunk"""
+    started = time.perf_counter()
+    chunks = list(iter_chunks(text, args.chunk_size, args.overlap))
+    for index, chunk in enumerate(chunks):
+        digest = content_hash(chunk)
+        vector = embed([chunk])[0]
+        store.write_chunks([ChunkRecord(
+            uuid=chunk_uuid(document_id, digest), document_id=document_id, chunk_index=index,
+            content=chunk, content_hash=digest, vector=vector.tolist()
+        )])
+    return len(chunks), time.perf_counter() - started
+
+
+def report_line(label, chunks, seconds, extra=""):
+    print(f"  {label:<22} {chunks:6d} chunks in {seconds:7.2f} s  {chunks / seconds:8.0f} chunks/s  {extra}")
+
+
+async def bench(args):
+    pages = make_document(args.pages, random.Random(1))
+    text = "\n\n".join(pages)
+    print(f"document: {args.pages} pages, {len(text) / 1e6:.1f} MB, chunk {args.chunk_size}/{args.overlap}; "
+          f"embedder {args.embed_call * 1000:.1f} ms/call + {args.embed_text * 1000:.2f} ms/text; "
+          f"batch {args.batch}, {args.workers} workers")
+
+    for mode, rtt in (("local", 0.0), ("remote", args.rtt)):
+        print(f"{mode} store" + (f" ({rtt * 1000:.1f} ms round trip)" if rtt else ""))
+        embed = FakeEmbedder(args.embed_call, args.embed_text)
+        store = RemoteStore(rtt)
+        chunks, seconds = sequential(store, embed, "doc-seq", text, args)
+        report_line("sequential", chunks, seconds, f"({embed.calls} embed calls, {store.requests} store requests)")
+        before = chunks / seconds
+
+        embed = FakeEmbedder(args.embed_call, args.embed_text)
+        store = RemoteStore(rtt)
+        pipeline = IngestionPipeline(store, embed, args.chunk_size, args.overlap, args.batch, args.workers)
+        result = await pipeline.ingest("doc", text)
+        report_line("pipeline", result.chunks, result.seconds,
+                    f"({embed.calls} embed calls, {store.requests} store requests, "
+                    f"{result.chunks_per_second / before:.1f}x)")
+
+        calls, requests = embed.calls, store.requests
+        result = await pipeline.ingest("doc", text)
+        report_line("re-ingest unchanged", result.chunks, result.seconds,
+                    f"(written {result.written}, unchanged {result.unchanged}, "
+                    f"{embed.calls - calls} embed calls, {store.requests - requests} store requests)")
+
+        edited = list(pages)
+        for i in random.Random(2).sample(range(len(edited)), max(1, len(edited) // 100)):
+            edited[i] = edited[i].replace("vessel", "container")
+        result = await pipeline.ingest("doc", "\n\n".join(edited))
+        report_line("re-ingest 1% edited", result.chunks, result.seconds,
+                    f"(written {result.written}, unchanged {result.unchanged}, deleted {result.deleted}, "
+                    f"stored {store.count()})")
+        pipeline.close()
+
+    store = RemoteStore(0.0, reject_rate=0.01)
+    pipeline = IngestionPipeline(store, FakeEmbedder(args.embed_call, args.embed_text), args.chunk_size,
+                                 args.overlap, args.batch, args.workers)
+    result = await pipeline.ingest("doc", text)
+    print(f"store rejecting 1% of objects: {result.written} written, {len(result.errors)} reported "
+          f"(e.g. chunk {result.errors[0].chunk_index}: {result.errors[0].message}), stored {store.count()}")
+    pipeline.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=64, help="chunks per embedding call and per write")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--embed-call", type=float, default=0.005, help="embedder seconds per call")
+    parser.add_argument("--embed-text", type=float, default=0.0005, help="embedder seconds per text")
+    parser.add_argument("--rtt", type=float, default=0.002, help="simulated store round trip, seconds")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: MinHash-LSH similarity index over a synthetic corpus.
+
+Indexes N synthetic documents (Zipf-distributed vocabulary, so common
+phrases produce realistic false candidates) into an on-disk SQLite index,
+then queries it with:
+
+  positives  a 30-60 word passage copied from a random corpus document with
+             ~5% of words substituted, embedded in unrelated text
+  negatives  unrelated text of similar length
+
+Reports build throughput, index size, query latency percentiles,
+recall@k for the source document and the false-positive rate.
+
+Usage: python benchmarks/bench_similarity_index.py [--docs 100000] [--queries 500]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dryad.university.services.similarity_index import SimilarityIndex
+
+VOCABULARY_SIZE = 30000
+
+
+def make_vocabulary(rng):
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    return ["".join(rng.choice(letters, size=rng.integers(3, 10))) for _ in range(VOCABULARY_SIZE)]
+
+
+def random_words(rng, vocabulary, count):
+    ranks = np.minimum(rng.zipf(1.3, size=count), VOCABULARY_SIZE) - 1
+    return [vocabulary[r] for r in ranks]
+
+
+def main(n_docs: int, n_queries: int, top_k: int, batch_size: int):
+    rng = np.random.default_rng(11)
+    vocabulary = make_vocabulary(rng)
+    corpus = [random_words(rng, vocabulary, int(rng.integers(80, 160))) for _ in range(n_docs)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.db")
+        index = SimilarityIndex(path)
+
+        start = time.perf_counter()
+        for offset in range(0, n_docs, batch_size):
+            index.add_documents(
+                (f"doc-{i}", " ".join(corpus[i]), None, "synthetic")
+                for i in range(offset, min(n_docs, offset + batch_size))
+            )
+        build_seconds = time.perf_counter() - start
+        index._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        stats = index.get_stats()
+        file_bytes = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+
+        latencies = []
+        hits = 0
+        for _ in range(n_queries):
+            source = int(rng.integers(n_docs))
+            words = corpus[source]
+            length = int(rng.integers(30, 61))
+            begin = int(rng.integers(0, max(1, len(words) - length)))
+            copied = list(words[begin:begin + length])
+            for position in rng.choice(len(copied), size=max(1, len(copied) // 20), replace=False):
+                copied[position] = vocabulary[int(rng.integers(VOCABULARY_SIZE))]
+            text = " ".join(random_words(rng, vocabulary, 60) + copied + random_words(rng, vocabulary, 60))
+
+            t = time.perf_counter()
+            result = index.query(text, top_k=top_k)
+            latencies.append(time.perf_counter() - t)
+            hits += any(m["document_id"] == f"doc-{source}" for m in result["matches"])
+
+        false_positives = 0
+        for _ in range(n_queries):
+            text = " ".join(random_words(rng, vocabulary, 150))
+            t = time.perf_counter()
+            result = index.query(text, top_k=top_k)
+            latencies.append(time.perf_counter() - t)
+            false_positives += bool(result["matches"])
+        index.close()
+
+    latencies_ms = np.array(latencies) * 1000
+    print(f"Documents:        {stats['documents']:,} ({stats['passages']:,} passages)")
+    print(f"Build:            {build_seconds:.1f}s ({n_docs / build_seconds:,.0f} docs/s)")
+    print(f"Index size:       {file_bytes / 1e6:.1f} MB on disk")
+    print(f"Query latency:    p50 {np.percentile(latencies_ms, 50):.1f} ms, "
+          f"p95 {np.percentile(latencies_ms, 95):.1f} ms, p99 {np.percentile(latencies_ms, 99):.1f} ms")
+    print(f"Recall@{top_k}:         {hits / n_queries:.3f} ({hits}/{n_queries})")
+    print(f"False positives:  {false_positives / n_queries:.3f} ({false_positives}/{n_queries})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.docs, args.queries, args.top_k, args.batch_size)
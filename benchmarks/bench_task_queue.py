@@ -0,0 +1,130 @@
+"""
+Benchmark: SQLite (WAL) orchestrator task queue throughput.
+
+Measures, against an on-disk queue:
+
+  enqueue         single-task enqueue calls from concurrent producers
+  enqueue_many    batched enqueue
+  lease/complete  raw lease(batch) + complete round trips
+  worker pool     end-to-end drain of no-op tasks through TaskWorkerPool
+                  with per-type concurrency limits, including a share of
+                  failing tasks that are retried with backoff
+  listing         keyset-paginated listing latency deep into the table
+
+Usage: python benchmarks/bench_task_queue.py [--tasks 20000]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dryad.core.task_queue import TaskQueue, TaskWorkerPool
+
+TASK_TYPES = ["rag_query", "document_processing", "multi_agent_workflow", "health_check"]
+
+
+async def bench(n_tasks: int, producers: int, batch: int, fail_every: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = TaskQueue(os.path.join(tmp, "tasks.db"), backoff_base=0.01, backoff_max=0.05)
+
+        # Single enqueues from concurrent producers
+        per_producer = n_tasks // producers
+
+        async def produce(p):
+            for i in range(per_producer):
+                await queue.enqueue(TASK_TYPES[i % len(TASK_TYPES)], {"producer": p, "i": i})
+
+        start = time.perf_counter()
+        await asyncio.gather(*(produce(p) for p in range(producers)))
+        elapsed = time.perf_counter() - start
+        single = per_producer * producers
+        print(f"enqueue (single, {producers} producers)  {single / elapsed:>10,.0f} tasks/s")
+
+        # Raw lease + complete
+        start = time.perf_counter()
+        drained = 0
+        while True:
+            tasks = await queue.lease("bench", limit=batch)
+            if not tasks:
+                break
+            for task in tasks:
+                await queue.complete(task.task_id, "bench", {"ok": True})
+            drained += len(tasks)
+        elapsed = time.perf_counter() - start
+        print(f"lease({batch}) + complete             {drained / elapsed:>10,.0f} tasks/s")
+
+        # Batched enqueue
+        start = time.perf_counter()
+        for offset in range(0, n_tasks, batch):
+            await queue.enqueue_many(
+                (TASK_TYPES[i % len(TASK_TYPES)], {"i": i}) for i in range(offset, min(n_tasks, offset + batch))
+            )
+        elapsed = time.perf_counter() - start
+        print(f"enqueue_many (batch {batch})            {n_tasks / elapsed:>10,.0f} tasks/s")
+
+        # Worker pool drain with retries
+        failed_once = set()
+
+        async def handler(payload):
+            if fail_every and payload["i"] % fail_every == 0 and payload["i"] not in failed_once:
+                failed_once.add(payload["i"])
+                raise RuntimeError("transient failure")
+            await asyncio.sleep(0)
+            return {"i": payload["i"]}
+
+        pool = TaskWorkerPool(
+            queue,
+            {task_type: handler for task_type in TASK_TYPES},
+            concurrency={"multi_agent_workflow": 8, "health_check": 2},
+            default_concurrency=32,
+            poll_interval=0.05
+        )
+        start = time.perf_counter()
+        await pool.start()
+        while True:
+            counts = await queue.counts()
+            if counts["pending"] == 0 and counts["running"] == 0:
+                break
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        await pool.stop()
+        stats = pool.get_stats()
+        print(f"worker pool drain                    {n_tasks / elapsed:>10,.0f} tasks/s "
+              f"(completed {stats['completed']:,}, retried {stats['retried']:,}, failed {stats['failed']:,})")
+
+        # Keyset pagination
+        cursor, pages, latencies = None, 0, []
+        while True:
+            t = time.perf_counter()
+            page = await queue.list_tasks(status="completed", limit=100, cursor=cursor)
+            latencies.append(time.perf_counter() - t)
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        latencies.sort()
+        total = sum((await queue.counts()).values())
+        print(f"keyset listing ({total:,} rows)       {pages} pages, "
+              f"p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, last page {latencies[-1] * 1000:.2f} ms max")
+        queue.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--producers", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--fail-every", type=int, default=10, help="every Nth task fails on its first attempt")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(bench(args.tasks, args.producers, args.batch, args.fail_every))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark: Teams notifier background dispatcher vs. inline per-card clients.
+
+Runs against a local stub webhook server (asyncio, HTTP/1.1 keep-alive) that
+adds a fixed delay to every new connection to stand in for the TLS handshake
+and a smaller delay per request. An "instruction storm" sends
+instruction_sent + instruction_executed pairs for several clients at once.
+
+  legacy      each notification opens a fresh httpx.AsyncClient and is
+              awaited inline, as _send_card did
+  dispatcher  notifications are queued, coalesced per client into digest
+              cards and sent over one pooled client
+
+Rate-limit handling and spool replay are covered by tests/test_teams_notifier.py.
+
+Usage: python benchmarks/bench_teams_notifier.py [--clients 20] [--instructions 25]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dryad.integrations.dryad_teams_notifier import DRYADTeamsNotifier
+
+
+class StubWebhook:
+    """Minimal HTTP/1.1 webhook endpoint with keep-alive and latency injection"""
+
+    def __init__(self, connect_delay=0.05, request_delay=0.005):
+        self.connect_delay = connect_delay
+        self.request_delay = request_delay
+        self.connections = 0
+        self.requests = 0
+        self.cards = []
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/webhook"
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(self.connect_delay)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                body = await reader.readexactly(length)
+                self.requests += 1
+                await asyncio.sleep(self.request_delay)
+                self.cards.append(json.loads(body))
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 1\r\nConnection: keep-alive\r\n\r\n1")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def card_titles(card):
+    return card["attachments"][0]["content"]["body"][0]["text"]
+
+
+async def storm(notifier, clients, instructions):
+    """Fire instruction events for all clients concurrently; return caller-side latencies"""
+    latencies = []
+
+    async def client_events(client_id):
+        for i in range(instructions):
+            instruction = {"action": f"step_{i}", "endpoint": "/api/run", "method": "POST"}
+            start = time.perf_counter()
+            await notifier.send_instruction_sent(client_id, instruction)
+            latencies.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            await notifier.send_instruction_executed(client_id, instruction, {"status": "success", "status_code": 200})
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(client_events(f"client-{c}") for c in range(clients)))
+    return np.array(latencies) * 1000
+
+
+def fmt(latencies):
+    return f"p50 {np.percentile(latencies, 50):.3f} ms, p99 {np.percentile(latencies, 99):.3f} ms"
+
+
+async def run_legacy(url, stub, clients, instructions):
+    notifier = DRYADTeamsNotifier(url, spool_path="")
+
+    async def send_inline(client_id, event, summary, card):
+        # The previous _send_card: fresh client per card, awaited by the caller
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.post(url, json=card, headers={"Content-Type": "application/json"})
+            return response.status_code == 200
+
+    async def _send_card(card, log_message, client_id="dryad", event="notification", summary=None):
+        return await send_inline(client_id, event, summary, card)
+
+    notifier._send_card = _send_card
+    start = time.perf_counter()
+    latencies = await storm(notifier, clients, instructions)
+    elapsed = time.perf_counter() - start
+    print(f"legacy inline       {len(latencies):>5} events  caller {fmt(latencies)}  "
+          f"total {elapsed:.2f}s  {stub.requests} cards  {stub.connections} connections")
+
+
+async def run_dispatcher(url, stub, clients, instructions, window):
+    with tempfile.TemporaryDirectory() as tmp:
+        notifier = DRYADTeamsNotifier(url, coalesce_window=window, spool_path=os.path.join(tmp, "spool.jsonl"))
+        await notifier.start()
+        start = time.perf_counter()
+        latencies = await storm(notifier, clients, instructions)
+        queued = time.perf_counter() - start
+        await notifier.flush(timeout=30)
+        elapsed = time.perf_counter() - start
+        stats = notifier.get_stats()
+        await notifier.stop()
+    digests = sum(card_titles(c).startswith("🗂️") for c in stub.cards)
+    print(f"dispatcher          {len(latencies):>5} events  caller {fmt(latencies)}  "
+          f"queued in {queued * 1000:.1f} ms, delivered in {elapsed:.2f}s  "
+          f"{stub.requests} cards ({digests} digests)  {stub.connections} connections")
+    print(f"                    {stats['notifications_delivered']}/{len(latencies)} notifications delivered")
+
+
+async def bench(args):
+    for runner in (run_legacy, run_dispatcher):
+        stub = StubWebhook(args.connect_delay, args.request_delay)
+        url = await stub.start()
+        if runner is run_dispatcher:
+            await runner(url, stub, args.clients, args.instructions, args.window)
+        else:
+            await runner(url, stub, args.clients, args.instructions)
+        await stub.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--instructions", type=int, default=25, help="instructions per client")
+    parser.add_argument("--window", type=float, default=0.25, help="coalescing window in seconds")
+    parser.add_argument("--connect-delay", type=float, default=0.05, help="simulated handshake seconds")
+    parser.add_argument("--request-delay", type=float, default=0.005, help="simulated seconds per request")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
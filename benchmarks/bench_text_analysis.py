@@ -0,0 +1,453 @@
+"""
+Benchmark: single-pass streaming text analysis vs. the multi-pass path.
+
+Writes a synthetic ~50 MB document (headings, lists, prose with names, URLs
+and dates), then runs each path in a fresh process so peak RSS is measured
+independently:
+
+  legacy     read the whole file and run every per-analysis helper, each of
+             which re-splits and regex-scans the full text (the helpers
+             DocumentProcessingService used before, kept below)
+  streaming  DocumentProcessingService.analyze_document_stream over the file
+
+Usage: python benchmarks/bench_text_analysis.py [--size-mb 50] [--chunk-kb 1024]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+WORDS = (
+    "the and of to in that it with is a research study analysis system data model "
+    "students learning university course algorithm software design market strategy "
+    "excellent good bad results method evaluation approach network performance memory"
+).split()
+NAMES = ["John Smith", "Maria Garcia", "Wei Chen", "Amara Okafor", "Lena Fischer"]
+PLACES = ["New York", "Chicago", "San Diego", "Houston"]
+
+
+def write_document(path: str, size_mb: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    written = 0
+    section = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            section += 1
+            lines = [f"{section}. SECTION {section}", ""]
+            for _ in range(rng.randint(3, 8)):
+                sentences = []
+                for _ in range(rng.randint(3, 7)):
+                    words = rng.choices(WORDS, k=rng.randint(8, 20))
+                    if rng.random() < 0.2:
+                        words.insert(rng.randrange(len(words)), rng.choice(NAMES))
+                    if rng.random() < 0.1:
+                        words.append(f"in {rng.choice(PLACES)}")
+                    if rng.random() < 0.02:
+                        words.append(f"see https://example.org/p/{rng.randrange(10**6)} on {rng.randint(1, 12)}/{rng.randint(1, 28)}/2024")
+                    sentence = " ".join(words)
+                    sentences.append(sentence[0].upper() + sentence[1:] + rng.choice(".!?"))
+                lines.append(" ".join(sentences))
+                lines.append("")
+            if rng.random() < 0.3:
+                lines.extend(f"- {' '.join(rng.choices(WORDS, k=5))}" for _ in range(4))
+                lines.append("")
+            block = "\n".join(lines) + "\n"
+            f.write(block)
+            written += len(block)
+
+
+# ---- Multi-pass helpers previously in DocumentProcessingService ----
+
+def analyze_document_structure(text: str) -> Dict[str, Any]:
+    """Analyze document structure and organization"""
+    # Detect headings
+    heading_patterns = [
+        r'^#{1,6}\s+.+$',  # Markdown headings
+        r'^[A-Z][^.!?]*$',  # Potential headings
+        r'^\d+\.?\s+.+$'   # Numbered sections
+    ]
+
+    headings = []
+    for pattern in heading_patterns:
+        matches = re.findall(pattern, text, re.MULTILINE)
+        headings.extend(matches)
+
+    # Detect lists
+    list_patterns = [
+        r'^[\s]*[-*+]\s+.+$',  # Bullet lists
+        r'^[\s]*\d+\.?\s+.+$', # Numbered lists
+    ]
+
+    lists = []
+    for pattern in list_patterns:
+        matches = re.findall(pattern, text, re.MULTILINE)
+        lists.extend(matches)
+
+    return {
+        'has_headings': len(headings) > 0,
+        'heading_count': len(headings),
+        'has_lists': len(lists) > 0,
+        'list_count': len(lists),
+        'structure_type': classify_document_structure(headings, lists),
+        'complexity_score': min(1.0, (len(headings) + len(lists)) / 20)
+    }
+
+
+def classify_document_structure(headings: List[str], lists: List[str]) -> str:
+    """Classify document structure type"""
+    heading_ratio = len(headings) / max(1, len(headings) + len(lists))
+
+    if heading_ratio > 0.7:
+        return 'structured'
+    elif heading_ratio > 0.3:
+        return 'mixed'
+    else:
+        return 'narrative'
+
+
+def extract_headings_and_sections(text: str) -> List[Dict[str, Any]]:
+    """Extract headings and section information"""
+    sections = []
+
+    # Simple section detection based on patterns
+    lines = text.split('\n')
+    current_section = None
+
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+
+        # Check if line looks like a heading
+        if (len(line) < 100 and
+            (line.isupper() or
+             line.endswith(':') or
+             re.match(r'^\d+\.?\s+', line))):
+
+            if current_section:
+                sections.append(current_section)
+
+            current_section = {
+                'title': line,
+                'line_number': i + 1,
+                'content_preview': '',
+                'word_count': 0
+            }
+        elif current_section:
+            # Add content to current section
+            if not current_section['content_preview']:
+                current_section['content_preview'] = line[:100]
+            current_section['word_count'] += len(line.split())
+
+    # Add last section
+    if current_section:
+        sections.append(current_section)
+
+    return sections
+
+
+def extract_key_topics(text: str) -> List[Dict[str, Any]]:
+    """Extract key topics and themes from text"""
+    # Simple keyword extraction (would use more sophisticated methods in production)
+    words = re.findall(r'\b[A-Za-z]{4,}\b', text.lower())
+    word_freq = {}
+
+    for word in words:
+        if word not in ['this', 'that', 'with', 'from', 'they', 'have', 'been', 'were', 'said']:
+            word_freq[word] = word_freq.get(word, 0) + 1
+
+    # Get top keywords
+    top_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]
+
+    topics = []
+    for word, freq in top_words:
+        topics.append({
+            'topic': word,
+            'frequency': freq,
+            'relevance_score': min(1.0, freq / max(1, max(word_freq.values())))
+        })
+
+    return topics
+
+
+def calculate_readability_scores(text: str) -> Dict[str, float]:
+    """Calculate various readability scores"""
+    # Simple readability metrics
+    sentences = re.split(r'[.!?]+', text)
+    words = text.split()
+
+    if not sentences or not words:
+        return {'flesch_score': 0.0, 'grade_level': 0.0}
+
+    # Basic calculations
+    avg_sentence_length = len(words) / len(sentences)
+    avg_word_length = sum(len(word) for word in words) / len(words)
+
+    # Mock Flesch Reading Ease Score
+    flesch_score = max(0, min(100, 206.835 - (1.015 * avg_sentence_length) - (84.6 * avg_word_length / 4.6)))
+
+    # Mock grade level
+    grade_level = max(1, min(12, (avg_sentence_length * 0.39) + (avg_word_length * 11.8) - 15.59))
+
+    return {
+        'flesch_score': flesch_score,
+        'grade_level': grade_level,
+        'avg_sentence_length': avg_sentence_length,
+        'avg_word_length': avg_word_length
+    }
+
+
+def analyze_language(text: str) -> Dict[str, Any]:
+    """Analyze language characteristics"""
+    # Mock language detection
+    english_indicators = ['the', 'and', 'is', 'in', 'to', 'of', 'a', 'that', 'it', 'with']
+    text_words = text.lower().split()
+
+    english_score = sum(1 for word in text_words if word in english_indicators) / max(1, len(text_words))
+
+    return {
+        'detected_language': 'en' if english_score > 0.02 else 'unknown',
+        'language_confidence': english_score,
+        'characteristics': {
+            'has_punctuation': bool(re.search(r'[.!?]', text)),
+            'has_numbers': bool(re.search(r'\d', text)),
+            'has_special_chars': bool(re.search(r'[^a-zA-Z\s]', text))
+        }
+    }
+
+
+def extract_document_metadata(text: str) -> Dict[str, Any]:
+    """Extract metadata and references from document"""
+    metadata = {
+        'references': [],
+        'citations': [],
+        'urls': [],
+        'emails': [],
+        'dates': []
+    }
+
+    # Extract URLs
+    url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
+    metadata['urls'] = re.findall(url_pattern, text)
+
+    # Extract email addresses
+    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+    metadata['emails'] = re.findall(email_pattern, text)
+
+    # Extract dates
+    date_pattern = r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b|\b\d{4}[/-]\d{1,2}[/-]\d{1,2}\b'
+    metadata['dates'] = re.findall(date_pattern, text)
+
+    return metadata
+
+
+def analyze_sentiment(text: str) -> Dict[str, Any]:
+    """Analyze sentiment of text content"""
+    # Mock sentiment analysis
+    positive_words = ['good', 'great', 'excellent', 'wonderful', 'amazing', 'fantastic']
+    negative_words = ['bad', 'terrible', 'awful', 'horrible', 'disgusting', 'worst']
+
+    words = text.lower().split()
+    positive_count = sum(1 for word in words if word in positive_words)
+    negative_count = sum(1 for word in words if word in negative_words)
+
+    total_words = len(words)
+    positive_score = positive_count / max(1, total_words)
+    negative_score = negative_count / max(1, total_words)
+
+    # Determine overall sentiment
+    if positive_score > negative_score:
+        sentiment = 'positive'
+    elif negative_score > positive_score:
+        sentiment = 'negative'
+    else:
+        sentiment = 'neutral'
+
+    return {
+        'sentiment': sentiment,
+        'positive_score': positive_score,
+        'negative_score': negative_score,
+        'confidence': abs(positive_score - negative_score) * 10
+    }
+
+
+def extract_named_entities(text: str) -> List[Dict[str, Any]]:
+    """Extract named entities from text"""
+    # Mock named entity recognition
+    entities = []
+
+    # Simple patterns for common entities
+    person_pattern = r'\b[A-Z][a-z]+ [A-Z][a-z]+\b'
+    organization_pattern = r'\b[A-Z][a-z]+ (Inc|Corp|Ltd|University|College|School)\b'
+    location_pattern = r'\b(New York|Los Angeles|Chicago|Houston|Phoenix|Philadelphia|San Antonio|San Diego|Dallas|San Jose)\b'
+
+    persons = re.findall(person_pattern, text)
+    organizations = re.findall(organization_pattern, text)
+    locations = re.findall(location_pattern, text)
+
+    for person in persons[:5]:  # Limit results
+        entities.append({'text': person, 'label': 'PERSON', 'confidence': 0.8})
+
+    for org in organizations[:3]:
+        entities.append({'text': org, 'label': 'ORG', 'confidence': 0.7})
+
+    for loc in locations[:3]:
+        entities.append({'text': loc, 'label': 'LOCATION', 'confidence': 0.9})
+
+    return entities
+
+
+def extract_keywords(text: str) -> List[Dict[str, Any]]:
+    """Extract keywords from text"""
+    # Simple keyword extraction
+    words = re.findall(r'\b[A-Za-z]{4,}\b', text.lower())
+
+    # Filter common words
+    stop_words = {'this', 'that', 'with', 'from', 'they', 'have', 'been', 'were', 'said', 'each', 'which', 'their', 'time'}
+    filtered_words = [word for word in words if word not in stop_words]
+
+    # Count frequencies
+    word_freq = {}
+    for word in filtered_words:
+        word_freq[word] = word_freq.get(word, 0) + 1
+
+    # Get top keywords
+    keywords = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]
+
+    return [{'keyword': word, 'frequency': freq, 'score': freq / max(1, max(word_freq.values()))}
+            for word, freq in keywords]
+
+
+def detect_language(text: str) -> str:
+    """Detect language of text"""
+    # Mock language detection
+    english_common = ['the', 'and', 'is', 'in', 'to', 'of', 'a', 'that', 'it', 'with']
+    text_words = text.lower().split()
+
+    english_indicators = sum(1 for word in text_words if word in english_common)
+    english_ratio = english_indicators / max(1, len(text_words))
+
+    return 'en' if english_ratio > 0.02 else 'unknown'
+
+
+def categorize_content(text: str) -> Dict[str, Any]:
+    """Categorize content type and domain"""
+    categories = {
+        'academic': 0,
+        'technical': 0,
+        'business': 0,
+        'creative': 0,
+        'news': 0
+    }
+
+    # Simple keyword-based categorization
+    academic_keywords = ['research', 'study', 'analysis', 'hypothesis', 'methodology', 'university']
+    technical_keywords = ['algorithm', 'code', 'programming', 'software', 'system', 'database']
+    business_keywords = ['market', 'revenue', 'profit', 'strategy', 'customer', 'business']
+    creative_keywords = ['story', 'creative', 'imagination', 'art', 'design', 'artistic']
+    news_keywords = ['reported', 'breaking', 'news', 'according', 'sources', 'yesterday']
+
+    text_lower = text.lower()
+
+    for keyword in academic_keywords:
+        if keyword in text_lower:
+            categories['academic'] += 1
+
+    for keyword in technical_keywords:
+        if keyword in text_lower:
+            categories['technical'] += 1
+
+    for keyword in business_keywords:
+        if keyword in text_lower:
+            categories['business'] += 1
+
+    for keyword in creative_keywords:
+        if keyword in text_lower:
+            categories['creative'] += 1
+
+    for keyword in news_keywords:
+        if keyword in text_lower:
+            categories['news'] += 1
+
+    # Determine primary category
+    primary_category = max(categories.items(), key=lambda x: x[1])
+
+    return {
+        'primary_category': primary_category[0] if primary_category[1] > 0 else 'general',
+        'category_scores': categories,
+        'confidence': primary_category[1] / max(1, sum(categories.values()))
+    }
+
+
+async def _legacy(path: str) -> None:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    len(text.split()), len(text.splitlines()), len(text.split("\n\n"))
+    analyze_sentiment(text)
+    extract_named_entities(text)
+    extract_keywords(text)
+    detect_language(text)
+    categorize_content(text)
+    analyze_document_structure(text)
+    extract_headings_and_sections(text)
+    extract_key_topics(text)
+    calculate_readability_scores(text)
+    analyze_language(text)
+    extract_document_metadata(text)
+
+
+async def _streaming(path: str, chunk_size: int) -> None:
+    from dryad.university.services.document_processing import DocumentProcessingService
+
+    service = DocumentProcessingService(None)
+    service.text_analyzer.chunk_size = chunk_size
+    await service.analyze_document_stream(path)
+
+
+def _worker(mode: str, path: str, chunk_size: int, queue) -> None:
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "legacy":
+        asyncio.run(_legacy(path))
+    else:
+        asyncio.run(_streaming(path, chunk_size))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, baseline / 1024, peak / 1024))
+
+
+def run(mode: str, path: str, chunk_size: int):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_worker, args=(mode, path, chunk_size, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--chunk-kb", type=int, default=1024)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "document.txt")
+        write_document(path, args.size_mb)
+        print(f"Synthetic document: {os.path.getsize(path) / 1e6:.1f} MB")
+
+        for mode in ("legacy", "streaming"):
+            elapsed, baseline, peak = run(mode, path, args.chunk_kb * 1024)
+            print(f"{mode:>9}: {elapsed:6.2f}s  peak RSS {peak:7.1f} MB (interpreter {baseline:.1f} MB)")
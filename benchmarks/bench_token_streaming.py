@@ -0,0 +1,200 @@
+"""
+Benchmark: time to first token for buffered vs streamed agent replies.
+
+A fake streaming chat model spends a prefill delay before its first token
+(longer when many calls are in flight) and then emits tokens at a fixed
+interval. A FastAPI app serves it two ways:
+
+  buffered  await the guarded ainvoke and return the whole reply as JSON,
+            which is how /agents/{id}/chat behaves
+  streamed  TokenStream over the guarded astream, framed by sse_events,
+            which is how /agents/{id}/chat/stream behaves
+
+The app is driven in-process through ASGI (no sockets), with N concurrent
+requests, and the benchmark reports the time to first token (first body
+bytes for buffered) and the time to the last byte. Two more runs check the
+streaming contract:
+
+  disconnect  clients go away after a few tokens; upstream generation
+              must stop and each reply must be persisted once, as cancelled
+  slow reader a client that takes 20 ms per event; upstream must not run
+              ahead of it (backpressure)
+
+Usage: python benchmarks/bench_token_streaming.py [--streams 200] [--tokens 100]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dryad.core.llm_error_handler import LLMCallGuard
+from dryad.core.provider_telemetry import ProviderTelemetry
+from dryad.core.token_stream import TokenStream, sse_events
+
+
+class FakeStreamingChatModel:
+    """Prefill delay that grows with calls in flight, then one token per interval"""
+
+    def __init__(self, tokens, prefill, interval, capacity, rng):
+        self.tokens = tokens
+        self.prefill = prefill
+        self.interval = interval
+        self.capacity = capacity
+        self.rng = rng
+        self.in_flight = 0
+        self.generated = 0
+        self.closed = 0
+
+    async def astream(self, messages):
+        self.in_flight += 1
+        try:
+            load = 1 + max(0, self.in_flight - self.capacity) / self.capacity
+            await asyncio.sleep(self.prefill * load * self.rng.lognormvariate(0, 0.25))
+            for i in range(self.tokens):
+                self.generated += 1
+                yield f"tok{i} "
+                await asyncio.sleep(self.interval)
+        finally:
+            self.in_flight -= 1
+            self.closed += 1
+
+    async def ainvoke(self, messages):
+        return "".join([token async for token in self.astream(messages)])
+
+
+def make_app(model, guard, persisted):
+    app = FastAPI()
+
+    async def on_finish(reply, stats):
+        persisted.append(stats.finish_reason)
+
+    @app.post("/buffered")
+    async def buffered():
+        reply = await guard.call("fake", lambda: model.ainvoke("hi"))
+        persisted.append("stop")
+        return JSONResponse({"response": reply})
+
+    @app.post("/stream")
+    async def stream():
+        tokens = TokenStream(guard.stream("fake", lambda: model.astream("hi")), on_finish=on_finish)
+        return StreamingResponse(sse_events(tokens), media_type="text/event-stream")
+
+    return app
+
+
+async def drive(app, path, disconnect_after=None, read_delay=0.0, on_event=None):
+    """One request through the ASGI app; returns (ttft, total, token events received)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80)
+    }
+    gone = asyncio.Event()
+    request_sent = False
+    started = time.perf_counter()
+    first = None
+    events = 0
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"{}", "more_body": False}
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first, events
+        if message["type"] != "http.response.body" or not message.get("body"):
+            return
+        if first is None:
+            first = time.perf_counter()
+        events += message["body"].count(b"event: token")
+        if on_event is not None:
+            on_event(events)
+        if read_delay:
+            await asyncio.sleep(read_delay)
+        if disconnect_after is not None and events >= disconnect_after:
+            gone.set()
+
+    await app(scope, receive, send)
+    return (first or time.perf_counter()) - started, time.perf_counter() - started, events
+
+
+def make_guard(args):
+    # Let every stream in; this benchmark is about delivery, not admission
+    return LLMCallGuard(telemetry=ProviderTelemetry(), config={
+        "LLM_CONCURRENCY_INITIAL": args.streams * 2,
+        "LLM_CONCURRENCY_MAX": args.streams * 2,
+        "LLM_CALL_TIMEOUT_SECONDS": 60.0
+    })
+
+
+async def run(label, args, path):
+    model = FakeStreamingChatModel(args.tokens, args.prefill, args.interval, args.capacity, random.Random(1))
+    guard = make_guard(args)
+    app = make_app(model, guard, [])
+    results = await asyncio.gather(*(drive(app, path) for _ in range(args.streams)))
+    ttft = np.array([r[0] for r in results]) * 1000
+    total = np.array([r[1] for r in results]) * 1000
+    print(f"{label:<9} TTFT p50 {np.percentile(ttft, 50):7.0f} ms  p95 {np.percentile(ttft, 95):7.0f} ms  "
+          f"p99 {np.percentile(ttft, 99):7.0f} ms   last byte p50 {np.percentile(total, 50):7.0f} ms")
+    return guard
+
+
+async def bench(args):
+    print(f"{args.streams} concurrent streams, {args.tokens} tokens each, prefill {args.prefill * 1000:.0f} ms "
+          f"(capacity {args.capacity}), {args.interval * 1000:.0f} ms/token")
+    await run("buffered", args, "/buffered")
+    guard = await run("streamed", args, "/stream")
+    metrics = guard.get_metrics()["fake"]
+    print(f"guard metrics: ttft p50 {metrics['ttft_p50_ms']:.0f} ms, p95 {metrics['ttft_p95_ms']:.0f} ms, "
+          f"{metrics['tokens_per_second_p50']:.0f} tokens/s per stream")
+
+    model = FakeStreamingChatModel(args.tokens, args.prefill, args.interval, args.capacity, random.Random(2))
+    persisted = []
+    app = make_app(model, make_guard(args), persisted)
+    await asyncio.gather(*(drive(app, "/stream", disconnect_after=5) for _ in range(args.streams)))
+    await asyncio.sleep(0.05)
+    print(f"disconnect after 5 tokens: upstream generated {model.generated / args.streams:.1f} tokens/stream "
+          f"of {args.tokens}, upstream streams closed {model.closed}/{args.streams}, "
+          f"persisted {len(persisted)} ({persisted.count('cancelled')} cancelled)")
+
+    model = FakeStreamingChatModel(args.tokens, 0.01, 0.001, args.capacity, random.Random(3))
+    app = make_app(model, make_guard(args), [])
+    lead = 0
+
+    def track_lead(received):
+        nonlocal lead
+        lead = max(lead, model.generated - received)
+
+    _, total, events = await drive(app, "/stream", read_delay=0.02, on_event=track_lead)
+    print(f"slow reader (20 ms/event, model 1 ms/token): received {events} tokens in {total * 1000:.0f} ms; "
+          f"upstream was never more than {lead} token(s) ahead")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--prefill", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds between tokens")
+    parser.add_argument("--capacity", type=int, default=100, help="calls in flight before prefill slows down")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
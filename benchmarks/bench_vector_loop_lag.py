@@ -0,0 +1,189 @@
+"""
+Load test: event-loop lag and throughput of vector searches, blocking
+client vs the async vector store layer.
+
+A collection of --chunks chunks with --dim dimensional vectors is searched
+by --users concurrent users. Each user issues --requests searches drawn
+from --queries distinct query vectors with a Zipf-like popularity, as when
+many users ask the same popular questions. The "server" adds --rtt of
+network time per search on top of the brute-force search itself.
+
+  blocking  what RAGSystem.retrieve_and_generate did: a synchronous client
+            call made directly in the coroutine (time.sleep for the round
+            trip, the search on the loop thread)
+  async     InMemoryAsyncVectorStore behind CachingVectorStore with caching
+            disabled: await for the round trip, search in a worker thread;
+            identical searches in flight at once still share a request
+  cached    the same store with the query-result cache (get_async_vector_store's
+            configuration)
+
+A monitor coroutine sleeps for 5 ms at a time and records how late it
+wakes up, which is the event-loop lag every other request would see; a
+blocked loop also shows as far fewer ticks than the run had room for.
+
+The cached run then checks invalidation: a chunk written through the layer
+shows up in the next search for it. It also times a search over three
+collections at once.
+
+Usage: python benchmarks/bench_vector_loop_lag.py [--users 50] [--rtt 0.005]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dryad.infrastructure.async_vector_store import CachingVectorStore, InMemoryAsyncVectorStore, VectorQuery
+from dryad.infrastructure.vector_store import COLLECTION_NAME, ChunkRecord, InMemoryVectorStore
+
+TICK = 0.005
+
+
+def make_records(count, dim, rng, document="doc"):
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return [
+        ChunkRecord(uuid=f"{document}-{i}", document_id=document, chunk_index=i, content=f"chunk {i} of {document}",
+                    content_hash=str(i), source=document, vector=vectors[i].tolist())
+        for i in range(count)
+    ]
+
+
+class RemoteAsyncStore(InMemoryAsyncVectorStore):
+    """InMemoryAsyncVectorStore behind a simulated network round trip"""
+
+    def __init__(self, collections, rtt):
+        super().__init__(collections)
+        self.rtt = rtt
+        self.requests = 0
+
+    async def search(self, query):
+        self.requests += 1
+        await asyncio.sleep(self.rtt)
+        return await super().search(query)
+
+
+class BlockingStore:
+    """A synchronous client called from async code"""
+
+    def __init__(self, store, rtt):
+        self.store = store
+        self.rtt = rtt
+        self.requests = 0
+
+    def search_similar(self, vector, limit):
+        self.requests += 1
+        time.sleep(self.rtt)
+        return self.store.search_vector(vector, limit)
+
+
+async def monitor(lags, stop):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - started - TICK)
+
+
+def percentile(values, p):
+    return float(np.percentile(values, p)) * 1000 if values else 0.0
+
+
+async def load(label, search, backend, workload, args):
+    lags, latencies = [], []
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(monitor(lags, stop))
+
+    async def user(requests):
+        for vector in requests:
+            started = time.perf_counter()
+            await search(vector)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(requests) for requests in workload))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await watcher
+
+    total = sum(len(requests) for requests in workload)
+    print(f"  {label:<9} {total / elapsed:8.0f} req/s   latency p50 {percentile(latencies, 50):7.1f} ms "
+          f"p99 {percentile(latencies, 99):7.1f} ms   loop lag p50 {percentile(lags, 50):6.1f} ms "
+          f"p99 {percentile(lags, 99):6.1f} ms max {max(lags, default=0) * 1000:7.1f} ms "
+          f"({len(lags)}/{int(elapsed / TICK)} ticks)   backend requests {backend.requests}")
+    return percentile(lags, 99), total / elapsed
+
+
+async def bench(args):
+    rng = np.random.default_rng(1)
+    store = InMemoryVectorStore()
+    store.write_chunks(make_records(args.chunks, args.dim, rng))
+    store.search_vector(np.zeros(args.dim), 1)
+    queries = [tuple(v) for v in rng.standard_normal((args.queries, args.dim)).astype(np.float32).tolist()]
+    weights = [1 / (rank + 1) for rank in range(args.queries)]
+    pick = random.Random(2)
+    workload = [pick.choices(queries, weights, k=args.requests) for _ in range(args.users)]
+    print(f"{args.chunks} chunks x {args.dim} dims, {args.users} users x {args.requests} searches over "
+          f"{args.queries} distinct queries, {args.rtt * 1000:.1f} ms round trip")
+
+    blocking = BlockingStore(store, args.rtt)
+
+    async def blocking_search(vector):
+        return blocking.search_similar(vector, args.limit)
+
+    before = await load("blocking", blocking_search, blocking, workload, args)
+
+    remote = RemoteAsyncStore({COLLECTION_NAME: store}, args.rtt)
+    uncached = CachingVectorStore(remote, max_entries=1, ttl_seconds=0)
+    await load("async", lambda v: uncached.search(VectorQuery(vector=v, mode="vector", limit=args.limit)),
+               remote, workload, args)
+
+    remote = RemoteAsyncStore({COLLECTION_NAME: store}, args.rtt)
+    cached = CachingVectorStore(remote, max_entries=2048, ttl_seconds=300)
+    after = await load("cached", lambda v: cached.search(VectorQuery(vector=v, mode="vector", limit=args.limit)),
+                       remote, workload, args)
+    print(f"  loop lag p99 {before[0]:.1f} -> {after[0]:.1f} ms, throughput {after[1] / before[1]:.1f}x; "
+          f"cache {({k: v for k, v in cached.get_stats().items() if k in ('hits', 'misses', 'shared', 'size')})}")
+
+    # A write through the layer invalidates cached results for the collection
+    probe = queries[0]
+    await cached.search(VectorQuery(vector=probe, mode="vector", limit=1))
+    record = ChunkRecord(uuid="probe", document_id="probe", chunk_index=0, content="probe chunk",
+                         content_hash="probe", source="probe", vector=list(probe))
+    await cached.write_chunks([record])
+    top = await cached.search(VectorQuery(vector=probe, mode="vector", limit=1))
+    print(f"  after writing a chunk equal to the query, top result is {top[0]['id']!r} "
+          f"(generation {cached.generation(COLLECTION_NAME)})")
+
+    collections = {name: InMemoryVectorStore() for name in ("vessels", "dialogues", "documents")}
+    for name, collection in collections.items():
+        collection.write_chunks(make_records(args.chunks // 3, args.dim, rng, name))
+        collection.search_vector(np.zeros(args.dim), 1)
+    multi = CachingVectorStore(RemoteAsyncStore(collections, args.rtt), ttl_seconds=0, max_entries=1)
+    started = time.perf_counter()
+    merged = await multi.search_collections(VectorQuery(vector=queries[1], mode="vector", limit=5), list(collections))
+    print(f"  search over {len(collections)} collections in {(time.perf_counter() - started) * 1000:.1f} ms "
+          f"(one round trip {args.rtt * 1000:.1f} ms), top from {sorted({r['collection'] for r in merged})}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20, help="searches per user")
+    parser.add_argument("--queries", type=int, default=200, help="distinct query vectors")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--rtt", type=float, default=0.005, help="simulated round trip, seconds")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
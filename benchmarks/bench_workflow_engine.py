@@ -0,0 +1,194 @@
+"""
+Benchmark: async multi-agent workflow engine vs. blocking invoke chain.
+
+Uses a fake chat model with configurable latency (a blocking ``invoke``
+that sleeps, plus ``ainvoke``/``astream`` that await) and runs the
+research_analyze_write graph: three research angles fanned out
+concurrently, then analysis, then writing.
+
+While workflows run, a heartbeat task measures event-loop lag (how late a
+10 ms timer fires). The legacy path calls ``invoke`` three times in a row
+inside a coroutine, as MultiAgentOrchestrator did, and is run with fewer
+workflows because it serializes everything.
+
+Usage: python benchmarks/bench_workflow_engine.py [--workflows 100] [--latency 0.2]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dryad.core.workflow_engine import WorkflowEngine, WorkflowGraph, WorkflowStep
+
+
+class FakeMessage:
+    def __init__(self, content, input_tokens=0, output_tokens=0):
+        self.content = content
+        self.usage_metadata = (
+            {"input_tokens": input_tokens, "output_tokens": output_tokens} if output_tokens else None
+        )
+
+
+class FakeChatModel:
+    """Chat model stand-in: echoes a summary of the prompt after ``latency`` seconds"""
+
+    def __init__(self, model_name="fake-chat", latency=0.2, chunks=8):
+        self.model_name = model_name
+        self.latency = latency
+        self.chunks = chunks
+        self.calls = 0
+
+    def _reply(self, prompt):
+        self.calls += 1
+        words = prompt.split()
+        return " ".join(words[:40]) + f" ... ({len(words)} words considered)"
+
+    def invoke(self, prompt):
+        time.sleep(self.latency)
+        text = self._reply(prompt)
+        return FakeMessage(text, len(prompt.split()), len(text.split()))
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.latency)
+        text = self._reply(prompt)
+        return FakeMessage(text, len(prompt.split()), len(text.split()))
+
+    async def astream(self, prompt):
+        text = self._reply(prompt)
+        words = text.split(" ")
+        size = max(1, len(words) // self.chunks)
+        for i in range(0, len(words), size):
+            await asyncio.sleep(self.latency / self.chunks)
+            yield FakeMessage(" ".join(words[i:i + size]) + " ")
+        yield FakeMessage("", len(prompt.split()), len(words))
+
+
+ANGLES = ["background", "developments", "perspectives"]
+
+
+def build_graph():
+    steps = [
+        WorkflowStep(f"research_{a}", "researcher", f"Research ({a}) the query: {{query}}")
+        for a in ANGLES
+    ]
+    research = [s.name for s in steps]
+    steps.append(WorkflowStep(
+        "analysis", "analyst",
+        lambda v: "Analyze for {}:\n".format(v["query"]) + "\n".join(v[r] for r in research),
+        depends_on=research,
+    ))
+    steps.append(WorkflowStep(
+        "writing", "writer",
+        lambda v: "Write about {}:\n{}".format(v["query"], v["analysis"]),
+        depends_on=research + ["analysis"],
+    ))
+    return WorkflowGraph("research_analyze_write", steps)
+
+
+class LagMonitor:
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(time.perf_counter() - start - self.interval)
+
+    def __enter__(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+    def summary(self):
+        lags = np.array(self.lags or [0.0]) * 1000
+        return f"loop lag p50 {np.percentile(lags, 50):.1f} ms, p99 {np.percentile(lags, 99):.1f} ms, max {lags.max():.1f} ms"
+
+
+def make_agents(latency):
+    return {role: {"llm": FakeChatModel(f"fake-{role}", latency)} for role in ("researcher", "analyst", "writer")}
+
+
+async def legacy(n, latency):
+    agents = make_agents(latency)
+
+    async def workflow(query):
+        research = agents["researcher"]["llm"].invoke(f"Research the query: {query}").content
+        analysis = agents["analyst"]["llm"].invoke(f"Analyze for {query}:\n{research}").content
+        return agents["writer"]["llm"].invoke(f"Write about {query}:\n{analysis}").content
+
+    with LagMonitor() as monitor:
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        await asyncio.gather(*(workflow(f"topic {i}") for i in range(n)))
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0.05)
+    print(f"Legacy blocking invoke, {n} workflows: {elapsed:.2f}s, {monitor.summary()}")
+
+
+async def engine_run(n, latency, stream):
+    engine = WorkflowEngine(make_agents(latency))
+    graph = build_graph()
+
+    async def streamed(query):
+        tokens = 0
+        async for event in engine.stream(graph, {"query": query}):
+            tokens += event["event"] == "token"
+            if event["event"] == "workflow_completed":
+                return event, tokens
+
+    async def run_all(queries):
+        if stream:
+            return await asyncio.gather(*(streamed(q) for q in queries))
+        return [(r, 0) for r in await asyncio.gather(*(engine.run(graph, {"query": q}) for q in queries))]
+
+    label = "astream" if stream else "ainvoke"
+    with LagMonitor() as monitor:
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        results = await run_all([f"topic {i}" for i in range(n)])
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        await run_all([f"topic {i}" for i in range(n)])
+        warm = time.perf_counter() - start
+        await asyncio.sleep(0.05)
+
+    durations = [r["execution_time"] for r, _ in results]
+    assert all(r["success"] for r, _ in results)
+    stats = engine.get_stats()
+    tokens = sum(sum(s["prompt_tokens"] + s["completion_tokens"] for s in r["steps"]) for r, _ in results)
+    print(f"Engine ({label}), {n} concurrent workflows:")
+    print(f"  cold run {cold:.2f}s (per workflow p50 {np.median(durations):.2f}s; "
+          f"critical path is 3 x {latency:.2f}s)")
+    print(f"  warm run {warm * 1000:.1f} ms (cache hit rate {stats['cache']['hit_rate']:.2f})")
+    if stream:
+        print(f"  streamed {sum(t for _, t in results):,} token events")
+    print(f"  {tokens:,} tokens recorded, researcher avg latency "
+          f"{stats['roles']['researcher']['latency_avg'] * 1000:.0f} ms")
+    print(f"  {monitor.summary()}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workflows", type=int, default=100)
+    parser.add_argument("--legacy-workflows", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake LLM call")
+    args = parser.parse_args()
+
+    asyncio.run(legacy(args.legacy_workflows, args.latency))
+    asyncio.run(engine_run(args.workflows, args.latency, stream=False))
+    asyncio.run(engine_run(args.workflows, args.latency, stream=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Offline evaluation: RAG context packing, character budget vs ContextPacker.
+
+Each synthetic query has --facts facts ("the <term> setting of <topic> is
+<number>") spread over two source documents of filler prose. Documents are
+split with iter_chunks (1000/200, as ingestion does), so consecutive chunks
+overlap. A simulated retrieval returns --candidates chunks per query:
+
+  - chunks holding a fact, and some of their neighbours
+  - the same chunks of a near-duplicate of one source (the document
+    ingested again under another id, with a few words changed)
+  - distractor chunks from unrelated documents
+
+Scores are noisy: fact chunks score 0.80-0.95, neighbours 0.72-0.86 and
+distractors 0.70-0.87, and a duplicate scores within 0.01 of its original.
+Every chunk carries a hashed bag-of-words vector, standing in for a
+retriever embedding (--no-vectors compares word shingles instead).
+
+  legacy  what RAGSystem._prepare_context did: highest score first, whole
+          chunks, until 4000 characters (and, for comparison, 6000)
+  packer  ContextPacker at several token budgets
+
+Answer coverage is the share of the query's facts that appear verbatim in
+the context. Redundancy is the share of context words that repeat a word
+8-gram already in the context.
+
+Usage: python benchmarks/eval_context_packing.py [--queries 200] [--candidates 20]
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dryad.core.context_packing import ContextPacker, get_token_counter
+from dryad.infrastructure.ingestion import iter_chunks
+
+SYLLABLES = "ka lo mi ne ru sa ti vo ze pa qu di fe go hu ja be ci mo nu".split()
+
+
+def make_vocabulary(rng, size=4000):
+    return sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(size)})
+
+
+def prose(rng, vocabulary, words):
+    sentences = []
+    while words > 0:
+        sentence = [vocabulary[int(len(vocabulary) * rng.random() ** 3)]
+                    for _ in range(rng.randint(8, 18))]
+        sentences.append(" ".join(sentence).capitalize() + ".")
+        words -= len(sentence)
+    return " ".join(sentences)
+
+
+def embed(text, dim=256):
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in re.findall(r"\w+", text.lower()):
+        vector[int(hashlib.md5(word.encode()).hexdigest()[:8], 16) % dim] += 1.0
+    return vector / (np.linalg.norm(vector) or 1.0)
+
+
+def chunk_docs(document_id, title, text):
+    return [{"id": f"{document_id}:{i}", "content": chunk, "document_title": title, "chunk_index": i,
+             "metadata": {"document_id": document_id}}
+            for i, chunk in enumerate(iter_chunks(text, 1000, 200))]
+
+
+def make_query(q, rng, vocabulary, args):
+    """Retrieved candidates and the facts a good context must contain"""
+    facts = [f"The {rng.choice(vocabulary)} setting of topic{q} is {rng.randint(100, 999)}." for _ in range(args.facts)]
+    relevant = []
+    for d in range(2):
+        sentences = [prose(rng, vocabulary, 40) for _ in range(60)]
+        for fact in facts[d::2]:
+            sentences.insert(rng.randrange(len(sentences)), fact)
+        relevant.append((f"q{q}-doc{d}", f"Topic {q} manual part {d + 1}", " ".join(sentences)))
+
+    title, text = relevant[0][1], relevant[0][2]
+    words = text.split(" ")
+    for i in rng.sample(range(len(words)), 5):
+        if not any(ch.isdigit() for ch in words[i]):
+            words[i] = rng.choice(vocabulary)
+    duplicate = (f"q{q}-doc0-copy", title, " ".join(words))
+
+    candidates = []
+    scores = {}
+    for document_id, doc_title, doc_text in relevant:
+        chunks = chunk_docs(document_id, doc_title, doc_text)
+        holding = {i for i, chunk in enumerate(chunks) if any(fact in chunk["content"] for fact in facts)}
+        for i, chunk in enumerate(chunks):
+            if i in holding:
+                chunk["score"] = rng.uniform(0.8, 0.95)
+            elif (i - 1 in holding or i + 1 in holding) and rng.random() < 0.5:
+                chunk["score"] = rng.uniform(0.72, 0.86)
+            else:
+                continue
+            scores[chunk["id"]] = chunk["score"]
+            candidates.append(chunk)
+    for chunk in chunk_docs(*duplicate):
+        original = scores.get(chunk["id"].replace("-copy", ""))
+        if original is not None:
+            # Near-identical text scores near-identically
+            chunk["score"] = original + rng.uniform(-0.01, 0.01)
+            candidates.append(chunk)
+    while len(candidates) < args.candidates:
+        distractor = chunk_docs(f"other-{q}-{len(candidates)}", "Unrelated notes", prose(rng, vocabulary, 170))[0]
+        distractor["score"] = rng.uniform(0.7, 0.87)
+        candidates.append(distractor)
+
+    candidates = sorted(candidates, key=lambda c: -c["score"])[:args.candidates]
+    if not args.no_vectors:
+        for chunk in candidates:
+            chunk["vector"] = embed(chunk["content"]).tolist()
+    rng.shuffle(candidates)
+    return candidates, facts
+
+
+def legacy_context(docs, max_length=4000):
+    """RAGSystem._prepare_context before token-aware packing"""
+    parts = []
+    length = 0
+    for i, doc in enumerate(sorted(docs, key=lambda x: x["score"], reverse=True)):
+        entry = f"Document {i+1} (Score: {doc['score']:.3f}):\nTitle: {doc['document_title']}\nContent: {doc['content']}\n"
+        if length + len(entry) > max_length:
+            break
+        parts.append(entry)
+        length += len(entry)
+    return "\n---\n".join(parts)
+
+
+def redundancy(text, n=8):
+    words = re.findall(r"\w+", text.lower())
+    seen = set()
+    repeated = 0
+    for i in range(len(words) - n + 1):
+        gram = tuple(words[i:i + n])
+        if gram in seen:
+            repeated += 1
+        seen.add(gram)
+    return repeated / max(1, len(words) - n + 1)
+
+
+def evaluate(label, queries, build, counter):
+    tokens, coverage, repeats, elapsed = [], [], [], []
+    for docs, facts in queries:
+        started = time.perf_counter()
+        text = build(docs)
+        elapsed.append((time.perf_counter() - started) * 1000)
+        tokens.append(counter.count(text))
+        coverage.append(sum(fact in text for fact in facts) / len(facts))
+        repeats.append(redundancy(text))
+    row = {
+        "tokens": statistics.mean(tokens),
+        "coverage": statistics.mean(coverage),
+        "full": sum(c == 1.0 for c in coverage) / len(coverage),
+        "redundancy": statistics.mean(repeats),
+        "ms": statistics.mean(elapsed)
+    }
+    print(f"  {label:<22} {row['tokens']:7.0f} {row['coverage']:9.1%} {row['full']:10.1%} "
+          f"{row['redundancy']:11.1%} {row['ms']:8.2f}")
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=20, help="retrieved chunks per query")
+    parser.add_argument("--facts", type=int, default=4, help="facts per query")
+    parser.add_argument("--legacy-chars", default="4000,6000", help="character budgets for the legacy context")
+    parser.add_argument("--budgets", default="1000,700,550", help="ContextPacker token budgets")
+    parser.add_argument("--mmr-lambda", type=float, default=0.7)
+    parser.add_argument("--no-vectors", action="store_true", help="compare word shingles instead of vectors")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    rng = random.Random(7)
+    vocabulary = make_vocabulary(rng)
+    queries = [make_query(q, rng, vocabulary, args) for q in range(args.queries)]
+    counter = get_token_counter()
+    print(f"{args.queries} queries, {args.candidates} candidates each, {args.facts} facts per query; "
+          f"tokenizer {counter.name}, similarity {'shingles' if args.no_vectors else 'vectors'}")
+    print(f"  {'context':<22} {'tokens':>7} {'coverage':>9} {'all facts':>10} {'redundancy':>11} {'ms/query':>8}")
+
+    baseline = None
+    for chars in (int(c) for c in args.legacy_chars.split(",")):
+        row = evaluate(f"legacy {chars} chars", queries, lambda docs: legacy_context(docs, chars), counter)
+        baseline = baseline or (chars, row)
+    chars, legacy = baseline
+    for budget in (int(b) for b in args.budgets.split(",")):
+        packer = ContextPacker(max_tokens=budget, mmr_lambda=args.mmr_lambda, counter=counter)
+        row = evaluate(f"packer {budget} tokens", queries, lambda docs: packer.pack(docs).text, counter)
+        print(f"  {'':<22} vs legacy {chars} chars: tokens saved {1 - row['tokens'] / legacy['tokens']:6.1%}, "
+              f"coverage {row['coverage'] - legacy['coverage']:+.1%}")
+
+    docs, _ = queries[0]
+    diagnostics = ContextPacker(max_tokens=int(args.budgets.split(",")[0]), counter=counter).pack(docs, "query 0").diagnostics
+    print("diagnostics for query 0:", {k: v for k, v in diagnostics.to_dict().items() if k != "selected_ids"})
+
+
+if __name__ == "__main__":
+    main()
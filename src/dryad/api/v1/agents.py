@@ -1,14 +1,19 @@
 from typing import List, Annotated, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
-from dryad.infrastructure.database import get_db
+from dryad.infrastructure.database import get_db, AsyncSessionLocal
 from dryad.domain.agent.models import Agent
 from dryad.services.agent_factory import AgentFactory
 from dryad.services.agent.runner import AgentRunner
 from dryad.api.v1.auth import get_current_user
+from dryad.core.config import settings
+from dryad.core.llm_error_handler import LLMUnavailableError, llm_deadline
+from dryad.core.token_stream import sse_events
 
 router = APIRouter()
 
@@ -76,8 +81,7 @@ async def chat_with_agent(
 ):
     try:
         runner = AgentRunner(db, agent_id)
-        # Note: In a real async system, we might offload this to a background task 
-        # or use SSE/WebSockets for streaming. For request/response refactor, this blocks.
+        # Blocks until the whole reply is generated; see /chat/stream and /chat/ws for streaming
         response_text = await runner.chat(chat_req.message, chat_req.history)
         return ChatResponse(response=response_text)
     except ValueError as e:
@@ -85,3 +89,98 @@ async def chat_with_agent(
     except Exception as e:
         # Log error in prod
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{agent_id}/chat/stream")
+async def stream_chat_with_agent(
+    agent_id: str,
+    chat_req: ChatRequest,
+    current_user: Annotated[dict, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """
+    Stream the agent's reply over Server-Sent Events.
+
+    Tokens are read from the model only as fast as the client takes them.
+    When the client disconnects, the response is cancelled, which closes the
+    upstream LLM request; the partial reply is stored as cancelled.
+    """
+    runner = AgentRunner(db, agent_id)
+    try:
+        stream = await runner.stream_chat(chat_req.message, chat_req.history, user_id=current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return StreamingResponse(
+        sse_events(stream),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/{agent_id}/chat/ws")
+async def websocket_chat_with_agent(
+    websocket: WebSocket,
+    agent_id: str,
+    token: str = Query(...)
+):
+    """
+    Stream agent replies over a WebSocket.
+
+    The client sends {"message": ..., "history": [...]} per turn and gets
+    {"type": "token", "delta": ...} messages, then {"type": "done", ...timing}
+    or {"type": "error", "detail": ...}. Sending {"type": "cancel"} or
+    disconnecting mid-reply aborts the upstream LLM call. Each turn gets its
+    own LLM request deadline, as an HTTP request would.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            user = await get_current_user(db, token)
+        except HTTPException:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        runner = AgentRunner(db, agent_id)
+        try:
+            await runner.initialize()
+        except ValueError:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+    await websocket.accept()
+
+    async def send_reply(chat_req: ChatRequest):
+        try:
+            with llm_deadline(settings.LLM_REQUEST_DEADLINE_SECONDS):
+                stream = await runner.stream_chat(chat_req.message, chat_req.history, user_id=user.id)
+                async for delta in stream:
+                    await websocket.send_json({"type": "token", "delta": delta})
+            await websocket.send_json({"type": "done", **stream.stats.to_dict()})
+        except LLMUnavailableError as e:
+            await websocket.send_json({"type": "error", "detail": e.error_message, "reason": e.reason})
+        except (WebSocketDisconnect, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+
+    reply: asyncio.Task = None
+    try:
+        while True:
+            payload = await websocket.receive_json()
+            if not isinstance(payload, dict):
+                await websocket.send_json({"type": "error", "detail": "Expected a JSON object"})
+                continue
+            if payload.get("type") == "cancel":
+                if reply is not None and not reply.done():
+                    reply.cancel()
+                continue
+            if reply is not None and not reply.done():
+                await websocket.send_json({"type": "error", "detail": "A reply is already streaming"})
+                continue
+            try:
+                chat_req = ChatRequest(**payload)
+            except ValidationError as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+            reply = asyncio.create_task(send_reply(chat_req))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if reply is not None and not reply.done():
+            reply.cancel()
+            await asyncio.gather(reply, return_exceptions=True)
@@ -66,6 +66,7 @@ from dryad.schemas.multi_provider_schemas import (
     ProviderSelectionResponse,
     ProviderHealthResponse,
     ProviderUsageResponse,
+    ProviderTelemetryResponse,
     FallbackChainConfig,
     FallbackChainResponse
 )
@@ -824,6 +825,29 @@ async def get_provider_usage(
         raise HTTPException(status_code=500, detail="Failed to get provider usage")
 
 
+@router.get("/oracle/providers/telemetry", response_model=ProviderTelemetryResponse, tags=["Multi-Provider Oracle"])
+async def get_provider_telemetry(
+    window: str = Query("5m", regex="^(1m|5m|1h)$", description="Sliding window: 1m, 5m or 1h"),
+    current_user: security.User = Depends(security.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get sliding-window provider telemetry.
+
+    Returns per-provider request counts, error rates, p50/p95/p99 latency, circuit breaker
+    state and the router's latency estimate over the last minute, five minutes or hour.
+    """
+    try:
+        multi_provider_service = MultiProviderService(db)
+        return await multi_provider_service.get_provider_telemetry(window)
+    except DryadError as e:
+        logger.error(f"Dryad error getting provider telemetry: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting provider telemetry: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get provider telemetry")
+
+
 @router.get("/oracle/providers/{provider_id}", response_model=ProviderInfo, tags=["Oracle"])
 async def get_oracle_provider(
     provider_id: str,
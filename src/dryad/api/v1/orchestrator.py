@@ -4,7 +4,7 @@ Provides task management and orchestration capabilities.
 """
 
 import logging
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query
 from dryad.core.security import get_current_user, User
 from typing import Dict, Any, List, Optional
 from dryad.api.v1.schemas.orchestrator import (
@@ -101,64 +101,43 @@ async def get_task_status(task_id: str, current_user: User = Depends(get_current
 @router.get("/tasks")
 async def list_tasks(
     status: Optional[str] = None,
-    limit: int = 50,
-    offset: int = 0,
+    task_type: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
     """
-    List tasks with optional filtering.
+    List asynchronous tasks with optional filtering.
 
     Args:
-        status: Filter by task status (PENDING, RUNNING, COMPLETED, FAILED)
+        status: Filter by task status (PENDING, RUNNING, COMPLETED, FAILED, CANCELLED)
+        task_type: Filter by task type
         limit: Maximum number of tasks to return
-        offset: Number of tasks to skip
+        cursor: Opaque cursor from the previous page's next_cursor
 
     Returns:
-        List of tasks with their status information
+        Page of tasks (newest first; in-flight tasks by id on Celery), the
+        cursor for the next page and per-status counts
     """
     try:
-        # Mock implementation for now - in real implementation, this would query the task store
-        tasks = []
-
-        # For testing purposes, return some mock tasks
-        if status == "COMPLETED":
-            tasks = [
-                {
-                    "task_id": "task-123",
-                    "status": "COMPLETED",
-                    "task_type": "data_analysis",
-                    "created_at": "2023-01-01T00:00:00Z",
-                    "completed_at": "2023-01-01T00:05:00Z",
-                    "result": {"status": "success"}
-                }
-            ]
-        elif not status:
-            tasks = [
-                {
-                    "task_id": "task-123",
-                    "status": "COMPLETED",
-                    "task_type": "data_analysis",
-                    "created_at": "2023-01-01T00:00:00Z",
-                    "completed_at": "2023-01-01T00:05:00Z"
-                },
-                {
-                    "task_id": "task-456",
-                    "status": "PENDING",
-                    "task_type": "document_processing",
-                    "created_at": "2023-01-01T00:10:00Z"
-                }
-            ]
-
-        # Apply pagination
-        paginated_tasks = tasks[offset:offset + limit]
+        page = await enhanced_orchestrator.list_tasks(
+            status=status,
+            task_type=task_type,
+            limit=limit,
+            cursor=cursor
+        )
 
         return {
-            "tasks": paginated_tasks,
-            "total": len(tasks),
+            "tasks": page["tasks"],
+            "total": sum(page["counts"].values()) if not status else page["counts"].get(status.lower(), 0),
             "limit": limit,
-            "offset": offset
+            "next_cursor": page["next_cursor"],
+            "counts": page["counts"],
+            "workers": page["workers"]
         }
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list tasks: {str(e)}")
 
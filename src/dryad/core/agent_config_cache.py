@@ -0,0 +1,153 @@
+"""
+TTL cache of agent configurations.
+
+AgentRunner is built per request, and loading its Agent row cost a database
+round trip on every chat turn. The cache holds detached, immutable snapshots
+of agent rows for a short TTL. Any flush that updates or deletes an Agent
+invalidates its entry, and so does the commit that follows, so a reader
+racing the writer cannot keep the old row cached until the TTL runs out.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from dryad.domain.agent.models import Agent
+from dryad.infrastructure.llm.providers import LLMConfig
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "dryad_agent_config_invalidations"
+
+
+@dataclass(frozen=True)
+class AgentConfig:
+    """Read-only snapshot of an Agent row, safe to share across sessions"""
+    id: str
+    name: str
+    model_provider: str
+    model_name: str
+    temperature: float
+    system_prompt: str
+    tool_ids: Tuple[str, ...]
+    is_active: bool
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, agent: Agent) -> "AgentConfig":
+        return cls(
+            id=agent.id,
+            name=agent.name,
+            model_provider=agent.model_provider,
+            model_name=agent.model_name,
+            temperature=agent.temperature,
+            system_prompt=agent.system_prompt,
+            tool_ids=tuple(agent.tool_ids or ()),
+            is_active=agent.is_active,
+            updated_at=agent.updated_at
+        )
+
+    def llm_config(self) -> LLMConfig:
+        return LLMConfig(provider=self.model_provider, model_name=self.model_name, temperature=self.temperature)
+
+
+class AgentConfigCache:
+    """LRU of AgentConfig snapshots with a TTL and per-agent invalidation"""
+
+    def __init__(self, ttl_seconds: float = 60.0, max_size: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl_seconds
+        self.max_size = max(1, max_size)
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, AgentConfig]]" = OrderedDict()
+        # Bumped on every invalidation; a load that started before one is not cached
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    async def get(self, db: AsyncSession, agent_id: str) -> Optional[AgentConfig]:
+        """Cached configuration for agent_id, loading it with db on a miss; None if there is no such agent"""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(agent_id)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(agent_id)
+                self._stats["hits"] += 1
+                return entry[1]
+            self._stats["misses"] += 1
+            generation = (self._epoch, self._generations.get(agent_id, 0))
+
+        result = await db.execute(select(Agent).where(Agent.id == agent_id))
+        agent = result.scalar_one_or_none()
+        if agent is None:
+            return None
+        config = AgentConfig.from_model(agent)
+
+        with self._lock:
+            if (self._epoch, self._generations.get(agent_id, 0)) == generation:
+                self._entries[agent_id] = (self.clock(), config)
+                self._entries.move_to_end(agent_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return config
+
+    def invalidate(self, agent_id: Optional[str] = None):
+        """Drop one agent's entry, or every entry when agent_id is None"""
+        with self._lock:
+            self._stats["invalidations"] += 1
+            if agent_id is None:
+                self._epoch += 1
+                self._entries.clear()
+                return
+            self._generations[agent_id] = self._generations.get(agent_id, 0) + 1
+            self._entries.pop(agent_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "size": len(self._entries), "ttl_seconds": self.ttl}
+
+
+_cache: Optional[AgentConfigCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_agent_config_cache() -> AgentConfigCache:
+    """Process-wide agent configuration cache, configured from settings"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from dryad.core.config import settings
+                _cache = AgentConfigCache(
+                    ttl_seconds=getattr(settings, "AGENT_CONFIG_CACHE_TTL_SECONDS", 60.0),
+                    max_size=getattr(settings, "AGENT_CONFIG_CACHE_SIZE", 1024)
+                )
+    return _cache
+
+
+@event.listens_for(Agent, "after_update")
+@event.listens_for(Agent, "after_delete")
+def _agent_changed(mapper, connection, target: Agent):
+    get_agent_config_cache().invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _agent_changes_committed(session: Session):
+    for agent_id in session.info.pop(_PENDING_KEY, ()):
+        get_agent_config_cache().invalidate(agent_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _agent_changes_rolled_back(session: Session):
+    session.info.pop(_PENDING_KEY, None)
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import Dict, List, Union
 from pydantic import AnyHttpUrl, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -38,6 +38,112 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./dryad.db"
 
+    # Orchestrator task queue ("local" runs async tasks from a SQLite queue in-process; "celery" dispatches to Celery)
+    TASK_QUEUE_BACKEND: str = "local"
+    TASK_QUEUE_PATH: str = "./dryad_tasks.db"
+    TASK_QUEUE_VISIBILITY_TIMEOUT: float = 300.0
+    TASK_QUEUE_MAX_ATTEMPTS: int = 3
+    TASK_QUEUE_DEFAULT_CONCURRENCY: int = 4
+    TASK_QUEUE_CONCURRENCY: Dict[str, int] = {
+        "multi_agent_workflow": 2,
+        "document_processing": 2,
+        "comprehensive_workflow": 2,
+        "data_cleanup": 1
+    }
+
+    # Multi-provider consultation (hedge a provider call once it runs past this quantile of its recent latencies)
+    MULTI_CONSULT_HEDGING_ENABLED: bool = True
+    MULTI_CONSULT_HEDGE_QUANTILE: float = 0.95
+    MULTI_CONSULT_HEDGE_MIN_DELAY: float = 0.05
+    MULTI_CONSULT_HEDGE_MIN_SAMPLES: int = 20
+    MULTI_CONSULT_LATENCY_WINDOW: int = 200
+
+    # Provider telemetry, circuit breakers and routing (state is snapshotted to PROVIDER_TELEMETRY_PATH)
+    PROVIDER_TELEMETRY_PATH: str | None = "./dryad_provider_telemetry.json"
+    PROVIDER_TELEMETRY_PERSIST_SECONDS: float = 30.0
+    PROVIDER_CIRCUIT_FAILURE_RATE: float = 0.5
+    PROVIDER_CIRCUIT_MIN_REQUESTS: int = 10
+    PROVIDER_CIRCUIT_CONSECUTIVE_FAILURES: int = 5
+    PROVIDER_CIRCUIT_COOLDOWN_SECONDS: float = 30.0
+    PROVIDER_CIRCUIT_MAX_COOLDOWN_SECONDS: float = 300.0
+    PROVIDER_ROUTER_DEFAULT_LATENCY_MS: float = 1000.0
+    PROVIDER_ROUTER_COST_WEIGHT_MS_PER_USD: float = 10000.0
+    PROVIDER_ROUTER_IN_FLIGHT_PENALTY: float = 0.1
+
+    # LLM call guard (timeouts in seconds; X-Request-Timeout overrides the per-request deadline)
+    LLM_REQUEST_DEADLINE_SECONDS: float = 120.0
+    LLM_CALL_TIMEOUT_SECONDS: float = 60.0
+    LLM_STREAM_IDLE_TIMEOUT_SECONDS: float = 30.0
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BUDGET_RATIO: float = 0.1
+    LLM_RETRY_MIN_PER_SECOND: float = 1.0
+    LLM_RETRY_BACKOFF_SECONDS: float = 0.2
+    LLM_RETRY_MAX_BACKOFF_SECONDS: float = 5.0
+    LLM_CONCURRENCY_INITIAL: int = 8
+    LLM_CONCURRENCY_MIN: int = 1
+    LLM_CONCURRENCY_MAX: int = 128
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 10.0
+
+    # LLM client registry (long-lived chat models over one shared HTTP connection pool)
+    LLM_CLIENT_CACHE_SIZE: int = 32
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    LLM_HTTP_TIMEOUT_SECONDS: float = 60.0
+
+    # Agent configuration cache (entries are also invalidated when an agent row changes)
+    AGENT_CONFIG_CACHE_TTL_SECONDS: float = 60.0
+    AGENT_CONFIG_CACHE_SIZE: int = 1024
+
+    # Consultation context cache (branch, vessel and ancestors; invalidated when they change)
+    CONSULTATION_CONTEXT_CACHE_TTL_SECONDS: float = 30.0
+    CONSULTATION_CONTEXT_CACHE_SIZE: int = 1024
+
+    # LLM response cache (L1 in memory, L2 in SQLite at LLM_CACHE_PATH; the semantic tier
+    # needs sentence-transformers and LLM_CACHE_SEMANTIC_MODEL, e.g. "all-MiniLM-L6-v2").
+    # Opt-in: an identical prompt gets the cached answer whoever sends it. L2 stays off
+    # until LLM_CACHE_PATH points into a data directory.
+    LLM_CACHE_ENABLED: bool = False
+    LLM_CACHE_PATH: str | None = None
+    LLM_CACHE_TTL_SECONDS: float = 3600.0
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_MAX_L2_ENTRIES: int = 50000
+    LLM_CACHE_SEMANTIC_MODEL: str | None = None
+    LLM_CACHE_SEMANTIC_THRESHOLD: float = 0.95
+
+    # Multi-agent workflows (researcher calls run concurrently per workflow; 1 keeps the cost
+    # of a single research call, up to 3 splits research by angle at one call per angle)
+    WORKFLOW_RESEARCH_FANOUT: int = 1
+
+    # Vector store and RAG ingestion (chunks are embedded by the store's vectorizer unless
+    # RAG_EMBEDDING_MODEL names a sentence-transformers model)
+    WEAVIATE_URL: str = "http://localhost:8080"
+    WEAVIATE_API_KEY: str | None = None
+    RAG_EMBEDDING_MODEL: str | None = None
+    RAG_CHUNK_SIZE: int = 1000
+    RAG_CHUNK_OVERLAP: int = 200
+    RAG_EMBED_BATCH_SIZE: int = 64
+    RAG_EMBED_WORKERS: int = 4
+
+    # Async vector store access (Weaviate clients kept per process, query result cache;
+    # the TTL bounds staleness from writes made outside the process)
+    VECTOR_STORE_POOL_SIZE: int = 4
+    VECTOR_STORE_POOL_TIMEOUT_SECONDS: float = 10.0
+    VECTOR_QUERY_CACHE_SIZE: int = 2048
+    VECTOR_QUERY_CACHE_TTL_SECONDS: float = 300.0
+
+    # RAG context packing (token budget for retrieved context, MMR relevance/redundancy
+    # weight, similarity at which a chunk is a near-duplicate, tiktoken encoding)
+    RAG_CONTEXT_MAX_TOKENS: int = 1000
+    RAG_CONTEXT_MMR_LAMBDA: float = 0.7
+    RAG_CONTEXT_DUPLICATE_THRESHOLD: float = 0.9
+    RAG_TOKENIZER_ENCODING: str = "cl100k_base"
+
+    # Plagiarism corpus index (MinHash-LSH passages in SQLite, opened on first use; a text
+    # counts as matching a source at or above PLAGIARISM_MATCH_THRESHOLD similarity)
+    PLAGIARISM_INDEX_PATH: str = "./dryad_plagiarism_index.db"
+    PLAGIARISM_MATCH_THRESHOLD: float = 0.2
+
     # OpenAI / AI Providers
     OPENAI_API_KEY: str | None = None
     
@@ -0,0 +1,287 @@
+"""
+Hedged, quorum-aware scheduling for multi-provider consultations.
+
+Every provider call starts at once and results are collected with
+asyncio.wait as they complete, instead of waiting on one gather for the
+slowest provider. The caller passes a predicate that says when the outcome is
+already decided (for example, a first-success consultation has its answer);
+once it returns True, the remaining calls are cancelled. If a call runs past
+its provider's rolling p95 latency, one backup request goes to the same
+provider, and whichever attempt succeeds first wins. At the deadline, the
+results gathered so far come back with a status for every provider instead
+of being thrown away.
+
+Provider latencies are measured from the start of the consultation, so a
+hedged answer counts the wait before the hedge, and failures and deadline
+timeouts are recorded alongside successes. Attempts may be cancelled at any
+point, so call should have no side effects that a lost attempt would leave
+behind; persist the winning results after run returns.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+PROVIDER_STATUSES = (PENDING, SUCCEEDED, FAILED, CANCELLED, TIMED_OUT)
+
+
+class LatencyWindow:
+    """Recent latency samples per provider, for quantiles such as the p95 hedge threshold"""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.size = size
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider_id: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(provider_id)
+            if samples is None:
+                samples = self._samples[provider_id] = deque(maxlen=self.size)
+            samples.append(seconds)
+
+    def quantile(self, provider_id: str, q: float) -> Optional[float]:
+        """Nearest-rank quantile in seconds, or None until min_samples calls have completed"""
+        with self._lock:
+            samples = self._samples.get(provider_id)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {provider_id: sorted(samples) for provider_id, samples in self._samples.items()}
+        return {
+            provider_id: {
+                "samples": len(ordered),
+                "p50_ms": ordered[(len(ordered) - 1) // 2] * 1000,
+                "p95_ms": ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)] * 1000
+            }
+            for provider_id, ordered in snapshot.items() if ordered
+        }
+
+
+@dataclass
+class ProviderOutcome:
+    """What happened to one provider during a consultation"""
+    provider_id: str
+    status: str = PENDING
+    result: Any = None
+    error: Optional[str] = None
+    latency_ms: float = 0.0
+    attempts: int = 0
+    hedged: bool = False
+    hedge_won: bool = False
+
+
+@dataclass
+class ConsultOutcome:
+    """Per-provider outcomes of one scheduled consultation, in panel order"""
+    outcomes: Dict[str, ProviderOutcome]
+    successes: List[Any] = field(default_factory=list)
+    quorum_reached: bool = False
+    deadline_exceeded: bool = False
+    elapsed_ms: float = 0.0
+    hedges_sent: int = 0
+
+    @property
+    def statuses(self) -> Dict[str, str]:
+        return {provider_id: outcome.status for provider_id, outcome in self.outcomes.items()}
+
+    def count(self, status: str) -> int:
+        return sum(1 for outcome in self.outcomes.values() if outcome.status == status)
+
+
+class ConsultScheduler:
+    """Runs one call per provider with early quorum, p95 hedging and a hard deadline"""
+
+    def __init__(
+        self,
+        latencies: Optional[LatencyWindow] = None,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay: float = 0.05,
+        hedging_enabled: bool = True
+    ):
+        self.latencies = latencies or LatencyWindow()
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedging_enabled = hedging_enabled
+
+    def hedge_delay(self, provider_id: str) -> Optional[float]:
+        """Seconds after which a call to this provider gets a backup request"""
+        if not self.hedging_enabled:
+            return None
+        threshold = self.latencies.quantile(provider_id, self.hedge_quantile)
+        if threshold is None:
+            return None
+        return max(threshold, self.hedge_min_delay)
+
+    async def run(
+        self,
+        provider_ids: Sequence[str],
+        call: Callable[[str], Awaitable[Any]],
+        timeout: float,
+        decided: Optional[Callable[[List[Any], int], bool]] = None,
+        is_success: Optional[Callable[[Any], bool]] = None
+    ) -> ConsultOutcome:
+        """
+        Consult every provider and return as soon as the outcome is decided.
+
+        Args:
+            provider_ids: Providers to call, one primary attempt each
+            call: Coroutine factory for one attempt against a provider
+            timeout: Deadline in seconds; unfinished providers are reported as timed out
+            decided: Called with the successful results so far (in completion order) and
+                the number of providers still pending; returning True cancels the rest
+            is_success: Whether a returned result counts as a success (default: any result)
+
+        Returns:
+            Per-provider outcomes and the successful results in completion order
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + timeout
+        outcomes = {provider_id: ProviderOutcome(provider_id) for provider_id in provider_ids}
+        result = ConsultOutcome(outcomes=outcomes)
+        attempts: Dict[asyncio.Task, Tuple[str, bool]] = {}
+        hedge_at: Dict[str, float] = {}
+        pending = len(outcomes)
+
+        def launch(provider_id: str, hedge: bool):
+            task = asyncio.ensure_future(call(provider_id))
+            attempts[task] = (provider_id, hedge)
+            outcomes[provider_id].attempts += 1
+
+        def cancel_attempts(provider_id: str) -> List[asyncio.Task]:
+            siblings = [task for task, attempt in attempts.items() if attempt[0] == provider_id]
+            for task in siblings:
+                del attempts[task]
+                task.cancel()
+            return siblings
+
+        for provider_id in outcomes:
+            launch(provider_id, hedge=False)
+            delay = self.hedge_delay(provider_id)
+            if delay is not None:
+                hedge_at[provider_id] = started + delay
+
+        cancelled: List[asyncio.Task] = []
+        try:
+            while pending and not result.quorum_reached:
+                now = loop.time()
+                if now >= deadline:
+                    result.deadline_exceeded = True
+                    break
+                wake = min([deadline, *hedge_at.values()])
+                done, _ = await asyncio.wait(
+                    list(attempts), timeout=max(0.0, wake - now), return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    if task not in attempts:
+                        continue
+                    provider_id, hedge = attempts.pop(task)
+                    outcome = outcomes[provider_id]
+                    # From the request start: a hedge's answer includes the wait before it was sent
+                    latency = loop.time() - started
+                    error = None
+                    value = None
+                    if task.cancelled():
+                        error = "Provider call was cancelled"
+                    elif task.exception() is not None:
+                        error = str(task.exception()) or type(task.exception()).__name__
+                    else:
+                        value = task.result()
+
+                    if error is None and (is_success is None or is_success(value)):
+                        outcome.status = SUCCEEDED
+                        outcome.result = value
+                        outcome.error = None
+                        outcome.latency_ms = latency * 1000
+                        outcome.hedge_won = hedge
+                        self.latencies.record(provider_id, latency)
+                        cancelled.extend(cancel_attempts(provider_id))
+                        result.successes.append(value)
+                    else:
+                        outcome.result = value if value is not None else outcome.result
+                        outcome.error = error or getattr(value, "error", None) or "Provider call failed"
+                        outcome.latency_ms = latency * 1000
+                        if any(attempt[0] == provider_id for attempt in attempts.values()):
+                            # The other attempt for this provider may still succeed
+                            continue
+                        outcome.status = FAILED
+                        self.latencies.record(provider_id, latency)
+                    hedge_at.pop(provider_id, None)
+                    pending -= 1
+
+                now = loop.time()
+                for provider_id, at in list(hedge_at.items()):
+                    if at <= now:
+                        del hedge_at[provider_id]
+                        outcomes[provider_id].hedged = True
+                        result.hedges_sent += 1
+                        launch(provider_id, hedge=True)
+                        logger.debug(f"Hedged provider {provider_id} after {(now - started) * 1000:.0f}ms")
+
+                if decided is not None and pending and decided(result.successes, pending):
+                    result.quorum_reached = True
+        finally:
+            leftover = TIMED_OUT if result.deadline_exceeded else CANCELLED
+            now = loop.time()
+            for outcome in outcomes.values():
+                if outcome.status == PENDING:
+                    cancelled.extend(cancel_attempts(outcome.provider_id))
+                    outcome.status = leftover
+                    outcome.latency_ms = (now - started) * 1000
+                    if leftover == TIMED_OUT:
+                        # At least this slow; providers cancelled by an early quorum say nothing about latency
+                        self.latencies.record(outcome.provider_id, now - started)
+            for task in attempts:
+                task.cancel()
+                cancelled.append(task)
+            if cancelled:
+                await asyncio.gather(*cancelled, return_exceptions=True)
+
+        result.elapsed_ms = (loop.time() - started) * 1000
+        if result.deadline_exceeded:
+            logger.warning(
+                f"Consultation deadline of {timeout}s passed with "
+                f"{result.count(SUCCEEDED)}/{len(outcomes)} providers answered"
+            )
+        return result
+
+
+_consult_scheduler: Optional[ConsultScheduler] = None
+_consult_scheduler_lock = threading.Lock()
+
+
+def get_consult_scheduler() -> ConsultScheduler:
+    """Process-wide scheduler, so provider latency windows outlive each request's service"""
+    global _consult_scheduler
+    if _consult_scheduler is None:
+        with _consult_scheduler_lock:
+            if _consult_scheduler is None:
+                from dryad.core.config import settings
+                _consult_scheduler = ConsultScheduler(
+                    latencies=LatencyWindow(
+                        size=getattr(settings, "MULTI_CONSULT_LATENCY_WINDOW", 200),
+                        min_samples=getattr(settings, "MULTI_CONSULT_HEDGE_MIN_SAMPLES", 20)
+                    ),
+                    hedge_quantile=getattr(settings, "MULTI_CONSULT_HEDGE_QUANTILE", 0.95),
+                    hedge_min_delay=getattr(settings, "MULTI_CONSULT_HEDGE_MIN_DELAY", 0.05),
+                    hedging_enabled=getattr(settings, "MULTI_CONSULT_HEDGING_ENABLED", True)
+                )
+    return _consult_scheduler
@@ -0,0 +1,226 @@
+"""
+Consultation context prefetch and cache.
+
+Preparing an oracle consultation needs the branch, its vessel and the
+context inherited from ancestor branches. load_consultation_context reads
+all of it in one statement: a recursive CTE walks the parent chain, and
+branches and vessels are joined onto it. ConsultationContextCache keeps
+the resulting immutable snapshots for a short TTL, so repeated consults on
+a branch (several providers for one multi-consult, follow-up questions)
+skip the query entirely.
+
+An update or delete of a branch invalidates every cached context that
+inherits from it. An insert, update or delete of a vessel invalidates its
+branch. The commit that follows invalidates again, as in agent_config_cache.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import event, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from dryad.database.models.branch import Branch
+from dryad.database.models.vessel import Vessel
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "dryad_consultation_context_invalidations"
+
+# Guards the recursive walk against parent cycles
+MAX_LINEAGE_DEPTH = 64
+
+
+@dataclass(frozen=True)
+class AncestorContext:
+    """Context a branch inherits from one ancestor"""
+    branch_id: str
+    name: str
+    description: Optional[str]
+    file_references: Tuple[Tuple[str, str], ...]
+
+
+@dataclass(frozen=True)
+class ConsultationContext:
+    """Read-only snapshot of a branch, its vessel and its ancestors (nearest first)"""
+    branch_id: str
+    branch_name: str
+    branch_description: Optional[str]
+    vessel_id: str
+    vessel_storage_path: str
+    vessel_content_hash: str
+    file_references: Tuple[Tuple[str, str], ...]
+    ancestors: Tuple[AncestorContext, ...]
+
+    @property
+    def lineage_ids(self) -> FrozenSet[str]:
+        return frozenset((self.branch_id, *(ancestor.branch_id for ancestor in self.ancestors)))
+
+    def inherited_file_references(self) -> Dict[str, str]:
+        """File references from the root down to this branch; nearer branches win"""
+        merged: Dict[str, str] = {}
+        for ancestor in reversed(self.ancestors):
+            merged.update(ancestor.file_references)
+        merged.update(self.file_references)
+        return merged
+
+
+def _references(value: Any) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((value or {}).items()))
+
+
+async def load_consultation_context(db: AsyncSession, branch_id: str) -> Tuple[bool, Optional[ConsultationContext]]:
+    """
+    Load a branch, its vessel and its ancestors in one statement.
+
+    Returns:
+        (branch exists, context); the context is None when the branch or its vessel is missing
+    """
+    lineage = select(
+        Branch.id.label("id"),
+        Branch.parent_id.label("parent_id"),
+        literal(0).label("depth")
+    ).where(Branch.id == branch_id).cte("lineage", recursive=True)
+    lineage = lineage.union_all(
+        select(Branch.id, Branch.parent_id, lineage.c.depth + 1)
+        .join(lineage, Branch.id == lineage.c.parent_id)
+        .where(lineage.c.depth < MAX_LINEAGE_DEPTH)
+    )
+    stmt = (
+        select(
+            Branch.id, Branch.name, Branch.description,
+            Vessel.id, Vessel.storage_path, Vessel.content_hash, Vessel.file_references
+        )
+        .join(lineage, Branch.id == lineage.c.id)
+        .outerjoin(Vessel, Vessel.branch_id == Branch.id)
+        .order_by(lineage.c.depth)
+    )
+    rows = (await db.execute(stmt)).all()
+    if not rows:
+        return False, None
+
+    branch, ancestors = rows[0], rows[1:]
+    if branch[3] is None:
+        return True, None
+    return True, ConsultationContext(
+        branch_id=branch[0],
+        branch_name=branch[1],
+        branch_description=branch[2],
+        vessel_id=branch[3],
+        vessel_storage_path=branch[4],
+        vessel_content_hash=branch[5],
+        file_references=_references(branch[6]),
+        ancestors=tuple(
+            AncestorContext(branch_id=row[0], name=row[1], description=row[2], file_references=_references(row[6]))
+            for row in ancestors
+        )
+    )
+
+
+class ConsultationContextCache:
+    """LRU of ConsultationContext snapshots with a TTL and lineage-aware invalidation"""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_size: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl_seconds
+        self.max_size = max(1, max_size)
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, ConsultationContext]]" = OrderedDict()
+        # Bumped on every invalidation; a load that started before one is not cached
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    async def get(self, db: AsyncSession, branch_id: str) -> Tuple[bool, Optional[ConsultationContext]]:
+        """Cached context for branch_id, loading it with db on a miss; same result shape as load_consultation_context"""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(branch_id)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(branch_id)
+                self._stats["hits"] += 1
+                return True, entry[1]
+            self._stats["misses"] += 1
+            generation = self._generation
+
+        exists, context = await load_consultation_context(db, branch_id)
+        if context is None:
+            return exists, None
+
+        with self._lock:
+            if self._generation == generation:
+                self._entries[branch_id] = (self.clock(), context)
+                self._entries.move_to_end(branch_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return exists, context
+
+    def invalidate(self, branch_id: Optional[str] = None):
+        """Drop every context that includes branch_id in its lineage, or every entry when branch_id is None"""
+        with self._lock:
+            self._stats["invalidations"] += 1
+            self._generation += 1
+            if branch_id is None:
+                self._entries.clear()
+                return
+            for key in [key for key, (_, context) in self._entries.items() if branch_id in context.lineage_ids]:
+                del self._entries[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "size": len(self._entries), "ttl_seconds": self.ttl}
+
+
+_cache: Optional[ConsultationContextCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_consultation_context_cache() -> ConsultationContextCache:
+    """Process-wide consultation context cache, configured from settings"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from dryad.core.config import settings
+                _cache = ConsultationContextCache(
+                    ttl_seconds=getattr(settings, "CONSULTATION_CONTEXT_CACHE_TTL_SECONDS", 30.0),
+                    max_size=getattr(settings, "CONSULTATION_CONTEXT_CACHE_SIZE", 1024)
+                )
+    return _cache
+
+
+def _invalidate(target_branch_id: Optional[str], target: Any):
+    if target_branch_id is None:
+        return
+    get_consultation_context_cache().invalidate(target_branch_id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target_branch_id)
+
+
+@event.listens_for(Branch, "after_update")
+@event.listens_for(Branch, "after_delete")
+def _branch_changed(mapper, connection, target: Branch):
+    _invalidate(target.id, target)
+
+
+@event.listens_for(Vessel, "after_insert")
+@event.listens_for(Vessel, "after_update")
+@event.listens_for(Vessel, "after_delete")
+def _vessel_changed(mapper, connection, target: Vessel):
+    _invalidate(target.branch_id, target)
+
+
+@event.listens_for(Session, "after_commit")
+def _context_changes_committed(session: Session):
+    for branch_id in session.info.pop(_PENDING_KEY, ()):
+        get_consultation_context_cache().invalidate(branch_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _context_changes_rolled_back(session: Session):
+    session.info.pop(_PENDING_KEY, None)
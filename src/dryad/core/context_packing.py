@@ -0,0 +1,430 @@
+"""
+Token-aware context packing for retrieval-augmented generation.
+
+ContextPacker turns retrieved chunks into a prompt context that fits a
+token budget:
+
+1. Tokens are counted with tiktoken when it is installed. Otherwise a fast
+   local approximation of BPE tokenization is used.
+2. Adjacent chunks of the same source form runs. Selecting several chunks
+   of a run merges them into one passage, with the overlapping window text
+   included once.
+3. Maximal marginal relevance (MMR) values each chunk as its relevance
+   minus its similarity to the more relevant chunks already chosen. Chunk
+   vectors are compared by cosine when present, and word-shingle sets by
+   Jaccard otherwise. Near-duplicates get no value.
+4. A multiple-choice knapsack picks at most one contiguous passage per run,
+   maximizing total value within the budget.
+
+Every pack returns ContextDiagnostics describing what was kept, dropped
+and merged.
+"""
+
+import logging
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]", re.UNICODE)
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Longest run of adjacent chunks merged into one passage
+MAX_RUN = 4
+
+# Knapsack capacity is bucketed to at most this many cells
+MAX_KNAPSACK_CELLS = 2048
+
+# Relevance of the lowest-scored candidate after normalization
+MIN_RELEVANCE = 0.1
+
+SEPARATOR = "\n---\n"
+
+
+class TokenCounter:
+    """Counts model tokens with tiktoken when available, otherwise approximates BPE"""
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        self._encoding = None
+        if TIKTOKEN_AVAILABLE:
+            try:
+                self._encoding = tiktoken.get_encoding(encoding)
+            except Exception as e:
+                logger.warning(f"tiktoken encoding {encoding} unavailable, approximating token counts: {e}")
+        self.name = encoding if self._encoding is not None else "approximate"
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        # Words up to 6 characters are one token, longer ones one more per further 6;
+        # punctuation marks are one token each
+        words = text.split()
+        return len(words) + sum((len(word) - 1) // 6 for word in words) + len(_PUNCTUATION_PATTERN.findall(text))
+
+
+_counter: Optional[TokenCounter] = None
+_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> TokenCounter:
+    """Process-wide token counter, configured from settings"""
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                from dryad.core.config import settings
+                _counter = TokenCounter(getattr(settings, "RAG_TOKENIZER_ENCODING", "cl100k_base"))
+    return _counter
+
+
+def _shingles(text: str) -> FrozenSet[Tuple[str, ...]]:
+    """Word trigrams of text"""
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < 3:
+        return frozenset([tuple(words)]) if words else frozenset()
+    return frozenset(zip(words, words[1:], words[2:]))
+
+
+def _unit(vector: Any) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def _merge_texts(first: str, second: str, max_overlap: int) -> Tuple[str, int]:
+    """Join two consecutive window chunks, keeping their shared text once; returns (text, characters removed)"""
+    probe = second[:min(50, len(second))]
+    if probe:
+        pos = first.find(probe, max(0, len(first) - max_overlap))
+        while pos >= 0:
+            if second.startswith(first[pos:]):
+                return first + second[len(first) - pos:], len(first) - pos
+            pos = first.find(probe, pos + 1)
+    return f"{first}\n{second}", 0
+
+
+@dataclass(eq=False)
+class _Chunk:
+    index: int
+    doc: Dict[str, Any]
+    content: str
+    source: str
+    title: str
+    position: Optional[int]
+    score: float
+    relevance: float
+    tokens: int
+    vector: Optional[np.ndarray]
+    shingles: Optional[FrozenSet[Tuple[str, ...]]] = None
+    run: int = -1
+    value: float = 0.0
+    redundancy: float = 0.0
+
+
+@dataclass
+class ContextDiagnostics:
+    """What one pack kept, dropped and merged"""
+    query: str
+    tokenizer: str
+    budget_tokens: int
+    candidates: int = 0
+    runs: int = 0
+    tokens_available: int = 0
+    tokens_used: int = 0
+    near_duplicates_dropped: int = 0
+    chunks_selected: int = 0
+    passages_selected: int = 0
+    chunks_merged: int = 0
+    overlap_characters_removed: int = 0
+    truncated: bool = False
+    relevance_available: float = 0.0
+    relevance_selected: float = 0.0
+    selected_ids: List[str] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class PackedContext:
+    """Context text for the prompt, the passages it holds and diagnostics"""
+    text: str
+    passages: List[Dict[str, Any]]
+    diagnostics: ContextDiagnostics
+
+
+class ContextPacker:
+    """Packs retrieved chunks into a token budget with MMR, run merging and a knapsack"""
+
+    def __init__(
+        self,
+        max_tokens: int = 1000,
+        mmr_lambda: float = 0.7,
+        duplicate_threshold: float = 0.9,
+        counter: Optional[TokenCounter] = None,
+        max_overlap_chars: int = 400
+    ):
+        """
+        Initialize the packer.
+
+        Args:
+            max_tokens: Token budget for the whole context, headers and separators included
+            mmr_lambda: Weight of relevance against redundancy (1.0 ignores redundancy)
+            duplicate_threshold: Similarity at which a chunk counts as a near-duplicate and is dropped
+            counter: Token counter (default: get_token_counter())
+            max_overlap_chars: Longest overlap looked for when merging adjacent chunks
+        """
+        self.max_tokens = max_tokens
+        self.mmr_lambda = mmr_lambda
+        self.duplicate_threshold = duplicate_threshold
+        self.counter = counter
+        self.max_overlap_chars = max_overlap_chars
+
+    def pack(self, docs: Sequence[Dict[str, Any]], query: str = "", max_tokens: Optional[int] = None) -> PackedContext:
+        """
+        Pack retrieved documents.
+
+        Args:
+            docs: Retrieved chunks with content and score, and optionally document_title,
+                chunk_index, vector and metadata.document_id
+            query: The query (recorded in diagnostics)
+            max_tokens: Budget override for this call
+
+        Returns:
+            PackedContext
+        """
+        started = time.perf_counter()
+        counter = self.counter or get_token_counter()
+        budget = max_tokens or self.max_tokens
+        diagnostics = ContextDiagnostics(query=query, tokenizer=counter.name, budget_tokens=budget)
+
+        chunks = self._chunks(docs, counter)
+        diagnostics.candidates = len(chunks)
+        if not chunks:
+            diagnostics.elapsed_ms = (time.perf_counter() - started) * 1000
+            return PackedContext(text="", passages=[], diagnostics=diagnostics)
+        diagnostics.tokens_available = sum(c.tokens for c in chunks)
+        diagnostics.relevance_available = sum(c.relevance for c in chunks)
+
+        runs = self._runs(chunks)
+        diagnostics.runs = len(runs)
+        self._mmr(chunks)
+        diagnostics.near_duplicates_dropped = sum(1 for c in chunks if c.redundancy >= self.duplicate_threshold)
+
+        options = [self._options(run, counter) for run in runs]
+        chosen = self._knapsack(options, budget)
+        passages = [options[g][o] for g, o in chosen]
+
+        if not passages:
+            # Nothing fits whole: truncate the most relevant chunk to the budget
+            best = max(chunks, key=lambda c: c.relevance)
+            passage = self._truncate(best, budget, counter)
+            passages = [passage] if passage else []
+            diagnostics.truncated = True
+
+        passages.sort(key=lambda p: -max(c.relevance for c in p["chunks"]))
+        text = SEPARATOR.join(self._render(i + 1, passage) for i, passage in enumerate(passages))
+
+        selected = [c for p in passages for c in p["chunks"]]
+        diagnostics.tokens_used = counter.count(text)
+        diagnostics.chunks_selected = len(selected)
+        diagnostics.passages_selected = len(passages)
+        diagnostics.chunks_merged = sum(len(p["chunks"]) for p in passages if len(p["chunks"]) > 1)
+        diagnostics.overlap_characters_removed = sum(p["overlap"] for p in passages)
+        diagnostics.relevance_selected = sum(c.relevance for c in selected)
+        diagnostics.selected_ids = [str(c.doc.get("id", c.index)) for c in selected]
+        diagnostics.elapsed_ms = (time.perf_counter() - started) * 1000
+
+        return PackedContext(
+            text=text,
+            passages=[{
+                "source": p["chunks"][0].source,
+                "title": p["chunks"][0].title,
+                "chunk_indexes": [c.position for c in p["chunks"]],
+                "ids": [str(c.doc.get("id", c.index)) for c in p["chunks"]],
+                "tokens": p["tokens"]
+            } for p in passages],
+            diagnostics=diagnostics
+        )
+
+    # --- steps ---
+
+    def _chunks(self, docs: Sequence[Dict[str, Any]], counter: TokenCounter) -> List[_Chunk]:
+        docs = [d for d in docs if d.get("content")]
+        # Min-max normalized relevance: retriever scores bunch up in a narrow band,
+        # and knapsack values need to tell the best chunks from the marginal ones.
+        # The weakest candidate still passed retrieval, so it keeps MIN_RELEVANCE
+        scores = [float(d.get("score") or 0.0) for d in docs]
+        low, high = min(scores, default=0.0), max(scores, default=0.0)
+        chunks = []
+        for i, doc in enumerate(docs):
+            metadata = doc.get("metadata") or {}
+            vector = doc.get("vector")
+            position = doc.get("chunk_index")
+            chunks.append(_Chunk(
+                index=i,
+                doc=doc,
+                content=doc["content"],
+                source=str(metadata.get("document_id") or doc.get("document_title") or f"doc-{i}"),
+                title=doc.get("document_title", ""),
+                position=int(position) if position is not None else None,
+                score=scores[i],
+                relevance=MIN_RELEVANCE + (1 - MIN_RELEVANCE) * (scores[i] - low) / (high - low) if high > low else 1.0,
+                tokens=counter.count(doc["content"]),
+                vector=_unit(vector) if vector is not None else None
+            ))
+        return chunks
+
+    def _runs(self, chunks: List[_Chunk]) -> List[List[_Chunk]]:
+        """Group chunks into runs of consecutive chunk_index within one source"""
+        by_source: Dict[str, List[_Chunk]] = {}
+        runs: List[List[_Chunk]] = []
+        for chunk in chunks:
+            if chunk.position is None:
+                runs.append([chunk])
+            else:
+                by_source.setdefault(chunk.source, []).append(chunk)
+        for source_chunks in by_source.values():
+            source_chunks.sort(key=lambda c: c.position)
+            run = [source_chunks[0]]
+            for chunk in source_chunks[1:]:
+                if chunk.position == run[-1].position:
+                    runs.append([chunk])  # Same window retrieved twice: let MMR drop it
+                elif chunk.position == run[-1].position + 1 and len(run) < MAX_RUN:
+                    run.append(chunk)
+                else:
+                    runs.append(run)
+                    run = [chunk]
+            runs.append(run)
+        for r, run in enumerate(runs):
+            for chunk in run:
+                chunk.run = r
+        return runs
+
+    def _similarity(self, a: _Chunk, b: _Chunk) -> float:
+        if a.vector is not None and b.vector is not None and a.vector.shape == b.vector.shape:
+            return float(a.vector @ b.vector)
+        for chunk in (a, b):
+            if chunk.shingles is None:
+                chunk.shingles = _shingles(chunk.content)
+        if not a.shingles or not b.shingles:
+            return 0.0
+        return len(a.shingles & b.shingles) / len(a.shingles | b.shingles)
+
+    def _mmr(self, chunks: List[_Chunk]):
+        """Greedy MMR order; each chunk's value is its marginal relevance when it was picked"""
+        remaining = list(chunks)
+        redundancy = {c.index: 0.0 for c in chunks}
+        while remaining:
+            best = max(
+                remaining,
+                key=lambda c: self.mmr_lambda * c.relevance - (1 - self.mmr_lambda) * redundancy[c.index]
+            )
+            remaining.remove(best)
+            best.redundancy = redundancy[best.index]
+            if best.redundancy >= self.duplicate_threshold:
+                best.value = 0.0
+            else:
+                best.value = max(0.0, self.mmr_lambda * best.relevance - (1 - self.mmr_lambda) * best.redundancy)
+            for other in remaining:
+                # Neighbours in a run share window text by construction; merging handles that
+                if other.run != best.run:
+                    redundancy[other.index] = max(redundancy[other.index], self._similarity(best, other))
+
+    def _header(self, title: str, score: float) -> str:
+        return f"Document 10 (Score: {score:.3f}):\nTitle: {title}\nContent: \n"
+
+    def _render(self, number: int, passage: Dict[str, Any]) -> str:
+        lead = passage["chunks"][0]
+        score = max(c.score for c in passage["chunks"])
+        return f"Document {number} (Score: {score:.3f}):\nTitle: {lead.title}\nContent: {passage['text']}\n"
+
+    def _truncate(self, chunk: _Chunk, budget: int, counter: TokenCounter) -> Optional[Dict[str, Any]]:
+        """
+        The longest prefix of chunk whose rendered passage fits the budget, found
+        by binary search on its length; None if not even the header fits.
+        """
+        def passage(length: int) -> Dict[str, Any]:
+            text = chunk.content[:length].rstrip()
+            entry = {"chunks": [chunk], "text": text, "overlap": 0, "value": chunk.value}
+            entry["tokens"] = counter.count(self._render(1, entry))
+            return entry
+
+        low, high = 0, len(chunk.content)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if passage(middle)["tokens"] <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        # Token counts are not strictly monotonic in the prefix length, so check the result
+        while low > 0 and passage(low)["tokens"] > budget:
+            low -= 1
+        best = passage(low)
+        return best if best["tokens"] <= budget else None
+
+    def _options(self, run: List[_Chunk], counter: TokenCounter) -> List[Dict[str, Any]]:
+        """Every contiguous passage of a run, as a knapsack option"""
+        options = []
+        overhead = counter.count(self._header(run[0].title, 1.0)) + counter.count(SEPARATOR)
+        for start in range(len(run)):
+            text = run[start].content
+            tokens = overhead + run[start].tokens
+            overlap = 0
+            for end in range(start, len(run)):
+                if end > start:
+                    text, removed = _merge_texts(text, run[end].content, self.max_overlap_chars)
+                    # The shared text is counted once
+                    tokens += run[end].tokens - (counter.count(run[end].content[:removed]) if removed else 0)
+                    overlap += removed
+                members = run[start:end + 1]
+                value = sum(c.value for c in members)
+                if value <= 0:
+                    continue
+                options.append({"chunks": members, "text": text, "overlap": overlap, "tokens": tokens, "value": value})
+        return options
+
+    def _knapsack(self, groups: List[List[Dict[str, Any]]], budget: int) -> List[Tuple[int, int]]:
+        """Multiple-choice 0/1 knapsack: at most one option per group; returns (group, option) pairs"""
+        if budget <= 0:
+            return []
+        cell = max(1, -(-budget // MAX_KNAPSACK_CELLS))
+        capacity = budget // cell
+        best = np.zeros(capacity + 1)
+        choices = []
+        for options in groups:
+            new = best.copy()
+            choice = np.full(capacity + 1, -1, dtype=np.int32)
+            for o, option in enumerate(options):
+                weight = -(-option["tokens"] // cell)
+                if weight > capacity:
+                    continue
+                candidate = np.full(capacity + 1, -np.inf)
+                candidate[weight:] = best[:capacity + 1 - weight] + option["value"]
+                better = candidate > new
+                new[better] = candidate[better]
+                choice[better] = o
+            best = new
+            choices.append(choice)
+
+        chosen = []
+        c = int(np.argmax(best))
+        for g in range(len(groups) - 1, -1, -1):
+            o = int(choices[g][c])
+            if o >= 0:
+                chosen.append((g, o))
+                c -= -(-groups[g][o]["tokens"] // cell)
+        chosen.reverse()
+        return chosen
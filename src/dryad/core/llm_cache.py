@@ -0,0 +1,512 @@
+"""
+LLM response cache.
+
+Repeated prompts, such as the same oracle consultation or the same task to
+decompose, are answered from the cache instead of the provider. A lookup
+tries, in order:
+
+1. L1, an in-memory LRU.
+2. L2, a SQLite table that survives restarts and is shared by workers on the
+   same host.
+3. Optionally, a semantic tier. When an embed function is configured, an
+   exact miss embeds the normalized prompt. If a cached prompt for the same
+   model and params has cosine similarity of at least semantic_threshold,
+   its answer is reused.
+
+Exact keys are SHA-256 digests over (namespace, model, normalized prompt,
+params). Entries expire after their TTL. L1 evicts the least recently used
+entry, and L2 is trimmed to its newest entries. Concurrent misses for the
+same key share one in-flight call (stampede protection). SQLite access runs
+on one dedicated thread, as in task_queue, so the event loop never waits on
+disk.
+
+An answer is shared by every caller whose key matches, so callers put
+anything that must not be shared (such as the branch a consultation is for)
+into params. The process-wide cache is off unless LLM_CACHE_ENABLED is set,
+and L2 only exists when LLM_CACHE_PATH is.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    value TEXT NOT NULL,
+    embedding BLOB,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_cache (expires_at);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache (created_at);
+"""
+
+# Expired and surplus L2 rows are pruned once per this many writes
+_PRUNE_EVERY = 256
+
+
+def normalize_prompt(prompt: Any) -> str:
+    """Canonical text for a prompt: a string, or chat messages (message objects, (role, content) pairs or dicts)"""
+    if isinstance(prompt, str):
+        parts = [prompt]
+    elif isinstance(prompt, (list, tuple)):
+        parts = []
+        for message in prompt:
+            if isinstance(message, str):
+                role, content = "", message
+            elif isinstance(message, dict):
+                role, content = message.get("role", ""), message.get("content", "")
+            elif isinstance(message, (list, tuple)) and len(message) == 2:
+                role, content = message
+            else:
+                role, content = getattr(message, "type", type(message).__name__), getattr(message, "content", message)
+            parts.append(f"{role}: {content}" if role else str(content))
+    else:
+        parts = [str(prompt)]
+    return "\n".join(" ".join(str(part).split()) for part in parts)
+
+
+def model_id(llm: Any) -> str:
+    """Name of the model behind a chat model object, for cache keys"""
+    for attr in ("model_name", "model", "model_id"):
+        value = getattr(llm, attr, None)
+        if isinstance(value, str) and value:
+            return value
+    return type(llm).__name__
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class _SemanticIndex:
+    """Unit vectors of cached prompts for one (namespace, model, params) scope, oldest first"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.keys: List[str] = []
+        self.expires: List[float] = []
+        self.vectors: List[np.ndarray] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def add(self, key: str, vector: np.ndarray, expires_at: float):
+        if key in self.keys:
+            return
+        self.keys.append(key)
+        self.expires.append(expires_at)
+        self.vectors.append(vector)
+        if len(self.keys) > self.max_entries:
+            del self.keys[0], self.expires[0], self.vectors[0]
+        self._matrix = None
+
+    def remove(self, key: str):
+        if key in self.keys:
+            i = self.keys.index(key)
+            del self.keys[i], self.expires[i], self.vectors[i]
+            self._matrix = None
+
+    def best(self, vector: np.ndarray, now: float) -> Tuple[Optional[str], float]:
+        if not self.keys:
+            return None, 0.0
+        if self._matrix is None:
+            self._matrix = np.vstack(self.vectors)
+        similarity = self._matrix @ vector
+        similarity[np.asarray(self.expires) <= now] = -1.0
+        i = int(np.argmax(similarity))
+        return self.keys[i], float(similarity[i])
+
+
+class LLMResponseCache:
+    """Two-level (memory, SQLite) LLM response cache with an optional semantic tier"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 1024,
+        max_l2_entries: int = 50000,
+        embed: Optional[Callable[[str], np.ndarray]] = None,
+        semantic_threshold: float = 0.95,
+        max_semantic_entries: int = 5000,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file for the L2 tier, or None for memory only
+            ttl_seconds: Default entry lifetime
+            max_entries: L1 size bound
+            max_l2_entries: L2 size bound
+            embed: Optional text -> vector function enabling the semantic tier
+            semantic_threshold: Minimum cosine similarity for a semantic hit
+            max_semantic_entries: Prompt vectors kept per scope for semantic lookups
+            enabled: When False, get_or_compute always calls through
+            clock: Wall clock (L2 expiry times are absolute, so they survive restarts)
+        """
+        self.path = path
+        self.ttl = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.max_l2_entries = max_l2_entries
+        self.embed = embed
+        self.semantic_threshold = semantic_threshold
+        self.max_semantic_entries = max_semantic_entries
+        self.enabled = enabled
+        self.clock = clock
+
+        # key -> (expires_at, value)
+        self._l1: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._semantic: Dict[str, _SemanticIndex] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache") if path else None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._l2_ready = False
+        self._writes = 0
+        self._stats = {
+            "hits_l1": 0,
+            "hits_l2": 0,
+            "hits_semantic": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "stores": 0,
+            "not_cacheable": 0,
+            "evictions": 0,
+            "errors": 0
+        }
+
+    # --- keys ---
+
+    @staticmethod
+    def key(namespace: str, model: str, prompt: Any, params: Optional[Dict[str, Any]] = None) -> str:
+        return _digest(namespace, model, normalize_prompt(prompt), params or {})
+
+    @staticmethod
+    def _scope(namespace: str, model: str, params: Optional[Dict[str, Any]]) -> str:
+        return _digest(namespace, model, params or {})
+
+    # --- public API ---
+
+    async def get_or_compute(
+        self,
+        model: str,
+        prompt: Any,
+        compute: Callable[[], Awaitable[Any]],
+        params: Optional[Dict[str, Any]] = None,
+        namespace: str = "default",
+        cacheable: Optional[Callable[[Any], bool]] = None,
+        ttl_seconds: Optional[float] = None
+    ) -> Any:
+        """
+        Return the cached answer for this prompt, or compute, cache and return it.
+
+        Concurrent calls with the same key share one compute(). Results for
+        which cacheable(result) is False (fallback answers, unparseable output)
+        are returned but not stored. Exceptions are not cached.
+        """
+        if not self.enabled:
+            return await compute()
+
+        normalized = normalize_prompt(prompt)
+        key = _digest(namespace, model, normalized, params or {})
+        while True:
+            value = await self._lookup(key)
+            if value is not _MISSING:
+                return value
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            self._count("coalesced")
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us: take over the call
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            scope = self._scope(namespace, model, params)
+            vector = None
+            if self.embed is not None:
+                vector = await self._embed(normalized)
+                if vector is not None:
+                    value = await self._semantic_lookup(scope, vector)
+                    if value is not _MISSING:
+                        future.set_result(value)
+                        return value
+
+            self._count("misses")
+            value = await compute()
+            if cacheable is None or cacheable(value):
+                await self._store(key, namespace, scope, model, normalized, value, vector, ttl_seconds or self.ttl)
+            else:
+                self._count("not_cacheable")
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved; waiters (if any) still receive it
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get(self, model: str, prompt: Any, params: Optional[Dict[str, Any]] = None, namespace: str = "default") -> Any:
+        """Exact-match lookup; None on a miss"""
+        value = await self._lookup(self.key(namespace, model, prompt, params))
+        return None if value is _MISSING else value
+
+    async def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._l1.clear()
+            self._semantic.clear()
+        if self._executor is not None:
+            await self._run(self._clear_sync)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            l1_size = len(self._l1)
+            semantic_size = sum(len(index.keys) for index in self._semantic.values())
+        hits = stats["hits_l1"] + stats["hits_l2"] + stats["hits_semantic"]
+        lookups = hits + stats["misses"]
+        return {
+            **stats,
+            "hits": hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "l1_size": l1_size,
+            "semantic_entries": semantic_size,
+            "l2_enabled": self._executor is not None,
+            "semantic_enabled": self.embed is not None
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.submit(self._close_sync).result()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    # --- tiers ---
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._stats[name] += n
+
+    async def _lookup(self, key: str, count: bool = True) -> Any:
+        now = self.clock()
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._l1.move_to_end(key)
+                    if count:
+                        self._stats["hits_l1"] += 1
+                    return entry[1]
+                del self._l1[key]
+
+        if self._executor is None:
+            return _MISSING
+        row = await self._run(self._get_sync, key, now)
+        if row is None:
+            return _MISSING
+        expires_at, value = row
+        self._put_l1(key, value, expires_at)
+        if count:
+            self._count("hits_l2")
+        return value
+
+    async def _semantic_lookup(self, scope: str, vector: np.ndarray) -> Any:
+        with self._lock:
+            index = self._semantic.get(scope)
+            if index is None:
+                return _MISSING
+            key, similarity = index.best(vector, self.clock())
+        if key is None or similarity < self.semantic_threshold:
+            return _MISSING
+        value = await self._lookup(key, count=False)
+        if value is _MISSING:
+            with self._lock:
+                index.remove(key)
+            return _MISSING
+        self._count("hits_semantic")
+        return value
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray(await asyncio.to_thread(self.embed, text), dtype=np.float32).ravel()
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"LLM cache embedding failed, skipping the semantic tier: {e}")
+            return None
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else None
+
+    def _put_l1(self, key: str, value: Any, expires_at: float):
+        with self._lock:
+            self._l1[key] = (expires_at, value)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.max_entries:
+                self._l1.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    async def _store(
+        self,
+        key: str,
+        namespace: str,
+        scope: str,
+        model: str,
+        prompt: str,
+        value: Any,
+        vector: Optional[np.ndarray],
+        ttl: float
+    ):
+        expires_at = self.clock() + ttl
+        self._put_l1(key, value, expires_at)
+        if vector is not None:
+            with self._lock:
+                index = self._semantic.get(scope)
+                if index is None:
+                    index = self._semantic[scope] = _SemanticIndex(self.max_semantic_entries)
+                index.add(key, vector, expires_at)
+        self._count("stores")
+
+        if self._executor is None:
+            return
+        try:
+            encoded = json.dumps(value)
+        except (TypeError, ValueError):
+            return  # Not JSON-serializable: memory only
+        embedding = vector.astype(np.float32).tobytes() if vector is not None else None
+        await self._run(self._put_sync, key, namespace, scope, model, prompt, encoded, embedding, expires_at)
+
+    # --- SQLite (dedicated thread) ---
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except sqlite3.Error as e:
+            self._count("errors")
+            logger.warning(f"LLM cache L2 error: {e}")
+            return None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=5.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        if not self._l2_ready:
+            self._l2_ready = True
+            self._load_semantic_sync()
+        return self._conn
+
+    def _load_semantic_sync(self):
+        """Rebuild the semantic tier from the newest L2 rows that carry embeddings"""
+        if self.embed is None:
+            return
+        rows = self._conn.execute(
+            "SELECT key, scope, embedding, expires_at FROM llm_cache "
+            "WHERE embedding IS NOT NULL AND expires_at > ? ORDER BY created_at DESC LIMIT ?",
+            (self.clock(), self.max_semantic_entries)
+        ).fetchall()
+        with self._lock:
+            for key, scope, blob, expires_at in reversed(rows):
+                index = self._semantic.get(scope)
+                if index is None:
+                    index = self._semantic[scope] = _SemanticIndex(self.max_semantic_entries)
+                index.add(key, np.frombuffer(blob, dtype=np.float32), expires_at)
+
+    def _get_sync(self, key: str, now: float) -> Optional[Tuple[float, Any]]:
+        row = self._connect().execute(
+            "SELECT expires_at, value FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[0] <= now:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _put_sync(self, key, namespace, scope, model, prompt, value, embedding, expires_at):
+        conn = self._connect()
+        now = self.clock()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache "
+            "(key, namespace, scope, model, prompt, value, embedding, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, namespace, scope, model, prompt, value, embedding, now, expires_at)
+        )
+        self._writes += 1
+        if self._writes % _PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_l2_entries,)
+            )
+        conn.commit()
+
+    def _clear_sync(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+
+    def _close_sync(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def _load_embedder(model_name: str) -> Optional[Callable[[str], np.ndarray]]:
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.warning("LLM_CACHE_SEMANTIC_MODEL is set but sentence-transformers is not installed; semantic tier disabled")
+        return None
+    model = SentenceTransformer(model_name)
+    return lambda text: model.encode(text, normalize_embeddings=True)
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """Process-wide LLM response cache, configured from settings"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from dryad.core.config import settings
+                semantic_model = getattr(settings, "LLM_CACHE_SEMANTIC_MODEL", None)
+                _cache = LLMResponseCache(
+                    path=getattr(settings, "LLM_CACHE_PATH", None),
+                    ttl_seconds=getattr(settings, "LLM_CACHE_TTL_SECONDS", 3600.0),
+                    max_entries=getattr(settings, "LLM_CACHE_MAX_ENTRIES", 1024),
+                    max_l2_entries=getattr(settings, "LLM_CACHE_MAX_L2_ENTRIES", 50000),
+                    embed=_load_embedder(semantic_model) if semantic_model else None,
+                    semantic_threshold=getattr(settings, "LLM_CACHE_SEMANTIC_THRESHOLD", 0.95),
+                    enabled=getattr(settings, "LLM_CACHE_ENABLED", False)
+                )
+    return _cache
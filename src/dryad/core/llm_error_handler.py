@@ -1,7 +1,611 @@
-def llm_error_handler(func):
-    """
-    Stub decorator for llm_error_handler.
-    """
-    async def wrapper(*args, **kwargs):
-        return await func(*args, **kwargs)
-    return wrapper
+"""
+LLM call guard: circuit breakers, retry budgets, adaptive concurrency and deadlines.
+
+Every guarded call goes through four checks:
+
+1. The provider's circuit breaker, shared with the routing telemetry in
+   dryad.core.provider_telemetry. While a provider is failing, calls fail
+   immediately instead of each waiting out the client timeout.
+2. An AIMD concurrency limit that bounds calls in flight per provider. It
+   grows by one per window of successful calls and halves on timeouts,
+   rate limits or latency spikes. Callers over the limit queue briefly and
+   are then turned away.
+3. A per-call timeout bounded by the request deadline. The deadline is set
+   once per incoming request (see llm_deadline) and shared by every LLM call
+   made while serving it.
+4. Retries with jittered backoff, paid for from a token-bucket retry budget.
+   Each first attempt adds a fraction of a token, so retries stay a bounded
+   share of traffic during an outage instead of multiplying it.
+
+Streams (stream()) take the same breaker, limit and deadline checks but
+are never retried, since chunks already delivered cannot be taken back.
+A stream that goes quiet between chunks for longer than the idle timeout
+fails like a call timeout.
+Their time to first token and tokens per second are tracked per provider.
+
+Outcomes and latencies feed the shared provider telemetry. Per-provider
+counters are available from get_metrics().
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, Optional
+
+from dryad.core.consult_scheduler import LatencyWindow
+from dryad.core.exceptions import ExternalServiceException
+from dryad.core.provider_telemetry import ProviderTelemetry, get_provider_telemetry
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Absolute time.monotonic() deadline for LLM work in the current request
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("llm_deadline", default=None)
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+_OVERLOAD_STATUS = {429, 503, 529}
+
+
+class LLMUnavailableError(ExternalServiceException):
+    """A guarded LLM call was refused or gave up (circuit open, over the concurrency limit, deadline)"""
+
+    def __init__(self, provider_id: str, reason: str, message: str):
+        super().__init__(service_name=provider_id, error_message=message, error_details=reason)
+        self.provider_id = provider_id
+        self.reason = reason
+
+
+class LLMDeadlineExceeded(LLMUnavailableError):
+    """The request deadline passed before the LLM call could finish"""
+
+    def __init__(self, provider_id: str, message: str = "Request deadline exceeded"):
+        super().__init__(provider_id, "deadline_exceeded", message)
+
+
+@contextmanager
+def llm_deadline(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """Bound every guarded LLM call inside the block by one deadline; nested deadlines only tighten"""
+    current = _deadline.get()
+    deadline = time.monotonic() + seconds if seconds is not None else None
+    if current is not None and (deadline is None or current < deadline):
+        deadline = current
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_deadline() -> Optional[float]:
+    """Seconds left before the current request's deadline, or None without one"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def classify_error(error: BaseException) -> str:
+    """timeout, overload (rate limited / overloaded), transient (worth a retry) or client (not worth one)"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return "timeout"
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        if status in _OVERLOAD_STATUS:
+            return "overload"
+        if status in _RETRYABLE_STATUS:
+            return "transient"
+        if 400 <= status < 500:
+            return "client"
+    name = type(error).__name__
+    if "RateLimit" in name or "Overloaded" in name:
+        return "overload"
+    if "Timeout" in name:
+        return "timeout"
+    if isinstance(error, (ValueError, TypeError, KeyError, NotImplementedError)) or name in (
+        "AuthenticationError", "PermissionDeniedError", "BadRequestError", "NotFoundError"
+    ):
+        return "client"
+    return "transient"
+
+
+class RetryBudget:
+    """Token bucket: each first attempt deposits `ratio` tokens, each retry costs one"""
+
+    def __init__(
+        self,
+        ratio: float = 0.1,
+        min_per_second: float = 1.0,
+        max_tokens: float = 10.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.clock = clock
+        self.tokens = max_tokens
+        self._refilled_at = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self._refilled_at) * self.min_per_second)
+        self._refilled_at = now
+
+    def deposit(self):
+        self._refill()
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        self._refill()
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class AdaptiveConcurrencyLimit:
+    """AIMD limit on calls in flight; waiters queue FIFO until a slot frees or they time out"""
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 128,
+        backoff: float = 0.5,
+        spike_factor: float = 2.5,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.spike_factor = spike_factor
+        self.clock = clock
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self._decreased_at = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self, timeout: Optional[float]) -> bool:
+        """Take a slot, waiting up to timeout seconds; False if none freed up in time"""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return True
+        if timeout is not None and timeout <= 0:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            return True
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            return False
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def _abandon(self, waiter: asyncio.Future):
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just as we gave up; pass it on
+            self.in_flight -= 1
+            self._wake()
+        else:
+            waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False):
+        """Free a slot; latency (seconds) of a completed call and overload signals adjust the limit"""
+        self.in_flight = max(0, self.in_flight - 1)
+        now = self.clock()
+        spike = latency is not None and self.baseline is not None and latency > self.baseline * self.spike_factor
+        if overloaded or spike:
+            # Decrease at most once per typical round trip so one burst is not punished repeatedly
+            if now - self._decreased_at > (self.baseline or 0.0):
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._decreased_at = now
+        elif latency is not None:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self.baseline = latency if self.baseline is None else self.baseline * 0.95 + latency * 0.05
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+
+class LLMCallGuard:
+    """Guards LLM calls per provider; see the module docstring"""
+
+    def __init__(
+        self,
+        telemetry: Optional[ProviderTelemetry] = None,
+        call_timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        config: Optional[Dict[str, Any]] = None
+    ):
+        self._telemetry = telemetry
+        self._config = config
+        self._call_timeout = call_timeout
+        self._max_retries = max_retries
+        self._limits: Dict[str, AdaptiveConcurrencyLimit] = {}
+        self._budgets: Dict[str, RetryBudget] = {}
+        self._metrics: Dict[str, Dict[str, int]] = {}
+        self._ttft = LatencyWindow(size=1000, min_samples=1)
+        self._token_rates = LatencyWindow(size=1000, min_samples=1)
+        self._lock = threading.Lock()
+
+    @property
+    def telemetry(self) -> ProviderTelemetry:
+        if self._telemetry is None:
+            self._telemetry = get_provider_telemetry()
+        return self._telemetry
+
+    def _setting(self, name: str, default: Any) -> Any:
+        if self._config is None:
+            from dryad.core.config import settings
+            self._config = {
+                key: value for key, value in settings.model_dump().items() if key.startswith("LLM_")
+            }
+        return self._config.get(name, default)
+
+    def _limit(self, provider_id: str) -> AdaptiveConcurrencyLimit:
+        limit = self._limits.get(provider_id)
+        if limit is None:
+            limit = self._limits[provider_id] = AdaptiveConcurrencyLimit(
+                initial=self._setting("LLM_CONCURRENCY_INITIAL", 8),
+                min_limit=self._setting("LLM_CONCURRENCY_MIN", 1),
+                max_limit=self._setting("LLM_CONCURRENCY_MAX", 128)
+            )
+        return limit
+
+    def _budget(self, provider_id: str) -> RetryBudget:
+        budget = self._budgets.get(provider_id)
+        if budget is None:
+            budget = self._budgets[provider_id] = RetryBudget(
+                ratio=self._setting("LLM_RETRY_BUDGET_RATIO", 0.1),
+                min_per_second=self._setting("LLM_RETRY_MIN_PER_SECOND", 1.0)
+            )
+        return budget
+
+    def _count(self, provider_id: str, outcome: str, n: int = 1):
+        with self._lock:
+            counters = self._metrics.setdefault(provider_id, {})
+            counters[outcome] = counters.get(outcome, 0) + n
+
+    def _log(self, provider_id: str, outcome: str, attempt: int, latency: Optional[float], error: Any = None):
+        logger.debug(
+            f"llm_call provider={provider_id} outcome={outcome} attempt={attempt}"
+            + (f" latency_ms={latency * 1000:.1f}" if latency is not None else "")
+            + (f" error={error!r}" if error is not None else ""),
+            extra={
+                "event": "llm_call",
+                "provider_id": provider_id,
+                "outcome": outcome,
+                "attempt": attempt,
+                "latency_ms": latency * 1000 if latency is not None else None
+            }
+        )
+
+    async def call(
+        self,
+        provider_id: str,
+        llm_func: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None
+    ) -> Any:
+        """
+        Run llm_func under the provider's breaker, concurrency limit, deadline and retry budget.
+
+        Raises the last provider error when retries are exhausted or not allowed,
+        LLMUnavailableError when the call is refused, and LLMDeadlineExceeded when
+        the request deadline runs out.
+        """
+        timeout = timeout or self._call_timeout or self._setting("LLM_CALL_TIMEOUT_SECONDS", 60.0)
+        if max_retries is None:
+            max_retries = self._max_retries if self._max_retries is not None else self._setting("LLM_MAX_RETRIES", 2)
+        base_backoff = self._setting("LLM_RETRY_BACKOFF_SECONDS", 0.2)
+        max_backoff = self._setting("LLM_RETRY_MAX_BACKOFF_SECONDS", 5.0)
+        queue_timeout = self._setting("LLM_QUEUE_TIMEOUT_SECONDS", 10.0)
+        limit = self._limit(provider_id)
+        budget = self._budget(provider_id)
+        telemetry = self.telemetry
+
+        self._count(provider_id, "calls")
+        budget.deposit()
+        attempt = 0
+        while True:
+            remaining = remaining_deadline()
+            if remaining is not None and remaining <= 0:
+                self._count(provider_id, "deadline_exceeded")
+                raise LLMDeadlineExceeded(provider_id)
+
+            await self._admit(provider_id, limit, queue_timeout, remaining, attempt)
+
+            remaining = remaining_deadline()
+            attempt_timeout = timeout if remaining is None else max(0.0, min(timeout, remaining))
+            started = time.monotonic()
+            try:
+                result = await asyncio.wait_for(llm_func(), attempt_timeout)
+            except asyncio.CancelledError:
+                limit.release()
+                telemetry.release(provider_id)
+                raise
+            except Exception as e:
+                latency = time.monotonic() - started
+                kind = classify_error(e)
+                limit.release(latency if kind != "client" else None, overloaded=kind in ("timeout", "overload"))
+                if kind == "client":
+                    # The request itself was bad; says nothing about provider health
+                    telemetry.release(provider_id)
+                    self._count(provider_id, "client_errors")
+                    self._log(provider_id, "client_error", attempt, latency, e)
+                    raise
+                telemetry.record(provider_id, False, latency * 1000)
+                self._count(provider_id, "timeouts" if kind == "timeout" else "failures")
+                self._log(provider_id, kind, attempt, latency, e)
+
+                remaining = remaining_deadline()
+                if kind == "timeout" and remaining is not None and remaining <= 0:
+                    self._count(provider_id, "deadline_exceeded")
+                    raise LLMDeadlineExceeded(provider_id) from e
+                if attempt >= max_retries:
+                    raise
+                if not budget.withdraw():
+                    self._count(provider_id, "retry_budget_exhausted")
+                    raise
+                backoff = random.uniform(0, min(max_backoff, base_backoff * 2 ** attempt))
+                if remaining is not None:
+                    if remaining - backoff <= 0:
+                        self._count(provider_id, "deadline_exceeded")
+                        raise
+                attempt += 1
+                self._count(provider_id, "retries")
+                await asyncio.sleep(backoff)
+                continue
+
+            latency = time.monotonic() - started
+            limit.release(latency)
+            telemetry.record(provider_id, True, latency * 1000)
+            self._count(provider_id, "successes")
+            self._log(provider_id, "success", attempt, latency)
+            return result
+
+    async def _admit(
+        self,
+        provider_id: str,
+        limit: "AdaptiveConcurrencyLimit",
+        queue_timeout: float,
+        remaining: Optional[float],
+        attempt: int
+    ):
+        """Take a breaker slot and a concurrency slot, or raise LLMUnavailableError"""
+        telemetry = self.telemetry
+        if not telemetry.acquire(provider_id):
+            self._count(provider_id, "circuit_rejected")
+            self._log(provider_id, "circuit_rejected", attempt, None)
+            raise LLMUnavailableError(
+                provider_id, "circuit_open", f"Provider {provider_id} circuit breaker is open"
+            )
+        wait = queue_timeout if remaining is None else min(queue_timeout, remaining)
+        try:
+            admitted = await limit.acquire(wait)
+        except asyncio.CancelledError:
+            telemetry.release(provider_id)
+            raise
+        if not admitted:
+            telemetry.release(provider_id)
+            self._count(provider_id, "limit_rejected")
+            self._log(provider_id, "limit_rejected", attempt, None)
+            raise LLMUnavailableError(
+                provider_id, "concurrency_limit",
+                f"Provider {provider_id} is at its concurrency limit ({int(limit.limit)} in flight)"
+            )
+
+    async def stream(
+        self,
+        provider_id: str,
+        stream_func: Callable[[], AsyncIterator[Any]],
+        timeout: Optional[float] = None,
+        count_tokens: Callable[[Any], int] = lambda chunk: 1,
+        idle_timeout: Optional[float] = None
+    ) -> AsyncIterator[Any]:
+        """
+        Iterate stream_func() under the provider's breaker, concurrency limit and deadline.
+
+        The first chunk must arrive within the call timeout, each later chunk
+        within the idle timeout of the one before, and every chunk before the
+        request deadline. Streams are not retried. When the
+        consumer stops early (client disconnect, cancellation) the upstream
+        stream is closed, which aborts the provider request, and the breaker
+        slot is released without recording an outcome.
+        """
+        timeout = timeout or self._call_timeout or self._setting("LLM_CALL_TIMEOUT_SECONDS", 60.0)
+        idle_timeout = idle_timeout or self._setting("LLM_STREAM_IDLE_TIMEOUT_SECONDS", 30.0)
+        limit = self._limit(provider_id)
+        telemetry = self.telemetry
+
+        self._count(provider_id, "streams")
+        remaining = remaining_deadline()
+        if remaining is not None and remaining <= 0:
+            self._count(provider_id, "deadline_exceeded")
+            raise LLMDeadlineExceeded(provider_id)
+        await self._admit(provider_id, limit, self._setting("LLM_QUEUE_TIMEOUT_SECONDS", 10.0), remaining, 0)
+
+        started = time.monotonic()
+        first_chunk_at: Optional[float] = None
+        tokens = 0
+        outcome: Optional[bool] = None
+        kind = None
+        upstream = stream_func()
+        chunks = upstream.__aiter__()
+        try:
+            while True:
+                wait = timeout if first_chunk_at is None else idle_timeout
+                remaining = remaining_deadline()
+                if remaining is not None:
+                    wait = remaining if wait is None else min(wait, remaining)
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), wait)
+                except StopAsyncIteration:
+                    break
+                if first_chunk_at is None:
+                    first_chunk_at = time.monotonic()
+                    self._ttft.record(provider_id, first_chunk_at - started)
+                tokens += count_tokens(chunk)
+                yield chunk
+            outcome = True
+        except asyncio.TimeoutError as e:
+            outcome, kind = False, "timeout"
+            self._count(provider_id, "timeouts")
+            remaining = remaining_deadline()
+            if remaining is not None and remaining <= 0:
+                self._count(provider_id, "deadline_exceeded")
+                raise LLMDeadlineExceeded(provider_id) from e
+            raise
+        except Exception as e:
+            kind = classify_error(e)
+            if kind != "client":
+                outcome = False
+                self._count(provider_id, "failures")
+            else:
+                self._count(provider_id, "client_errors")
+            self._log(provider_id, kind, 0, time.monotonic() - started, e)
+            raise
+        finally:
+            # Also reached on GeneratorExit and CancelledError: close the upstream request
+            close = getattr(upstream, "aclose", None)
+            if close is not None:
+                try:
+                    await close()
+                except Exception:
+                    pass
+            latency = time.monotonic() - started
+            limit.release(latency if outcome is not None else None, overloaded=kind in ("timeout", "overload"))
+            if outcome is None:
+                telemetry.release(provider_id)
+                if kind is None:
+                    self._count(provider_id, "streams_abandoned")
+            else:
+                telemetry.record(provider_id, outcome, latency * 1000)
+            if outcome:
+                self._count(provider_id, "successes")
+                generating = latency - ((first_chunk_at or started) - started)
+                if tokens and generating > 0:
+                    # Seconds per token, so the window's quantiles invert to tokens per second
+                    self._token_rates.record(provider_id, generating / tokens)
+                self._log(provider_id, "stream_complete", 0, latency)
+
+    async def safe_llm_call(
+        self,
+        provider_id: str,
+        llm_func: Callable[[], Awaitable[Any]],
+        fallback_response: Any = _MISSING,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None
+    ) -> Any:
+        """Guarded call that returns fallback_response instead of raising, when one is given"""
+        try:
+            return await self.call(provider_id, llm_func, timeout=timeout, max_retries=max_retries)
+        except Exception as e:
+            if fallback_response is _MISSING:
+                raise
+            self._count(provider_id, "fallbacks")
+            logger.warning(f"LLM call to {provider_id} failed, using fallback response: {e}")
+            return fallback_response
+
+    def guard_model(self, model: Any, provider_id: str) -> "GuardedChatModel":
+        """Wrap a chat model so ainvoke and astream go through the guard"""
+        return GuardedChatModel(model, provider_id, self)
+
+    def get_provider_health(self, provider_id: str) -> Dict[str, Any]:
+        """Circuit, concurrency and retry-budget state for a provider, without reserving anything"""
+        telemetry = self.telemetry
+        circuit_state = telemetry.circuit_state(provider_id)
+        limit = self._limits.get(provider_id)
+        budget = self._budgets.get(provider_id)
+        return {
+            "provider_id": provider_id,
+            "is_available": telemetry.is_available(provider_id),
+            "circuit_state": circuit_state,
+            "concurrency_limit": int(limit.limit) if limit else self._setting("LLM_CONCURRENCY_INITIAL", 8),
+            "in_flight": limit.in_flight if limit else 0,
+            "queued": limit.queued if limit else 0,
+            "retry_tokens": round(budget.tokens, 2) if budget else None
+        }
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider outcome counters, guard state, 1m latency percentiles and streaming rates"""
+        with self._lock:
+            counters = {provider_id: dict(values) for provider_id, values in self._metrics.items()}
+        metrics = {}
+        for provider_id, values in counters.items():
+            window = self.telemetry.window_summary(provider_id, "1m")
+            metrics[provider_id] = {
+                **values,
+                **self.get_provider_health(provider_id),
+                "p50_ms": window["p50_ms"],
+                "p95_ms": window["p95_ms"],
+                "p99_ms": window["p99_ms"]
+            }
+            if values.get("streams"):
+                ttft_p50 = self._ttft.quantile(provider_id, 0.5)
+                ttft_p95 = self._ttft.quantile(provider_id, 0.95)
+                seconds_per_token = self._token_rates.quantile(provider_id, 0.5)
+                metrics[provider_id].update({
+                    "ttft_p50_ms": ttft_p50 * 1000 if ttft_p50 is not None else None,
+                    "ttft_p95_ms": ttft_p95 * 1000 if ttft_p95 is not None else None,
+                    "tokens_per_second_p50": 1 / seconds_per_token if seconds_per_token else None
+                })
+        return metrics
+
+    def __call__(self, func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        """Decorator form: guard an async function as calls to the "default" provider"""
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await self.call("default", lambda: func(*args, **kwargs))
+        return wrapper
+
+
+class GuardedChatModel:
+    """Chat model proxy whose ainvoke and astream go through an LLMCallGuard; everything else is delegated"""
+
+    def __init__(self, model: Any, provider_id: str, guard: LLMCallGuard):
+        self.model = model
+        self.provider_id = provider_id
+        self.guard = guard
+
+    async def ainvoke(self, *args, **kwargs):
+        return await self.guard.call(self.provider_id, lambda: self.model.ainvoke(*args, **kwargs))
+
+    def astream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        return self.guard.stream(
+            self.provider_id,
+            lambda: self.model.astream(*args, **kwargs),
+            count_tokens=lambda chunk: 1 if getattr(chunk, "content", chunk) else 0
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+
+llm_error_handler = LLMCallGuard()
@@ -2,7 +2,7 @@
 import logging
 import asyncio
 import json
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, AsyncIterator, List, Optional, Union
 from dataclasses import dataclass
 from datetime import datetime
 import uuid
@@ -20,10 +20,19 @@ class Task:
         self.__dict__.update(kwargs)
 
 from dryad.core.llm_config import get_llm, get_llm_info, LLMProvider, get_specialized_llm
-from dryad.core.monitoring_integration import monitor_agent_workflow, monitoring_integration
+from dryad.core.monitoring_integration import monitoring_integration
+from dryad.core.workflow_engine import WorkflowEngine, WorkflowGraph, WorkflowStep
 
 logger = logging.getLogger(__name__)
 
+# Research angles of the built-in workflows. WORKFLOW_RESEARCH_FANOUT splits them over up
+# to this many concurrent researcher calls; each extra call is another full LLM request.
+RESEARCH_ANGLES = {
+    "background": ["Key facts and information", "Important context and background"],
+    "developments": ["Current developments and trends", "Open questions and recent changes"],
+    "perspectives": ["Multiple perspectives on the topic", "Reliable sources and evidence"]
+}
+
 @dataclass
 class AgentResult:
     """Result from an agent execution."""
@@ -56,6 +65,7 @@ class MultiAgentOrchestrator:
         self.agents = self._create_agents()
         self.task_history = []
         self.dryad_enabled = True  # Enable DRYAD integration by default
+        self.workflow_engine = WorkflowEngine(self.agents)
 
         logger.info("✅ MultiAgentOrchestrator initialized with built-in implementation (no external dependencies)")
         logger.info(f"LLM Provider: {self.llm_info['provider']}, Model: {self.llm_info['model_name']}")
@@ -219,57 +229,43 @@ class MultiAgentOrchestrator:
             expected_output="Well-structured, engaging content that meets the brief requirements"
         )
     
-    @monitor_agent_workflow(workflow_type="simple_query", agents=["researcher"])
-    def execute_simple_query(self, query: str, context: str = "") -> Dict[str, Any]:
-        """Execute a simple query using the research agent with genuine AI reasoning."""
-        try:
-            logger.info(f"🤖 Executing AI-powered simple query: {query}")
-
-            # Ensure we have functional agents
-            if not self.agents or 'researcher' not in self.agents:
-                raise RuntimeError("Research agent not available. Cannot execute query without functional AI agents.")
-
-            # Execute using built-in DRYAD agent system
-            logger.info("🧠 Using DRYAD built-in AI agent system...")
-            result = self._execute_builtin_simple_query(query, context)
-            result["execution_method"] = "dryad_builtin"
-
-            # Record task in history
-            self.task_history.append({
-                'task_id': str(uuid.uuid4()),
-                'type': 'simple_query',
-                'query': query,
-                'context': context,
-                'result': result,
-                'timestamp': datetime.now().isoformat(),
-                'agents_used': ['researcher']
-            })
-
-            return result
-
-        except Exception as e:
-            logger.error(f"❌ AI agent execution failed: {e}")
-            # No fallback - if AI agents fail, the system should fail explicitly
-            raise RuntimeError(f"Multi-agent system execution failed: {e}. This indicates a problem with the AI system that needs to be resolved.")
+    def build_workflow_graph(
+        self,
+        workflow_type: str,
+        query: str,
+        context: str = "",
+        research_fanout: Optional[int] = None
+    ) -> Optional[WorkflowGraph]:
+        """
+        Step graph for a built-in workflow type, or None if the type is unknown.
 
-    def _execute_builtin_simple_query(self, query: str, context: str = "") -> Dict[str, Any]:
-        """Execute simple query using DRYAD built-in implementation."""
-        try:
-            logger.info("🧠 DRYAD agent processing query with AI reasoning...")
+        Research runs as ``research_fanout`` concurrent researcher calls (default
+        WORKFLOW_RESEARCH_FANOUT, capped at one per angle in RESEARCH_ANGLES). One call
+        costs the same as the sequential workflow did; three cost three times as much
+        researcher time in exchange for a shorter critical path.
 
-            # Get the researcher agent
-            researcher = self.agents['researcher']
+        Raises:
+            RuntimeError: If the workflow needs an agent that is not configured
+        """
+        def persona(name: str) -> str:
+            agent = self.agents[name]
+            return f"""You are a {agent['role']}. {agent['backstory']}
 
-            # Extract agent configuration
-            role = researcher['role']
-            backstory = researcher['backstory']
-            goal = researcher['goal']
-            llm = researcher['llm']
+Your goal: {agent['goal']}"""
 
-            # Create comprehensive research prompt
-            research_prompt = f"""You are a {role}. {backstory}
+        def research_findings(values: Dict[str, Any]) -> str:
+            if len(research_steps) == 1:
+                return values.get(research_steps[0], "")
+            return "\n\n".join(
+                f"[{name[len('research_'):]}]\n{values[name]}" for name in research_steps if name in values
+            )
 
-Your goal: {goal}
+        if workflow_type == "simple_research":
+            self._require_agents(workflow_type, ["researcher"])
+            return WorkflowGraph(workflow_type, [WorkflowStep(
+                name="research",
+                role="researcher",
+                prompt=lambda values: f"""{persona('researcher')}
 
 Query: {query}
 Context: {context}
@@ -282,99 +278,54 @@ Please provide a comprehensive response that includes:
 5. Related concepts or areas of interest
 
 Structure your response clearly and provide valuable, accurate information."""
+            )])
 
-            # Execute using the LLM
-            response = llm.invoke(research_prompt)
-
-            # Extract response content
-            if hasattr(response, 'content'):
-                result_text = response.content
-            else:
-                result_text = str(response)
-
-            return {
-                "query": query,
-                "result": result_text,
-                "agents_used": ["researcher"],
-                "task_type": "simple_research",
-                "execution_method": "dryad_builtin"
-            }
-        except Exception as e:
-            logger.error(f"DRYAD agent execution failed: {e}")
-            raise
-    
-    @monitor_agent_workflow(workflow_type="complex_workflow", agents=["researcher", "analyst", "writer"])
-    def execute_complex_workflow(self, query: str, workflow_type: str = "research_analyze_write") -> Dict[str, Any]:
-        """Execute a complex multi-agent workflow with genuine AI orchestration."""
-        try:
-            logger.info(f"🤖 Executing AI-powered complex workflow: {workflow_type} for query: {query}")
-
-            # Ensure we have functional agents
-            if not self.agents:
-                raise RuntimeError("No functional agents available. Cannot execute complex workflow without AI agents.")
-
-            # Execute using built-in DRYAD implementation
-            result = self._execute_builtin_complex_workflow(query, workflow_type)
-
-            # Record task in history
-            self.task_history.append({
-                'task_id': str(uuid.uuid4()),
-                'type': 'complex_workflow',
-                'query': query,
-                'workflow_type': workflow_type,
-                'result': result,
-                'timestamp': datetime.now().isoformat(),
-                'agents_used': result.get('agents_used', [])
-            })
-
-            return result
-
-        except Exception as e:
-            logger.error(f"❌ Complex AI workflow execution failed: {e}")
-            # No fallback - if AI workflow fails, the system should fail explicitly
-            raise RuntimeError(f"Multi-agent workflow execution failed: {e}. This indicates a problem with the AI orchestration system that needs to be resolved.")
-
-    def _execute_builtin_complex_workflow(self, query: str, workflow_type: str) -> Dict[str, Any]:
-        """Execute complex workflow using DRYAD built-in implementation."""
-        try:
-            logger.info("🧠 DRYAD agents collaborating on complex workflow...")
-
-            results = []
-            agents_used = []
-
-            if workflow_type == "research_analyze_write":
-                # Step 1: Research
-                if 'researcher' in self.agents:
-                    researcher = self.agents['researcher']
-                    research_prompt = f"""You are a {researcher['role']}. {researcher['backstory']}
+        if workflow_type not in ("research_analyze_write", "complex_analysis", "content_creation"):
+            return None
 
-Your goal: {researcher['goal']}
+        roles = ["researcher"]
+        if workflow_type in ("research_analyze_write", "complex_analysis"):
+            roles.append("analyst")
+        if workflow_type in ("research_analyze_write", "content_creation"):
+            roles.append("writer")
+        self._require_agents(workflow_type, roles)
+
+        if research_fanout is None:
+            from dryad.core.config import settings
+            research_fanout = getattr(settings, "WORKFLOW_RESEARCH_FANOUT", 1)
+        angles = list(RESEARCH_ANGLES)
+        group_size = -(-len(angles) // max(1, min(research_fanout, len(angles))))
+        groups = [angles[i:i + group_size] for i in range(0, len(angles), group_size)]
+
+        steps = []
+        for group in groups:
+            focus = "\n".join(
+                f"{number}. {item}"
+                for number, item in enumerate((item for angle in group for item in RESEARCH_ANGLES[angle]), 1)
+            )
+            steps.append(WorkflowStep(
+                name="research" if len(groups) == 1 else "research_" + "_".join(group),
+                role="researcher",
+                prompt=lambda values, focus=focus: f"""{persona('researcher')}
 
 Research Query: {query}
 
-Please provide comprehensive research on this topic including:
-1. Key facts and information
-2. Important context and background
-3. Current developments and trends
-4. Multiple perspectives on the topic
-5. Reliable sources and evidence
+Please provide {'comprehensive' if len(groups) == 1 else 'focused'} research on this topic covering:
+{focus}
 
 Structure your research findings clearly."""
+            ))
+        research_steps = [step.name for step in steps]
 
-                    research_result = researcher['llm'].invoke(research_prompt)
-                    research_content = research_result.content if hasattr(research_result, 'content') else str(research_result)
-                    results.append(("research", research_content))
-                    agents_used.append("researcher")
-
-                # Step 2: Analysis
-                if 'analyst' in self.agents and results:
-                    analyst = self.agents['analyst']
-                    analysis_prompt = f"""You are a {analyst['role']}. {analyst['backstory']}
-
-Your goal: {analyst['goal']}
+        if workflow_type in ("research_analyze_write", "complex_analysis"):
+            steps.append(WorkflowStep(
+                name="analysis",
+                role="analyst",
+                depends_on=research_steps,
+                prompt=lambda values: f"""{persona('analyst')}
 
 Research Findings to Analyze:
-{results[-1][1]}
+{research_findings(values)}
 
 Query: {query}
 
@@ -386,24 +337,21 @@ Please analyze the research findings and provide:
 5. Recommendations based on the analysis
 
 Structure your analysis clearly with supporting evidence."""
+            ))
 
-                    analysis_result = analyst['llm'].invoke(analysis_prompt)
-                    analysis_content = analysis_result.content if hasattr(analysis_result, 'content') else str(analysis_result)
-                    results.append(("analysis", analysis_content))
-                    agents_used.append("analyst")
-
-                # Step 3: Writing
-                if 'writer' in self.agents and len(results) >= 2:
-                    writer = self.agents['writer']
-                    writing_prompt = f"""You are a {writer['role']}. {writer['backstory']}
-
-Your goal: {writer['goal']}
+        if workflow_type in ("research_analyze_write", "content_creation"):
+            analysis_steps = ["analysis"] if workflow_type == "research_analyze_write" else []
+            steps.append(WorkflowStep(
+                name="writing",
+                role="writer",
+                depends_on=research_steps + analysis_steps,
+                prompt=lambda values: f"""{persona('writer')}
 
 Research Findings:
-{results[0][1]}
+{research_findings(values)}
 
 Analysis Results:
-{results[1][1]}
+{values.get('analysis', 'Not performed')}
 
 Query: {query}
 
@@ -415,27 +363,96 @@ Please create a comprehensive, well-structured response that:
 5. Is accessible to a general audience
 
 Structure your response with clear sections and compelling content."""
+            ))
 
-                    writing_result = writer['llm'].invoke(writing_prompt)
-                    writing_content = writing_result.content if hasattr(writing_result, 'content') else str(writing_result)
-                    results.append(("writing", writing_content))
-                    agents_used.append("writer")
-
-            # Return the final result (writing if available, otherwise the last result)
-            final_result = results[-1][1] if results else "No results generated"
-
-            return {
-                "query": query,
-                "result": final_result,
-                "agents_used": agents_used,
-                "task_type": workflow_type,
-                "workflow_steps": len(results),
-                "execution_method": "fallback",
-                "intermediate_results": [{"step": step, "content": content[:200] + "..."} for step, content in results[:-1]]
-            }
-        except Exception as e:
-            logger.error(f"Fallback complex workflow failed: {e}")
-            raise
+        return WorkflowGraph(workflow_type, steps)
+
+    def _require_agents(self, workflow_type: str, roles: List[str]) -> None:
+        """Fail with a clear error when a workflow needs agents that are not configured."""
+        missing = [role for role in roles if role not in self.agents]
+        if missing:
+            raise RuntimeError(
+                f"Workflow {workflow_type} needs agents that are not configured: {', '.join(missing)}"
+            )
+
+    @staticmethod
+    def _graph_roles(graph: WorkflowGraph) -> List[str]:
+        return list(dict.fromkeys(step.role for step in graph.steps.values()))
+
+    async def aexecute_workflow_graph(self, query: str, workflow_type: str, context: str = "") -> Dict[str, Any]:
+        """Run a built-in workflow on the async engine without blocking the event loop."""
+        graph = self.build_workflow_graph(workflow_type, query, context)
+        if graph is None:
+            return self._workflow_result(query, workflow_type, None, {})
+
+        with monitoring_integration.monitor_agent_workflow(workflow_type, self._graph_roles(graph)):
+            completed = await self.workflow_engine.run(graph, {"query": query, "context": context})
+            if not completed.get("success"):
+                raise RuntimeError(f"Workflow {workflow_type} failed: {completed.get('errors')}")
+
+        result = self._workflow_result(query, workflow_type, graph, completed)
+        self.task_history.append({
+            'task_id': str(uuid.uuid4()),
+            'type': 'simple_query' if workflow_type == "simple_research" else 'complex_workflow',
+            'query': query,
+            'workflow_type': workflow_type,
+            'result': result,
+            'timestamp': datetime.now().isoformat(),
+            'agents_used': result['agents_used']
+        })
+        return result
+
+    async def stream_workflow(
+        self,
+        workflow_type: str,
+        input_data: str,
+        context: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute a built-in workflow, yielding step and token events as they happen.
+
+        The final event is ``workflow_completed`` with the same payload
+        ``aexecute_workflow_graph`` returns under ``result``.
+        """
+        context_text = context[0] if context else ""
+        graph = self.build_workflow_graph(workflow_type, input_data, context_text)
+        if graph is None:
+            yield {"event": "workflow_completed", "result": self._workflow_result(input_data, workflow_type, None, {})}
+            return
+
+        with monitoring_integration.monitor_agent_workflow(workflow_type, self._graph_roles(graph)):
+            async for event in self.workflow_engine.stream(graph, {"query": input_data, "context": context_text}):
+                if event["event"] == "workflow_completed":
+                    event = {**event, "result": self._workflow_result(input_data, workflow_type, graph, event)}
+                yield event
+
+    def _workflow_result(
+        self,
+        query: str,
+        workflow_type: str,
+        graph: Optional[WorkflowGraph],
+        completed: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Shape engine output like the synchronous workflow results."""
+        outputs = completed.get("outputs", {})
+        steps = completed.get("steps", [])
+        final_step = graph.output_step if graph else None
+        agents_used = list(dict.fromkeys(step["role"] for step in steps))
+
+        return {
+            "query": query,
+            "result": outputs.get(final_step, "No results generated") if final_step else "No results generated",
+            "agents_used": agents_used,
+            "task_type": "simple_research" if workflow_type == "simple_research" else workflow_type,
+            "workflow_steps": len(steps),
+            "execution_method": "dryad_builtin",
+            "execution_time": completed.get("execution_time", 0.0),
+            "step_metrics": steps,
+            "intermediate_results": [
+                {"step": name, "content": content[:200] + "..."}
+                for name, content in outputs.items() if name != final_step
+            ]
+        }
 
     async def execute_workflow(
         self,
@@ -449,8 +466,9 @@ Structure your response with clear sections and compelling content."""
         """
         Execute a workflow with DRYAD integration.
 
-        This method wraps the existing execute_simple_query and execute_complex_workflow
-        methods and adds DRYAD integration for context tracking.
+        Runs the workflow as a step graph on the async workflow engine (independent
+        steps run concurrently and LLM calls never block the event loop) and adds
+        DRYAD integration for context tracking.
 
         Args:
             workflow_type: Type of workflow to execute
@@ -466,11 +484,10 @@ Structure your response with clear sections and compelling content."""
         try:
             logger.info(f"🎯 Executing workflow: {workflow_type} with DRYAD integration")
 
-            # Execute the appropriate workflow
-            if workflow_type == "simple_research":
-                result = self.execute_simple_query(input_data, context[0] if context else "")
-            else:
-                result = self.execute_complex_workflow(input_data, workflow_type)
+            # Execute the appropriate workflow on the async engine
+            result = await self.aexecute_workflow_graph(
+                input_data, workflow_type, context[0] if context else ""
+            )
 
             # Add DRYAD integration if database session is provided
             if db and self.dryad_enabled:
@@ -727,6 +744,10 @@ Structure your response with clear sections and compelling content."""
             ]
         }
 
+    def get_workflow_metrics(self) -> Dict[str, Any]:
+        """Step cache and per-role latency/token statistics from the workflow engine."""
+        return self.workflow_engine.get_stats()
+
 
 # Global instance for use across the application
 multi_agent_orchestrator = MultiAgentOrchestrator()
@@ -9,6 +9,7 @@ Enhanced with:
 - Delegation mechanism
 """
 
+import asyncio
 import logging
 import time
 import uuid
@@ -17,6 +18,11 @@ from enum import Enum
 from dataclasses import dataclass
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from dryad.core.config import settings
+from dryad.core.task_queue import (
+    TaskQueue, TaskWorkerPool, TaskNotSupportedError, PENDING, RUNNING, COMPLETED, FAILED, CANCELLED, TASK_STATUSES
+)
+
 # Optional import: multi-agent orchestrator (DRYAD built-in implementation)
 try:
     from dryad.core.multi_agent import multi_agent_orchestrator
@@ -39,6 +45,26 @@ class TaskType(Enum):
     DATA_CLEANUP = "data_cleanup"
     ORCHESTRATED_TASK = "orchestrated_task"  # New: Full orchestration with decomposition
 
+# Task types whose handlers only answer with a "requires asynchronous execution"
+# notice; there is no asynchronous implementation to queue them to
+QUEUE_UNSUPPORTED_TASKS = frozenset({
+    TaskType.DOCUMENT_PROCESSING,
+    TaskType.COMPREHENSIVE_WORKFLOW,
+    TaskType.DATA_CLEANUP,
+})
+
+# Celery task names dispatched by _dispatch_celery_task, for listing in-flight tasks
+CELERY_TASK_TYPES = {
+    "run_multi_agent_workflow_task": TaskType.MULTI_AGENT_WORKFLOW,
+    "run_enhanced_agent_chat_task": TaskType.AGENT_CHAT,
+    "run_complex_rag_query_task": TaskType.RAG_QUERY,
+    "process_document_batch_task": TaskType.DOCUMENT_PROCESSING,
+    "analyze_document_collection_task": TaskType.SYSTEM_ANALYSIS,
+    "run_comprehensive_workflow_task": TaskType.COMPREHENSIVE_WORKFLOW,
+    "system_health_check_task": TaskType.HEALTH_CHECK,
+    "cleanup_old_data_task": TaskType.DATA_CLEANUP,
+}
+
 class ExecutionMode(Enum):
     """Enumeration of execution modes."""
     SYNCHRONOUS = "sync"
@@ -90,6 +116,43 @@ class EnhancedOrchestrator:
             TaskType.DATA_CLEANUP: self._handle_data_cleanup,
             TaskType.ORCHESTRATED_TASK: self._handle_orchestrated_task,
         }
+        self._task_queue: Optional[TaskQueue] = None
+        self._worker_pool: Optional[TaskWorkerPool] = None
+
+    @property
+    def uses_local_queue(self) -> bool:
+        return settings.TASK_QUEUE_BACKEND == "local"
+
+    def get_task_queue(self) -> TaskQueue:
+        """Local task queue, opened on first use."""
+        if self._task_queue is None:
+            self._task_queue = TaskQueue(
+                path=settings.TASK_QUEUE_PATH,
+                visibility_timeout=settings.TASK_QUEUE_VISIBILITY_TIMEOUT,
+                max_attempts=settings.TASK_QUEUE_MAX_ATTEMPTS
+            )
+        return self._task_queue
+
+    async def start_workers(self) -> None:
+        """Start the in-process worker pool that executes queued async tasks."""
+        if not self.uses_local_queue or self._worker_pool is not None:
+            return
+        self._worker_pool = TaskWorkerPool(
+            self.get_task_queue(),
+            handlers=self._queue_handlers(),
+            concurrency=settings.TASK_QUEUE_CONCURRENCY,
+            default_concurrency=settings.TASK_QUEUE_DEFAULT_CONCURRENCY
+        )
+        await self._worker_pool.start()
+
+    async def stop_workers(self) -> None:
+        """Stop the worker pool; unfinished tasks are retried after their lease expires."""
+        if self._worker_pool is not None:
+            await self._worker_pool.stop()
+            self._worker_pool = None
+        if self._task_queue is not None:
+            self._task_queue.close()
+            self._task_queue = None
     
     async def execute_task(self, task_request: TaskRequest) -> TaskResult:
         """
@@ -133,6 +196,72 @@ class EnhancedOrchestrator:
             )
     
     async def _execute_async_task(self, task_request: TaskRequest, start_time: float) -> TaskResult:
+        """Execute task asynchronously on the local task queue or Celery."""
+        if self.uses_local_queue:
+            unsupported = self._queue_unsupported_reason(task_request.task_type, task_request.payload)
+            if unsupported:
+                return TaskResult(
+                    task_id=None,
+                    status="error",
+                    result=None,
+                    execution_time=time.time() - start_time,
+                    error=unsupported
+                )
+            return await self._enqueue_local_task(task_request, start_time)
+        return await self._dispatch_celery_task(task_request, start_time)
+
+    def _queue_handlers(self) -> Dict[str, Any]:
+        """Worker pool handlers; task types without a real implementation fail instead of completing."""
+        handlers = {task_type.value: handler for task_type, handler in self.supported_tasks.items()}
+        for task_type in QUEUE_UNSUPPORTED_TASKS | {TaskType.SYSTEM_ANALYSIS}:
+            handlers[task_type.value] = self._queued_handler(task_type)
+        return handlers
+
+    def _queued_handler(self, task_type: TaskType):
+        handler = self.supported_tasks[task_type]
+
+        async def run(payload: Dict[str, Any]) -> Dict[str, Any]:
+            unsupported = self._queue_unsupported_reason(task_type, payload)
+            if unsupported:
+                raise TaskNotSupportedError(unsupported)
+            return await handler(payload)
+        return run
+
+    @staticmethod
+    def _queue_unsupported_reason(task_type: TaskType, payload: Dict[str, Any]) -> Optional[str]:
+        """Why a task cannot run on the local queue, or None if it can."""
+        if task_type in QUEUE_UNSUPPORTED_TASKS or (
+            task_type == TaskType.SYSTEM_ANALYSIS and payload.get("analysis_type", "basic") != "basic"
+        ):
+            return f"Task type {task_type.value} is not supported in asynchronous mode"
+        return None
+
+    async def _enqueue_local_task(self, task_request: TaskRequest, start_time: float) -> TaskResult:
+        """Persist the task to the local queue for the worker pool."""
+        try:
+            task_id = await self.get_task_queue().enqueue(
+                task_type=task_request.task_type.value,
+                payload=task_request.payload,
+                priority=task_request.priority,
+                timeout=task_request.timeout
+            )
+            return TaskResult(
+                task_id=task_id,
+                status="dispatched",
+                result={"message": "Task queued for asynchronous execution"},
+                execution_time=time.time() - start_time
+            )
+        except Exception as e:
+            logger.error(f"Async task enqueue failed: {str(e)}")
+            return TaskResult(
+                task_id=None,
+                status="error",
+                result=None,
+                execution_time=time.time() - start_time,
+                error=f"Async execution failed: {str(e)}"
+            )
+
+    async def _dispatch_celery_task(self, task_request: TaskRequest, start_time: float) -> TaskResult:
         """Execute task asynchronously using Celery."""
         try:
             # Import Celery tasks
@@ -269,11 +398,14 @@ class EnhancedOrchestrator:
         Get the status of an asynchronous task.
         
         Args:
-            task_id: The Celery task ID
+            task_id: The task ID returned when the task was dispatched
         
         Returns:
             Dict containing task status information
         """
+        if self.uses_local_queue:
+            return await self._get_local_task_status(task_id)
+
         try:
             from dryad.core.celery_app import celery_app
             
@@ -297,6 +429,117 @@ class EnhancedOrchestrator:
                 "error": str(e)
             }
     
+    async def _get_local_task_status(self, task_id: str) -> Dict[str, Any]:
+        """Status of a task in the local queue, shaped like the Celery status."""
+        try:
+            task = await self.get_task_queue().get(task_id)
+            if task is None:
+                return {"task_id": task_id, "status": "unknown", "error": "Task not found"}
+
+            ready = task.status in (COMPLETED, FAILED, CANCELLED)
+            info = task.to_dict()
+            return {
+                "task_id": task_id,
+                "status": info["status"],
+                "result": task.result if ready else None,
+                "info": info,
+                "ready": ready,
+                "successful": task.status == COMPLETED if ready else None,
+                "failed": task.status == FAILED if ready else None,
+                "error": task.error
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to get task status: {str(e)}")
+            return {
+                "task_id": task_id,
+                "status": "unknown",
+                "error": str(e)
+            }
+
+    async def list_tasks(
+        self,
+        status: Optional[str] = None,
+        task_type: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        List queued and finished async tasks, newest first.
+
+        Args:
+            status: Filter by status (PENDING, RUNNING, COMPLETED, FAILED, CANCELLED)
+            task_type: Filter by task type
+            limit: Page size
+            cursor: Keyset cursor from the previous page
+
+        Returns:
+            Dict with tasks, next_cursor and per-status backlog counts
+        """
+        if not self.uses_local_queue:
+            return await self._list_celery_tasks(status, task_type, limit, cursor)
+
+        queue = self.get_task_queue()
+        page = await queue.list_tasks(status=status, task_type=task_type, limit=limit, cursor=cursor)
+        return {
+            "tasks": [task.to_dict() for task in page["tasks"]],
+            "next_cursor": page["next_cursor"],
+            "counts": await queue.counts(task_type),
+            "workers": self._worker_pool.get_stats() if self._worker_pool else None
+        }
+
+    async def _list_celery_tasks(
+        self,
+        status: Optional[str],
+        task_type: Optional[str],
+        limit: int,
+        cursor: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        In-flight Celery tasks from the workers, ordered by task_id.
+
+        Workers only report tasks they have reserved, scheduled or started;
+        finished tasks live in the result backend, which cannot be enumerated,
+        so they are looked up one at a time through get_task_status.
+        """
+        from dryad.core.celery_app import celery_app
+
+        inspect = celery_app.control.inspect(timeout=1.0)
+        active, reserved, scheduled = await asyncio.gather(
+            asyncio.to_thread(inspect.active),
+            asyncio.to_thread(inspect.reserved),
+            asyncio.to_thread(inspect.scheduled)
+        )
+
+        tasks = []
+        for requests, task_status in ((active, RUNNING), (reserved, PENDING)):
+            for worker, worker_requests in (requests or {}).items():
+                tasks.extend(_celery_task_summary(request, task_status, worker) for request in worker_requests)
+        for worker, entries in (scheduled or {}).items():
+            tasks.extend(_celery_task_summary(entry["request"], PENDING, worker) for entry in entries)
+
+        counts = {task_status: 0 for task_status in TASK_STATUSES}
+        for task in tasks:
+            if not task_type or task["task_type"] == task_type:
+                counts[task["status"].lower()] += 1
+
+        matching = sorted(
+            (
+                task for task in tasks
+                if (not status or task["status"] == status.upper())
+                and (not task_type or task["task_type"] == task_type)
+                and (not cursor or task["task_id"] > cursor)
+            ),
+            key=lambda task: task["task_id"]
+        )
+        page = matching[:limit]
+        return {
+            "tasks": page,
+            "next_cursor": page[-1]["task_id"] if len(matching) > limit else None,
+            "counts": counts,
+            "workers": {"nodes": sorted({*(active or {}), *(reserved or {}), *(scheduled or {})})}
+        }
+
     def get_capabilities(self) -> Dict[str, Any]:
         """
         Get orchestrator capabilities and supported task types.
@@ -663,5 +906,18 @@ class EnhancedOrchestrator:
         branch = await branch_service.create_branch(branch_data)
         return branch.id
 
+def _celery_task_summary(request: Dict[str, Any], status: str, worker: str) -> Dict[str, Any]:
+    """A Celery worker's task request in the shape of QueuedTask.to_dict()"""
+    name = request.get("name") or ""
+    task_type = CELERY_TASK_TYPES.get(name.rsplit(".", 1)[-1])
+    return {
+        "task_id": request.get("id"),
+        "task_type": task_type.value if task_type else name,
+        "status": status.upper(),
+        "worker": worker,
+        "result": None,
+        "error": None
+    }
+
 # Global orchestrator instance
 enhanced_orchestrator = EnhancedOrchestrator()
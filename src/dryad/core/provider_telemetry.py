@@ -0,0 +1,627 @@
+"""
+Sliding-window telemetry, circuit breaking and latency-aware routing for LLM providers.
+
+Each provider keeps a ring of time buckets (10 seconds each, one hour in
+total). Every bucket counts successes and failures and holds a log-spaced
+latency histogram. That is enough to report error rates and p50/p95/p99 over
+the last minute, five minutes or hour, so a provider that failed this morning
+and has since recovered looks healthy again.
+
+On top of the buckets sit two pieces:
+
+- A circuit breaker. It opens after a burst of failures, lets a single probe
+  through once its cooldown expires, and closes again when probes succeed.
+- A router. It uses power-of-two-choices over a time-decayed peak EWMA of
+  latency, scaled by in-flight calls, the recent error rate and the
+  per-request cost.
+
+The process-wide registry writes its state to a JSON file every so often and
+reloads it at startup, so routing decisions survive a restart. Writes due
+while an event loop is running go to a worker thread, so recording an
+outcome never waits on the disk.
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+WINDOWS = {"1m": 60, "5m": 300, "1h": 3600}
+
+_BUCKET_SECONDS = 10
+_BUCKETS = 360
+_HISTOGRAM_BASE = 1.2
+_HISTOGRAM_BINS = 64  # 1 ms to roughly 100 s at 20% resolution
+
+
+def _latency_bin(latency_ms: float) -> int:
+    if latency_ms <= 1.0:
+        return 0
+    return min(_HISTOGRAM_BINS - 1, int(math.log(latency_ms, _HISTOGRAM_BASE)) + 1)
+
+
+def _bin_midpoint(index: int) -> float:
+    if index == 0:
+        return 1.0
+    return _HISTOGRAM_BASE ** (index - 0.5)
+
+
+class SlidingWindowStats:
+    """Time-bucketed ring buffer of outcomes and latency histograms for one provider"""
+
+    def __init__(self, bucket_seconds: int = _BUCKET_SECONDS, buckets: int = _BUCKETS):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = buckets
+        self.epochs = np.full(buckets, -1, dtype=np.int64)
+        self.successes = np.zeros(buckets, dtype=np.int64)
+        self.failures = np.zeros(buckets, dtype=np.int64)
+        self.histogram = np.zeros((buckets, _HISTOGRAM_BINS), dtype=np.int64)
+
+    def _slot(self, now: float) -> int:
+        epoch = int(now // self.bucket_seconds)
+        slot = epoch % self.buckets
+        if self.epochs[slot] != epoch:
+            self.epochs[slot] = epoch
+            self.successes[slot] = 0
+            self.failures[slot] = 0
+            self.histogram[slot] = 0
+        return slot
+
+    def record(self, now: float, success: bool, latency_ms: Optional[float] = None):
+        slot = self._slot(now)
+        if success:
+            self.successes[slot] += 1
+        else:
+            self.failures[slot] += 1
+        if latency_ms is not None:
+            self.histogram[slot, _latency_bin(latency_ms)] += 1
+
+    def _mask(self, now: float, seconds: int) -> np.ndarray:
+        epoch = int(now // self.bucket_seconds)
+        span = max(1, min(self.buckets, math.ceil(seconds / self.bucket_seconds)))
+        return (self.epochs > epoch - span) & (self.epochs <= epoch)
+
+    def summary(self, now: float, seconds: int) -> Dict[str, Any]:
+        """Counts, error rate and latency percentiles over the trailing window"""
+        mask = self._mask(now, seconds)
+        successes = int(self.successes[mask].sum())
+        failures = int(self.failures[mask].sum())
+        histogram = self.histogram[mask].sum(axis=0)
+        total = successes + failures
+        summary = {
+            "requests": total,
+            "successes": successes,
+            "failures": failures,
+            "error_rate": failures / total if total else 0.0,
+            "requests_per_minute": total * 60.0 / seconds
+        }
+        summary.update(self._percentiles(histogram))
+        return summary
+
+    @staticmethod
+    def _percentiles(histogram: np.ndarray) -> Dict[str, Optional[float]]:
+        count = int(histogram.sum())
+        if not count:
+            return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+        cumulative = np.cumsum(histogram)
+        return {
+            f"p{q}_ms": round(_bin_midpoint(int(np.searchsorted(cumulative, math.ceil(q / 100 * count)))), 1)
+            for q in (50, 95, 99)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        live = np.flatnonzero(self.epochs >= 0)
+        return {
+            "bucket_seconds": self.bucket_seconds,
+            "buckets": [
+                [
+                    int(self.epochs[slot]), int(self.successes[slot]), int(self.failures[slot]),
+                    {str(b): int(self.histogram[slot, b]) for b in np.flatnonzero(self.histogram[slot])}
+                ]
+                for slot in live
+            ]
+        }
+
+    def load_dict(self, data: Dict[str, Any]):
+        if data.get("bucket_seconds") != self.bucket_seconds:
+            return
+        for epoch, successes, failures, histogram in data.get("buckets", []):
+            slot = epoch % self.buckets
+            if epoch < self.epochs[slot]:
+                continue
+            self.epochs[slot] = epoch
+            self.successes[slot] = successes
+            self.failures[slot] = failures
+            self.histogram[slot] = 0
+            for b, count in histogram.items():
+                self.histogram[slot, int(b)] = count
+
+
+class CircuitBreaker:
+    """Closed -> open on a failure burst -> half-open probes after a cooldown -> closed"""
+
+    def __init__(
+        self,
+        name: str = "provider",
+        failure_rate_threshold: float = 0.5,
+        min_requests: int = 10,
+        consecutive_failures: int = 5,
+        outcome_window: int = 20,
+        cooldown_seconds: float = 30.0,
+        max_cooldown_seconds: float = 300.0,
+        half_open_probes: int = 1,
+        probe_successes: int = 2,
+        probe_timeout_seconds: float = 60.0
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_requests = min_requests
+        self.consecutive_failure_limit = consecutive_failures
+        self.base_cooldown = cooldown_seconds
+        self.max_cooldown = max_cooldown_seconds
+        self.half_open_probes = half_open_probes
+        self.probe_successes_needed = probe_successes
+        self.probe_timeout = probe_timeout_seconds
+
+        self.state = CLOSED
+        self.outcomes: Deque[bool] = deque(maxlen=outcome_window)
+        self.consecutive_failures = 0
+        self.cooldown = cooldown_seconds
+        self.opened_at = 0.0
+        self.trips = 0
+        self.probe_successes = 0
+        self.probes: Deque[float] = deque()
+
+    def allow(self, now: float) -> bool:
+        """Whether a call may go out now; in half-open state this reserves a probe slot"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if now - self.opened_at < self.cooldown:
+                return False
+            self.state = HALF_OPEN
+            self.probe_successes = 0
+            self.probes.clear()
+            logger.info(f"Circuit for {self.name} half-open, probing")
+        # Probes that never reported back stop holding their slot after probe_timeout
+        while self.probes and now - self.probes[0] > self.probe_timeout:
+            self.probes.popleft()
+        if len(self.probes) >= self.half_open_probes:
+            return False
+        self.probes.append(now)
+        return True
+
+    def release(self):
+        """A call admitted by allow() ended without an outcome (for example it was cancelled)"""
+        if self.state == HALF_OPEN and self.probes:
+            self.probes.popleft()
+
+    def record(self, now: float, success: bool):
+        if self.state == HALF_OPEN:
+            if self.probes:
+                self.probes.popleft()
+            if not success:
+                self._open(now, backoff=True)
+                return
+            self.probe_successes += 1
+            if self.probe_successes >= self.probe_successes_needed:
+                self._close()
+            return
+        if self.state == OPEN:
+            # A call admitted before the circuit opened finished late
+            return
+
+        self.outcomes.append(success)
+        self.consecutive_failures = 0 if success else self.consecutive_failures + 1
+        if success:
+            return
+        failures = self.outcomes.count(False)
+        if (
+            self.consecutive_failures >= self.consecutive_failure_limit
+            or (len(self.outcomes) >= self.min_requests
+                and failures / len(self.outcomes) >= self.failure_rate_threshold)
+        ):
+            self._open(now, backoff=False)
+
+    def _open(self, now: float, backoff: bool):
+        self.cooldown = min(self.max_cooldown, self.cooldown * 2) if backoff else self.base_cooldown
+        self.state = OPEN
+        self.opened_at = now
+        self.trips += 1
+        self.probes.clear()
+        logger.warning(f"Circuit for {self.name} opened for {self.cooldown:.0f}s")
+
+    def _close(self):
+        self.state = CLOSED
+        self.cooldown = self.base_cooldown
+        self.outcomes.clear()
+        self.consecutive_failures = 0
+        self.probes.clear()
+        logger.info(f"Circuit for {self.name} closed after successful probes")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "outcomes": list(self.outcomes),
+            "consecutive_failures": self.consecutive_failures,
+            "cooldown": self.cooldown,
+            "opened_at": self.opened_at,
+            "trips": self.trips,
+            "probe_successes": self.probe_successes
+        }
+
+    def load_dict(self, data: Dict[str, Any]):
+        self.state = data.get("state", CLOSED)
+        self.outcomes.extend(data.get("outcomes", []))
+        self.consecutive_failures = data.get("consecutive_failures", 0)
+        self.cooldown = data.get("cooldown", self.base_cooldown)
+        self.opened_at = data.get("opened_at", 0.0)
+        self.trips = data.get("trips", 0)
+        self.probe_successes = data.get("probe_successes", 0)
+
+
+class ProviderStats:
+    """Everything the telemetry core knows about one provider"""
+
+    def __init__(self, provider_id: str, breaker: CircuitBreaker):
+        self.provider_id = provider_id
+        self.window = SlidingWindowStats()
+        self.breaker = breaker
+        self.in_flight = 0
+        # Time-decayed EWMAs; updated_at 0 means no samples yet
+        self.latency_ewma = 0.0
+        self.error_ewma = 0.0
+        self.cost_ewma = 0.0
+        self.updated_at = 0.0
+        # Lifetime totals, for usage reporting
+        self.total_requests = 0
+        self.successful_requests = 0
+        self.failed_requests = 0
+        self.total_tokens = 0
+        self.total_cost_usd = 0.0
+        self.total_latency_ms = 0.0
+        self.last_used = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "window": self.window.to_dict(),
+            "breaker": self.breaker.to_dict(),
+            "latency_ewma": self.latency_ewma,
+            "error_ewma": self.error_ewma,
+            "cost_ewma": self.cost_ewma,
+            "updated_at": self.updated_at,
+            "totals": [
+                self.total_requests, self.successful_requests, self.failed_requests,
+                self.total_tokens, self.total_cost_usd, self.total_latency_ms, self.last_used
+            ]
+        }
+
+    def load_dict(self, data: Dict[str, Any]):
+        self.window.load_dict(data.get("window", {}))
+        self.breaker.load_dict(data.get("breaker", {}))
+        self.latency_ewma = data.get("latency_ewma", 0.0)
+        self.error_ewma = data.get("error_ewma", 0.0)
+        self.cost_ewma = data.get("cost_ewma", 0.0)
+        self.updated_at = data.get("updated_at", 0.0)
+        (
+            self.total_requests, self.successful_requests, self.failed_requests,
+            self.total_tokens, self.total_cost_usd, self.total_latency_ms, self.last_used
+        ) = data.get("totals", [0, 0, 0, 0, 0.0, 0.0, 0.0])
+
+
+class ProviderTelemetry:
+    """Process-wide provider telemetry, circuit breakers and router"""
+
+    def __init__(
+        self,
+        persist_path: Optional[str] = None,
+        persist_interval: float = 30.0,
+        ewma_decay_seconds: float = 10.0,
+        idle_reset_seconds: float = 120.0,
+        default_latency_ms: float = 1000.0,
+        cost_weight_ms_per_usd: float = 10000.0,
+        in_flight_penalty: float = 0.1,
+        breaker_factory: Optional[Callable[[str], CircuitBreaker]] = None,
+        clock: Callable[[], float] = time.time,
+        rng: Optional[random.Random] = None
+    ):
+        self.persist_path = persist_path
+        self.persist_interval = persist_interval
+        self.ewma_decay = ewma_decay_seconds
+        self.idle_reset = idle_reset_seconds
+        self.default_latency_ms = default_latency_ms
+        self.cost_weight = cost_weight_ms_per_usd
+        self.in_flight_penalty = in_flight_penalty
+        self.breaker_factory = breaker_factory or CircuitBreaker
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self._providers: Dict[str, ProviderStats] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._last_saved = clock()
+        if persist_path:
+            self.load()
+
+    def _stats(self, provider_id: str) -> ProviderStats:
+        stats = self._providers.get(provider_id)
+        if stats is None:
+            stats = self._providers[provider_id] = ProviderStats(provider_id, self.breaker_factory(provider_id))
+        return stats
+
+    # Call lifecycle
+
+    def acquire(self, provider_id: str) -> bool:
+        """Admit a call through the provider's circuit breaker and count it as in flight"""
+        with self._lock:
+            stats = self._stats(provider_id)
+            if not stats.breaker.allow(self.clock()):
+                return False
+            stats.in_flight += 1
+            return True
+
+    def release(self, provider_id: str):
+        """An admitted call ended without an outcome (cancelled); frees its slot"""
+        with self._lock:
+            stats = self._stats(provider_id)
+            stats.in_flight = max(0, stats.in_flight - 1)
+            stats.breaker.release()
+
+    def record(
+        self,
+        provider_id: str,
+        success: bool,
+        latency_ms: float,
+        tokens: int = 0,
+        cost_usd: float = 0.0,
+        admitted: bool = True
+    ):
+        """Record the outcome of a call (admitted=False for calls that bypassed acquire())"""
+        now = self.clock()
+        with self._lock:
+            stats = self._stats(provider_id)
+            if admitted:
+                stats.in_flight = max(0, stats.in_flight - 1)
+            stats.window.record(now, success, latency_ms if success else None)
+            stats.breaker.record(now, success)
+
+            if stats.updated_at:
+                keep = math.exp(-max(0.0, now - stats.updated_at) / self.ewma_decay)
+                stats.error_ewma = stats.error_ewma * keep + (0.0 if success else 1.0) * (1 - keep)
+                if success:
+                    # Peak EWMA: jump to slow samples immediately, decay back gradually
+                    if latency_ms > stats.latency_ewma:
+                        stats.latency_ewma = latency_ms
+                    else:
+                        stats.latency_ewma = stats.latency_ewma * keep + latency_ms * (1 - keep)
+                    stats.cost_ewma = stats.cost_ewma * keep + cost_usd * (1 - keep)
+            else:
+                stats.error_ewma = 0.0 if success else 1.0
+                stats.latency_ewma = latency_ms if success else self.default_latency_ms
+                stats.cost_ewma = cost_usd
+            stats.updated_at = now
+
+            stats.total_requests += 1
+            if success:
+                stats.successful_requests += 1
+            else:
+                stats.failed_requests += 1
+            stats.total_tokens += tokens
+            stats.total_cost_usd += cost_usd
+            stats.total_latency_ms += latency_ms
+            stats.last_used = now
+
+        self.maybe_persist(now)
+
+    # Routing
+
+    def _estimates(self, stats: ProviderStats, now: float):
+        """Current (latency ms, error rate, cost per request) estimates for a provider"""
+        if not stats.updated_at:
+            return self.default_latency_ms, 0.0, 0.0
+        # Estimates of providers that have not been used lately drift back to the prior
+        fresh = math.exp(-max(0.0, now - stats.updated_at) / self.idle_reset)
+        latency = self.default_latency_ms + (stats.latency_ewma - self.default_latency_ms) * fresh
+        return latency, stats.error_ewma * fresh, stats.cost_ewma
+
+    def _score(self, stats: ProviderStats, now: float) -> float:
+        """Expected milliseconds to a successful answer, plus cost, scaled by calls in flight"""
+        latency, error, cost = self._estimates(stats, now)
+        expected = (latency + cost * self.cost_weight) / max(0.05, 1.0 - error)
+        # The EWMA already reflects load; the in-flight term keeps bursts from herding
+        # onto one provider between completions
+        return expected * (1.0 + self.in_flight_penalty * stats.in_flight)
+
+    def scores(self, provider_ids: Iterable[str]) -> Dict[str, float]:
+        now = self.clock()
+        with self._lock:
+            return {provider_id: self._score(self._stats(provider_id), now) for provider_id in provider_ids}
+
+    def choose(self, provider_ids: Sequence[str], best_of_all: bool = False) -> Optional[str]:
+        """
+        Power-of-two-choices: sample two available providers and keep the one
+        with the lower score (or compare every provider with best_of_all).
+        Providers whose circuit is open are skipped unless they are due for a
+        probe; ties keep the order of provider_ids.
+        """
+        now = self.clock()
+        with self._lock:
+            available = [p for p in provider_ids if self._available(self._stats(p), now)]
+            if not available:
+                return None
+            if best_of_all or len(available) <= 2:
+                candidates = available
+            else:
+                first, second = sorted(self.rng.sample(range(len(available)), 2))
+                candidates = [available[first], available[second]]
+            return min(candidates, key=lambda p: self._score(self._providers[p], now))
+
+    def is_available(self, provider_id: str) -> bool:
+        """Whether acquire() would currently admit a call (without reserving a probe slot)"""
+        now = self.clock()
+        with self._lock:
+            return self._available(self._stats(provider_id), now)
+
+    @staticmethod
+    def _circuit_state(breaker: CircuitBreaker, now: float) -> str:
+        """Effective state: an open circuit whose cooldown has expired is half-open (due for a probe)"""
+        if breaker.state == OPEN and now - breaker.opened_at >= breaker.cooldown:
+            return HALF_OPEN
+        return breaker.state
+
+    @classmethod
+    def _available(cls, stats: ProviderStats, now: float) -> bool:
+        breaker = stats.breaker
+        state = cls._circuit_state(breaker, now)
+        if state == OPEN:
+            return False
+        if state == HALF_OPEN:
+            # Probes still held by a breaker that was half-open before; none once it re-enters
+            return breaker.state == OPEN or len(breaker.probes) < breaker.half_open_probes
+        return True
+
+    # Reporting
+
+    def circuit_state(self, provider_id: str) -> str:
+        now = self.clock()
+        with self._lock:
+            return self._circuit_state(self._stats(provider_id).breaker, now)
+
+    def window_summary(self, provider_id: str, window: str = "5m") -> Dict[str, Any]:
+        """Counts, error rate and p50/p95/p99 latency over a 1m, 5m or 1h window"""
+        seconds = WINDOWS[window]
+        now = self.clock()
+        with self._lock:
+            stats = self._stats(provider_id)
+            summary = stats.window.summary(now, seconds)
+            latency, error, cost = self._estimates(stats, now)
+            summary.update({
+                "provider_id": provider_id,
+                "window": window,
+                "circuit_state": self._circuit_state(stats.breaker, now),
+                "circuit_trips": stats.breaker.trips,
+                "in_flight": stats.in_flight,
+                "expected_latency_ms": round(latency, 1),
+                "expected_error_rate": round(error, 4),
+                "expected_cost_usd": cost
+            })
+            return summary
+
+    def totals(self, provider_id: str) -> Dict[str, Any]:
+        with self._lock:
+            stats = self._stats(provider_id)
+            return {
+                "total_requests": stats.total_requests,
+                "successful_requests": stats.successful_requests,
+                "failed_requests": stats.failed_requests,
+                "total_tokens": stats.total_tokens,
+                "cost_usd": stats.total_cost_usd,
+                "average_response_time_ms": (
+                    stats.total_latency_ms / stats.total_requests if stats.total_requests else 0.0
+                ),
+                "last_used": stats.last_used or None
+            }
+
+    def provider_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._providers)
+
+    # Persistence
+
+    def maybe_persist(self, now: Optional[float] = None):
+        """Persist if persist_interval has passed; in a worker thread when called on an event loop"""
+        if not self.persist_path:
+            return
+        now = self.clock() if now is None else now
+        with self._lock:
+            if now - self._last_saved < self.persist_interval:
+                return
+            # Claim this interval so calls before the write starts do not queue more writes
+            self._last_saved = now
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.persist()
+            return
+        loop.run_in_executor(None, self.persist)
+
+    def persist(self):
+        """Write every provider's state to persist_path (atomically, via a temp file)"""
+        if not self.persist_path or not self._save_lock.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                self._last_saved = self.clock()
+                state = {
+                    "saved_at": self._last_saved,
+                    "providers": {provider_id: stats.to_dict() for provider_id, stats in self._providers.items()}
+                }
+            directory = os.path.dirname(os.path.abspath(self.persist_path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.persist_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f, separators=(",", ":"))
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            logger.warning(f"Could not persist provider telemetry to {self.persist_path}: {e}")
+        finally:
+            self._save_lock.release()
+
+    def load(self):
+        try:
+            with open(self.persist_path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable provider telemetry at {self.persist_path}: {e}")
+            return
+        with self._lock:
+            for provider_id, data in state.get("providers", {}).items():
+                self._stats(provider_id).load_dict(data)
+        logger.info(f"Loaded telemetry for {len(state.get('providers', {}))} providers")
+
+
+_provider_telemetry: Optional[ProviderTelemetry] = None
+_provider_telemetry_lock = threading.Lock()
+
+
+def get_provider_telemetry() -> ProviderTelemetry:
+    """Process-wide telemetry, so per-request services share one view of each provider"""
+    global _provider_telemetry
+    if _provider_telemetry is None:
+        with _provider_telemetry_lock:
+            if _provider_telemetry is None:
+                from dryad.core.config import settings
+                _provider_telemetry = ProviderTelemetry(
+                    persist_path=getattr(settings, "PROVIDER_TELEMETRY_PATH", None),
+                    persist_interval=getattr(settings, "PROVIDER_TELEMETRY_PERSIST_SECONDS", 30.0),
+                    default_latency_ms=getattr(settings, "PROVIDER_ROUTER_DEFAULT_LATENCY_MS", 1000.0),
+                    cost_weight_ms_per_usd=getattr(settings, "PROVIDER_ROUTER_COST_WEIGHT_MS_PER_USD", 10000.0),
+                    in_flight_penalty=getattr(settings, "PROVIDER_ROUTER_IN_FLIGHT_PENALTY", 0.1),
+                    breaker_factory=lambda name: CircuitBreaker(
+                        name,
+                        failure_rate_threshold=getattr(settings, "PROVIDER_CIRCUIT_FAILURE_RATE", 0.5),
+                        min_requests=getattr(settings, "PROVIDER_CIRCUIT_MIN_REQUESTS", 10),
+                        consecutive_failures=getattr(settings, "PROVIDER_CIRCUIT_CONSECUTIVE_FAILURES", 5),
+                        cooldown_seconds=getattr(settings, "PROVIDER_CIRCUIT_COOLDOWN_SECONDS", 30.0),
+                        max_cooldown_seconds=getattr(settings, "PROVIDER_CIRCUIT_MAX_COOLDOWN_SECONDS", 300.0)
+                    )
+                )
+                # Keep the last few seconds of telemetry across a clean shutdown
+                atexit.register(_provider_telemetry.persist)
+    return _provider_telemetry
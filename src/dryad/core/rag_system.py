@@ -1,4 +1,5 @@
 # app/core/rag_system.py
+import asyncio
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,6 +12,10 @@ try:
 except Exception:
     multi_agent_orchestrator = None
 from dryad.core.llm_config import get_llm, get_llm_info
+from dryad.core.context_packing import ContextPacker, PackedContext
+from dryad.infrastructure.async_vector_store import VectorQuery, get_async_vector_store
+from dryad.infrastructure.ingestion import get_ingestion_pipeline
+from dryad.infrastructure.vector_store import COLLECTION_NAME
 
 logger = logging.getLogger(__name__)
 
@@ -24,12 +29,19 @@ class RAGSystem:
         self,
         default_search_limit: int = 5,
         default_score_threshold: float = 0.7,
-        max_context_length: int = 4000
+        max_context_length: int = 4000,
+        max_context_tokens: Optional[int] = None
     ):
         """Initialize the RAG system."""
+        from dryad.core.config import settings
         self.default_search_limit = default_search_limit
         self.default_score_threshold = default_score_threshold
         self.max_context_length = max_context_length
+        self.context_packer = ContextPacker(
+            max_tokens=max_context_tokens or getattr(settings, "RAG_CONTEXT_MAX_TOKENS", 1000),
+            mmr_lambda=getattr(settings, "RAG_CONTEXT_MMR_LAMBDA", 0.7),
+            duplicate_threshold=getattr(settings, "RAG_CONTEXT_DUPLICATE_THRESHOLD", 0.9)
+        )
     
     async def retrieve_and_generate(
         self,
@@ -63,39 +75,37 @@ class RAGSystem:
             search_limit = search_limit or self.default_search_limit
             score_threshold = score_threshold or self.default_score_threshold
             
-            # Step 1: Retrieve relevant documents from Weaviate
-            logger.info(f"Searching Weaviate for query: {query}")
-            retrieved_docs = []
+            # Step 1: Retrieve relevant documents without blocking the event loop
+            logger.info(f"Searching vector store for query: {query}")
             search_query_id = None
-
-            if vector_store.is_connected:
-                # Use Weaviate for semantic search
-                search_results = vector_store.search_similar(
-                    query=query,
-                    limit=search_limit,
-                    score_threshold=score_threshold,
-                    filter_conditions=filter_conditions
-                )
-
-                # Convert Weaviate results to expected format
-                retrieved_docs = []
-                for result in search_results:
-                    retrieved_docs.append({
-                        "id": result["id"],
-                        "content": result["content"],
-                        "score": result["score"],
-                        "document_title": result.get("document_title", ""),
-                        "document_type": result.get("document_type", "text/plain"),
-                        "chunk_index": result.get("chunk_index", 0),
-                        "metadata": result["metadata"]
-                    })
-
-                logger.info(f"Retrieved {len(retrieved_docs)} documents from Weaviate")
-            else:
-                logger.warning("Weaviate not connected - no documents retrieved")
-
-            # Step 2: Prepare context from retrieved documents
-            context = self._prepare_context(retrieved_docs, query)
+            store = get_async_vector_store()
+            search_results = await store.search(VectorQuery(
+                text=query,
+                limit=search_limit,
+                score_threshold=score_threshold,
+                filters=filter_conditions,
+                include_vectors=True
+            ))
+
+            # Convert search results to expected format
+            retrieved_docs = []
+            for result in search_results:
+                retrieved_docs.append({
+                    "id": result["id"],
+                    "content": result["content"],
+                    "score": result["score"],
+                    "document_title": result.get("document_title", ""),
+                    "document_type": result.get("document_type", "text/plain"),
+                    "chunk_index": result.get("chunk_index", 0),
+                    "vector": result.get("vector"),
+                    "metadata": result["metadata"]
+                })
+
+            logger.info(f"Retrieved {len(retrieved_docs)} documents from {type(store.store).__name__}")
+
+            # Step 2: Pack the retrieved documents into the context token budget
+            packed = self._pack_context(retrieved_docs, query)
+            context = packed.text
 
             # Step 3: Generate response using LLM with context
             if retrieved_docs and context:
@@ -105,9 +115,8 @@ class RAGSystem:
 
                 if use_multi_agent and multi_agent_orchestrator.llm is not None:
                     # Use multi-agent system for complex reasoning
-                    agent_response = multi_agent_orchestrator.execute_simple_query(
-                        query=enhanced_prompt,
-                        context=context
+                    agent_response = await multi_agent_orchestrator.aexecute_workflow_graph(
+                        enhanced_prompt, "simple_research", context
                     )
                 else:
                     # Use direct LLM response with context
@@ -139,7 +148,8 @@ class RAGSystem:
                     "search_query_id": search_query_id,
                     "documents_found": len(retrieved_docs),
                     "search_type": search_type,
-                    "score_threshold": score_threshold
+                    "score_threshold": score_threshold,
+                    "context_packing": packed.diagnostics.to_dict()
                 },
                 "agent_metadata": {
                     "agents_used": agent_response.get("agents_used", []),
@@ -174,32 +184,23 @@ class RAGSystem:
                 "error": str(e)
             }
     
+    def _pack_context(self, retrieved_docs: List[Dict[str, Any]], query: str) -> PackedContext:
+        """Pack retrieved documents into the context token budget (MMR, chunk merging, knapsack)."""
+        packed = self.context_packer.pack(retrieved_docs, query)
+        diagnostics = packed.diagnostics
+        if diagnostics.candidates:
+            logger.info(
+                f"Packed {diagnostics.chunks_selected}/{diagnostics.candidates} chunks into "
+                f"{diagnostics.tokens_used}/{diagnostics.budget_tokens} tokens "
+                f"({diagnostics.near_duplicates_dropped} near-duplicates dropped, "
+                f"{diagnostics.chunks_merged} chunks merged) in {diagnostics.elapsed_ms:.1f} ms"
+            )
+        return packed
+
     def _prepare_context(self, retrieved_docs: List[Dict[str, Any]], query: str) -> str:
         """Prepare context string from retrieved documents."""
-        if not retrieved_docs:
-            return ""
-        
-        context_parts = []
-        current_length = 0
-        
-        # Sort by relevance score
-        sorted_docs = sorted(retrieved_docs, key=lambda x: x["score"], reverse=True)
-        
-        for i, doc in enumerate(sorted_docs):
-            # Create context entry
-            doc_context = f"Document {i+1} (Score: {doc['score']:.3f}):\n"
-            doc_context += f"Title: {doc['document_title']}\n"
-            doc_context += f"Content: {doc['content']}\n"
-            
-            # Check if adding this document would exceed max length
-            if current_length + len(doc_context) > self.max_context_length:
-                break
-            
-            context_parts.append(doc_context)
-            current_length += len(doc_context)
-        
-        return "\n---\n".join(context_parts)
-    
+        return self._pack_context(retrieved_docs, query).text
+
     def _create_rag_prompt(self, query: str, context: str) -> str:
         """Create an enhanced prompt that includes retrieved context."""
         if not context:
@@ -308,7 +309,13 @@ Question: {query}"""
         tags: Optional[List[str]] = None,
         image_data: Optional[bytes] = None
     ) -> Optional[str]:
-        """Add a document to the RAG system from text content with optional multimodal data."""
+        """
+        Add a document to the RAG system from text content with optional multimodal data.
+
+        Every document is stored in the database and then ingested through the
+        chunk pipeline into the KnowledgeVessel collection that retrieval
+        searches, whatever its length.
+        """
         try:
             # Import here to avoid circular dependency
             from dryad.services.document_service import DocumentService
@@ -327,36 +334,8 @@ Question: {query}"""
                 logger.error("Failed to create document in database")
                 return None
 
-            # Step 2: Add to Weaviate vector store
-            if vector_store.is_connected:
-                # Prepare metadata for Weaviate
-                weaviate_metadata = {
-                    "document_id": str(document.id),
-                    "title": title,
-                    "content_type": content_type,
-                    "chunk_type": "full_document",
-                    "chunk_index": 0,
-                    **(doc_metadata or {})
-                }
-
-                # Add to vector store (with optional image data for multimodal)
-                vector_id = vector_store.add_document(
-                    content=content,
-                    metadata=weaviate_metadata,
-                    document_id=str(document.id),
-                    image_data=image_data
-                )
-
-                if vector_id:
-                    logger.info(f"Added document to Weaviate: {document.id} -> {vector_id}")
-                else:
-                    logger.warning(f"Failed to add document to Weaviate: {document.id}")
-            else:
-                logger.warning("Weaviate not connected - document only stored in database")
-
-            # Step 3: Process chunks if document is large
-            if len(content) > self.max_context_length:
-                await self._add_document_chunks(db, document, content, doc_metadata, image_data)
+            # Step 2: Index it in the KnowledgeVessel collection; a short document is a single chunk
+            await self._add_document_chunks(db, document, content, doc_metadata, image_data)
 
             logger.info(f"Successfully added document to RAG system: {document.id}")
             return str(document.id)
@@ -373,41 +352,75 @@ Question: {query}"""
         doc_metadata: Optional[Dict[str, Any]] = None,
         image_data: Optional[bytes] = None
     ):
-        """Add document chunks to Weaviate for better retrieval."""
-        if not vector_store.is_connected:
-            return
-
+        """Add document chunks to the vector store for better retrieval.
+
+        Chunks are split lazily, embedded in batches by a bounded worker pool and
+        written through the store's batch API. Each chunk carries the title,
+        content type and filterable doc_metadata entries as properties.
+        Re-adding a document only writes chunks whose content or properties
+        changed. The chunk collection holds text only, so a document with
+        image_data is also written as a full-document multimodal object.
+        """
+        if image_data:
+            await self._add_multimodal_document(document, content, doc_metadata, image_data)
+        pipeline = None
         try:
-            # Split content into chunks
-            chunks = vector_store.chunk_text(content, chunk_size=1000, overlap=200)
-
-            for i, chunk in enumerate(chunks):
-                chunk_metadata = {
-                    "document_id": str(document.id),
-                    "title": document.title,
-                    "content_type": document.content_type,
-                    "chunk_type": "chunk",
-                    "chunk_index": i,
-                    "chunk_id": f"{document.id}_chunk_{i}",
-                    **(doc_metadata or {})
-                }
-
-                # Add chunk to Weaviate
-                vector_id = vector_store.add_document(
-                    content=chunk,
-                    metadata=chunk_metadata,
-                    document_id=f"{document.id}_chunk_{i}",
-                    image_data=image_data if i == 0 else None  # Only add image to first chunk
-                )
-
-                if vector_id:
-                    logger.debug(f"Added chunk {i} to Weaviate: {vector_id}")
-                else:
-                    logger.warning(f"Failed to add chunk {i} to Weaviate")
+            pipeline = get_ingestion_pipeline()
+            report = await pipeline.ingest(
+                document_id=str(document.id),
+                text=content,
+                source=document.title,
+                title=document.title,
+                content_type=document.content_type or "text/plain",
+                metadata=doc_metadata
+            )
+            for error in report.errors[:10]:
+                logger.warning(f"Failed to add chunk {error.chunk_index} of {document.id}: {error.message}")
+            return report
 
         except Exception as e:
             logger.error(f"Error adding document chunks: {e}")
+        finally:
+            if pipeline is not None:
+                # Cached search results for the collection predate these chunks (even a partial write)
+                get_async_vector_store().invalidate(COLLECTION_NAME)
     
+    async def _add_multimodal_document(
+        self,
+        document,
+        content: str,
+        doc_metadata: Optional[Dict[str, Any]],
+        image_data: bytes
+    ):
+        """Write the full document with its image through the multimodal vector store, off the event loop."""
+        if not vector_store.is_connected:
+            logger.warning(f"Weaviate not connected - image data for document {document.id} is not indexed")
+            return None
+        weaviate_metadata = {
+            "document_id": str(document.id),
+            "title": document.title,
+            "content_type": document.content_type or "text/plain",
+            "chunk_type": "full_document",
+            "chunk_index": 0,
+            **(doc_metadata or {})
+        }
+        try:
+            vector_id = await asyncio.to_thread(
+                vector_store.add_document,
+                content=content,
+                metadata=weaviate_metadata,
+                document_id=str(document.id),
+                image_data=image_data
+            )
+        except Exception as e:
+            logger.error(f"Error adding multimodal document {document.id}: {e}")
+            return None
+        if vector_id:
+            logger.info(f"Added multimodal document to Weaviate: {document.id} -> {vector_id}")
+        else:
+            logger.warning(f"Failed to add multimodal document to Weaviate: {document.id}")
+        return vector_id
+
     async def get_system_status(self, db: AsyncSession) -> Dict[str, Any]:
         """Get the status of the RAG system with Weaviate integration."""
         try:
@@ -451,6 +464,7 @@ Question: {query}"""
                     "default_search_limit": self.default_search_limit,
                     "default_score_threshold": self.default_score_threshold,
                     "max_context_length": self.max_context_length,
+                    "max_context_tokens": self.context_packer.max_tokens,
                     "vector_store_type": "Weaviate",
                     "embedding_model": vector_store.embedding_model_name if hasattr(vector_store, 'embedding_model_name') else "unknown",
                     "llm_status": {
@@ -13,6 +13,7 @@ from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 
+from dryad.core.llm_cache import get_llm_response_cache, model_id
 from dryad.core.llm_config import get_llm
 
 logger = logging.getLogger(__name__)
@@ -147,11 +148,23 @@ Provide a detailed decomposition with:
                 format_instructions=self.parser.get_format_instructions()
             )
             
-            # Get LLM response
-            response = await self.llm.ainvoke(prompt)
+            # Get LLM response (identical requests reuse a cached decomposition;
+            # only responses that parse are cached)
+            async def llm_call():
+                response = await self.llm.ainvoke(prompt)
+                return response.content
+            
+            content = await get_llm_response_cache().get_or_compute(
+                model=model_id(self.llm),
+                prompt=prompt,
+                compute=llm_call,
+                params={"temperature": getattr(self.llm, "temperature", None)},
+                namespace="task_decomposition",
+                cacheable=self._parses
+            )
             
             # Parse the response
-            decomposed = self.parser.parse(response.content)
+            decomposed = self.parser.parse(content)
             
             # Convert to Subtask objects
             subtasks = []
@@ -194,6 +207,14 @@ Provide a detailed decomposition with:
                 )
             ]
     
+    def _parses(self, content: str) -> bool:
+        """Whether an LLM response parses as a decomposition (and so is worth caching)."""
+        try:
+            self.parser.parse(content)
+            return True
+        except Exception:
+            return False
+    
     def get_execution_plan(self, subtasks: List[Subtask]) -> List[List[str]]:
         """
         Create an execution plan respecting dependencies.
@@ -0,0 +1,585 @@
+"""
+Durable local task queue for the Enhanced Orchestrator.
+
+An in-process replacement for Celery on single-node deployments: tasks are
+rows in a SQLite database in WAL mode, workers lease them with a visibility
+timeout, failures are retried with exponential backoff, and a worker pool
+runs them on the event loop with a concurrency limit per task type.
+
+All SQLite access goes through one dedicated thread and one connection, so
+the event loop never blocks on disk I/O and writers never contend.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TASK_STATUSES = (PENDING, RUNNING, COMPLETED, FAILED, CANCELLED)
+
+class TaskNotSupportedError(Exception):
+    """Raised by a handler for work it cannot perform; the task fails without retries"""
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL UNIQUE,
+    task_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 1,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    timeout REAL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    completed_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_dequeue ON tasks (status, task_type, priority DESC, available_at, seq);
+CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks (status, available_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_lease ON tasks (status, lease_expires_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks (status, created_at, seq);
+CREATE INDEX IF NOT EXISTS idx_tasks_type_created ON tasks (task_type, created_at, seq);
+CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks (created_at, seq);
+"""
+
+_COLUMNS = (
+    "seq, task_id, task_type, status, priority, payload, result, error, attempts, max_attempts, "
+    "timeout, available_at, lease_owner, lease_expires_at, created_at, started_at, completed_at, updated_at"
+)
+
+
+@dataclass
+class QueuedTask:
+    """A task row as seen by workers and the API"""
+    seq: int
+    task_id: str
+    task_type: str
+    status: str
+    priority: int
+    payload: Dict[str, Any]
+    result: Optional[Any]
+    error: Optional[str]
+    attempts: int
+    max_attempts: int
+    timeout: Optional[float]
+    available_at: float
+    lease_owner: Optional[str]
+    lease_expires_at: Optional[float]
+    created_at: float
+    started_at: Optional[float]
+    completed_at: Optional[float]
+    updated_at: float
+
+    @classmethod
+    def from_row(cls, row: Tuple) -> "QueuedTask":
+        values = list(row)
+        values[5] = json.loads(values[5])
+        values[6] = json.loads(values[6]) if values[6] is not None else None
+        return cls(*values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "task_id": self.task_id,
+            "task_type": self.task_type,
+            "status": self.status.upper(),
+            "priority": self.priority,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "created_at": _isoformat(self.created_at),
+            "started_at": _isoformat(self.started_at),
+            "completed_at": _isoformat(self.completed_at),
+            "next_attempt_at": _isoformat(self.available_at) if self.status == PENDING else None,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(timestamp)) + f".{int(timestamp % 1 * 1000):03d}Z"
+
+
+def encode_cursor(task: QueuedTask) -> str:
+    return f"{task.created_at!r}:{task.seq}"
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    created_at, seq = cursor.rsplit(":", 1)
+    return float(created_at), int(seq)
+
+
+class TaskQueue:
+    """
+    SQLite-backed task queue with leasing, retries and keyset pagination.
+
+    Args:
+        path: Database file (":memory:" for a throwaway queue)
+        visibility_timeout: Seconds a lease lasts before the task is re-leasable
+        max_attempts: Default attempts per task, including the first
+        backoff_base: Delay before the first retry; doubles on each further retry
+        backoff_max: Upper bound for the retry delay
+    """
+
+    def __init__(
+        self,
+        path: str = "./dryad_tasks.db",
+        visibility_timeout: float = 300.0,
+        max_attempts: int = 3,
+        backoff_base: float = 2.0,
+        backoff_max: float = 300.0
+    ):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="task-queue")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._listeners: List[asyncio.Event] = []
+        self._next_lease_sweep = 0.0
+        self._executor.submit(self._connect).result()
+
+    def _connect(self) -> None:
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.executescript(_SCHEMA)
+        self._conn = conn
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _transaction(self, fn: Callable, *args) -> Any:
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn, *args)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    def subscribe(self, event: asyncio.Event) -> None:
+        """Set ``event`` whenever a task is enqueued or becomes retryable"""
+        self._listeners.append(event)
+
+    def _notify(self) -> None:
+        for event in self._listeners:
+            event.set()
+
+    # Producers
+
+    async def enqueue(
+        self,
+        task_type: str,
+        payload: Dict[str, Any],
+        priority: int = 1,
+        max_attempts: Optional[int] = None,
+        timeout: Optional[float] = None,
+        delay: float = 0.0
+    ) -> str:
+        """Add a task; returns its task_id"""
+        task_ids = await self.enqueue_many([(task_type, payload)], priority, max_attempts, timeout, delay)
+        return task_ids[0]
+
+    async def enqueue_many(
+        self,
+        tasks: Iterable[Tuple[str, Dict[str, Any]]],
+        priority: int = 1,
+        max_attempts: Optional[int] = None,
+        timeout: Optional[float] = None,
+        delay: float = 0.0
+    ) -> List[str]:
+        """Add several ``(task_type, payload)`` tasks in one transaction"""
+        now = time.time()
+        attempts = max_attempts or self.max_attempts
+        rows = [
+            (f"task-{uuid.uuid4().hex}", task_type, PENDING, priority, json.dumps(payload, default=str),
+             attempts, timeout, now + delay, now, now)
+            for task_type, payload in tasks
+        ]
+
+        def insert(conn):
+            conn.executemany(
+                "INSERT INTO tasks (task_id, task_type, status, priority, payload, max_attempts, timeout, "
+                "available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+        await self._run(self._transaction, insert)
+        self._notify()
+        return [row[0] for row in rows]
+
+    # Workers
+
+    async def lease(
+        self,
+        worker_id: str,
+        task_types: Optional[List[str]] = None,
+        limit: int = 1,
+        visibility_timeout: Optional[float] = None
+    ) -> List[QueuedTask]:
+        """Atomically claim up to ``limit`` due tasks, highest priority then earliest due first"""
+        if limit <= 0:
+            return []
+        timeout = visibility_timeout or self.visibility_timeout
+        return await self._run(self._transaction, self._lease, worker_id, task_types, limit, timeout)
+
+    def _lease(self, conn, worker_id, task_types, limit, timeout) -> List[QueuedTask]:
+        now = time.time()
+        if now >= self._next_lease_sweep:
+            self._expire_leases(conn, now)
+            self._next_lease_sweep = now + min(1.0, self.visibility_timeout / 10)
+
+        where = "status = ? AND available_at <= ?"
+        params: List[Any] = [PENDING, now]
+        if task_types:
+            where += f" AND task_type IN ({','.join('?' * len(task_types))})"
+            params.extend(task_types)
+        rows = conn.execute(
+            f"UPDATE tasks SET status = ?, lease_owner = ?, lease_expires_at = ?, attempts = attempts + 1, "
+            f"started_at = COALESCE(started_at, ?), updated_at = ? "
+            f"WHERE seq IN (SELECT seq FROM tasks WHERE {where} ORDER BY priority DESC, available_at, seq LIMIT ?) "
+            f"RETURNING {_COLUMNS}",
+            [RUNNING, worker_id, now + timeout, now, now, *params, limit]
+        ).fetchall()
+        tasks = [QueuedTask.from_row(row) for row in rows]
+        tasks.sort(key=lambda t: (-t.priority, t.available_at, t.seq))
+        return tasks
+
+    def _expire_leases(self, conn, now: float) -> None:
+        """Return tasks whose lease ran out to the queue (or fail them when out of attempts)"""
+        conn.execute(
+            "UPDATE tasks SET status = ?, error = 'Lease expired after final attempt', completed_at = ?, "
+            "lease_owner = NULL, lease_expires_at = NULL, updated_at = ? "
+            "WHERE status = ? AND lease_expires_at <= ? AND attempts >= max_attempts",
+            (FAILED, now, now, RUNNING, now)
+        )
+        conn.execute(
+            "UPDATE tasks SET status = ?, error = 'Lease expired', lease_owner = NULL, lease_expires_at = NULL, "
+            "available_at = ?, updated_at = ? WHERE status = ? AND lease_expires_at <= ?",
+            (PENDING, now, now, RUNNING, now)
+        )
+
+    async def extend_lease(self, task_id: str, worker_id: str, visibility_timeout: Optional[float] = None) -> bool:
+        """Heartbeat: push the lease deadline out; False if the lease was lost"""
+        timeout = visibility_timeout or self.visibility_timeout
+
+        def extend(conn):
+            now = time.time()
+            return conn.execute(
+                "UPDATE tasks SET lease_expires_at = ?, updated_at = ? "
+                "WHERE task_id = ? AND status = ? AND lease_owner = ?",
+                (now + timeout, now, task_id, RUNNING, worker_id)
+            ).rowcount == 1
+
+        return await self._run(extend, self._conn)
+
+    async def complete(self, task_id: str, worker_id: str, result: Any) -> bool:
+        """Record success; False if the lease was lost (the task belongs to someone else)"""
+        encoded = json.dumps(result, default=str)
+
+        def finish(conn):
+            now = time.time()
+            return conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = NULL, completed_at = ?, lease_owner = NULL, "
+                "lease_expires_at = NULL, updated_at = ? WHERE task_id = ? AND status = ? AND lease_owner = ?",
+                (COMPLETED, encoded, now, now, task_id, RUNNING, worker_id)
+            ).rowcount == 1
+
+        return await self._run(finish, self._conn)
+
+    async def fail(self, task_id: str, worker_id: str, error: str, retry: bool = True) -> Optional[str]:
+        """Record a failed attempt; retries with backoff while attempts remain
+
+        Returns the new status (``pending`` or ``failed``), or None if the
+        lease was lost.
+        """
+        def record(conn):
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM tasks WHERE task_id = ? AND status = ? AND lease_owner = ?",
+                (task_id, RUNNING, worker_id)
+            ).fetchone()
+            if row is None:
+                return None
+            attempts, max_attempts = row
+            now = time.time()
+            if retry and attempts < max_attempts:
+                delay = self.backoff_delay(attempts)
+                conn.execute(
+                    "UPDATE tasks SET status = ?, error = ?, available_at = ?, lease_owner = NULL, "
+                    "lease_expires_at = NULL, updated_at = ? WHERE task_id = ?",
+                    (PENDING, error, now + delay, now, task_id)
+                )
+                return PENDING
+            conn.execute(
+                "UPDATE tasks SET status = ?, error = ?, completed_at = ?, lease_owner = NULL, "
+                "lease_expires_at = NULL, updated_at = ? WHERE task_id = ?",
+                (FAILED, error, now, now, task_id)
+            )
+            return FAILED
+
+        return await self._run(self._transaction, record)
+
+    def backoff_delay(self, attempts: int) -> float:
+        """Exponential backoff with full jitter in [delay/2, delay]"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** max(0, attempts - 1)))
+        return delay * (0.5 + random.random() / 2)
+
+    async def cancel(self, task_id: str) -> bool:
+        """Cancel a task that has not started yet"""
+        def cancel(conn):
+            now = time.time()
+            return conn.execute(
+                "UPDATE tasks SET status = ?, completed_at = ?, updated_at = ? WHERE task_id = ? AND status = ?",
+                (CANCELLED, now, now, task_id, PENDING)
+            ).rowcount == 1
+
+        return await self._run(cancel, self._conn)
+
+    # Queries
+
+    async def get(self, task_id: str) -> Optional[QueuedTask]:
+        def fetch(conn):
+            row = conn.execute(f"SELECT {_COLUMNS} FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            return QueuedTask.from_row(row) if row else None
+
+        return await self._run(fetch, self._conn)
+
+    async def list_tasks(
+        self,
+        status: Optional[str] = None,
+        task_type: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        List tasks newest first using keyset pagination.
+
+        Args:
+            status: Filter by status
+            task_type: Filter by task type
+            limit: Page size
+            cursor: ``next_cursor`` from the previous page
+
+        Returns:
+            Dict with ``tasks`` and ``next_cursor`` (None on the last page)
+        """
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status.lower())
+        if task_type:
+            clauses.append("task_type = ?")
+            params.append(task_type)
+        if cursor:
+            created_at, seq = decode_cursor(cursor)
+            clauses.append("(created_at, seq) < (?, ?)")
+            params.extend([created_at, seq])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {_COLUMNS} FROM tasks {where} ORDER BY created_at DESC, seq DESC LIMIT ?"
+
+        def fetch(conn):
+            return [QueuedTask.from_row(row) for row in conn.execute(sql, [*params, limit + 1]).fetchall()]
+
+        tasks = await self._run(fetch, self._conn)
+        next_cursor = encode_cursor(tasks[limit - 1]) if len(tasks) > limit else None
+        return {"tasks": tasks[:limit], "next_cursor": next_cursor}
+
+    async def counts(self, task_type: Optional[str] = None) -> Dict[str, int]:
+        """Number of tasks per status (the backlog is ``pending``)"""
+        def fetch(conn):
+            if task_type:
+                rows = conn.execute(
+                    "SELECT status, COUNT(*) FROM tasks WHERE task_type = ? GROUP BY status", (task_type,)
+                ).fetchall()
+            else:
+                rows = conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+            return rows
+
+        counts = {status: 0 for status in TASK_STATUSES}
+        counts.update(dict(await self._run(fetch, self._conn)))
+        return counts
+
+    async def next_available_at(self) -> Optional[float]:
+        """Earliest time a pending task becomes due, for worker sleep scheduling"""
+        def fetch(conn):
+            return conn.execute(
+                "SELECT MIN(available_at) FROM tasks WHERE status = ?", (PENDING,)
+            ).fetchone()[0]
+
+        return await self._run(fetch, self._conn)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._executor.submit(self._conn.close).result()
+            self._conn = None
+        self._executor.shutdown(wait=True)
+
+
+TaskHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class _TypeSlots:
+    limit: int
+    running: int = 0
+
+    @property
+    def refill_batch(self) -> int:
+        return max(1, self.limit // 4)
+
+
+class TaskWorkerPool:
+    """
+    Runs queued tasks on the event loop with per-type concurrency limits.
+
+    Args:
+        queue: The task queue to consume
+        handlers: Coroutine per task type; receives the payload, returns the result
+        concurrency: Maximum simultaneously running tasks per type
+        default_concurrency: Limit for types missing from ``concurrency``
+        poll_interval: Longest idle sleep between lease attempts
+    """
+
+    def __init__(
+        self,
+        queue: TaskQueue,
+        handlers: Dict[str, TaskHandler],
+        concurrency: Optional[Dict[str, int]] = None,
+        default_concurrency: int = 4,
+        poll_interval: float = 1.0
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.poll_interval = poll_interval
+        self.worker_id = f"worker-{uuid.uuid4().hex[:12]}"
+        concurrency = concurrency or {}
+        self._slots = {
+            task_type: _TypeSlots(concurrency.get(task_type, default_concurrency))
+            for task_type in handlers
+        }
+        self._wakeup = asyncio.Event()
+        self._running: Dict[str, asyncio.Task] = {}
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.stats = {"completed": 0, "failed": 0, "retried": 0, "lost_leases": 0}
+        queue.subscribe(self._wakeup)
+
+    async def start(self) -> None:
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+            logger.info(f"Task worker pool {self.worker_id} started for {sorted(self.handlers)}")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Stop leasing; give running tasks ``timeout`` seconds, then cancel them
+
+        Cancelled tasks keep their lease and are retried once it expires.
+        """
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        if self._running:
+            _, pending = await asyncio.wait(list(self._running.values()), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            self._wakeup.clear()
+            leased = 0
+            try:
+                for task_type, slots in self._slots.items():
+                    free = slots.limit - slots.running
+                    # Refill in batches rather than one lease round trip per finished task
+                    if free <= 0 or (slots.running and free < slots.refill_batch):
+                        continue
+                    for task in await self.queue.lease(self.worker_id, [task_type], free):
+                        slots.running += 1
+                        leased += 1
+                        self._running[task.task_id] = asyncio.create_task(self._run_task(task, slots))
+            except Exception as e:
+                logger.error(f"Task dispatch failed: {e}")
+
+            if leased:
+                continue
+            sleep_for = self.poll_interval
+            due = await self.queue.next_available_at()
+            if due is not None:
+                sleep_for = min(sleep_for, max(0.0, due - time.time()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=sleep_for)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_task(self, task: QueuedTask, slots: _TypeSlots) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(task))
+        try:
+            handler = self.handlers[task.task_type]
+            coroutine = handler(task.payload)
+            result = await (asyncio.wait_for(coroutine, task.timeout) if task.timeout else coroutine)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = "Task timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+            retry = not isinstance(e, TaskNotSupportedError)
+            status = await self.queue.fail(task.task_id, self.worker_id, error, retry=retry)
+            if status is None:
+                self.stats["lost_leases"] += 1
+            elif status == PENDING:
+                self.stats["retried"] += 1
+                self._wakeup.set()
+            else:
+                self.stats["failed"] += 1
+            logger.warning(f"Task {task.task_id} ({task.task_type}) attempt {task.attempts} failed: {error}")
+        else:
+            if await self.queue.complete(task.task_id, self.worker_id, result):
+                self.stats["completed"] += 1
+            else:
+                self.stats["lost_leases"] += 1
+        finally:
+            heartbeat.cancel()
+            slots.running -= 1
+            self._running.pop(task.task_id, None)
+            self._wakeup.set()
+
+    async def _heartbeat(self, task: QueuedTask) -> None:
+        interval = self.queue.visibility_timeout / 3
+        while True:
+            await asyncio.sleep(interval)
+            if not await self.queue.extend_lease(task.task_id, self.worker_id):
+                logger.warning(f"Lost lease on task {task.task_id}")
+                return
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "running": {t: s.running for t, s in self._slots.items()},
+            "limits": {t: s.limit for t, s in self._slots.items()},
+            **self.stats
+        }
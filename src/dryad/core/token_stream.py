@@ -0,0 +1,127 @@
+"""
+Token streaming for agent replies.
+
+TokenStream wraps an async iterator of text deltas. It measures time to
+first token and throughput, collects the reply, and hands it to an
+on_finish callback exactly once when the stream ends, whether it completed,
+failed or was cancelled because the client went away. sse_events frames a
+TokenStream as Server-Sent Events.
+
+Deltas are pulled one at a time, so a slow consumer slows the upstream read
+instead of piling up a buffer. Closing the stream (or cancelling the task
+iterating it) closes the upstream iterator, which aborts the provider
+request.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Completion callbacks still running after their stream was cancelled
+_finishing: Set[asyncio.Future] = set()
+
+STOP = "stop"
+CANCELLED = "cancelled"
+ERROR = "error"
+
+
+@dataclass
+class StreamStats:
+    """Timing of one streamed reply; tokens counts streamed deltas (one token each for OpenAI-style streams)"""
+    finish_reason: str
+    tokens: int
+    ttft_ms: Optional[float]
+    duration_ms: float
+    tokens_per_second: Optional[float]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class TokenStream:
+    """Single-use async iterator of text deltas with timing and a once-only completion callback"""
+
+    def __init__(
+        self,
+        deltas: AsyncIterator[str],
+        on_finish: Optional[Callable[[str, StreamStats], Awaitable[None]]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.deltas = deltas
+        self.on_finish = on_finish
+        self.clock = clock
+        self.stats: Optional[StreamStats] = None
+        self._started = False
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        if self._started:
+            raise RuntimeError("TokenStream can only be iterated once")
+        self._started = True
+        return self._run()
+
+    async def _run(self) -> AsyncIterator[str]:
+        parts: List[str] = []
+        started = self.clock()
+        first_token_at: Optional[float] = None
+        finish_reason = ERROR
+        try:
+            async for delta in self.deltas:
+                if not delta:
+                    continue
+                if first_token_at is None:
+                    first_token_at = self.clock()
+                parts.append(delta)
+                yield delta
+            finish_reason = STOP
+        except (asyncio.CancelledError, GeneratorExit):
+            finish_reason = CANCELLED
+            raise
+        finally:
+            close = getattr(self.deltas, "aclose", None)
+            if close is not None:
+                try:
+                    await close()
+                except Exception as e:
+                    logger.debug(f"Closing upstream token stream failed: {e}")
+            finished = self.clock()
+            generating = finished - (first_token_at or started)
+            self.stats = StreamStats(
+                finish_reason=finish_reason,
+                tokens=len(parts),
+                ttft_ms=(first_token_at - started) * 1000 if first_token_at is not None else None,
+                duration_ms=(finished - started) * 1000,
+                tokens_per_second=len(parts) / generating if len(parts) > 1 and generating > 0 else None
+            )
+            if self.on_finish is not None:
+                # Shielded so a cancelled stream still records what was sent; if this task is
+                # cancelled again while waiting, the callback finishes in the background
+                finish = asyncio.ensure_future(self._finish("".join(parts), self.stats))
+                _finishing.add(finish)
+                finish.add_done_callback(_finishing.discard)
+                await asyncio.shield(finish)
+
+    async def _finish(self, reply: str, stats: StreamStats):
+        try:
+            await self.on_finish(reply, stats)
+        except Exception as e:
+            logger.error(f"Token stream completion callback failed: {e}")
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_events(stream: TokenStream) -> AsyncIterator[str]:
+    """Server-Sent Events for one reply: token events, then done (with timing) or error"""
+    try:
+        async for delta in stream:
+            yield sse_event("token", {"delta": delta})
+        yield sse_event("done", stream.stats.to_dict())
+    except Exception as e:
+        detail = getattr(e, "error_message", None) or str(e)
+        yield sse_event("error", {"detail": detail, "reason": getattr(e, "reason", None)})
@@ -0,0 +1,418 @@
+# app/core/workflow_engine.py
+"""
+Async step-graph executor for multi-agent workflows.
+
+A workflow is a graph of steps; each step sends one prompt to one agent's
+LLM and may depend on the output of earlier steps. Every step starts as
+soon as its dependencies finish, so independent steps (for example several
+research angles) run concurrently. LLM calls go through ``ainvoke`` /
+``astream`` and never block the event loop; models that only offer the
+blocking ``invoke`` are run in a worker thread.
+
+Step results are cached by (role, prompt hash, model), identical in-flight
+calls are coalesced, and every step records latency and token counts.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# A step prompt is either a str.format template or a callable; both receive
+# the workflow inputs merged with the outputs of completed steps (by name).
+PromptSource = Union[str, Callable[[Dict[str, Any]], str]]
+
+
+@dataclass
+class WorkflowStep:
+    """One LLM call in a workflow graph"""
+    name: str
+    role: str
+    prompt: PromptSource
+    depends_on: List[str] = field(default_factory=list)
+    cacheable: bool = True
+
+    def render(self, values: Dict[str, Any]) -> str:
+        if callable(self.prompt):
+            return self.prompt(values)
+        return self.prompt.format(**values)
+
+
+@dataclass
+class StepResult:
+    """Output and measurements of one executed step"""
+    step: str
+    role: str
+    content: str
+    model: str
+    latency: float
+    prompt_tokens: int
+    completion_tokens: int
+    cached: bool = False
+    tokens_estimated: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "step": self.step,
+            "role": self.role,
+            "model": self.model,
+            "latency": round(self.latency, 4),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached": self.cached,
+            "tokens_estimated": self.tokens_estimated
+        }
+
+
+class WorkflowGraph:
+    """A validated DAG of workflow steps"""
+
+    def __init__(self, name: str, steps: List[WorkflowStep], output_step: Optional[str] = None):
+        self.name = name
+        self.steps: Dict[str, WorkflowStep] = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise ValueError(f"Duplicate workflow step: {step.name}")
+            self.steps[step.name] = step
+        for step in steps:
+            for dependency in step.depends_on:
+                if dependency not in self.steps:
+                    raise ValueError(f"Step {step.name} depends on unknown step {dependency}")
+        self.order = self._topological_order()
+        self.output_step = output_step or (self.order[-1] if self.order else None)
+
+    def _topological_order(self) -> List[str]:
+        remaining = {name: set(step.depends_on) for name, step in self.steps.items()}
+        order = []
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Workflow {self.name} has a dependency cycle: {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+
+class StepCache:
+    """LRU cache of step results keyed by (role, prompt hash, model)"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, StepResult]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(role: str, prompt: str, model: str) -> Tuple[str, str, str]:
+        return role, hashlib.sha256(prompt.encode("utf-8")).hexdigest(), model
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[StepResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, result = entry
+        if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: Tuple[str, str, str], result: StepResult) -> None:
+        self._entries[key] = (time.monotonic(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+class WorkflowMetrics:
+    """Per-role latency and token totals across executed steps"""
+
+    def __init__(self):
+        self.roles: Dict[str, Dict[str, float]] = {}
+        self.workflows = 0
+        self.failed_workflows = 0
+
+    def record_step(self, result: StepResult) -> None:
+        stats = self.roles.setdefault(result.role, {
+            "calls": 0, "cached": 0, "latency_total": 0.0, "latency_max": 0.0,
+            "prompt_tokens": 0, "completion_tokens": 0
+        })
+        stats["calls"] += 1
+        if result.cached:
+            stats["cached"] += 1
+            return
+        stats["latency_total"] += result.latency
+        stats["latency_max"] = max(stats["latency_max"], result.latency)
+        stats["prompt_tokens"] += result.prompt_tokens
+        stats["completion_tokens"] += result.completion_tokens
+
+    def get_stats(self) -> Dict[str, Any]:
+        roles = {}
+        for role, stats in self.roles.items():
+            executed = stats["calls"] - stats["cached"]
+            roles[role] = dict(stats, latency_avg=stats["latency_total"] / executed if executed else 0.0)
+        return {"workflows": self.workflows, "failed_workflows": self.failed_workflows, "roles": roles}
+
+
+def _message_text(message: Any) -> str:
+    if hasattr(message, "content"):
+        content = message.content
+        return content if isinstance(content, str) else str(content)
+    return str(message)
+
+
+def _token_usage(message: Any) -> Optional[Tuple[int, int]]:
+    """(prompt, completion) tokens reported by a LangChain-style message, if any"""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return int(usage.get("input_tokens", 0)), int(usage.get("output_tokens", 0))
+    metadata = getattr(message, "response_metadata", None) or {}
+    usage = metadata.get("token_usage") or metadata.get("usage")
+    if usage:
+        return (
+            int(usage.get("prompt_tokens", usage.get("input_tokens", 0))),
+            int(usage.get("completion_tokens", usage.get("output_tokens", 0)))
+        )
+    return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for models that report none"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def model_name(llm: Any) -> str:
+    return str(getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__)
+
+
+class WorkflowEngine:
+    """Executes workflow graphs against a mapping of agents
+
+    Each agent is a dict with at least an ``llm`` entry (the orchestrator's
+    agent dicts qualify). Results are cached in ``cache`` and measured in
+    ``metrics``, both shared by every workflow the engine runs.
+    """
+
+    def __init__(
+        self,
+        agents: Dict[str, Dict[str, Any]],
+        cache: Optional[StepCache] = None,
+        max_concurrent_steps: Optional[int] = None
+    ):
+        self.agents = agents
+        self.cache = cache if cache is not None else StepCache()
+        self.metrics = WorkflowMetrics()
+        self._limit = asyncio.Semaphore(max_concurrent_steps) if max_concurrent_steps else None
+        self._inflight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+
+    async def run(self, graph: WorkflowGraph, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a graph and return its outputs and per-step measurements"""
+        result: Dict[str, Any] = {}
+        async for event in self.stream(graph, inputs, tokens=False):
+            if event["event"] == "workflow_completed":
+                result = event
+        return result
+
+    async def stream(
+        self,
+        graph: WorkflowGraph,
+        inputs: Dict[str, Any],
+        tokens: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Execute a graph, yielding events as steps start, stream tokens and finish
+
+        Events are dicts with an ``event`` key: ``step_started``, ``token``
+        (only when ``tokens`` is true and the model supports ``astream``),
+        ``step_completed``, ``step_failed`` and finally ``workflow_completed``
+        carrying ``outputs``, ``steps`` and ``execution_time``.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        start = time.perf_counter()
+        outputs: Dict[str, str] = {}
+        results: Dict[str, StepResult] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(step: WorkflowStep) -> str:
+            if step.depends_on:
+                await asyncio.gather(*(tasks[dependency] for dependency in step.depends_on))
+            prompt = step.render({**inputs, **outputs})
+            await queue.put({"event": "step_started", "step": step.name, "role": step.role})
+            try:
+                step_result = await self._execute_step(step, prompt, queue if tokens else None)
+            except asyncio.CancelledError:
+                queue.put_nowait({"event": "step_failed", "step": step.name, "role": step.role, "error": "cancelled"})
+                raise
+            except Exception as e:
+                await queue.put({"event": "step_failed", "step": step.name, "role": step.role, "error": str(e)})
+                raise
+            outputs[step.name] = step_result.content
+            results[step.name] = step_result
+            self.metrics.record_step(step_result)
+            await queue.put({
+                "event": "step_completed",
+                "content": step_result.content,
+                **step_result.to_dict()
+            })
+            return step_result.content
+
+        for name in graph.order:
+            tasks[name] = asyncio.create_task(run_step(graph.steps[name]))
+        everything = asyncio.gather(*tasks.values(), return_exceptions=True)
+        everything.add_done_callback(lambda _: queue.put_nowait(None))
+
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            if not everything.done():
+                for task in tasks.values():
+                    task.cancel()
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        # A cancelled step produced no output, so it fails the workflow too
+        errors = {
+            name: "cancelled" if task.cancelled() else str(task.exception())
+            for name, task in tasks.items()
+            if task.cancelled() or task.exception() is not None
+        }
+        self.metrics.workflows += 1
+        if errors:
+            self.metrics.failed_workflows += 1
+        yield {
+            "event": "workflow_completed",
+            "workflow": graph.name,
+            "success": not errors,
+            "errors": errors,
+            "outputs": outputs,
+            "output": outputs.get(graph.output_step) if graph.output_step else None,
+            "steps": [results[name].to_dict() for name in graph.order if name in results],
+            "execution_time": time.perf_counter() - start
+        }
+
+    async def _execute_step(self, step: WorkflowStep, prompt: str, queue: Optional[asyncio.Queue]) -> StepResult:
+        agent = self.agents.get(step.role)
+        if agent is None:
+            raise KeyError(f"No agent for role {step.role}")
+        llm = agent["llm"]
+        model = model_name(llm)
+        if not step.cacheable:
+            return await self._call_llm(step, llm, model, prompt, queue)
+
+        key = self.cache.key(step.role, prompt, model)
+        while True:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return StepResult(**{**cached.__dict__, "step": step.name, "cached": True, "latency": 0.0})
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                shared = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us: take over the call
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                continue
+            return StepResult(**{**shared.__dict__, "step": step.name, "cached": True, "latency": 0.0})
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._call_llm(step, llm, model, prompt, queue)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        future.set_result(result)
+        self.cache.put(key, result)
+        return result
+
+    async def _call_llm(
+        self,
+        step: WorkflowStep,
+        llm: Any,
+        model: str,
+        prompt: str,
+        queue: Optional[asyncio.Queue]
+    ) -> StepResult:
+        if self._limit is not None:
+            async with self._limit:
+                return await self._call_llm_unbounded(step, llm, model, prompt, queue)
+        return await self._call_llm_unbounded(step, llm, model, prompt, queue)
+
+    async def _call_llm_unbounded(
+        self,
+        step: WorkflowStep,
+        llm: Any,
+        model: str,
+        prompt: str,
+        queue: Optional[asyncio.Queue]
+    ) -> StepResult:
+        start = time.perf_counter()
+        usage = None
+        if queue is not None and hasattr(llm, "astream"):
+            parts = []
+            async for chunk in llm.astream(prompt):
+                text = _message_text(chunk)
+                if text:
+                    parts.append(text)
+                    await queue.put({"event": "token", "step": step.name, "role": step.role, "content": text})
+                usage = _token_usage(chunk) or usage
+            content = "".join(parts)
+        else:
+            if hasattr(llm, "ainvoke"):
+                response = await llm.ainvoke(prompt)
+            else:
+                response = await asyncio.to_thread(llm.invoke, prompt)
+            content = _message_text(response)
+            usage = _token_usage(response)
+
+        latency = time.perf_counter() - start
+        estimated = usage is None
+        if estimated:
+            usage = (estimate_tokens(prompt), estimate_tokens(content))
+        return StepResult(
+            step=step.name,
+            role=step.role,
+            content=content,
+            model=model,
+            latency=latency,
+            prompt_tokens=usage[0],
+            completion_tokens=usage[1],
+            tokens_estimated=estimated
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"cache": self.cache.get_stats(), **self.metrics.get_stats()}
@@ -35,3 +35,23 @@ class Agent(Base):
     
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class AgentMessage(Base):
+    """
+    One message of an agent conversation; streamed replies are stored once, when the stream ends.
+    """
+    __tablename__ = "agent_messages"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    agent_id: Mapped[str] = mapped_column(String(36), ForeignKey("agents.id"), index=True, nullable=False)
+    user_id: Mapped[Optional[str]] = mapped_column(String(36), ForeignKey("users.id"), nullable=True)
+    role: Mapped[str] = mapped_column(String(20), nullable=False) # user, assistant
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    
+    # Assistant replies: stop, cancelled (client went away) or error
+    finish_reason: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    ttft_ms: Mapped[Optional[float]] = mapped_column(nullable=True)
+    tokens: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    duration_ms: Mapped[Optional[float]] = mapped_column(nullable=True)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,552 @@
+"""
+Async access to the vector store.
+
+VectorStoreService wraps the synchronous Weaviate client, so a search
+called from a request handler holds the event loop for the whole round
+trip. This module provides the async path:
+
+- AsyncVectorStore is the interface. WeaviateAsyncVectorStore implements it
+  with the Weaviate v4 async client. InMemoryAsyncVectorStore implements it
+  over InMemoryVectorStore, with brute-force search run off the loop; it is
+  the reference implementation and the fallback.
+- AsyncClientPool bounds the number of Weaviate clients (and so of
+  concurrent requests) and reuses connected clients across queries.
+- CachingVectorStore puts a query-result cache in front of a store. Results
+  are keyed by a hash of the query vector (or text), the filters, the
+  limit, the mode and the collection. Each entry records the collection's
+  write generation, and every write through the layer (or an explicit
+  invalidate) bumps the generation, so stale results are never served.
+  Identical queries in flight at the same time share one request.
+  search_many runs several queries concurrently (query variants, separate
+  semantic and keyword legs), and search_collections runs one query over
+  several collections and merges the results.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, replace
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Protocol, Sequence, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+from dryad.infrastructure.vector_store import (
+    COLLECTION_NAME, WEAVIATE_AVAILABLE, ChunkRecord, ChunkWriteError, InMemoryVectorStore, get_in_memory_vector_store
+)
+
+if WEAVIATE_AVAILABLE:
+    import weaviate
+    import weaviate.classes as wvc
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ("vector", "text", "keyword", "hybrid")
+
+
+@dataclass(frozen=True)
+class VectorQuery:
+    """
+    One search.
+
+    mode:
+        vector   nearest neighbours of vector
+        text     semantic search on text (embedded locally when an embedder is configured,
+                 otherwise Weaviate's vectorizer; the in-memory store falls back to keyword)
+        keyword  BM25 on text
+        hybrid   keyword and semantic scores fused with weight alpha on the semantic side
+    score_threshold applies to vector and text modes (cosine similarity).
+    """
+    text: Optional[str] = None
+    vector: Optional[Tuple[float, ...]] = None
+    mode: str = "text"
+    limit: int = 5
+    filters: Optional[Dict[str, Any]] = None
+    collection: str = COLLECTION_NAME
+    alpha: float = 0.5
+    score_threshold: Optional[float] = None
+    include_vectors: bool = False
+
+    def cache_key(self) -> str:
+        digest = hashlib.sha256()
+        if self.vector is not None:
+            digest.update(np.asarray(self.vector, dtype=np.float32).tobytes())
+        digest.update(json.dumps([
+            self.text, self.mode, self.limit, self.filters, self.collection,
+            self.alpha, self.score_threshold, self.include_vectors
+        ], sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+
+class AsyncVectorStore(Protocol):
+    """Async search and chunk writes, per collection"""
+
+    async def search(self, query: VectorQuery) -> List[Dict[str, Any]]: ...
+
+    async def write_chunks(self, collection: str, records: List[ChunkRecord]) -> List[ChunkWriteError]: ...
+
+    async def delete_chunks(self, collection: str, uuids: Sequence[str]) -> int: ...
+
+    async def close(self): ...
+
+
+def _fuse(semantic: List[Dict[str, Any]], keyword: List[Dict[str, Any]], alpha: float, limit: int) -> List[Dict[str, Any]]:
+    """Relative score fusion, as Weaviate's hybrid: min-max normalize each side, then weight by alpha"""
+    fused: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+    for results, weight in ((semantic, alpha), (keyword, 1 - alpha)):
+        if not results:
+            continue
+        scores = [r["score"] for r in results]
+        low, high = min(scores), max(scores)
+        for result in results:
+            normalized = (result["score"] - low) / (high - low) if high > low else 1.0
+            previous = fused.get(result["id"], (0.0, result))[0]
+            fused[result["id"]] = (previous + weight * normalized, result)
+    ranked = sorted(fused.values(), key=lambda item: -item[0])[:limit]
+    return [{**result, "score": score} for score, result in ranked]
+
+
+def _search_result(properties: Dict[str, Any], uuid: str, score: float, vector: Any = None) -> Dict[str, Any]:
+    """The shape RAGSystem consumes"""
+    result = {
+        "id": uuid,
+        "content": properties.get("content", ""),
+        "score": score,
+        "document_title": properties.get("title") or properties.get("source", ""),
+        "document_type": properties.get("content_type") or "text/plain",
+        "chunk_index": properties.get("chunk_index", 0),
+        "metadata": {k: v for k, v in properties.items() if k != "content"}
+    }
+    if vector is not None:
+        result["vector"] = list(vector)
+    return result
+
+
+class InMemoryAsyncVectorStore:
+    """AsyncVectorStore over InMemoryVectorStore collections; searches run in a worker thread"""
+
+    def __init__(self, collections: Optional[Dict[str, InMemoryVectorStore]] = None):
+        self._collections: Dict[str, InMemoryVectorStore] = dict(collections or {})
+        self._lock = threading.Lock()
+
+    def collection(self, name: str) -> InMemoryVectorStore:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = InMemoryVectorStore()
+            return self._collections[name]
+
+    def _search(self, query: VectorQuery) -> List[Dict[str, Any]]:
+        store = self.collection(query.collection)
+        semantic, keyword = [], []
+        if query.vector is not None and query.mode != "keyword":
+            semantic = store.search_vector(query.vector, query.limit, query.filters, query.include_vectors)
+            if query.score_threshold is not None and query.mode != "hybrid":
+                semantic = [r for r in semantic if r["score"] >= query.score_threshold]
+        if query.text and (query.mode in ("keyword", "hybrid") or query.vector is None):
+            keyword = store.search_keyword(query.text, query.limit, query.filters, query.include_vectors)
+
+        if query.mode == "hybrid":
+            results = _fuse(semantic, keyword, query.alpha, query.limit)
+        else:
+            results = semantic if query.vector is not None and query.mode != "keyword" else keyword
+        return [
+            _search_result({k: v for k, v in r.items() if k not in ("id", "score", "vector")}, r["id"], r["score"], r.get("vector"))
+            for r in results
+        ]
+
+    async def search(self, query: VectorQuery) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._search, query)
+
+    async def write_chunks(self, collection: str, records: List[ChunkRecord]) -> List[ChunkWriteError]:
+        return await asyncio.to_thread(self.collection(collection).write_chunks, records)
+
+    async def delete_chunks(self, collection: str, uuids: Sequence[str]) -> int:
+        return await asyncio.to_thread(self.collection(collection).delete_chunks, uuids)
+
+    async def close(self):
+        pass
+
+
+class AsyncClientPool:
+    """
+    At most size clients, created on demand and reused. A caller waits up to
+    acquire_timeout for a free client; a client whose request raised is closed
+    rather than returned, since its connection may be broken.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Awaitable[Any]],
+        close: Callable[[Any], Awaitable[None]],
+        size: int = 4,
+        acquire_timeout: float = 10.0
+    ):
+        self.factory = factory
+        self.close_client = close
+        self.size = max(1, size)
+        self.acquire_timeout = acquire_timeout
+        self._slots = asyncio.Semaphore(self.size)
+        self._idle: List[Any] = []
+        self._stats = {"created": 0, "reused": 0, "discarded": 0, "in_use": 0, "timeouts": 0}
+
+    @asynccontextmanager
+    async def client(self) -> AsyncIterator[Any]:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise
+        self._stats["in_use"] += 1
+        try:
+            if self._idle:
+                client = self._idle.pop()
+                self._stats["reused"] += 1
+            else:
+                client = await self.factory()
+                self._stats["created"] += 1
+            try:
+                yield client
+            except BaseException:
+                self._stats["discarded"] += 1
+                await self.close_client(client)
+                raise
+            self._idle.append(client)
+        finally:
+            self._stats["in_use"] -= 1
+            self._slots.release()
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for client in idle:
+            await self.close_client(client)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "size": self.size, "idle": len(self._idle)}
+
+
+class WeaviateAsyncVectorStore:
+    """AsyncVectorStore over the Weaviate v4 async client, with pooled connections"""
+
+    def __init__(
+        self,
+        url: str = "http://localhost:8080",
+        api_key: Optional[str] = None,
+        grpc_port: int = 50051,
+        pool_size: int = 4,
+        acquire_timeout: float = 10.0
+    ):
+        if not WEAVIATE_AVAILABLE:
+            raise RuntimeError("weaviate-client is not installed")
+        parsed = urlparse(url if "://" in url else f"http://{url}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        self.secure = parsed.scheme == "https"
+        self.grpc_port = grpc_port
+        self.auth = weaviate.auth.AuthApiKey(api_key) if api_key else None
+        self.pool = AsyncClientPool(self._connect, self._disconnect, pool_size, acquire_timeout)
+
+    async def _connect(self):
+        if self.host in ("localhost", "127.0.0.1"):
+            client = weaviate.use_async_with_local(
+                host=self.host, port=self.port, grpc_port=self.grpc_port, auth_credentials=self.auth
+            )
+        else:
+            client = weaviate.use_async_with_custom(
+                http_host=self.host, http_port=self.port, http_secure=self.secure,
+                grpc_host=self.host, grpc_port=self.grpc_port, grpc_secure=self.secure,
+                auth_credentials=self.auth
+            )
+        await client.connect()
+        return client
+
+    async def _disconnect(self, client):
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Closing Weaviate client failed: {e}")
+
+    @staticmethod
+    def _filters(filters: Optional[Dict[str, Any]]):
+        if not filters:
+            return None
+        conditions = [
+            wvc.query.Filter.by_property(name).contains_any(list(value))
+            if isinstance(value, (list, tuple, set, frozenset))
+            else wvc.query.Filter.by_property(name).equal(value)
+            for name, value in filters.items()
+        ]
+        return conditions[0] if len(conditions) == 1 else wvc.query.Filter.all_of(conditions)
+
+    async def search(self, query: VectorQuery) -> List[Dict[str, Any]]:
+        async with self.pool.client() as client:
+            collection = client.collections.get(query.collection)
+            options = {
+                "limit": query.limit,
+                "filters": self._filters(query.filters),
+                "include_vector": query.include_vectors,
+                "return_metadata": wvc.query.MetadataQuery(distance=True, score=True)
+            }
+            distance = 1 - query.score_threshold if query.score_threshold is not None else None
+            if query.mode == "keyword":
+                response = await collection.query.bm25(query=query.text, **options)
+            elif query.mode == "hybrid":
+                response = await collection.query.hybrid(
+                    query=query.text, vector=list(query.vector) if query.vector is not None else None,
+                    alpha=query.alpha, **options
+                )
+            elif query.vector is not None:
+                response = await collection.query.near_vector(near_vector=list(query.vector), distance=distance, **options)
+            else:
+                response = await collection.query.near_text(query=query.text, distance=distance, **options)
+
+        results = []
+        for o in response.objects:
+            if o.metadata.distance is not None:
+                score = 1 - o.metadata.distance
+            else:
+                score = o.metadata.score or 0.0
+            vector = o.vector.get("default") if isinstance(o.vector, dict) else o.vector
+            results.append(_search_result(o.properties, str(o.uuid), score, vector if query.include_vectors else None))
+        return results
+
+    async def write_chunks(self, collection: str, records: List[ChunkRecord]) -> List[ChunkWriteError]:
+        async with self.pool.client() as client:
+            response = await client.collections.get(collection).data.insert_many([
+                wvc.data.DataObject(
+                    properties=record.properties(),
+                    uuid=record.uuid,
+                    vector=list(record.vector) if record.vector is not None else None
+                )
+                for record in records
+            ])
+        return [
+            ChunkWriteError(records[index].uuid, records[index].chunk_index, error.message)
+            for index, error in response.errors.items()
+        ]
+
+    async def delete_chunks(self, collection: str, uuids: Sequence[str]) -> int:
+        if not uuids:
+            return 0
+        async with self.pool.client() as client:
+            result = await client.collections.get(collection).data.delete_many(
+                where=wvc.query.Filter.by_id().contains_any(list(uuids))
+            )
+        return result.successful
+
+    async def close(self):
+        await self.pool.close()
+
+
+@dataclass
+class _CacheEntry:
+    results: List[Dict[str, Any]]
+    generation: int
+    stored_at: float
+
+
+@dataclass
+class _CacheStats:
+    hits: int = 0
+    misses: int = 0
+    shared: int = 0
+    stale: int = 0
+    errors: int = 0
+    invalidations: Dict[str, int] = field(default_factory=dict)
+
+
+class CachingVectorStore:
+    """Query-result cache, request sharing and concurrent multi-query in front of an AsyncVectorStore"""
+
+    def __init__(
+        self,
+        store: AsyncVectorStore,
+        embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+        max_entries: int = 2048,
+        ttl_seconds: float = 300.0,
+        max_concurrency: int = 8,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the cache layer.
+
+        Args:
+            store: The store queries go to
+            embed: Optional texts -> vectors function for text and hybrid queries (run in a worker thread)
+            max_entries: Cached query results kept (LRU)
+            ttl_seconds: Bound on staleness for writes made outside this layer (e.g. by another process)
+            max_concurrency: Queries search_many runs at once
+            clock: Time source
+        """
+        self.store = store
+        self.embed = embed
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl_seconds
+        self.max_concurrency = max(1, max_concurrency)
+        self.clock = clock
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._inflight: Dict[Tuple[str, int], asyncio.Task] = {}
+        self._stats = _CacheStats()
+
+    def generation(self, collection: str) -> int:
+        return self._generations.get(collection, 0)
+
+    def invalidate(self, collection: str = COLLECTION_NAME):
+        """Bump the collection's write generation; cached results for it stop being served"""
+        self._generations[collection] = self.generation(collection) + 1
+        self._stats.invalidations[collection] = self._stats.invalidations.get(collection, 0) + 1
+
+    async def search(self, query: VectorQuery) -> List[Dict[str, Any]]:
+        """Search through the cache. Failed searches are logged, return [] and are not cached."""
+        if query.mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode {query.mode!r}; expected one of {SEARCH_MODES}")
+        key = query.cache_key()
+        generation = self.generation(query.collection)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.generation == generation and self.clock() - entry.stored_at < self.ttl:
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                return [dict(r) for r in entry.results]
+            self._stats.stale += 1
+            del self._entries[key]
+
+        task = self._inflight.get((key, generation))
+        if task is None:
+            self._stats.misses += 1
+            task = asyncio.create_task(self._fetch(key, generation, query))
+            self._inflight[(key, generation)] = task
+            task.add_done_callback(lambda _: self._inflight.pop((key, generation), None))
+        else:
+            self._stats.shared += 1
+        # Shielded, so one cancelled caller does not cancel the request others wait on
+        results = await asyncio.shield(task)
+        return [dict(r) for r in results]
+
+    async def _fetch(self, key: str, generation: int, query: VectorQuery) -> List[Dict[str, Any]]:
+        try:
+            if self.embed is not None and query.vector is None and query.text and query.mode in ("text", "hybrid"):
+                vectors = await asyncio.to_thread(self.embed, [query.text])
+                query = replace(query, vector=tuple(float(x) for x in np.asarray(vectors)[0]))
+            results = await self.store.search(query)
+        except Exception as e:
+            self._stats.errors += 1
+            logger.error(f"Vector search in {query.collection} failed: {e}")
+            return []
+
+        if self.generation(query.collection) == generation:
+            self._entries[key] = _CacheEntry(results, generation, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return results
+
+    async def search_many(self, queries: Sequence[VectorQuery]) -> List[List[Dict[str, Any]]]:
+        """Run several queries concurrently (at most max_concurrency at once); results in query order"""
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(query: VectorQuery) -> List[Dict[str, Any]]:
+            async with slots:
+                return await self.search(query)
+
+        return list(await asyncio.gather(*(run(q) for q in queries)))
+
+    async def search_collections(self, query: VectorQuery, collections: Sequence[str]) -> List[Dict[str, Any]]:
+        """The same query over several collections, merged by score; each result records its collection"""
+        per_collection = await self.search_many([replace(query, collection=c) for c in collections])
+        merged = [
+            {**result, "collection": collection}
+            for collection, results in zip(collections, per_collection)
+            for result in results
+        ]
+        merged.sort(key=lambda r: -r["score"])
+        return merged[:query.limit]
+
+    async def write_chunks(self, records: List[ChunkRecord], collection: str = COLLECTION_NAME) -> List[ChunkWriteError]:
+        try:
+            return await self.store.write_chunks(collection, records)
+        finally:
+            self.invalidate(collection)
+
+    async def delete_chunks(self, uuids: Sequence[str], collection: str = COLLECTION_NAME) -> int:
+        try:
+            return await self.store.delete_chunks(collection, uuids)
+        finally:
+            self.invalidate(collection)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {
+            "hits": self._stats.hits,
+            "misses": self._stats.misses,
+            "shared": self._stats.shared,
+            "stale": self._stats.stale,
+            "errors": self._stats.errors,
+            "invalidations": dict(self._stats.invalidations),
+            "size": len(self._entries),
+            "in_flight": len(self._inflight),
+            "store": type(self.store).__name__
+        }
+        pool = getattr(self.store, "pool", None)
+        if pool is not None:
+            stats["pool"] = pool.get_stats()
+        return stats
+
+    async def close(self):
+        await self.store.close()
+
+
+_store: Optional[CachingVectorStore] = None
+_store_lock = threading.Lock()
+
+
+def _embed_query(texts: List[str]) -> np.ndarray:
+    """Query embedding with the ingestion model; runs in CachingVectorStore's worker thread"""
+    from dryad.infrastructure.ingestion import get_embedder
+    embed = get_embedder()
+    if embed is None:
+        raise RuntimeError("RAG_EMBEDDING_MODEL is set but the embedding model could not be loaded")
+    return embed(texts)
+
+
+def get_async_vector_store() -> CachingVectorStore:
+    """
+    Process-wide async vector store, configured from settings: Weaviate through
+    its async client when the client library is installed, otherwise the
+    in-memory store that ingestion falls back to.
+
+    Building it does no I/O. Connections are opened by the pool on the first
+    search, so an unreachable Weaviate fails that search (logged, no results)
+    and retrieval degrades to an answer without context, independently of
+    whether ingestion can reach the store. Text queries are embedded with the
+    ingestion model when RAG_EMBEDDING_MODEL is set; it is loaded on the first
+    such query, in a worker thread.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from dryad.core.config import settings
+                pool_size = getattr(settings, "VECTOR_STORE_POOL_SIZE", 4)
+                if WEAVIATE_AVAILABLE:
+                    store = WeaviateAsyncVectorStore(
+                        url=getattr(settings, "WEAVIATE_URL", "http://localhost:8080"),
+                        api_key=getattr(settings, "WEAVIATE_API_KEY", None),
+                        pool_size=pool_size,
+                        acquire_timeout=getattr(settings, "VECTOR_STORE_POOL_TIMEOUT_SECONDS", 10.0)
+                    )
+                else:
+                    store = InMemoryAsyncVectorStore({COLLECTION_NAME: get_in_memory_vector_store()})
+                _store = CachingVectorStore(
+                    store,
+                    embed=_embed_query if getattr(settings, "RAG_EMBEDDING_MODEL", None) else None,
+                    max_entries=getattr(settings, "VECTOR_QUERY_CACHE_SIZE", 2048),
+                    ttl_seconds=getattr(settings, "VECTOR_QUERY_CACHE_TTL_SECONDS", 300.0),
+                    max_concurrency=pool_size * 2
+                )
+    return _store
@@ -0,0 +1,369 @@
+"""
+Batched document ingestion into the vector store.
+
+Chunk-by-chunk ingestion paid one embedding call and one insert round trip
+per chunk. IngestionPipeline instead:
+
+1. Splits the text lazily (iter_chunks), so a large document is never held
+   as a list of chunks.
+2. Groups chunks into batches and embeds each batch in a bounded worker
+   pool. At most max_pending_batches batches are in flight, so splitting
+   waits for the embedders rather than running ahead of them.
+3. Hands embedded batches to one writer thread, which upserts them through
+   the store's batch API (Weaviate dynamic batching, or the in-memory store)
+   and collects per-object errors.
+4. Keys every chunk by a UUID derived from its document, content hash and
+   properties. Re-ingesting a document skips chunks that are already stored
+   and deletes the ones that are no longer part of it, so changed metadata
+   rewrites every chunk.
+
+Chunks carry the document's title, content type and filterable metadata as
+properties, so searches can filter on them without a join to the document.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence, Set
+
+import numpy as np
+
+from dryad.core.exceptions import ExternalServiceException
+from dryad.infrastructure.vector_store import (
+    WEAVIATE_AVAILABLE, ChunkRecord, ChunkWriteError, VectorStoreService, filterable_metadata,
+    get_in_memory_vector_store
+)
+
+logger = logging.getLogger(__name__)
+
+# Namespace for chunk UUIDs (uuid5 over document id and content hash)
+CHUNK_NAMESPACE = uuid.UUID("5d1c3a0e-6f0b-4c47-9a55-2a9f1f6a8e21")
+
+
+class ChunkStore(Protocol):
+    """The chunk API shared by VectorStoreService and InMemoryVectorStore"""
+
+    def chunk_ids(self, document_id: str) -> Set[str]: ...
+
+    def write_chunks(self, records: List[ChunkRecord]) -> List[ChunkWriteError]: ...
+
+    def delete_chunks(self, uuids: Sequence[str]) -> int: ...
+
+
+def iter_chunks(text: str, chunk_size: int = 1000, overlap: int = 200) -> Iterator[str]:
+    """
+    Yield overlapping chunks of text, preferring to end each chunk at a sentence
+    end, or failing that a space, in the last part of the window.
+    """
+    if overlap >= chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+    if len(text) <= chunk_size:
+        if text.strip():
+            yield text.strip()
+        return
+
+    start = 0
+    while start < len(text):
+        end = start + chunk_size
+        if end < len(text):
+            window_start = max(start + chunk_size // 2, end - 100)
+            sentence_end = max(text.rfind(mark, window_start, end) for mark in ".!?")
+            if sentence_end >= 0:
+                end = sentence_end + 1
+            else:
+                space = text.rfind(" ", max(start + chunk_size // 2, end - 50), end)
+                if space >= 0:
+                    end = space
+
+        chunk = text[start:end].strip()
+        if chunk:
+            yield chunk
+        if end >= len(text):
+            return
+        start = max(end - overlap, start + 1)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_uuid(document_id: str, digest: str, properties_digest: str = "") -> str:
+    key = f"{document_id}:{digest}:{properties_digest}" if properties_digest else f"{document_id}:{digest}"
+    return str(uuid.uuid5(CHUNK_NAMESPACE, key))
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@dataclass
+class IngestionReport:
+    """Outcome of ingesting one document"""
+    document_id: str
+    chunks: int = 0
+    written: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    embed_batches: int = 0
+    seconds: float = 0.0
+    errors: List[ChunkWriteError] = field(default_factory=list)
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "failed": len(self.errors), "chunks_per_second": self.chunks_per_second}
+
+
+class IngestionPipeline:
+    """Streams a document into a ChunkStore with batched, concurrent embedding and batched writes"""
+
+    def __init__(
+        self,
+        store: ChunkStore,
+        embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+        chunk_size: int = 1000,
+        overlap: int = 200,
+        embed_batch_size: int = 64,
+        max_workers: int = 4,
+        max_pending_batches: Optional[int] = None
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            store: Where chunks are written
+            embed: Optional texts -> (n, dim) vectors function; without it the store vectorizes (or keeps no vectors)
+            chunk_size: Characters per chunk
+            overlap: Characters shared by consecutive chunks
+            embed_batch_size: Chunks per embedding call and per write
+            max_workers: Embedding threads
+            max_pending_batches: Batches embedded or waiting to be written at once (default 2 * max_workers)
+        """
+        self.store = store
+        self.embed = embed
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.max_workers = max(1, max_workers)
+        self.max_pending_batches = max_pending_batches or 2 * self.max_workers
+        self._embed_executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingest-embed")
+        # One writer: batch writers are not safe to share across threads, and one
+        # dynamic batch at a time already keeps the server busy
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-write")
+
+    def records(
+        self,
+        document_id: str,
+        text: str,
+        source: str = "unknown",
+        title: str = "",
+        content_type: str = "text/plain",
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Iterator[ChunkRecord]:
+        """Chunk records for a document, in order, produced lazily"""
+        metadata = filterable_metadata(metadata)
+        properties_digest = ""
+        if title or content_type != "text/plain" or metadata:
+            properties_digest = content_hash(json.dumps([source, title, content_type, metadata], sort_keys=True))
+        for index, chunk in enumerate(iter_chunks(text, self.chunk_size, self.overlap)):
+            digest = content_hash(chunk)
+            yield ChunkRecord(
+                uuid=chunk_uuid(document_id, digest, properties_digest),
+                document_id=document_id,
+                chunk_index=index,
+                content=chunk,
+                content_hash=digest,
+                source=source,
+                title=title,
+                content_type=content_type,
+                metadata=dict(metadata)
+            )
+
+    async def ingest(
+        self,
+        document_id: str,
+        text: str,
+        source: str = "unknown",
+        title: str = "",
+        content_type: str = "text/plain",
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> IngestionReport:
+        """
+        Ingest (or re-ingest) a document.
+
+        Args:
+            document_id: Document the chunks belong to
+            text: Full document text
+            source: Source label stored with each chunk (e.g. the title)
+            title: Document title stored with each chunk
+            content_type: Document MIME type stored with each chunk
+            metadata: Document metadata; its filterable entries are stored as chunk properties
+
+        Returns:
+            IngestionReport with counts, timing and per-chunk errors
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        report = IngestionReport(document_id=document_id)
+
+        stored = await loop.run_in_executor(self._write_executor, self.store.chunk_ids, document_id)
+        seen: Set[str] = set()
+        slots = asyncio.Semaphore(self.max_pending_batches)
+        tasks: List[asyncio.Task] = []
+
+        async def process(batch: List[ChunkRecord]):
+            try:
+                if self.embed is not None:
+                    report.embed_batches += 1
+                    try:
+                        vectors = await loop.run_in_executor(
+                            self._embed_executor, self.embed, [r.content for r in batch]
+                        )
+                    except Exception as e:
+                        logger.error(f"Embedding {len(batch)} chunks of {document_id} failed: {e}")
+                        report.errors.extend(ChunkWriteError(r.uuid, r.chunk_index, f"embedding failed: {e}") for r in batch)
+                        return
+                    for record, vector in zip(batch, np.asarray(vectors, dtype=np.float32)):
+                        record.vector = vector.tolist()
+                errors = await loop.run_in_executor(self._write_executor, self.store.write_chunks, batch)
+                report.errors.extend(errors)
+                report.written += len(batch) - len(errors)
+            finally:
+                slots.release()
+
+        try:
+            records = self.records(document_id, text, source, title, content_type, metadata)
+            for batch in _batched(records, self.embed_batch_size):
+                report.chunks += len(batch)
+                fresh = []
+                for record in batch:
+                    if record.uuid in seen or record.uuid in stored:
+                        report.unchanged += 1
+                    else:
+                        fresh.append(record)
+                    seen.add(record.uuid)
+                if fresh:
+                    await slots.acquire()
+                    tasks.append(asyncio.create_task(process(fresh)))
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        stale = sorted(stored - seen)
+        if stale:
+            report.deleted = await loop.run_in_executor(self._write_executor, self.store.delete_chunks, stale)
+
+        report.seconds = time.perf_counter() - started
+        if report.errors:
+            logger.warning(f"Ingested {document_id} with {len(report.errors)} failed chunk(s)")
+        logger.info(
+            f"Ingested {document_id}: {report.chunks} chunks, {report.written} written, "
+            f"{report.unchanged} unchanged, {report.deleted} deleted in {report.seconds:.2f}s"
+        )
+        return report
+
+    def close(self):
+        self._embed_executor.shutdown(wait=True)
+        self._write_executor.shutdown(wait=True)
+
+
+_pipeline: Optional[IngestionPipeline] = None
+_pipeline_lock = threading.Lock()
+_embedder: Optional[Callable[[List[str]], np.ndarray]] = None
+_embedder_loaded = False
+_embedder_lock = threading.Lock()
+
+
+def _load_embedder(model_name: str) -> Optional[Callable[[List[str]], np.ndarray]]:
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.warning("RAG_EMBEDDING_MODEL is set but sentence-transformers is not installed; chunks are stored without vectors")
+        return None
+    model = SentenceTransformer(model_name)
+    return lambda texts: model.encode(texts, batch_size=len(texts), normalize_embeddings=True)
+
+
+def get_embedder() -> Optional[Callable[[List[str]], np.ndarray]]:
+    """
+    Process-wide texts -> vectors function for RAG_EMBEDDING_MODEL, or None when
+    no model is configured or sentence-transformers is missing. Ingestion and
+    query embedding share it, so the model is loaded once. Loading is blocking;
+    async callers call this from a worker thread.
+    """
+    global _embedder, _embedder_loaded
+    if not _embedder_loaded:
+        with _embedder_lock:
+            if not _embedder_loaded:
+                from dryad.core.config import settings
+                model_name = getattr(settings, "RAG_EMBEDDING_MODEL", None)
+                _embedder = _load_embedder(model_name) if model_name else None
+                _embedder_loaded = True
+    return _embedder
+
+
+def get_chunk_store() -> ChunkStore:
+    """
+    The Weaviate store, or the in-memory store when weaviate-client is not installed.
+
+    An installed client that cannot reach Weaviate raises instead of falling
+    back: chunks written to process memory would be invisible to every other
+    worker and lost on restart. Nothing is cached on failure, so the next
+    call checks again.
+    """
+    if not WEAVIATE_AVAILABLE:
+        logger.warning("weaviate-client not installed; ingesting into the in-memory vector store")
+        return get_in_memory_vector_store()
+
+    from dryad.core.config import settings
+    url = getattr(settings, "WEAVIATE_URL", "http://localhost:8080")
+    store = VectorStoreService(url=url, api_key=getattr(settings, "WEAVIATE_API_KEY", None))
+    try:
+        ready = store.client is not None and store.client.is_ready()
+    except Exception as e:
+        logger.error(f"Weaviate readiness check failed: {e}")
+        ready = False
+    if not ready:
+        store.close()
+        raise ExternalServiceException(
+            service_name="weaviate",
+            error_message=f"Weaviate at {url} is unavailable; documents cannot be ingested",
+            affected_capabilities=["document_ingestion", "semantic_search"]
+        )
+    store.ensure_schema()
+    return store
+
+
+def get_ingestion_pipeline() -> IngestionPipeline:
+    """Process-wide ingestion pipeline, configured from settings"""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                from dryad.core.config import settings
+                _pipeline = IngestionPipeline(
+                    store=get_chunk_store(),
+                    embed=get_embedder(),
+                    chunk_size=getattr(settings, "RAG_CHUNK_SIZE", 1000),
+                    overlap=getattr(settings, "RAG_CHUNK_OVERLAP", 200),
+                    embed_batch_size=getattr(settings, "RAG_EMBED_BATCH_SIZE", 64),
+                    max_workers=getattr(settings, "RAG_EMBED_WORKERS", 4)
+                )
+    return _pipeline
@@ -1,9 +1,11 @@
+import re
 from typing import Optional
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import AIMessage
 
 from dryad.infrastructure.llm.providers import LLMConfig
+from dryad.infrastructure.llm.registry import HTTPClientPool, get_model_registry, model_key
 from dryad.core.config import settings
 
 class FakeListChatModel(BaseChatModel):
@@ -22,13 +24,29 @@ class FakeListChatModel(BaseChatModel):
         self.i += 1
         return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
 
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        from langchain_core.outputs import ChatGenerationChunk
+        from langchain_core.messages import AIMessageChunk
+        content = self.responses[self.i % len(self.responses)]
+        self.i += 1
+        # One chunk per word, like a provider streaming tokens
+        for token in re.findall(r"\S+\s*", content):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
     @property
     def _llm_type(self) -> str:
         return "fake-list"
 
 class LLMFactory:
     @staticmethod
-    def create_model(config: LLMConfig) -> BaseChatModel:
+    def get_model(config: LLMConfig) -> BaseChatModel:
+        """
+        Long-lived model for this configuration from the process-wide registry.
+        """
+        return get_model_registry().get(model_key(config), lambda pool: LLMFactory.create_model(config, pool))
+
+    @staticmethod
+    def create_model(config: LLMConfig, http_pool: Optional[HTTPClientPool] = None) -> BaseChatModel:
         if config.provider == "mock":
             return FakeListChatModel()
             
@@ -40,11 +58,17 @@ class LLMFactory:
                      return FakeListChatModel()
                 raise ValueError("OpenAI API Key not found")
                 
+            # Without a pool the client opens its own connections, as before
+            pooled = {}
+            if http_pool is not None:
+                pooled = {"http_client": http_pool.sync_client, "http_async_client": http_pool.async_client}
             return ChatOpenAI(
                 model=config.model_name,
                 temperature=config.temperature,
                 max_tokens=config.max_tokens,
-                api_key=api_key
+                api_key=api_key,
+                base_url=config.base_url,
+                **pooled
             )
             
         raise ValueError(f"Unsupported provider: {config.provider}")
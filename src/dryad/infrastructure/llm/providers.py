@@ -7,3 +7,4 @@ class LLMConfig(BaseModel):
     temperature: float = Field(default=0.7, ge=0.0, le=2.0)
     max_tokens: Optional[int] = Field(default=None)
     api_key: Optional[str] = Field(default=None, description="Optional override, usually from env")
+    base_url: Optional[str] = Field(default=None, description="Optional API endpoint override")
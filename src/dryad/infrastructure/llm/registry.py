@@ -0,0 +1,158 @@
+"""
+Registry of long-lived LLM clients.
+
+Building a chat model per request throws away its HTTP connection pool,
+TLS sessions and tokenizer state on every turn. The registry keeps one model
+per (provider, model, temperature, base_url, max_tokens, api key) in an LRU,
+and every model talks through one shared pair of httpx clients. Evicting a
+model only drops the model object; the pooled connections stay with the
+shared clients.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import httpx
+
+from dryad.infrastructure.llm.providers import LLMConfig
+
+logger = logging.getLogger(__name__)
+
+
+def model_key(config: LLMConfig) -> Tuple[Hashable, ...]:
+    """Registry key for a model configuration; the API key is only kept as a fingerprint"""
+    fingerprint = hashlib.sha256(config.api_key.encode()).hexdigest()[:16] if config.api_key else None
+    return (
+        config.provider,
+        config.model_name,
+        float(config.temperature),
+        config.base_url,
+        config.max_tokens,
+        fingerprint
+    )
+
+
+class HTTPClientPool:
+    """
+    One sync and one async httpx client shared by every registered model.
+
+    Clients are created lazily and recreated after close(). The async client
+    belongs to the event loop that first uses it, which in the API server is
+    the one loop serving every request.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 60.0
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = timeout
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._sync_client: Optional[httpx.Client] = None
+        self._lock = threading.Lock()
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._async_client is None or self._async_client.is_closed:
+                self._async_client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            return self._async_client
+
+    @property
+    def sync_client(self) -> httpx.Client:
+        with self._lock:
+            if self._sync_client is None or self._sync_client.is_closed:
+                self._sync_client = httpx.Client(limits=self.limits, timeout=self.timeout)
+            return self._sync_client
+
+    async def aclose(self):
+        with self._lock:
+            async_client, self._async_client = self._async_client, None
+            sync_client, self._sync_client = self._sync_client, None
+        if async_client is not None:
+            await async_client.aclose()
+        if sync_client is not None:
+            sync_client.close()
+
+
+class ModelRegistry:
+    """LRU of built models, keyed by model_key(); builders receive the shared HTTPClientPool"""
+
+    def __init__(self, max_size: int = 32, pool: Optional[HTTPClientPool] = None):
+        self.max_size = max(1, max_size)
+        self.pool = pool or HTTPClientPool()
+        self._models: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: Hashable, build: Callable[[HTTPClientPool], Any]) -> Any:
+        """Return the model registered under key, building and registering it on a miss"""
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self._stats["hits"] += 1
+                return model
+            self._stats["misses"] += 1
+
+        # Build outside the lock; if two callers race, the first registered model wins
+        model = build(self.pool)
+        with self._lock:
+            existing = self._models.get(key)
+            if existing is not None:
+                self._models.move_to_end(key)
+                return existing
+            self._models[key] = model
+            while len(self._models) > self.max_size:
+                evicted, _ = self._models.popitem(last=False)
+                self._stats["evictions"] += 1
+                logger.debug(f"Evicted LLM client {evicted[:2]}")
+        return model
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one model, or every model when key is None"""
+        with self._lock:
+            if key is None:
+                self._models.clear()
+            else:
+                self._models.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "size": len(self._models), "max_size": self.max_size}
+
+    async def aclose(self):
+        """Drop every model and close the shared connection pool"""
+        self.invalidate()
+        await self.pool.aclose()
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Process-wide model registry, sized from settings"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from dryad.core.config import settings
+                pool = HTTPClientPool(
+                    max_connections=getattr(settings, "LLM_HTTP_MAX_CONNECTIONS", 100),
+                    max_keepalive_connections=getattr(settings, "LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20),
+                    keepalive_expiry=getattr(settings, "LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS", 60.0),
+                    timeout=getattr(settings, "LLM_HTTP_TIMEOUT_SECONDS", 60.0)
+                )
+                _registry = ModelRegistry(getattr(settings, "LLM_CLIENT_CACHE_SIZE", 32), pool)
+    return _registry
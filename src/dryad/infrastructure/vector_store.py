@@ -1,10 +1,102 @@
 import logging
-import weaviate
-import weaviate.classes as wvc
-from typing import List, Dict, Any, Optional
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+try:
+    import weaviate
+    import weaviate.classes as wvc
+    WEAVIATE_AVAILABLE = True
+except ImportError:
+    WEAVIATE_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+COLLECTION_NAME = "KnowledgeVessel"
+
+# Page size when listing a document's chunks (Weaviate caps a query at 10000 objects)
+CHUNK_PAGE_SIZE = 1000
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Properties every chunk carries; document metadata is stored next to them but cannot replace them
+CHUNK_PROPERTIES = frozenset({
+    "content", "source", "vessel_id", "document_id", "chunk_index", "content_hash", "title", "content_type"
+})
+
+_PROPERTY_NAME = re.compile(r"[_A-Za-z][_0-9A-Za-z]*")
+
+
+def _property_type(value: Any) -> Optional[str]:
+    """The Weaviate data type for a metadata value, or None if it cannot be a filterable property"""
+    if isinstance(value, bool):
+        return "BOOL"
+    if isinstance(value, int):
+        return "INT"
+    if isinstance(value, float):
+        return "NUMBER"
+    if isinstance(value, str):
+        return "TEXT"
+    if isinstance(value, (list, tuple)) and value and all(isinstance(v, str) for v in value):
+        return "TEXT_ARRAY"
+    return None
+
+
+def filterable_metadata(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    The entries of a document's metadata that can be stored as filterable chunk
+    properties: text, number and boolean values, or lists of text, under valid
+    property names. Anything else stays on the document row only.
+    """
+    properties = {}
+    for name, value in (metadata or {}).items():
+        if not isinstance(name, str) or name in CHUNK_PROPERTIES or not _PROPERTY_NAME.fullmatch(name):
+            continue
+        if _property_type(value) is not None:
+            properties[name] = list(value) if isinstance(value, (list, tuple)) else value
+    return properties
+
+
+@dataclass
+class ChunkRecord:
+    """One chunk of a document; the UUID is derived from the document and the chunk's content hash"""
+    uuid: str
+    document_id: str
+    chunk_index: int
+    content: str
+    content_hash: str
+    source: str = "unknown"
+    vector: Optional[Sequence[float]] = None
+    title: str = ""
+    content_type: str = "text/plain"
+    # Filterable document metadata (see filterable_metadata), stored as top-level properties
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def properties(self) -> Dict[str, Any]:
+        return {
+            **self.metadata,
+            "content": self.content,
+            "source": self.source,
+            "document_id": self.document_id,
+            "chunk_index": self.chunk_index,
+            "content_hash": self.content_hash,
+            "title": self.title,
+            "content_type": self.content_type
+        }
+
+
+@dataclass
+class ChunkWriteError:
+    """A chunk the store rejected, with the reason it gave"""
+    uuid: str
+    chunk_index: int
+    message: str
+
+
 class VectorStoreService:
     """
     Interface for Vector Database (Weaviate).
@@ -12,6 +104,12 @@ class VectorStoreService:
     def __init__(self, url: str = "http://localhost:8080", api_key: Optional[str] = None):
         self.url = url
         self.client = None
+        # Property names known to exist in the collection (filled by ensure_schema)
+        self._schema_properties: Set[str] = set()
+
+        if not WEAVIATE_AVAILABLE:
+            logger.warning("⚠️ weaviate-client not installed. Vector Store will be unavailable.")
+            return
         
         try:
              # Connect to Weaviate
@@ -46,27 +144,48 @@ class VectorStoreService:
             logger.warning(f"⚠️ Weaviate connection failed: {e}. Vector Store will be unavailable.")
             self.client = None
 
-    def ensure_schema(self):
+    def ensure_schema(self, metadata: Optional[Dict[str, Any]] = None):
         """
         Create KnowledgeVessel collection if not exists.
+        Properties missing from an existing collection, including one per
+        filterable metadata entry in metadata, are added to it.
         """
         if not self.client:
             return
 
         try:
-            if not self.client.collections.exists("KnowledgeVessel"):
+            if not self.client.collections.exists(COLLECTION_NAME):
                 self.client.collections.create(
-                    name="KnowledgeVessel",
+                    name=COLLECTION_NAME,
                     properties=[
                         wvc.config.Property(name="content", data_type=wvc.config.DataType.TEXT),
                         wvc.config.Property(name="source", data_type=wvc.config.DataType.TEXT),
                         wvc.config.Property(name="vessel_id", data_type=wvc.config.DataType.UUID),
+                        # Document chunks (see write_chunks)
+                        wvc.config.Property(name="document_id", data_type=wvc.config.DataType.TEXT),
+                        wvc.config.Property(name="chunk_index", data_type=wvc.config.DataType.INT),
+                        wvc.config.Property(name="content_hash", data_type=wvc.config.DataType.TEXT),
+                        wvc.config.Property(name="title", data_type=wvc.config.DataType.TEXT),
+                        wvc.config.Property(name="content_type", data_type=wvc.config.DataType.TEXT),
                     ],
                     # Configure vectorizer if we want Weaviate to embed, 
                     # or 'image' if multimodal. For now explicit user-provided vectors often safer
                     # or configure 'text2vec-openai' module if present in Weaviate.
                 )
                 logger.info("✅ KnowledgeVessel schema created.")
+
+            collection = self.client.collections.get(COLLECTION_NAME)
+            if not self._schema_properties:
+                self._schema_properties = {p.name for p in collection.config.get().properties}
+            wanted = {"title": "", "content_type": "", **filterable_metadata(metadata)}
+            for name, value in wanted.items():
+                if name in self._schema_properties:
+                    continue
+                collection.config.add_property(
+                    wvc.config.Property(name=name, data_type=getattr(wvc.config.DataType, _property_type(value)))
+                )
+                self._schema_properties.add(name)
+                logger.info(f"Added property {name} to the {COLLECTION_NAME} schema")
         except Exception as e:
              logger.error(f"Failed to ensure schema: {e}")
 
@@ -79,7 +198,7 @@ class VectorStoreService:
             return
 
         try:
-            collection = self.client.collections.get("KnowledgeVessel")
+            collection = self.client.collections.get(COLLECTION_NAME)
             collection.data.insert(
                 properties={
                     "content": content,
@@ -90,6 +209,89 @@ class VectorStoreService:
         except Exception as e:
             logger.error(f"Failed to add document: {e}")
 
+    def chunk_ids(self, document_id: str) -> Set[str]:
+        """
+        UUIDs of the chunks stored for a document.
+        """
+        if not self.client:
+            return set()
+
+        try:
+            collection = self.client.collections.get(COLLECTION_NAME)
+            ids: Set[str] = set()
+            offset = 0
+            while True:
+                response = collection.query.fetch_objects(
+                    filters=wvc.query.Filter.by_property("document_id").equal(document_id),
+                    return_properties=["chunk_index"],
+                    limit=CHUNK_PAGE_SIZE,
+                    offset=offset
+                )
+                ids.update(str(o.uuid) for o in response.objects)
+                if len(response.objects) < CHUNK_PAGE_SIZE:
+                    return ids
+                offset += CHUNK_PAGE_SIZE
+        except Exception as e:
+            logger.error(f"Failed to list chunks for document {document_id}: {e}")
+            return set()
+
+    def write_chunks(self, records: List[ChunkRecord]) -> List[ChunkWriteError]:
+        """
+        Upsert chunks through the batch API.
+        Dynamic batching sizes each request from the server's queue length; objects
+        the server rejects come back as ChunkWriteErrors instead of failing the batch.
+        """
+        if not self.client:
+            return [ChunkWriteError(r.uuid, r.chunk_index, "Vector store unavailable") for r in records]
+
+        metadata = {}
+        for record in records:
+            metadata.update(record.metadata)
+        if metadata.keys() - self._schema_properties:
+            self.ensure_schema(metadata)
+
+        try:
+            collection = self.client.collections.get(COLLECTION_NAME)
+            with collection.batch.dynamic() as batch:
+                for record in records:
+                    batch.add_object(
+                        properties=record.properties(),
+                        uuid=record.uuid,
+                        vector=list(record.vector) if record.vector is not None else None
+                    )
+            failed = collection.batch.failed_objects
+        except Exception as e:
+            logger.error(f"Batch write of {len(records)} chunks failed: {e}")
+            return [ChunkWriteError(r.uuid, r.chunk_index, str(e)) for r in records]
+
+        by_uuid = {r.uuid: r for r in records}
+        errors = []
+        for failure in failed:
+            uuid = str(failure.object_.uuid)
+            record = by_uuid.get(uuid)
+            errors.append(ChunkWriteError(uuid, record.chunk_index if record else -1, failure.message))
+        return errors
+
+    def delete_chunks(self, uuids: Sequence[str]) -> int:
+        """
+        Delete chunks by UUID. Returns how many were deleted.
+        """
+        if not self.client or not uuids:
+            return 0
+
+        try:
+            collection = self.client.collections.get(COLLECTION_NAME)
+            deleted = 0
+            for start in range(0, len(uuids), CHUNK_PAGE_SIZE):
+                result = collection.data.delete_many(
+                    where=wvc.query.Filter.by_id().contains_any(list(uuids[start:start + CHUNK_PAGE_SIZE]))
+                )
+                deleted += result.successful
+            return deleted
+        except Exception as e:
+            logger.error(f"Failed to delete {len(uuids)} chunks: {e}")
+            return 0
+
     def search(self, query: str, limit: int = 3) -> List[Dict[str, Any]]:
         """
         Semantic search.
@@ -99,7 +301,7 @@ class VectorStoreService:
             return []
 
         try:
-            collection = self.client.collections.get("KnowledgeVessel")
+            collection = self.client.collections.get(COLLECTION_NAME)
             response = collection.query.near_text(
                 query=query,
                 limit=limit
@@ -120,3 +322,175 @@ class VectorStoreService:
     def close(self):
         if self.client:
             self.client.close()
+
+
+class InMemoryVectorStore:
+    """
+    Process-local chunk store with the same chunk API as VectorStoreService.
+    Used as the fallback when Weaviate is unavailable.
+    """
+    def __init__(self):
+        self._objects: Dict[str, ChunkRecord] = {}
+        self._by_document: Dict[str, Set[str]] = {}
+        self._terms: Dict[str, Counter] = {}
+        self._document_frequency: Counter = Counter()
+        self._dimensions: Optional[int] = None
+        # (records, unit-normalized matrix) for vector search, rebuilt after writes
+        self._matrix: Optional[Tuple[List[ChunkRecord], np.ndarray]] = None
+        self._lock = threading.Lock()
+
+    def chunk_ids(self, document_id: str) -> Set[str]:
+        with self._lock:
+            return set(self._by_document.get(document_id, ()))
+
+    def write_chunks(self, records: List[ChunkRecord]) -> List[ChunkWriteError]:
+        """
+        Upsert chunks; like a Weaviate batch, invalid objects are reported and the rest are written.
+        """
+        errors = []
+        with self._lock:
+            for record in records:
+                if not record.content:
+                    errors.append(ChunkWriteError(record.uuid, record.chunk_index, "empty content"))
+                    continue
+                if record.vector is not None:
+                    if self._dimensions is None:
+                        self._dimensions = len(record.vector)
+                    elif len(record.vector) != self._dimensions:
+                        errors.append(ChunkWriteError(
+                            record.uuid, record.chunk_index,
+                            f"vector has {len(record.vector)} dimensions, collection has {self._dimensions}"
+                        ))
+                        continue
+                self._remove(record.uuid)
+                self._objects[record.uuid] = record
+                self._by_document.setdefault(record.document_id, set()).add(record.uuid)
+                terms = Counter(_tokens(record.content))
+                self._terms[record.uuid] = terms
+                self._document_frequency.update(terms.keys())
+            self._matrix = None
+        return errors
+
+    def delete_chunks(self, uuids: Sequence[str]) -> int:
+        deleted = 0
+        with self._lock:
+            for uuid in uuids:
+                deleted += self._remove(uuid)
+            self._matrix = None
+        return deleted
+
+    def _remove(self, uuid: str) -> int:
+        record = self._objects.pop(uuid, None)
+        if record is None:
+            return 0
+        self._by_document.get(record.document_id, set()).discard(uuid)
+        self._document_frequency.subtract(self._terms.pop(uuid, {}).keys())
+        return 1
+
+    def _result(self, record: ChunkRecord, score: float, include_vector: bool) -> Dict[str, Any]:
+        result = {"id": record.uuid, **record.properties(), "score": score}
+        if include_vector and record.vector is not None:
+            result["vector"] = list(record.vector)
+        return result
+
+    def search_vector(
+        self,
+        vector: Sequence[float],
+        limit: int = 3,
+        filters: Optional[Dict[str, Any]] = None,
+        include_vector: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Brute-force cosine search over chunks that have vectors.
+        filters match properties by equality (a list value matches any of its items).
+        """
+        with self._lock:
+            if self._matrix is None:
+                records = [r for r in self._objects.values() if r.vector is not None]
+                matrix = np.asarray([r.vector for r in records], dtype=np.float32).reshape(len(records), -1)
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                self._matrix = (records, matrix / np.where(norms == 0, 1.0, norms))
+            records, matrix = self._matrix
+        if not records:
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        scores = (matrix @ query) / (np.linalg.norm(query) or 1.0)
+        order = np.argsort(-scores)
+        if not filters:
+            order = order[:limit]
+        results = []
+        for i in order:
+            if filters and not _matches(records[i], filters):
+                continue
+            results.append(self._result(records[i], float(scores[i]), include_vector))
+            if len(results) == limit:
+                break
+        return results
+
+    def search_keyword(
+        self,
+        text: str,
+        limit: int = 3,
+        filters: Optional[Dict[str, Any]] = None,
+        include_vector: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        BM25-style keyword search (term frequency saturation and inverse document frequency, no length norm).
+        """
+        query_terms = set(_tokens(text))
+        with self._lock:
+            total = len(self._objects)
+            idf = {
+                term: np.log(1 + (total - self._document_frequency[term] + 0.5) / (self._document_frequency[term] + 0.5))
+                for term in query_terms if self._document_frequency[term] > 0
+            }
+            scored = []
+            for uuid, terms in self._terms.items():
+                score = sum(terms[t] * 2.2 / (terms[t] + 1.2) * weight for t, weight in idf.items() if t in terms)
+                if score > 0 and (not filters or _matches(self._objects[uuid], filters)):
+                    scored.append((score, self._objects[uuid]))
+        scored.sort(key=lambda item: -item[0])
+        return [self._result(record, float(score), include_vector) for score, record in scored[:limit]]
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._objects)
+
+    def close(self):
+        pass
+
+
+def _tokens(text: str) -> List[str]:
+    return _TERM_PATTERN.findall(text.lower())
+
+
+def _matches(record: ChunkRecord, filters: Dict[str, Any]) -> bool:
+    properties = record.properties()
+    for name, expected in filters.items():
+        value = properties.get(name)
+        if isinstance(value, list):
+            # Array properties match when they contain the value (or any of the values)
+            wanted = expected if isinstance(expected, (list, tuple, set, frozenset)) else (expected,)
+            if not any(item in value for item in wanted):
+                return False
+        elif isinstance(expected, (list, tuple, set, frozenset)):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+_in_memory_store: Optional[InMemoryVectorStore] = None
+_in_memory_store_lock = threading.Lock()
+
+
+def get_in_memory_vector_store() -> InMemoryVectorStore:
+    """The process-wide in-memory fallback store, shared by ingestion and search"""
+    global _in_memory_store
+    if _in_memory_store is None:
+        with _in_memory_store_lock:
+            if _in_memory_store is None:
+                _in_memory_store = InMemoryVectorStore()
+    return _in_memory_store
@@ -4,11 +4,12 @@ Sends bidirectional communication updates to Microsoft Teams channel.
 """
 
 import os
-import httpx
-from typing import Dict, Any, Optional
+from collections import Counter
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
-from app.core.logging_config import get_logger
+from dryad.core.logging_config import get_logger
+from dryad.integrations.notification_dispatcher import Notification, NotificationDispatcher
 
 logger = get_logger(__name__)
 
@@ -24,20 +25,77 @@ class DRYADTeamsNotifier:
     - Webhook instruction executed
     - Integration milestones
     - Errors and warnings
+    
+    Cards are handed to a background NotificationDispatcher, so callers never
+    wait on Teams. Bursts for the same client within the coalescing window are
+    sent as a single digest card.
     """
     
-    def __init__(self, webhook_url: Optional[str] = None):
+    # Most recent events listed on a digest card
+    DIGEST_MAX_EVENTS = 20
+    
+    def __init__(
+        self,
+        webhook_url: Optional[str] = None,
+        coalesce_window: Optional[float] = None,
+        max_queue_size: Optional[int] = None,
+        spool_path: Optional[str] = None,
+        **dispatcher_options
+    ):
         """
         Initialize DRYAD Teams notifier.
         
         Args:
             webhook_url: Teams incoming webhook URL for DRYAD channel
+            coalesce_window: Seconds to collect a client's events into one card
+                (DRYAD_TEAMS_COALESCE_WINDOW, default 2.0)
+            max_queue_size: Maximum undelivered notifications
+                (DRYAD_TEAMS_QUEUE_SIZE, default 1000)
+            spool_path: File that keeps undelivered notifications across restarts
+                (DRYAD_TEAMS_SPOOL_PATH, default ./dryad_teams_spool.jsonl; empty disables)
+            **dispatcher_options: Passed through to NotificationDispatcher
         """
         self.webhook_url = webhook_url or os.getenv("DRYAD_TEAMS_WEBHOOK_URL")
         self.enabled = bool(self.webhook_url)
+        self.dispatcher: Optional[NotificationDispatcher] = None
         
         if not self.enabled:
             logger.warning("DRYAD Teams notifications disabled: DRYAD_TEAMS_WEBHOOK_URL not configured")
+            return
+        
+        if spool_path is None:
+            spool_path = os.getenv("DRYAD_TEAMS_SPOOL_PATH", "./dryad_teams_spool.jsonl")
+        self.dispatcher = NotificationDispatcher(
+            self.webhook_url,
+            digest_builder=self._build_digest_card,
+            coalesce_window=coalesce_window if coalesce_window is not None
+            else float(os.getenv("DRYAD_TEAMS_COALESCE_WINDOW", "2.0")),
+            max_queue_size=max_queue_size or int(os.getenv("DRYAD_TEAMS_QUEUE_SIZE", "1000")),
+            spool_path=spool_path or None,
+            **dispatcher_options
+        )
+    
+    async def start(self):
+        """Start the background dispatcher (also started lazily on first send)."""
+        if self.dispatcher is not None:
+            await self.dispatcher.start()
+    
+    async def stop(self, timeout: float = 10.0):
+        """Deliver queued notifications and stop; undelivered ones stay spooled."""
+        if self.dispatcher is not None:
+            await self.dispatcher.stop(timeout)
+    
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Send queued notifications now instead of waiting for coalescing windows."""
+        if self.dispatcher is None:
+            return True
+        return await self.dispatcher.flush(timeout)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get dispatcher statistics."""
+        if self.dispatcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.dispatcher.get_stats()}
     
     async def send_deployment_received(self, client_id: str, deployment_data: Dict[str, Any]) -> bool:
         """
@@ -48,7 +106,7 @@ class DRYADTeamsNotifier:
             deployment_data: Deployment package data
             
         Returns:
-            True if sent successfully
+            True if queued for delivery
         """
         if not self.enabled:
             return False
@@ -90,7 +148,10 @@ class DRYADTeamsNotifier:
                 }]
             }
             
-            return await self._send_card(card, f"Deployment received from {client_id}")
+            return await self._send_card(
+                card, f"Deployment received from {client_id}", client_id, "deployment_received",
+                "📦 Deployment package received"
+            )
         
         except Exception as e:
             logger.error(f"Error sending deployment notification: {e}")
@@ -105,7 +166,7 @@ class DRYADTeamsNotifier:
             credentials: Generated credentials
             
         Returns:
-            True if sent successfully
+            True if queued for delivery
         """
         if not self.enabled:
             return False
@@ -153,7 +214,10 @@ class DRYADTeamsNotifier:
                 }]
             }
             
-            return await self._send_card(card, f"Ready package sent to {client_id}")
+            return await self._send_card(
+                card, f"Ready package sent to {client_id}", client_id, "ready_package",
+                "✅ Ready package sent"
+            )
         
         except Exception as e:
             logger.error(f"Error sending ready package notification: {e}")
@@ -168,7 +232,7 @@ class DRYADTeamsNotifier:
             webhook_url: Client's webhook URL
             
         Returns:
-            True if sent successfully
+            True if queued for delivery
         """
         if not self.enabled:
             return False
@@ -216,7 +280,10 @@ class DRYADTeamsNotifier:
                 }]
             }
             
-            return await self._send_card(card, f"Client {client_id} started")
+            return await self._send_card(
+                card, f"Client {client_id} started", client_id, "client_startup",
+                f"🚀 Webhook server started at {webhook_url}"
+            )
         
         except Exception as e:
             logger.error(f"Error sending client startup notification: {e}")
@@ -231,7 +298,7 @@ class DRYADTeamsNotifier:
             instruction: Instruction data
             
         Returns:
-            True if sent successfully
+            True if queued for delivery
         """
         if not self.enabled:
             return False
@@ -276,7 +343,10 @@ class DRYADTeamsNotifier:
                 }]
             }
             
-            return await self._send_card(card, f"Instruction sent to {client_id}")
+            return await self._send_card(
+                card, f"Instruction sent to {client_id}", client_id, "instruction_sent",
+                f"📤 {action} → {endpoint}"
+            )
         
         except Exception as e:
             logger.error(f"Error sending instruction notification: {e}")
@@ -292,7 +362,7 @@ class DRYADTeamsNotifier:
             result: Execution result
             
         Returns:
-            True if sent successfully
+            True if queued for delivery
         """
         if not self.enabled:
             return False
@@ -337,34 +407,97 @@ class DRYADTeamsNotifier:
                 }]
             }
             
-            return await self._send_card(card, f"Instruction executed by {client_id}")
+            return await self._send_card(
+                card, f"Instruction executed by {client_id}", client_id, "instruction_executed",
+                f"{'✅' if success else '❌'} {instruction.get('action', 'unknown')} ({status_code})"
+            )
         
         except Exception as e:
             logger.error(f"Error sending execution notification: {e}")
             return False
     
-    async def _send_card(self, card: Dict[str, Any], log_message: str) -> bool:
-        """Send Adaptive Card to Teams."""
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.webhook_url,
-                    json=card,
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                if response.status_code == 200:
-                    logger.info(f"✅ Teams notification sent: {log_message}")
-                    return True
-                else:
-                    logger.error(f"Failed to send Teams notification: {response.status_code}")
-                    return False
+    async def _send_card(
+        self,
+        card: Dict[str, Any],
+        log_message: str,
+        client_id: str = "dryad",
+        event: str = "notification",
+        summary: Optional[str] = None
+    ) -> bool:
+        """
+        Queue Adaptive Card for background delivery to Teams.
         
-        except Exception as e:
-            logger.error(f"Error sending Teams card: {e}")
+        Returns:
+            True if queued (delivery happens asynchronously)
+        """
+        if self.dispatcher is None:
             return False
+        if not self.dispatcher.running:
+            await self.dispatcher.start()
+        
+        queued = self.dispatcher.submit(client_id, event, summary or log_message, card)
+        if not queued:
+            logger.warning(f"Teams notification not queued: {log_message}")
+        return queued
+    
+    def _build_digest_card(self, client_id: str, notifications: List[Notification]) -> Dict[str, Any]:
+        """Build one Adaptive Card summarizing a burst of events for a client."""
+        counts = Counter(n.event for n in notifications)
+        recent = notifications[-self.DIGEST_MAX_EVENTS:]
+        facts = [
+            {"title": datetime.utcfromtimestamp(n.created_at).strftime("%H:%M:%S"), "value": n.summary}
+            for n in recent
+        ]
+        body = [
+            {
+                "type": "TextBlock",
+                "text": f"🗂️ {len(notifications)} DRYAD Updates",
+                "weight": "bolder",
+                "size": "medium",
+                "color": "accent"
+            },
+            {
+                "type": "TextBlock",
+                "text": f"Client **{client_id}**: " + ", ".join(
+                    f"{event.replace('_', ' ')} ×{count}" for event, count in counts.most_common()
+                ),
+                "wrap": True
+            },
+            {
+                "type": "FactSet",
+                "facts": facts
+            }
+        ]
+        if len(notifications) > len(recent):
+            body.append({
+                "type": "TextBlock",
+                "text": f"…and {len(notifications) - len(recent)} earlier updates",
+                "wrap": True,
+                "isSubtle": True
+            })
+        body.append({
+            "type": "TextBlock",
+            "text": datetime.utcfromtimestamp(notifications[0].created_at).strftime("%Y-%m-%d %H:%M:%S UTC")
+            + " – " + datetime.utcfromtimestamp(notifications[-1].created_at).strftime("%H:%M:%S UTC"),
+            "isSubtle": True,
+            "size": "small"
+        })
+        
+        return {
+            "type": "message",
+            "attachments": [{
+                "contentType": "application/vnd.microsoft.card.adaptive",
+                "content": {
+                    "$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
+                    "type": "AdaptiveCard",
+                    "version": "1.4",
+                    "body": body
+                }
+            }]
+        }
 
 
 # Global instance
 dryad_teams_notifier = DRYADTeamsNotifier()
+teams_notifier = dryad_teams_notifier
 
@@ -0,0 +1,521 @@
+"""
+Outbound Notification Dispatcher
+Background delivery of webhook cards: one pooled keep-alive client, a bounded
+outbound queue, per-client digest coalescing, 429-aware retries and a small
+on-disk spool so queued notifications survive restarts.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import httpx
+
+from dryad.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Notification:
+    """A single queued outbound card"""
+    client_id: str
+    event: str
+    summary: str
+    card: Dict[str, Any]
+    notification_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.notification_id,
+            "client_id": self.client_id,
+            "event": self.event,
+            "summary": self.summary,
+            "card": self.card,
+            "created_at": self.created_at
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Notification":
+        return cls(
+            client_id=data["client_id"],
+            event=data["event"],
+            summary=data["summary"],
+            card=data["card"],
+            notification_id=data["id"],
+            created_at=data["created_at"]
+        )
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header.
+
+    Args:
+        value: Header value, either delta-seconds or an HTTP-date
+
+    Returns:
+        Seconds to wait, or None if absent or unparseable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class NotificationSpool:
+    """
+    Append-only JSONL spool of undelivered notifications.
+
+    Each queued notification is written as a ``put`` record and each delivered
+    (or permanently failed) batch as an ``ack`` record. On load, un-acked puts
+    are returned for redelivery and the file is compacted; it is also compacted
+    once enough acks accumulate. Records are flushed but not fsynced, so a
+    power loss can lose the last few notifications, which is acceptable for
+    channel updates.
+    """
+
+    def __init__(self, path: str, compact_threshold: int = 1000):
+        self.path = path
+        self.compact_threshold = compact_threshold
+        self._live: Dict[str, Dict[str, Any]] = {}
+        self._acked_since_compact = 0
+        self._file = None
+
+    def load(self) -> List[Notification]:
+        """Read pending notifications left by a previous run and compact the file."""
+        self._live.clear()
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn final write from a crash
+                        continue
+                    if record.get("op") == "put":
+                        self._live[record["id"]] = record
+                    elif record.get("op") == "ack":
+                        for notification_id in record.get("ids", []):
+                            self._live.pop(notification_id, None)
+        self._compact()
+        return [Notification.from_dict(record) for record in self._live.values()]
+
+    def append(self, notification: Notification):
+        record = {"op": "put", **notification.to_dict()}
+        self._live[notification.notification_id] = record
+        self._write(record)
+
+    def ack(self, notification_ids: Iterable[str]):
+        ids = [i for i in notification_ids if self._live.pop(i, None) is not None]
+        if not ids:
+            return
+        self._write({"op": "ack", "ids": ids})
+        self._acked_since_compact += len(ids)
+        if self._acked_since_compact >= self.compact_threshold:
+            self._compact()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, record: Dict[str, Any]):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+        self._file.flush()
+
+    def _compact(self):
+        self.close()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in self._live.values():
+                f.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+        os.replace(tmp_path, self.path)
+        self._acked_since_compact = 0
+
+
+DigestBuilder = Callable[[str, List[Notification]], Dict[str, Any]]
+
+
+def _log_spool_error(future: Future):
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Notification spool write failed: {error}")
+
+
+class NotificationDispatcher:
+    """
+    Background dispatcher for webhook notifications.
+
+    ``submit`` is synchronous and only buffers the card, so callers never wait
+    on the network. Notifications are grouped per client_id: the first one
+    opens a coalescing window, and when it closes everything buffered for that
+    client is sent as one card (a digest card if there is more than one).
+    At most one delivery per client is in flight, which keeps each client's
+    updates in order.
+
+    Deliveries share one keep-alive ``httpx.AsyncClient``. 5xx responses and
+    transport errors are retried with full-jitter exponential backoff. A 429
+    pauses all deliveries for its Retry-After plus jitter, since the rate limit
+    applies to the whole webhook.
+
+    Spool file I/O runs on one dedicated thread, which keeps writes in order
+    and off the event loop.
+    """
+
+    def __init__(
+        self,
+        webhook_url: str,
+        digest_builder: DigestBuilder,
+        coalesce_window: float = 2.0,
+        max_queue_size: int = 1000,
+        max_batch_size: int = 50,
+        max_concurrent_sends: int = 4,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 30.0,
+        spool_path: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            webhook_url: Incoming webhook URL
+            digest_builder: Builds one card from several notifications for a client
+            coalesce_window: Seconds to collect a client's notifications before sending
+            max_queue_size: Maximum undelivered notifications; beyond this new ones are dropped
+            max_batch_size: Send a client's batch early once it reaches this size
+            max_concurrent_sends: Concurrent deliveries and pooled connections
+            max_retries: Retries per delivery before it is dropped
+            backoff_base: Base delay in seconds for retry backoff
+            backoff_max: Cap on retry backoff in seconds
+            timeout: HTTP timeout in seconds
+            spool_path: JSONL file for undelivered notifications, or None to disable
+            transport: Optional httpx transport (for tests)
+        """
+        self.webhook_url = webhook_url
+        self.digest_builder = digest_builder
+        self.coalesce_window = coalesce_window
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max_batch_size
+        self.max_concurrent_sends = max_concurrent_sends
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.transport = transport
+        self.spool = NotificationSpool(spool_path) if spool_path else None
+        self._spool_executor: Optional[ThreadPoolExecutor] = None
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._send_slots: Optional[asyncio.Semaphore] = None
+        self._buffers: Dict[str, List[Notification]] = {}
+        self._deadlines: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._outstanding = 0
+        self._blocked_until = 0.0
+        self._flush_now = False
+        self._closing = False
+        self._stats = {
+            "submitted": 0,
+            "dropped": 0,
+            "replayed": 0,
+            "cards_sent": 0,
+            "digests_sent": 0,
+            "notifications_delivered": 0,
+            "notifications_failed": 0,
+            "retries": 0,
+            "rate_limited": 0
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self):
+        """Open the pooled client, replay the spool and start the dispatch loop."""
+        if self.running:
+            return
+        self._closing = False
+        self._wake = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._send_slots = asyncio.Semaphore(self.max_concurrent_sends)
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrent_sends,
+                max_keepalive_connections=self.max_concurrent_sends,
+                keepalive_expiry=60.0
+            ),
+            headers={"Content-Type": "application/json"},
+            transport=self.transport
+        )
+
+        if self.spool is not None:
+            self._spool_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notification-spool")
+            replayed = await asyncio.get_running_loop().run_in_executor(self._spool_executor, self.spool.load)
+            for notification in replayed:
+                self._buffer(notification)
+            self._stats["replayed"] += len(replayed)
+            if replayed:
+                logger.info(f"Replaying {len(replayed)} spooled notifications")
+        if self._outstanding == 0:
+            self._idle.set()
+
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Send everything buffered, wait up to ``timeout`` for deliveries, then close.
+
+        Deliveries still running at the deadline are cancelled; their
+        notifications stay in the spool and are resent on the next start.
+        """
+        if not self.running:
+            return
+        self._closing = True
+        self._wake.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._worker), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Notification dispatcher stopped with {self._outstanding} undelivered")
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._worker.cancel()
+        await asyncio.gather(self._worker, *self._inflight.values(), return_exceptions=True)
+        self._worker = None
+        self._inflight.clear()
+        self._buffers.clear()
+        self._deadlines.clear()
+        self._outstanding = 0
+        await self._client.aclose()
+        self._client = None
+        if self._spool_executor is not None:
+            # Queued spool writes finish before the file is closed
+            await asyncio.get_running_loop().run_in_executor(self._spool_executor, self.spool.close)
+            self._spool_executor.shutdown(wait=False)
+            self._spool_executor = None
+
+    def submit(self, client_id: str, event: str, summary: str, card: Dict[str, Any]) -> bool:
+        """
+        Queue a card for delivery without waiting on the network.
+
+        Args:
+            client_id: Client the notification is about (coalescing key)
+            event: Event name, e.g. "instruction_sent"
+            summary: One-line description used in digest cards
+            card: Card to send if the notification goes out on its own
+
+        Returns:
+            True if queued, False if the dispatcher is stopped or the queue is full
+        """
+        if not self.running or self._closing:
+            return False
+        if self._outstanding >= self.max_queue_size:
+            self._stats["dropped"] += 1
+            if self._stats["dropped"] % 100 == 1:
+                logger.warning(f"Notification queue full ({self.max_queue_size}), dropped {self._stats['dropped']} so far")
+            return False
+
+        notification = Notification(client_id=client_id, event=event, summary=summary, card=card)
+        if self.spool is not None:
+            self._spool_in_background(self.spool.append, notification)
+        self._buffer(notification)
+        self._stats["submitted"] += 1
+        self._wake.set()
+        return True
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Send all buffered notifications now, ignoring coalescing windows.
+        Spool writes queued for the delivered notifications land before it returns.
+
+        Returns:
+            True if everything was delivered (or dropped) within ``timeout``
+        """
+        if not self.running:
+            return self._outstanding == 0
+        self._flush_now = True
+        self._wake.set()
+
+        async def drained():
+            await self._idle.wait()
+            if self._spool_executor is not None:
+                # The spool thread runs writes in order, so this waits for the queued acks
+                await asyncio.get_running_loop().run_in_executor(self._spool_executor, lambda: None)
+
+        try:
+            await asyncio.wait_for(drained(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._flush_now = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "queued": self._outstanding,
+            "buffered_clients": len(self._buffers),
+            "inflight": len(self._inflight),
+            "spooled": len(self.spool) if self.spool is not None else 0
+        }
+
+    def _spool_in_background(self, operation: Callable[..., Any], *args):
+        """Queue a spool write on the spool thread without waiting for it."""
+        future = self._spool_executor.submit(operation, *args)
+        future.add_done_callback(_log_spool_error)
+
+    def _buffer(self, notification: Notification):
+        buffer = self._buffers.get(notification.client_id)
+        if buffer is None:
+            buffer = self._buffers[notification.client_id] = []
+            self._deadlines[notification.client_id] = time.monotonic() + self.coalesce_window
+        buffer.append(notification)
+        self._outstanding += 1
+        if self._idle is not None:
+            self._idle.clear()
+
+    async def _run(self):
+        while True:
+            # Clear before scanning so a submit during the scan is not missed
+            self._wake.clear()
+            next_due = self._dispatch_due()
+            if self._closing and not self._buffers and not self._inflight:
+                return
+            delay = None if next_due is None else max(0.0, next_due - time.monotonic())
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch_due(self) -> Optional[float]:
+        """Start deliveries for clients whose window closed; return the next deadline."""
+        now = time.monotonic()
+        force = self._flush_now or self._closing
+        next_due = None
+        for client_id in list(self._buffers):
+            if client_id in self._inflight:
+                # Rescheduled when the in-flight delivery finishes
+                continue
+            buffer = self._buffers[client_id]
+            deadline = self._deadlines[client_id]
+            if force or deadline <= now or len(buffer) >= self.max_batch_size:
+                batch = buffer[:self.max_batch_size]
+                rest = buffer[self.max_batch_size:]
+                if rest:
+                    self._buffers[client_id] = rest
+                else:
+                    del self._buffers[client_id]
+                    del self._deadlines[client_id]
+                task = asyncio.create_task(self._deliver(client_id, batch))
+                self._inflight[client_id] = task
+                task.add_done_callback(lambda _, c=client_id: self._on_delivered(c))
+            elif next_due is None or deadline < next_due:
+                next_due = deadline
+        return next_due
+
+    def _on_delivered(self, client_id: str):
+        self._inflight.pop(client_id, None)
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _deliver(self, client_id: str, batch: List[Notification]):
+        # Cancellation (shutdown) propagates and leaves the batch in the spool
+        try:
+            card = batch[0].card if len(batch) == 1 else self.digest_builder(client_id, batch)
+            async with self._send_slots:
+                delivered = await self._post_with_retry(card)
+        except Exception as e:
+            logger.error(f"Error sending Teams card: {e}")
+            delivered = False
+
+        if delivered:
+            self._stats["cards_sent"] += 1
+            self._stats["notifications_delivered"] += len(batch)
+            if len(batch) > 1:
+                self._stats["digests_sent"] += 1
+            logger.info(f"✅ Teams notification sent: {batch[-1].summary}"
+                        + (f" (+{len(batch) - 1} coalesced)" if len(batch) > 1 else ""))
+        else:
+            self._stats["notifications_failed"] += len(batch)
+            logger.error(f"Dropping {len(batch)} Teams notifications for {client_id} after failed delivery")
+
+        if self.spool is not None:
+            self._spool_in_background(self.spool.ack, [n.notification_id for n in batch])
+        self._outstanding -= len(batch)
+        if self._outstanding == 0:
+            self._idle.set()
+
+    async def _post_with_retry(self, card: Dict[str, Any]) -> bool:
+        for attempt in range(self.max_retries + 1):
+            pause = self._blocked_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+
+            try:
+                response = await self._client.post(self.webhook_url, json=card)
+            except httpx.HTTPError as e:
+                logger.warning(f"Teams webhook request failed: {e}")
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code < 300:
+                    return True
+                if response.status_code == 429:
+                    self._stats["rate_limited"] += 1
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if retry_after is None:
+                        delay = self._backoff(attempt)
+                    else:
+                        delay = retry_after + random.uniform(0, self.backoff_base)
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+                elif response.status_code >= 500:
+                    delay = self._backoff(attempt)
+                else:
+                    logger.error(f"Failed to send Teams notification: {response.status_code}")
+                    return False
+
+            if attempt == self.max_retries:
+                break
+            self._stats["retries"] += 1
+            await asyncio.sleep(delay)
+        return False
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
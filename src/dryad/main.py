@@ -1,9 +1,12 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from dryad.infrastructure.database import init_db
+from dryad.core.config import settings
+from dryad.core.llm_error_handler import llm_deadline
+from dryad.infrastructure.llm.registry import get_model_registry
 from dryad.api.v1 import auth, tools, knowledge, agents
 
 
@@ -37,10 +40,19 @@ async def lifespan(app: FastAPI):
     # Initialize Memory Guild
     await memory_guild.initialize()
     
+    # Start workers for queued async orchestrator tasks
+    await enhanced_orchestrator.start_workers()
+    
+    # Start background Teams notification delivery (replays spooled cards)
+    await teams_notifier.start()
+    
     yield
     # Shutdown: Clean resources if needed
+    await enhanced_orchestrator.stop_workers()
+    await teams_notifier.stop()
     await guardian.stop()
     await memory_guild.shutdown()
+    await get_model_registry().aclose()
 
 app = FastAPI(
     title="DRYAD.AI Backend",
@@ -69,6 +81,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def llm_request_deadline(request: Request, call_next):
+    """Give every LLM call made while serving a request one shared deadline."""
+    seconds = settings.LLM_REQUEST_DEADLINE_SECONDS
+    header = request.headers.get("x-request-timeout")
+    if header:
+        try:
+            seconds = min(seconds, max(0.0, float(header)))
+        except ValueError:
+            pass
+    with llm_deadline(seconds):
+        return await call_next(request)
+
 # Include Routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(tools.router, prefix="/api/v1/tools", tags=["tools"])
@@ -104,6 +104,9 @@ class ProcessResponseResult(BaseModel):
     dialogue_id: str = Field(..., description="Created dialogue ID")
     parsed_wisdom: ParsedWisdom = Field(..., description="Parsed wisdom from response")
     message_count: int = Field(..., description="Number of messages in dialogue")
+    dialogue: Optional[DialogueResponse] = Field(
+        None, exclude=True, description="Persisted dialogue with its messages (in-process only, not serialized)"
+    )
 
 
 class ProviderInfo(BaseModel):
@@ -115,6 +115,11 @@ class ProviderResponse(BaseModel):
     cost_usd: float = Field(default=0.0, ge=0.0)
     error: Optional[str] = None
     success: bool = True
+    status: Optional[str] = Field(
+        default=None,
+        description="succeeded, failed, cancelled (after quorum) or timed_out"
+    )
+    hedged: bool = Field(default=False, description="A backup request was sent to this provider")
 
 
 class ConsensusResult(BaseModel):
@@ -128,6 +133,13 @@ class ConsensusResult(BaseModel):
     total_response_time_ms: float
     individual_responses: Optional[List[ProviderResponse]] = None
     reasoning: Optional[str] = None
+    provider_statuses: Optional[Dict[str, str]] = Field(
+        default=None,
+        description="Outcome per queried provider"
+    )
+    quorum_reached: bool = Field(default=False, description="Stopped early once the strategy was decided")
+    partial: bool = Field(default=False, description="The deadline passed before every provider answered")
+    hedged_requests: int = Field(default=0, ge=0)
 
 
 class MultiConsultResponse(BaseModel):
@@ -177,6 +189,32 @@ class ProviderUsageResponse(BaseModel):
     period_end: datetime
 
 
+class ProviderWindowMetrics(BaseModel):
+    """Sliding-window telemetry for one provider."""
+    provider_id: str
+    window: str
+    requests: int = Field(default=0, ge=0)
+    successes: int = Field(default=0, ge=0)
+    failures: int = Field(default=0, ge=0)
+    error_rate: float = Field(default=0.0, ge=0.0, le=1.0)
+    requests_per_minute: float = Field(default=0.0, ge=0.0)
+    p50_latency_ms: Optional[float] = None
+    p95_latency_ms: Optional[float] = None
+    p99_latency_ms: Optional[float] = None
+    circuit_state: str
+    circuit_trips: int = Field(default=0, ge=0)
+    in_flight: int = Field(default=0, ge=0)
+    expected_latency_ms: float = Field(description="Router's decayed peak-EWMA latency estimate")
+    expected_error_rate: float = Field(default=0.0, ge=0.0, le=1.0)
+
+
+class ProviderTelemetryResponse(BaseModel):
+    """Response with sliding-window telemetry for all providers."""
+    window: str
+    providers: List[ProviderWindowMetrics]
+    last_updated: datetime
+
+
 class FallbackChainConfig(BaseModel):
     """Configuration for provider fallback chain."""
     chain_id: str
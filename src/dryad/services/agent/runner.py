@@ -1,16 +1,19 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable
 import logging
+from contextlib import aclosing
 from datetime import datetime
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 
-from dryad.domain.agent.models import Agent
+from dryad.domain.agent.models import AgentMessage
 from dryad.domain.tool.models import Tool
+from dryad.infrastructure.database import AsyncSessionLocal
 from dryad.services.tool_registry import ToolRegistryService
 from dryad.infrastructure.llm.factory import LLMFactory
-from dryad.infrastructure.llm.providers import LLMConfig
+from dryad.core.llm_error_handler import llm_error_handler
+from dryad.core.agent_config_cache import AgentConfig, get_agent_config_cache
+from dryad.core.token_stream import StreamStats, TokenStream
 
 logger = logging.getLogger(__name__)
 
@@ -18,21 +21,26 @@ class AgentRunner:
     """
     Executes an Agent's logic loop.
     """
-    def __init__(self, db: AsyncSession, agent_id: str):
+    def __init__(
+        self,
+        db: AsyncSession,
+        agent_id: str,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+    ):
         self.db = db
         self.agent_id = agent_id
-        self.agent: Optional[Agent] = None
+        self.agent: Optional[AgentConfig] = None
         self.llm = None
         self.tools: List[Tool] = []
+        # Streams outlive the request's session, so they persist through their own
+        self.session_factory = session_factory
 
     async def initialize(self):
         """
         Load agent config and initialize LLM.
         """
-        # Load Agent
-        stmt = select(Agent).where(Agent.id == self.agent_id)
-        result = await self.db.execute(stmt)
-        self.agent = result.scalar_one_or_none()
+        # Load Agent (cached snapshot; invalidated when the agent row changes)
+        self.agent = await get_agent_config_cache().get(self.db, self.agent_id)
         
         if not self.agent:
             raise ValueError(f"Agent {self.agent_id} not found")
@@ -40,13 +48,10 @@ class AgentRunner:
         # Load Tools (mock logic for ID mapping for now)
         # In real impl, we'd fetch tools by IDs in self.agent.tool_ids
         
-        # Init LLM
-        config = LLMConfig(
-            provider=self.agent.model_provider,
-            model_name=self.agent.model_name,
-            temperature=self.agent.temperature
-        )
-        self.llm = LLMFactory.create_model(config)
+        # Init LLM (a long-lived client from the registry, shared by every runner with this config)
+        config = self.agent.llm_config()
+        # Calls go through the provider's circuit breaker, concurrency limit and retry budget
+        self.llm = llm_error_handler.guard_model(LLMFactory.get_model(config), config.provider)
 
     async def chat(self, user_message: str, history: List[Dict[str, str]] = None) -> str:
         """
@@ -55,6 +60,61 @@ class AgentRunner:
         if not self.llm:
             await self.initialize()
 
+        # Invoke LLM
+        # Note: True tool usage requires bind_tools here
+        response = await self.llm.ainvoke(self._build_messages(user_message, history))
+        
+        return response.content
+
+    async def stream_chat(
+        self,
+        user_message: str,
+        history: List[Dict[str, str]] = None,
+        user_id: Optional[str] = None
+    ) -> TokenStream:
+        """
+        Start a streamed reply; iterate the returned TokenStream for text deltas.
+
+        The turn is persisted once when the stream ends, including a partial
+        reply when the client goes away, and stream.stats holds its timing.
+        """
+        if not self.llm:
+            await self.initialize()
+
+        messages = self._build_messages(user_message, history)
+
+        async def deltas() -> AsyncIterator[str]:
+            async with aclosing(self.llm.astream(messages)) as chunks:
+                async for chunk in chunks:
+                    yield chunk.content if hasattr(chunk, "content") else str(chunk)
+
+        return TokenStream(
+            deltas(),
+            on_finish=lambda reply, stats: self._persist_turn(user_message, reply, user_id, stats)
+        )
+
+    async def _persist_turn(self, user_message: str, reply: str, user_id: Optional[str], stats: StreamStats):
+        """
+        Store the user message and the (possibly partial) reply in one transaction.
+        """
+        try:
+            async with self.session_factory() as session:
+                session.add(AgentMessage(agent_id=self.agent_id, user_id=user_id, role="user", content=user_message))
+                session.add(AgentMessage(
+                    agent_id=self.agent_id,
+                    user_id=user_id,
+                    role="assistant",
+                    content=reply,
+                    finish_reason=stats.finish_reason,
+                    ttft_ms=stats.ttft_ms,
+                    tokens=stats.tokens,
+                    duration_ms=stats.duration_ms
+                ))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to persist streamed reply for agent {self.agent_id}: {e}")
+
+    def _build_messages(self, user_message: str, history: Optional[List[Dict[str, str]]]) -> list:
         # Build Prompt
         messages = [
             SystemMessage(content=self.agent.system_prompt)
@@ -70,9 +130,4 @@ class AgentRunner:
         
         # Add current message
         messages.append(HumanMessage(content=user_message))
-        
-        # Invoke LLM
-        # Note: True tool usage requires bind_tools here
-        response = await self.llm.ainvoke(messages)
-        
-        return response.content
+        return messages
@@ -18,16 +18,27 @@ from dryad.schemas.multi_provider_schemas import (
     ProviderSelectionRequest, ProviderSelectionResponse,
     ProviderHealthResponse, ProviderUsageResponse,
     FallbackChainConfig, FallbackChainResponse,
-    LoadBalancingStrategy, LoadBalancingConfig, ProviderMetrics
+    LoadBalancingStrategy, LoadBalancingConfig, ProviderMetrics,
+    ProviderWindowMetrics, ProviderTelemetryResponse
 )
 from dryad.services.oracle_service import OracleService
 from dryad.schemas.dialogue_schemas import ConsultationRequest
 from dryad.core.config import Config
+from dryad.core.consult_scheduler import FAILED, TIMED_OUT, get_consult_scheduler
 from dryad.core.llm_error_handler import llm_error_handler
+from dryad.core.provider_telemetry import (
+    HALF_OPEN as CIRCUIT_HALF_OPEN,
+    OPEN as CIRCUIT_OPEN,
+    WINDOWS,
+    get_provider_telemetry
+)
 from dryad.core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Below this many calls in the last five minutes, health looks at the last hour
+HEALTH_MIN_REQUESTS = 5
+
 
 class MultiProviderService:
     """Service for multi-provider oracle operations."""
@@ -36,6 +47,8 @@ class MultiProviderService:
         self.db = db
         self.oracle_service = OracleService(db)
         self.config = Config()
+        self.scheduler = get_consult_scheduler()
+        self.telemetry = get_provider_telemetry()
 
         # Provider registry
         self.providers: Dict[str, ProviderConfig] = {}
@@ -97,9 +110,7 @@ class MultiProviderService:
                 response_time_ms=0.0,
                 last_check=datetime.now()
             )
-            self.provider_usage[provider_id] = ProviderUsageStats(
-                provider_id=provider_id
-            )
+            self.provider_usage[provider_id] = self._usage_from_telemetry(provider_id)
         
         logger.info(f"Initialized {len(self.providers)} providers")
     
@@ -124,8 +135,8 @@ class MultiProviderService:
             if p.enabled
         ]
         
-        # Limit to max_providers
-        provider_ids = provider_ids[:request.max_providers]
+        # Limit to max_providers (each provider is consulted once)
+        provider_ids = list(dict.fromkeys(provider_ids))[:request.max_providers]
         
         if len(provider_ids) < request.min_providers:
             raise ValueError(
@@ -138,31 +149,34 @@ class MultiProviderService:
             f"using {request.consensus_strategy} strategy"
         )
         
-        # Query all providers concurrently
-        tasks = [
-            self._query_provider(provider_id, request.branch_id, request.query)
-            for provider_id in provider_ids
-        ]
+        # Query all providers concurrently, collecting results as they arrive
+        outcome = await self.scheduler.run(
+            provider_ids,
+            lambda provider_id: self._query_provider(provider_id, request.branch_id, request.query),
+            timeout=request.timeout_seconds,
+            decided=lambda successes, pending: self._consensus_decided(
+                request, provider_ids, successes, pending
+            ),
+            is_success=lambda response: response.success
+        )
         
-        try:
-            responses = await asyncio.wait_for(
-                asyncio.gather(*tasks, return_exceptions=True),
-                timeout=request.timeout_seconds
-            )
-        except asyncio.TimeoutError:
-            logger.warning(f"Multi-consult timeout after {request.timeout_seconds}s")
-            responses = []
-        
-        # Filter successful responses
-        successful_responses = [
-            r for r in responses
-            if isinstance(r, ProviderResponse) and r.success
-        ]
+        # Successful responses in arrival order, tagged with their scheduling outcome
+        successful_responses = []
+        for response in outcome.successes:
+            provider_outcome = outcome.outcomes[response.provider_id]
+            successful_responses.append(response.model_copy(update={
+                "status": provider_outcome.status,
+                "hedged": provider_outcome.hedged
+            }))
         
+        # Attempts that lost a hedge or were cancelled never wrote anything
+        await self._record_responses(request.branch_id, request.query, successful_responses)
+
         if len(successful_responses) < request.min_providers:
             raise ValueError(
                 f"Not enough successful responses. "
-                f"Required: {request.min_providers}, Got: {len(successful_responses)}"
+                f"Required: {request.min_providers}, Got: {len(successful_responses)} "
+                f"(provider statuses: {outcome.statuses})"
             )
         
         # Apply consensus strategy
@@ -170,6 +184,11 @@ class MultiProviderService:
             successful_responses,
             request.consensus_strategy
         )
+        consensus.providers_failed = outcome.count(FAILED) + outcome.count(TIMED_OUT)
+        consensus.provider_statuses = outcome.statuses
+        consensus.quorum_reached = outcome.quorum_reached
+        consensus.partial = outcome.deadline_exceeded
+        consensus.hedged_requests = outcome.hedges_sent
         
         # Add individual responses if requested
         if request.include_reasoning:
@@ -191,6 +210,35 @@ class MultiProviderService:
             created_at=datetime.now()
         )
     
+    def _consensus_decided(
+        self,
+        request: MultiConsultRequest,
+        provider_ids: List[str],
+        successes: List[ProviderResponse],
+        pending: int
+    ) -> bool:
+        """Whether the consensus can no longer change, so outstanding providers can be cancelled."""
+        if len(successes) + pending < request.min_providers:
+            # Quorum is out of reach; fail without waiting for the rest
+            return True
+        if len(successes) < request.min_providers:
+            return False
+
+        strategy = request.consensus_strategy
+        if strategy == ConsensusStrategy.FIRST_SUCCESS:
+            return True
+        if strategy == ConsensusStrategy.MAJORITY_VOTE:
+            return len(successes) > len(provider_ids) // 2
+        if strategy == ConsensusStrategy.WEIGHTED_AVERAGE:
+            weights = {
+                p_id: self.providers[p_id].weight if p_id in self.providers else 0.0
+                for p_id in provider_ids
+            }
+            answered = sum(weights.get(r.provider_id, 0.0) for r in successes)
+            return answered * 2 > sum(weights.values())
+        # BEST_QUALITY and ALL_AGREE need every provider's answer
+        return False
+
     async def _query_provider(
         self,
         provider_id: str,
@@ -212,7 +260,7 @@ class MultiProviderService:
                     error="Provider not available"
                 )
 
-            # Check circuit breaker status
+            # Check circuit breaker status (the LLM call guard admits or refuses the call itself)
             provider_health = llm_error_handler.get_provider_health(provider_id)
             if not provider_health["is_available"]:
                 logger.warning(f"Provider {provider_id} circuit breaker is OPEN, skipping")
@@ -231,32 +279,16 @@ class MultiProviderService:
                 provider_id=provider_id
             )
 
-            # Consult oracle (oracle_service now uses llm_error_handler internally)
-            result = await self.oracle_service.consult_oracle(request)
+            # Only the LLM side runs here (oracle_service uses llm_error_handler internally):
+            # the scheduler may hedge or cancel this call, so nothing is written until a
+            # response has won (see _record_responses). Branch context is cached across providers
+            response_text = await self.oracle_service.generate_consultation(request)
 
             # Calculate response time
             response_time = (time.time() - start_time) * 1000
 
-            # Get the dialogue to extract the response text
-            dialogue = await self.oracle_service.get_dialogue(result.dialogue_id)
-
-            # Extract response from dialogue messages
-            response_text = ""
-            if dialogue and dialogue.messages:
-                # Get the last assistant message
-                for msg in reversed(dialogue.messages):
-                    if msg.role == "assistant":
-                        response_text = msg.content
-                        break
-
-            if not response_text:
-                response_text = f"Consultation completed. Dialogue ID: {result.dialogue_id}"
-
             # Update usage stats
-            self._update_usage_stats(provider_id, True, response_time)
-
-            # Update provider health status to healthy
-            self._update_provider_health(provider_id, ProviderStatus.HEALTHY)
+            self._update_usage_stats(provider_id)
 
             return ProviderResponse(
                 provider_id=provider_id,
@@ -265,16 +297,13 @@ class MultiProviderService:
                 tokens_used=0,  # TODO: Track tokens
                 success=True
             )
-            
+
         except Exception as e:
             response_time = (time.time() - start_time) * 1000
             logger.error(f"Provider {provider_id} failed: {e}", exc_info=True)
 
             # Update usage stats
-            self._update_usage_stats(provider_id, False, response_time)
-
-            # Update provider health status to unhealthy
-            self._update_provider_health(provider_id, ProviderStatus.UNHEALTHY)
+            self._update_usage_stats(provider_id)
 
             return ProviderResponse(
                 provider_id=provider_id,
@@ -284,6 +313,19 @@ class MultiProviderService:
                 error=str(e)
             )
 
+    async def _record_responses(self, branch_id: str, query: str, responses: List[ProviderResponse]):
+        """
+        Persist one dialogue per winning provider response, one at a time on the shared session.
+
+        A failed write is logged and does not discard the answer.
+        """
+        for response in responses:
+            request = ConsultationRequest(branch_id=branch_id, query=query, provider_id=response.provider_id)
+            try:
+                await self.oracle_service.record_consultation(request, response.response)
+            except Exception as e:
+                logger.error(f"Failed to record the {response.provider_id} consultation for branch {branch_id}: {e}")
+
     async def _apply_consensus(
         self,
         responses: List[ProviderResponse],
@@ -342,30 +384,19 @@ class MultiProviderService:
             reasoning=reasoning
         )
 
-    def _update_usage_stats(
-        self,
-        provider_id: str,
-        success: bool,
-        response_time_ms: float
-    ):
-        """Update provider usage statistics."""
-        if provider_id not in self.provider_usage:
-            self.provider_usage[provider_id] = ProviderUsageStats(
-                provider_id=provider_id
-            )
-
-        stats = self.provider_usage[provider_id]
-        stats.total_requests += 1
-
-        if success:
-            stats.successful_requests += 1
-        else:
-            stats.failed_requests += 1
-
-        # Update average response time
-        total_time = stats.average_response_time_ms * (stats.total_requests - 1)
-        stats.average_response_time_ms = (total_time + response_time_ms) / stats.total_requests
-        stats.last_used = datetime.now()
+    def _update_usage_stats(self, provider_id: str):
+        """Refresh this service's usage view (the LLM call guard records outcomes in the shared telemetry)."""
+        self.provider_usage[provider_id] = self._usage_from_telemetry(provider_id)
+
+    def _usage_from_telemetry(self, provider_id: str) -> ProviderUsageStats:
+        """Lifetime usage for a provider (survives restarts via the telemetry snapshot)."""
+        totals = self.telemetry.totals(provider_id)
+        last_used = totals.pop("last_used")
+        return ProviderUsageStats(
+            provider_id=provider_id,
+            last_used=datetime.fromtimestamp(last_used) if last_used else None,
+            **totals
+        )
 
     async def select_provider(
         self,
@@ -380,62 +411,57 @@ class MultiProviderService:
         Returns:
             Selected provider with reasoning
         """
-        # Get available providers
-        available_providers = [
-            p for p_id, p in self.providers.items()
-            if p.enabled
-            and (not request.exclude_providers or p_id not in request.exclude_providers)
-            and (not request.preferred_providers or p_id in request.preferred_providers)
-        ]
+        # Get available providers, highest priority first (priority breaks routing ties)
+        available_providers = sorted(
+            (
+                p for p_id, p in self.providers.items()
+                if p.enabled
+                and (not request.exclude_providers or p_id not in request.exclude_providers)
+                and (not request.preferred_providers or p_id in request.preferred_providers)
+            ),
+            key=lambda p: -p.priority
+        )
 
         if not available_providers:
             raise ValueError("No providers available matching criteria")
 
-        # Score providers based on criteria
-        scored_providers = []
-        for provider in available_providers:
-            score = 0.0
-
-            # Priority score
-            score += provider.priority * 10
-
-            # Health score
-            health = self.provider_health.get(provider.provider_id)
-            if health and health.status == ProviderStatus.HEALTHY:
-                score += 50
-            elif health and health.status == ProviderStatus.DEGRADED:
-                score += 25
-
-            # Usage stats score
-            usage = self.provider_usage.get(provider.provider_id)
-            if usage:
-                # Prefer providers with good success rate
-                if usage.total_requests > 0:
-                    success_rate = usage.successful_requests / usage.total_requests
-                    score += success_rate * 30
-
-                # Fast response preference
-                if request.require_fast_response and usage.average_response_time_ms > 0:
-                    # Prefer faster providers
-                    score += max(0, 20 - (usage.average_response_time_ms / 100))
-
-            scored_providers.append((provider, score))
-
-        # Select best provider
-        best_provider, best_score = max(scored_providers, key=lambda x: x[1])
-
-        # Get estimated metrics
-        usage = self.provider_usage.get(best_provider.provider_id)
-        estimated_time = usage.average_response_time_ms if usage else 1000.0
-        estimated_cost = 0.0  # TODO: Implement cost estimation
+        # Drop providers whose recent cost per request is over budget
+        estimates = {
+            p.provider_id: self.telemetry.window_summary(p.provider_id, "5m")
+            for p in available_providers
+        }
+        if request.max_cost_usd is not None:
+            available_providers = [
+                p for p in available_providers
+                if estimates[p.provider_id]["expected_cost_usd"] <= request.max_cost_usd
+            ]
+            if not available_providers:
+                raise ValueError("No providers available within the cost limit")
+
+        # Route by expected latency and error-adjusted cost: power-of-two-choices
+        # spreads load, a fast-response request compares every provider
+        provider_id = self.telemetry.choose(
+            [p.provider_id for p in available_providers],
+            best_of_all=request.require_fast_response or request.require_high_quality
+        )
+        if provider_id is None:
+            raise ValueError("No providers available: every matching provider's circuit breaker is open")
+
+        best_provider = self.providers[provider_id]
+        estimate = estimates[provider_id]
+        reason = (
+            f"Lowest expected latency and error-adjusted cost "
+            f"({estimate['expected_latency_ms']:.0f}ms, {estimate['expected_error_rate']:.0%} errors, "
+            f"circuit {estimate['circuit_state']})"
+        )
 
         return ProviderSelectionResponse(
             provider_id=best_provider.provider_id,
             provider_type=best_provider.provider_type,
-            reason=f"Selected based on priority, health, and performance (score: {best_score:.1f})",
-            estimated_response_time_ms=estimated_time,
-            estimated_cost_usd=estimated_cost,
-            confidence=min(1.0, best_score / 100)
+            reason=reason,
+            estimated_response_time_ms=estimate["expected_latency_ms"],
+            estimated_cost_usd=estimate["expected_cost_usd"],
+            confidence=max(0.0, min(1.0, 1.0 - estimate["expected_error_rate"]))
         )
 
     async def get_provider_health(self) -> ProviderHealthResponse:
@@ -479,20 +505,36 @@ class MultiProviderService:
                 )
                 return
 
-            # Calculate error rate from usage stats
-            usage = self.provider_usage.get(provider_id)
-            error_rate = 0.0
-            if usage and usage.total_requests > 0:
-                error_rate = usage.failed_requests / usage.total_requests
-
-            # Determine status based on error rate
-            if error_rate < 0.1:
+            # Error rate over the last five minutes (the last hour if traffic is light),
+            # so past incidents stop counting against a provider once it recovers
+            window = self.telemetry.window_summary(provider_id, "5m")
+            if window["requests"] < HEALTH_MIN_REQUESTS:
+                window = self.telemetry.window_summary(provider_id, "1h")
+            error_rate = window["error_rate"]
+            circuit_state = self.telemetry.circuit_state(provider_id)
+            message = None
+
+            # Determine status from the circuit breaker, then the error rate
+            if circuit_state == CIRCUIT_OPEN:
+                status = ProviderStatus.UNHEALTHY
+                message = "Circuit breaker open"
+            elif circuit_state == CIRCUIT_HALF_OPEN:
+                status = ProviderStatus.DEGRADED
+                message = "Circuit breaker half-open, probing"
+            elif error_rate < 0.1:
                 status = ProviderStatus.HEALTHY
             elif error_rate < 0.3:
                 status = ProviderStatus.DEGRADED
             else:
                 status = ProviderStatus.UNHEALTHY
 
+            if window["p50_ms"] is not None:
+                latency_note = (
+                    f"{window['window']} latency p50 {window['p50_ms']:.0f}ms, "
+                    f"p95 {window['p95_ms']:.0f}ms, p99 {window['p99_ms']:.0f}ms"
+                )
+                message = f"{message}; {latency_note}" if message else latency_note
+
             response_time = (time.time() - start_time) * 1000
 
             self.provider_health[provider_id] = ProviderHealthCheck(
@@ -501,8 +543,9 @@ class MultiProviderService:
                 response_time_ms=response_time,
                 last_check=datetime.now(),
                 error_rate=error_rate,
-                success_count=usage.successful_requests if usage else 0,
-                failure_count=usage.failed_requests if usage else 0
+                success_count=window["successes"],
+                failure_count=window["failures"],
+                message=message
             )
 
         except Exception as e:
@@ -515,6 +558,39 @@ class MultiProviderService:
                 message=str(e)
             )
 
+    async def get_provider_telemetry(self, window: str = "5m") -> ProviderTelemetryResponse:
+        """Get sliding-window error rates, latency percentiles and circuit state per provider."""
+        if window not in WINDOWS:
+            raise ValueError(f"Unknown window {window}; expected one of {', '.join(WINDOWS)}")
+
+        provider_ids = list(dict.fromkeys([*self.providers, *self.telemetry.provider_ids()]))
+        providers = []
+        for provider_id in provider_ids:
+            summary = self.telemetry.window_summary(provider_id, window)
+            providers.append(ProviderWindowMetrics(
+                provider_id=provider_id,
+                window=window,
+                requests=summary["requests"],
+                successes=summary["successes"],
+                failures=summary["failures"],
+                error_rate=summary["error_rate"],
+                requests_per_minute=summary["requests_per_minute"],
+                p50_latency_ms=summary["p50_ms"],
+                p95_latency_ms=summary["p95_ms"],
+                p99_latency_ms=summary["p99_ms"],
+                circuit_state=self.telemetry.circuit_state(provider_id),
+                circuit_trips=summary["circuit_trips"],
+                in_flight=summary["in_flight"],
+                expected_latency_ms=summary["expected_latency_ms"],
+                expected_error_rate=summary["expected_error_rate"]
+            ))
+
+        return ProviderTelemetryResponse(
+            window=window,
+            providers=providers,
+            last_updated=datetime.now()
+        )
+
     async def get_provider_usage(
         self,
         period_start: Optional[datetime] = None,
@@ -526,6 +602,8 @@ class MultiProviderService:
         if not period_end:
             period_end = datetime.now()
 
+        for provider_id in self.providers:
+            self.provider_usage[provider_id] = self._usage_from_telemetry(provider_id)
         usage_stats = list(self.provider_usage.values())
 
         total_requests = sum(u.total_requests for u in usage_stats)
@@ -562,6 +640,7 @@ class MultiProviderService:
                 response = await self._query_provider(provider_id, branch_id, query)
 
                 if response.success:
+                    await self._record_responses(branch_id, query, [response])
                     total_time = (time.time() - start_time) * 1000
                     return FallbackChainResponse(
                         chain_id=chain_config.chain_id,
@@ -585,20 +664,3 @@ class MultiProviderService:
             f"All providers in fallback chain failed after {attempts} attempts. "
             f"Errors: {'; '.join(errors)}"
         )
-
-    def _update_provider_health(self, provider_id: str, status: ProviderStatus):
-        """Update provider health status."""
-        if provider_id in self.provider_health:
-            self.provider_health[provider_id].status = status
-            self.provider_health[provider_id].last_check = datetime.now()
-            logger.info(f"Provider {provider_id} health status updated to {status.value}")
-        else:
-            # Create new health check entry
-            self.provider_health[provider_id] = ProviderHealthCheck(
-                provider_id=provider_id,
-                status=status,
-                response_time_ms=0.0,
-                last_check=datetime.now()
-            )
-            logger.info(f"Provider {provider_id} health status initialized to {status.value}")
-
@@ -17,6 +17,7 @@ import numpy as np
 from sqlalchemy.orm import Session
 
 from dryad.university.database.models_university import MediaAsset, MultimodalInteraction
+from dryad.university.services.video_engine import VideoFramePipeline
 
 
 class VideoProcessingService:
@@ -55,6 +56,12 @@ class VideoProcessingService:
             'scene_threshold': 0.3,
             'max_video_length': 300  # seconds
         }
+        
+        # Streaming frame pipeline for uncompressed (Y4M) sources
+        self.frame_pipeline = VideoFramePipeline(
+            min_step=self.processing_settings['frame_sample_rate'],
+            scene_threshold=self.processing_settings['scene_threshold']
+        )
     
     async def analyze_video(
         self,
@@ -74,8 +81,12 @@ class VideoProcessingService:
         try:
             options = options or {}
             
-            # Load and validate video
+            # Load and validate video, then stream sampled frames through analysis
             video_info = await self._load_video(video_data)
+            if video_info.get('decodable'):
+                frame_analysis = await self.frame_pipeline.analyze(video_data)
+                video_info.update(frame_analysis['stream_info'])
+                video_info['frame_analysis'] = frame_analysis
             
             # Perform requested analyses
             results = {
@@ -86,6 +97,14 @@ class VideoProcessingService:
                 'format': video_info.get('format', 'mp4')
             }
             
+            if 'frame_analysis' in video_info:
+                frame_analysis = video_info['frame_analysis']
+                results['frame_analysis'] = {
+                    'frames_decoded': frame_analysis['frames_decoded'],
+                    'frames_sampled': frame_analysis['frames_sampled'],
+                    'frame_statistics': frame_analysis['frame_statistics']
+                }
+            
             # Scene detection and segmentation
             if options.get('detect_scenes', True):
                 results['scenes'] = await self._detect_scenes(video_info)
@@ -231,30 +250,25 @@ class VideoProcessingService:
             raise
     
     async def _load_video(self, video_data: Union[str, bytes]) -> Dict[str, Any]:
-        """Load and validate video file"""
+        """Load and validate video file (header only; frames are streamed later)"""
         try:
-            if isinstance(video_data, str):
-                # Load from file path
-                # In production, would use OpenCV, moviepy, or similar
-                video_info = {
-                    'duration': 30.0,  # Mock duration in seconds
-                    'frame_rate': 30.0,
-                    'resolution': {'width': 1920, 'height': 1080},
-                    'frame_count': 900,  # 30 seconds * 30 fps
-                    'format': 'mp4'
-                }
-            elif isinstance(video_data, bytes):
-                # Load from bytes
-                # In production, would decode video bytes
+            if not isinstance(video_data, (str, bytes)):
+                raise ValueError("Invalid video data type")
+            
+            try:
+                video_info = (await asyncio.to_thread(self.frame_pipeline.probe, video_data)).to_dict()
+                video_info['decodable'] = True
+            except ValueError:
+                # Compressed containers need an external decoder; report what we know
+                self.logger.warning("Video is not an uncompressed Y4M stream; skipping frame analysis")
                 video_info = {
-                    'duration': 15.0,
-                    'frame_rate': 24.0,
-                    'resolution': {'width': 1280, 'height': 720},
-                    'frame_count': 360,
-                    'format': 'webm'
+                    'duration': 0.0,
+                    'frame_rate': None,
+                    'resolution': {},
+                    'frame_count': 0,
+                    'format': 'unknown',
+                    'decodable': False
                 }
-            else:
-                raise ValueError("Invalid video data type")
             
             return video_info
             
@@ -262,9 +276,40 @@ class VideoProcessingService:
             self.logger.error(f"Error loading video: {str(e)}")
             raise
     
+    async def stream_frame_analysis(self, video_data: Union[str, bytes]):
+        """
+        Analyze an uncompressed video incrementally.
+        
+        Yields per-frame statistics for sampled frames as they are computed,
+        followed by a final summary with detected scenes. Memory stays
+        constant regardless of video length.
+        """
+        reader = await asyncio.to_thread(self.frame_pipeline.open, video_data)
+        try:
+            async for result in self.frame_pipeline.stream(reader):
+                yield result
+        finally:
+            reader.close()
+    
     async def _detect_scenes(self, video_info: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Detect scene changes and segment video (mock implementation)"""
-        # In production, would use PySceneDetect or similar
+        """Detect scene changes and segment video"""
+        if 'frame_analysis' in video_info:
+            # Histogram-difference cuts found by the frame pipeline
+            return [
+                {
+                    'scene_id': f'scene_{i+1}',
+                    'start_time': scene['start_time'],
+                    'end_time': scene['end_time'],
+                    'duration': scene['end_time'] - scene['start_time'],
+                    'start_frame': scene['start_frame'],
+                    'end_frame': scene['end_frame'],
+                    'cut_strength': scene['histogram_difference'],
+                    'description': f'Scene {i+1}'
+                }
+                for i, scene in enumerate(video_info['frame_analysis']['scenes'])
+            ]
+        
+        # Fallback for undecodable sources: fixed-length segments
         duration = video_info.get('duration', 0)
         scenes = []
         
@@ -390,12 +435,30 @@ class VideoProcessingService:
         
         quality_metrics = {
             'resolution_score': self._assess_resolution_quality(resolution),
-            'frame_rate_score': self._assess_frame_rate_quality(frame_rate),
+            'frame_rate_score': self._assess_frame_rate_quality(frame_rate or 0),
             'encoding_quality': 'good',  # Mock assessment
             'motion_smoothness': 0.8,  # Mock score
             'overall_quality': 0.8
         }
         
+        frame_stats = video_info.get('frame_analysis', {}).get('frame_statistics', {})
+        if frame_stats:
+            motion = frame_stats.get('motion', {})
+            noise = frame_stats['noise_level']['mean']
+            brightness = frame_stats['brightness']['mean']
+            # Large jumps relative to average motion indicate judder or dropped frames
+            if motion and motion['mean'] > 0:
+                spike = (motion['max'] - motion['mean']) / (motion['max'] + 1e-6)
+                quality_metrics['motion_smoothness'] = float(max(0.0, 1.0 - spike))
+            quality_metrics['noise_level'] = noise
+            quality_metrics['mean_brightness'] = brightness
+            quality_metrics['overall_quality'] = float(np.mean([
+                quality_metrics['resolution_score'],
+                quality_metrics['frame_rate_score'],
+                1.0 - noise,
+                1.0 - min(1.0, abs(brightness - 0.5) * 2)
+            ]))
+        
         return quality_metrics
     
     def _assess_resolution_quality(self, resolution: Dict[str, Any]) -> float:
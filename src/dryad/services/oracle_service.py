@@ -5,6 +5,7 @@ Platform-agnostic service for oracle (LLM) operations.
 Ported from TypeScript services/oracle-service-wrapper.ts
 """
 
+import asyncio
 import uuid
 from typing import List, Optional, Dict, Any
 from datetime import datetime
@@ -15,12 +16,13 @@ from sqlalchemy.orm import selectinload
 from dryad.database.models.dialogue import Dialogue
 from dryad.database.models.dialogue_message import DialogueMessage, MessageRole
 from dryad.database.models.branch import Branch
-from dryad.database.models.vessel import Vessel
 from dryad.schemas.dialogue_schemas import (
     ConsultationRequest, ConsultationResponse, ProcessResponseRequest,
     ProcessResponseResult, DialogueResponse, ProviderInfo, ParsedWisdom
 )
+from dryad.core.consultation_context import ConsultationContext, get_consultation_context_cache
 from dryad.core.exceptions import DryadError, DryadErrorCode, NotFoundError, wrap_error
+from dryad.core.llm_cache import get_llm_response_cache, model_id
 from dryad.core.llm_config import create_llm
 from dryad.core.llm_error_handler import llm_error_handler
 from dryad.core.logging_config import get_logger
@@ -34,6 +36,8 @@ class OracleService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.llm = create_llm()  # Use DRYAD.AI's LLM system
+        # Concurrent consults (one per provider) share self.db; LLM calls still overlap
+        self._db_lock = asyncio.Lock()
         logger.info("OracleService initialized")
     
     async def get_providers(self) -> List[ProviderInfo]:
@@ -123,25 +127,12 @@ class OracleService:
         try:
             logger.debug(f"Preparing consultation for branch {request.branch_id}")
             
-            # Validate branch exists
-            branch_stmt = select(Branch).where(Branch.id == request.branch_id)
-            branch_result = await self.db.execute(branch_stmt)
-            branch = branch_result.scalar_one_or_none()
-            
-            if not branch:
-                raise NotFoundError("Branch", request.branch_id)
-            
-            # Get vessel for context
-            vessel_stmt = select(Vessel).where(Vessel.branch_id == request.branch_id)
-            vessel_result = await self.db.execute(vessel_stmt)
-            vessel = vessel_result.scalar_one_or_none()
-            
-            if not vessel:
-                raise NotFoundError("Vessel", f"for branch {request.branch_id}")
+            # Branch, vessel and inherited context in one query (or none, when cached)
+            context = await self.get_consultation_context(request.branch_id)
             
             # Build context-aware prompt
             formatted_prompt = await self._build_consultation_prompt(
-                vessel, request.query, request.provider_id
+                context, request.query, request.provider_id
             )
             
             response = ConsultationResponse(
@@ -149,7 +140,7 @@ class OracleService:
                 metadata={
                     "provider": request.provider_id,
                     "branch_id": request.branch_id,
-                    "vessel_id": vessel.id,
+                    "vessel_id": context.vessel_id,
                     "timestamp": datetime.utcnow()
                 }
             )
@@ -165,6 +156,25 @@ class OracleService:
                 {"branch_id": request.branch_id, "provider_id": request.provider_id}
             )
     
+    async def get_consultation_context(self, branch_id: str) -> ConsultationContext:
+        """
+        Get the branch, vessel and inherited context for a consultation.
+        
+        Args:
+            branch_id: Branch ID
+            
+        Returns:
+            Consultation context
+        """
+        async with self._db_lock:
+            exists, context = await get_consultation_context_cache().get(self.db, branch_id)
+        
+        if not exists:
+            raise NotFoundError("Branch", branch_id)
+        if context is None:
+            raise NotFoundError("Vessel", f"for branch {branch_id}")
+        return context
+    
     async def consult_oracle(self, request: ConsultationRequest) -> ProcessResponseResult:
         """
         Consult oracle and process response with comprehensive error handling.
@@ -176,52 +186,8 @@ class OracleService:
             Process response result
         """
         try:
-            logger.debug(f"Consulting oracle for branch {request.branch_id}")
-
-            # Prepare consultation
-            consultation = await self.prepare_consultation(request)
-
-            # Define fallback response
-            fallback_response = (
-                f"I understand your query: '{request.query}'. "
-                "However, I'm currently experiencing technical difficulties. "
-                "The system is working to restore full functionality. "
-                "Please try again in a few moments, or try rephrasing your question."
-            )
-
-            # Execute LLM call with error handling and circuit breaker
-            async def llm_call():
-                return await self.llm.ainvoke(consultation.formatted_prompt)
-
-            response = await llm_error_handler.safe_llm_call(
-                provider_id=request.provider_id or "default",
-                llm_func=llm_call,
-                fallback_response=fallback_response
-            )
-
-            # Extract content from response (handle both string and object responses)
-            if isinstance(response, str):
-                raw_response = response
-            elif hasattr(response, 'content'):
-                raw_response = response.content
-            else:
-                raw_response = str(response)
-
-            # Ensure we have a non-empty response
-            if not raw_response or not raw_response.strip():
-                logger.warning(f"LLM returned empty response for branch {request.branch_id}, using fallback")
-                raw_response = fallback_response
-
-            # Process response
-            process_request = ProcessResponseRequest(
-                branch_id=request.branch_id,
-                provider_id=request.provider_id,
-                raw_response=raw_response,
-                original_query=request.query
-            )
-
-            result = await self.process_response(process_request)
-
+            raw_response = await self.generate_consultation(request)
+            result = await self.record_consultation(request, raw_response)
             logger.info(f"Oracle consultation completed for branch {request.branch_id}")
             return result
 
@@ -254,6 +220,95 @@ class OracleService:
                     {"branch_id": request.branch_id, "provider_id": request.provider_id}
                 )
     
+    async def generate_consultation(self, request: ConsultationRequest) -> str:
+        """
+        Run the LLM side of a consultation without writing anything.
+
+        It only reads the consultation context and calls the model, so it is
+        safe to run more than once for one request (a hedged attempt) or to
+        cancel midway. Persist the chosen answer with record_consultation.
+
+        Args:
+            request: Consultation request
+
+        Returns:
+            The oracle's raw answer (a fallback message if the provider is unavailable)
+        """
+        logger.debug(f"Consulting oracle for branch {request.branch_id}")
+
+        # Prepare consultation
+        consultation = await self.prepare_consultation(request)
+
+        # Define fallback response
+        fallback_response = (
+            f"I understand your query: '{request.query}'. "
+            "However, I'm currently experiencing technical difficulties. "
+            "The system is working to restore full functionality. "
+            "Please try again in a few moments, or try rephrasing your question."
+        )
+
+        # Execute LLM call with error handling and circuit breaker
+        async def llm_call():
+            return await self.llm.ainvoke(consultation.formatted_prompt)
+
+        async def cached_call():
+            response = await llm_error_handler.safe_llm_call(
+                provider_id=request.provider_id or "default",
+                llm_func=llm_call,
+                fallback_response=fallback_response
+            )
+
+            # Extract content from response (handle both string and object responses)
+            if isinstance(response, str):
+                return response
+            elif hasattr(response, 'content'):
+                return response.content
+            return str(response)
+
+        # Identical prompts on the same branch reuse a cached answer, so one branch's
+        # answers are never served to another; fallback and empty answers are never cached
+        raw_response = await get_llm_response_cache().get_or_compute(
+            model=model_id(self.llm),
+            prompt=consultation.formatted_prompt,
+            compute=cached_call,
+            params={
+                "branch": str(request.branch_id),
+                "provider": request.provider_id,
+                "temperature": getattr(self.llm, "temperature", None)
+            },
+            namespace="oracle_consultation",
+            cacheable=lambda text: bool(text and text.strip()) and text != fallback_response
+        )
+
+        # Ensure we have a non-empty response
+        if not raw_response or not raw_response.strip():
+            logger.warning(f"LLM returned empty response for branch {request.branch_id}, using fallback")
+            raw_response = fallback_response
+        return raw_response
+
+    async def record_consultation(self, request: ConsultationRequest, raw_response: str) -> ProcessResponseResult:
+        """
+        Persist a consultation answer as a dialogue.
+
+        prepare_consultation already validated the branch, and the result
+        carries the written dialogue, so nothing is read back.
+
+        Args:
+            request: The consultation request the answer belongs to
+            raw_response: Answer returned by generate_consultation
+
+        Returns:
+            Process response result
+        """
+        process_request = ProcessResponseRequest(
+            branch_id=request.branch_id,
+            provider_id=request.provider_id,
+            raw_response=raw_response,
+            original_query=request.query
+        )
+        async with self._db_lock:
+            return await self._persist_dialogue(process_request)
+
     async def process_response(self, request: ProcessResponseRequest) -> ProcessResponseResult:
         """
         Process a response from an oracle.
@@ -264,17 +319,37 @@ class OracleService:
         Returns:
             Process response result
         """
-        try:
-            logger.debug(f"Processing oracle response for branch {request.branch_id}")
-            
-            # Validate branch exists
-            branch_stmt = select(Branch).where(Branch.id == request.branch_id)
-            branch_result = await self.db.execute(branch_stmt)
-            branch = branch_result.scalar_one_or_none()
-            
-            if not branch:
-                raise NotFoundError("Branch", request.branch_id)
+        async with self._db_lock:
+            try:
+                logger.debug(f"Processing oracle response for branch {request.branch_id}")
+                
+                # Validate branch exists
+                branch_stmt = select(Branch.id).where(Branch.id == request.branch_id)
+                branch_result = await self.db.execute(branch_stmt)
+                
+                if branch_result.scalar_one_or_none() is None:
+                    raise NotFoundError("Branch", request.branch_id)
+                
+            except Exception as e:
+                await self.db.rollback()
+                logger.error(f"Failed to process oracle response: {e}")
+                raise wrap_error(
+                    e, DryadErrorCode.ORACLE_CONSULTATION_FAILED,
+                    "Failed to process oracle response",
+                    {"branch_id": request.branch_id, "provider_id": request.provider_id}
+                )
             
+            return await self._persist_dialogue(request)
+    
+    async def _persist_dialogue(self, request: ProcessResponseRequest) -> ProcessResponseResult:
+        """
+        Write a dialogue and its messages for an already validated branch.
+        
+        The result carries the written dialogue. Every column is set client-side
+        and the session does not expire on commit, so it is built from the
+        identity map without a read-back query.
+        """
+        try:
             # Create dialogue
             dialogue_id = str(uuid.uuid4())
             dialogue = Dialogue(
@@ -311,18 +386,20 @@ class OracleService:
                 "questions": parsed_wisdom.questions
             }
             
-            # Save dialogue
+            # Save dialogue (commit flushes it)
             self.db.add(dialogue)
-            await self.db.flush()  # Flush to get the dialogue ID assigned
             await self.db.commit()
 
-            # Count messages without accessing the relationship
-            message_count = len(dialogue.messages) if dialogue.messages else 0
+            # Messages were appended in memory, so this does not load the relationship
+            message_count = len(dialogue.messages)
+            dialogue_response = DialogueResponse.model_validate(dialogue)
+            dialogue_response.message_count = message_count
 
             result = ProcessResponseResult(
                 dialogue_id=dialogue.id,
                 parsed_wisdom=parsed_wisdom,
-                message_count=message_count
+                message_count=message_count,
+                dialogue=dialogue_response
             )
             
             logger.info(f"Oracle response processed successfully for branch {request.branch_id}")
@@ -437,16 +514,19 @@ class OracleService:
     
     async def _build_consultation_prompt(
         self,
-        vessel: Vessel,
+        context: ConsultationContext,
         query: str,
         provider_id: str
     ) -> str:
         """Build context-aware prompt for LLM consultation."""
         # TODO: Load vessel content and build comprehensive prompt
-        # For now, return a basic prompt
+        # For now, return a basic prompt with the branch path
         
+        path = " > ".join([ancestor.name for ancestor in reversed(context.ancestors)] + [context.branch_name])
         prompt = f"""You are an AI oracle helping with knowledge exploration in a branching tree structure.
 
+Branch: {path}
+
 Current Query: {query}
 
 Please provide a thoughtful response that builds on the existing context and helps advance the exploration. Consider multiple perspectives and suggest potential branching points for further exploration."""
@@ -11,17 +11,20 @@ import numpy as np
 import pandas as pd
 import json
 import uuid
-import re
-from typing import Dict, Any, List, Optional, Union, Tuple
+from typing import Dict, Any, List, Optional, Set, Union, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
-from collections import defaultdict, Counter
+from collections import defaultdict
 import statistics
 from pathlib import Path
 
+from dryad.core.config import settings
 from .educational_apis import ResearchDataAPI, ResearchQuery, ResearchDatabase
 from .tool_integration import UniversalToolRegistry, ToolCategory
+from dryad.university.services.literature_engine import LiteratureReviewPipeline, LiteratureSource, PaperIndex
+from dryad.university.services.similarity_index import SimilarityIndex, get_similarity_index
+from dryad.university.services.stats_engine import SpillingLRUCache, StreamingStatsEngine
 
 logger = logging.getLogger(__name__)
 
@@ -72,8 +75,9 @@ class Dataset:
     dataset_id: str
     name: str
     description: str
-    data: pd.DataFrame
+    data: pd.DataFrame = field(default_factory=pd.DataFrame)
     metadata: Dict[str, Any] = field(default_factory=dict)
+    source: Optional[str] = None  # CSV/Parquet/.npy path, profiled in batches instead of loaded
     quality_score: float = 0.0
     quality_issues: List[str] = field(default_factory=list)
     created_at: datetime = field(default_factory=datetime.utcnow)
@@ -285,19 +289,21 @@ class ResearchToolsEngine:
             
             # Convert data to Dataset if needed
             if isinstance(data, dict):
-                # Create DataFrame from dictionary data
+                # Inline rows become a DataFrame; a "source" path is streamed instead of loaded
                 df = pd.DataFrame(data.get("data", []))
                 dataset = Dataset(
                     dataset_id=data.get("dataset_id", f"dataset_{uuid.uuid4().hex[:8]}"),
                     name=data.get("name", "Research Dataset"),
                     description=data.get("description", ""),
-                    data=df
+                    data=df,
+                    source=data.get("source")
                 )
             else:
                 dataset = data
             
             # Create analysis request
             analysis_request = AnalysisRequest(
+                request_id="",  # generated in __post_init__
                 analysis_type=AnalysisType(analysis_type),
                 dataset=dataset,
                 parameters=parameters or {},
@@ -649,10 +655,18 @@ class ResearchToolsEngine:
 class DataAnalysisEngine:
     """Advanced data analysis and visualization tools"""
     
-    def __init__(self):
-        self.analysis_cache: Dict[str, AnalysisResult] = {}
+    def __init__(self, cache_size: int = 256, cache_spill_dir: Optional[str] = None):
+        # Bounded LRU; older results spill to disk instead of growing the worker's heap
+        self.analysis_cache = SpillingLRUCache(max_items=cache_size, spill_dir=cache_spill_dir)
+        self.profile_cache = SpillingLRUCache(max_items=32, spill=False)
+        self.stats_engine = StreamingStatsEngine()
         self.visualization_library = "matplotlib"  # Default visualization library
     
+    def close(self):
+        """Drop cached results and remove the analysis cache's spill directory"""
+        self.analysis_cache.close()
+        self.profile_cache.close()
+    
     async def perform_analysis(self, request: AnalysisRequest) -> AnalysisResult:
         """Perform comprehensive statistical analysis"""
         start_time = datetime.utcnow()
@@ -761,15 +775,17 @@ class DataAnalysisEngine:
         try:
             logger.info(f"Identifying patterns in dataset {dataset.dataset_id}")
             
-            df = dataset.data
+            # One streaming pass yields summary, outliers, trends, correlations and a row sample
+            profile = await self._get_profile(dataset)
+            df = self._rows_for_patterns(dataset, profile)
             
             # Statistical patterns
             patterns = {
-                "statistical_summary": await self._calculate_statistical_summary(df),
-                "outliers": await self._detect_outliers(df),
-                "trends": await self._identify_trends(df),
+                "statistical_summary": await self._calculate_statistical_summary(profile),
+                "outliers": await self._detect_outliers(profile),
+                "trends": await self._identify_trends(profile),
                 "seasonality": await self._detect_seasonality(df),
-                "correlations": await self._find_correlations(df),
+                "correlations": await self._find_correlations(profile),
                 "clusters": await self._identify_clusters(df)
             }
             
@@ -861,22 +877,61 @@ class DataAnalysisEngine:
                 "error": str(e)
             }
     
+    async def _get_profile(self, dataset: Dataset) -> Dict[str, Any]:
+        """Single-pass streaming profile of a dataset, memoized per data version"""
+        if dataset.source:
+            source_path = Path(dataset.source)
+            stat = source_path.stat()
+            key = f"{dataset.source}:{stat.st_mtime_ns}:{stat.st_size}"
+            source = dataset.source
+        else:
+            key = f"{dataset.dataset_id}:{self._content_hash(dataset.data)}"
+            source = dataset.data
+        
+        profile = self.profile_cache.get(key)
+        if profile is None:
+            profile = await self.stats_engine.profile_async(source)
+            self.profile_cache[key] = profile
+        return profile
+    
+    @staticmethod
+    def _sample_frame(profile: Dict[str, Any]) -> pd.DataFrame:
+        """The profile's uniform row sample of the numeric columns, indexed by row position"""
+        sample = profile["sample"]
+        return pd.DataFrame(sample["values"], index=sample["row_positions"], columns=profile["numeric_columns"], dtype=float)
+    
+    def _rows_for_patterns(self, dataset: Dataset, profile: Dict[str, Any]) -> pd.DataFrame:
+        """Rows for row-level checks: the frame itself, or the streamed sample when it is out of core"""
+        return self._sample_frame(profile) if dataset.source else dataset.data
+    
+    @staticmethod
+    def _content_hash(data: pd.DataFrame) -> str:
+        """Fingerprint of an in-memory frame, so in-place edits get a new profile"""
+        try:
+            rows = pd.util.hash_pandas_object(data, index=True)
+        except TypeError:
+            # Unhashable cells (lists, dicts) are hashed by their text form
+            rows = pd.util.hash_pandas_object(data.astype(str), index=True)
+        columns = pd.util.hash_pandas_object(pd.Index(data.columns.astype(str)), index=False)
+        return f"{int(rows.sum()):x}:{int(columns.sum()):x}:{data.shape}"
+    
     async def _perform_descriptive_analysis(self, dataset: Dataset) -> Dict[str, Any]:
         """Perform descriptive statistical analysis"""
-        df = dataset.data
+        profile = await self._get_profile(dataset)
+        summary = profile["summary"]
         
         return {
             "summary_statistics": {
-                "count": len(df),
-                "mean": df.mean(numeric_only=True).to_dict(),
-                "median": df.median(numeric_only=True).to_dict(),
-                "std": df.std(numeric_only=True).to_dict(),
-                "min": df.min(numeric_only=True).to_dict(),
-                "max": df.max(numeric_only=True).to_dict()
+                "count": profile["row_count"],
+                "mean": {col: stats["mean"] for col, stats in summary.items()},
+                "median": {col: stats["50%"] for col, stats in summary.items()},
+                "std": {col: stats["std"] for col, stats in summary.items()},
+                "min": {col: stats["min"] for col, stats in summary.items()},
+                "max": {col: stats["max"] for col, stats in summary.items()}
             },
-            "data_quality": await self._assess_data_quality(df),
-            "missing_values": df.isnull().sum().to_dict(),
-            "data_types": df.dtypes.to_dict()
+            "data_quality": self._quality_from_profile(profile),
+            "missing_values": profile["missing_values"],
+            "data_types": profile["data_types"]
         }
     
     async def _perform_inferential_analysis(self, dataset: Dataset, parameters: Dict[str, Any]) -> Dict[str, Any]:
@@ -904,26 +959,41 @@ class DataAnalysisEngine:
     
     async def _perform_exploratory_analysis(self, dataset: Dataset) -> Dict[str, Any]:
         """Perform exploratory data analysis"""
+        profile = await self._get_profile(dataset)
+        if dataset.source:
+            memory_usage = f"{Path(dataset.source).stat().st_size / 1024:.2f} KB on disk"
+        else:
+            memory_usage = f"{dataset.data.memory_usage(deep=True).sum() / 1024:.2f} KB"
+        
         return {
             "data_overview": {
-                "shape": dataset.data.shape,
-                "columns": list(dataset.data.columns),
-                "memory_usage": f"{dataset.data.memory_usage(deep=True).sum() / 1024:.2f} KB"
+                "shape": (profile["row_count"], profile["column_count"]),
+                "columns": list(profile["missing_values"].keys()),
+                "memory_usage": memory_usage
             },
-            "distributions": {},
+            "distributions": profile["summary"],
             "relationships": {},
             "patterns": []
         }
     
     async def _perform_correlation_analysis(self, dataset: Dataset) -> Dict[str, Any]:
         """Perform correlation analysis"""
-        numeric_df = dataset.data.select_dtypes(include=[np.number])
-        correlation_matrix = numeric_df.corr()
+        profile = await self._get_profile(dataset)
+        strong = profile["strong_correlations"]
+        
+        weak_correlations = []
+        columns = profile["numeric_columns"]
+        matrix = profile["correlation_matrix"]
+        for i in range(len(columns)):
+            for j in range(i + 1, len(columns)):
+                value = matrix[columns[i]][columns[j]]
+                if value is not None and abs(value) < 0.3:
+                    weak_correlations.append({"var1": columns[i], "var2": columns[j], "correlation": value})
         
         return {
-            "correlation_matrix": correlation_matrix.to_dict(),
-            "strong_correlations": [],
-            "weak_correlations": []
+            "correlation_matrix": matrix,
+            "strong_correlations": strong,
+            "weak_correlations": weak_correlations
         }
     
     async def _generate_visualizations(
@@ -935,17 +1005,22 @@ class DataAnalysisEngine:
         """Generate visualizations for analysis results"""
         visualizations = []
         
+        # Out-of-core datasets are charted from the profile's uniform row sample
+        sampled = bool(dataset.source)
+        frame = self._sample_frame(await self._get_profile(dataset)) if sampled else dataset.data
+        
         # Generate basic visualizations based on data
-        if not dataset.data.empty:
-            numeric_cols = dataset.data.select_dtypes(include=[np.number]).columns
+        if not frame.empty:
+            numeric_cols = frame.select_dtypes(include=[np.number]).columns
             
             if len(numeric_cols) >= 1:
                 visualizations.append({
                     "type": "histogram",
                     "title": "Distribution of First Numeric Variable",
+                    "sampled": sampled,
                     "data": {
                         "column": numeric_cols[0],
-                        "values": dataset.data[numeric_cols[0]].tolist()
+                        "values": frame[numeric_cols[0]].tolist()
                     }
                 })
             
@@ -953,11 +1028,12 @@ class DataAnalysisEngine:
                 visualizations.append({
                     "type": "scatter_plot",
                     "title": "Relationship Between First Two Numeric Variables",
+                    "sampled": sampled,
                     "data": {
                         "x_column": numeric_cols[0],
                         "y_column": numeric_cols[1],
-                        "x_values": dataset.data[numeric_cols[0]].tolist(),
-                        "y_values": dataset.data[numeric_cols[1]].tolist()
+                        "x_values": frame[numeric_cols[0]].tolist(),
+                        "y_values": frame[numeric_cols[1]].tolist()
                     }
                 })
         
@@ -1055,79 +1131,37 @@ class DataAnalysisEngine:
             "matrix": [[np.random.random() for _ in range(10)] for _ in range(10)]
         }
     
-    async def _calculate_statistical_summary(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Calculate statistical summary"""
-        return df.describe().to_dict()
-    
-    async def _detect_outliers(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Detect outliers in data"""
-        outliers = []
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        
-        for col in numeric_cols:
-            q1 = df[col].quantile(0.25)
-            q3 = df[col].quantile(0.75)
-            iqr = q3 - q1
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-            
-            col_outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)]
-            if not col_outliers.empty:
-                outliers.append({
-                    "column": col,
-                    "count": len(col_outliers),
-                    "percentage": len(col_outliers) / len(df) * 100
-                })
-        
-        return outliers
-    
-    async def _identify_trends(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Identify trends in data"""
-        trends = []
-        # Simplified trend detection
-        for col in df.select_dtypes(include=[np.number]).columns:
-            correlation = np.corrcoef(df.index, df[col])[0, 1]
-            if abs(correlation) > 0.5:
-                trends.append({
-                    "column": col,
-                    "trend": "increasing" if correlation > 0 else "decreasing",
-                    "strength": abs(correlation)
-                })
-        return trends
+    async def _calculate_statistical_summary(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Calculate statistical summary (describe-style, per column)"""
+        return profile["summary"]
+    
+    async def _detect_outliers(self, profile: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Detect IQR outliers; counts are estimated from the quantile sketch"""
+        return profile["outliers"]
+    
+    async def _identify_trends(self, profile: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Identify trends as correlation with row position"""
+        return profile["trends"]
     
     async def _detect_seasonality(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """Detect seasonality patterns"""
         # Simplified seasonality detection
         return []
     
-    async def _find_correlations(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    async def _find_correlations(self, profile: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Find correlations between variables"""
-        numeric_df = df.select_dtypes(include=[np.number])
-        corr_matrix = numeric_df.corr()
-        
-        strong_correlations = []
-        for i in range(len(corr_matrix.columns)):
-            for j in range(i+1, len(corr_matrix.columns)):
-                corr_value = corr_matrix.iloc[i, j]
-                if abs(corr_value) > 0.7:
-                    strong_correlations.append({
-                        "var1": corr_matrix.columns[i],
-                        "var2": corr_matrix.columns[j],
-                        "correlation": corr_value
-                    })
-        
-        return strong_correlations
+        return profile["strong_correlations"]
     
     async def _identify_clusters(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """Identify clusters in data"""
         # Simplified cluster identification
         return []
     
-    async def _assess_data_quality(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Assess data quality"""
-        total_cells = df.size
-        missing_cells = df.isnull().sum().sum()
-        missing_percentage = (missing_cells / total_cells) * 100
+    def _quality_from_profile(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Assess data quality from streamed null counts"""
+        total_cells = profile["row_count"] * profile["column_count"]
+        missing_cells = sum(profile["missing_values"].values())
+        missing_percentage = (missing_cells / total_cells) * 100 if total_cells else 0.0
         
         quality_score = 100 - missing_percentage
         if quality_score >= 90:
@@ -1145,8 +1179,8 @@ class DataAnalysisEngine:
             "quality_score": quality_score,
             "quality_level": quality_level.value,
             "missing_percentage": missing_percentage,
-            "total_records": len(df),
-            "total_variables": len(df.columns)
+            "total_records": profile["row_count"],
+            "total_variables": profile["column_count"]
         }
     
     async def _generate_analysis_summary(self, analysis_results: Dict[str, Any]) -> str:
@@ -1177,29 +1211,51 @@ class DataAnalysisEngine:
 class LiteratureReviewer:
     """Automated literature review and synthesis"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        sources: Optional[List[LiteratureSource]] = None,
+        rate_limits: Optional[Dict[str, float]] = None
+    ):
         self.review_cache: Dict[str, Any] = {}
         self.themes_cache: Dict[str, Any] = {}
+        self.rate_limits = rate_limits or {}
+        self.pipeline = LiteratureReviewPipeline(sources or [])
+    
+    def register_source(self, source: LiteratureSource) -> None:
+        """Register a literature source, replacing any source with the same name"""
+        self.pipeline.register_source(source)
+    
+    def _ensure_database_sources(self, databases: List[ResearchDatabase]) -> None:
+        """Register the built-in search for databases without a custom source"""
+        for database in databases:
+            if database.value in self.pipeline.sources:
+                continue
+            
+            async def fetch(review_request, cursor, database=database):
+                return await self._search_database(database, review_request)
+            
+            self.pipeline.register_source(LiteratureSource(
+                name=database.value,
+                fetch=fetch,
+                rate_limit=self.rate_limits.get(database.value, 5.0)
+            ))
     
     async def conduct_systematic_review(self, review_request: LiteratureReviewRequest) -> Dict[str, Any]:
         """Conduct systematic literature review"""
         try:
             logger.info(f"Conducting systematic review: {review_request.research_question}")
             
-            # Search databases
-            search_results = []
-            for database in review_request.databases:
-                result = await self._search_database(database, review_request)
-                search_results.append(result)
-            
-            # Combine and filter results
-            all_papers = []
-            for result in search_results:
-                all_papers.extend(result.get("papers", []))
+            # Search all databases concurrently into one deduplicated index
+            self._ensure_database_sources(review_request.databases)
+            index, source_reports = await self.pipeline.search(
+                review_request,
+                [db.value for db in review_request.databases]
+            )
             
             # Apply inclusion/exclusion criteria
-            included_papers = await self._apply_inclusion_criteria(all_papers, review_request)
-            excluded_papers = [p for p in all_papers if p not in included_papers]
+            included_ids = await self._apply_inclusion_criteria(index, review_request)
+            excluded_count = len(index) - len(included_ids)
+            included_papers = index.papers(pid for pid in index.ids if pid in included_ids)
             
             # Assess quality
             quality_assessed_papers = await self._assess_paper_quality(included_papers, review_request)
@@ -1208,10 +1264,12 @@ class LiteratureReviewer:
             return {
                 "research_question": review_request.research_question,
                 "databases_searched": [db.value for db in review_request.databases],
-                "total_papers": len(all_papers),
+                "total_papers": len(index),
+                "duplicates_removed": index.duplicates,
                 "included_papers": len(final_papers),
-                "excluded_papers": len(excluded_papers),
+                "excluded_papers": excluded_count,
                 "papers": final_papers,
+                "source_reports": source_reports,
                 "search_strategy": review_request.search_strategy,
                 "review_timestamp": datetime.utcnow().isoformat()
             }
@@ -1229,44 +1287,18 @@ class LiteratureReviewer:
         try:
             logger.info(f"Extracting themes from {len(papers)} papers")
             
-            # Extract keywords and topics
-            themes = {}
-            keyword_frequency = Counter()
-            
-            for paper in papers:
-                title = paper.get("title", "").lower()
-                abstract = paper.get("abstract", "").lower()
-                
-                # Extract keywords (simplified)
-                words = re.findall(r'\b\w+\b', title + " " + abstract)
-                meaningful_words = [w for w in words if len(w) > 3 and w not in ['the', 'and', 'for', 'are', 'with', 'this', 'that', 'from', 'they', 'have', 'been', 'were', 'will']]
-                
-                # Count frequency
-                for word in meaningful_words:
-                    keyword_frequency[word] += 1
-            
-            # Identify top themes
-            top_keywords = keyword_frequency.most_common(20)
-            
-            # Categorize papers by themes
-            for keyword, freq in top_keywords:
-                themes[keyword] = {
-                    "frequency": freq,
-                    "papers": [],
-                    "related_keywords": []
-                }
+            # One tokenization pass builds the term index; themes read its postings
+            index = PaperIndex()
+            paper_ids = [index.add(paper, copy=False)[0] for paper in papers]
+            theme_index = index.themes(20)
+            themes = theme_index["themes"]
+            top_keywords = theme_index["top_keywords"]
             
-            # Assign papers to themes
-            for paper in papers:
-                title_abstract = (paper.get("title", "") + " " + paper.get("abstract", "")).lower()
-                paper_themes = []
-                
-                for keyword in themes:
-                    if keyword in title_abstract:
-                        themes[keyword]["papers"].append(paper)
-                        paper_themes.append(keyword)
-                
-                paper["themes"] = paper_themes
+            # Duplicate entries share the themes of their indexed record
+            for paper, paper_id in zip(papers, paper_ids):
+                indexed = index.get(paper_id) if paper_id else None
+                if indexed is not paper:
+                    paper["themes"] = list(indexed["themes"]) if indexed else []
             
             return {
                 "success": True,
@@ -1450,30 +1482,21 @@ class LiteratureReviewer:
             "search_timestamp": datetime.utcnow().isoformat()
         }
     
-    async def _apply_inclusion_criteria(self, papers: List[Dict[str, Any]], review_request: LiteratureReviewRequest) -> List[Dict[str, Any]]:
-        """Apply inclusion and exclusion criteria"""
-        included_papers = []
+    async def _apply_inclusion_criteria(self, index: PaperIndex, review_request: LiteratureReviewRequest) -> Set[str]:
+        """Apply inclusion and exclusion criteria; returns the included paper IDs"""
+        # A paper is relevant when it contains at least one research question term
+        included_ids, scores = self.pipeline.select(index, review_request.research_question, min_terms=1)
         
-        for paper in papers:
-            # Simple inclusion criteria check
-            title = paper.get("title", "").lower()
-            abstract = paper.get("abstract", "").lower()
-            research_question_words = review_request.research_question.lower().split()
-            
-            # Check if paper is relevant
-            relevance_score = sum(1 for word in research_question_words if word in title or word in abstract)
-            
-            if relevance_score >= 1:  # At least one word matches
-                paper["relevance_score"] = relevance_score
-                included_papers.append(paper)
+        for paper_id, relevance_score in scores.items():
+            index.get(paper_id)["relevance_score"] = relevance_score
         
-        return included_papers
+        return included_ids
     
     async def _assess_paper_quality(self, papers: List[Dict[str, Any]], review_request: LiteratureReviewRequest) -> List[Dict[str, Any]]:
         """Assess quality of papers"""
-        for paper in papers:
-            # Simulate quality assessment
-            paper["quality_score"] = np.random.beta(2, 2)  # Quality between 0 and 1
+        # Simulate quality assessment (quality between 0 and 1)
+        for paper, quality_score in zip(papers, np.random.beta(2, 2, size=len(papers))):
+            paper["quality_score"] = float(quality_score)
         
         return papers
     
@@ -1934,8 +1957,29 @@ class ResearchValidator:
 class PlagiarismDetector:
     """Plagiarism detection and prevention"""
     
-    def __init__(self):
+    def __init__(self, corpus_index: Optional[SimilarityIndex] = None, match_threshold: Optional[float] = None):
         self.detection_cache: Dict[str, Any] = {}
+        self._corpus_index = corpus_index
+        if match_threshold is None:
+            match_threshold = getattr(settings, "PLAGIARISM_MATCH_THRESHOLD", 0.2)
+        self.match_threshold = match_threshold
+    
+    @property
+    def corpus_index(self) -> SimilarityIndex:
+        """Comparison corpus, opened at PLAGIARISM_INDEX_PATH on first use"""
+        if self._corpus_index is None:
+            self._corpus_index = get_similarity_index(getattr(settings, "PLAGIARISM_INDEX_PATH", None))
+        return self._corpus_index
+    
+    async def add_source_document(
+        self, 
+        document_id: str, 
+        text: str, 
+        title: Optional[str] = None,
+        source: Optional[str] = None
+    ) -> int:
+        """Add a document to the comparison corpus; returns passages indexed"""
+        return await self.corpus_index.add_document_async(document_id, text, title, source)
     
     async def check_plagiarism(self, content: Dict[str, Any]) -> Dict[str, Any]:
         """Check content for plagiarism"""
@@ -1943,8 +1987,9 @@ class PlagiarismDetector:
             text_content = content.get("text", "")
             citations = content.get("citations", [])
             
-            # Calculate similarity scores
-            similarity_score = await self._calculate_similarity_score(text_content)
+            # Compare against the indexed corpus
+            corpus_matches = await self._match_against_corpus(text_content)
+            similarity_score = corpus_matches["similarity_score"]
             
             # Check citation adequacy
             citation_adequacy = await self._assess_citation_adequacy(text_content, citations)
@@ -1958,6 +2003,7 @@ class PlagiarismDetector:
             return {
                 "success": True,
                 "similarity_score": similarity_score,
+                "matched_sources": corpus_matches["matches"],
                 "citation_adequacy_score": citation_adequacy,
                 "risk_level": risk_level,
                 "issues": issues,
@@ -1972,15 +2018,11 @@ class PlagiarismDetector:
                 "error": str(e)
             }
     
-    async def _calculate_similarity_score(self, text: str) -> float:
-        """Calculate similarity score to known sources"""
-        # Simplified similarity calculation
-        word_count = len(text.split())
-        
-        # Simulate similarity check against database
-        similarity_score = np.random.beta(2, 8)  # Most content should have low similarity
-        
-        return similarity_score
+    async def _match_against_corpus(self, text: str) -> Dict[str, Any]:
+        """Share of the text covered by verified corpus matches, plus top source spans"""
+        if not text.strip():
+            return {"similarity_score": 0.0, "matches": []}
+        return await self.corpus_index.query_async(text, top_k=5, threshold=self.match_threshold)
     
     async def _assess_citation_adequacy(self, text: str, citations: List[Dict[str, Any]]) -> float:
         """Assess adequacy of citations"""
@@ -335,4 +335,34 @@ async def assign_curriculum_to_agent(
     agent.current_curriculum_id = curriculum_id
     db.commit()
     
-    return {"message": f"Curriculum '{curriculum.name}' assigned to agent '{agent.name}'"}
\ No newline at end of file
+    return {"message": f"Curriculum '{curriculum.name}' assigned to agent '{agent.name}'"}
+
+@router.get("/{curriculum_id}/learning-path")
+async def get_learning_path(curriculum_id: str, db: Session = Depends(get_db)):
+    """Get a curriculum's skills in prerequisite order"""
+    curriculum = db.query(CurriculumPath.id).filter(CurriculumPath.id == curriculum_id).first()
+    if not curriculum:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Curriculum not found"
+        )
+    
+    learning_path = CurriculumEngine(db).generate_learning_path(curriculum_id)
+    return {"curriculum_id": curriculum_id, "total_skills": len(learning_path), "learning_path": learning_path}
+
+@router.get("/agents/{agent_id}/progress")
+async def get_agent_curriculum_progress(agent_id: str, db: Session = Depends(get_db)):
+    """Get an agent's progress through its current curriculum"""
+    progress = CurriculumEngine(db).get_curriculum_progress(agent_id)
+    if progress is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Agent not found or has no curriculum assigned"
+        )
+    
+    return progress
+
+@router.get("/agents/{agent_id}/next-skills")
+async def get_agent_next_skills(agent_id: str, limit: int = 5, db: Session = Depends(get_db)):
+    """Get the skills an agent has unlocked in its current curriculum"""
+    return {"agent_id": agent_id, "next_skills": CurriculumEngine(db).get_next_skills(agent_id, limit=limit)}
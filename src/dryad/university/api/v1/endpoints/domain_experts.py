@@ -9,7 +9,7 @@ RESTful API endpoints for domain expert agents:
 - Expert session analytics and reporting
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 import uuid
@@ -328,6 +328,41 @@ async def get_domain_knowledge(
         logger.error(f"Error retrieving knowledge base: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/knowledge/{knowledge_id}/neighborhood")
+async def get_knowledge_neighborhood(
+    knowledge_id: str,
+    hops: int = 2,
+    direction: str = "both",
+    relationship_type: Optional[List[str]] = Query(None),
+    max_nodes: int = 500,
+    db: Session = Depends(get_db),
+    knowledge_system: KnowledgeManagementSystem = Depends(get_knowledge_system)
+):
+    """Retrieve the k-hop neighborhood of a knowledge entry"""
+    try:
+        if direction not in ("out", "in", "both"):
+            raise HTTPException(status_code=400, detail="direction must be one of: out, in, both")
+        if not 1 <= hops <= 5:
+            raise HTTPException(status_code=400, detail="hops must be between 1 and 5")
+        
+        neighborhood = await knowledge_system.get_knowledge_neighborhood(
+            knowledge_id=knowledge_id,
+            hops=hops,
+            direction=direction,
+            relationship_types=relationship_type,
+            max_nodes=max_nodes
+        )
+        
+        if "error" in neighborhood:
+            raise HTTPException(status_code=404, detail=neighborhood["error"])
+        
+        return neighborhood
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving knowledge neighborhood: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/knowledge/store")
 async def store_expert_knowledge(
     knowledge_request: Dict[str, Any],
@@ -762,6 +762,35 @@ def build_agent_knowledge_graph(
             detail=f"Failed to build knowledge graph: {str(e)}"
         )
 
+@router.get("/agents/{agent_id}/memory/knowledge-graph/neighborhood", response_model=Dict[str, Any])
+def get_agent_knowledge_neighborhood(
+    agent_id: str,
+    entity_id: str,
+    hops: int = Query(2, ge=1, le=5),
+    direction: str = Query("both", regex="^(out|in|both)$"),
+    relationship_types: Optional[List[str]] = Query(None),
+    max_nodes: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """Get the k-hop neighborhood of a knowledge entity in an agent's knowledge graph"""
+    try:
+        result = EnhancedUniversityService.get_agent_knowledge_neighborhood(
+            db=db,
+            agent_id=agent_id,
+            entity_id=entity_id,
+            hops=hops,
+            direction=direction,
+            relationship_types=relationship_types,
+            max_nodes=max_nodes
+        )
+        
+        return result
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get knowledge neighborhood: {str(e)}"
+        )
+
 @router.get("/agents/{agent_id}/memory/analytics", response_model=Dict[str, Any])
 def get_agent_memory_analytics(
     agent_id: str,
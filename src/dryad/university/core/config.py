@@ -62,6 +62,43 @@ class Settings(BaseSettings):
     ANTHROPIC_API_KEY: Optional[str] = None
     GEMINI_API_KEY: Optional[str] = None
     
+    # Tool execution scheduler
+    TOOL_MAX_CONCURRENT_PER_TOOL: int = 4
+    TOOL_MAX_CONCURRENT_PER_AGENT: int = 8
+    TOOL_MAX_CONCURRENT_TOTAL: int = 32
+    TOOL_MAX_QUEUE_DEPTH: int = 1000
+    TOOL_POOL_WORKERS_PER_CLASS: int = 4
+    
+    # Audit log storage
+    AUDIT_LOG_DIR: str = "./audit_logs"
+    AUDIT_SEGMENT_MAX_BYTES: int = 64 * 1024 * 1024
+    AUDIT_SEGMENT_MAX_AGE_SECONDS: int = 3600
+    AUDIT_RETENTION_DAYS: int = 365
+    AUDIT_QUEUE_SIZE: int = 10000
+    
+    # Plagiarism similarity index
+    PLAGIARISM_INDEX_PATH: str = "./dryad_plagiarism_index.db"
+    PLAGIARISM_SHINGLE_SIZE: int = 5
+    PLAGIARISM_NUM_PERM: int = 64
+    PLAGIARISM_LSH_BANDS: int = 32
+    PLAGIARISM_MATCH_THRESHOLD: float = 0.2
+    
+    # Agent learning-context retrieval index
+    CONTEXT_INDEX_MAX_AGENTS: int = 256
+    CONTEXT_INDEX_REFRESH_SECONDS: float = 30.0
+    CONTEXT_INDEX_CONFIDENCE_WEIGHT: float = 0.5
+    CONTEXT_INDEX_RECENCY_WEIGHT: float = 0.25
+    CONTEXT_INDEX_RECENCY_HALF_LIFE_DAYS: float = 30.0
+    
+    # Knowledge graph store
+    KNOWLEDGE_GRAPH_INDEX_MAX_GRAPHS: int = 64
+    
+    # Curriculum skill graphs and cached agent progress
+    CURRICULUM_GRAPH_MAX_TREES: int = 32
+    CURRICULUM_GRAPH_MAX_AGENTS: int = 100000
+    CURRICULUM_GRAPH_REFRESH_SECONDS: float = 30.0
+    CURRICULUM_GRAPH_PROGRESS_TTL_SECONDS: float = 300.0
+    
     # Redis
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
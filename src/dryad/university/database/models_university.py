@@ -9,7 +9,7 @@ Defines the database schema for the university system including:
 - Curriculum and progression tracking
 """
 
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Text, JSON, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from dryad.university.database.database import Base
@@ -443,6 +443,51 @@ class KnowledgeEntity(Base):
     # Relationships
     agent = relationship("UniversityAgent", backref="knowledge_entities")
 
+class KnowledgeGraphNode(Base):
+    """Materialized node of an agent or domain knowledge graph, with degree counters"""
+    __tablename__ = "knowledge_graph_nodes"
+    
+    graph_id = Column(String, primary_key=True)  # "agent:<agent_id>" or "domain:<domain>"
+    node_id = Column(String, primary_key=True)  # KnowledgeEntity.id or KnowledgeNode.id
+    node_type = Column(String)
+    name = Column(String)
+    confidence = Column(Float, default=0.0)
+    features = Column(JSON, default=dict)  # Topic words and prerequisites used for linking
+    out_degree = Column(Integer, default=0)
+    in_degree = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        Index("ix_knowledge_graph_nodes_confidence", "graph_id", "confidence"),
+        Index("ix_knowledge_graph_nodes_updated", "graph_id", "updated_at"),
+    )
+
+class KnowledgeGraphEdge(Base):
+    """Adjacency row of a knowledge graph"""
+    __tablename__ = "knowledge_graph_edges"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    graph_id = Column(String, nullable=False)
+    source_id = Column(String, nullable=False)
+    target_id = Column(String, nullable=False)
+    relationship_type = Column(String, nullable=False, default="related_to")
+    strength = Column(Float, default=0.5)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        UniqueConstraint("graph_id", "source_id", "target_id", "relationship_type", name="uq_knowledge_graph_edge"),
+        Index("ix_knowledge_graph_edges_target", "graph_id", "target_id"),
+        Index("ix_knowledge_graph_edges_graph", "graph_id", "id"),
+    )
+
+class KnowledgeGraphCounter(Base):
+    """Per-graph counters (node/edge totals, type histogram) maintained on write"""
+    __tablename__ = "knowledge_graph_counters"
+    
+    graph_id = Column(String, primary_key=True)
+    name = Column(String, primary_key=True)
+    value = Column(Integer, default=0, nullable=False)
+
 # ==================== Domain Expert Agent Models ====================
 
 class DomainExpertProfile(Base):
@@ -99,6 +99,20 @@ rate_limit_exceeded = Counter(
     ['endpoint']
 )
 
+# Tool scheduler metrics
+tool_queue_depth = Gauge(
+    'uni0_tool_queue_depth',
+    'Number of tool calls waiting in the execution scheduler',
+    ['tool_id']
+)
+
+tool_queue_wait = Histogram(
+    'uni0_tool_queue_wait_seconds',
+    'Time tool calls spend queued before dispatch',
+    ['tool_id'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
 
 class PrometheusMiddleware(BaseHTTPMiddleware):
     """Middleware to track Prometheus metrics"""
@@ -162,6 +176,13 @@ def record_db_query(operation: str, table: str, duration: float):
     db_query_duration.labels(operation=operation).observe(duration)
 
 
+def record_tool_queue_metrics(tool_id: str, queue_depth: int, wait_time: float = None):
+    """Record tool scheduler queue depth and, on dispatch, queue wait time"""
+    tool_queue_depth.labels(tool_id=tool_id).set(queue_depth)
+    if wait_time is not None:
+        tool_queue_wait.labels(tool_id=tool_id).observe(wait_time)
+
+
 def update_business_metrics(db_session):
     """Update business logic metrics from dryad.university.database"""
     try:
@@ -15,6 +15,7 @@ import logging
 from datetime import datetime, timezone
 from typing import Optional, List, Dict, Any, Tuple
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
 from sqlalchemy import and_, or_, func, desc
 import asyncio
 import asyncio.subprocess as subprocess
@@ -25,6 +26,12 @@ from dryad.university.database.models_university import (
     LearningContext,
     KnowledgeEntity
 )
+from dryad.university.services.context_index import (
+    ContextIndexRegistry,
+    ContextRetrievalIndex,
+    get_context_index_registry
+)
+from dryad.university.services.knowledge_graph_store import KnowledgeGraphStore, agent_graph_id
 
 logger = logging.getLogger(__name__)
 
@@ -32,9 +39,11 @@ logger = logging.getLogger(__name__)
 class AgentMemoryManager:
     """Manages agent memory operations and MCP integration"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, context_indexes: Optional[ContextIndexRegistry] = None):
         """Initialize memory manager with database session"""
         self.db = db
+        self.context_indexes = context_indexes or get_context_index_registry()
+        self.knowledge_graph = KnowledgeGraphStore(db)
         self._mcp_clients = {}
     
     # ==================== Conversation Session Management ====================
@@ -155,6 +164,8 @@ class AgentMemoryManager:
         self.db.commit()
         self.db.refresh(learning_context)
         
+        self._index_learning_context(learning_context)
+        
         logger.info(f"Created learning context {learning_context.id} for agent {agent_id}")
         return learning_context
     
@@ -166,40 +177,62 @@ class AgentMemoryManager:
         min_confidence: float = 0.0,
         limit: int = 5
     ) -> List[LearningContext]:
-        """Retrieve relevant learning context for current situation"""
+        """
+        Retrieve relevant learning context for current situation.
+        
+        Ranks the agent's whole learning history with the per-agent context
+        index (BM25 over context data and applicable scenarios, boosted by
+        confidence and recency); only contexts sharing a term with the query
+        are returned.
+        """
+        
+        index = self._learning_context_index(agent_id)
+        ranked = index.search(
+            query_context,
+            limit=limit,
+            context_types=context_types,
+            min_confidence=min_confidence
+        )
+        if not ranked:
+            return []
         
-        query = self.db.query(LearningContext).filter(
-            LearningContext.agent_id == agent_id
-        ).filter(LearningContext.confidence_score >= min_confidence)
-        
-        if context_types:
-            query = query.filter(LearningContext.context_type.in_(context_types))
-        
-        # Use a simple text matching approach for demonstration
-        # In production, this would use semantic similarity or embeddings
-        contexts = query.order_by(
-            LearningContext.confidence_score.desc(),
-            LearningContext.updated_at.desc()
-        ).limit(limit * 3).all()  # Get more to filter
-        
-        # Simple relevance filtering (in production, use embeddings)
-        relevant_contexts = []
-        query_words = set(query_context.lower().split())
-        
-        for context in contexts:
-            # Check context data and scenarios for relevance
-            context_text = json.dumps(context.context_data).lower()
-            scenario_text = " ".join(context.applicable_scenarios).lower()
-            context_words = set(context_text.split() + scenario_text.split())
-            
-            # Calculate simple overlap score
-            overlap = len(query_words.intersection(context_words))
-            if overlap > 0:
-                relevant_contexts.append(context)
-                if len(relevant_contexts) >= limit:
-                    break
-        
-        return relevant_contexts
+        context_ids = [context_id for context_id, _ in ranked]
+        contexts = {
+            context.id: context
+            for context in self.db.query(LearningContext).filter(LearningContext.id.in_(context_ids)).all()
+        }
+        return [contexts[context_id] for context_id in context_ids if context_id in contexts]
+    
+    def _learning_context_index(self, agent_id: str) -> ContextRetrievalIndex:
+        """Get the agent's context index, loading rows changed since its last sync"""
+        
+        def load(since: Optional[datetime]):
+            query = self.db.query(
+                LearningContext.id,
+                LearningContext.context_type,
+                LearningContext.context_data,
+                LearningContext.applicable_scenarios,
+                LearningContext.confidence_score,
+                LearningContext.updated_at
+            ).filter(LearningContext.agent_id == agent_id)
+            if since is not None:
+                query = query.filter(LearningContext.updated_at >= since)
+            return query.yield_per(2000)
+        
+        return self.context_indexes.get(agent_id, load)
+    
+    def _index_learning_context(self, context: LearningContext):
+        """Apply a stored or updated context to the agent's index if it is loaded"""
+        index = self.context_indexes.peek(context.agent_id)
+        if index is not None:
+            index.upsert(
+                context.id,
+                context.context_type,
+                context.context_data,
+                context.applicable_scenarios,
+                context.confidence_score,
+                context.updated_at
+            )
     
     def update_learning(
         self,
@@ -221,26 +254,28 @@ class AgentMemoryManager:
         
         if success:
             # Update existing high-confidence contexts or create new ones
-            existing_contexts = self.db.query(LearningContext).filter(
+            context_to_update = self.db.query(LearningContext).filter(
                 and_(
                     LearningContext.agent_id == agent_id,
                     LearningContext.context_type == context_type,
                     LearningContext.confidence_score >= 0.7
                 )
-            ).all()
+            ).first()
             
-            if existing_contexts:
+            if context_to_update is not None:
                 # Update the most relevant existing context
-                context_to_update = existing_contexts[0]
                 if "success_patterns" not in context_to_update.context_data:
                     context_to_update.context_data["success_patterns"] = []
                 
                 context_to_update.context_data["success_patterns"].append(learning_data)
                 context_to_update.confidence_score = min(1.0, context_to_update.confidence_score + 0.1)
                 context_to_update.updated_at = datetime.now(timezone.utc)
+                # context_data is a plain JSON column; in-place edits are not tracked
+                flag_modified(context_to_update, "context_data")
                 
                 self.db.commit()
                 self.db.refresh(context_to_update)
+                self._index_learning_context(context_to_update)
                 return context_to_update
         
         # Create new learning context
@@ -285,6 +320,8 @@ class AgentMemoryManager:
         )
         
         self.db.add(knowledge_entity)
+        if self.knowledge_graph.is_materialized(agent_graph_id(agent_id)):
+            self._add_to_knowledge_graph(knowledge_entity)
         self.db.commit()
         self.db.refresh(knowledge_entity)
         
@@ -312,48 +349,118 @@ class AgentMemoryManager:
             KnowledgeEntity.updated_at.desc()
         ).limit(limit).all()
     
-    def build_knowledge_graph(self, agent_id: str) -> Dict[str, Any]:
-        """Build semantic knowledge representation for agent"""
+    def build_knowledge_graph(self, agent_id: str, max_connections: Optional[int] = 1000) -> Dict[str, Any]:
+        """
+        Build semantic knowledge representation for agent.
         
-        entities = self.get_agent_knowledge_entities(agent_id, min_confidence=0.5)
+        Reads the materialized graph (counters, node and edge rows) instead of
+        reloading every entity; the graph is materialized from the agent's
+        knowledge entities on first use and kept current on write.
+        """
         
-        graph = {
+        graph_id = agent_graph_id(agent_id)
+        self._ensure_knowledge_graph(agent_id)
+        counters = self.knowledge_graph.counters(graph_id)
+        
+        return {
             "agent_id": agent_id,
-            "total_entities": len(entities),
-            "entity_types": {},
-            "connections": [],
-            "high_confidence_entities": [],
+            "total_entities": counters.get("nodes@0.5", 0),
+            "entity_types": self.knowledge_graph.type_histogram(graph_id, min_confidence=0.5),
+            "connections": self.knowledge_graph.edges(
+                graph_id, min_source_confidence=0.5, limit=max_connections
+            ),
+            "total_connections": counters.get("edges", 0),
+            "high_confidence_entities": [
+                {
+                    "id": node.node_id,
+                    "name": node.name,
+                    "type": node.node_type,
+                    "confidence": node.confidence,
+                    "connections_count": node.out_degree
+                }
+                for node in self.knowledge_graph.nodes(graph_id, min_confidence=0.8, limit=100)
+            ],
             "generated_at": datetime.now(timezone.utc).isoformat()
         }
-        
-        # Analyze entity types and build connection graph
-        for entity in entities:
-            # Track entity types
-            if entity.entity_type not in graph["entity_types"]:
-                graph["entity_types"][entity.entity_type] = 0
-            graph["entity_types"][entity.entity_type] += 1
-            
-            # Track high confidence entities
-            if entity.confidence >= 0.8:
-                graph["high_confidence_entities"].append({
-                    "id": entity.id,
-                    "name": entity.entity_name,
-                    "type": entity.entity_type,
-                    "confidence": entity.confidence,
-                    "connections_count": len(entity.connections)
-                })
-            
-            # Process connections
-            for connection in entity.connections:
-                graph["connections"].append({
-                    "source": entity.id,
-                    "source_name": entity.entity_name,
-                    "target": connection.get("target"),
-                    "relationship": connection.get("relationship", "related_to"),
-                    "strength": connection.get("strength", 0.5)
-                })
-        
-        return graph
+    
+    def get_knowledge_neighborhood(
+        self,
+        agent_id: str,
+        entity_id: str,
+        hops: int = 2,
+        direction: str = "both",
+        relationship_types: Optional[List[str]] = None,
+        max_nodes: int = 500
+    ) -> Dict[str, Any]:
+        """Get the k-hop neighborhood of a knowledge entity in the agent's graph"""
+        
+        self._ensure_knowledge_graph(agent_id)
+        return self.knowledge_graph.neighborhood(
+            agent_graph_id(agent_id),
+            entity_id,
+            hops=hops,
+            direction=direction,
+            relationship_types=relationship_types,
+            max_nodes=max_nodes
+        )
+    
+    def _ensure_knowledge_graph(self, agent_id: str):
+        """Materialize the agent's knowledge graph from its entities once"""
+        graph_id = agent_graph_id(agent_id)
+        if self.knowledge_graph.is_materialized(graph_id):
+            return
+        
+        nodes, edges = [], []
+        entities = self.db.query(
+            KnowledgeEntity.id,
+            KnowledgeEntity.entity_type,
+            KnowledgeEntity.entity_name,
+            KnowledgeEntity.confidence,
+            KnowledgeEntity.connections
+        ).filter(KnowledgeEntity.agent_id == agent_id).yield_per(2000)
+        for entity_id, entity_type, entity_name, confidence, connections in entities:
+            nodes.append({
+                "node_id": entity_id,
+                "node_type": entity_type,
+                "name": entity_name,
+                "confidence": confidence
+            })
+            edges.extend(self._connection_edges(entity_id, connections))
+        self.knowledge_graph.materialize(graph_id, nodes, edges)
+    
+    def _add_to_knowledge_graph(self, entity: KnowledgeEntity):
+        """Write a new entity and its connections into the materialized graph (no commit)"""
+        graph_id = agent_graph_id(entity.agent_id)
+        self.knowledge_graph.upsert_node(
+            graph_id,
+            entity.id,
+            node_type=entity.entity_type,
+            name=entity.entity_name,
+            confidence=entity.confidence,
+            commit=False
+        )
+        self.knowledge_graph.add_edges(
+            graph_id,
+            entity.id,
+            [
+                (edge["target_id"], edge["relationship_type"], edge["strength"])
+                for edge in self._connection_edges(entity.id, entity.connections)
+            ],
+            commit=False
+        )
+    
+    @staticmethod
+    def _connection_edges(entity_id: str, connections: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "source_id": entity_id,
+                "target_id": str(connection["target"]),
+                "relationship_type": connection.get("relationship", "related_to"),
+                "strength": connection.get("strength", 0.5)
+            }
+            for connection in connections or []
+            if isinstance(connection, dict) and connection.get("target") is not None
+        ]
     
     # ==================== MCP Integration Methods ====================
     
@@ -0,0 +1,339 @@
+"""
+Streaming Audio Feature Engine
+
+Shared by the platform and university audio processing services. PCM WAV
+input is read through the ``wave`` module in fixed-size windows, so an
+hour-long lecture recording is analyzed with memory bounded by one window.
+Per-frame RMS, zero-crossing rate and spectral centroid are computed with
+vectorized NumPy, and a simple energy/ZCR voice-activity detector turns
+frames into speech segments. Long recordings can be consumed as an async
+generator that yields partial results window by window.
+"""
+
+import asyncio
+import io
+import math
+import wave
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+AudioSource = Union[str, bytes]
+
+# Histogram of frame levels used for dynamic range without keeping every frame
+_LEVEL_BINS = np.linspace(-100.0, 0.0, 201)
+_SILENCE_DB = -100.0
+# Noise floor assumed before any non-speech has been heard (quiet room at typical gain)
+_NOISE_FLOOR_PRIOR_DB = -60.0
+
+
+@dataclass
+class AudioStreamInfo:
+    """Header information for a PCM WAV stream"""
+    sample_rate: int
+    channels: int
+    sample_width: int
+    frame_count: int
+
+    @property
+    def duration(self) -> float:
+        return self.frame_count / self.sample_rate if self.sample_rate else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'duration': self.duration,
+            'sample_rate': self.sample_rate,
+            'channels': self.channels,
+            'bit_depth': self.sample_width * 8,
+            'format': 'wav'
+        }
+
+
+def _open(source: AudioSource) -> BinaryIO:
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    if isinstance(source, str):
+        return open(source, 'rb')
+    raise ValueError("Invalid audio data type")
+
+
+def probe(source: AudioSource) -> AudioStreamInfo:
+    """Read only the WAV header; raises ``wave.Error`` for non-PCM-WAV input"""
+    with _open(source) as handle, wave.open(handle, 'rb') as wav:
+        return AudioStreamInfo(
+            sample_rate=wav.getframerate(),
+            channels=wav.getnchannels(),
+            sample_width=wav.getsampwidth(),
+            frame_count=wav.getnframes(),
+        )
+
+
+def decode_pcm(raw: bytes, sample_width: int, channels: int) -> np.ndarray:
+    """Decode interleaved PCM bytes to mono float32 samples in [-1, 1]"""
+    if sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        triplets = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = triplets[:, 0] | (triplets[:, 1] << 8) | (triplets[:, 2] << 16)
+        values = np.where(values & 0x800000, values - 0x1000000, values)
+        samples = values.astype(np.float32) / 8388608.0
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+
+    if channels > 1:
+        usable = len(samples) - len(samples) % channels
+        samples = samples[:usable].reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def iter_windows(source: AudioSource, window_seconds: float = 1.0) -> Iterator[Tuple[AudioStreamInfo, float, np.ndarray]]:
+    """Yield (info, start_seconds, mono_samples) for each fixed-size window"""
+    with _open(source) as handle, wave.open(handle, 'rb') as wav:
+        info = AudioStreamInfo(
+            sample_rate=wav.getframerate(),
+            channels=wav.getnchannels(),
+            sample_width=wav.getsampwidth(),
+            frame_count=wav.getnframes(),
+        )
+        window_frames = max(1, int(info.sample_rate * window_seconds))
+        position = 0
+        while True:
+            raw = wav.readframes(window_frames)
+            if not raw:
+                break
+            samples = decode_pcm(raw, info.sample_width, info.channels)
+            yield info, position / info.sample_rate, samples
+            position += len(samples)
+
+
+def frame_features(samples: np.ndarray, sample_rate: int, frame_length: int) -> Dict[str, np.ndarray]:
+    """Per-frame RMS, zero-crossing rate and spectral centroid"""
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        frames = np.zeros((1, frame_length), dtype=np.float32)
+        frames[0, :len(samples)] = samples
+    else:
+        frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length)
+
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_length - 1)
+
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(frame_length).astype(np.float32), axis=1))
+    freqs = np.fft.rfftfreq(frame_length, d=1.0 / sample_rate)
+    energy = spectrum.sum(axis=1)
+    centroid = np.divide(spectrum @ freqs, energy, out=np.zeros_like(energy), where=energy > 0)
+
+    return {'rms': rms, 'zcr': zcr, 'centroid': centroid}
+
+
+class VoiceActivityDetector:
+    """
+    Energy/ZCR voice-activity detector with an adaptive noise floor.
+
+    The floor starts at a fixed prior and is only ever updated from frames
+    classified as non-speech, so a recording that opens with speech does not
+    mistake that speech for noise.
+    """
+
+    def __init__(self, frame_seconds: float, threshold_db: float = 10.0,
+                 min_speech_seconds: float = 0.2, hangover_seconds: float = 0.3):
+        self.frame_seconds = frame_seconds
+        self.threshold_db = threshold_db
+        self.min_speech_frames = max(1, int(min_speech_seconds / frame_seconds))
+        self.hangover_frames = max(1, int(hangover_seconds / frame_seconds))
+        self.noise_floor_db = _NOISE_FLOOR_PRIOR_DB
+        self._segment_start: Optional[float] = None
+        self._voiced_frames = 0
+        self._silent_run = 0
+
+    def process(self, start_time: float, rms: np.ndarray, zcr: np.ndarray) -> Tuple[np.ndarray, List[Dict[str, float]]]:
+        """Classify frames and return (voiced_mask, closed_segments)"""
+        levels = 20.0 * np.log10(np.maximum(rms, 1e-5))
+        voiced = (levels > self.noise_floor_db + self.threshold_db) & (levels > -60.0) & (zcr < 0.5)
+
+        quiet = levels[~voiced]
+        if len(quiet):
+            window_floor = float(np.percentile(quiet, 10))
+            # Follow drops immediately, rises slowly
+            self.noise_floor_db = min(window_floor, 0.95 * self.noise_floor_db + 0.05 * window_floor)
+
+        segments = []
+        for i, is_voiced in enumerate(voiced):
+            t = start_time + i * self.frame_seconds
+            if is_voiced:
+                if self._segment_start is None:
+                    self._segment_start = t
+                    self._voiced_frames = 0
+                self._voiced_frames += 1
+                self._silent_run = 0
+            elif self._segment_start is not None:
+                self._silent_run += 1
+                if self._silent_run >= self.hangover_frames:
+                    end = t - (self._silent_run - 1) * self.frame_seconds
+                    segment = self._close(end)
+                    if segment:
+                        segments.append(segment)
+        return voiced, segments
+
+    def finish(self, end_time: float) -> List[Dict[str, float]]:
+        if self._segment_start is None:
+            return []
+        segment = self._close(end_time - self._silent_run * self.frame_seconds)
+        return [segment] if segment else []
+
+    def _close(self, end: float) -> Optional[Dict[str, float]]:
+        start, voiced_frames = self._segment_start, self._voiced_frames
+        self._segment_start = None
+        self._voiced_frames = 0
+        self._silent_run = 0
+        if voiced_frames < self.min_speech_frames:
+            return None
+        return {'start': round(start, 3), 'end': round(end, 3), 'duration': round(end - start, 3)}
+
+
+class AudioFeatureAccumulator:
+    """Running totals over all windows; constant memory"""
+
+    def __init__(self):
+        self.frames = 0
+        self.voiced_frames = 0
+        self.sum_rms = 0.0
+        self.sum_sq = 0.0
+        self.samples = 0
+        self.peak = 0.0
+        self.sum_zcr = 0.0
+        self.sum_centroid = 0.0
+        self.speech_energy = 0.0
+        self.noise_energy = 0.0
+        self.segment_count = 0
+        self.speech_seconds = 0.0
+        self.level_histogram = np.zeros(len(_LEVEL_BINS) - 1, dtype=np.int64)
+
+    def update(self, samples: np.ndarray, features: Dict[str, np.ndarray], voiced: np.ndarray,
+               segments: List[Dict[str, float]]) -> None:
+        rms = features['rms']
+        self.frames += len(rms)
+        self.voiced_frames += int(voiced.sum())
+        self.sum_rms += float(rms.sum())
+        self.sum_zcr += float(features['zcr'].sum())
+        self.sum_centroid += float(features['centroid'].sum())
+        self.sum_sq += float(np.dot(samples, samples))
+        self.samples += len(samples)
+        if len(samples):
+            self.peak = max(self.peak, float(np.abs(samples).max()))
+
+        power = rms * rms
+        self.speech_energy += float(power[voiced].sum())
+        self.noise_energy += float(power[~voiced].sum())
+
+        levels = np.clip(20.0 * np.log10(np.maximum(rms, 1e-5)), _SILENCE_DB, 0.0)
+        self.level_histogram += np.histogram(levels, bins=_LEVEL_BINS)[0]
+
+        self.segment_count += len(segments)
+        self.speech_seconds += sum(s['duration'] for s in segments)
+
+    def _level_percentile(self, q: float) -> float:
+        total = self.level_histogram.sum()
+        if total == 0:
+            return _SILENCE_DB
+        index = int(np.searchsorted(np.cumsum(self.level_histogram), q * total))
+        return float(_LEVEL_BINS[min(index, len(_LEVEL_BINS) - 1)])
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        frames = max(1, self.frames)
+        voiced = max(1, self.voiced_frames)
+        silent = max(1, self.frames - self.voiced_frames)
+        speech_power = self.speech_energy / voiced
+        noise_power = self.noise_energy / silent
+        if self.voiced_frames and noise_power > 0:
+            snr = 10.0 * math.log10(max(speech_power, 1e-12) / noise_power)
+        else:
+            snr = None
+
+        return {
+            'duration_seconds': duration,
+            'rms': math.sqrt(self.sum_sq / self.samples) if self.samples else 0.0,
+            'mean_frame_rms': self.sum_rms / frames,
+            'peak_amplitude': self.peak,
+            'zero_crossing_rate': self.sum_zcr / frames,
+            'spectral_centroid_hz': self.sum_centroid / frames,
+            'dynamic_range_db': self._level_percentile(0.95) - self._level_percentile(0.05),
+            'signal_to_noise_ratio': snr,
+            'speech_ratio': self.voiced_frames / frames,
+            'speech_seconds': self.speech_seconds,
+            'speech_segment_count': self.segment_count,
+        }
+
+
+class StreamingAudioAnalyzer:
+    """Window-by-window feature extraction for PCM WAV recordings"""
+
+    def __init__(self, window_seconds: float = 5.0, frame_seconds: float = 0.025):
+        self.window_seconds = window_seconds
+        self.frame_seconds = frame_seconds
+
+    def iter_analysis(self, source: AudioSource) -> Iterator[Dict[str, Any]]:
+        """Synchronous generator of partial results, one per window"""
+        accumulator = AudioFeatureAccumulator()
+        detector: Optional[VoiceActivityDetector] = None
+        info: Optional[AudioStreamInfo] = None
+        end_time = 0.0
+
+        for index, (info, start, samples) in enumerate(iter_windows(source, self.window_seconds)):
+            frame_length = max(2, int(info.sample_rate * self.frame_seconds))
+            if detector is None:
+                detector = VoiceActivityDetector(frame_length / info.sample_rate)
+
+            features = frame_features(samples, info.sample_rate, frame_length)
+            voiced, segments = detector.process(start, features['rms'], features['zcr'])
+            accumulator.update(samples, features, voiced, segments)
+            end_time = start + len(samples) / info.sample_rate
+
+            yield {
+                'window_index': index,
+                'start': start,
+                'end': end_time,
+                'rms': float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0,
+                'zero_crossing_rate': float(features['zcr'].mean()),
+                'spectral_centroid_hz': float(features['centroid'].mean()),
+                'voiced_ratio': float(voiced.mean()),
+                'speech_segments': segments,
+                'final': False,
+            }
+
+        if info is None:
+            raise ValueError("Audio stream contains no frames")
+
+        closing = detector.finish(end_time) if detector else []
+        accumulator.segment_count += len(closing)
+        accumulator.speech_seconds += sum(s['duration'] for s in closing)
+        yield {
+            'final': True,
+            'speech_segments': closing,
+            'stream_info': info.to_dict(),
+            'summary': accumulator.summary(info.duration),
+        }
+
+    async def stream(self, source: AudioSource) -> AsyncIterator[Dict[str, Any]]:
+        """Async generator of partial results; decoding runs in a worker thread"""
+        iterator = self.iter_analysis(source)
+        sentinel = object()
+        while True:
+            result = await asyncio.to_thread(next, iterator, sentinel)
+            if result is sentinel:
+                return
+            yield result
+
+    async def analyze(self, source: AudioSource) -> Dict[str, Any]:
+        """Consume the stream and return the final summary"""
+        final: Dict[str, Any] = {}
+        async for partial in self.stream(source):
+            if partial['final']:
+                final = partial
+        return {**final['stream_info'], 'features': final['summary']}
@@ -0,0 +1,457 @@
+"""
+Segmented Audit Log Store
+=========================
+
+Append-only, NDJSON-encoded audit log backed by size- and time-rotated
+segment files. Writes are handed to a single writer thread through a
+bounded queue and committed in groups with one fsync per batch, so the
+secured tool-call path never blocks on disk I/O. Each segment carries a
+sparse block index (timestamp range, agent_id and tool_id postings) that
+lets report queries read only the blocks that can match.
+
+Author: Dryad University System
+Date: 2025-10-31
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field
+import json
+import os
+import queue
+import threading
+import time
+
+from dryad.university.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+SEGMENT_SUFFIX = ".ndjson"
+INDEX_SUFFIX = ".idx.json"
+
+
+@dataclass
+class AuditSegment:
+    """Metadata and sparse index for one segment file"""
+    path: str
+    created_at: float
+    min_ts: float = float("inf")
+    max_ts: float = float("-inf")
+    record_count: int = 0
+    size: int = 0
+    sealed: bool = False
+    # Each block is [offset, min_ts, max_ts, record_count]
+    blocks: List[List[float]] = field(default_factory=list)
+    agent_blocks: Dict[str, List[int]] = field(default_factory=dict)
+    tool_blocks: Dict[str, List[int]] = field(default_factory=dict)
+
+    @property
+    def index_path(self) -> str:
+        return self.path[: -len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+
+    def add_record(self, offset: int, length: int, ts: float, agent_id: str, tool_id: str,
+                   block_records: int) -> None:
+        """Account for a record appended at ``offset``"""
+        if not self.blocks or self.blocks[-1][3] >= block_records:
+            self.blocks.append([offset, ts, ts, 0])
+        block = self.blocks[-1]
+        block[1] = min(block[1], ts)
+        block[2] = max(block[2], ts)
+        block[3] += 1
+        block_no = len(self.blocks) - 1
+
+        for postings, key in ((self.agent_blocks, agent_id), (self.tool_blocks, tool_id)):
+            entries = postings.setdefault(key, [])
+            if not entries or entries[-1] != block_no:
+                entries.append(block_no)
+
+        self.min_ts = min(self.min_ts, ts)
+        self.max_ts = max(self.max_ts, ts)
+        self.record_count += 1
+        self.size = offset + length
+
+    def candidate_blocks(self, start_ts: float, end_ts: float, agent_id: Optional[str],
+                         tool_id: Optional[str]) -> List[Tuple[int, int]]:
+        """Return (start_offset, end_offset) ranges of blocks that may match"""
+        if self.record_count == 0 or self.max_ts < start_ts or self.min_ts > end_ts:
+            return []
+
+        block_ids = range(len(self.blocks))
+        for postings, key in ((self.agent_blocks, agent_id), (self.tool_blocks, tool_id)):
+            if key is not None:
+                allowed = set(postings.get(key, ()))
+                block_ids = [b for b in block_ids if b in allowed]
+
+        ranges = []
+        for block_no in block_ids:
+            offset, block_min, block_max, _ = self.blocks[block_no]
+            if block_max < start_ts or block_min > end_ts:
+                continue
+            end = self.blocks[block_no + 1][0] if block_no + 1 < len(self.blocks) else self.size
+            ranges.append((int(offset), int(end)))
+        return ranges
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "created_at": self.created_at,
+            "min_ts": self.min_ts,
+            "max_ts": self.max_ts,
+            "record_count": self.record_count,
+            "size": self.size,
+            "blocks": self.blocks,
+            "agent_blocks": self.agent_blocks,
+            "tool_blocks": self.tool_blocks,
+        }
+
+    @classmethod
+    def from_dict(cls, path: str, data: Dict[str, Any]) -> "AuditSegment":
+        return cls(
+            path=path,
+            created_at=data["created_at"],
+            min_ts=data["min_ts"],
+            max_ts=data["max_ts"],
+            record_count=data["record_count"],
+            size=data["size"],
+            sealed=True,
+            blocks=data["blocks"],
+            agent_blocks=data["agent_blocks"],
+            tool_blocks=data["tool_blocks"],
+        )
+
+
+class AuditSegmentStore:
+    """Append-only segmented audit store with group-commit fsync"""
+
+    def __init__(
+        self,
+        directory: str,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        max_segment_age: float = 3600.0,
+        retention_days: float = 365.0,
+        queue_size: int = 10000,
+        group_commit_size: int = 512,
+        flush_interval: float = 0.05,
+        block_records: int = 256,
+        fsync: bool = True,
+    ):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.retention_seconds = retention_days * 86400
+        self.group_commit_size = group_commit_size
+        self.flush_interval = flush_interval
+        self.block_records = block_records
+        self.fsync = fsync
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._segments: List[AuditSegment] = []
+        self._active: Optional[AuditSegment] = None
+        self._active_file = None
+        self._writer: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._last_compaction = time.time()
+        # Counters are bumped by callers and the writer thread; a separate lock
+        # keeps append() from waiting behind a group-commit fsync
+        self._stats_lock = threading.Lock()
+        self._stats = {"appended": 0, "dropped": 0, "committed": 0, "fsyncs": 0, "segments_removed": 0}
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def append(self, record: Dict[str, Any]) -> bool:
+        """Queue a record for durable append without blocking.
+
+        The record must carry ``ts`` (epoch seconds), ``agent_id`` and
+        ``tool_id``. Returns False if the bounded queue is full and the
+        record was dropped.
+        """
+        line = (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+        item = (float(record["ts"]), str(record.get("agent_id")), str(record.get("tool_id")), line)
+
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            dropped = self._count("dropped")
+            if dropped % 1000 == 1:
+                logger.warning(f"Audit queue full, {dropped} events dropped so far")
+            return False
+
+        self._count("appended")
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every record queued so far is written and fsynced"""
+        if self._writer is None:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Drain the queue, seal the active segment and stop the writer"""
+        if self._writer is not None:
+            self._stopping.set()
+            self._writer.join()
+            self._writer = None
+        with self._lock:
+            self._seal_active()
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    def scan(
+        self,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+        agent_id: Optional[str] = None,
+        tool_id: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream committed records in time order that match the filters"""
+        start_ts = float("-inf") if start_ts is None else start_ts
+        end_ts = float("inf") if end_ts is None else end_ts
+
+        with self._lock:
+            plan = [
+                (segment.path, segment.candidate_blocks(start_ts, end_ts, agent_id, tool_id))
+                for segment in self._segments
+            ]
+
+        for path, ranges in plan:
+            if not ranges:
+                continue
+            try:
+                handle = open(path, "rb")
+            except FileNotFoundError:
+                # Segment was compacted away after planning
+                continue
+            with handle:
+                for start, end in ranges:
+                    handle.seek(start)
+                    while handle.tell() < end:
+                        line = handle.readline()
+                        if not line:
+                            break
+                        record = json.loads(line)
+                        ts = record["ts"]
+                        if ts < start_ts or ts > end_ts:
+                            continue
+                        if agent_id is not None and record.get("agent_id") != agent_id:
+                            continue
+                        if tool_id is not None and record.get("tool_id") != tool_id:
+                            continue
+                        yield record
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """Delete sealed segments that fall entirely outside the retention window"""
+        cutoff = (now or time.time()) - self.retention_seconds
+        with self._lock:
+            expired = [s for s in self._segments if s.sealed and s.max_ts < cutoff]
+            self._segments = [s for s in self._segments if s not in expired]
+
+        for segment in expired:
+            for path in (segment.path, segment.index_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        self._count("segments_removed", len(expired))
+        return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            segment_count = len(self._segments)
+            total_bytes = sum(s.size for s in self._segments)
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {
+            **stats,
+            "queued": self._queue.qsize(),
+            "segments": segment_count,
+            "bytes": total_bytes,
+        }
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _ensure_writer(self) -> None:
+        if self._writer is None or not self._writer.is_alive():
+            with self._lock:
+                if self._writer is None or not self._writer.is_alive():
+                    self._stopping.clear()
+                    self._writer = threading.Thread(
+                        target=self._writer_loop, name="audit-segment-writer", daemon=True
+                    )
+                    self._writer.start()
+
+    def _writer_loop(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                first = None
+
+            batch = [] if first is None else [first]
+            while len(batch) < self.group_commit_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._commit(batch)
+            except Exception as e:
+                logger.error(f"Error committing audit batch: {str(e)}")
+
+            if time.time() - self._last_compaction > 3600:
+                self._last_compaction = time.time()
+                self.compact()
+
+            if self._stopping.is_set() and self._queue.empty():
+                return
+
+    def _commit(self, batch: List[Any]) -> None:
+        """Write a batch of records and fsync once (group commit)"""
+        waiters = [item for item in batch if isinstance(item, threading.Event)]
+        records = [item for item in batch if not isinstance(item, threading.Event)]
+
+        with self._lock:
+            if self._active is not None and time.time() - self._active.created_at >= self.max_segment_age:
+                self._seal_active()
+
+            for ts, agent_id, tool_id, line in records:
+                if self._active is None or self._active.size >= self.max_segment_bytes:
+                    self._seal_active()
+                    self._open_segment()
+                offset = self._active.size
+                self._active_file.write(line)
+                self._active.add_record(offset, len(line), ts, agent_id, tool_id, self.block_records)
+
+            if records:
+                self._sync_active()
+                self._count("committed", len(records))
+
+        for waiter in waiters:
+            waiter.set()
+
+    def _sync_active(self) -> None:
+        self._active_file.flush()
+        if self.fsync:
+            os.fsync(self._active_file.fileno())
+            self._count("fsyncs")
+
+    def _count(self, name: str, amount: int = 1) -> int:
+        with self._stats_lock:
+            self._stats[name] += amount
+            return self._stats[name]
+
+    def _open_segment(self) -> None:
+        created_at = time.time()
+        base = os.path.join(self.directory, f"audit-{int(created_at * 1000):013d}")
+        path = base + SEGMENT_SUFFIX
+        suffix = 0
+        while os.path.exists(path):
+            suffix += 1
+            path = f"{base}-{suffix}{SEGMENT_SUFFIX}"
+
+        self._active = AuditSegment(path=path, created_at=created_at)
+        self._active_file = open(path, "ab")
+        self._segments.append(self._active)
+
+    def _seal_active(self) -> None:
+        """Fsync the active segment and persist its sparse index"""
+        if self._active is None:
+            return
+        self._sync_active()
+        self._active_file.close()
+        self._write_index(self._active)
+        self._active.sealed = True
+        if self._active.record_count == 0:
+            self._segments.remove(self._active)
+            for path in (self._active.path, self._active.index_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        self._active = None
+        self._active_file = None
+
+    @staticmethod
+    def _write_index(segment: AuditSegment) -> None:
+        tmp_path = segment.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(segment.to_dict(), f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, segment.index_path)
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+
+    def _recover(self) -> None:
+        """Load sealed segments, rebuilding indexes for segments cut off by a crash"""
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(SEGMENT_SUFFIX))
+        for name in names:
+            path = os.path.join(self.directory, name)
+            index_path = path[: -len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+            try:
+                with open(index_path) as f:
+                    segment = AuditSegment.from_dict(path, json.load(f))
+                if segment.size == os.path.getsize(path):
+                    self._segments.append(segment)
+                    continue
+            except (FileNotFoundError, ValueError, KeyError):
+                pass
+            segment = self._rebuild_segment(path)
+            if segment is not None:
+                self._segments.append(segment)
+        self._segments.sort(key=lambda s: s.created_at)
+
+    def _rebuild_segment(self, path: str) -> Optional[AuditSegment]:
+        segment = AuditSegment(path=path, created_at=os.path.getmtime(path))
+        offset = 0
+        with open(path, "rb+") as f:
+            for line in iter(f.readline, b""):
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                segment.add_record(offset, len(line), float(record["ts"]), str(record.get("agent_id")),
+                                   str(record.get("tool_id")), self.block_records)
+                offset += len(line)
+            # Drop a torn trailing write
+            f.truncate(offset)
+
+        if segment.record_count == 0:
+            os.remove(path)
+            return None
+        segment.created_at = segment.min_ts
+        segment.sealed = True
+        self._write_index(segment)
+        logger.info(f"Rebuilt audit segment index for {path} ({segment.record_count} records)")
+        return segment
+
+
+_stores: Dict[str, AuditSegmentStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_audit_store(directory: str, **kwargs) -> AuditSegmentStore:
+    """Return the process-wide store for a directory (one writer per directory)"""
+    key = os.path.abspath(directory)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = AuditSegmentStore(directory, **kwargs)
+            _stores[key] = store
+        return store
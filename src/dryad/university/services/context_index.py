@@ -0,0 +1,468 @@
+"""
+Learning Context Retrieval Index
+================================
+
+Per-agent in-memory inverted index over ``LearningContext.context_data`` and
+``applicable_scenarios`` for relevance retrieval. Contexts are tokenized once
+when they are stored or updated; a query scores BM25 over the agent's whole
+history with numpy, then boosts matches by confidence and recency.
+Optional embeddings rerank the lexical candidates.
+
+Updates replace a context by tombstoning its old slot and appending a new
+one. Postings are rebuilt once tombstones outnumber live contexts. The
+registry keeps one index per agent (LRU) and pulls rows changed since its
+watermark on a refresh interval, so writes from other processes are picked up.
+
+Author: Dryad University System
+Date: 2025-11-01
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from array import array
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+import math
+import re
+import threading
+import time
+
+import numpy as np
+
+from dryad.university.core.config import get_settings
+from dryad.university.core.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "were", "with", "none", "true", "false"
+})
+
+# (context_id, context_type, context_data, applicable_scenarios, confidence_score, updated_at)
+ContextRow = Tuple[str, Optional[str], Any, Optional[List[str]], Optional[float], Optional[datetime]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens without stop words or single characters"""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in _STOP_WORDS]
+
+
+def flatten_text(value: Any, out: Optional[List[str]] = None) -> List[str]:
+    """Collect dict keys and scalar values of a JSON structure as text fragments"""
+    if out is None:
+        out = []
+    if isinstance(value, dict):
+        for key, item in value.items():
+            out.append(str(key))
+            flatten_text(item, out)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            flatten_text(item, out)
+    elif value is not None:
+        out.append(str(value))
+    return out
+
+
+def _epoch(value: Optional[datetime]) -> float:
+    if value is None:
+        return 0.0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class ContextRetrievalIndex:
+    """BM25 index over one agent's learning contexts"""
+
+    def __init__(
+        self,
+        agent_id: str,
+        k1: float = 1.2,
+        b: float = 0.75,
+        scenario_weight: float = 2.0,
+        confidence_weight: float = 0.5,
+        recency_weight: float = 0.25,
+        recency_half_life_days: float = 30.0,
+        embed: Optional[Callable[[str], np.ndarray]] = None,
+        vector_weight: float = 0.3,
+    ):
+        """
+        Args:
+            agent_id: Agent whose contexts this index holds
+            k1, b: BM25 term-frequency saturation and length normalization
+            scenario_weight: Term-frequency multiplier for applicable_scenarios tokens
+            confidence_weight: Score multiplier gained per unit of confidence
+            recency_weight: Score multiplier gained by a just-updated context
+            recency_half_life_days: Age at which the recency boost halves
+            embed: Optional text -> vector function used to rerank candidates
+            vector_weight: Share of the final score taken by cosine similarity
+        """
+        self.agent_id = agent_id
+        self.k1 = k1
+        self.b = b
+        self.scenario_weight = scenario_weight
+        self.confidence_weight = confidence_weight
+        self.recency_weight = recency_weight
+        self.recency_half_life = recency_half_life_days * 86400.0
+        self.embed = embed
+        self.vector_weight = vector_weight
+
+        self._lock = threading.RLock()
+        self._vocab: Dict[str, int] = {}
+        self._postings_docs: List[array] = []
+        self._postings_tf: List[array] = []
+        self._df = array('I')
+
+        self._ids: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+        self._doc_terms: List[Optional[Tuple[array, array]]] = []
+        self._doc_len = array('f')
+        self._confidence = array('f')
+        self._updated = array('d')
+        self._type = array('H')
+        self._type_codes: Dict[Optional[str], int] = {}
+        self._vectors: Optional[np.ndarray] = None
+
+        self._total_len = 0.0
+        self._dead = 0
+
+        self.watermark: Optional[datetime] = None
+        self._synced_at: Optional[float] = None
+        self._sync_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, context_id: str) -> bool:
+        return context_id in self._slots
+
+    def sync(self, loader: Callable[[Optional[datetime]], Iterable[ContextRow]], refresh_interval: float):
+        """
+        Load rows changed since the watermark if the last sync is older than
+        ``refresh_interval`` seconds (the first call loads everything).
+        """
+        if self._synced_at is not None and time.monotonic() - self._synced_at < refresh_interval:
+            return
+        with self._sync_lock:
+            if self._synced_at is not None and time.monotonic() - self._synced_at < refresh_interval:
+                return
+            started = time.perf_counter()
+            first = self._synced_at is None
+            loaded = 0
+            for row in loader(self.watermark):
+                self.upsert(*row)
+                updated_at = row[5]
+                if updated_at is not None and (self.watermark is None or updated_at > self.watermark):
+                    self.watermark = updated_at
+                loaded += 1
+            self._synced_at = time.monotonic()
+            if first:
+                logger.info(f"Built context index for agent {self.agent_id}: {loaded} contexts in "
+                            f"{time.perf_counter() - started:.2f}s")
+
+    def upsert(
+        self,
+        context_id: str,
+        context_type: Optional[str],
+        context_data: Any,
+        applicable_scenarios: Optional[Sequence[str]],
+        confidence: Optional[float],
+        updated_at: Optional[datetime],
+    ):
+        """Index a context, replacing any earlier version of it"""
+        updated = _epoch(updated_at)
+        with self._lock:
+            slot = self._slots.get(context_id)
+            if slot is not None:
+                if self._updated[slot] == updated and abs(self._confidence[slot] - (confidence or 0.0)) < 1e-6:
+                    return
+                self._tombstone(slot)
+
+            counts = Counter(tokenize(" ".join(flatten_text(context_data))))
+            for token in tokenize(" ".join(s for s in applicable_scenarios or [] if s)):
+                counts[token] += self.scenario_weight
+            self._append(context_id, context_type, counts, confidence, updated)
+
+            if self.embed is not None:
+                text = " ".join(flatten_text(context_data) + list(applicable_scenarios or []))
+                self._set_vector(len(self._ids) - 1, self.embed(text))
+
+            if self._dead > 1000 and self._dead > len(self._slots):
+                self._compact()
+
+    def remove(self, context_id: str) -> bool:
+        with self._lock:
+            slot = self._slots.get(context_id)
+            if slot is None:
+                return False
+            self._tombstone(slot)
+            return True
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        context_types: Optional[Sequence[str]] = None,
+        min_confidence: float = 0.0,
+        now: Optional[float] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank contexts sharing at least one term with the query.
+
+        Args:
+            query: Free-text description of the current situation
+            limit: Maximum results
+            context_types: Restrict to these context types
+            min_confidence: Minimum confidence score
+            now: Reference time (epoch seconds) for recency; defaults to now
+
+        Returns:
+            (context_id, score) pairs, best first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            live = len(self._slots)
+            postings = sorted(
+                (self._df[self._vocab[t]], self._vocab[t]) for t in terms
+                if t in self._vocab and self._df[self._vocab[t]] > 0
+            )
+            if not postings or live == 0 or limit <= 0:
+                return []
+
+            n_slots = len(self._ids)
+            doc_len = np.frombuffer(self._doc_len, dtype=np.float32, count=n_slots)
+            avg_len = max(self._total_len / live, 1e-9)
+            rerank = self._vectors is not None and self.embed is not None
+            want = max(limit * 10, 50) if rerank else limit
+
+            # MaxScore: terms go rarest first. Once the want-th best candidate
+            # already beats the most a context could still gain from the
+            # remaining (frequent) terms, times the largest possible boost,
+            # those terms only update existing candidates (binary search into
+            # their slot-ordered postings) instead of scoring every posting.
+            idfs = [math.log(1.0 + (live - df + 0.5) / (df + 0.5)) for df, _ in postings]
+            max_boost = 1.0 + self.confidence_weight + self.recency_weight
+            remaining = np.cumsum([idf * (self.k1 + 1.0) for idf in idfs][::-1])[::-1] * max_boost
+
+            scores = np.zeros(n_slots, dtype=np.float32)
+            matched = []
+            candidates = None
+            for position, ((_, term_id), idf) in enumerate(zip(postings, idfs)):
+                docs = np.frombuffer(self._postings_docs[term_id], dtype=np.uint32)
+                tf = np.frombuffer(self._postings_tf[term_id], dtype=np.float32)
+                if candidates is None and matched and len(docs) > 4096:
+                    pool = self._filter(self._matched_slots(matched, scores, n_slots), context_types, min_confidence)
+                    if len(pool) >= want:
+                        threshold = np.partition(scores[pool], len(pool) - want)[len(pool) - want]
+                        if threshold > remaining[position]:
+                            candidates = pool
+                if candidates is not None:
+                    at = np.minimum(np.searchsorted(docs, candidates), len(docs) - 1)
+                    hit = docs[at] == candidates
+                    slots, tf = candidates[hit], tf[at[hit]]
+                else:
+                    slots = docs
+                    matched.append(docs)
+                norm = self.k1 * (1.0 - self.b + self.b * doc_len[slots] / avg_len)
+                scores[slots] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+            if candidates is None:
+                candidates = self._filter(self._matched_slots(matched, scores, n_slots), context_types, min_confidence)
+            if len(candidates) == 0:
+                return []
+
+            now = time.time() if now is None else now
+            confidence = np.frombuffer(self._confidence, dtype=np.float32, count=n_slots)[candidates]
+            age = np.maximum(now - np.frombuffer(self._updated, dtype=np.float64, count=n_slots)[candidates], 0.0)
+            boost = (1.0 + self.confidence_weight * confidence
+                     + self.recency_weight * np.exp2(-age / self.recency_half_life))
+            final = scores[candidates] * boost
+
+            k = min(len(candidates), want)
+            top = np.argpartition(-final, k - 1)[:k] if k < len(candidates) else np.arange(len(candidates))
+            if rerank:
+                query_vector = self._normalize(self.embed(query))
+                cosine = self._vectors[candidates[top]] @ query_vector
+                final_top = (1.0 - self.vector_weight) * final[top] / final[top].max() + self.vector_weight * cosine
+            else:
+                final_top = final[top]
+            order = np.argsort(-final_top, kind="stable")[:limit]
+            return [(self._ids[candidates[top[i]]], float(final_top[i])) for i in order]
+
+    @staticmethod
+    def _matched_slots(matched: List[np.ndarray], scores: np.ndarray, n_slots: int) -> np.ndarray:
+        # Scanning the dense score vector costs O(slots); for selective
+        # queries it is cheaper to dedupe the matched postings directly
+        if sum(len(docs) for docs in matched) * 8 < n_slots:
+            return np.unique(np.concatenate(matched)).astype(np.intp)
+        return np.flatnonzero(scores)
+
+    def _filter(self, slots: np.ndarray, context_types: Optional[Sequence[str]], min_confidence: float) -> np.ndarray:
+        n_slots = len(self._ids)
+        # Tombstoned slots have confidence -1 and fail every threshold
+        keep = np.frombuffer(self._confidence, dtype=np.float32, count=n_slots)[slots] >= max(min_confidence, 0.0)
+        if context_types is not None:
+            codes = [self._type_codes[t] for t in context_types if t in self._type_codes]
+            keep &= np.isin(np.frombuffer(self._type, dtype=np.uint16, count=n_slots)[slots], codes)
+        return slots[keep]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "agent_id": self.agent_id,
+            "contexts": len(self._slots),
+            "tombstones": self._dead,
+            "terms": len(self._vocab),
+            "postings": sum(len(p) for p in self._postings_docs),
+            "vectors": self._vectors is not None,
+        }
+
+    def _append(self, context_id, context_type, counts: Counter, confidence, updated: float):
+        slot = len(self._ids)
+        term_ids = array('I')
+        tfs = array('f')
+        for token, tf in counts.items():
+            term_id = self._vocab.get(token)
+            if term_id is None:
+                term_id = self._vocab[token] = len(self._postings_docs)
+                self._postings_docs.append(array('I'))
+                self._postings_tf.append(array('f'))
+                self._df.append(0)
+            self._postings_docs[term_id].append(slot)
+            self._postings_tf[term_id].append(tf)
+            self._df[term_id] += 1
+            term_ids.append(term_id)
+            tfs.append(tf)
+
+        type_code = self._type_codes.get(context_type)
+        if type_code is None:
+            type_code = self._type_codes[context_type] = len(self._type_codes)
+
+        length = float(sum(tfs))
+        self._ids.append(context_id)
+        self._slots[context_id] = slot
+        self._doc_terms.append((term_ids, tfs))
+        self._doc_len.append(length)
+        self._confidence.append(float(confidence or 0.0))
+        self._updated.append(updated)
+        self._type.append(type_code)
+        self._total_len += length
+
+    def _tombstone(self, slot: int):
+        context_id = self._ids[slot]
+        term_ids, _ = self._doc_terms[slot]
+        for term_id in term_ids:
+            self._df[term_id] -= 1
+        self._total_len -= self._doc_len[slot]
+        self._ids[slot] = None
+        self._doc_terms[slot] = None
+        self._confidence[slot] = -1.0
+        del self._slots[context_id]
+        self._dead += 1
+
+    def _compact(self):
+        """Rebuild postings over live slots only"""
+        live = [slot for slot, context_id in enumerate(self._ids) if context_id is not None]
+        remap = {old: new for new, old in enumerate(live)}
+        postings_docs = [array('I') for _ in self._postings_docs]
+        postings_tf = [array('f') for _ in self._postings_tf]
+        for old in live:
+            term_ids, tfs = self._doc_terms[old]
+            new = remap[old]
+            for term_id, tf in zip(term_ids, tfs):
+                postings_docs[term_id].append(new)
+                postings_tf[term_id].append(tf)
+        self._postings_docs = postings_docs
+        self._postings_tf = postings_tf
+        self._ids = [self._ids[old] for old in live]
+        self._slots = {context_id: slot for slot, context_id in enumerate(self._ids)}
+        self._doc_terms = [self._doc_terms[old] for old in live]
+        self._doc_len = array('f', (self._doc_len[old] for old in live))
+        self._confidence = array('f', (self._confidence[old] for old in live))
+        self._updated = array('d', (self._updated[old] for old in live))
+        self._type = array('H', (self._type[old] for old in live))
+        if self._vectors is not None:
+            self._vectors = self._vectors[live]
+        self._dead = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _set_vector(self, slot: int, vector):
+        vector = self._normalize(vector)
+        if self._vectors is None:
+            self._vectors = np.zeros((max(1024, slot + 1), len(vector)), dtype=np.float32)
+        elif slot >= len(self._vectors):
+            grown = np.zeros((max(slot + 1, len(self._vectors) * 2), self._vectors.shape[1]), dtype=np.float32)
+            grown[:len(self._vectors)] = self._vectors
+            self._vectors = grown
+        self._vectors[slot] = vector
+
+
+class ContextIndexRegistry:
+    """Process-wide LRU of per-agent context indexes"""
+
+    def __init__(self, max_agents: int = 256, refresh_interval: float = 30.0, **index_options):
+        self.max_agents = max_agents
+        self.refresh_interval = refresh_interval
+        self.index_options = index_options
+        self._indexes: "OrderedDict[str, ContextRetrievalIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        agent_id: str,
+        loader: Callable[[Optional[datetime]], Iterable[ContextRow]],
+    ) -> ContextRetrievalIndex:
+        """
+        Get an agent's index, building or refreshing it through ``loader``.
+
+        Args:
+            agent_id: Agent identifier
+            loader: Called with a watermark (None for all rows); yields ContextRow
+                tuples updated at or after it
+        """
+        with self._lock:
+            index = self._indexes.get(agent_id)
+            if index is None:
+                index = self._indexes[agent_id] = ContextRetrievalIndex(agent_id, **self.index_options)
+                while len(self._indexes) > self.max_agents:
+                    self._indexes.popitem(last=False)
+            else:
+                self._indexes.move_to_end(agent_id)
+        index.sync(loader, self.refresh_interval)
+        return index
+
+    def peek(self, agent_id: str) -> Optional[ContextRetrievalIndex]:
+        """An agent's index if it is already loaded"""
+        return self._indexes.get(agent_id)
+
+    def invalidate(self, agent_id: Optional[str] = None):
+        with self._lock:
+            if agent_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(agent_id, None)
+
+
+_registry: Optional[ContextIndexRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_context_index_registry() -> ContextIndexRegistry:
+    """Process-wide registry configured from ``CONTEXT_INDEX_*`` settings"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ContextIndexRegistry(
+                max_agents=getattr(settings, "CONTEXT_INDEX_MAX_AGENTS", 256),
+                refresh_interval=getattr(settings, "CONTEXT_INDEX_REFRESH_SECONDS", 30.0),
+                confidence_weight=getattr(settings, "CONTEXT_INDEX_CONFIDENCE_WEIGHT", 0.5),
+                recency_weight=getattr(settings, "CONTEXT_INDEX_RECENCY_WEIGHT", 0.25),
+                recency_half_life_days=getattr(settings, "CONTEXT_INDEX_RECENCY_HALF_LIFE_DAYS", 30.0),
+            )
+        return _registry
@@ -2,20 +2,37 @@
 Curriculum Engine for Uni0 - Manages curriculum progression and learning paths
 """
 
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timezone
 import logging
+import uuid
 
 from dryad.university.database.models_university import CurriculumPath, UniversityAgent, SkillTree, SkillNode, SkillProgress
+from dryad.university.services.curriculum_graph import (
+    AgentSkillProgress,
+    CurriculumGraphRegistry,
+    SkillGraph,
+    get_curriculum_graph_registry
+)
 
 logger = logging.getLogger(__name__)
 
 class CurriculumEngine:
     """Engine for managing curriculum progression and learning paths"""
     
-    def __init__(self, db: Session):
+    # Match score bonus per curriculum difficulty level
+    DIFFICULTY_MATCH_BONUS = {
+        "beginner": 0.1,
+        "intermediate": 0.2,
+        "advanced": 0.3,
+        "expert": 0.4
+    }
+    
+    def __init__(self, db: Session, graphs: Optional[CurriculumGraphRegistry] = None):
         self.db = db
+        self.graphs = graphs or get_curriculum_graph_registry()
     
     def assign_curriculum(self, agent_id: int, curriculum_id: int) -> bool:
         """Assign a curriculum to an agent"""
@@ -55,58 +72,71 @@ class CurriculumEngine:
         # For now, we'll just log the initialization
         logger.info(f"Initializing curriculum progress for agent {agent_id}, curriculum {curriculum_id}")
     
-    def get_curriculum_progress(self, agent_id: int) -> Optional[Dict[str, Any]]:
+    def get_curriculum_progress(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """Get current curriculum progress for an agent"""
-        agent = self.db.query(UniversityAgent).filter(UniversityAgent.id == agent_id).first()
-        if not agent or not agent.current_curriculum_id:
-            return None
-        
-        curriculum = self.db.query(CurriculumPath).filter(CurriculumPath.id == agent.current_curriculum_id).first()
+        curriculum = self._current_curriculum(agent_id)
         if not curriculum:
             return None
         
-        # Calculate progress based on completed skills/tasks
-        # This is a simplified implementation
-        total_skills = self.db.query(SkillNode).filter(
-            SkillNode.skill_tree_id == curriculum.skill_tree_id
-        ).count()
-        
-        completed_skills = self.db.query(SkillProgress).filter(
-            SkillProgress.agent_id == agent_id,
-            SkillProgress.status == "completed"
-        ).count()
-        
-        progress_percentage = (completed_skills / total_skills * 100) if total_skills > 0 else 0
+        graph = self._skill_graph(curriculum.skill_tree_id)
+        progress = self._agent_progress(graph, agent_id)
         
         return {
             "curriculum_id": curriculum.id,
             "curriculum_name": curriculum.name,
-            "total_skills": total_skills,
-            "completed_skills": completed_skills,
-            "progress_percentage": progress_percentage,
-            "estimated_remaining_hours": self._calculate_remaining_hours(
-                curriculum.estimated_duration_hours, progress_percentage
-            ),
-            "current_difficulty": curriculum.difficulty_level
+            "total_skills": len(graph),
+            "completed_skills": progress.completed_count,
+            "progress_percentage": progress.percentage,
+            "estimated_remaining_hours": progress.remaining_hours,
+            "current_difficulty": curriculum.difficulty_level,
+            "unlocked_skills": progress.unlocked_count,
+            "next_skills": self._skill_summaries(graph, progress.next_skills(limit=5))
         }
     
-    def _calculate_remaining_hours(self, total_hours: int, progress_percentage: float) -> float:
-        """Calculate remaining hours based on progress"""
-        completed_hours = (progress_percentage / 100) * total_hours
-        return max(0, total_hours - completed_hours)
+    def get_next_skills(self, agent_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Get the skills an agent has unlocked but not yet completed, in learning-path order"""
+        curriculum = self._current_curriculum(agent_id)
+        if not curriculum:
+            return []
+        
+        graph = self._skill_graph(curriculum.skill_tree_id)
+        progress = self._agent_progress(graph, agent_id)
+        return self._skill_summaries(graph, progress.next_skills(limit=limit))
     
-    def complete_skill(self, agent_id: int, skill_node_id: int) -> bool:
+    def get_skill_path(self, agent_id: str, skill_node_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Get the skills an agent still has to complete, in order, to reach a target skill"""
+        curriculum = self._current_curriculum(agent_id)
+        if not curriculum:
+            return None
+        
+        graph = self._skill_graph(curriculum.skill_tree_id)
+        if skill_node_id not in graph:
+            return None
+        
+        progress = self._agent_progress(graph, agent_id)
+        path = progress.missing_prerequisites(graph.position[skill_node_id])
+        if not progress.is_completed(graph.position[skill_node_id]):
+            path.append(skill_node_id)
+        return self._skill_summaries(graph, path)
+    
+    def complete_skill(self, agent_id: str, skill_node_id: str, enforce_prerequisites: bool = False) -> bool:
         """Mark a skill as completed for an agent"""
         try:
-            # Check if skill exists and is part of agent's current curriculum
-            agent = self.db.query(UniversityAgent).filter(UniversityAgent.id == agent_id).first()
-            if not agent or not agent.current_curriculum_id:
+            # Check if skill is part of agent's current curriculum
+            curriculum = self._current_curriculum(agent_id)
+            if not curriculum:
                 return False
             
-            skill_node = self.db.query(SkillNode).filter(SkillNode.id == skill_node_id).first()
-            if not skill_node or skill_node.skill_tree_id != curriculum.skill_tree_id:
+            graph = self._skill_graph(curriculum.skill_tree_id)
+            if skill_node_id not in graph:
                 return False
             
+            if enforce_prerequisites:
+                progress = self._agent_progress(graph, agent_id)
+                if not progress.is_unlocked(graph.position[skill_node_id]):
+                    logger.info(f"Skill {skill_node_id} is locked for agent {agent_id}")
+                    return False
+            
             # Check if skill is already completed
             existing_progress = self.db.query(SkillProgress).filter(
                 SkillProgress.agent_id == agent_id,
@@ -123,6 +153,7 @@ class CurriculumEngine:
             else:
                 # Create new progress record
                 progress = SkillProgress(
+                    id=str(uuid.uuid4()),
                     agent_id=agent_id,
                     skill_node_id=skill_node_id,
                     status="completed",
@@ -131,6 +162,7 @@ class CurriculumEngine:
                 self.db.add(progress)
             
             self.db.commit()
+            self.graphs.record_completion(graph.tree_id, agent_id, skill_node_id)
             logger.info(f"Skill {skill_node_id} completed by agent {agent_id}")
             return True
             
@@ -141,38 +173,38 @@ class CurriculumEngine:
     
     def get_recommended_curricula(self, agent_id: int, limit: int = 5) -> List[Dict[str, Any]]:
         """Get recommended curricula for an agent based on their current skills and specialization"""
-        agent = self.db.query(UniversityAgent).filter(UniversityAgent.id == agent_id).first()
-        if not agent:
+        university_id = self.db.query(UniversityAgent.university_id).filter(
+            UniversityAgent.id == agent_id
+        ).scalar()
+        if not university_id:
             return []
         
-        # Get agent's current specialization
-        specialization = agent.specialization
-        
-        # Query curricula that match the agent's specialization and difficulty level
-        # This is a simplified recommendation algorithm
-        recommended = self.db.query(CurriculumPath).filter(
-            CurriculumPath.university_id == agent.university_id,
+        # Score and rank active curricula in the query
+        match_score = self._curriculum_match_score_expression()
+        recommended = self.db.query(CurriculumPath, match_score).filter(
+            CurriculumPath.university_id == university_id,
             CurriculumPath.status == "active"
-        ).order_by(CurriculumPath.difficulty_level).limit(limit).all()
+        ).order_by(match_score.desc(), CurriculumPath.name).limit(limit).all()
         
-        recommendations = []
-        for curriculum in recommended:
-            # Calculate match score based on specialization and difficulty
-            match_score = self._calculate_curriculum_match_score(curriculum, agent)
-            
-            recommendations.append({
+        return [
+            {
                 "curriculum_id": curriculum.id,
                 "name": curriculum.name,
                 "description": curriculum.description,
                 "difficulty_level": curriculum.difficulty_level,
-                "estimated_duration_hours": curriculum.estimated_duration_hours,
-                "match_score": match_score,
+                "estimated_duration_hours": getattr(curriculum, "estimated_duration_hours", None),
+                "match_score": min(1.0, score),
                 "prerequisites": curriculum.prerequisites or []
-            })
-        
-        # Sort by match score (descending)
-        recommendations.sort(key=lambda x: x["match_score"], reverse=True)
-        return recommendations
+            }
+            for curriculum, score in recommended
+        ]
+    
+    def _curriculum_match_score_expression(self):
+        """SQL expression for _calculate_curriculum_match_score"""
+        return (
+            case((CurriculumPath.status == "active", 0.3), else_=0.0)
+            + case(self.DIFFICULTY_MATCH_BONUS, value=CurriculumPath.difficulty_level, else_=0.1)
+        )
     
     def _calculate_curriculum_match_score(self, curriculum: CurriculumPath, agent: UniversityAgent) -> float:
         """Calculate how well a curriculum matches an agent's profile"""
@@ -183,40 +215,51 @@ class CurriculumEngine:
             score += 0.3
         
         # Difficulty level matching (simplified)
-        difficulty_bonus = {
-            "beginner": 0.1,
-            "intermediate": 0.2,
-            "advanced": 0.3,
-            "expert": 0.4
-        }
-        score += difficulty_bonus.get(curriculum.difficulty_level, 0.1)
+        score += self.DIFFICULTY_MATCH_BONUS.get(curriculum.difficulty_level, 0.1)
         
         # Specialization matching (if curriculum has specialization requirements)
         # This would be more sophisticated in a real implementation
         
         return min(1.0, score)
     
-    def generate_learning_path(self, curriculum_id: int) -> List[Dict[str, Any]]:
+    def generate_learning_path(self, curriculum_id: str) -> List[Dict[str, Any]]:
         """Generate a learning path for a curriculum"""
-        curriculum = self.db.query(CurriculumPath).filter(CurriculumPath.id == curriculum_id).first()
-        if not curriculum:
+        skill_tree_id = self.db.query(CurriculumPath.skill_tree_id).filter(
+            CurriculumPath.id == curriculum_id
+        ).first()
+        if not skill_tree_id:
             return []
         
-        # Get all skill nodes for this curriculum, ordered by prerequisite dependencies
-        skill_nodes = self.db.query(SkillNode).filter(
-            SkillNode.skill_tree_id == curriculum.skill_tree_id
-        ).order_by(SkillNode.order_index).all()
+        # Skills in topological order of their prerequisites
+        graph = self._skill_graph(skill_tree_id[0])
+        skill_nodes = {
+            skill_node.id: skill_node
+            for skill_node in self.db.query(
+                SkillNode.id,
+                SkillNode.name,
+                SkillNode.description,
+                SkillNode.skill_type,
+                SkillNode.prerequisites,
+                SkillNode.estimated_duration_hours,
+                SkillNode.order_index
+            ).filter(SkillNode.skill_tree_id == graph.tree_id)
+        }
         
         learning_path = []
-        for skill_node in skill_nodes:
+        for position, skill_node_id in enumerate(graph.ids):
+            skill_node = skill_nodes.get(skill_node_id)
+            if skill_node is None:
+                continue
             learning_path.append({
                 "skill_node_id": skill_node.id,
                 "name": skill_node.name,
                 "description": skill_node.description,
                 "skill_type": skill_node.skill_type,
                 "prerequisites": skill_node.prerequisites or [],
+                "all_prerequisites_count": graph.closure[position].bit_count(),
                 "estimated_duration_hours": skill_node.estimated_duration_hours,
-                "order_index": skill_node.order_index
+                "order_index": skill_node.order_index,
+                "path_position": position
             })
         
         return learning_path
@@ -229,15 +272,76 @@ class CurriculumEngine:
         
         # Consider curriculum completed if progress is 100%
         if progress["progress_percentage"] >= 100:
-            agent = self.db.query(UniversityAgent).filter(UniversityAgent.id == agent_id).first()
-            if agent:
-                agent.status = "completed"
-                agent.updated_at = datetime.now(timezone.utc)
+            updated = self.db.query(UniversityAgent).filter(UniversityAgent.id == agent_id).update(
+                {UniversityAgent.status: "completed", UniversityAgent.updated_at: datetime.now(timezone.utc)},
+                synchronize_session="fetch"
+            )
+            if updated:
                 self.db.commit()
-                logger.info(f"Agent {agent_id} completed curriculum {agent.current_curriculum_id}")
+                logger.info(f"Agent {agent_id} completed curriculum {progress['curriculum_id']}")
                 return True
         
         return False
+    
+    # ==================== Skill Graph Access ====================
+    
+    def _current_curriculum(self, agent_id: str) -> Optional[Tuple[Any, ...]]:
+        """The agent's current curriculum (id, name, difficulty_level, skill_tree_id) in one query"""
+        return self.db.query(
+            CurriculumPath.id,
+            CurriculumPath.name,
+            CurriculumPath.difficulty_level,
+            CurriculumPath.skill_tree_id
+        ).join(
+            UniversityAgent, UniversityAgent.current_curriculum_id == CurriculumPath.id
+        ).filter(UniversityAgent.id == agent_id).first()
+    
+    def _skill_graph(self, skill_tree_id: Optional[str]) -> SkillGraph:
+        """The compiled skill graph of a tree, recompiled when its skills change"""
+        def signature():
+            return tuple(self.db.query(func.count(SkillNode.id), func.max(SkillNode.updated_at)).filter(
+                SkillNode.skill_tree_id == skill_tree_id
+            ).one())
+        
+        def rows():
+            return self.db.query(
+                SkillNode.id,
+                SkillNode.name,
+                SkillNode.prerequisites,
+                SkillNode.estimated_duration_hours,
+                SkillNode.order_index,
+                SkillNode.skill_type
+            ).filter(SkillNode.skill_tree_id == skill_tree_id).order_by(
+                SkillNode.order_index, SkillNode.id
+            ).all()
+        
+        return self.graphs.graph(skill_tree_id or "", signature, rows)
+    
+    def _agent_progress(self, graph: SkillGraph, agent_id: str) -> AgentSkillProgress:
+        """An agent's cached progress on a skill graph"""
+        def completed():
+            return [
+                row[0] for row in self.db.query(SkillProgress.skill_node_id).join(
+                    SkillNode, SkillNode.id == SkillProgress.skill_node_id
+                ).filter(
+                    SkillProgress.agent_id == agent_id,
+                    SkillProgress.status == "completed",
+                    SkillNode.skill_tree_id == graph.tree_id
+                )
+            ]
+        
+        return self.graphs.progress(graph, agent_id, completed)
+    
+    @staticmethod
+    def _skill_summaries(graph: SkillGraph, skill_node_ids: List[str]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "skill_node_id": skill_node_id,
+                "name": graph.names[graph.position[skill_node_id]],
+                "estimated_duration_hours": graph.hours[graph.position[skill_node_id]]
+            }
+            for skill_node_id in skill_node_ids
+        ]
 
 # Utility functions
 def create_curriculum_engine(db: Session) -> CurriculumEngine:
@@ -0,0 +1,363 @@
+"""
+Curriculum Skill Graph
+======================
+
+Compiled prerequisite graphs for skill trees. A tree's ``SkillNode`` rows are
+loaded once and put in topological order (ties broken by ``order_index``).
+Each skill's direct and transitive prerequisites are stored as bitsets
+(Python ints indexed by topological position), with reverse edges for
+unlocking.
+
+An agent's progress is cached as a completed-skills bitmap, plus a completed
+count, completed hours and a bitmap of unlocked non-root skills. ``complete``
+updates these incrementally by checking only the dependents of the skill just
+finished. "% complete" and "unlocked next skills" are then answered without
+touching the database.
+
+The registry compares each tree's (node count, latest ``updated_at``) against
+the database on a refresh interval. When the tree has changed it recompiles
+the graph and drops that tree's cached progress. Cached progress also expires
+after a TTL, so completions written by other processes are picked up.
+
+Author: Dryad University System
+Date: 2025-11-01
+"""
+
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+from collections import OrderedDict
+import heapq
+import threading
+import time
+
+from dryad.university.core.config import get_settings
+from dryad.university.core.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# (skill_node_id, name, prerequisites, estimated_duration_hours, order_index, skill_type)
+SkillRow = Tuple[str, Optional[str], Optional[List[str]], Optional[float], Optional[int], Optional[str]]
+
+
+def bit_positions(bits: int, limit: Optional[int] = None) -> List[int]:
+    """Positions of the (first ``limit``) set bits of ``bits``, ascending"""
+    positions = []
+    digits = bin(bits)[:1:-1]
+    position = digits.find("1")
+    while position >= 0 and (limit is None or len(positions) < limit):
+        positions.append(position)
+        position = digits.find("1", position + 1)
+    return positions
+
+
+class AgentSkillProgress:
+    """One agent's cached progress through a compiled skill graph"""
+
+    __slots__ = ("graph", "completed", "completed_count", "completed_hours", "unlocked_dependents", "loaded_at")
+
+    def __init__(self, graph: "SkillGraph"):
+        self.graph = graph
+        self.completed = 0
+        self.completed_count = 0
+        self.completed_hours = 0.0
+        # Non-root skills whose prerequisites are all completed (roots are shared by the graph)
+        self.unlocked_dependents = 0
+        self.loaded_at = time.monotonic()
+
+    @property
+    def unlocked(self) -> int:
+        """Bitmap of unlocked, not yet completed skills"""
+        return (self.graph.root_bits | self.unlocked_dependents) & ~self.completed
+
+    @property
+    def unlocked_count(self) -> int:
+        return self.unlocked.bit_count()
+
+    @property
+    def percentage(self) -> float:
+        total = len(self.graph)
+        return self.completed_count / total * 100 if total else 0.0
+
+    @property
+    def remaining_hours(self) -> float:
+        return max(0.0, self.graph.total_hours - self.completed_hours)
+
+    def is_completed(self, index: int) -> bool:
+        return bool(self.completed >> index & 1)
+
+    def is_unlocked(self, index: int) -> bool:
+        required = self.graph.direct[index]
+        return self.completed & required == required
+
+    def complete(self, index: int) -> bool:
+        """
+        Mark a skill completed and unlock the dependents it satisfies.
+
+        Returns:
+            False if it was already completed
+        """
+        if self.completed >> index & 1:
+            return False
+        self.completed |= 1 << index
+        self.completed_count += 1
+        self.completed_hours += self.graph.hours[index]
+        for dependent in self.graph.dependents[index]:
+            if self.is_unlocked(dependent):
+                self.unlocked_dependents |= 1 << dependent
+        return True
+
+    def next_skills(self, limit: Optional[int] = None) -> List[str]:
+        """Unlocked, not yet completed skills in learning-path order"""
+        return [self.graph.ids[index] for index in bit_positions(self.unlocked, limit)]
+
+    def missing_prerequisites(self, index: int) -> List[str]:
+        """Every prerequisite (direct or transitive) of a skill not yet completed, in order"""
+        closure = self.graph.closure[index]
+        return [self.graph.ids[i] for i in bit_positions(closure ^ (closure & self.completed))]
+
+
+class SkillGraph:
+    """A skill tree compiled into topological order with bitset prerequisite closures"""
+
+    def __init__(self, tree_id: str, rows: Iterable[SkillRow], signature: Hashable = None):
+        self.tree_id = tree_id
+        self.signature = signature
+        rows = list(rows)
+        known = {row[0] for row in rows}
+
+        # Kahn's algorithm; among ready skills the lowest order_index goes first
+        prerequisites: Dict[str, List[str]] = {}
+        dependents: Dict[str, List[str]] = {skill_id: [] for skill_id in known}
+        indegree: Dict[str, int] = {}
+        self.unknown_prerequisites = 0
+        for skill_id, _, prereqs, _, _, _ in rows:
+            direct = []
+            for prereq in dict.fromkeys(str(p) for p in prereqs or []):
+                if prereq in known and prereq != skill_id:
+                    direct.append(prereq)
+                    dependents[prereq].append(skill_id)
+                else:
+                    self.unknown_prerequisites += 1
+            prerequisites[skill_id] = direct
+            indegree[skill_id] = len(direct)
+
+        sort_key = {row[0]: (row[4] or 0, position) for position, row in enumerate(rows)}
+        ready = [(sort_key[skill_id], skill_id) for skill_id, degree in indegree.items() if degree == 0]
+        heapq.heapify(ready)
+        order: List[str] = []
+        while ready:
+            _, skill_id = heapq.heappop(ready)
+            order.append(skill_id)
+            for dependent in dependents[skill_id]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    heapq.heappush(ready, (sort_key[dependent], dependent))
+
+        # Skills on a prerequisite cycle go last; edges pointing forward are dropped to break the cycle
+        cyclic = sorted((skill_id for skill_id, degree in indegree.items() if degree > 0), key=sort_key.get)
+        if cyclic:
+            logger.warning(f"Skill tree {tree_id}: {len(cyclic)} skills on prerequisite cycles")
+        order.extend(cyclic)
+        self.cyclic = set(cyclic)
+
+        self.ids: List[str] = order
+        self.position: Dict[str, int] = {skill_id: index for index, skill_id in enumerate(order)}
+        by_id = {row[0]: row for row in rows}
+        self.names = [by_id[skill_id][1] for skill_id in order]
+        self.hours = [float(by_id[skill_id][3] or 0.0) for skill_id in order]
+        self.total_hours = sum(self.hours)
+
+        self.direct: List[int] = []
+        self.closure: List[int] = []
+        self.dependents: List[List[int]] = [[] for _ in order]
+        self.root_bits = 0
+        for index, skill_id in enumerate(order):
+            direct = closure = 0
+            for prereq in prerequisites[skill_id]:
+                prereq_index = self.position[prereq]
+                if prereq_index >= index:
+                    continue
+                direct |= 1 << prereq_index
+                closure |= self.closure[prereq_index] | 1 << prereq_index
+                self.dependents[prereq_index].append(index)
+            self.direct.append(direct)
+            self.closure.append(closure)
+            if not direct:
+                self.root_bits |= 1 << index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, skill_id: str) -> bool:
+        return skill_id in self.position
+
+    def prerequisites(self, skill_id: str, transitive: bool = True) -> List[str]:
+        """Prerequisites of a skill in learning-path order"""
+        index = self.position[skill_id]
+        bits = self.closure[index] if transitive else self.direct[index]
+        return [self.ids[i] for i in bit_positions(bits)]
+
+    def progress(self, completed_ids: Iterable[str]) -> AgentSkillProgress:
+        """Build an agent's progress from its completed skill ids"""
+        progress = AgentSkillProgress(self)
+        indexes = {self.position[skill_id] for skill_id in completed_ids if skill_id in self.position}
+        progress.completed = self._bits(indexes)
+        progress.completed_count = len(indexes)
+        progress.completed_hours = sum(self.hours[index] for index in indexes)
+        # Only dependents of completed skills can be unlocked beyond the roots
+        candidates = {dependent for index in indexes for dependent in self.dependents[index]}
+        progress.unlocked_dependents = self._bits(index for index in candidates if progress.is_unlocked(index))
+        return progress
+
+    def _bits(self, indexes: Iterable[int]) -> int:
+        """Bitmap with the given positions set, built in one pass"""
+        buffer = bytearray((len(self.ids) + 7) // 8)
+        for index in indexes:
+            buffer[index >> 3] |= 1 << (index & 7)
+        return int.from_bytes(buffer, "little")
+
+
+class CurriculumGraphRegistry:
+    """Process-wide cache of compiled skill graphs and per-agent progress"""
+
+    def __init__(
+        self,
+        max_trees: int = 32,
+        max_agents: int = 100000,
+        refresh_interval: float = 30.0,
+        progress_ttl: float = 300.0
+    ):
+        """
+        Args:
+            max_trees: Compiled skill graphs kept (LRU)
+            max_agents: Agent progress entries kept across all trees (LRU)
+            refresh_interval: Seconds between checks of a tree's signature
+            progress_ttl: Seconds before cached agent progress is reloaded
+        """
+        self.max_trees = max_trees
+        self.max_agents = max_agents
+        self.refresh_interval = refresh_interval
+        self.progress_ttl = progress_ttl
+        self._graphs: "OrderedDict[str, Tuple[SkillGraph, float]]" = OrderedDict()
+        self._progress: "OrderedDict[Tuple[str, str], AgentSkillProgress]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def graph(
+        self,
+        tree_id: str,
+        signature_loader: Callable[[], Hashable],
+        rows_loader: Callable[[], Iterable[SkillRow]]
+    ) -> SkillGraph:
+        """
+        Get a tree's compiled graph, recompiling it when its signature changed.
+
+        Args:
+            tree_id: Skill tree identifier
+            signature_loader: Returns a value that changes whenever the tree's skills change
+            rows_loader: Yields the tree's SkillRow tuples
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._graphs.get(tree_id)
+            if cached is not None:
+                self._graphs.move_to_end(tree_id)
+                if now - cached[1] < self.refresh_interval:
+                    return cached[0]
+
+        with self._build_lock:
+            cached = self._graphs.get(tree_id)
+            if cached is not None and time.monotonic() - cached[1] < self.refresh_interval:
+                return cached[0]
+            signature = signature_loader()
+            if cached is not None and cached[0].signature == signature:
+                graph = cached[0]
+            else:
+                started = time.perf_counter()
+                graph = SkillGraph(tree_id, rows_loader(), signature)
+                logger.info(f"Compiled skill tree {tree_id}: {len(graph)} skills in "
+                            f"{time.perf_counter() - started:.2f}s")
+            with self._lock:
+                if cached is not None and cached[0] is not graph:
+                    self._drop_progress(tree_id)
+                self._graphs[tree_id] = (graph, time.monotonic())
+                self._graphs.move_to_end(tree_id)
+                while len(self._graphs) > self.max_trees:
+                    evicted, _ = self._graphs.popitem(last=False)
+                    self._drop_progress(evicted)
+            return graph
+
+    def progress(
+        self,
+        graph: SkillGraph,
+        agent_id: str,
+        completed_loader: Callable[[], Iterable[str]]
+    ) -> AgentSkillProgress:
+        """Get an agent's cached progress on ``graph``, loading completed skill ids if needed"""
+        key = (graph.tree_id, str(agent_id))
+        with self._lock:
+            progress = self._progress.get(key)
+            if progress is not None:
+                if progress.graph is graph and time.monotonic() - progress.loaded_at < self.progress_ttl:
+                    self._progress.move_to_end(key)
+                    return progress
+                del self._progress[key]
+
+        progress = graph.progress(completed_loader())
+        with self._lock:
+            self._progress[key] = progress
+            while len(self._progress) > self.max_agents:
+                self._progress.popitem(last=False)
+        return progress
+
+    def record_completion(self, tree_id: str, agent_id: str, skill_id: str) -> bool:
+        """Apply a committed completion to the agent's cached progress, if loaded"""
+        with self._lock:
+            progress = self._progress.get((tree_id, str(agent_id)))
+            if progress is None or skill_id not in progress.graph:
+                return False
+            return progress.complete(progress.graph.position[skill_id])
+
+    def invalidate(self, tree_id: Optional[str] = None, agent_id: Optional[str] = None):
+        """Drop a tree (and its progress), one agent's progress, or everything"""
+        with self._lock:
+            if tree_id is None and agent_id is None:
+                self._graphs.clear()
+                self._progress.clear()
+            elif agent_id is None:
+                self._graphs.pop(tree_id, None)
+                self._drop_progress(tree_id)
+            else:
+                for key in [key for key in self._progress if key[1] == str(agent_id)
+                            and (tree_id is None or key[0] == tree_id)]:
+                    del self._progress[key]
+
+    def _drop_progress(self, tree_id: str):
+        for key in [key for key in self._progress if key[0] == tree_id]:
+            del self._progress[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "trees": len(self._graphs),
+                "skills": sum(len(graph) for graph, _ in self._graphs.values()),
+                "agents": len(self._progress)
+            }
+
+
+_registry: Optional[CurriculumGraphRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_curriculum_graph_registry() -> CurriculumGraphRegistry:
+    """Process-wide registry configured from ``CURRICULUM_GRAPH_*`` settings"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = CurriculumGraphRegistry(
+                max_trees=getattr(settings, "CURRICULUM_GRAPH_MAX_TREES", 32),
+                max_agents=getattr(settings, "CURRICULUM_GRAPH_MAX_AGENTS", 100000),
+                refresh_interval=getattr(settings, "CURRICULUM_GRAPH_REFRESH_SECONDS", 30.0),
+                progress_ttl=getattr(settings, "CURRICULUM_GRAPH_PROGRESS_TTL_SECONDS", 300.0),
+            )
+        return _registry
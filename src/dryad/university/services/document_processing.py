@@ -18,6 +18,7 @@ import numpy as np
 from sqlalchemy.orm import Session
 
 from dryad.university.database.models_university import MediaAsset, MultimodalInteraction
+from dryad.university.services.text_engine import StreamingTextAnalyzer, TextSource
 
 
 class DocumentProcessingService:
@@ -55,6 +56,9 @@ class DocumentProcessingService:
             'chunk_size': 1000,  # Text chunk size for processing
             'language': 'auto'  # Default language detection
         }
+        
+        # Single-pass analyzer shared by the structure and content analyses
+        self.text_analyzer = StreamingTextAnalyzer(chunk_size=1 << 20)
     
     async def extract_text(
         self,
@@ -116,32 +120,12 @@ class DocumentProcessingService:
             if not text_content:
                 return {'error': 'No text content available for analysis'}
             
-            # Perform various structural analyses
-            results = {
-                'timestamp': datetime.now(timezone.utc).isoformat(),
-                'text_length': len(text_content),
-                'word_count': len(text_content.split()),
-                'sentence_count': len(re.findall(r'[.!?]+', text_content)),
-                'paragraph_count': len(text_content.split('\n\n'))
-            }
-            
-            # Detect document structure
-            results['structure_analysis'] = await self._analyze_document_structure(text_content)
-            
-            # Extract headings and sections
-            results['headings_sections'] = await self._extract_headings_and_sections(text_content)
-            
-            # Identify key topics and themes
-            results['key_topics'] = await self._extract_key_topics(text_content)
-            
-            # Calculate readability scores
-            results['readability_scores'] = await self._calculate_readability_scores(text_content)
-            
-            # Detect language and characteristics
-            results['language_analysis'] = await self._analyze_language(text_content)
-            
-            # Extract metadata and references
-            results['metadata_extraction'] = await self._extract_document_metadata(text_content)
+            # One tokenization pass feeds every structural accumulator
+            stream_results = await self.text_analyzer.analyze_async(
+                text_content,
+                include=['statistics', 'structure', 'keywords', 'language', 'metadata']
+            )
+            results = self._build_structure_results(stream_results)
             
             # Calculate overall structure score
             results['structure_score'] = self._calculate_structure_score(results)
@@ -170,42 +154,58 @@ class DocumentProcessingService:
         try:
             options = options or {}
             
-            # Basic text statistics
-            analysis_results = {
-                'timestamp': datetime.now(timezone.utc).isoformat(),
-                'text_length': len(text_content),
-                'word_count': len(text_content.split()),
-                'character_count': len(text_content),
-                'line_count': len(text_content.splitlines())
-            }
+            # One tokenization pass feeds every requested accumulator
+            stream_results = await self.text_analyzer.analyze_async(
+                text_content, include=self._content_accumulators(options)
+            )
+            analysis_results = self._build_content_results(stream_results)
             
-            # Sentiment analysis
-            if options.get('analyze_sentiment', True):
-                analysis_results['sentiment'] = await self._analyze_sentiment(text_content)
+            # Calculate confidence scores
+            analysis_results['confidence_scores'] = self._calculate_text_confidence_scores(analysis_results)
+            analysis_results['overall_confidence'] = np.mean(list(analysis_results['confidence_scores'].values()))
+            
+            return analysis_results
             
-            # Named entity recognition
-            if options.get('extract_entities', True):
-                analysis_results['entities'] = await self._extract_named_entities(text_content)
+        except Exception as e:
+            self.logger.error(f"Error analyzing text content: {str(e)}")
+            raise
+    
+    async def analyze_document_stream(
+        self,
+        source: TextSource,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze a large document without loading it into memory.
+        
+        Args:
+            source: File path, open file, or iterable of page strings
+            options: Analysis options (same keys as analyze_text_content)
             
-            # Keyword extraction
-            if options.get('extract_keywords', True):
-                analysis_results['keywords'] = await self._extract_keywords(text_content)
+        Returns:
+            Dict containing structural and content analysis results
+        """
+        try:
+            options = options or {}
             
-            # Language detection
-            analysis_results['language'] = await self._detect_language(text_content)
+            # Strings are paths here; in-memory text goes through analyze_text_content
+            if isinstance(source, str):
+                source = Path(source)
             
-            # Content categorization
-            if options.get('categorize_content', True):
-                analysis_results['content_category'] = await self._categorize_content(text_content)
+            include = set(self._content_accumulators(options))
+            include.update(['statistics', 'structure', 'keywords', 'language', 'metadata'])
+            stream_results = await self.text_analyzer.analyze_async(source, include=include)
             
-            # Calculate confidence scores
+            analysis_results = self._build_structure_results(stream_results)
+            analysis_results['structure_score'] = self._calculate_structure_score(analysis_results)
+            analysis_results.update(self._build_content_results(stream_results))
             analysis_results['confidence_scores'] = self._calculate_text_confidence_scores(analysis_results)
             analysis_results['overall_confidence'] = np.mean(list(analysis_results['confidence_scores'].values()))
             
             return analysis_results
             
         except Exception as e:
-            self.logger.error(f"Error analyzing text content: {str(e)}")
+            self.logger.error(f"Error analyzing document stream: {str(e)}")
             raise
     
     async def generate_accessibility_features(
@@ -472,182 +472,6 @@ class DocumentProcessingService:
         # In production, would use language-specific libraries
         return text
     
-    async def _analyze_document_structure(self, text: str) -> Dict[str, Any]:
-        """Analyze document structure and organization"""
-        # Detect headings
-        heading_patterns = [
-            r'^#{1,6}\s+.+$',  # Markdown headings
-            r'^[A-Z][^.!?]*$',  # Potential headings
-            r'^\d+\.?\s+.+$'   # Numbered sections
-        ]
-        
-        headings = []
-        for pattern in heading_patterns:
-            matches = re.findall(pattern, text, re.MULTILINE)
-            headings.extend(matches)
-        
-        # Detect lists
-        list_patterns = [
-            r'^[\s]*[-*+]\s+.+$',  # Bullet lists
-            r'^[\s]*\d+\.?\s+.+$', # Numbered lists
-        ]
-        
-        lists = []
-        for pattern in list_patterns:
-            matches = re.findall(pattern, text, re.MULTILINE)
-            lists.extend(matches)
-        
-        return {
-            'has_headings': len(headings) > 0,
-            'heading_count': len(headings),
-            'has_lists': len(lists) > 0,
-            'list_count': len(lists),
-            'structure_type': self._classify_document_structure(headings, lists),
-            'complexity_score': min(1.0, (len(headings) + len(lists)) / 20)
-        }
-    
-    def _classify_document_structure(self, headings: List[str], lists: List[str]) -> str:
-        """Classify document structure type"""
-        heading_ratio = len(headings) / max(1, len(headings) + len(lists))
-        
-        if heading_ratio > 0.7:
-            return 'structured'
-        elif heading_ratio > 0.3:
-            return 'mixed'
-        else:
-            return 'narrative'
-    
-    async def _extract_headings_and_sections(self, text: str) -> List[Dict[str, Any]]:
-        """Extract headings and section information"""
-        sections = []
-        
-        # Simple section detection based on patterns
-        lines = text.split('\n')
-        current_section = None
-        
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Check if line looks like a heading
-            if (len(line) < 100 and 
-                (line.isupper() or 
-                 line.endswith(':') or 
-                 re.match(r'^\d+\.?\s+', line))):
-                
-                if current_section:
-                    sections.append(current_section)
-                
-                current_section = {
-                    'title': line,
-                    'line_number': i + 1,
-                    'content_preview': '',
-                    'word_count': 0
-                }
-            elif current_section:
-                # Add content to current section
-                if not current_section['content_preview']:
-                    current_section['content_preview'] = line[:100]
-                current_section['word_count'] += len(line.split())
-        
-        # Add last section
-        if current_section:
-            sections.append(current_section)
-        
-        return sections
-    
-    async def _extract_key_topics(self, text: str) -> List[Dict[str, Any]]:
-        """Extract key topics and themes from text"""
-        # Simple keyword extraction (would use more sophisticated methods in production)
-        words = re.findall(r'\b[A-Za-z]{4,}\b', text.lower())
-        word_freq = {}
-        
-        for word in words:
-            if word not in ['this', 'that', 'with', 'from', 'they', 'have', 'been', 'were', 'said']:
-                word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Get top keywords
-        top_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]
-        
-        topics = []
-        for word, freq in top_words:
-            topics.append({
-                'topic': word,
-                'frequency': freq,
-                'relevance_score': min(1.0, freq / max(1, max(word_freq.values())))
-            })
-        
-        return topics
-    
-    async def _calculate_readability_scores(self, text: str) -> Dict[str, float]:
-        """Calculate various readability scores"""
-        # Simple readability metrics
-        sentences = re.split(r'[.!?]+', text)
-        words = text.split()
-        
-        if not sentences or not words:
-            return {'flesch_score': 0.0, 'grade_level': 0.0}
-        
-        # Basic calculations
-        avg_sentence_length = len(words) / len(sentences)
-        avg_word_length = sum(len(word) for word in words) / len(words)
-        
-        # Mock Flesch Reading Ease Score
-        flesch_score = max(0, min(100, 206.835 - (1.015 * avg_sentence_length) - (84.6 * avg_word_length / 4.6)))
-        
-        # Mock grade level
-        grade_level = max(1, min(12, (avg_sentence_length * 0.39) + (avg_word_length * 11.8) - 15.59))
-        
-        return {
-            'flesch_score': flesch_score,
-            'grade_level': grade_level,
-            'avg_sentence_length': avg_sentence_length,
-            'avg_word_length': avg_word_length
-        }
-    
-    async def _analyze_language(self, text: str) -> Dict[str, Any]:
-        """Analyze language characteristics"""
-        # Mock language detection
-        english_indicators = ['the', 'and', 'is', 'in', 'to', 'of', 'a', 'that', 'it', 'with']
-        text_words = text.lower().split()
-        
-        english_score = sum(1 for word in text_words if word in english_indicators) / max(1, len(text_words))
-        
-        return {
-            'detected_language': 'en' if english_score > 0.02 else 'unknown',
-            'language_confidence': english_score,
-            'characteristics': {
-                'has_punctuation': bool(re.search(r'[.!?]', text)),
-                'has_numbers': bool(re.search(r'\d', text)),
-                'has_special_chars': bool(re.search(r'[^a-zA-Z\s]', text))
-            }
-        }
-    
-    async def _extract_document_metadata(self, text: str) -> Dict[str, Any]:
-        """Extract metadata and references from document"""
-        metadata = {
-            'references': [],
-            'citations': [],
-            'urls': [],
-            'emails': [],
-            'dates': []
-        }
-        
-        # Extract URLs
-        url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-        metadata['urls'] = re.findall(url_pattern, text)
-        
-        # Extract email addresses
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        metadata['emails'] = re.findall(email_pattern, text)
-        
-        # Extract dates
-        date_pattern = r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b|\b\d{4}[/-]\d{1,2}[/-]\d{1,2}\b'
-        metadata['dates'] = re.findall(date_pattern, text)
-        
-        return metadata
-    
     def _calculate_structure_score(self, results: Dict[str, Any]) -> float:
         """Calculate overall document structure score"""
         score = 0.0
@@ -675,137 +499,68 @@ class DocumentProcessingService:
         
         return min(1.0, score)
     
-    async def _analyze_sentiment(self, text: str) -> Dict[str, Any]:
-        """Analyze sentiment of text content"""
-        # Mock sentiment analysis
-        positive_words = ['good', 'great', 'excellent', 'wonderful', 'amazing', 'fantastic']
-        negative_words = ['bad', 'terrible', 'awful', 'horrible', 'disgusting', 'worst']
-        
-        words = text.lower().split()
-        positive_count = sum(1 for word in words if word in positive_words)
-        negative_count = sum(1 for word in words if word in negative_words)
-        
-        total_words = len(words)
-        positive_score = positive_count / max(1, total_words)
-        negative_score = negative_count / max(1, total_words)
-        
-        # Determine overall sentiment
-        if positive_score > negative_score:
-            sentiment = 'positive'
-        elif negative_score > positive_score:
-            sentiment = 'negative'
-        else:
-            sentiment = 'neutral'
-        
-        return {
-            'sentiment': sentiment,
-            'positive_score': positive_score,
-            'negative_score': negative_score,
-            'confidence': abs(positive_score - negative_score) * 10
+    def _content_accumulators(self, options: Dict[str, Any]) -> List[str]:
+        """Accumulators needed for the requested content analyses"""
+        include = ['statistics', 'language']
+        if options.get('analyze_sentiment', True):
+            include.append('sentiment')
+        if options.get('extract_entities', True):
+            include.append('entities')
+        if options.get('extract_keywords', True):
+            include.append('keywords')
+        if options.get('categorize_content', True):
+            include.append('category')
+        return include
+    
+    def _build_content_results(self, stream_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape streaming accumulator output as text content analysis results"""
+        statistics = stream_results['statistics']
+        analysis_results = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'text_length': statistics['character_count'],
+            'word_count': statistics['word_count'],
+            'character_count': statistics['character_count'],
+            'line_count': statistics['line_count'],
+            'language': stream_results['language']['detected_language']
         }
-    
-    async def _extract_named_entities(self, text: str) -> List[Dict[str, Any]]:
-        """Extract named entities from text"""
-        # Mock named entity recognition
-        entities = []
-        
-        # Simple patterns for common entities
-        person_pattern = r'\b[A-Z][a-z]+ [A-Z][a-z]+\b'
-        organization_pattern = r'\b[A-Z][a-z]+ (Inc|Corp|Ltd|University|College|School)\b'
-        location_pattern = r'\b(New York|Los Angeles|Chicago|Houston|Phoenix|Philadelphia|San Antonio|San Diego|Dallas|San Jose)\b'
-        
-        persons = re.findall(person_pattern, text)
-        organizations = re.findall(organization_pattern, text)
-        locations = re.findall(location_pattern, text)
-        
-        for person in persons[:5]:  # Limit results
-            entities.append({'text': person, 'label': 'PERSON', 'confidence': 0.8})
-        
-        for org in organizations[:3]:
-            entities.append({'text': org, 'label': 'ORG', 'confidence': 0.7})
-        
-        for loc in locations[:3]:
-            entities.append({'text': loc, 'label': 'LOCATION', 'confidence': 0.9})
-        
-        return entities
-    
-    async def _extract_keywords(self, text: str) -> List[Dict[str, Any]]:
-        """Extract keywords from text"""
-        # Simple keyword extraction
-        words = re.findall(r'\b[A-Za-z]{4,}\b', text.lower())
-        
-        # Filter common words
-        stop_words = {'this', 'that', 'with', 'from', 'they', 'have', 'been', 'were', 'said', 'each', 'which', 'their', 'time'}
-        filtered_words = [word for word in words if word not in stop_words]
-        
-        # Count frequencies
-        word_freq = {}
-        for word in filtered_words:
-            word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Get top keywords
-        keywords = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]
-        
-        return [{'keyword': word, 'frequency': freq, 'score': freq / max(1, max(word_freq.values()))} 
-                for word, freq in keywords]
-    
-    async def _detect_language(self, text: str) -> str:
-        """Detect language of text"""
-        # Mock language detection
-        english_common = ['the', 'and', 'is', 'in', 'to', 'of', 'a', 'that', 'it', 'with']
-        text_words = text.lower().split()
         
-        english_indicators = sum(1 for word in text_words if word in english_common)
-        english_ratio = english_indicators / max(1, len(text_words))
-        
-        return 'en' if english_ratio > 0.02 else 'unknown'
-    
-    async def _categorize_content(self, text: str) -> Dict[str, Any]:
-        """Categorize content type and domain"""
-        categories = {
-            'academic': 0,
-            'technical': 0,
-            'business': 0,
-            'creative': 0,
-            'news': 0
-        }
-        
-        # Simple keyword-based categorization
-        academic_keywords = ['research', 'study', 'analysis', 'hypothesis', 'methodology', 'university']
-        technical_keywords = ['algorithm', 'code', 'programming', 'software', 'system', 'database']
-        business_keywords = ['market', 'revenue', 'profit', 'strategy', 'customer', 'business']
-        creative_keywords = ['story', 'creative', 'imagination', 'art', 'design', 'artistic']
-        news_keywords = ['reported', 'breaking', 'news', 'according', 'sources', 'yesterday']
-        
-        text_lower = text.lower()
-        
-        for keyword in academic_keywords:
-            if keyword in text_lower:
-                categories['academic'] += 1
-        
-        for keyword in technical_keywords:
-            if keyword in text_lower:
-                categories['technical'] += 1
-        
-        for keyword in business_keywords:
-            if keyword in text_lower:
-                categories['business'] += 1
-        
-        for keyword in creative_keywords:
-            if keyword in text_lower:
-                categories['creative'] += 1
-        
-        for keyword in news_keywords:
-            if keyword in text_lower:
-                categories['news'] += 1
-        
-        # Determine primary category
-        primary_category = max(categories.items(), key=lambda x: x[1])
+        if 'sentiment' in stream_results:
+            analysis_results['sentiment'] = stream_results['sentiment']
+        if 'entities' in stream_results:
+            analysis_results['entities'] = stream_results['entities']
+        if 'keywords' in stream_results:
+            analysis_results['keywords'] = stream_results['keywords']['keywords']
+        if 'category' in stream_results:
+            analysis_results['content_category'] = stream_results['category']
+        
+        return analysis_results
+    
+    def _build_structure_results(self, stream_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape streaming accumulator output as document structure results"""
+        statistics = stream_results['statistics']
+        structure = stream_results['structure']
+        
+        key_topics = [
+            {
+                'topic': keyword['keyword'],
+                'frequency': keyword['frequency'],
+                'relevance_score': keyword['score']
+            }
+            for keyword in stream_results['keywords']['topics']
+        ]
         
         return {
-            'primary_category': primary_category[0] if primary_category[1] > 0 else 'general',
-            'category_scores': categories,
-            'confidence': primary_category[1] / max(1, sum(categories.values()))
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'text_length': statistics['character_count'],
+            'word_count': statistics['word_count'],
+            'sentence_count': statistics['sentence_count'],
+            'paragraph_count': statistics['paragraph_count'],
+            'structure_analysis': structure['structure_analysis'],
+            'headings_sections': structure['sections'],
+            'key_topics': key_topics,
+            'readability_scores': statistics['readability'],
+            'language_analysis': stream_results['language'],
+            'metadata_extraction': stream_results['metadata']
         }
     
     def _calculate_text_confidence_scores(self, analysis_results: Dict[str, Any]) -> Dict[str, float]:
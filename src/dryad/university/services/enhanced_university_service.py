@@ -689,6 +689,34 @@ class EnhancedUniversityService:
             "generated_at": datetime.now(timezone.utc).isoformat()
         }
     
+    @staticmethod
+    def get_agent_knowledge_neighborhood(
+        db: Session,
+        agent_id: str,
+        entity_id: str,
+        hops: int = 2,
+        direction: str = "both",
+        relationship_types: Optional[List[str]] = None,
+        max_nodes: int = 500
+    ) -> Dict[str, Any]:
+        """Get the k-hop neighborhood of a knowledge entity"""
+        memory_manager = AgentMemoryManager(db)
+        
+        neighborhood = memory_manager.get_knowledge_neighborhood(
+            agent_id,
+            entity_id,
+            hops=hops,
+            direction=direction,
+            relationship_types=relationship_types,
+            max_nodes=max_nodes
+        )
+        
+        return {
+            "agent_id": agent_id,
+            "neighborhood": neighborhood,
+            "generated_at": datetime.now(timezone.utc).isoformat()
+        }
+    
     @staticmethod
     def get_agent_relevant_context(
         db: Session,
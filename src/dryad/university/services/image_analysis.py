@@ -0,0 +1,276 @@
+"""
+Image Analysis Engine
+
+CPU-bound image analysis used by the vision processing service. Images are
+decoded straight to a bounded thumbnail, dominant colors are clustered with
+MiniBatchKMeans over a reservoir sample of pixels, and blur, noise and
+sharpness are measured with vectorized NumPy filters. All work runs in a
+process pool so requests never block the event loop, and results are cached
+by image content hash.
+"""
+
+import asyncio
+import copy
+import hashlib
+import io
+import logging
+import math
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THUMBNAIL_SIZE = 512
+DEFAULT_SAMPLE_SIZE = 4096
+DEFAULT_COLOR_COUNT = 5
+
+# Laplacian variance at which an image is considered fully sharp
+_SHARP_LAPLACIAN_VARIANCE = 500.0
+# Mean gradient magnitude at which sharpness saturates
+_SHARP_GRADIENT = 40.0
+
+
+def load_thumbnail(image_bytes: bytes, max_side: int = DEFAULT_THUMBNAIL_SIZE) -> Tuple[Image.Image, Dict[str, Any]]:
+    """Decode an image directly to a thumbnail no larger than ``max_side``.
+
+    JPEG decoding uses ``draft`` so the decoder scales by 1/2..1/8 in the
+    DCT domain instead of materializing the full-resolution bitmap.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    info = {'width': image.width, 'height': image.height, 'format': image.format or 'unknown'}
+    image.draft('RGB', (max_side, max_side))
+    image = image.convert('RGB')
+    image.thumbnail((max_side, max_side), Image.Resampling.BILINEAR)
+    return image, info
+
+
+def reservoir_sample(pixels: np.ndarray, k: int, seed: int = 42, chunk_size: int = 65536) -> np.ndarray:
+    """Uniform reservoir sample of ``k`` rows, streamed over ``pixels`` in chunks"""
+    n = len(pixels)
+    if n <= k:
+        return pixels.copy()
+
+    rng = np.random.default_rng(seed)
+    reservoir = pixels[:k].copy()
+    for start in range(k, n, chunk_size):
+        chunk = pixels[start:start + chunk_size]
+        positions = np.arange(start, start + len(chunk))
+        slots = (rng.random(len(chunk)) * (positions + 1)).astype(np.int64)
+        keep = slots < k
+        reservoir[slots[keep]] = chunk[keep]
+    return reservoir
+
+
+def dominant_colors(pixels: np.ndarray, n_colors: int = DEFAULT_COLOR_COUNT,
+                    sample_size: int = DEFAULT_SAMPLE_SIZE) -> List[Dict[str, Any]]:
+    """Cluster a pixel sample into dominant colors"""
+    sample = reservoir_sample(pixels.reshape(-1, 3), sample_size).astype(np.float32)
+    n_colors = max(1, min(n_colors, len(np.unique(sample, axis=0))))
+
+    try:
+        from sklearn.cluster import MiniBatchKMeans
+
+        kmeans = MiniBatchKMeans(
+            n_clusters=n_colors,
+            random_state=42,
+            batch_size=1024,
+            n_init=3,
+        )
+        labels = kmeans.fit_predict(sample)
+        centers = kmeans.cluster_centers_
+    except ImportError:
+        centers, labels = _lloyd_kmeans(sample, n_colors)
+
+    counts = np.bincount(labels, minlength=n_colors)
+    colors = [
+        {
+            'rgb': [int(c) for c in np.clip(np.rint(center), 0, 255)],
+            'percentage': float(count) / len(labels) * 100
+        }
+        for center, count in zip(centers, counts)
+    ]
+    return sorted(colors, key=lambda x: x['percentage'], reverse=True)
+
+
+def _lloyd_kmeans(sample: np.ndarray, k: int, iterations: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+    """Small NumPy k-means used when scikit-learn is unavailable"""
+    rng = np.random.default_rng(42)
+    centers = sample[rng.choice(len(sample), size=k, replace=False)]
+    labels = np.zeros(len(sample), dtype=np.int64)
+    for _ in range(iterations):
+        distances = ((sample[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        for i in range(k):
+            members = sample[labels == i]
+            if len(members):
+                centers[i] = members.mean(axis=0)
+    return centers, labels
+
+
+def to_grayscale(img_array: np.ndarray) -> np.ndarray:
+    """ITU-R BT.601 luma as float32"""
+    if img_array.ndim == 2:
+        return img_array.astype(np.float32)
+    rgb = img_array[..., :3].astype(np.float32)
+    return rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def laplacian_variance(gray: np.ndarray) -> float:
+    """Variance of the 4-neighbour Laplacian response"""
+    if gray.shape[0] < 3 or gray.shape[1] < 3:
+        return 0.0
+    laplacian = (
+        gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]
+        - 4.0 * gray[1:-1, 1:-1]
+    )
+    return float(laplacian.var())
+
+
+def blur_score(gray: np.ndarray) -> float:
+    """Blur in [0, 1]: 0 is sharp, 1 is completely blurred"""
+    return float(1.0 - min(1.0, laplacian_variance(gray) / _SHARP_LAPLACIAN_VARIANCE))
+
+
+def noise_level(gray: np.ndarray) -> float:
+    """Noise sigma estimate (Immerkaer, 1996) normalized to [0, 1]"""
+    h, w = gray.shape
+    if h < 3 or w < 3:
+        return 0.0
+    # Convolution with [[1,-2,1],[-2,4,-2],[1,-2,1]] cancels image structure
+    response = (
+        gray[:-2, :-2] - 2 * gray[:-2, 1:-1] + gray[:-2, 2:]
+        - 2 * gray[1:-1, :-2] + 4 * gray[1:-1, 1:-1] - 2 * gray[1:-1, 2:]
+        + gray[2:, :-2] - 2 * gray[2:, 1:-1] + gray[2:, 2:]
+    )
+    sigma = math.sqrt(math.pi / 2) * np.abs(response).sum() / (6.0 * (w - 2) * (h - 2))
+    return float(min(1.0, sigma / 255.0 * 10))
+
+
+def sharpness(gray: np.ndarray) -> float:
+    """Mean gradient magnitude (central differences) normalized to [0, 1]"""
+    if gray.shape[0] < 3 or gray.shape[1] < 3:
+        return 0.0
+    gx = gray[1:-1, 2:] - gray[1:-1, :-2]
+    gy = gray[2:, 1:-1] - gray[:-2, 1:-1]
+    magnitude = np.sqrt(gx * gx + gy * gy).mean()
+    return float(min(1.0, magnitude / _SHARP_GRADIENT))
+
+
+def analyze_pixels(img_array: np.ndarray, n_colors: int = DEFAULT_COLOR_COUNT,
+                   sample_size: int = DEFAULT_SAMPLE_SIZE) -> Dict[str, Any]:
+    """Color and quality analysis of an RGB array"""
+    pixels = img_array.reshape(-1, 3)
+    gray = to_grayscale(img_array)
+
+    channel_means = pixels.mean(axis=0)
+    exposure = float(channel_means.mean()) / 255.0
+    blur = blur_score(gray)
+    noise = noise_level(gray)
+    sharp = sharpness(gray)
+    exposure_quality = 1.0 - min(1.0, abs(exposure - 0.5) * 2)
+
+    return {
+        'color_analysis': {
+            'dominant_colors': dominant_colors(pixels, n_colors, sample_size),
+            'brightness': float(channel_means.mean()),
+            'contrast': float(gray.std()),
+            'color_temperature': 'warm' if channel_means[0] > channel_means[2] else 'cool'
+        },
+        'quality_metrics': {
+            'blur_score': blur,
+            'noise_level': noise,
+            'exposure': exposure,
+            'sharpness': sharp,
+            'overall_quality': round(0.4 * (1.0 - blur) + 0.3 * (1.0 - noise) + 0.3 * exposure_quality, 4)
+        }
+    }
+
+
+def analyze_image_bytes(image_bytes: bytes, max_side: int = DEFAULT_THUMBNAIL_SIZE,
+                        n_colors: int = DEFAULT_COLOR_COUNT,
+                        sample_size: int = DEFAULT_SAMPLE_SIZE) -> Dict[str, Any]:
+    """Full thumbnail-first analysis of an encoded image (process-pool entry point)"""
+    thumbnail, info = load_thumbnail(image_bytes, max_side)
+    results = analyze_pixels(np.asarray(thumbnail), n_colors, sample_size)
+    results['image_dimensions'] = {'width': info['width'], 'height': info['height']}
+    results['format'] = info['format']
+    results['analyzed_dimensions'] = {'width': thumbnail.width, 'height': thumbnail.height}
+    return results
+
+
+class ImageAnalysisEngine:
+    """Runs image analysis off the event loop with a content-hash result cache"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        cache_size: int = 256,
+        max_side: int = DEFAULT_THUMBNAIL_SIZE,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+    ):
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.cache_size = cache_size
+        self.max_side = max_side
+        self.sample_size = sample_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {'hits': 0, 'misses': 0}
+
+    async def analyze(self, image_bytes: bytes, n_colors: int = DEFAULT_COLOR_COUNT) -> Dict[str, Any]:
+        """Analyze encoded image bytes; identical content is analyzed once"""
+        key = f"{hashlib.sha256(image_bytes).hexdigest()}:{self.max_side}:{n_colors}:{self.sample_size}"
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.stats['hits'] += 1
+            return copy.deepcopy(cached)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats['hits'] += 1
+            return copy.deepcopy(await asyncio.shield(inflight))
+
+        self.stats['misses'] += 1
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._get_executor(), analyze_image_bytes, image_bytes, self.max_side, n_colors, self.sample_size
+        )
+        self._inflight[key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            self._inflight.pop(key, None)
+
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        # Callers get their own copy so nested lists and dicts in the cache stay intact
+        return copy.deepcopy(result)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+
+_default_engine: Optional[ImageAnalysisEngine] = None
+
+
+def get_image_analysis_engine() -> ImageAnalysisEngine:
+    """Process-wide engine so every service instance shares one pool and cache"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = ImageAnalysisEngine()
+    return _default_engine
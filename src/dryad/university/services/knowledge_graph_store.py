@@ -0,0 +1,844 @@
+"""
+Knowledge Graph Store
+=====================
+
+Incrementally materialized knowledge graphs for agent memory
+(``KnowledgeEntity``) and domain knowledge (``KnowledgeNode``). Each graph
+(``agent:<id>`` or ``domain:<name>``) is stored as node rows carrying
+in/out degree, adjacency rows in ``knowledge_graph_edges`` and a small set of
+counters (node totals and type histograms per confidence tier). All of these
+are maintained on write, so summaries and k-hop neighborhood queries never
+rebuild the graph.
+
+New domain nodes are linked through an in-memory inverted index over topic
+words and prerequisites. Topic/prerequisite Jaccard similarity is zero
+without a shared key, so only nodes sharing one are scored, and the scoring is
+exact. Above a threshold of 0.5 both sides must overlap, which lets the
+generator walk only the smaller side's postings.
+
+The process-wide index only ever holds committed nodes. Writes stage their
+index changes on the session; links made in the same transaction see them,
+and they reach the shared index when the session commits (a rollback drops
+them).
+
+Author: Dryad University System
+Date: 2025-11-01
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from collections import Counter, OrderedDict, defaultdict
+from datetime import datetime, timezone
+import threading
+
+from sqlalchemy import event, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from dryad.university.core.config import get_settings
+from dryad.university.core.logging import get_logger
+from dryad.university.database.models_university import (
+    KnowledgeGraphCounter,
+    KnowledgeGraphEdge,
+    KnowledgeGraphNode
+)
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+_IN_CHUNK = 500
+_MATERIALIZED = "materialized"
+_PENDING_KEY = "dryad_knowledge_graph_index_changes"
+
+
+def agent_graph_id(agent_id: str) -> str:
+    return f"agent:{agent_id}"
+
+
+def domain_graph_id(domain: str) -> str:
+    return f"domain:{domain}"
+
+
+def topic_words(topic: Optional[str]) -> List[str]:
+    """Topic words as compared by knowledge similarity"""
+    return sorted(set(topic.lower().split())) if topic else []
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    overlap = len(a & b)
+    return overlap / (len(a) + len(b) - overlap) if overlap else 0.0
+
+
+def _chunks(items: Sequence[Any], size: int = _IN_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class TopicCandidateIndex:
+    """Inverted index from topic words and prerequisites to node ids"""
+
+    def __init__(self):
+        self._topics: Dict[str, Set[str]] = defaultdict(set)
+        self._prereqs: Dict[str, Set[str]] = defaultdict(set)
+        self._features: Dict[str, Tuple[frozenset, frozenset]] = {}
+        self.watermark: Optional[datetime] = None
+        # Nodes already loaded at exactly the watermark, skipped by the next >= sync
+        self.at_watermark: Set[str] = set()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def add(self, node_id: str, topics: Iterable[str], prerequisites: Iterable[str]):
+        self.remove(node_id)
+        features = (frozenset(topics), frozenset(str(p) for p in prerequisites))
+        if not features[0] and not features[1]:
+            return
+        self._features[node_id] = features
+        for word in features[0]:
+            self._topics[word].add(node_id)
+        for prereq in features[1]:
+            self._prereqs[prereq].add(node_id)
+
+    def remove(self, node_id: str):
+        features = self._features.pop(node_id, None)
+        if features is None:
+            return
+        for word in features[0]:
+            self._topics[word].discard(node_id)
+        for prereq in features[1]:
+            self._prereqs[prereq].discard(node_id)
+
+    def features(self, node_id: str) -> Optional[Tuple[frozenset, frozenset]]:
+        return self._features.get(node_id)
+
+    def items(self) -> Iterable[Tuple[str, Tuple[frozenset, frozenset]]]:
+        return self._features.items()
+
+    def similar(
+        self,
+        topics: frozenset,
+        prerequisites: frozenset,
+        threshold: float,
+        exclude: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Nodes whose mean topic/prerequisite Jaccard similarity exceeds ``threshold``.
+
+        Returns:
+            (node_id, similarity) pairs, most similar first
+        """
+        topic_postings = [self._topics[w] for w in topics if w in self._topics]
+        prereq_postings = [self._prereqs[p] for p in prerequisites if p in self._prereqs]
+        if threshold >= 0.5:
+            # Each Jaccard is at most 1, so a mean above 0.5 needs both to be non-zero
+            if not topic_postings or not prereq_postings:
+                return []
+            sides = [topic_postings, prereq_postings]
+            postings = min(sides, key=lambda side: sum(len(p) for p in side))
+        else:
+            postings = topic_postings + prereq_postings
+
+        candidates = set().union(*postings) if postings else set()
+        candidates.discard(exclude)
+        scored = []
+        for node_id in candidates:
+            other_topics, other_prereqs = self._features[node_id]
+            similarity = (_jaccard(topics, other_topics) + _jaccard(prerequisites, other_prereqs)) / 2
+            if similarity > threshold:
+                scored.append((node_id, similarity))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored
+
+
+class _PendingIndexChanges:
+    """Candidate index changes of one uncommitted transaction for one graph"""
+
+    def __init__(self):
+        self.added = TopicCandidateIndex()
+        # Nodes that will not be in the index once the transaction commits
+        self.removed: Set[str] = set()
+
+    def add(self, node_id: str, topics: Iterable[str], prerequisites: Iterable[str]):
+        self.added.add(node_id, topics, prerequisites)
+        if self.added.features(node_id) is None:
+            self.removed.add(node_id)
+        else:
+            self.removed.discard(node_id)
+
+    def remove(self, node_id: str):
+        self.added.remove(node_id)
+        self.removed.add(node_id)
+
+    def touches(self, node_id: str) -> bool:
+        return node_id in self.removed or self.added.features(node_id) is not None
+
+    def apply(self, index: TopicCandidateIndex):
+        for node_id in self.removed:
+            index.remove(node_id)
+        for node_id, (topics, prerequisites) in self.added.items():
+            index.add(node_id, topics, prerequisites)
+
+
+class KnowledgeGraphStore:
+    """Reads and incremental writes for materialized knowledge graphs"""
+
+    # Confidence tiers with their own node and type counters
+    CONFIDENCE_TIERS = (0.5, 0.8)
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ==================== Counters ====================
+
+    def counters(self, graph_id: str) -> Dict[str, int]:
+        rows = self.db.query(KnowledgeGraphCounter.name, KnowledgeGraphCounter.value).filter(
+            KnowledgeGraphCounter.graph_id == graph_id
+        ).all()
+        return {name: value for name, value in rows}
+
+    def type_histogram(self, graph_id: str, min_confidence: Optional[float] = None) -> Dict[str, int]:
+        """Node counts per type, overall or for one of CONFIDENCE_TIERS"""
+        prefix = "type:" if min_confidence is None else f"type@{min_confidence:g}:"
+        return {
+            name[len(prefix):]: value
+            for name, value in self.counters(graph_id).items()
+            if name.startswith(prefix) and value > 0
+        }
+
+    def node_count(self, graph_id: str, min_confidence: Optional[float] = None) -> int:
+        name = "nodes" if min_confidence is None else f"nodes@{min_confidence:g}"
+        # Counters are bumped with SQL updates, so read the column rather than an identity-mapped row
+        value = self.db.query(KnowledgeGraphCounter.value).filter(
+            KnowledgeGraphCounter.graph_id == graph_id,
+            KnowledgeGraphCounter.name == name
+        ).scalar()
+        return value or 0
+
+    def is_materialized(self, graph_id: str) -> bool:
+        return self.db.get(KnowledgeGraphCounter, (graph_id, _MATERIALIZED)) is not None
+
+    def _pending_index(self, graph_id: str, create: bool = False) -> Optional[_PendingIndexChanges]:
+        """This session's uncommitted candidate index changes for a graph"""
+        if not create:
+            return self.db.info.get(_PENDING_KEY, {}).get(graph_id)
+        return self.db.info.setdefault(_PENDING_KEY, {}).setdefault(graph_id, _PendingIndexChanges())
+
+    def _tier_deltas(self, node_type: Optional[str], confidence: Optional[float], sign: int) -> Counter:
+        node_type = node_type or "unknown"
+        confidence = confidence or 0.0
+        deltas = Counter({"nodes": sign, f"type:{node_type}": sign})
+        for tier in self.CONFIDENCE_TIERS:
+            if confidence >= tier:
+                deltas[f"nodes@{tier:g}"] += sign
+                deltas[f"type@{tier:g}:{node_type}"] += sign
+        return deltas
+
+    def _bump(self, graph_id: str, deltas: Dict[str, int]):
+        for name, delta in deltas.items():
+            if delta == 0:
+                continue
+            updated = self.db.query(KnowledgeGraphCounter).filter(
+                KnowledgeGraphCounter.graph_id == graph_id,
+                KnowledgeGraphCounter.name == name
+            ).update({KnowledgeGraphCounter.value: KnowledgeGraphCounter.value + delta}, synchronize_session=False)
+            if updated:
+                continue
+            try:
+                with self.db.begin_nested():
+                    self.db.add(KnowledgeGraphCounter(graph_id=graph_id, name=name, value=delta))
+            except IntegrityError:
+                # Another writer created the row first
+                self.db.query(KnowledgeGraphCounter).filter(
+                    KnowledgeGraphCounter.graph_id == graph_id,
+                    KnowledgeGraphCounter.name == name
+                ).update({KnowledgeGraphCounter.value: KnowledgeGraphCounter.value + delta}, synchronize_session=False)
+
+    # ==================== Writes ====================
+
+    def upsert_node(
+        self,
+        graph_id: str,
+        node_id: str,
+        node_type: Optional[str] = None,
+        name: Optional[str] = None,
+        confidence: float = 0.0,
+        topics: Optional[Iterable[str]] = None,
+        prerequisites: Optional[Iterable[str]] = None,
+        commit: bool = True
+    ) -> KnowledgeGraphNode:
+        """Insert or update a node, keeping type counters and the candidate index current"""
+        features = {
+            "topics": sorted(set(topics or [])),
+            "prerequisites": sorted({str(p) for p in prerequisites or []})
+        }
+        now = datetime.now(timezone.utc)
+        node = self.db.get(KnowledgeGraphNode, (graph_id, node_id))
+        if node is None:
+            # Edges may already reference this node
+            out_degree = self.db.query(func.count(KnowledgeGraphEdge.id)).filter(
+                KnowledgeGraphEdge.graph_id == graph_id, KnowledgeGraphEdge.source_id == node_id
+            ).scalar()
+            in_degree = self.db.query(func.count(KnowledgeGraphEdge.id)).filter(
+                KnowledgeGraphEdge.graph_id == graph_id, KnowledgeGraphEdge.target_id == node_id
+            ).scalar()
+            node = KnowledgeGraphNode(
+                graph_id=graph_id, node_id=node_id, node_type=node_type, name=name,
+                confidence=confidence, features=features, out_degree=out_degree,
+                in_degree=in_degree, updated_at=now
+            )
+            self.db.add(node)
+            deltas = self._tier_deltas(node_type, confidence, 1)
+        else:
+            deltas = self._tier_deltas(node_type, confidence, 1)
+            deltas.subtract(self._tier_deltas(node.node_type, node.confidence, 1))
+            node.node_type = node_type
+            node.name = name
+            node.confidence = confidence
+            node.features = features
+            node.updated_at = now
+        self._bump(graph_id, deltas)
+
+        self._pending_index(graph_id, create=True).add(node_id, features["topics"], features["prerequisites"])
+        if commit:
+            self.db.commit()
+        return node
+
+    def remove_node(self, graph_id: str, node_id: str, commit: bool = True) -> bool:
+        node = self.db.get(KnowledgeGraphNode, (graph_id, node_id))
+        if node is None:
+            return False
+        edges = self.db.query(
+            KnowledgeGraphEdge.source_id, KnowledgeGraphEdge.target_id
+        ).filter(
+            KnowledgeGraphEdge.graph_id == graph_id,
+            or_(KnowledgeGraphEdge.source_id == node_id, KnowledgeGraphEdge.target_id == node_id)
+        ).all()
+        for source_id, target_id in edges:
+            if source_id == node_id and target_id != node_id:
+                self._adjust_degree(graph_id, target_id, "in_degree", -1)
+            elif target_id == node_id and source_id != node_id:
+                self._adjust_degree(graph_id, source_id, "out_degree", -1)
+        self.db.query(KnowledgeGraphEdge).filter(
+            KnowledgeGraphEdge.graph_id == graph_id,
+            or_(KnowledgeGraphEdge.source_id == node_id, KnowledgeGraphEdge.target_id == node_id)
+        ).delete(synchronize_session=False)
+
+        deltas = self._tier_deltas(node.node_type, node.confidence, -1)
+        deltas["edges"] -= len(edges)
+        self._bump(graph_id, deltas)
+        self.db.delete(node)
+
+        self._pending_index(graph_id, create=True).remove(node_id)
+        if commit:
+            self.db.commit()
+        return True
+
+    def add_edge(
+        self,
+        graph_id: str,
+        source_id: str,
+        target_id: str,
+        relationship_type: str = "related_to",
+        strength: float = 0.5,
+        commit: bool = True
+    ) -> bool:
+        """
+        Add an edge (or update its strength if it exists).
+
+        Returns:
+            True if a new edge was created
+        """
+        edge = self.db.query(KnowledgeGraphEdge).filter(
+            KnowledgeGraphEdge.graph_id == graph_id,
+            KnowledgeGraphEdge.source_id == source_id,
+            KnowledgeGraphEdge.target_id == target_id,
+            KnowledgeGraphEdge.relationship_type == relationship_type
+        ).first()
+        if edge is not None:
+            edge.strength = strength
+            if commit:
+                self.db.commit()
+            return False
+
+        self.db.add(KnowledgeGraphEdge(
+            graph_id=graph_id,
+            source_id=source_id,
+            target_id=target_id,
+            relationship_type=relationship_type,
+            strength=strength
+        ))
+        self._adjust_degree(graph_id, source_id, "out_degree", 1)
+        self._adjust_degree(graph_id, target_id, "in_degree", 1)
+        self._bump(graph_id, {"edges": 1})
+        if commit:
+            self.db.commit()
+        return True
+
+    def add_edges(
+        self,
+        graph_id: str,
+        source_id: str,
+        targets: Sequence[Tuple[str, str, float]],
+        commit: bool = True
+    ) -> int:
+        """
+        Add edges from one source in bulk, with one degree and counter update per batch.
+
+        Args:
+            graph_id: Graph identifier
+            source_id: Source node
+            targets: (target_id, relationship_type, strength) triples
+
+        Returns:
+            Number of new edges created
+        """
+        existing = {}
+        for chunk in _chunks(list({target_id for target_id, _, _ in targets})):
+            for edge in self.db.query(KnowledgeGraphEdge).filter(
+                KnowledgeGraphEdge.graph_id == graph_id,
+                KnowledgeGraphEdge.source_id == source_id,
+                KnowledgeGraphEdge.target_id.in_(chunk)
+            ):
+                existing[(edge.target_id, edge.relationship_type)] = edge
+
+        created = Counter()
+        for target_id, relationship_type, strength in targets:
+            edge = existing.get((target_id, relationship_type))
+            if edge is not None:
+                edge.strength = strength
+                continue
+            edge = existing[(target_id, relationship_type)] = KnowledgeGraphEdge(
+                graph_id=graph_id,
+                source_id=source_id,
+                target_id=target_id,
+                relationship_type=relationship_type,
+                strength=strength
+            )
+            self.db.add(edge)
+            created[target_id] += 1
+
+        total = sum(created.values())
+        if total:
+            self._adjust_degree(graph_id, source_id, "out_degree", total)
+            by_count = defaultdict(list)
+            for target_id, count in created.items():
+                by_count[count].append(target_id)
+            for count, target_ids in by_count.items():
+                for chunk in _chunks(target_ids):
+                    self.db.query(KnowledgeGraphNode).filter(
+                        KnowledgeGraphNode.graph_id == graph_id,
+                        KnowledgeGraphNode.node_id.in_(chunk)
+                    ).update({KnowledgeGraphNode.in_degree: KnowledgeGraphNode.in_degree + count},
+                             synchronize_session=False)
+            self._bump(graph_id, {"edges": total})
+        if commit:
+            self.db.commit()
+        return total
+
+    def remove_edge(
+        self,
+        graph_id: str,
+        source_id: str,
+        target_id: str,
+        relationship_type: str = "related_to",
+        commit: bool = True
+    ) -> bool:
+        removed = self.db.query(KnowledgeGraphEdge).filter(
+            KnowledgeGraphEdge.graph_id == graph_id,
+            KnowledgeGraphEdge.source_id == source_id,
+            KnowledgeGraphEdge.target_id == target_id,
+            KnowledgeGraphEdge.relationship_type == relationship_type
+        ).delete(synchronize_session=False)
+        if removed:
+            self._adjust_degree(graph_id, source_id, "out_degree", -1)
+            self._adjust_degree(graph_id, target_id, "in_degree", -1)
+            self._bump(graph_id, {"edges": -1})
+        if commit:
+            self.db.commit()
+        return bool(removed)
+
+    def _adjust_degree(self, graph_id: str, node_id: str, column: str, delta: int):
+        attribute = getattr(KnowledgeGraphNode, column)
+        self.db.query(KnowledgeGraphNode).filter(
+            KnowledgeGraphNode.graph_id == graph_id,
+            KnowledgeGraphNode.node_id == node_id
+        ).update({attribute: attribute + delta}, synchronize_session=False)
+
+    def materialize(
+        self,
+        graph_id: str,
+        nodes: Iterable[Dict[str, Any]],
+        edges: Iterable[Dict[str, Any]],
+        commit: bool = True
+    ) -> Dict[str, int]:
+        """
+        Bulk-load a graph that has not been materialized yet.
+
+        The graph is claimed by inserting its ``materialized`` counter first, so
+        when two sessions race to materialize one graph the second finds the
+        claim taken and writes nothing.
+
+        Args:
+            graph_id: Graph identifier
+            nodes: Dicts with node_id, node_type, name, confidence and optional
+                topics/prerequisites
+            edges: Dicts with source_id, target_id, relationship_type, strength
+
+        Returns:
+            Node and edge counts written
+        """
+        if self.is_materialized(graph_id):
+            return {"nodes": 0, "edges": 0}
+        try:
+            with self.db.begin_nested():
+                self.db.add(KnowledgeGraphCounter(graph_id=graph_id, name=_MATERIALIZED, value=1))
+        except IntegrityError:
+            logger.info(f"Knowledge graph {graph_id} was materialized by another writer")
+            return {"nodes": 0, "edges": 0}
+
+        edge_rows: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        for edge in edges:
+            key = (edge["source_id"], edge["target_id"], edge.get("relationship_type") or "related_to")
+            edge_rows[key] = {
+                "graph_id": graph_id, "source_id": key[0], "target_id": key[1],
+                "relationship_type": key[2], "strength": edge.get("strength", 0.5)
+            }
+        out_degree = Counter(key[0] for key in edge_rows)
+        in_degree = Counter(key[1] for key in edge_rows)
+
+        now = datetime.now(timezone.utc)
+        deltas = Counter({"edges": len(edge_rows)})
+        node_rows = {}
+        for node in nodes:
+            node_id = node["node_id"]
+            node_rows[node_id] = {
+                "graph_id": graph_id,
+                "node_id": node_id,
+                "node_type": node.get("node_type"),
+                "name": node.get("name"),
+                "confidence": node.get("confidence") or 0.0,
+                "features": {
+                    "topics": sorted(set(node.get("topics") or [])),
+                    "prerequisites": sorted({str(p) for p in node.get("prerequisites") or []})
+                },
+                "out_degree": out_degree[node_id],
+                "in_degree": in_degree[node_id],
+                "updated_at": now
+            }
+        pending = self._pending_index(graph_id, create=True)
+        for row in node_rows.values():
+            deltas.update(self._tier_deltas(row["node_type"], row["confidence"], 1))
+            if row["features"]["topics"] or row["features"]["prerequisites"]:
+                pending.add(row["node_id"], row["features"]["topics"], row["features"]["prerequisites"])
+
+        node_list = list(node_rows.values())
+        edge_list = list(edge_rows.values())
+        for chunk in _chunks(node_list, 2000):
+            self.db.bulk_insert_mappings(KnowledgeGraphNode, chunk)
+        for chunk in _chunks(edge_list, 2000):
+            self.db.bulk_insert_mappings(KnowledgeGraphEdge, chunk)
+        self._bump(graph_id, deltas)
+        if commit:
+            self.db.commit()
+        logger.info(f"Materialized knowledge graph {graph_id}: {len(node_list)} nodes, {len(edge_list)} edges")
+        return {"nodes": len(node_list), "edges": len(edge_list)}
+
+    # ==================== Linking ====================
+
+    def candidate_index(self, graph_id: str) -> TopicCandidateIndex:
+        """
+        The graph's topic/prerequisite index, loading nodes changed since its last use.
+
+        Nodes this session has written but not committed are left to the
+        session's pending changes.
+        """
+        index = _candidate_indexes.get(graph_id)
+        pending = self._pending_index(graph_id)
+        with index.lock:
+            query = self.db.query(
+                KnowledgeGraphNode.node_id, KnowledgeGraphNode.features, KnowledgeGraphNode.updated_at
+            ).filter(KnowledgeGraphNode.graph_id == graph_id)
+            if index.watermark is not None:
+                query = query.filter(KnowledgeGraphNode.updated_at >= index.watermark)
+            for node_id, features, updated_at in query.yield_per(2000):
+                if updated_at is not None and updated_at == index.watermark and node_id in index.at_watermark:
+                    continue
+                if pending is not None and pending.touches(node_id):
+                    continue
+                features = features or {}
+                index.add(node_id, features.get("topics", []), features.get("prerequisites", []))
+                if updated_at is None:
+                    continue
+                if index.watermark is None or updated_at > index.watermark:
+                    index.watermark = updated_at
+                    index.at_watermark = {node_id}
+                elif updated_at == index.watermark:
+                    index.at_watermark.add(node_id)
+        return index
+
+    def link_similar(
+        self,
+        graph_id: str,
+        node_id: str,
+        threshold: float = 0.6,
+        strong_threshold: float = 0.8,
+        eligible: Optional[Callable[[List[str]], Iterable[str]]] = None,
+        max_links: Optional[int] = None,
+        commit: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Link a node to every similar node in its graph.
+
+        Args:
+            graph_id: Graph identifier
+            node_id: Node to link (must have been upserted with topics/prerequisites)
+            threshold: Minimum similarity for a link
+            strong_threshold: Similarity above which the link is a "prerequisite"
+            eligible: Optional filter returning the candidate ids allowed as targets
+            max_links: Keep only the most similar links
+
+        Returns:
+            Connections as {"related_knowledge_id", "relationship_type", "similarity_score"}
+        """
+        index = self.candidate_index(graph_id)
+        pending = self._pending_index(graph_id)
+        with index.lock:
+            if pending is not None and pending.touches(node_id):
+                features = pending.added.features(node_id)
+            else:
+                features = index.features(node_id)
+            scored = index.similar(features[0], features[1], threshold, exclude=node_id) if features else []
+        if pending is not None and features:
+            # Uncommitted writes of this session replace what the shared index has for those nodes
+            scored = [item for item in scored if not pending.touches(item[0])]
+            scored.extend(pending.added.similar(features[0], features[1], threshold, exclude=node_id))
+            scored.sort(key=lambda item: (-item[1], item[0]))
+        if eligible is not None and scored:
+            allowed = set(eligible([candidate for candidate, _ in scored]))
+            scored = [item for item in scored if item[0] in allowed]
+        if max_links is not None:
+            scored = scored[:max_links]
+
+        connections = [
+            {
+                "related_knowledge_id": target_id,
+                "relationship_type": "prerequisite" if similarity > strong_threshold else "related",
+                "similarity_score": similarity
+            }
+            for target_id, similarity in scored
+        ]
+        self.add_edges(
+            graph_id,
+            node_id,
+            [(c["related_knowledge_id"], c["relationship_type"], c["similarity_score"]) for c in connections],
+            commit=commit
+        )
+        return connections
+
+    # ==================== Reads ====================
+
+    def nodes(
+        self,
+        graph_id: str,
+        min_confidence: float = 0.0,
+        limit: Optional[int] = None
+    ) -> List[KnowledgeGraphNode]:
+        query = self.db.query(KnowledgeGraphNode).filter(
+            KnowledgeGraphNode.graph_id == graph_id,
+            KnowledgeGraphNode.confidence >= min_confidence
+        ).order_by(KnowledgeGraphNode.confidence.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def edges(
+        self,
+        graph_id: str,
+        min_source_confidence: float = 0.0,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Edges with their source node's name, optionally only from confident sources"""
+        query = self.db.query(
+            KnowledgeGraphEdge.source_id,
+            KnowledgeGraphNode.name,
+            KnowledgeGraphEdge.target_id,
+            KnowledgeGraphEdge.relationship_type,
+            KnowledgeGraphEdge.strength
+        ).join(
+            KnowledgeGraphNode,
+            (KnowledgeGraphNode.graph_id == KnowledgeGraphEdge.graph_id)
+            & (KnowledgeGraphNode.node_id == KnowledgeGraphEdge.source_id)
+        ).filter(
+            KnowledgeGraphEdge.graph_id == graph_id,
+            KnowledgeGraphNode.confidence >= min_source_confidence
+        ).order_by(KnowledgeGraphEdge.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return [
+            {
+                "source": source_id,
+                "source_name": source_name,
+                "target": target_id,
+                "relationship": relationship_type,
+                "strength": strength
+            }
+            for source_id, source_name, target_id, relationship_type, strength in query.all()
+        ]
+
+    def neighborhood(
+        self,
+        graph_id: str,
+        node_id: str,
+        hops: int = 2,
+        direction: str = "both",
+        relationship_types: Optional[Sequence[str]] = None,
+        max_nodes: int = 500
+    ) -> Dict[str, Any]:
+        """
+        k-hop neighborhood of a node, walked breadth-first over edge rows.
+
+        Args:
+            graph_id: Graph identifier
+            node_id: Center node
+            hops: Maximum path length
+            direction: "out", "in" or "both"
+            relationship_types: Only follow these relationship types
+            max_nodes: Stop adding nodes beyond this many (result is marked truncated)
+
+        Returns:
+            Center, nodes with hop distance and metadata, and edges among them
+        """
+        if direction not in ("out", "in", "both"):
+            raise ValueError(f"Invalid direction: {direction}")
+
+        distance = {node_id: 0}
+        frontier = [node_id]
+        edges: Dict[int, Tuple[str, str, str, float]] = {}
+        truncated = False
+        columns = (
+            KnowledgeGraphEdge.id,
+            KnowledgeGraphEdge.source_id,
+            KnowledgeGraphEdge.target_id,
+            KnowledgeGraphEdge.relationship_type,
+            KnowledgeGraphEdge.strength
+        )
+
+        for hop in range(1, hops + 1):
+            if not frontier:
+                break
+            rows = []
+            for chunk in _chunks(frontier):
+                sides = []
+                if direction in ("out", "both"):
+                    sides.append(KnowledgeGraphEdge.source_id.in_(chunk))
+                if direction in ("in", "both"):
+                    sides.append(KnowledgeGraphEdge.target_id.in_(chunk))
+                for side in sides:
+                    query = self.db.query(*columns).filter(KnowledgeGraphEdge.graph_id == graph_id, side)
+                    if relationship_types:
+                        query = query.filter(KnowledgeGraphEdge.relationship_type.in_(relationship_types))
+                    rows.extend(query.all())
+
+            next_frontier = []
+            for edge_id, source_id, target_id, relationship_type, strength in rows:
+                for other in (source_id, target_id):
+                    if other in distance:
+                        continue
+                    if len(distance) >= max_nodes:
+                        truncated = True
+                        continue
+                    distance[other] = hop
+                    next_frontier.append(other)
+                if source_id in distance and target_id in distance:
+                    edges[edge_id] = (source_id, target_id, relationship_type, strength)
+            frontier = next_frontier
+
+        metadata = {}
+        ids = list(distance)
+        for chunk in _chunks(ids):
+            for node in self.db.query(
+                KnowledgeGraphNode.node_id,
+                KnowledgeGraphNode.name,
+                KnowledgeGraphNode.node_type,
+                KnowledgeGraphNode.confidence,
+                KnowledgeGraphNode.out_degree,
+                KnowledgeGraphNode.in_degree
+            ).filter(KnowledgeGraphNode.graph_id == graph_id, KnowledgeGraphNode.node_id.in_(chunk)):
+                metadata[node.node_id] = node
+
+        nodes = []
+        for other, hop in sorted(distance.items(), key=lambda item: (item[1], item[0])):
+            node = metadata.get(other)
+            nodes.append({
+                "id": other,
+                "hop": hop,
+                "name": node.name if node else None,
+                "type": node.node_type if node else None,
+                "confidence": node.confidence if node else None,
+                "out_degree": node.out_degree if node else None,
+                "in_degree": node.in_degree if node else None
+            })
+
+        return {
+            "graph_id": graph_id,
+            "center": node_id,
+            "hops": hops,
+            "direction": direction,
+            "nodes": nodes,
+            "edges": [
+                {"source": s, "target": t, "relationship": r, "strength": w}
+                for s, t, r, w in edges.values()
+            ],
+            "truncated": truncated
+        }
+
+
+class _CandidateIndexCache:
+    """Process-wide LRU of per-graph candidate indexes"""
+
+    def __init__(self, max_graphs: int = 64):
+        self.max_graphs = max_graphs
+        self._indexes: "OrderedDict[str, TopicCandidateIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, graph_id: str) -> TopicCandidateIndex:
+        with self._lock:
+            index = self._indexes.get(graph_id)
+            if index is None:
+                index = self._indexes[graph_id] = TopicCandidateIndex()
+                while len(self._indexes) > self.max_graphs:
+                    self._indexes.popitem(last=False)
+            else:
+                self._indexes.move_to_end(graph_id)
+            return index
+
+    def peek(self, graph_id: str) -> Optional[TopicCandidateIndex]:
+        return self._indexes.get(graph_id)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+_candidate_indexes = _CandidateIndexCache(getattr(settings, "KNOWLEDGE_GRAPH_INDEX_MAX_GRAPHS", 64))
+
+
+@event.listens_for(Session, "after_commit")
+def _index_changes_committed(session: Session):
+    # Also fired when a savepoint is released; only the outer commit publishes
+    if session.in_nested_transaction():
+        return
+    for graph_id, changes in session.info.pop(_PENDING_KEY, {}).items():
+        index = _candidate_indexes.peek(graph_id)
+        if index is not None:
+            with index.lock:
+                changes.apply(index)
+
+
+@event.listens_for(Session, "after_rollback")
+def _index_changes_rolled_back(session: Session):
+    if session.in_nested_transaction():
+        return
+    session.info.pop(_PENDING_KEY, None)
@@ -24,6 +24,9 @@ from dryad.university.database.models_university import (
     UniversityAgent, DomainExpertProfile, ExpertSession, KnowledgeNode,
     TeachingMethod, StudentLearningProfile
 )
+from dryad.university.services.knowledge_graph_store import (
+    KnowledgeGraphStore, domain_graph_id, topic_words
+)
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +68,7 @@ class KnowledgeManagementSystem:
     
     def __init__(self, db: Session):
         self.db = db
+        self.knowledge_graph = KnowledgeGraphStore(db)
         
         # Knowledge domains and their characteristics
         self.knowledge_domains = {
@@ -591,58 +595,125 @@ class KnowledgeManagementSystem:
         # Check for clear language and structure
         return 0.8  # Placeholder
     
+    async def get_knowledge_neighborhood(
+        self,
+        knowledge_id: str,
+        hops: int = 2,
+        direction: str = "both",
+        relationship_types: Optional[List[str]] = None,
+        max_nodes: int = 500
+    ) -> Dict[str, Any]:
+        """
+        Get the k-hop neighborhood of a knowledge entry in its domain graph.
+        
+        Args:
+            knowledge_id: Center knowledge entry
+            hops: Maximum number of relationship hops
+            direction: "out" (what it links to), "in" (what links to it) or "both"
+            relationship_types: Only follow these relationship types
+            max_nodes: Maximum entries returned
+        
+        Returns:
+            Neighborhood nodes with hop distance and the relationships among them
+        """
+        try:
+            domain = self.db.query(KnowledgeNode.domain).filter(
+                KnowledgeNode.id == knowledge_id
+            ).scalar()
+            if domain is None:
+                return {"error": f"Knowledge entry {knowledge_id} not found"}
+            
+            self._ensure_domain_graph(domain)
+            return self.knowledge_graph.neighborhood(
+                domain_graph_id(domain),
+                knowledge_id,
+                hops=hops,
+                direction=direction,
+                relationship_types=relationship_types,
+                max_nodes=max_nodes
+            )
+            
+        except Exception as e:
+            logger.error(f"Error retrieving knowledge neighborhood: {str(e)}")
+            return {"error": str(e)}
+    
     async def _create_knowledge_relationships(
         self, 
         knowledge_node: KnowledgeNode, 
         domain: str
     ) -> None:
-        """Create relationships between knowledge nodes"""
-        # Find related nodes in the same domain
-        related_nodes = self.db.query(KnowledgeNode).filter(
-            KnowledgeNode.domain == domain,
-            KnowledgeNode.id != knowledge_node.id,
-            KnowledgeNode.status == "active"
-        ).limit(10).all()
-        
-        # Create relationship connections
-        connections = []
-        for related_node in related_nodes:
-            similarity_score = await self._calculate_knowledge_similarity(
-                knowledge_node, related_node
-            )
-            
-            if similarity_score > 0.6:
-                connections.append({
-                    "related_knowledge_id": related_node.id,
-                    "relationship_type": "prerequisite" if similarity_score > 0.8 else "related",
-                    "similarity_score": similarity_score
-                })
+        """Create relationships between a new node and similar active nodes across the domain"""
+        graph_id = domain_graph_id(domain)
+        self._ensure_domain_graph(domain)
+        
+        self.knowledge_graph.upsert_node(
+            graph_id,
+            knowledge_node.id,
+            node_type=knowledge_node.difficulty_level,
+            name=knowledge_node.concept_name,
+            confidence=knowledge_node.confidence_level,
+            topics=topic_words(knowledge_node.topic),
+            prerequisites=knowledge_node.prerequisites,
+            commit=False
+        )
         
-        knowledge_node.connections = connections
+        # Candidates share a topic word and a prerequisite; only active nodes are linked
+        knowledge_node.connections = self.knowledge_graph.link_similar(
+            graph_id,
+            knowledge_node.id,
+            threshold=0.6,
+            strong_threshold=0.8,
+            eligible=self._active_knowledge_ids,
+            commit=False
+        )
         self.db.commit()
     
-    async def _calculate_knowledge_similarity(
-        self, 
-        node1: KnowledgeNode, 
-        node2: KnowledgeNode
-    ) -> float:
-        """Calculate similarity between two knowledge nodes"""
-        # Simple similarity calculation based on topic overlap and prerequisite matches
-        topic_similarity = 0.0
-        if node1.topic and node2.topic:
-            topic_words1 = set(node1.topic.lower().split())
-            topic_words2 = set(node2.topic.lower().split())
-            if topic_words1 and topic_words2:
-                topic_similarity = len(topic_words1 & topic_words2) / len(topic_words1 | topic_words2)
-        
-        prerequisite_similarity = 0.0
-        if node1.prerequisites and node2.prerequisites:
-            prereq_overlap = len(set(node1.prerequisites) & set(node2.prerequisites))
-            prereq_union = len(set(node1.prerequisites) | set(node2.prerequisites))
-            if prereq_union > 0:
-                prerequisite_similarity = prereq_overlap / prereq_union
-        
-        return (topic_similarity + prerequisite_similarity) / 2
+    def _active_knowledge_ids(self, knowledge_ids: List[str]) -> List[str]:
+        """Filter knowledge ids down to active entries"""
+        active = []
+        for start in range(0, len(knowledge_ids), 500):
+            active.extend(
+                row.id for row in self.db.query(KnowledgeNode.id).filter(
+                    KnowledgeNode.id.in_(knowledge_ids[start:start + 500]),
+                    KnowledgeNode.status == "active"
+                )
+            )
+        return active
+    
+    def _ensure_domain_graph(self, domain: str) -> None:
+        """Materialize a domain's knowledge graph from its knowledge nodes once"""
+        graph_id = domain_graph_id(domain)
+        if self.knowledge_graph.is_materialized(graph_id):
+            return
+        
+        nodes, edges = [], []
+        rows = self.db.query(
+            KnowledgeNode.id,
+            KnowledgeNode.topic,
+            KnowledgeNode.concept_name,
+            KnowledgeNode.difficulty_level,
+            KnowledgeNode.confidence_level,
+            KnowledgeNode.prerequisites,
+            KnowledgeNode.connections
+        ).filter(KnowledgeNode.domain == domain).yield_per(2000)
+        for node_id, topic, concept_name, difficulty_level, confidence, prerequisites, connections in rows:
+            nodes.append({
+                "node_id": node_id,
+                "node_type": difficulty_level,
+                "name": concept_name,
+                "confidence": confidence,
+                "topics": topic_words(topic),
+                "prerequisites": prerequisites or []
+            })
+            for connection in connections or []:
+                if isinstance(connection, dict) and connection.get("related_knowledge_id"):
+                    edges.append({
+                        "source_id": node_id,
+                        "target_id": connection["related_knowledge_id"],
+                        "relationship_type": connection.get("relationship_type", "related"),
+                        "strength": connection.get("similarity_score", 0.5)
+                    })
+        self.knowledge_graph.materialize(graph_id, nodes, edges, commit=False)
     
     async def _perform_quality_validation(
         self, 
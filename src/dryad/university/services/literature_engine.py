@@ -0,0 +1,337 @@
+"""
+Literature Review Engine
+
+Concurrent search and deduplication pipeline behind the literature review
+services. Every registered source is queried at the same time, each behind
+its own token-bucket rate limit and concurrency cap, and result pages are
+folded into a ``PaperIndex`` as they arrive. The index deduplicates papers
+by a hash of their normalized DOI or title, tokenizes each paper exactly
+once, and keeps an inverted term -> paper postings list that inclusion
+scoring and theme extraction read instead of rescanning the text.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+STOP_WORDS = frozenset([
+    'the', 'and', 'for', 'are', 'with', 'this', 'that', 'from', 'they', 'have', 'been', 'were', 'will',
+    'a', 'an', 'as', 'at', 'be', 'by', 'in', 'is', 'it', 'of', 'on', 'or', 'to', 'we', 'its', 'our', 'not',
+])
+# Themes and term frequencies only count longer words; matching also indexes short
+# terms so queries such as "AI in law" still find papers
+MIN_TERM_LENGTH = 4
+MIN_MATCH_TERM_LENGTH = 2
+
+_TOKEN_RE = re.compile(r'\w+')
+_DOI_PREFIX_RE = re.compile(r'^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)', re.IGNORECASE)
+_NON_ALNUM_RE = re.compile(r'[\W_]+')
+
+# fetch(query, cursor) -> {"papers": [...], "next_cursor": Optional[Any]}
+SourceFetch = Callable[[Any, Optional[Any]], Awaitable[Dict[str, Any]]]
+
+
+def normalize_doi(doi: Optional[str]) -> Optional[str]:
+    """Lowercase a DOI and strip resolver prefixes ("https://doi.org/", "doi:")"""
+    if not doi:
+        return None
+    doi = _DOI_PREFIX_RE.sub('', doi.strip()).strip().lower()
+    return doi or None
+
+
+def normalize_title(title: Optional[str]) -> Optional[str]:
+    """Accent-, case- and punctuation-insensitive form of a title"""
+    if not title:
+        return None
+    title = unicodedata.normalize('NFKD', title)
+    title = ''.join(c for c in title if not unicodedata.combining(c))
+    title = _NON_ALNUM_RE.sub(' ', title.lower()).strip()
+    return title or None
+
+
+def _digest(value: str) -> str:
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def paper_keys(paper: Dict[str, Any]) -> List[str]:
+    """Dedup keys for a paper: DOI hash first, then title hash"""
+    keys = []
+    doi = normalize_doi(paper.get('doi'))
+    if doi:
+        keys.append('doi:' + _digest(doi))
+    title = normalize_title(paper.get('title'))
+    if title:
+        keys.append('title:' + _digest(title))
+    return keys
+
+
+def tokenize_terms(text: str, min_length: int = MIN_TERM_LENGTH) -> List[str]:
+    """Lowercased word tokens that are long enough and not stop words"""
+    return [
+        t for t in _TOKEN_RE.findall(text.lower())
+        if len(t) >= min_length and t not in STOP_WORDS
+    ]
+
+
+def _paper_text(paper: Dict[str, Any]) -> str:
+    return f"{paper.get('title') or ''} {paper.get('abstract') or ''}"
+
+
+class RateLimiter:
+    """Async token bucket: ``rate`` requests per second with bursts of ``burst``"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+@dataclass
+class LiteratureSource:
+    """A searchable literature database and its request limits"""
+    name: str
+    fetch: SourceFetch
+    rate_limit: float = 5.0
+    burst: int = 2
+    max_concurrency: int = 2
+    max_pages: int = 1000
+    timeout: float = 30.0
+    limiter: RateLimiter = field(init=False, repr=False)
+    semaphore: asyncio.Semaphore = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.limiter = RateLimiter(self.rate_limit, self.burst)
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+
+
+class PaperIndex:
+    """Deduplicated paper store with an inverted term -> paper index
+
+    Papers are addressed by ``paper_id`` (their primary dedup key) and
+    internally by insertion ordinal, which is what the postings hold.
+    """
+
+    def __init__(self):
+        self._papers: List[Dict[str, Any]] = []
+        self._ids: List[str] = []
+        self._by_key: Dict[str, int] = {}
+        self._postings: Dict[str, array] = {}
+        self.term_frequency: Counter = Counter()
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self._papers)
+
+    def __contains__(self, paper_id: str) -> bool:
+        return paper_id in self._by_key
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    def get(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        ordinal = self._by_key.get(paper_id)
+        return None if ordinal is None else self._papers[ordinal]
+
+    def papers(self, paper_ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        if paper_ids is None:
+            return list(self._papers)
+        return [self._papers[self._by_key[pid]] for pid in paper_ids]
+
+    def add(
+        self,
+        paper: Dict[str, Any],
+        source: Optional[str] = None,
+        copy: bool = True
+    ) -> Tuple[Optional[str], bool]:
+        """Insert a paper; returns ``(paper_id, is_new)``
+
+        A duplicate is merged into the stored record: its source is added
+        to ``sources`` and fields the stored copy lacks are filled in.
+        Papers with neither a DOI nor a title cannot be keyed and are
+        skipped (``paper_id`` is ``None``). With ``copy=False`` the caller's
+        dict is stored and annotated in place.
+        """
+        keys = paper_keys(paper)
+        if not keys:
+            return None, False
+
+        ordinal = next((self._by_key[k] for k in keys if k in self._by_key), None)
+        if ordinal is not None:
+            self.duplicates += 1
+            existing = self._papers[ordinal]
+            indexed_text = _paper_text(existing)
+            for name, value in paper.items():
+                if value and not existing.get(name):
+                    existing[name] = value
+            if _paper_text(existing) != indexed_text:
+                # A title or abstract was filled in; its terms must be searchable too
+                self._index_terms(ordinal, existing, indexed_text)
+            if source and source not in existing.setdefault('sources', []):
+                existing['sources'].append(source)
+            for key in keys:
+                self._by_key.setdefault(key, ordinal)
+            return self._ids[ordinal], False
+
+        ordinal = len(self._papers)
+        stored = dict(paper) if copy else paper
+        stored['paper_id'] = keys[0]
+        stored['sources'] = list(stored.get('sources') or [])
+        if source and source not in stored['sources']:
+            stored['sources'].append(source)
+        self._papers.append(stored)
+        self._ids.append(keys[0])
+        for key in keys:
+            self._by_key[key] = ordinal
+
+        self._index_terms(ordinal, stored)
+        return keys[0], True
+
+    def _index_terms(self, ordinal: int, paper: Dict[str, Any], previous: str = '') -> None:
+        """Index the terms of a paper's title and abstract not already indexed from ``previous``"""
+        terms = tokenize_terms(_paper_text(paper), MIN_MATCH_TERM_LENGTH)
+        counts = Counter(t for t in terms if len(t) >= MIN_TERM_LENGTH)
+        known: Set[str] = set()
+        if previous:
+            indexed = tokenize_terms(previous, MIN_MATCH_TERM_LENGTH)
+            counts -= Counter(t for t in indexed if len(t) >= MIN_TERM_LENGTH)
+            known.update(indexed)
+        self.term_frequency.update(counts)
+        postings = self._postings
+        for term in dict.fromkeys(terms):
+            if term in known:
+                continue
+            bucket = postings.get(term)
+            if bucket is None:
+                postings[term] = bucket = array('I')
+            bucket.append(ordinal)
+
+    def add_many(self, papers: Iterable[Dict[str, Any]], source: Optional[str] = None) -> int:
+        """Insert papers; returns how many were new"""
+        return sum(1 for paper in papers if self.add(paper, source)[1])
+
+    def match(self, terms: Iterable[str], min_terms: int = 1) -> Dict[str, int]:
+        """Papers containing at least ``min_terms`` of ``terms``, with the count matched"""
+        hits: Counter = Counter()
+        for term in set(terms):
+            postings = self._postings.get(term)
+            if postings is not None:
+                hits.update(postings)
+        return {self._ids[o]: n for o, n in hits.items() if n >= min_terms}
+
+    def top_terms(self, n: int = 20) -> List[Tuple[str, int]]:
+        return self.term_frequency.most_common(n)
+
+    def papers_with_term(self, term: str) -> List[Dict[str, Any]]:
+        return [self._papers[o] for o in self._postings.get(term, ())]
+
+    def themes(self, n: int = 20) -> Dict[str, Any]:
+        """Top ``n`` terms by frequency with the papers that contain each
+
+        Also sets ``paper["themes"]`` on every paper.
+        """
+        top = self.top_terms(n)
+        paper_themes: Dict[int, List[str]] = {}
+        themes = {}
+        for term, frequency in top:
+            postings = self._postings.get(term, ())
+            for ordinal in postings:
+                paper_themes.setdefault(ordinal, []).append(term)
+            themes[term] = {
+                'frequency': frequency,
+                'papers': [self._papers[o] for o in postings],
+                'related_keywords': []
+            }
+        for ordinal, paper in enumerate(self._papers):
+            paper['themes'] = paper_themes.get(ordinal, [])
+        return {'themes': themes, 'top_keywords': top}
+
+
+class LiteratureReviewPipeline:
+    """Queries sources concurrently and folds the results into a ``PaperIndex``"""
+
+    def __init__(self, sources: Iterable[LiteratureSource] = ()):
+        self.sources: Dict[str, LiteratureSource] = {}
+        for source in sources:
+            self.register_source(source)
+
+    def register_source(self, source: LiteratureSource) -> None:
+        self.sources[source.name] = source
+
+    async def search(
+        self,
+        query: Any,
+        source_names: Optional[Iterable[str]] = None,
+        index: Optional[PaperIndex] = None
+    ) -> Tuple[PaperIndex, Dict[str, Dict[str, Any]]]:
+        """Search the named sources (default: all) concurrently
+
+        Returns the populated index and a per-source report with the
+        number of pages, papers returned, new papers, elapsed time and any
+        error. A failing source does not abort the others.
+        """
+        index = index if index is not None else PaperIndex()
+        names = list(source_names) if source_names is not None else list(self.sources)
+        reports: Dict[str, Dict[str, Any]] = {}
+
+        async def run(name: str) -> None:
+            source = self.sources.get(name)
+            if source is None:
+                reports[name] = {'pages': 0, 'papers': 0, 'new_papers': 0, 'error': f"Unknown source {name}"}
+                return
+            reports[name] = await self._search_source(source, query, index)
+
+        await asyncio.gather(*(run(name) for name in dict.fromkeys(names)))
+        return index, reports
+
+    async def _search_source(self, source: LiteratureSource, query: Any, index: PaperIndex) -> Dict[str, Any]:
+        report = {'pages': 0, 'papers': 0, 'new_papers': 0, 'error': None}
+        start = time.perf_counter()
+        cursor = None
+        try:
+            while report['pages'] < source.max_pages:
+                async with source.semaphore:
+                    await source.limiter.acquire()
+                    page = await asyncio.wait_for(source.fetch(query, cursor), source.timeout)
+                papers = page.get('papers', [])
+                report['pages'] += 1
+                report['papers'] += len(papers)
+                report['new_papers'] += index.add_many(papers, source.name)
+                cursor = page.get('next_cursor')
+                if cursor is None or not papers:
+                    break
+        except Exception as e:
+            logger.warning(f"Literature source {source.name} failed: {e}")
+            report['error'] = str(e)
+        report['elapsed_seconds'] = round(time.perf_counter() - start, 4)
+        return report
+
+    @staticmethod
+    def select(index: PaperIndex, query_text: str, min_terms: int = 1) -> Tuple[Set[str], Dict[str, int]]:
+        """IDs of papers matching at least ``min_terms`` query terms, plus their scores"""
+        scores = index.match(tokenize_terms(query_text, MIN_MATCH_TERM_LENGTH), min_terms)
+        return set(scores), scores
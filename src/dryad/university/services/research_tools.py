@@ -35,6 +35,8 @@ import jieba
 from wordcloud import WordCloud
 from dryad.university.core.config import get_settings
 from dryad.university.core.logging import get_logger
+from dryad.university.services.literature_engine import PaperIndex
+from dryad.university.services.similarity_index import SimilarityIndex, get_similarity_index
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -1188,23 +1190,32 @@ class LiteratureReviewer:
             search_term = query.get("search_term", "")
             search_id = str(uuid.uuid4())
             
-            results = {}
-            total_papers = 0
-            
-            for database in databases:
-                if database == "scholar":
-                    db_results = await self._search_google_scholar(search_term, query)
-                elif database == "pubmed":
-                    db_results = await self._search_pubmed_literature(search_term, query)
-                elif database == "arxiv":
-                    db_results = await self._search_arxiv_literature(search_term, query)
-                elif database == "ieee":
-                    db_results = await self._search_ieee_literature(search_term, query)
-                else:
-                    db_results = {"papers": [], "error": f"Database {database} not supported"}
-                
-                results[database] = db_results
-                total_papers += len(db_results.get("papers", []))
+            searches = {
+                "scholar": self._search_google_scholar,
+                "pubmed": self._search_pubmed_literature,
+                "arxiv": self._search_arxiv_literature,
+                "ieee": self._search_ieee_literature
+            }
+            
+            async def search(database: str) -> Dict[str, Any]:
+                if database not in searches:
+                    return {"papers": [], "error": f"Database {database} not supported"}
+                try:
+                    return await searches[database](search_term, query)
+                except Exception as e:
+                    logger.warning(f"Search of {database} failed: {str(e)}")
+                    return {"papers": [], "error": str(e)}
+            
+            # Query every database at once; one slow or failing source does not hold up the rest
+            databases = list(dict.fromkeys(databases))
+            db_results = await asyncio.gather(*(search(database) for database in databases))
+            results = dict(zip(databases, db_results))
+            total_papers = sum(len(r.get("papers", [])) for r in db_results)
+            
+            # The same paper is often indexed by several databases
+            paper_index = PaperIndex()
+            for database, db_result in results.items():
+                paper_index.add_many(db_result.get("papers", []), database)
             
             return {
                 "success": True,
@@ -1212,6 +1223,8 @@ class LiteratureReviewer:
                 "search_term": search_term,
                 "databases_searched": databases,
                 "total_papers": total_papers,
+                "unique_papers": len(paper_index),
+                "papers": paper_index.papers(),
                 "results": results,
                 "search_timestamp": datetime.utcnow().isoformat()
             }
@@ -1988,12 +2001,31 @@ class ResearchValidator:
 class PlagiarismDetector:
     """Advanced plagiarism detection and prevention"""
     
-    def __init__(self):
+    def __init__(self, corpus_index: Optional[SimilarityIndex] = None):
         self.detection_engines = {
             "text_similarity": self._check_text_similarity,
             "source_verification": self._verify_sources,
             "citation_analysis": self._analyze_citations
         }
+        self._corpus_index = corpus_index
+        self.match_threshold = getattr(settings, "PLAGIARISM_MATCH_THRESHOLD", 0.2)
+    
+    @property
+    def corpus_index(self) -> SimilarityIndex:
+        """Comparison corpus, opened at PLAGIARISM_INDEX_PATH on first use"""
+        if self._corpus_index is None:
+            self._corpus_index = get_similarity_index()
+        return self._corpus_index
+    
+    async def add_source_document(
+        self,
+        document_id: str,
+        text: str,
+        title: Optional[str] = None,
+        source: Optional[str] = None
+    ) -> int:
+        """Add a document to the comparison corpus; returns passages indexed"""
+        return await self.corpus_index.add_document_async(document_id, text, title, source)
     
     async def detect_plagiarism(self, content: Dict[str, Any]) -> Dict[str, Any]:
         """Detect plagiarism in research content"""
@@ -2031,13 +2063,16 @@ class PlagiarismDetector:
         """Check for text similarity with existing sources"""
         text = content.get("text", "")
         
-        # Simple similarity check (would use actual plagiarism detection APIs)
-        similarity_score = 0.05  # Mock low similarity
+        if text.strip():
+            corpus_matches = await self.corpus_index.query_async(text, top_k=5, threshold=self.match_threshold)
+        else:
+            corpus_matches = {"similarity_score": 0.0, "matches": []}
+        similarity_score = corpus_matches["similarity_score"]
         
         return {
             "risk_score": similarity_score,
             "similarity_percentage": similarity_score * 100,
-            "matches_found": [],
+            "matches_found": corpus_matches["matches"],
             "confidence": "high",
             "recommended_action": "proceed" if similarity_score < 0.2 else "review_required"
         }
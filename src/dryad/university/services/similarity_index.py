@@ -0,0 +1,475 @@
+"""
+Document Similarity Index
+=========================
+
+Near-duplicate and copied-passage detection for plagiarism checks. Texts
+are split into overlapping word windows ("passages"); each passage is
+reduced to word k-shingles hashed with a polynomial rolling hash, a MinHash
+signature, and LSH band keys. Band keys live in SQLite, so the corpus can
+grow incrementally and survive restarts, and a query only touches passages
+that share at least one band with it. Candidates are ranked by estimated
+Jaccard from their signatures and only those above the threshold are
+verified with an exact shingle overlap.
+
+Author: Dryad University System
+Date: 2025-11-01
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from collections import defaultdict
+import asyncio
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from dryad.university.core.config import get_settings
+from dryad.university.core.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+_WORD_RE = re.compile(r"\w+")
+
+# Two independent 31-bit polynomial hashes combine into one 62-bit shingle hash
+_MOD = (1 << 31) - 1
+_BASES = (1_000_003, 769_231_197)
+_SALT = np.uint64(0x5BD1E995)
+
+_SQLITE_MAX_PARAMS = 900
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """Vectorized SplitMix64 finalizer (wrapping uint64 arithmetic)"""
+    with np.errstate(over='ignore'):
+        z = x + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+def tokenize(text: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Stable word hashes plus character start/end offsets of each word"""
+    matches = list(_WORD_RE.finditer(text))
+    hashes = np.fromiter(
+        (zlib.crc32(m.group().lower().encode('utf-8')) for m in matches), dtype=np.uint64, count=len(matches)
+    )
+    starts = np.fromiter((m.start() for m in matches), dtype=np.int64, count=len(matches))
+    ends = np.fromiter((m.end() for m in matches), dtype=np.int64, count=len(matches))
+    return hashes, starts, ends
+
+
+def shingle_hashes(word_hashes: np.ndarray, k: int) -> np.ndarray:
+    """Rolling-hash every k-word window; texts shorter than k form one shingle"""
+    n = len(word_hashes)
+    if n == 0:
+        return np.empty(0, dtype=np.uint64)
+    k = min(k, n)
+    m = n - k + 1
+    mod = np.uint64(_MOD)
+    h1 = np.zeros(m, dtype=np.uint64)
+    h2 = np.zeros(m, dtype=np.uint64)
+    for j in range(k):
+        window = word_hashes[j:j + m]
+        h1 = (h1 * np.uint64(_BASES[0]) + window % mod) % mod
+        h2 = (h2 * np.uint64(_BASES[1]) + (window ^ _SALT) % mod) % mod
+    return (h1 << np.uint64(31)) | h2
+
+
+class MinHasher:
+    """MinHash signatures from SplitMix64-permuted shingle hashes"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.seeds = rng.integers(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+    def signature(self, shingles: np.ndarray) -> np.ndarray:
+        if not len(shingles):
+            return np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        mixed = _splitmix64(shingles[None, :] ^ self.seeds[:, None])
+        # The high half preserves the ordering, so it is a valid 32-bit minimum
+        return (mixed.min(axis=1) >> np.uint64(32)).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray, bands: int) -> np.ndarray:
+    """One signed 64-bit key per LSH band (band number mixed in)"""
+    rows = signature.reshape(bands, -1).astype(np.uint64)
+    key = np.arange(bands, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for column in rows.T:
+            key = _splitmix64(key ^ column)
+    return key.view(np.int64)
+
+
+class SimilarityIndex:
+    """Incremental MinHash-LSH passage index persisted in SQLite"""
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        shingle_size: int = 5,
+        num_perm: int = 64,
+        bands: int = 32,
+        window: int = 40,
+        stride: int = 20,
+        seed: int = 1,
+    ):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._init_schema()
+
+        params = self._load_params(
+            shingle_size=shingle_size, num_perm=num_perm, bands=bands, window=window, stride=stride, seed=seed
+        )
+        if params['num_perm'] % params['bands']:
+            raise ValueError("num_perm must be divisible by bands")
+        self.shingle_size = params['shingle_size']
+        self.num_perm = params['num_perm']
+        self.bands = params['bands']
+        self.window = params['window']
+        self.stride = params['stride']
+        self.hasher = MinHasher(self.num_perm, params['seed'])
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def add_document(self, document_id: str, text: str, title: Optional[str] = None,
+                     source: Optional[str] = None) -> int:
+        """Index (or re-index) one document; returns the number of passages"""
+        return self.add_documents([(document_id, text, title, source)])
+
+    def add_documents(self, documents: Iterable[Tuple[str, str, Optional[str], Optional[str]]]) -> int:
+        """Index many ``(document_id, text, title, source)`` tuples in one transaction"""
+        passages_added = 0
+        with self._lock, self._conn:
+            cursor = self._conn.cursor()
+            for document_id, text, title, source in documents:
+                self._delete(cursor, document_id)
+                word_hashes, starts, ends = tokenize(text or "")
+                cursor.execute(
+                    "INSERT INTO documents (external_id, title, source, word_count, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                    (document_id, title, source, len(word_hashes), time.time())
+                )
+                doc_rowid = cursor.lastrowid
+
+                band_rows = []
+                for passage in self._passages(word_hashes, starts, ends):
+                    shingles, signature, start_char, end_char = passage
+                    cursor.execute(
+                        "INSERT INTO passages (doc_id, start_char, end_char, signature, shingles) VALUES (?, ?, ?, ?, ?)",
+                        (doc_rowid, start_char, end_char, signature.tobytes(), shingles.tobytes())
+                    )
+                    passage_id = cursor.lastrowid
+                    band_rows.extend((int(key), passage_id) for key in band_keys(signature, self.bands))
+                    passages_added += 1
+                cursor.executemany("INSERT OR IGNORE INTO bands (band_key, passage_id) VALUES (?, ?)", band_rows)
+        return passages_added
+
+    def remove_document(self, document_id: str) -> bool:
+        with self._lock, self._conn:
+            return self._delete(self._conn.cursor(), document_id)
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def query(self, text: str, top_k: int = 5, threshold: float = 0.2,
+              max_candidates: int = 200) -> Dict[str, Any]:
+        """Find indexed passages similar to passages of ``text``.
+
+        Returns the fraction of the query's shingles covered by verified
+        matches and the ``top_k`` matching source spans, each with the
+        MinHash-estimated and exact Jaccard similarity.
+        """
+        word_hashes, starts, ends = tokenize(text or "")
+        query_passages = list(self._passages(word_hashes, starts, ends))
+        all_shingles = np.unique(shingle_hashes(word_hashes, self.shingle_size))
+        result = {
+            'similarity_score': 0.0,
+            'matches': [],
+            'query_passages': len(query_passages),
+            'candidates_checked': 0,
+            'verified_pairs': 0
+        }
+        if not query_passages:
+            return result
+
+        # Band lookup: which indexed passages share a band with each query passage
+        key_owners: Dict[int, List[int]] = defaultdict(list)
+        for q_index, (_, signature, _, _) in enumerate(query_passages):
+            for key in band_keys(signature, self.bands):
+                key_owners[int(key)].append(q_index)
+
+        hits: Dict[Tuple[int, int], int] = defaultdict(int)
+        with self._lock:
+            for chunk in _chunks(list(key_owners), _SQLITE_MAX_PARAMS):
+                rows = self._conn.execute(
+                    f"SELECT band_key, passage_id FROM bands WHERE band_key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, passage_id in rows:
+                    for q_index in key_owners[key]:
+                        hits[(q_index, passage_id)] += 1
+
+        # Keep the passages with most band collisions per query passage
+        per_query: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        for (q_index, passage_id), count in hits.items():
+            per_query[q_index].append((count, passage_id))
+        pairs = []
+        for q_index, candidates in per_query.items():
+            candidates.sort(reverse=True)
+            pairs.extend((q_index, passage_id) for _, passage_id in candidates[:max_candidates])
+        result['candidates_checked'] = len(pairs)
+        if not pairs:
+            return result
+
+        stored = self._load_passages({passage_id for _, passage_id in pairs})
+
+        # Estimate from signatures; verify exact overlap only for likely matches
+        verified = []
+        covered = []
+        for q_index, passage_id in pairs:
+            passage = stored.get(passage_id)
+            if passage is None:
+                continue
+            q_shingles, q_signature, q_start, q_end = query_passages[q_index]
+            estimate = float(np.mean(q_signature == passage['signature']))
+            if estimate < threshold * 0.75:
+                continue
+            common = np.intersect1d(q_shingles, passage['shingles'], assume_unique=True)
+            union = len(q_shingles) + len(passage['shingles']) - len(common)
+            jaccard = len(common) / union if union else 0.0
+            if jaccard < threshold:
+                continue
+            covered.append(common)
+            verified.append({
+                'q_index': q_index,
+                'passage_id': passage_id,
+                'doc_id': passage['doc_id'],
+                'estimated_jaccard': estimate,
+                'jaccard': jaccard,
+                'containment': len(common) / max(1, len(q_shingles)),
+                'query_span': (q_start, q_end),
+                'source_span': (passage['start_char'], passage['end_char'])
+            })
+
+        result['verified_pairs'] = len(verified)
+        if covered:
+            matched = np.unique(np.concatenate(covered))
+            result['similarity_score'] = float(len(matched) / max(1, len(all_shingles)))
+        result['matches'] = self._merge_spans(verified)[:top_k]
+        return result
+
+    async def query_async(self, text: str, top_k: int = 5, threshold: float = 0.2) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.query, text, top_k, threshold)
+
+    async def add_document_async(self, document_id: str, text: str, title: Optional[str] = None,
+                                 source: Optional[str] = None) -> int:
+        return await asyncio.to_thread(self.add_document, document_id, text, title, source)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            passages = self._conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            'documents': documents,
+            'passages': passages,
+            'index_bytes': page_count * page_size,
+            'shingle_size': self.shingle_size,
+            'num_perm': self.num_perm,
+            'bands': self.bands,
+            'window': self.window,
+            'stride': self.stride
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _init_schema(self) -> None:
+        with self._conn:
+            if self.path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS index_params (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_id INTEGER PRIMARY KEY,
+                    external_id TEXT NOT NULL UNIQUE,
+                    title TEXT,
+                    source TEXT,
+                    word_count INTEGER NOT NULL,
+                    indexed_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS passages (
+                    passage_id INTEGER PRIMARY KEY,
+                    doc_id INTEGER NOT NULL,
+                    start_char INTEGER NOT NULL,
+                    end_char INTEGER NOT NULL,
+                    signature BLOB NOT NULL,
+                    shingles BLOB NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_passages_doc ON passages (doc_id);
+                CREATE TABLE IF NOT EXISTS bands (
+                    band_key INTEGER NOT NULL,
+                    passage_id INTEGER NOT NULL,
+                    PRIMARY KEY (band_key, passage_id)
+                ) WITHOUT ROWID;
+            """)
+
+    def _load_params(self, **requested: int) -> Dict[str, int]:
+        """Parameters of an existing index win, so stored signatures stay comparable"""
+        with self._conn:
+            stored = dict(self._conn.execute("SELECT name, value FROM index_params").fetchall())
+            if stored:
+                if any(stored.get(name) != value for name, value in requested.items()):
+                    logger.info(f"Using stored similarity index parameters for {self.path}: {stored}")
+                return {name: stored.get(name, value) for name, value in requested.items()}
+            self._conn.executemany("INSERT INTO index_params (name, value) VALUES (?, ?)", list(requested.items()))
+        return dict(requested)
+
+    def _passages(self, word_hashes: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+        """Yield (unique shingles, signature, start_char, end_char) per word window"""
+        n = len(word_hashes)
+        if n == 0:
+            return
+        shingles = shingle_hashes(word_hashes, self.shingle_size)
+        k = min(self.shingle_size, n)
+        last_start = max(0, n - self.window)
+        window_starts = list(range(0, last_start + 1, self.stride))
+        if window_starts[-1] != last_start:
+            window_starts.append(last_start)
+        for start in window_starts:
+            end = min(n, start + self.window)
+            passage_shingles = np.unique(shingles[start:max(start + 1, end - k + 1)])
+            yield passage_shingles, self.hasher.signature(passage_shingles), int(starts[start]), int(ends[end - 1])
+
+    def _load_passages(self, passage_ids) -> Dict[int, Dict[str, Any]]:
+        stored = {}
+        with self._lock:
+            for chunk in _chunks(list(passage_ids), _SQLITE_MAX_PARAMS):
+                rows = self._conn.execute(
+                    "SELECT passage_id, doc_id, start_char, end_char, signature, shingles FROM passages "
+                    f"WHERE passage_id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for passage_id, doc_id, start_char, end_char, signature, shingles in rows:
+                    stored[passage_id] = {
+                        'doc_id': doc_id,
+                        'start_char': start_char,
+                        'end_char': end_char,
+                        'signature': np.frombuffer(signature, dtype=np.uint32),
+                        'shingles': np.frombuffer(shingles, dtype=np.uint64)
+                    }
+        return stored
+
+    def _merge_spans(self, verified: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge overlapping passage matches into spans per source document"""
+        by_document: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for match in verified:
+            by_document[match['doc_id']].append(match)
+
+        documents = self._document_info(list(by_document))
+        spans = []
+        for doc_id, matches in by_document.items():
+            matches.sort(key=lambda m: (m['query_span'][0], m['source_span'][0]))
+            current = None
+            for match in matches:
+                if (current is not None and match['query_span'][0] <= current['query_span'][1]
+                        and match['source_span'][0] <= current['source_span'][1]
+                        and match['source_span'][1] >= current['source_span'][0]):
+                    current['query_span'] = (current['query_span'][0], max(current['query_span'][1], match['query_span'][1]))
+                    current['source_span'] = (
+                        min(current['source_span'][0], match['source_span'][0]),
+                        max(current['source_span'][1], match['source_span'][1])
+                    )
+                    current['estimated_jaccard'] = max(current['estimated_jaccard'], match['estimated_jaccard'])
+                    current['jaccard'] = max(current['jaccard'], match['jaccard'])
+                    current['containment'] = max(current['containment'], match['containment'])
+                    current['passages'] += 1
+                    continue
+                current = dict(match, passages=1)
+                spans.append(current)
+
+        info_default = {'document_id': None, 'title': None, 'source': None}
+        results = []
+        for span in spans:
+            info = documents.get(span['doc_id'], info_default)
+            results.append({
+                'document_id': info['document_id'],
+                'title': info['title'],
+                'source': info['source'],
+                'estimated_jaccard': round(span['estimated_jaccard'], 4),
+                'jaccard': round(span['jaccard'], 4),
+                'containment': round(span['containment'], 4),
+                'passages': span['passages'],
+                'query_span': {'start': span['query_span'][0], 'end': span['query_span'][1]},
+                'source_span': {'start': span['source_span'][0], 'end': span['source_span'][1]}
+            })
+        results.sort(key=lambda s: (s['jaccard'], s['passages']), reverse=True)
+        return results
+
+    def _document_info(self, doc_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        info = {}
+        with self._lock:
+            for chunk in _chunks(doc_ids, _SQLITE_MAX_PARAMS):
+                rows = self._conn.execute(
+                    f"SELECT doc_id, external_id, title, source FROM documents WHERE doc_id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for doc_id, external_id, title, source in rows:
+                    info[doc_id] = {'document_id': external_id, 'title': title, 'source': source}
+        return info
+
+    def _delete(self, cursor: sqlite3.Cursor, document_id: str) -> bool:
+        row = cursor.execute("SELECT doc_id FROM documents WHERE external_id = ?", (document_id,)).fetchone()
+        if row is None:
+            return False
+        doc_rowid = row[0]
+        passages = cursor.execute(
+            "SELECT passage_id, signature FROM passages WHERE doc_id = ?", (doc_rowid,)
+        ).fetchall()
+        band_rows = [
+            (int(key), passage_id)
+            for passage_id, signature in passages
+            for key in band_keys(np.frombuffer(signature, dtype=np.uint32), self.bands)
+        ]
+        cursor.executemany("DELETE FROM bands WHERE band_key = ? AND passage_id = ?", band_rows)
+        cursor.execute("DELETE FROM passages WHERE doc_id = ?", (doc_rowid,))
+        cursor.execute("DELETE FROM documents WHERE doc_id = ?", (doc_rowid,))
+        return True
+
+
+def _chunks(items: List[Any], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+_indexes: Dict[str, SimilarityIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_similarity_index(path: Optional[str] = None) -> SimilarityIndex:
+    """Process-wide index per path (``PLAGIARISM_INDEX_PATH`` by default)"""
+    path = path or getattr(settings, "PLAGIARISM_INDEX_PATH", ":memory:")
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = SimilarityIndex(
+                path,
+                shingle_size=getattr(settings, "PLAGIARISM_SHINGLE_SIZE", 5),
+                num_perm=getattr(settings, "PLAGIARISM_NUM_PERM", 64),
+                bands=getattr(settings, "PLAGIARISM_LSH_BANDS", 32),
+            )
+            _indexes[path] = index
+        return index
@@ -0,0 +1,745 @@
+"""
+Streaming Statistics Engine
+
+Out-of-core descriptive statistics for research datasets. Sources (pandas
+DataFrames, CSV and Parquet files, NumPy arrays and ``.npy`` memmaps) are
+read in fixed-size row batches and folded into mergeable sketches in a
+single pass:
+
+- Welford/Chan moments for count, mean, variance, min and max
+- t-digest per column for quantiles, medians and IQR outlier estimates
+- a pairwise-complete covariance accumulator (row position included) for
+  correlation matrices and trend slopes
+- a bottom-k row sample (uniform over all rows) for charts and the
+  row-level pattern checks that cannot work from summaries
+
+Partial profiles computed in worker processes combine with ``merge``, so
+memory is bounded by the batch size and the number of columns, not by the
+number of rows. Also provides a size-bounded LRU cache that spills evicted
+entries to disk.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_ROWS = 100_000
+DEFAULT_COMPRESSION = 200
+DEFAULT_SAMPLE_ROWS = 1000
+STRONG_CORRELATION = 0.7
+TREND_CORRELATION = 0.5
+
+# Index of the synthetic row-position column in the covariance accumulator
+_ROW_POSITION = 0
+
+
+class TDigest:
+    """Merging t-digest (Dunning) with vectorized compression.
+
+    Points are buffered and periodically folded into centroids whose size is
+    bounded by the arcsine scale function, so tails keep near-singleton
+    centroids and quantile error is smallest where IQR bounds and extremes
+    are read.
+    """
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION, buffer_size: Optional[int] = None):
+        self.compression = compression
+        self.buffer_size = buffer_size or compression * 50
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: List[np.ndarray] = []
+        self._buffered = 0
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer.append(values)
+        self._buffered += len(values)
+        if self._buffered >= self.buffer_size:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> None:
+        other._compress()
+        if not other.count:
+            return
+        self._compress()
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._fold(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+
+    def quantile(self, q: float) -> float:
+        self._compress()
+        if not self.count:
+            return math.nan
+        positions = np.cumsum(self.weights) - self.weights / 2
+        xp = np.concatenate([[0.0], positions, [self.count]])
+        fp = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(q * self.count, xp, fp))
+
+    def cdf(self, x: float) -> float:
+        self._compress()
+        if not self.count:
+            return math.nan
+        if x < self.min:
+            return 0.0
+        if x >= self.max:
+            return 1.0
+        positions = np.cumsum(self.weights) - self.weights / 2
+        xp = np.concatenate([[self.min], self.means, [self.max]])
+        fp = np.concatenate([[0.0], positions, [self.count]])
+        return float(np.interp(x, xp, fp) / self.count)
+
+    def _compress(self) -> None:
+        if not self._buffered:
+            return
+        points = np.concatenate(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self._fold(np.concatenate([self.means, points]), np.concatenate([self.weights, np.ones(len(points))]))
+
+    def _fold(self, means: np.ndarray, weights: np.ndarray) -> None:
+        order = np.argsort(means, kind='stable')
+        means = means[order]
+        weights = weights[order]
+        total = weights.sum()
+        cumulative = np.cumsum(weights)
+        q_mid = (cumulative - weights / 2) / total
+        # k1 scale: each centroid spans at most one unit of k
+        k = self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * q_mid - 1, -1.0, 1.0))
+        buckets = np.floor(k).astype(np.int64)
+        starts = np.flatnonzero(np.concatenate([[True], buckets[1:] != buckets[:-1]]))
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(weights * means, starts) / merged_weights
+        self.weights = merged_weights
+        self.count = float(total)
+
+
+class RunningMoments:
+    """Per-column count, mean, M2, min and max combined with Chan's formula"""
+
+    def __init__(self, n_columns: int):
+        self.count = np.zeros(n_columns, dtype=np.int64)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+
+    def update(self, values: np.ndarray) -> None:
+        mask = ~np.isnan(values)
+        count = mask.sum(axis=0)
+        filled = np.where(mask, values, 0.0)
+        mean = filled.sum(axis=0) / np.maximum(count, 1)
+        m2 = (np.where(mask, values - mean, 0.0) ** 2).sum(axis=0)
+        low = np.where(mask, values, np.inf).min(axis=0)
+        high = np.where(mask, values, -np.inf).max(axis=0)
+        self._combine(count, mean, m2, low, high)
+
+    def merge(self, other: "RunningMoments") -> None:
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    def _combine(self, count, mean, m2, low, high) -> None:
+        total = self.count + count
+        safe_total = np.maximum(total, 1)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / safe_total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / safe_total
+        self.count = total
+        self.min = np.minimum(self.min, low)
+        self.max = np.maximum(self.max, high)
+
+    @property
+    def variance(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+
+class PairwiseCovariance:
+    """Pairwise-complete covariance sums, mergeable by addition.
+
+    Values are shifted by a fixed per-column offset (shared by every partial)
+    to keep the raw sums well conditioned. Results match pandas' pairwise
+    ``corr``: each pair uses only the rows where both values are present.
+    """
+
+    def __init__(self, n_columns: int, shift: np.ndarray):
+        self.shift = shift
+        self.n = np.zeros((n_columns, n_columns))
+        self.s = np.zeros((n_columns, n_columns))
+        self.q = np.zeros((n_columns, n_columns))
+        self.p = np.zeros((n_columns, n_columns))
+
+    def update(self, values: np.ndarray) -> None:
+        mask = ~np.isnan(values)
+        present = mask.astype(np.float64)
+        centered = np.where(mask, values - self.shift, 0.0)
+        self.n += present.T @ present
+        self.s += centered.T @ present
+        self.q += (centered * centered).T @ present
+        self.p += centered.T @ centered
+
+    def merge(self, other: "PairwiseCovariance") -> None:
+        self.n += other.n
+        self.s += other.s
+        self.q += other.q
+        self.p += other.p
+
+    def covariance(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (self.p - self.s * self.s.T / self.n) / (self.n - 1)
+
+    def correlation(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = (self.q - self.s ** 2 / self.n) / (self.n - 1)
+            return self.covariance() / np.sqrt(variance * variance.T)
+
+
+class RowSample:
+    """Uniform sample of at most k rows, mergeable across batches and processes.
+
+    Every row gets a random key and the k smallest keys are kept (bottom-k),
+    so the union of partial samples, cut back to k, is a uniform sample of
+    all rows. Keys are seeded from the row offset, so a profile is
+    reproducible however its batches are spread over workers.
+    """
+
+    def __init__(self, n_columns: int, k: int = DEFAULT_SAMPLE_ROWS):
+        self.k = k
+        self.keys = np.empty(0)
+        self.positions = np.empty(0, dtype=np.int64)
+        self.values = np.empty((0, n_columns))
+
+    def update(self, values: np.ndarray, row_offset: int) -> None:
+        keys = np.random.default_rng(row_offset).random(len(values))
+        positions = np.arange(row_offset, row_offset + len(values), dtype=np.int64)
+        self._keep(keys, positions, values)
+
+    def merge(self, other: "RowSample") -> None:
+        self._keep(other.keys, other.positions, other.values)
+
+    def _keep(self, keys: np.ndarray, positions: np.ndarray, values: np.ndarray) -> None:
+        keys = np.concatenate([self.keys, keys])
+        positions = np.concatenate([self.positions, positions])
+        values = np.concatenate([self.values, values])
+        if len(keys) > self.k:
+            kept = np.argpartition(keys, self.k - 1)[:self.k]
+            keys, positions, values = keys[kept], positions[kept], values[kept]
+        self.keys, self.positions, self.values = keys, positions, values
+
+    def rows(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Sampled row positions and values, in row order"""
+        order = np.argsort(self.positions, kind='stable')
+        return self.positions[order], self.values[order]
+
+
+class StreamingProfile:
+    """Mergeable single-pass profile of a table's numeric columns"""
+
+    def __init__(self, columns: Sequence[str], shift: np.ndarray, compression: int = DEFAULT_COMPRESSION,
+                 all_columns: Optional[Sequence[str]] = None, sample_rows: int = DEFAULT_SAMPLE_ROWS):
+        self.columns = list(columns)
+        self.all_columns = list(all_columns or columns)
+        self.rows = 0
+        self.null_counts: Dict[str, int] = {}
+        self.moments = RunningMoments(len(self.columns))
+        self.digests = [TDigest(compression) for _ in self.columns]
+        # Column 0 is the row position so trends come out of the same matrix
+        self.covariance = PairwiseCovariance(len(self.columns) + 1, np.concatenate([[0.0], shift]))
+        self.sample = RowSample(len(self.columns), sample_rows)
+
+    def update(self, values: np.ndarray, row_offset: int) -> None:
+        """Fold a (rows, columns) float batch starting at global row ``row_offset``"""
+        n = len(values)
+        self.rows += n
+        self.moments.update(values)
+        for digest, column in zip(self.digests, values.T):
+            digest.update(column)
+        positions = np.arange(row_offset, row_offset + n, dtype=np.float64)[:, None]
+        self.covariance.update(np.hstack([positions, values]))
+        self.sample.update(values, row_offset)
+
+    def add_nulls(self, null_counts: Dict[str, int]) -> None:
+        for column, count in null_counts.items():
+            self.null_counts[column] = self.null_counts.get(column, 0) + int(count)
+
+    def merge(self, other: "StreamingProfile") -> None:
+        self.rows += other.rows
+        self.add_nulls(other.null_counts)
+        self.moments.merge(other.moments)
+        for digest, other_digest in zip(self.digests, other.digests):
+            digest.merge(other_digest)
+        self.covariance.merge(other.covariance)
+        self.sample.merge(other.sample)
+
+    def finalize(self, strong_correlation: float = STRONG_CORRELATION,
+                 trend_correlation: float = TREND_CORRELATION) -> Dict[str, Any]:
+        moments = self.moments
+        std = np.sqrt(moments.variance)
+        correlation = self.covariance.correlation()
+        covariance = self.covariance.covariance()
+
+        summary = {}
+        outliers = []
+        trends = []
+        for i, column in enumerate(self.columns):
+            digest = self.digests[i]
+            count = int(moments.count[i])
+            q1, median, q3 = (digest.quantile(q) for q in (0.25, 0.5, 0.75))
+            summary[column] = {
+                'count': count,
+                'mean': _number(moments.mean[i]) if count else None,
+                'std': _number(std[i]),
+                'min': _number(moments.min[i]) if count else None,
+                '25%': _number(q1),
+                '50%': _number(median),
+                '75%': _number(q3),
+                'max': _number(moments.max[i]) if count else None
+            }
+
+            if count:
+                iqr = q3 - q1
+                lower_bound = q1 - 1.5 * iqr
+                upper_bound = q3 + 1.5 * iqr
+                if moments.min[i] < lower_bound or moments.max[i] > upper_bound:
+                    fraction = digest.cdf(lower_bound) + 1.0 - digest.cdf(upper_bound)
+                    estimated = int(round(fraction * count))
+                    if estimated:
+                        outliers.append({
+                            'column': column,
+                            'count': estimated,
+                            'percentage': estimated / max(1, self.rows) * 100,
+                            'lower_bound': lower_bound,
+                            'upper_bound': upper_bound,
+                            'estimated': True
+                        })
+
+            trend_strength = correlation[_ROW_POSITION, i + 1]
+            if np.isfinite(trend_strength) and abs(trend_strength) > trend_correlation:
+                trends.append({
+                    'column': column,
+                    'trend': 'increasing' if trend_strength > 0 else 'decreasing',
+                    'strength': float(abs(trend_strength)),
+                    'slope_per_row': _number(covariance[_ROW_POSITION, i + 1] / covariance[_ROW_POSITION, _ROW_POSITION])
+                })
+
+        matrix = correlation[1:, 1:]
+        correlation_matrix = {
+            column: {other: _number(matrix[j, i]) for i, other in enumerate(self.columns)}
+            for j, column in enumerate(self.columns)
+        }
+        strong_correlations = []
+        for i in range(len(self.columns)):
+            for j in range(i + 1, len(self.columns)):
+                value = matrix[i, j]
+                if np.isfinite(value) and abs(value) > strong_correlation:
+                    strong_correlations.append({
+                        'var1': self.columns[i],
+                        'var2': self.columns[j],
+                        'correlation': float(value)
+                    })
+
+        missing_values = {column: int(self.null_counts.get(column, 0)) for column in self.all_columns}
+        for i, column in enumerate(self.columns):
+            missing_values[column] = int(self.rows - moments.count[i])
+
+        sample_positions, sample_values = self.sample.rows()
+
+        return {
+            'row_count': self.rows,
+            'column_count': len(self.all_columns),
+            'numeric_columns': list(self.columns),
+            'summary': summary,
+            'missing_values': missing_values,
+            'outliers': outliers,
+            'trends': trends,
+            'correlation_matrix': correlation_matrix,
+            'strong_correlations': strong_correlations,
+            'sample': {
+                'row_positions': sample_positions.tolist(),
+                'values': {column: [_number(v) for v in sample_values[:, i]] for i, column in enumerate(self.columns)}
+            }
+        }
+
+
+def _number(value: float) -> Optional[float]:
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def _profile_task(task: Tuple, columns: List[str], shift: np.ndarray, compression: int,
+                  all_columns: List[str]) -> StreamingProfile:
+    """Process-pool entry point: profile one batch or file slice"""
+    profile = StreamingProfile(columns, shift, compression, all_columns)
+    kind = task[0]
+    if kind == 'array':
+        _, values, row_offset, null_counts = task
+        profile.update(values, row_offset)
+        profile.add_nulls(null_counts)
+    elif kind == 'npy':
+        _, path, start, stop = task
+        array = np.load(path, mmap_mode='r')
+        values = np.asarray(array[start:stop], dtype=np.float64)
+        profile.update(values.reshape(len(values), -1), start)
+    elif kind == 'parquet':
+        _, path, row_group, row_offset = task
+        frame = _parquet_file(path).read_row_group(row_group, columns=all_columns).to_pandas()
+        values, null_counts = _frame_values(frame, columns)
+        profile.update(values, row_offset)
+        profile.add_nulls(null_counts)
+    else:
+        raise ValueError(f"Unknown profile task {kind}")
+    return profile
+
+
+def _frame_values(frame, columns: Sequence[str]) -> Tuple[np.ndarray, Dict[str, int]]:
+    """Numeric matrix for ``columns`` plus null counts of the other columns"""
+    import pandas as pd
+
+    numeric = frame.reindex(columns=list(columns))
+    if any(not pd.api.types.is_numeric_dtype(dtype) for dtype in numeric.dtypes):
+        numeric = numeric.apply(pd.to_numeric, errors='coerce')
+    values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+    others = [column for column in frame.columns if column not in set(columns)]
+    null_counts = frame[others].isna().sum().to_dict() if others else {}
+    return values, null_counts
+
+
+def _parquet_file(path: str):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ValueError("Parquet datasets require the optional 'pyarrow' package") from e
+    return pq.ParquetFile(path)
+
+
+class StreamingStatsEngine:
+    """Profiles datasets in bounded-memory batches, optionally across processes"""
+
+    def __init__(self, batch_rows: int = DEFAULT_BATCH_ROWS, max_workers: Optional[int] = None,
+                 compression: int = DEFAULT_COMPRESSION):
+        self.batch_rows = batch_rows
+        self.max_workers = max_workers if max_workers is not None else max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.compression = compression
+
+    async def profile_async(self, source: Any, columns: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """``profile`` in a worker thread so the event loop stays responsive"""
+        return await asyncio.to_thread(self.profile, source, columns)
+
+    def profile(self, source: Any, columns: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Single-pass profile of a DataFrame, ndarray, or CSV/Parquet/.npy path"""
+        schema, tasks = self._plan(source, columns)
+        numeric_columns, all_columns, data_types, shift = schema
+        profile = StreamingProfile(numeric_columns, shift, self.compression, all_columns)
+
+        # In-memory sources are profiled in-process; pickling them to workers costs more than it saves
+        from_file = not isinstance(source, np.ndarray) and not hasattr(source, 'iloc')
+        args = (numeric_columns, shift, self.compression, all_columns)
+        if from_file and self.max_workers > 1:
+            self._run_parallel(profile, tasks, args)
+        else:
+            for task in tasks:
+                profile.merge(_profile_task(task, *args))
+
+        result = profile.finalize()
+        result['data_types'] = data_types
+        return result
+
+    def _run_parallel(self, profile: StreamingProfile, tasks: Iterator[Tuple], args: Tuple) -> None:
+        tasks = iter(tasks)
+        first = next(tasks, None)
+        second = next(tasks, None)
+        if first is None:
+            return
+        if second is None:
+            # Single batch: not worth a process pool
+            profile.merge(_profile_task(first, *args))
+            return
+
+        pending = set()
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            for task in _chain(first, second, tasks):
+                # Bound in-flight batches so a fast reader can't outrun the pool
+                if len(pending) >= self.max_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        profile.merge(future.result())
+                pending.add(pool.submit(_profile_task, task, *args))
+            for future in pending:
+                profile.merge(future.result())
+
+    def _plan(self, source: Any, columns: Optional[Sequence[str]]):
+        import pandas as pd
+
+        if isinstance(source, pd.DataFrame):
+            return self._plan_frame_batches(self._frame_batches(source), columns)
+        if isinstance(source, np.ndarray):
+            return self._plan_array(source, None, columns)
+
+        path = Path(source)
+        suffix = path.suffix.lower()
+        if suffix == '.npy':
+            return self._plan_array(np.load(path, mmap_mode='r'), str(path), columns)
+        if suffix in ('.parquet', '.pq'):
+            return self._plan_parquet(str(path), columns)
+        if suffix in ('.csv', '.tsv', '.txt'):
+            reader = pd.read_csv(path, chunksize=self.batch_rows, sep='\t' if suffix == '.tsv' else ',')
+            return self._plan_frame_batches(reader, columns)
+        raise ValueError(f"Unsupported dataset source: {path.name}")
+
+    def _frame_batches(self, frame) -> Iterator:
+        for start in range(0, max(1, len(frame)), self.batch_rows):
+            yield frame.iloc[start:start + self.batch_rows]
+
+    def _plan_frame_batches(self, batches: Iterator, columns: Optional[Sequence[str]]):
+        import pandas as pd
+
+        batches = iter(batches)
+        first = next(batches, None)
+        if first is None:
+            first = pd.DataFrame()
+        numeric_columns = [
+            column for column in (columns or first.select_dtypes(include=[np.number]).columns)
+            if column in first.columns
+        ]
+        all_columns = list(first.columns)
+        data_types = {column: str(dtype) for column, dtype in first.dtypes.items()}
+        first_values, _ = _frame_values(first, numeric_columns)
+        shift = self._shift(first_values)
+
+        def tasks():
+            row_offset = 0
+            for frame in _chain(first, None, batches):
+                values, null_counts = _frame_values(frame, numeric_columns)
+                yield ('array', values, row_offset, null_counts)
+                row_offset += len(frame)
+
+        return (numeric_columns, all_columns, data_types, shift), tasks()
+
+    def _plan_array(self, array: np.ndarray, path: Optional[str], columns: Optional[Sequence[str]]):
+        if array.dtype.names:
+            raise ValueError("Structured arrays are not supported; save a 2-D numeric array")
+        width = 1 if array.ndim == 1 else int(np.prod(array.shape[1:]))
+        names = list(columns) if columns and len(columns) == width else [f"column_{i}" for i in range(width)]
+        rows = len(array)
+        head = np.asarray(array[:min(rows, self.batch_rows)], dtype=np.float64).reshape(-1, width)
+        shift = self._shift(head)
+        data_types = {name: str(array.dtype) for name in names}
+
+        def tasks():
+            for start in range(0, rows, self.batch_rows):
+                stop = min(rows, start + self.batch_rows)
+                if path is not None:
+                    # Workers map the file themselves; only offsets cross the process boundary
+                    yield ('npy', path, start, stop)
+                else:
+                    values = np.asarray(array[start:stop], dtype=np.float64).reshape(-1, width)
+                    yield ('array', values, start, {})
+
+        return (names, names, data_types, shift), tasks()
+
+    def _plan_parquet(self, path: str, columns: Optional[Sequence[str]]):
+        parquet = _parquet_file(path)
+        schema = parquet.schema_arrow
+        all_columns = list(schema.names)
+        import pyarrow.types as pat
+        numeric_columns = [
+            name for name in (columns or all_columns)
+            if name in all_columns and (pat.is_integer(schema.field(name).type)
+                                        or pat.is_floating(schema.field(name).type))
+        ]
+        data_types = {name: str(schema.field(name).type) for name in all_columns}
+        head = parquet.read_row_group(0, columns=numeric_columns).to_pandas() if parquet.num_row_groups else None
+        shift = self._shift(_frame_values(head, numeric_columns)[0]) if head is not None else np.zeros(len(numeric_columns))
+
+        def tasks():
+            row_offset = 0
+            for row_group in range(parquet.num_row_groups):
+                yield ('parquet', path, row_group, row_offset)
+                row_offset += parquet.metadata.row_group(row_group).num_rows
+
+        return (numeric_columns, all_columns, data_types, shift), tasks()
+
+    @staticmethod
+    def _shift(values: np.ndarray) -> np.ndarray:
+        if not values.size:
+            return np.zeros(values.shape[1] if values.ndim == 2 else 0)
+        mask = ~np.isnan(values)
+        counts = mask.sum(axis=0)
+        return np.where(counts > 0, np.where(mask, values, 0.0).sum(axis=0) / np.maximum(counts, 1), 0.0)
+
+
+def _chain(first, second, rest) -> Iterator:
+    yield first
+    if second is not None:
+        yield second
+    yield from rest
+
+
+class SpillingLRUCache:
+    """Size-bounded LRU mapping that spills evicted entries to disk.
+
+    Entries beyond ``max_items`` or ``max_memory_bytes`` (estimated from the
+    pickled size) move to ``spill_dir``; a lookup of a spilled key loads it
+    back into memory. The spill directory is itself capped at
+    ``max_spill_items`` files, oldest first. A spilling cache keeps each
+    entry's pickled form from sizing it, so spilling writes it without
+    pickling again. A temporary spill directory the cache created is removed
+    by ``close``, or when the cache is garbage collected or the process exits.
+    """
+
+    def __init__(self, max_items: int = 128, max_memory_bytes: int = 64 * 1024 * 1024,
+                 spill_dir: Optional[Union[str, Path]] = None, max_spill_items: int = 1024,
+                 spill: bool = True):
+        self.max_items = max_items
+        self.max_memory_bytes = max_memory_bytes
+        self.max_spill_items = max_spill_items
+        self.spill_enabled = spill
+        self._spill_dir = Path(spill_dir) if spill_dir else None
+        # key -> (value, pickled size, pickled bytes if the entry may spill)
+        self._memory: "OrderedDict[str, Tuple[Any, int, Optional[bytes]]]" = OrderedDict()
+        self._spilled: "OrderedDict[str, Path]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self._cleanup: Optional[weakref.finalize] = None
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'spills': 0, 'evictions': 0}
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._store(key, value, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            return key in self._memory or key in self._spilled
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._memory) + len(self._spilled)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[0]
+
+            path = self._spilled.pop(key, None)
+            if path is None:
+                self.stats['misses'] += 1
+                return default
+            try:
+                payload = path.read_bytes()
+                value = pickle.loads(payload)
+                path.unlink(missing_ok=True)
+            except (OSError, pickle.UnpicklingError) as e:
+                logger.warning(f"Dropping unreadable spilled cache entry {key}: {e}")
+                self.stats['misses'] += 1
+                return default
+            self.stats['disk_hits'] += 1
+            self._store(key, value, payload)
+        return value
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        with self._lock:
+            self._discard(key)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._spilled):
+                self._discard(key)
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def close(self) -> None:
+        """Clear the cache and remove a spill directory this cache created"""
+        self.clear()
+        if self._cleanup is not None:
+            self._cleanup()
+            self._cleanup = None
+            self._spill_dir = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'memory_items': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'spilled_items': len(self._spilled)
+            }
+
+    def _store(self, key: str, value: Any, payload: bytes) -> None:
+        with self._lock:
+            self._discard(key)
+            self._memory[key] = (value, len(payload), payload if self.spill_enabled else None)
+            self._memory_bytes += len(payload)
+            self._enforce_limits()
+
+    def _discard(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+        path = self._spilled.pop(key, None)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+    def _enforce_limits(self) -> None:
+        while self._memory and (len(self._memory) > self.max_items or self._memory_bytes > self.max_memory_bytes):
+            key, (_, size, payload) = self._memory.popitem(last=False)
+            self._memory_bytes -= size
+            if payload is not None:
+                self._spill(key, payload)
+            else:
+                self.stats['evictions'] += 1
+
+        while len(self._spilled) > self.max_spill_items:
+            _, path = self._spilled.popitem(last=False)
+            path.unlink(missing_ok=True)
+            self.stats['evictions'] += 1
+
+    def _spill(self, key: str, payload: bytes) -> None:
+        if self._spill_dir is None:
+            self._spill_dir = Path(tempfile.mkdtemp(prefix='dryad-cache-'))
+            self._cleanup = weakref.finalize(self, shutil.rmtree, str(self._spill_dir), True)
+        self._spill_dir.mkdir(parents=True, exist_ok=True)
+        path = self._spill_dir / f"{uuid.uuid4().hex}.pkl"
+        try:
+            path.write_bytes(payload)
+        except OSError as e:
+            logger.warning(f"Could not spill cache entry {key}: {e}")
+            self.stats['evictions'] += 1
+            return
+        self._spilled[key] = path
+        self.stats['spills'] += 1
+
+
+_MISSING = object()
@@ -0,0 +1,605 @@
+"""
+Streaming Text Analysis Engine
+
+Single-pass text analysis for the document processing service. A document is
+read incrementally (a string, a file, or an iterable of pages) and cut into
+bounded chunks on line boundaries. Each chunk is tokenized once with a
+precompiled pattern and handed to a set of pluggable accumulators that keep
+only running counts, so memory is bounded by the chunk size and the
+vocabulary rather than by the document.
+"""
+
+import asyncio
+import io
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+TextSource = Union[str, bytes, os.PathLike, io.IOBase, Iterable[str]]
+
+# Words (with inner apostrophes) and runs of sentence terminators
+_TOKEN_RE = re.compile(r"[A-Za-z0-9]+(?:'[A-Za-z]+)*|[.!?]+")
+_VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+
+# Runs of capitalized words; persons, organizations and multi-word places are
+# read off adjacent pairs. No leading \b: it defeats the regex prefix scan, so
+# word boundaries are checked on the (rare) matches instead.
+_CAPITALIZED_RUN_RE = re.compile(r"[A-Z][a-z]+(?: [A-Z][a-z]+)+\b")
+ORGANIZATION_SUFFIXES = frozenset({'Inc', 'Corp', 'Ltd', 'University', 'College', 'School'})
+KNOWN_LOCATIONS = frozenset({
+    'New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix', 'Philadelphia',
+    'San Antonio', 'San Diego', 'Dallas', 'San Jose'
+})
+_SINGLE_WORD_LOCATIONS = tuple(location for location in KNOWN_LOCATIONS if ' ' not in location)
+
+_URL_RE = re.compile(r"https?://[^\s<>\"')\]]+")
+_EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
+_DATE_CANDIDATE_RE = re.compile(r"\d{1,4}[/-]\d{1,2}[/-]\d{2,4}")
+_DATE_RE = re.compile(r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}[/-]\d{1,2}[/-]\d{1,2}")
+
+# Line classifiers, applied with ``match`` to one line at a time
+_MARKDOWN_HEADING_RE = re.compile(r"#{1,6}[ \t]+\S")
+_TITLE_LINE_RE = re.compile(r"[A-Z][^.!?]*$")
+_NUMBERED_LINE_RE = re.compile(r"\d+\.?[ \t]+\S")
+_BULLET_LINE_RE = re.compile(r"[ \t]*[-*+][ \t]+\S")
+_INDENTED_NUMBERED_LINE_RE = re.compile(r"[ \t]*\d+\.?[ \t]+\S")
+_NUMBERED_PREFIX_RE = re.compile(r"\d+\.?\s+")
+
+_PUNCTUATION_RE = re.compile(r"[.!?]")
+_DIGIT_RE = re.compile(r"\d")
+_SPECIAL_CHAR_RE = re.compile(r"[^a-zA-Z\s]")
+
+COMMON_WORDS = frozenset({'this', 'that', 'with', 'from', 'they', 'have', 'been', 'were', 'said'})
+KEYWORD_STOP_WORDS = COMMON_WORDS | {'each', 'which', 'their', 'time'}
+
+POSITIVE_WORDS = frozenset({'good', 'great', 'excellent', 'wonderful', 'amazing', 'fantastic'})
+NEGATIVE_WORDS = frozenset({'bad', 'terrible', 'awful', 'horrible', 'disgusting', 'worst'})
+
+CATEGORY_KEYWORDS = {
+    'academic': frozenset({'research', 'study', 'analysis', 'hypothesis', 'methodology', 'university'}),
+    'technical': frozenset({'algorithm', 'code', 'programming', 'software', 'system', 'database'}),
+    'business': frozenset({'market', 'revenue', 'profit', 'strategy', 'customer', 'business'}),
+    'creative': frozenset({'story', 'creative', 'imagination', 'art', 'design', 'artistic'}),
+    'news': frozenset({'reported', 'breaking', 'news', 'according', 'sources', 'yesterday'}),
+}
+
+# Function-word profiles; the share of tokens that are function words of a
+# language is a robust detector on anything longer than a sentence or two
+LANGUAGE_PROFILES = {
+    'en': frozenset({'the', 'and', 'is', 'in', 'to', 'of', 'a', 'that', 'it', 'with'}),
+    'es': frozenset({'el', 'la', 'de', 'que', 'y', 'en', 'los', 'se', 'del', 'las'}),
+    'fr': frozenset({'le', 'la', 'de', 'et', 'les', 'des', 'est', 'un', 'une', 'du'}),
+    'de': frozenset({'der', 'die', 'und', 'das', 'ist', 'nicht', 'den', 'mit', 'von', 'zu'}),
+}
+_LANGUAGE_THRESHOLD = 0.02
+
+
+@lru_cache(maxsize=65536)
+def count_syllables(word: str) -> int:
+    """Vowel-group syllable estimate for an English word"""
+    word = word.lower()
+    count = len(_VOWEL_GROUP_RE.findall(word))
+    if count > 1 and word.endswith('e') and not word.endswith(('le', 'ee')):
+        count -= 1
+    return max(1, count)
+
+
+def iter_text_chunks(source: TextSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Yield bounded chunks of ``source`` that end on line boundaries.
+
+    ``source`` may be a string, bytes, a path, an open file or an iterable of
+    strings (e.g. extracted pages). Only one chunk plus one partial line is
+    held at a time.
+    """
+    if isinstance(source, str):
+        yield from _split_string(source, chunk_size)
+        return
+    if isinstance(source, bytes):
+        yield from _split_string(source.decode('utf-8', errors='replace'), chunk_size)
+        return
+    if isinstance(source, os.PathLike):
+        with open(source, 'r', encoding='utf-8', errors='replace') as f:
+            yield from iter_text_chunks(f, chunk_size)
+        return
+    if hasattr(source, 'read'):
+        pieces: Iterable[str] = iter(lambda: source.read(chunk_size), '')
+    else:
+        pieces = source
+
+    pending = ''
+    for piece in pieces:
+        if isinstance(piece, bytes):
+            piece = piece.decode('utf-8', errors='replace')
+        pending += piece
+        if len(pending) < chunk_size:
+            continue
+        cut = _boundary(pending, len(pending))
+        yield pending[:cut]
+        pending = pending[cut:]
+    if pending:
+        yield pending
+
+
+def _split_string(text: str, chunk_size: int) -> Iterator[str]:
+    start = 0
+    n = len(text)
+    while start < n:
+        end = min(n, start + chunk_size)
+        if end < n:
+            end = start + _boundary(text[start:end], end - start)
+        yield text[start:end]
+        start = end
+
+
+def _boundary(text: str, limit: int) -> int:
+    """Cut point after the last newline, else the last space, else ``limit``"""
+    cut = text.rfind('\n', 0, limit)
+    if cut < 0:
+        cut = text.rfind(' ', 0, limit)
+    return cut + 1 if cut >= 0 else limit
+
+
+class TextChunk:
+    """One bounded slice of a document, tokenized once and shared by all accumulators"""
+
+    __slots__ = ('text', 'line_offset', 'tokens', '_counts', '_word_counts', '_lower_counts')
+
+    def __init__(self, text: str, line_offset: int):
+        self.text = text
+        self.line_offset = line_offset
+        self.tokens = _TOKEN_RE.findall(text)
+        self._counts: Optional[Counter] = None
+        self._word_counts: Optional[Dict[str, int]] = None
+        self._lower_counts: Optional[Counter] = None
+
+    @property
+    def counts(self) -> Counter:
+        """Token counts, terminators included"""
+        if self._counts is None:
+            self._counts = Counter(self.tokens)
+        return self._counts
+
+    @property
+    def word_counts(self) -> Dict[str, int]:
+        """Case-preserving counts of word tokens"""
+        if self._word_counts is None:
+            self._word_counts = {t: c for t, c in self.counts.items() if t[0] not in '.!?'}
+        return self._word_counts
+
+    @property
+    def lower_counts(self) -> Counter:
+        """Lower-cased word counts"""
+        if self._lower_counts is None:
+            lower: Counter = Counter()
+            for token, count in self.word_counts.items():
+                lower[token.lower()] += count
+            self._lower_counts = lower
+        return self._lower_counts
+
+    @property
+    def sentence_terminators(self) -> int:
+        return sum(c for t, c in self.counts.items() if t[0] in '.!?')
+
+
+class TextAccumulator:
+    """Base class for single-pass accumulators; subclasses set ``name``"""
+
+    name = 'accumulator'
+
+    def feed(self, chunk: TextChunk) -> None:
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+
+class BoundedCounter(Counter):
+    """Counter that keeps only its heaviest keys once it grows past ``capacity``"""
+
+    def __init__(self, capacity: int = 50000):
+        super().__init__()
+        self.capacity = capacity
+
+    def prune(self) -> None:
+        if len(self) > self.capacity * 2:
+            keep = self.most_common(self.capacity)
+            self.clear()
+            self.update(dict(keep))
+
+
+class TextStatisticsAccumulator(TextAccumulator):
+    """Characters, words, sentences, lines, paragraphs and readability"""
+
+    name = 'statistics'
+
+    def __init__(self):
+        self.characters = 0
+        self.words = 0
+        self.letters = 0
+        self.syllables = 0
+        self.sentences = 0
+        self.lines = 0
+        self.paragraph_breaks = 0
+        self._ends_with_newline = False
+
+    def feed(self, chunk: TextChunk) -> None:
+        text = chunk.text
+        self.characters += len(text)
+        self.lines += text.count('\n')
+        self.paragraph_breaks += text.count('\n\n')
+        if self._ends_with_newline and text.startswith('\n'):
+            self.paragraph_breaks += 1
+        self._ends_with_newline = text.endswith('\n')
+
+        self.sentences += chunk.sentence_terminators
+        for word, count in chunk.word_counts.items():
+            self.words += count
+            self.letters += len(word) * count
+            self.syllables += count_syllables(word) * count
+
+    def result(self) -> Dict[str, Any]:
+        lines = self.lines + (0 if self._ends_with_newline or not self.characters else 1)
+        words = max(1, self.words)
+        sentences = max(1, self.sentences)
+        avg_sentence_length = self.words / sentences
+        avg_word_length = self.letters / words
+        syllables_per_word = self.syllables / words
+
+        if self.words:
+            flesch_score = max(0.0, min(100.0, 206.835 - 1.015 * avg_sentence_length - 84.6 * syllables_per_word))
+            grade_level = max(1.0, min(18.0, 0.39 * avg_sentence_length + 11.8 * syllables_per_word - 15.59))
+        else:
+            flesch_score = grade_level = 0.0
+
+        return {
+            'character_count': self.characters,
+            'word_count': self.words,
+            'sentence_count': self.sentences,
+            'line_count': lines,
+            'paragraph_count': self.paragraph_breaks + 1 if self.characters else 0,
+            'readability': {
+                'flesch_score': flesch_score,
+                'grade_level': grade_level,
+                'avg_sentence_length': avg_sentence_length,
+                'avg_word_length': avg_word_length,
+                'avg_syllables_per_word': syllables_per_word
+            }
+        }
+
+
+class KeywordAccumulator(TextAccumulator):
+    """Frequencies of content words of four or more letters"""
+
+    name = 'keywords'
+
+    def __init__(self, capacity: int = 50000):
+        self.counts = BoundedCounter(capacity)
+
+    def feed(self, chunk: TextChunk) -> None:
+        counts = self.counts
+        for word, count in chunk.lower_counts.items():
+            if len(word) >= 4 and word.isalpha() and word not in COMMON_WORDS:
+                counts[word] += count
+        counts.prune()
+
+    def top(self, limit: int = 10, exclude: Sequence[str] = ()) -> List[Dict[str, Any]]:
+        ranked = [(w, c) for w, c in self.counts.most_common(limit + len(exclude)) if w not in exclude][:limit]
+        peak = max(1, ranked[0][1]) if ranked else 1
+        return [{'keyword': word, 'frequency': freq, 'score': freq / peak} for word, freq in ranked]
+
+    def result(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {
+            'keywords': self.top(10, tuple(KEYWORD_STOP_WORDS - COMMON_WORDS)),
+            'topics': self.top(10)
+        }
+
+
+class SentimentAccumulator(TextAccumulator):
+    """Lexicon sentiment from positive and negative word counts"""
+
+    name = 'sentiment'
+
+    def __init__(self):
+        self.positive = 0
+        self.negative = 0
+        self.words = 0
+
+    def feed(self, chunk: TextChunk) -> None:
+        for word, count in chunk.lower_counts.items():
+            self.words += count
+            if word in POSITIVE_WORDS:
+                self.positive += count
+            elif word in NEGATIVE_WORDS:
+                self.negative += count
+
+    def result(self) -> Dict[str, Any]:
+        positive_score = self.positive / max(1, self.words)
+        negative_score = self.negative / max(1, self.words)
+        if positive_score > negative_score:
+            sentiment = 'positive'
+        elif negative_score > positive_score:
+            sentiment = 'negative'
+        else:
+            sentiment = 'neutral'
+        return {
+            'sentiment': sentiment,
+            'positive_score': positive_score,
+            'negative_score': negative_score,
+            'confidence': abs(positive_score - negative_score) * 10
+        }
+
+
+class EntityAccumulator(TextAccumulator):
+    """Pattern-based entity candidates ranked by frequency"""
+
+    name = 'entities'
+
+    _LIMITS = (('PERSON', 5, 0.8), ('ORG', 3, 0.7), ('LOCATION', 3, 0.9))
+
+    def __init__(self, capacity: int = 10000):
+        self.candidates = {label: BoundedCounter(capacity) for label, _, _ in self._LIMITS}
+
+    def feed(self, chunk: TextChunk) -> None:
+        text = chunk.text
+        persons = self.candidates['PERSON']
+        organizations = self.candidates['ORG']
+        locations = self.candidates['LOCATION']
+
+        for match in _CAPITALIZED_RUN_RE.finditer(text):
+            start = match.start()
+            if start and (text[start - 1].isalnum() or text[start - 1] == '_'):
+                continue
+            words = match.group().split(' ')
+            # Persons pair up left to right without overlap, like a plain regex scan
+            for i in range(0, len(words) - 1, 2):
+                persons[f"{words[i]} {words[i + 1]}"] += 1
+            for first, second in zip(words, words[1:]):
+                pair = f"{first} {second}"
+                if second in ORGANIZATION_SUFFIXES:
+                    organizations[pair] += 1
+                if pair in KNOWN_LOCATIONS:
+                    locations[pair] += 1
+
+        word_counts = chunk.word_counts
+        for location in _SINGLE_WORD_LOCATIONS:
+            count = word_counts.get(location)
+            if count:
+                locations[location] += count
+
+        for counter in self.candidates.values():
+            counter.prune()
+
+    def result(self) -> List[Dict[str, Any]]:
+        entities = []
+        for label, limit, confidence in self._LIMITS:
+            for text, count in self.candidates[label].most_common(limit):
+                entities.append({'text': text, 'label': label, 'confidence': confidence, 'mentions': count})
+        return entities
+
+
+class LanguageAccumulator(TextAccumulator):
+    """Function-word language profile and character-class characteristics"""
+
+    name = 'language'
+
+    def __init__(self):
+        self.hits = {language: 0 for language in LANGUAGE_PROFILES}
+        self.words = 0
+        self.characteristics = {'has_punctuation': False, 'has_numbers': False, 'has_special_chars': False}
+
+    def feed(self, chunk: TextChunk) -> None:
+        lower_counts = chunk.lower_counts
+        self.words += sum(lower_counts.values())
+        for language, profile in LANGUAGE_PROFILES.items():
+            self.hits[language] += sum(lower_counts.get(word, 0) for word in profile)
+
+        characteristics = self.characteristics
+        for key, pattern in (('has_punctuation', _PUNCTUATION_RE), ('has_numbers', _DIGIT_RE),
+                             ('has_special_chars', _SPECIAL_CHAR_RE)):
+            if not characteristics[key] and pattern.search(chunk.text):
+                characteristics[key] = True
+
+    def result(self) -> Dict[str, Any]:
+        scores = {language: hits / max(1, self.words) for language, hits in self.hits.items()}
+        language, score = max(scores.items(), key=lambda x: x[1])
+        return {
+            'detected_language': language if score > _LANGUAGE_THRESHOLD else 'unknown',
+            'language_confidence': score,
+            'language_scores': scores,
+            'characteristics': dict(self.characteristics)
+        }
+
+
+class CategoryAccumulator(TextAccumulator):
+    """Keyword-presence content categorization"""
+
+    name = 'category'
+
+    def __init__(self):
+        self.seen = {category: set() for category in CATEGORY_KEYWORDS}
+
+    def feed(self, chunk: TextChunk) -> None:
+        lower_counts = chunk.lower_counts
+        for category, keywords in CATEGORY_KEYWORDS.items():
+            seen = self.seen[category]
+            if len(seen) < len(keywords):
+                seen.update(word for word in keywords if word in lower_counts)
+
+    def result(self) -> Dict[str, Any]:
+        categories = {category: len(seen) for category, seen in self.seen.items()}
+        primary_category = max(categories.items(), key=lambda x: x[1])
+        return {
+            'primary_category': primary_category[0] if primary_category[1] > 0 else 'general',
+            'category_scores': categories,
+            'confidence': primary_category[1] / max(1, sum(categories.values()))
+        }
+
+
+class StructureAccumulator(TextAccumulator):
+    """Headings, lists and sections detected line by line"""
+
+    name = 'structure'
+
+    def __init__(self, max_sections: int = 500):
+        self.max_sections = max_sections
+        self.heading_count = 0
+        self.list_count = 0
+        self.section_count = 0
+        self.sections: List[Dict[str, Any]] = []
+        self._current: Optional[Dict[str, Any]] = None
+
+    def feed(self, chunk: TextChunk) -> None:
+        line_number = chunk.line_offset
+        for line in chunk.text.split('\n'):
+            line_number += 1
+            stripped = line.strip()
+            if not stripped:
+                continue
+
+            first = line[0]
+            if first == '#' and _MARKDOWN_HEADING_RE.match(line):
+                self.heading_count += 1
+            elif 'A' <= first <= 'Z' and _TITLE_LINE_RE.match(line):
+                self.heading_count += 1
+            elif first.isdigit() and _NUMBERED_LINE_RE.match(line):
+                self.heading_count += 1
+            if stripped[0] in '-*+' and _BULLET_LINE_RE.match(line):
+                self.list_count += 1
+            elif stripped[0].isdigit() and _INDENTED_NUMBERED_LINE_RE.match(line):
+                self.list_count += 1
+
+            if len(stripped) < 100 and (stripped.isupper() or stripped.endswith(':')
+                                        or _NUMBERED_PREFIX_RE.match(stripped)):
+                self.section_count += 1
+                self._current = None
+                if len(self.sections) < self.max_sections:
+                    self._current = {
+                        'title': stripped,
+                        'line_number': line_number,
+                        'content_preview': '',
+                        'word_count': 0
+                    }
+                    self.sections.append(self._current)
+            elif self._current is not None:
+                if not self._current['content_preview']:
+                    self._current['content_preview'] = stripped[:100]
+                self._current['word_count'] += len(stripped.split())
+
+    def result(self) -> Dict[str, Any]:
+        headings = self.heading_count
+        lists = self.list_count
+        heading_ratio = headings / max(1, headings + lists)
+        if heading_ratio > 0.7:
+            structure_type = 'structured'
+        elif heading_ratio > 0.3:
+            structure_type = 'mixed'
+        else:
+            structure_type = 'narrative'
+        return {
+            'structure_analysis': {
+                'has_headings': headings > 0,
+                'heading_count': headings,
+                'has_lists': lists > 0,
+                'list_count': lists,
+                'structure_type': structure_type,
+                'complexity_score': min(1.0, (headings + lists) / 20)
+            },
+            'sections': self.sections,
+            'section_count': self.section_count
+        }
+
+
+class MetadataAccumulator(TextAccumulator):
+    """URLs, e-mail addresses and dates, capped per kind"""
+
+    name = 'metadata'
+
+    _KINDS = ('urls', 'emails', 'dates')
+
+    def __init__(self, max_items: int = 100):
+        self.max_items = max_items
+        self.items: Dict[str, List[str]] = {key: [] for key in self._KINDS}
+        self.counts = {key: 0 for key in self._KINDS}
+
+    def feed(self, chunk: TextChunk) -> None:
+        text = chunk.text
+        # Cheap substring guards skip whole chunks with no candidates
+        matches = {
+            'urls': _URL_RE.findall(text) if '://' in text else [],
+            'emails': _EMAIL_RE.findall(text) if '@' in text else [],
+            'dates': self._find_dates(text),
+        }
+        for key, found in matches.items():
+            self.counts[key] += len(found)
+            room = self.max_items - len(self.items[key])
+            if room > 0:
+                self.items[key].extend(found[:room])
+
+    @staticmethod
+    def _find_dates(text: str) -> List[str]:
+        dates = []
+        for match in _DATE_CANDIDATE_RE.finditer(text):
+            start, end = match.span()
+            if (start and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum()):
+                continue
+            if _DATE_RE.fullmatch(match.group()):
+                dates.append(match.group())
+        return dates
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            'references': [],
+            'citations': [],
+            **{key: list(values) for key, values in self.items.items()},
+            'counts': dict(self.counts)
+        }
+
+
+DEFAULT_ACCUMULATORS: Dict[str, Callable[[], TextAccumulator]] = {
+    TextStatisticsAccumulator.name: TextStatisticsAccumulator,
+    KeywordAccumulator.name: KeywordAccumulator,
+    SentimentAccumulator.name: SentimentAccumulator,
+    EntityAccumulator.name: EntityAccumulator,
+    LanguageAccumulator.name: LanguageAccumulator,
+    CategoryAccumulator.name: CategoryAccumulator,
+    StructureAccumulator.name: StructureAccumulator,
+    MetadataAccumulator.name: MetadataAccumulator,
+}
+
+
+class StreamingTextAnalyzer:
+    """Runs a set of accumulators over a document in one tokenization pass"""
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 accumulators: Optional[Dict[str, Callable[[], TextAccumulator]]] = None):
+        self.chunk_size = chunk_size
+        self.accumulators = dict(accumulators or DEFAULT_ACCUMULATORS)
+
+    def register(self, name: str, factory: Callable[[], TextAccumulator]) -> None:
+        """Add or replace an accumulator; results are keyed by ``name``"""
+        self.accumulators[name] = factory
+
+    def analyze(self, source: TextSource, include: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Analyze ``source`` with the selected accumulators (all by default)"""
+        names = list(include) if include is not None else list(self.accumulators)
+        unknown = [name for name in names if name not in self.accumulators]
+        if unknown:
+            raise ValueError(f"Unknown text accumulators: {', '.join(unknown)}")
+        active = {name: self.accumulators[name]() for name in names}
+
+        line_offset = 0
+        for text in iter_text_chunks(source, self.chunk_size):
+            chunk = TextChunk(text, line_offset)
+            for accumulator in active.values():
+                accumulator.feed(chunk)
+            line_offset += text.count('\n')
+
+        return {name: accumulator.result() for name, accumulator in active.items()}
+
+    async def analyze_async(self, source: TextSource, include: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """``analyze`` in a worker thread so large documents don't block the event loop"""
+        return await asyncio.to_thread(self.analyze, source, include)
@@ -19,13 +19,17 @@ import logging
 import json
 import uuid
 import hashlib
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import aiohttp
 import redis
 from pydantic import BaseModel, Field, validator
 import kubernetes
 from dryad.university.core.config import get_settings
 from dryad.university.core.logging import get_logger
+from dryad.university.services.tool_scheduler import (
+    AdmissionRejectedError,
+    ToolExecutionScheduler,
+    resolve_priority,
+)
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -659,7 +663,13 @@ class ToolExecutionEngine:
     def __init__(self):
         self.execution_queue = asyncio.Queue()
         self.active_executions: Dict[str, ToolExecution] = {}
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        self.scheduler = ToolExecutionScheduler(
+            max_concurrent_per_tool=getattr(settings, "TOOL_MAX_CONCURRENT_PER_TOOL", 4),
+            max_concurrent_per_agent=getattr(settings, "TOOL_MAX_CONCURRENT_PER_AGENT", 8),
+            max_concurrent_total=getattr(settings, "TOOL_MAX_CONCURRENT_TOTAL", 32),
+            max_queue_depth=getattr(settings, "TOOL_MAX_QUEUE_DEPTH", 1000),
+            pool_workers_per_class=getattr(settings, "TOOL_POOL_WORKERS_PER_CLASS", 4),
+        )
         self.redis_client = redis.Redis(
             host=getattr(settings, "REDIS_HOST", "localhost"),
             port=getattr(settings, "REDIS_PORT", 6379),
@@ -759,26 +769,25 @@ class ToolExecutionEngine:
                 del self.active_executions[execution_id]
     
     async def execute_multiple_tools(self, tool_requests: List[Dict[str, Any]], agent_context: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute multiple tool requests efficiently"""
+        """Execute multiple tool requests through the bounded scheduler"""
         try:
             results = []
+            group_id = str(uuid.uuid4())
             
             # Separate parallel and sequential execution requests
             parallel_requests = [req for req in tool_requests if req.get("execution_mode", "parallel") == "parallel"]
             sequential_requests = [req for req in tool_requests if req.get("execution_mode", "parallel") == "sequential"]
             
-            # Execute parallel requests
-            parallel_tasks = [
-                self.execute_tool(request, agent_context) 
-                for request in parallel_requests
-            ]
-            
-            parallel_results = await asyncio.gather(*parallel_tasks, return_exceptions=True)
+            # Execute parallel requests; the scheduler bounds concurrency per tool and agent
+            parallel_results = await self.submit_tool_batch(parallel_requests, agent_context, group_id)
             results.extend(parallel_results)
             
             # Execute sequential requests
             for request in sequential_requests:
-                result = await self.execute_tool(request, agent_context)
+                try:
+                    result = await self.submit_tool(request, agent_context, group_id)
+                except (AdmissionRejectedError, asyncio.TimeoutError) as e:
+                    result = e
                 results.append(result)
             
             return {
@@ -800,6 +809,55 @@ class ToolExecutionEngine:
                 "results": []
             }
     
+    async def submit_tool(self, tool_request: Dict[str, Any], agent_context: Dict[str, Any],
+                          group_id: Optional[str] = None) -> Dict[str, Any]:
+        """Execute a single tool request through the scheduler"""
+        return await self.scheduler.submit(
+            lambda: self.execute_tool(tool_request, agent_context),
+            **self._scheduling_spec(tool_request, agent_context, group_id)
+        )
+    
+    async def submit_tool_batch(self, tool_requests: List[Dict[str, Any]], agent_context: Dict[str, Any],
+                                group_id: Optional[str] = None) -> List[Any]:
+        """Execute tool requests concurrently through the scheduler"""
+        calls = []
+        for request in tool_requests:
+            spec = self._scheduling_spec(request, agent_context, group_id)
+            spec["call_factory"] = lambda request=request: self.execute_tool(request, agent_context)
+            calls.append(spec)
+        return await self.scheduler.submit_many(calls)
+    
+    async def run_sync_tool(self, tool_id: str, func, *args, use_process: bool = False) -> Any:
+        """Run a blocking tool function in the pool dedicated to its tool class"""
+        return await self.scheduler.run_blocking(
+            self._get_tool_class(tool_id), func, *args, use_process=use_process
+        )
+    
+    def get_scheduler_metrics(self) -> Dict[str, Any]:
+        """Get queue depth, wait time and concurrency metrics"""
+        return self.scheduler.get_metrics()
+    
+    def _scheduling_spec(self, tool_request: Dict[str, Any], agent_context: Dict[str, Any],
+                         group_id: Optional[str]) -> Dict[str, Any]:
+        """Derive scheduler admission parameters from a tool request"""
+        tool_id = tool_request.get("tool_id") or "unknown"
+        return {
+            "tool_id": tool_id,
+            "agent_id": agent_context.get("agent_id") or "anonymous",
+            "tool_class": self._get_tool_class(tool_id),
+            "priority": resolve_priority(tool_request.get("priority")),
+            "timeout": tool_request.get("timeout"),
+            "group_id": group_id,
+        }
+    
+    @staticmethod
+    def _get_tool_class(tool_id: str) -> str:
+        """Map a tool id onto its ToolType for pool and queue separation"""
+        for tool_type in ToolType:
+            if tool_id.startswith(tool_type.value):
+                return tool_type.value
+        return ToolType.CUSTOM.value
+    
     async def validate_tool_input(self, tool_id: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Validate input data for tool execution"""
         try:
@@ -984,31 +1042,35 @@ class ToolExecutionEngine:
     async def _store_execution_result(self, execution_id: str, execution: ToolExecution):
         """Store execution result in Redis"""
         try:
-            metrics_key = f"tool_metrics:{execution.tool_id}"
-            
-            # Update metrics
-            pipe = self.redis_client.pipeline()
-            pipe.hincrby(metrics_key, "total_executions", 1)
-            
-            if execution.status == ExecutionStatus.COMPLETED:
-                pipe.hincrby(metrics_key, "successful_executions", 1)
-                pipe.hset(metrics_key, "last_success", datetime.utcnow().isoformat())
-            else:
-                pipe.hincrby(metrics_key, "failed_executions", 1)
-                pipe.hset(metrics_key, "last_failure", datetime.utcnow().isoformat())
-            
-            if execution.execution_time:
-                # Update average execution time
-                current_avg = float(self.redis_client.hget(metrics_key, "average_execution_time") or 0)
-                total_executions = int(self.redis_client.hget(metrics_key, "total_executions") or 0)
-                new_avg = ((current_avg * (total_executions - 1)) + execution.execution_time) / total_executions
-                pipe.hset(metrics_key, "average_execution_time", str(new_avg))
-            
-            pipe.execute()
-            
+            # The Redis client is synchronous; keep its round trips off the event loop
+            await self.run_sync_tool(execution.tool_id, self._write_execution_metrics, execution)
         except Exception as e:
             logger.error(f"Error storing execution result: {str(e)}")
     
+    def _write_execution_metrics(self, execution: ToolExecution):
+        """Update the per-tool execution counters (runs in the tool class pool)"""
+        metrics_key = f"tool_metrics:{execution.tool_id}"
+        
+        # Update metrics
+        pipe = self.redis_client.pipeline()
+        pipe.hincrby(metrics_key, "total_executions", 1)
+        
+        if execution.status == ExecutionStatus.COMPLETED:
+            pipe.hincrby(metrics_key, "successful_executions", 1)
+            pipe.hset(metrics_key, "last_success", datetime.utcnow().isoformat())
+        else:
+            pipe.hincrby(metrics_key, "failed_executions", 1)
+            pipe.hset(metrics_key, "last_failure", datetime.utcnow().isoformat())
+        
+        if execution.execution_time:
+            # Update average execution time
+            current_avg = float(self.redis_client.hget(metrics_key, "average_execution_time") or 0)
+            total_executions = int(self.redis_client.hget(metrics_key, "total_executions") or 0) + 1
+            new_avg = ((current_avg * (total_executions - 1)) + execution.execution_time) / total_executions
+            pipe.hset(metrics_key, "average_execution_time", str(new_avg))
+        
+        pipe.execute()
+    
     async def _log_error_event(self, tool_id: str, error: Exception, error_handling: Dict[str, Any]):
         """Log error event for monitoring"""
         try:
@@ -1049,17 +1111,20 @@ class ToolOrchestrator:
             
             for stage in execution_plan["stages"]:
                 if stage["execution_mode"] == "parallel":
-                    # Execute tools in parallel
-                    parallel_tasks = [
-                        self.execution_engine.execute_tool(request, {"agent_id": orchestration_id})
-                        for request in stage["requests"]
-                    ]
-                    stage_results = await asyncio.gather(*parallel_tasks, return_exceptions=True)
+                    # Execute tools in parallel, bounded by the scheduler
+                    stage_results = await self.execution_engine.submit_tool_batch(
+                        stage["requests"], {"agent_id": orchestration_id}, group_id=orchestration_id
+                    )
                     execution_results.extend(stage_results)
                 else:
                     # Execute tools sequentially
                     for request in stage["requests"]:
-                        result = await self.execution_engine.execute_tool(request, {"agent_id": orchestration_id})
+                        try:
+                            result = await self.execution_engine.submit_tool(
+                                request, {"agent_id": orchestration_id}, group_id=orchestration_id
+                            )
+                        except (AdmissionRejectedError, asyncio.TimeoutError) as e:
+                            result = e
                         execution_results.append(result)
             
             orchestration_summary = {
@@ -1095,6 +1160,9 @@ class ToolOrchestrator:
             parallel_requests = [req for req in tool_requests if req.get("execution_mode", "parallel") == "parallel"]
             sequential_requests = [req for req in tool_requests if req.get("execution_mode", "parallel") == "sequential"]
             
+            # Higher priority requests are admitted to the scheduler first
+            parallel_requests.sort(key=lambda req: resolve_priority(req.get("priority")))
+            
             if parallel_requests:
                 stages.append({
                     "execution_mode": "parallel",
@@ -0,0 +1,469 @@
+"""
+Tool Execution Scheduler
+========================
+
+Bounded, priority-aware scheduler that sits between the tool orchestration
+layer and the individual tool executors. Every tool call is admitted into a
+per-tool priority queue and dispatched only when its tool, its agent and the
+scheduler as a whole are below their concurrency caps, so one slow tool can
+no longer starve the rest and large plans no longer create hundreds of tasks
+at once.
+
+Author: Dryad University System
+Date: 2025-10-30
+"""
+
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from collections import defaultdict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import IntEnum
+import asyncio
+import heapq
+import itertools
+import time
+import uuid
+
+from dryad.university.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class SchedulingPriority(IntEnum):
+    """Dispatch priority for tool calls (lower value runs first)"""
+    CRITICAL = 0
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a tool call cannot be admitted into the scheduler"""
+
+    def __init__(self, tool_id: str, reason: str):
+        self.tool_id = tool_id
+        self.reason = reason
+        super().__init__(f"Tool call for {tool_id} rejected: {reason}")
+
+
+def resolve_priority(value: Any) -> int:
+    """Coerce a request priority (enum, int or name) into a scheduler priority"""
+    if isinstance(value, str):
+        return int(SchedulingPriority.__members__.get(value.upper(), SchedulingPriority.NORMAL))
+    if value is None:
+        return int(SchedulingPriority.NORMAL)
+    return int(value)
+
+
+@dataclass(order=True)
+class ScheduledToolCall:
+    """A queued tool call; ordering is (priority, deadline, sequence)"""
+    sort_key: Tuple[int, float, int]
+    ticket_id: str = field(compare=False)
+    tool_id: str = field(compare=False)
+    agent_id: str = field(compare=False)
+    tool_class: str = field(compare=False)
+    group_id: Optional[str] = field(compare=False)
+    deadline: Optional[float] = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    call_factory: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    task: Optional[asyncio.Task] = field(default=None, compare=False)
+    timer: Optional[asyncio.TimerHandle] = field(default=None, compare=False)
+
+
+def _record_prometheus(tool_id: str, queue_depth: int, wait_time: Optional[float] = None) -> None:
+    """Export queue metrics when the Prometheus middleware is available"""
+    try:
+        from dryad.university.middleware.metrics import record_tool_queue_metrics
+    except ImportError:
+        return
+    record_tool_queue_metrics(tool_id, queue_depth, wait_time)
+
+
+class ToolExecutionScheduler:
+    """Priority scheduler with per-tool/per-agent caps and deadline-aware admission"""
+
+    _WAIT_SAMPLES = 512
+    _EWMA_ALPHA = 0.2
+
+    def __init__(
+        self,
+        max_concurrent_per_tool: int = 4,
+        max_concurrent_per_agent: int = 8,
+        max_concurrent_total: int = 32,
+        max_queue_depth: int = 1000,
+        pool_workers_per_class: int = 4,
+        default_service_time: float = 1.0,
+        tool_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.max_concurrent_per_tool = max_concurrent_per_tool
+        self.max_concurrent_per_agent = max_concurrent_per_agent
+        self.max_concurrent_total = max_concurrent_total
+        self.max_queue_depth = max_queue_depth
+        self.pool_workers_per_class = pool_workers_per_class
+        self.default_service_time = default_service_time
+        self.tool_limits: Dict[str, int] = dict(tool_limits or {})
+
+        self._queues: Dict[str, List[ScheduledToolCall]] = defaultdict(list)
+        self._pending: Dict[str, ScheduledToolCall] = {}
+        self._running: Dict[str, ScheduledToolCall] = {}
+        self._running_per_tool: Dict[str, int] = defaultdict(int)
+        self._running_per_agent: Dict[str, int] = defaultdict(int)
+        self._sequence = itertools.count()
+
+        self._service_time_ewma: Dict[str, float] = {}
+        self._wait_times: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self._WAIT_SAMPLES))
+        self._counters: Dict[str, int] = defaultdict(int)
+
+        self._thread_pools: Dict[str, ThreadPoolExecutor] = {}
+        self._process_pools: Dict[str, ProcessPoolExecutor] = {}
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+
+    def submit_nowait(
+        self,
+        call_factory: Callable[[], Awaitable[Any]],
+        tool_id: str,
+        agent_id: str,
+        tool_class: str = "custom",
+        priority: int = SchedulingPriority.NORMAL,
+        timeout: Optional[float] = None,
+        group_id: Optional[str] = None,
+    ) -> asyncio.Future:
+        """Admit a tool call and return a future for its result.
+
+        ``call_factory`` is only invoked once the call is dispatched, so
+        rejected or cancelled calls never create a coroutine.
+        """
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        deadline = now + timeout if timeout is not None else None
+
+        self._admit(tool_id, now, deadline)
+
+        ticket_id = str(uuid.uuid4())
+        future = loop.create_future()
+        deadline_key = deadline if deadline is not None else float("inf")
+        entry = ScheduledToolCall(
+            sort_key=(resolve_priority(priority), deadline_key, next(self._sequence)),
+            ticket_id=ticket_id,
+            tool_id=tool_id,
+            agent_id=agent_id or "anonymous",
+            tool_class=tool_class,
+            group_id=group_id,
+            deadline=deadline,
+            enqueued_at=now,
+            call_factory=call_factory,
+            future=future,
+        )
+        future.add_done_callback(lambda f, e=entry: self._on_future_done(e, f))
+
+        heapq.heappush(self._queues[tool_id], entry)
+        self._pending[ticket_id] = entry
+        if timeout is not None:
+            # Expire the call while it is still queued, even if nothing else dispatches
+            entry.timer = loop.call_later(timeout, self._expire, entry)
+        self._counters["admitted"] += 1
+        _record_prometheus(tool_id, len(self._queues[tool_id]))
+
+        self._dispatch()
+        return future
+
+    async def submit(self, call_factory: Callable[[], Awaitable[Any]], tool_id: str, agent_id: str, **kwargs) -> Any:
+        """Admit a tool call and wait for its result.
+
+        Cancelling the awaiting task cancels the queued or running call.
+        """
+        return await self.submit_nowait(call_factory, tool_id, agent_id, **kwargs)
+
+    async def submit_many(self, calls: List[Dict[str, Any]]) -> List[Any]:
+        """Submit a batch of calls; results mirror ``gather(return_exceptions=True)``"""
+        futures: List[asyncio.Future] = []
+        results: List[Any] = [None] * len(calls)
+        positions: List[int] = []
+
+        for index, call in enumerate(calls):
+            spec = dict(call)
+            call_factory = spec.pop("call_factory")
+            try:
+                futures.append(self.submit_nowait(call_factory, **spec))
+                positions.append(index)
+            except AdmissionRejectedError as e:
+                results[index] = e
+
+        try:
+            gathered = await asyncio.gather(*futures, return_exceptions=True)
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+
+        for index, result in zip(positions, gathered):
+            results[index] = result
+        return results
+
+    def cancel(self, ticket_id: str) -> bool:
+        """Cancel a single queued or running call"""
+        entry = self._pending.get(ticket_id) or self._running.get(ticket_id)
+        if entry is None:
+            return False
+        return entry.future.cancel()
+
+    def cancel_group(self, group_id: str) -> int:
+        """Cancel every queued or running call that belongs to a group"""
+        cancelled = 0
+        for entry in list(self._pending.values()) + list(self._running.values()):
+            if entry.group_id == group_id and entry.future.cancel():
+                cancelled += 1
+        return cancelled
+
+    def cancel_agent(self, agent_id: str) -> int:
+        """Cancel every queued or running call issued by an agent"""
+        cancelled = 0
+        for entry in list(self._pending.values()) + list(self._running.values()):
+            if entry.agent_id == agent_id and entry.future.cancel():
+                cancelled += 1
+        return cancelled
+
+    # ------------------------------------------------------------------
+    # Worker pools for blocking tools
+    # ------------------------------------------------------------------
+
+    def get_executor(self, tool_class: str, use_process: bool = False) -> Executor:
+        """Return the dedicated thread or process pool for a tool class"""
+        pools = self._process_pools if use_process else self._thread_pools
+        executor = pools.get(tool_class)
+        if executor is None:
+            if use_process:
+                executor = ProcessPoolExecutor(max_workers=self.pool_workers_per_class)
+            else:
+                executor = ThreadPoolExecutor(
+                    max_workers=self.pool_workers_per_class,
+                    thread_name_prefix=f"tool-{tool_class}",
+                )
+            pools[tool_class] = executor
+        return executor
+
+    async def run_blocking(self, tool_class: str, func: Callable[..., Any], *args, use_process: bool = False) -> Any:
+        """Run a synchronous tool function in its tool class pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.get_executor(tool_class, use_process), func, *args)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Cancel outstanding calls and shut down the worker pools"""
+        for entry in list(self._pending.values()) + list(self._running.values()):
+            entry.future.cancel()
+        for executor in list(self._thread_pools.values()) + list(self._process_pools.values()):
+            executor.shutdown(wait=wait, cancel_futures=True)
+        self._thread_pools.clear()
+        self._process_pools.clear()
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, wait time and concurrency per tool"""
+        tools = set(self._queues) | set(self._running_per_tool) | set(self._wait_times)
+        per_tool = {}
+        for tool_id in sorted(tools):
+            waits = sorted(self._wait_times.get(tool_id, ()))
+            per_tool[tool_id] = {
+                "queue_depth": len(self._queues.get(tool_id, ())),
+                "running": self._running_per_tool.get(tool_id, 0),
+                "concurrency_limit": self._tool_limit(tool_id),
+                "wait_time_p50": self._percentile(waits, 0.50),
+                "wait_time_p95": self._percentile(waits, 0.95),
+                "estimated_service_time": self._service_time_ewma.get(tool_id, self.default_service_time),
+            }
+
+        return {
+            "queue_depth": len(self._pending),
+            "running": len(self._running),
+            "admitted": self._counters["admitted"],
+            "completed": self._counters["completed"],
+            "failed": self._counters["failed"],
+            "cancelled": self._counters["cancelled"],
+            "rejected": self._counters["rejected"],
+            "expired": self._counters["expired"],
+            "tools": per_tool,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _tool_limit(self, tool_id: str) -> int:
+        return self.tool_limits.get(tool_id, self.max_concurrent_per_tool)
+
+    def _admit(self, tool_id: str, now: float, deadline: Optional[float]) -> None:
+        """Reject calls that cannot possibly finish before their deadline"""
+        if len(self._pending) >= self.max_queue_depth:
+            self._counters["rejected"] += 1
+            raise AdmissionRejectedError(tool_id, "scheduler queue is full")
+
+        if deadline is None:
+            return
+
+        service_time = self._service_time_ewma.get(tool_id, self.default_service_time)
+        waves_ahead = len(self._queues.get(tool_id, ())) // max(1, self._tool_limit(tool_id))
+        expected_finish = now + (waves_ahead + 1) * service_time
+        if deadline <= now or (tool_id in self._service_time_ewma and expected_finish > deadline):
+            self._counters["rejected"] += 1
+            raise AdmissionRejectedError(
+                tool_id,
+                f"expected completion in {expected_finish - now:.2f}s exceeds deadline",
+            )
+
+    def _dispatch(self) -> None:
+        """Start queued calls while the concurrency caps allow it"""
+        while len(self._running) < self.max_concurrent_total:
+            best: Optional[ScheduledToolCall] = None
+            for tool_id, queue in self._queues.items():
+                if not queue or self._running_per_tool[tool_id] >= self._tool_limit(tool_id):
+                    continue
+                head = self._peek_live(queue)
+                if head is None:
+                    continue
+                if self._agent_capped(head.agent_id):
+                    # Look past calls from agents at their cap instead of stalling the tool
+                    now = time.monotonic()
+                    head = min(
+                        (entry for entry in queue
+                         if not entry.future.done()
+                         and (entry.deadline is None or entry.deadline > now)
+                         and not self._agent_capped(entry.agent_id)),
+                        default=None,
+                    )
+                    if head is None:
+                        continue
+                if best is None or head.sort_key < best.sort_key:
+                    best = head
+            if best is None:
+                break
+            self._remove_queued(best)
+            self._start(best)
+
+        for tool_id in [t for t, q in self._queues.items() if not q]:
+            del self._queues[tool_id]
+
+    def _agent_capped(self, agent_id: str) -> bool:
+        return self._running_per_agent.get(agent_id, 0) >= self.max_concurrent_per_agent
+
+    def _peek_live(self, queue: List[ScheduledToolCall]) -> Optional[ScheduledToolCall]:
+        """Drop finished or overdue heads and return the first live entry"""
+        now = time.monotonic()
+        while queue:
+            head = queue[0]
+            if head.future.done():
+                heapq.heappop(queue)
+                continue
+            if head.deadline is not None and head.deadline <= now:
+                # The deadline timer has not fired yet
+                self._expire(head)
+                continue
+            return head
+        return None
+
+    def _remove_queued(self, entry: ScheduledToolCall) -> None:
+        """Take an entry out of its tool queue, wherever it sits in the heap"""
+        queue = self._queues.get(entry.tool_id)
+        if not queue:
+            return
+        if queue[0] is entry:
+            heapq.heappop(queue)
+            return
+        for index, queued in enumerate(queue):
+            if queued is entry:
+                queue[index] = queue[-1]
+                queue.pop()
+                if index < len(queue):
+                    heapq.heapify(queue)
+                return
+
+    def _expire(self, entry: ScheduledToolCall) -> None:
+        """Fail a call whose deadline passed while it was still queued"""
+        if self._pending.pop(entry.ticket_id, None) is None:
+            return
+        self._remove_queued(entry)
+        if entry.timer is not None:
+            entry.timer.cancel()
+        self._counters["expired"] += 1
+        _record_prometheus(entry.tool_id, len(self._queues.get(entry.tool_id, ())))
+        if not entry.future.done():
+            entry.future.set_exception(asyncio.TimeoutError(
+                f"Tool call for {entry.tool_id} expired after waiting {time.monotonic() - entry.enqueued_at:.2f}s"
+            ))
+
+    def _start(self, entry: ScheduledToolCall) -> None:
+        now = time.monotonic()
+        wait_time = now - entry.enqueued_at
+        self._wait_times[entry.tool_id].append(wait_time)
+        _record_prometheus(entry.tool_id, len(self._queues.get(entry.tool_id, ())), wait_time)
+
+        self._pending.pop(entry.ticket_id, None)
+        if entry.timer is not None:
+            entry.timer.cancel()
+        self._running[entry.ticket_id] = entry
+        self._running_per_tool[entry.tool_id] += 1
+        self._running_per_agent[entry.agent_id] += 1
+        entry.task = asyncio.ensure_future(self._run(entry, now))
+
+    async def _run(self, entry: ScheduledToolCall, started_at: float) -> None:
+        try:
+            call = entry.call_factory()
+            if entry.deadline is not None:
+                result = await asyncio.wait_for(call, timeout=max(0.0, entry.deadline - started_at))
+            else:
+                result = await call
+            if not entry.future.done():
+                entry.future.set_result(result)
+            self._counters["completed"] += 1
+        except asyncio.CancelledError:
+            if not entry.future.done():
+                entry.future.cancel()
+        except Exception as e:
+            if not entry.future.done():
+                entry.future.set_exception(e)
+            self._counters["failed"] += 1
+        finally:
+            elapsed = time.monotonic() - started_at
+            previous = self._service_time_ewma.get(entry.tool_id)
+            self._service_time_ewma[entry.tool_id] = (
+                elapsed if previous is None
+                else (1 - self._EWMA_ALPHA) * previous + self._EWMA_ALPHA * elapsed
+            )
+            self._running.pop(entry.ticket_id, None)
+            self._running_per_tool[entry.tool_id] -= 1
+            self._running_per_agent[entry.agent_id] -= 1
+            if self._running_per_tool[entry.tool_id] <= 0:
+                del self._running_per_tool[entry.tool_id]
+            if self._running_per_agent[entry.agent_id] <= 0:
+                del self._running_per_agent[entry.agent_id]
+            self._dispatch()
+
+    def _on_future_done(self, entry: ScheduledToolCall, future: asyncio.Future) -> None:
+        """Propagate caller-side cancellation to queued or running calls"""
+        if not future.cancelled():
+            return
+        self._counters["cancelled"] += 1
+        if entry.timer is not None:
+            entry.timer.cancel()
+        if self._pending.pop(entry.ticket_id, None) is not None:
+            # Drop it from the heap now so queue depth and admission estimates stay accurate
+            self._remove_queued(entry)
+            if not self._queues.get(entry.tool_id):
+                self._queues.pop(entry.tool_id, None)
+            return
+        if entry.task is not None and not entry.task.done():
+            entry.task.cancel()
+
+    @staticmethod
+    def _percentile(sorted_values: List[float], quantile: float) -> float:
+        if not sorted_values:
+            return 0.0
+        index = min(len(sorted_values) - 1, int(quantile * len(sorted_values)))
+        return sorted_values[index]
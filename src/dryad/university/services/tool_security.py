@@ -20,6 +20,7 @@ import json
 import uuid
 import hashlib
 import hmac
+import time
 import base64
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
@@ -27,6 +28,7 @@ from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import jwt
 from dryad.university.core.config import get_settings
 from dryad.university.core.logging import get_logger
+from dryad.university.services.audit_store import AuditSegmentStore, get_audit_store
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -744,11 +746,19 @@ class ToolAccessControl:
 
 
 class AuditLogger:
-    """Comprehensive audit logging system"""
+    """Comprehensive audit logging system backed by an append-only segment store"""
     
-    def __init__(self):
-        self.log_storage = {}
-        self.retention_policies = {}
+    HIGH_RISK_THRESHOLD = 0.7
+    
+    def __init__(self, store: Optional[AuditSegmentStore] = None):
+        self.store = store or get_audit_store(
+            directory=getattr(settings, "AUDIT_LOG_DIR", "./audit_logs"),
+            max_segment_bytes=getattr(settings, "AUDIT_SEGMENT_MAX_BYTES", 64 * 1024 * 1024),
+            max_segment_age=getattr(settings, "AUDIT_SEGMENT_MAX_AGE_SECONDS", 3600),
+            retention_days=getattr(settings, "AUDIT_RETENTION_DAYS", 365),
+            queue_size=getattr(settings, "AUDIT_QUEUE_SIZE", 10000),
+        )
+        self.retention_policies = {"retention_days": self.store.retention_seconds / 86400}
         self.encryption_enabled = True
         
     async def log_security_event(self, event_data: Dict[str, Any]) -> str:
@@ -771,36 +781,171 @@ class AuditLogger:
         if self.encryption_enabled:
             audit_entry = await self._encrypt_audit_entry(audit_entry)
         
-        # Store audit entry
-        self.log_storage[log_id] = audit_entry
+        # Hand off to the segment writer; never blocks the caller
+        self.store.append({
+            "ts": time.time(),
+            "log_id": audit_entry.log_id,
+            "timestamp": audit_entry.timestamp.isoformat(),
+            "user_id": audit_entry.user_id,
+            "agent_id": event_data.get("agent_id") or audit_entry.user_id,
+            "tool_id": audit_entry.tool_id,
+            "action": audit_entry.action,
+            "resource": audit_entry.resource,
+            "outcome": audit_entry.outcome,
+            "risk_score": audit_entry.risk_score,
+            "metadata": audit_entry.metadata,
+        })
         
         return log_id
     
     async def generate_audit_report(self, time_period: str, filters: Dict[str, Any]) -> Dict[str, Any]:
         """Generate comprehensive audit report"""
-        # Filter logs by time period and criteria
-        filtered_logs = await self._filter_audit_logs(time_period, filters)
+        # Stream matching logs from the relevant segments only
+        log_summary = await asyncio.to_thread(self._summarize_audit_logs, time_period, filters)
         
         # Analyze security trends
-        security_trends = await self._analyze_security_trends(filtered_logs)
+        security_trends = await self._analyze_security_trends(log_summary)
         
         # Identify compliance issues
-        compliance_issues = await self._identify_compliance_issues(filtered_logs)
+        compliance_issues = await self._identify_compliance_issues(log_summary)
         
         # Generate insights
-        insights = await self._generate_audit_insights(filtered_logs, security_trends)
+        insights = await self._generate_audit_insights(log_summary, security_trends)
         
         return {
             "report_id": str(uuid.uuid4()),
             "time_period": time_period,
             "filters": filters,
-            "log_count": len(filtered_logs),
+            "log_count": log_summary["log_count"],
             "security_trends": security_trends,
             "compliance_issues": compliance_issues,
             "insights": insights,
             "recommendations": await self._generate_audit_recommendations(security_trends, compliance_issues)
         }
     
+    async def flush(self) -> bool:
+        """Wait until every logged event is durably written"""
+        return await asyncio.to_thread(self.store.flush)
+    
+    async def apply_retention(self) -> int:
+        """Remove audit segments older than the retention policy"""
+        return await asyncio.to_thread(self.store.compact)
+    
+    def _summarize_audit_logs(self, time_period: str, filters: Dict[str, Any]) -> Dict[str, Any]:
+        """Aggregate matching audit records in a single streaming pass"""
+        end_ts = time.time()
+        start_ts = end_ts - self._parse_time_period(time_period).total_seconds()
+        action = filters.get("action")
+        outcome = filters.get("outcome")
+        min_risk = filters.get("min_risk_score")
+        
+        summary = {
+            "log_count": 0,
+            "by_action": {},
+            "by_outcome": {},
+            "by_tool": {},
+            "by_day": {},
+            "high_risk_events": 0,
+            "risk_total": 0.0,
+        }
+        
+        records = self.store.scan(
+            start_ts=start_ts,
+            end_ts=end_ts,
+            agent_id=filters.get("agent_id"),
+            tool_id=filters.get("tool_id"),
+        )
+        for record in records:
+            if action is not None and record.get("action") != action:
+                continue
+            if outcome is not None and record.get("outcome") != outcome:
+                continue
+            risk_score = float(record.get("risk_score") or 0.0)
+            if min_risk is not None and risk_score < min_risk:
+                continue
+            
+            summary["log_count"] += 1
+            summary["risk_total"] += risk_score
+            if risk_score >= self.HIGH_RISK_THRESHOLD:
+                summary["high_risk_events"] += 1
+            for key, value in (
+                ("by_action", record.get("action")),
+                ("by_outcome", record.get("outcome")),
+                ("by_tool", record.get("tool_id")),
+                ("by_day", record.get("timestamp", "")[:10]),
+            ):
+                summary[key][value] = summary[key].get(value, 0) + 1
+        
+        return summary
+    
+    @staticmethod
+    def _parse_time_period(time_period: str) -> timedelta:
+        """Parse periods such as '24h', '7d', 'last_30_days' or 'current_month'"""
+        period = (time_period or "").strip().lower()
+        named = {
+            "last_hour": timedelta(hours=1),
+            "last_24_hours": timedelta(days=1),
+            "last_7_days": timedelta(days=7),
+            "last_30_days": timedelta(days=30),
+            "current_month": timedelta(days=datetime.utcnow().day),
+        }
+        if period in named:
+            return named[period]
+        units = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+        if period[:-1].isdigit() and period[-1:] in units:
+            return timedelta(**{units[period[-1]]: int(period[:-1])})
+        return timedelta(days=30)
+    
+    async def _analyze_security_trends(self, log_summary: Dict[str, Any]) -> Dict[str, Any]:
+        """Analyze security trends from aggregated logs"""
+        log_count = log_summary["log_count"]
+        failures = sum(
+            count for outcome, count in log_summary["by_outcome"].items()
+            if outcome in ("failure", "failed", "denied", "blocked")
+        )
+        return {
+            "events_per_day": dict(sorted(log_summary["by_day"].items())),
+            "failure_rate": failures / log_count if log_count else 0.0,
+            "average_risk_score": log_summary["risk_total"] / log_count if log_count else 0.0,
+            "high_risk_events": log_summary["high_risk_events"],
+            "most_used_tools": sorted(log_summary["by_tool"].items(), key=lambda kv: kv[1], reverse=True)[:10]
+        }
+    
+    async def _identify_compliance_issues(self, log_summary: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Identify compliance issues from aggregated logs"""
+        issues = []
+        if log_summary["high_risk_events"]:
+            issues.append({
+                "issue": "high_risk_activity",
+                "count": log_summary["high_risk_events"],
+                "severity": "high"
+            })
+        denied = log_summary["by_outcome"].get("denied", 0)
+        if denied:
+            issues.append({"issue": "access_denials", "count": denied, "severity": "medium"})
+        return issues
+    
+    async def _generate_audit_insights(self, log_summary: Dict[str, Any], security_trends: Dict[str, Any]) -> List[str]:
+        """Generate human-readable audit insights"""
+        insights = [f"{log_summary['log_count']} audit events matched the report criteria"]
+        if security_trends["most_used_tools"]:
+            tool_id, count = security_trends["most_used_tools"][0]
+            insights.append(f"Most active tool: {tool_id} ({count} events)")
+        if security_trends["failure_rate"] > 0.1:
+            insights.append(f"Elevated failure rate of {security_trends['failure_rate']:.1%}")
+        return insights
+    
+    async def _generate_audit_recommendations(self, security_trends: Dict[str, Any], compliance_issues: List[Dict[str, Any]]) -> List[str]:
+        """Generate audit recommendations"""
+        recommendations = []
+        if security_trends["high_risk_events"]:
+            recommendations.append("Review high-risk tool operations and tighten access policies")
+        if security_trends["failure_rate"] > 0.1:
+            recommendations.append("Investigate recurring tool execution failures")
+        if not recommendations:
+            recommendations.append("No immediate action required; continue routine monitoring")
+        return recommendations
+    
     async def _encrypt_audit_entry(self, audit_entry: AuditLogEntry) -> AuditLogEntry:
         """Encrypt sensitive audit entry data"""
         # This would use proper encryption in production
@@ -921,8 +1066,7 @@ class ToolSecurityManager(ToolSecurityManager):
     
     async def _log_security_event(self, event_data: Dict[str, Any]) -> None:
         """Log security event"""
-        # Implementation would use the audit logger
-        pass
+        await self.audit_logger.log_security_event(event_data)
     
     async def _validate_execution_request(self, tool_request: Dict[str, Any], security_context: SecurityContext) -> Dict[str, Any]:
         """Validate execution request"""
@@ -942,7 +1086,19 @@ class ToolSecurityManager(ToolSecurityManager):
     
     async def _log_execution_event(self, event_data: Dict[str, Any]) -> None:
         """Log execution event"""
-        pass
+        security_context = event_data.get("security_context")
+        tool_request = event_data.get("tool_request", {})
+        execution_result = event_data.get("execution_result", {})
+        await self.audit_logger.log_security_event({
+            "execution_id": event_data.get("execution_id"),
+            "user_id": getattr(security_context, "user_id", "unknown"),
+            "agent_id": getattr(security_context, "agent_id", None),
+            "tool_id": tool_request.get("tool_id", "unknown"),
+            "action": "execute",
+            "resource": tool_request.get("resource", tool_request.get("tool_id", "unknown")),
+            "outcome": "success" if execution_result.get("success") else "failure",
+            "risk_score": getattr(security_context, "risk_score", 0.0),
+        })
     
     async def _monitor_for_anomalies(self, execution_result: Dict[str, Any], security_context: SecurityContext) -> Dict[str, Any]:
         """Monitor for anomalies during execution"""
@@ -0,0 +1,523 @@
+"""
+Streaming Video Frame Pipeline
+
+Decodes uncompressed YUV4MPEG2 (Y4M) or raw planar YUV video from a local
+file one frame at a time and analyzes a sample of frames with constant
+memory. Frames are sampled adaptively: the sampling stride widens while
+the picture is static and snaps back when a luma-histogram difference
+signals a scene change. A change found across a widened stride is located
+by bisecting the skipped frames, so cuts are reported at the frame where
+they happen. Sampled frames cross a bounded prefetch queue into
+a worker pool that computes per-frame statistics, so decode and analysis
+overlap without buffering the video.
+"""
+
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from dryad.university.services.image_analysis import noise_level, sharpness
+
+VideoSource = Union[str, bytes]
+
+Y4M_MAGIC = b"YUV4MPEG2"
+_HISTOGRAM_BINS = 64
+# Stride used when analysing histograms; enough pixels for a stable histogram
+_HISTOGRAM_PIXEL_STRIDE = 4
+
+
+@dataclass
+class VideoStreamInfo:
+    """Geometry and timing of an uncompressed video stream"""
+    width: int
+    height: int
+    frame_rate: float
+    colorspace: str
+    frame_count: Optional[int] = None
+    format: str = 'y4m'
+
+    @property
+    def luma_size(self) -> int:
+        return self.width * self.height
+
+    @property
+    def frame_size(self) -> int:
+        """Bytes of pixel data per frame for the colorspace"""
+        luma = self.luma_size
+        if self.colorspace.startswith('420'):
+            chroma = 2 * ((self.width + 1) // 2) * ((self.height + 1) // 2)
+        elif self.colorspace.startswith('422'):
+            chroma = 2 * ((self.width + 1) // 2) * self.height
+        elif self.colorspace.startswith('444'):
+            chroma = 2 * luma
+        elif self.colorspace == 'mono':
+            chroma = 0
+        else:
+            raise ValueError(f"Unsupported Y4M colorspace: {self.colorspace}")
+        return luma + chroma
+
+    @property
+    def duration(self) -> float:
+        if not self.frame_count or not self.frame_rate:
+            return 0.0
+        return self.frame_count / self.frame_rate
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'duration': self.duration,
+            'frame_rate': self.frame_rate,
+            'resolution': {'width': self.width, 'height': self.height},
+            'frame_count': self.frame_count,
+            'format': self.format,
+            'colorspace': self.colorspace
+        }
+
+
+class Y4MReader:
+    """Frame-by-frame reader for Y4M files; only the luma plane is decoded"""
+
+    def __init__(self, source: VideoSource):
+        self._handle: BinaryIO = io.BytesIO(source) if isinstance(source, bytes) else open(source, 'rb')
+        try:
+            self.info = self._read_header()
+        except Exception:
+            self._handle.close()
+            raise
+
+    def _read_header(self) -> VideoStreamInfo:
+        header = self._handle.readline(1024)
+        if not header.startswith(Y4M_MAGIC):
+            raise ValueError("Not a YUV4MPEG2 stream")
+
+        width = height = 0
+        frame_rate = 25.0
+        colorspace = '420'
+        for token in header[len(Y4M_MAGIC):].split():
+            tag, value = chr(token[0]), token[1:].decode('ascii')
+            if tag == 'W':
+                width = int(value)
+            elif tag == 'H':
+                height = int(value)
+            elif tag == 'F':
+                numerator, denominator = value.split(':')
+                frame_rate = int(numerator) / int(denominator)
+            elif tag == 'C':
+                colorspace = value
+        if width <= 0 or height <= 0:
+            raise ValueError("Y4M header is missing frame dimensions")
+
+        info = VideoStreamInfo(width=width, height=height, frame_rate=frame_rate, colorspace=colorspace)
+        self._data_start = self._handle.tell()
+
+        # Frame headers are usually bare "FRAME\n"; derive the count from the size
+        total = self._stream_size()
+        if total is not None:
+            info.frame_count = (total - self._data_start) // (info.frame_size + len(b"FRAME\n"))
+        return info
+
+    def _stream_size(self) -> Optional[int]:
+        try:
+            position = self._handle.tell()
+            size = self._handle.seek(0, os.SEEK_END)
+            self._handle.seek(position)
+            return size
+        except (OSError, io.UnsupportedOperation):
+            return None
+
+    def frames(self, select=None) -> Iterator[Tuple[int, Optional[np.ndarray]]]:
+        """Yield (index, luma) per frame; luma is None when ``select(index)`` is False.
+
+        Unselected frames are skipped with a seek, not read.
+        """
+        info = self.info
+        chroma_size = info.frame_size - info.luma_size
+        index = 0
+        while True:
+            marker = self._handle.readline(1024)
+            if not marker:
+                return
+            if not marker.startswith(b"FRAME"):
+                raise ValueError(f"Corrupt Y4M stream at frame {index}")
+
+            if select is None or select(index):
+                raw = self._handle.read(info.luma_size)
+                if len(raw) < info.luma_size:
+                    return
+                luma = np.frombuffer(raw, dtype=np.uint8).reshape(info.height, info.width)
+                self._handle.seek(chroma_size, os.SEEK_CUR)
+                yield index, luma
+            else:
+                self._handle.seek(info.frame_size, os.SEEK_CUR)
+                yield index, None
+            index += 1
+
+    def read_frame(self, index: int) -> Optional[np.ndarray]:
+        """Luma of frame ``index`` by seeking, leaving the ``frames`` position untouched.
+
+        Random access assumes bare "FRAME" headers; None if the frame is not
+        where that puts it.
+        """
+        info = self.info
+        position = self._handle.tell()
+        try:
+            self._handle.seek(self._data_start + index * (info.frame_size + len(b"FRAME\n")))
+            if self._handle.read(len(b"FRAME\n")) != b"FRAME\n":
+                return None
+            return self._read_luma()
+        finally:
+            self._handle.seek(position)
+
+    def _read_luma(self) -> Optional[np.ndarray]:
+        info = self.info
+        raw = self._handle.read(info.luma_size)
+        if len(raw) < info.luma_size:
+            return None
+        return np.frombuffer(raw, dtype=np.uint8).reshape(info.height, info.width)
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def __enter__(self) -> "Y4MReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class RawVideoReader(Y4MReader):
+    """Reader for headerless planar YUV files with known geometry"""
+
+    def __init__(self, source: VideoSource, width: int, height: int, frame_rate: float,
+                 colorspace: str = '420'):
+        self._handle = io.BytesIO(source) if isinstance(source, bytes) else open(source, 'rb')
+        self.info = VideoStreamInfo(width=width, height=height, frame_rate=frame_rate,
+                                    colorspace=colorspace, format='raw')
+        self._data_start = 0
+        total = self._stream_size()
+        if total is not None:
+            self.info.frame_count = total // self.info.frame_size
+
+    def frames(self, select=None) -> Iterator[Tuple[int, Optional[np.ndarray]]]:
+        info = self.info
+        chroma_size = info.frame_size - info.luma_size
+        index = 0
+        while True:
+            if select is None or select(index):
+                raw = self._handle.read(info.luma_size)
+                if len(raw) < info.luma_size:
+                    return
+                self._handle.seek(chroma_size, os.SEEK_CUR)
+                yield index, np.frombuffer(raw, dtype=np.uint8).reshape(info.height, info.width)
+            else:
+                position = self._handle.seek(info.frame_size, os.SEEK_CUR)
+                if info.frame_count is not None and position > info.frame_count * info.frame_size:
+                    return
+                yield index, None
+            index += 1
+
+    def read_frame(self, index: int) -> Optional[np.ndarray]:
+        position = self._handle.tell()
+        try:
+            self._handle.seek(index * self.info.frame_size)
+            return self._read_luma()
+        finally:
+            self._handle.seek(position)
+
+
+def luma_histogram(luma: np.ndarray) -> np.ndarray:
+    """Normalized luma histogram over a strided subsample"""
+    sample = luma[::_HISTOGRAM_PIXEL_STRIDE, ::_HISTOGRAM_PIXEL_STRIDE]
+    histogram = np.bincount((sample >> 2).ravel(), minlength=_HISTOGRAM_BINS).astype(np.float32)
+    return histogram / max(1.0, float(histogram.sum()))
+
+
+def histogram_difference(a: np.ndarray, b: np.ndarray) -> float:
+    """Total variation distance between two normalized histograms, in [0, 1]"""
+    return float(0.5 * np.abs(a - b).sum())
+
+
+def frame_statistics(luma: np.ndarray, previous: Optional[np.ndarray] = None, gap: int = 1) -> Dict[str, float]:
+    """Per-frame statistics computed in the worker pool.
+
+    ``previous`` is the last *sampled* frame, ``gap`` frames earlier; motion is
+    reported per frame so it does not grow as the sampler widens its stride.
+    """
+    gray = luma.astype(np.float32)
+    stats = {
+        'brightness': float(gray.mean()) / 255.0,
+        'contrast': float(gray.std()) / 128.0,
+        'sharpness': sharpness(gray),
+        'noise_level': noise_level(gray),
+    }
+    if previous is not None:
+        stats['motion'] = float(np.abs(gray - previous.astype(np.float32)).mean()) / 255.0 / max(1, gap)
+    return stats
+
+
+class AdaptiveFrameSampler:
+    """Widens the sampling stride on static content and resets it on scene changes"""
+
+    def __init__(self, min_step: int, max_step: int, scene_threshold: float):
+        self.min_step = max(1, min_step)
+        self.max_step = max(self.min_step, max_step)
+        self.scene_threshold = scene_threshold
+        self.step = self.min_step
+        self.next_index = 0
+        self._last_histogram: Optional[np.ndarray] = None
+        self._last_index = 0
+
+    def wants(self, index: int) -> bool:
+        return index >= self.next_index
+
+    def observe(
+        self,
+        index: int,
+        luma: np.ndarray,
+        read_frame: Optional[Callable[[int], Optional[np.ndarray]]] = None
+    ) -> Tuple[bool, float, int]:
+        """Record a sampled frame; returns (is_scene_change, histogram_difference, cut_index).
+
+        When the change spans skipped frames and ``read_frame`` can fetch them,
+        cut_index is the first frame of the new scene, found by bisection. A
+        change that no pair of adjacent frames accounts for is gradual drift
+        across the stride (motion, lighting), not a cut, and is not reported.
+        Without random access cut_index is ``index``.
+        """
+        histogram = luma_histogram(luma)
+        previous, previous_index = self._last_histogram, self._last_index
+        difference = 0.0 if previous is None else histogram_difference(histogram, previous)
+        self._last_histogram, self._last_index = histogram, index
+
+        scene_change = index > 0 and difference >= self.scene_threshold
+        cut_index = index
+        if scene_change and read_frame is not None and index - previous_index > 1:
+            located = self._locate_cut(previous_index, previous, index, histogram, read_frame)
+            if located is None:
+                scene_change = False
+            else:
+                cut_index = located
+        if scene_change or difference >= self.scene_threshold / 2:
+            self.step = self.min_step
+        else:
+            self.step = min(self.max_step, self.step * 2)
+        self.next_index = index + self.step
+        return scene_change, difference, cut_index
+
+    def _locate_cut(self, low: int, low_histogram: np.ndarray, high: int, high_histogram: np.ndarray,
+                    read_frame: Callable[[int], Optional[np.ndarray]]) -> Optional[int]:
+        """First frame in (low, high] that looks like ``high`` rather than ``low``; None for drift"""
+        while high - low > 1:
+            middle = (low + high) // 2
+            luma = read_frame(middle)
+            if luma is None:
+                return high
+            histogram = luma_histogram(luma)
+            if histogram_difference(histogram, low_histogram) < histogram_difference(histogram, high_histogram):
+                low, low_histogram = middle, histogram
+            else:
+                high, high_histogram = middle, histogram
+        return high if histogram_difference(low_histogram, high_histogram) >= self.scene_threshold else None
+
+
+class VideoAnalysisAccumulator:
+    """Constant-memory aggregation of sampled-frame statistics"""
+
+    def __init__(self):
+        self.count = 0
+        self.sums: Dict[str, float] = {}
+        self.minimums: Dict[str, float] = {}
+        self.maximums: Dict[str, float] = {}
+
+    def update(self, stats: Dict[str, float]) -> None:
+        self.count += 1
+        for key, value in stats.items():
+            self.sums[key] = self.sums.get(key, 0.0) + value
+            self.minimums[key] = min(self.minimums.get(key, value), value)
+            self.maximums[key] = max(self.maximums.get(key, value), value)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            key: {
+                'mean': total / self.count,
+                'min': self.minimums[key],
+                'max': self.maximums[key]
+            }
+            for key, total in self.sums.items()
+        } if self.count else {}
+
+
+class VideoFramePipeline:
+    """Decode -> bounded prefetch queue -> worker-pool analysis"""
+
+    def __init__(
+        self,
+        min_step: int = 1,
+        max_step: int = 15,
+        scene_threshold: float = 0.3,
+        prefetch: int = 8,
+        workers: int = 4,
+    ):
+        self.min_step = min_step
+        self.max_step = max_step
+        self.scene_threshold = scene_threshold
+        self.prefetch = prefetch
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @staticmethod
+    def open(source: VideoSource) -> Y4MReader:
+        return Y4MReader(source)
+
+    @staticmethod
+    def probe(source: VideoSource) -> VideoStreamInfo:
+        with Y4MReader(source) as reader:
+            return reader.info
+
+    async def stream(self, reader: Y4MReader) -> AsyncIterator[Dict[str, Any]]:
+        """Yield per-frame results (in completion order) followed by a final summary"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        info = reader.info
+        sampler = AdaptiveFrameSampler(self.min_step, self.max_step, self.scene_threshold)
+        frames: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch)
+        scenes: List[Dict[str, Any]] = []
+        decoded = {'frames': 0, 'sampled': 0}
+
+        def decode_next(iterator, state):
+            """Advance to the next sampled frame (runs in a thread)"""
+            for index, luma in iterator:
+                decoded['frames'] = index + 1
+                if luma is None:
+                    continue
+                # Copy so the frame outlives the read buffer, and keep the previous for motion
+                luma = luma.copy()
+                scene_change, difference, cut_index = sampler.observe(index, luma, reader.read_frame)
+                previous, previous_index = state.get('previous', (None, index))
+                state['previous'] = (luma, index)
+                return index, luma, previous, index - previous_index, scene_change, difference, cut_index
+            return None
+
+        async def produce():
+            iterator = reader.frames(select=sampler.wants)
+            state: Dict[str, Any] = {}
+            try:
+                while True:
+                    item = await asyncio.to_thread(decode_next, iterator, state)
+                    if item is None:
+                        break
+                    index, luma, previous, gap, scene_change, difference, cut_index = item
+                    decoded['sampled'] += 1
+                    if index == 0 or scene_change:
+                        scenes.append({'start_frame': cut_index, 'histogram_difference': difference})
+                    await frames.put((index, luma, previous, gap))
+            except BaseException:
+                # Stopping early: the queued frames will never be reported, so drop
+                # them to make room for the sentinels rather than waiting on analyzers
+                # that may already be gone
+                for _ in range(self.workers):
+                    while frames.full():
+                        frames.get_nowait()
+                    frames.put_nowait(None)
+                raise
+            for _ in range(self.workers):
+                await frames.put(None)
+
+        async def analyze():
+            while True:
+                item = await frames.get()
+                if item is None:
+                    break
+                index, luma, previous, gap = item
+                stats = await loop.run_in_executor(executor, frame_statistics, luma, previous, gap)
+                await results.put({'frame_index': index, 'time': index / info.frame_rate, **stats})
+            await results.put(None)
+
+        tasks = [asyncio.create_task(produce())]
+        tasks += [asyncio.create_task(analyze()) for _ in range(self.workers)]
+        accumulator = VideoAnalysisAccumulator()
+        finished = 0
+        try:
+            while finished < self.workers:
+                result = await results.get()
+                if result is None:
+                    finished += 1
+                    continue
+                accumulator.update({k: v for k, v in result.items() if k not in ('frame_index', 'time')})
+                yield {'final': False, **result}
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        frame_count = decoded['frames']
+        duration = frame_count / info.frame_rate if info.frame_rate else 0.0
+        for i, scene in enumerate(scenes):
+            end_frame = scenes[i + 1]['start_frame'] if i + 1 < len(scenes) else frame_count
+            scene.update({
+                'end_frame': end_frame,
+                'start_time': scene['start_frame'] / info.frame_rate,
+                'end_time': end_frame / info.frame_rate
+            })
+
+        yield {
+            'final': True,
+            'stream_info': {**info.to_dict(), 'frame_count': frame_count, 'duration': duration},
+            'frames_decoded': frame_count,
+            'frames_sampled': decoded['sampled'],
+            'scenes': scenes,
+            'frame_statistics': accumulator.summary()
+        }
+
+    async def analyze(self, source: VideoSource) -> Dict[str, Any]:
+        """Run the pipeline over a Y4M source and return the final summary"""
+        reader = await asyncio.to_thread(self.open, source)
+        try:
+            final: Dict[str, Any] = {}
+            async for result in self.stream(reader):
+                if result['final']:
+                    final = result
+            return final
+        finally:
+            reader.close()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # NumPy releases the GIL for the heavy array work, so threads suffice
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="video-frames")
+        return self._executor
+
+
+def write_synthetic_y4m(path: str, width: int = 320, height: int = 240, frame_rate: int = 30,
+                        frame_count: int = 300, scene_length: int = 90, seed: int = 0) -> str:
+    """Write a synthetic 4:2:0 Y4M clip with a hard cut every ``scene_length`` frames.
+
+    Each scene is a moving gradient with its own base brightness, so both
+    motion and histogram-based scene detection have something to find.
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    chroma = np.full(2 * ((width + 1) // 2) * ((height + 1) // 2), 128, dtype=np.uint8).tobytes()
+
+    with open(path, 'wb') as f:
+        f.write(f"YUV4MPEG2 W{width} H{height} F{frame_rate}:1 Ip A1:1 C420jpeg\n".encode('ascii'))
+        for index in range(frame_count):
+            # Scene brightness steps far enough apart to register as a cut
+            base = 50 + (index // scene_length * 70) % 160
+            shift = index * 2
+            luma = base + 40 * np.sin((x + shift) / 25.0) * np.cos(y / 30.0)
+            luma += rng.normal(0, 2, size=luma.shape)
+            f.write(b"FRAME\n")
+            f.write(np.clip(luma, 0, 255).astype(np.uint8).tobytes())
+            f.write(chroma)
+    return path
@@ -7,8 +7,12 @@ image generation, OCR, and accessibility enhancement.
 """
 
 import asyncio
+import copy
+import hashlib
+import json
 import logging
-from typing import Dict, List, Optional, Any, Union
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime, timezone
 import base64
 from pathlib import Path
@@ -19,6 +23,11 @@ from PIL import Image, ImageEnhance
 from sqlalchemy.orm import Session
 
 from dryad.university.database.models_university import MediaAsset, MultimodalInteraction
+from dryad.university.services import image_analysis
+
+# Full analysis results by content hash and options, shared across service instances
+_ANALYSIS_CACHE_SIZE = 256
+_analysis_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
 
 
 class VisionProcessingService:
@@ -50,6 +59,9 @@ class VisionProcessingService:
             'image_generation': 'stable_diffusion'
         }
         
+        # Shared off-loop analysis engine (process pool + content-hash cache)
+        self.image_engine = image_analysis.get_image_analysis_engine()
+        
         # Quality thresholds
         self.confidence_thresholds = {
             'object_detection': 0.5,
@@ -76,14 +88,34 @@ class VisionProcessingService:
         try:
             options = options or {}
             
-            # Load and validate image
-            image = await self._load_image(image_data)
+            # Load encoded bytes; nothing is decoded on the event loop
+            image_bytes = await self._read_image_bytes(image_data)
+            key = self._analysis_key(image_bytes, options)
+            cached = _analysis_cache.get(key)
+            if cached is not None:
+                _analysis_cache.move_to_end(key)
+                results = copy.deepcopy(cached)
+                results['timestamp'] = datetime.now(timezone.utc).isoformat()
+                return results
+            
+            # Thumbnail-first color and quality analysis, cached by content hash
+            pixel_analysis = None
+            if options.get('analyze_colors', True) or options.get('assess_quality', True):
+                pixel_analysis = await self.image_engine.analyze(image_bytes)
+            
+            # Detectors expect RGB, as _load_image returns; decode only when one runs
+            needs_image = (
+                options.get('detect_objects', True)
+                or options.get('extract_text', False)
+                or options.get('analyze_scene', True)
+            )
+            image, info = await asyncio.to_thread(self._decode_image, image_bytes, needs_image)
             
             # Perform requested analyses
             results = {
                 'timestamp': datetime.now(timezone.utc).isoformat(),
-                'image_dimensions': {'width': image.width, 'height': image.height},
-                'format': image.format or 'unknown'
+                'image_dimensions': {'width': info['width'], 'height': info['height']},
+                'format': info['format']
             }
             
             # Object detection
@@ -101,17 +133,20 @@ class VisionProcessingService:
             
             # Color and visual analysis
             if options.get('analyze_colors', True):
-                results['color_analysis'] = await self._analyze_colors(image)
+                results['color_analysis'] = pixel_analysis['color_analysis']
             
             # Quality assessment
             if options.get('assess_quality', True):
-                results['quality_metrics'] = await self._assess_image_quality(image)
+                results['quality_metrics'] = pixel_analysis['quality_metrics']
             
             # Calculate overall confidence
             results['overall_confidence'] = self._calculate_overall_confidence(results)
             results['confidence_scores'] = self._get_confidence_scores(results)
             
-            return results
+            _analysis_cache[key] = results
+            if len(_analysis_cache) > _ANALYSIS_CACHE_SIZE:
+                _analysis_cache.popitem(last=False)
+            return copy.deepcopy(results)
             
         except Exception as e:
             self.logger.error(f"Error analyzing image: {str(e)}")
@@ -223,15 +258,32 @@ class VisionProcessingService:
             self.logger.error(f"Error generating accessibility features: {str(e)}")
             raise
     
+    async def _read_image_bytes(self, image_data: Union[str, bytes]) -> bytes:
+        """Read encoded image bytes from a file path without blocking the loop"""
+        if isinstance(image_data, bytes):
+            return image_data
+        if isinstance(image_data, str):
+            return await asyncio.to_thread(Path(image_data).read_bytes)
+        raise ValueError("Invalid image data type")
+    
+    @staticmethod
+    def _analysis_key(image_bytes: bytes, options: Dict[str, Any]) -> str:
+        """Cache key for a full analysis: hash of the encoded bytes plus the options"""
+        return f"{hashlib.sha256(image_bytes).hexdigest()}:{json.dumps(options, sort_keys=True, default=str)}"
+    
+    @staticmethod
+    def _decode_image(image_bytes: bytes, convert: bool = True) -> Tuple[Optional[Image.Image], Dict[str, Any]]:
+        """Read the header and, if convert, decode to RGB (runs in a worker thread)"""
+        opened = Image.open(io.BytesIO(image_bytes))
+        info = {'width': opened.width, 'height': opened.height, 'format': opened.format or 'unknown'}
+        return (opened.convert('RGB') if convert else None), info
+    
     async def _load_image(self, image_data: Union[str, bytes]) -> Image.Image:
-        """Load image from file path or bytes"""
+        """Load image from file path or bytes, decoding in a worker thread"""
         try:
-            if isinstance(image_data, str):
-                return Image.open(image_data).convert('RGB')
-            elif isinstance(image_data, bytes):
-                return Image.open(io.BytesIO(image_data)).convert('RGB')
-            else:
-                raise ValueError("Invalid image data type")
+            image_bytes = await self._read_image_bytes(image_data)
+            image, _ = await asyncio.to_thread(self._decode_image, image_bytes)
+            return image
                 
         except Exception as e:
             self.logger.error(f"Error loading image: {str(e)}")
@@ -280,45 +332,17 @@ class VisionProcessingService:
     async def _analyze_colors(self, image: Image.Image) -> Dict[str, Any]:
         """Analyze color composition and distribution"""
         try:
-            # Convert to numpy array for color analysis
-            img_array = np.array(image)
-            
-            # Calculate dominant colors
-            pixels = img_array.reshape(-1, 3)
-            dominant_colors = self._get_dominant_colors(pixels)
-            
-            # Calculate color statistics
-            color_stats = {
-                'dominant_colors': dominant_colors,
-                'brightness': float(np.mean(pixels)),
-                'contrast': float(np.std(pixels)),
-                'color_temperature': 'warm' if np.mean(pixels[:, 0]) > np.mean(pixels[:, 2]) else 'cool'
-            }
-            
-            return color_stats
+            analysis = await asyncio.to_thread(self._analyze_pixels, image)
+            return analysis['color_analysis']
             
         except Exception as e:
             self.logger.error(f"Error analyzing colors: {str(e)}")
             return {'error': str(e)}
     
     def _get_dominant_colors(self, pixels: np.ndarray, n_colors: int = 5) -> List[Dict[str, Any]]:
-        """Extract dominant colors from pixel data"""
-        # Simple k-means clustering for dominant colors
-        # In production, would use more sophisticated color analysis
-        from sklearn.cluster import KMeans
-        
+        """Extract dominant colors from a reservoir sample of pixel data"""
         try:
-            kmeans = KMeans(n_clusters=n_colors, random_state=42)
-            kmeans.fit(pixels)
-            
-            colors = []
-            for i, center in enumerate(kmeans.cluster_centers_):
-                colors.append({
-                    'rgb': [int(center[0]), int(center[1]), int(center[2])],
-                    'percentage': float(kmeans.labels_ == i).mean() * 100
-                })
-            
-            return sorted(colors, key=lambda x: x['percentage'], reverse=True)
+            return image_analysis.dominant_colors(pixels, n_colors)
             
         except Exception:
             # Fallback to simple color analysis
@@ -329,32 +353,26 @@ class VisionProcessingService:
     async def _assess_image_quality(self, image: Image.Image) -> Dict[str, Any]:
         """Assess image quality metrics"""
         try:
-            img_array = np.array(image)
-            
-            # Basic quality metrics
-            quality_metrics = {
-                'blur_score': self._calculate_blur_score(img_array),
-                'noise_level': self._calculate_noise_level(img_array),
-                'exposure': self._calculate_exposure(img_array),
-                'sharpness': self._calculate_sharpness(img_array),
-                'overall_quality': 0.8  # Mock score
-            }
-            
-            return quality_metrics
+            analysis = await asyncio.to_thread(self._analyze_pixels, image)
+            return analysis['quality_metrics']
             
         except Exception as e:
             self.logger.error(f"Error assessing image quality: {str(e)}")
             return {'error': str(e)}
     
+    def _analyze_pixels(self, image: Image.Image) -> Dict[str, Any]:
+        """Thumbnail an already-decoded image and run the pixel analysis"""
+        thumbnail = image.convert('RGB')
+        thumbnail.thumbnail((image_analysis.DEFAULT_THUMBNAIL_SIZE, image_analysis.DEFAULT_THUMBNAIL_SIZE))
+        return image_analysis.analyze_pixels(np.asarray(thumbnail))
+    
     def _calculate_blur_score(self, img_array: np.ndarray) -> float:
         """Calculate blur score using Laplacian variance"""
-        # Mock implementation - would use actual blur detection
-        return 0.7
+        return image_analysis.blur_score(image_analysis.to_grayscale(img_array))
     
     def _calculate_noise_level(self, img_array: np.ndarray) -> float:
         """Calculate noise level in image"""
-        # Mock implementation - would use actual noise detection
-        return 0.2
+        return image_analysis.noise_level(image_analysis.to_grayscale(img_array))
     
     def _calculate_exposure(self, img_array: np.ndarray) -> float:
         """Calculate exposure/brightness level"""
@@ -362,8 +380,7 @@ class VisionProcessingService:
     
     def _calculate_sharpness(self, img_array: np.ndarray) -> float:
         """Calculate image sharpness"""
-        # Mock implementation - would use actual sharpness detection
-        return 0.75
+        return image_analysis.sharpness(image_analysis.to_grayscale(img_array))
     
     def _generate_alt_text(self, description: str, analysis: Dict[str, Any]) -> str:
         """Generate alt text for accessibility"""
@@ -0,0 +1,102 @@
+"""Tests for the agent configuration cache and its invalidation events"""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from dryad.core import agent_config_cache
+from dryad.core.agent_config_cache import AgentConfigCache
+from dryad.domain.agent.models import Agent
+from dryad.domain.user.models import User
+from dryad.infrastructure.database import Base
+
+
+class Clock:
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+async def agent_engine(path, names=("tutor", "critic", "scribe")):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[User.__table__, Agent.__table__])
+    async with AsyncSession(engine) as db:
+        for name in names:
+            db.add(Agent(id=name, name=name, system_prompt=f"You are the {name}.", created_by="admin",
+                         tool_ids=["search"], temperature=0.7))
+        await db.commit()
+    return engine
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    # The mapper and commit events invalidate the process-wide cache
+    fresh = AgentConfigCache(ttl_seconds=60.0, clock=Clock())
+    monkeypatch.setattr(agent_config_cache, "_cache", fresh)
+    return fresh
+
+
+async def test_entries_expire_and_least_recent_is_evicted(tmp_path):
+    engine = await agent_engine(tmp_path / "agents.db")
+    clock = Clock()
+    cache = AgentConfigCache(ttl_seconds=60.0, max_size=2, clock=clock)
+    async with AsyncSession(engine) as db:
+        tutor = await cache.get(db, "tutor")
+        assert tutor.tool_ids == ("search",) and tutor.llm_config().temperature == 0.7
+        await cache.get(db, "critic")
+        assert await cache.get(db, "tutor") is tutor
+
+        await cache.get(db, "scribe")  # evicts critic, the least recently used
+        await cache.get(db, "tutor")
+        assert cache.get_stats()["misses"] == 3
+        await cache.get(db, "critic")
+        assert cache.get_stats()["misses"] == 4 and cache.get_stats()["size"] == 2
+
+        clock.now += 61
+        await cache.get(db, "critic")
+        assert cache.get_stats()["misses"] == 5
+        assert await cache.get(db, "nobody") is None
+    await engine.dispose()
+
+
+async def test_update_in_one_session_invalidates_another(cache, tmp_path):
+    engine = await agent_engine(tmp_path / "agents.db")
+    async with AsyncSession(engine) as chat, AsyncSession(engine) as admin:
+        assert (await cache.get(chat, "tutor")).temperature == 0.7
+        await cache.get(chat, "critic")
+
+        agent = await admin.get(Agent, "tutor")
+        agent.temperature = 0.2
+        await admin.flush()
+        # Only the updated agent is dropped
+        assert cache.get_stats()["size"] == 1
+
+        # A chat turn between the flush and the commit still sees the committed row...
+        assert (await cache.get(chat, "tutor")).temperature == 0.7
+        await chat.rollback()
+        await admin.commit()
+
+        # ...and the commit drops what it cached
+        assert (await cache.get(chat, "tutor")).temperature == 0.2
+    await engine.dispose()
+
+
+async def test_delete_and_rollback(cache, tmp_path):
+    engine = await agent_engine(tmp_path / "agents.db")
+    async with AsyncSession(engine) as chat, AsyncSession(engine) as admin:
+        await cache.get(chat, "scribe")
+        await admin.delete(await admin.get(Agent, "scribe"))
+        await admin.commit()
+        await chat.rollback()
+        assert await cache.get(chat, "scribe") is None
+
+        agent = await admin.get(Agent, "tutor")
+        agent.name = "renamed"
+        await admin.flush()
+        await admin.rollback()
+        assert agent_config_cache._PENDING_KEY not in admin.sync_session.info
+        await chat.rollback()
+        assert (await cache.get(chat, "tutor")).name == "tutor"
+    await engine.dispose()
@@ -0,0 +1,183 @@
+"""Tests for the cached async vector store and its client pool"""
+
+import asyncio
+
+import pytest
+
+from dryad.infrastructure import async_vector_store
+from dryad.infrastructure.async_vector_store import (
+    AsyncClientPool, CachingVectorStore, InMemoryAsyncVectorStore, VectorQuery
+)
+from dryad.infrastructure.vector_store import ChunkRecord
+
+
+def chunk(document_id, index, content):
+    return ChunkRecord(
+        uuid=f"{document_id}-{index}", document_id=document_id, chunk_index=index,
+        content=content, content_hash=f"{document_id}{index}", title=document_id
+    )
+
+
+class CountingStore(InMemoryAsyncVectorStore):
+    """In-memory store that counts searches and can hold them until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.searches = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def search(self, query):
+        self.searches += 1
+        await self.release.wait()
+        return await super().search(query)
+
+
+async def seeded_cache(**options):
+    store = CountingStore()
+    cache = CachingVectorStore(store, **options)
+    await cache.write_chunks([chunk("tides", 0, "tidal energy from the ocean"), chunk("wind", 0, "offshore wind farms")])
+    return store, cache
+
+
+async def test_repeated_query_is_served_from_the_cache():
+    store, cache = await seeded_cache()
+    query = VectorQuery(text="tidal", mode="keyword")
+
+    first = await cache.search(query)
+    second = await cache.search(query)
+
+    assert [r["document_title"] for r in first] == ["tides"]
+    assert second == first
+    assert store.searches == 1
+    assert cache.get_stats()["hits"] == 1
+    # Callers get copies; mutating one does not change the cached entry
+    second[0]["content"] = "changed"
+    assert (await cache.search(query))[0]["content"] == "tidal energy from the ocean"
+
+
+async def test_writes_invalidate_cached_results():
+    store, cache = await seeded_cache()
+    query = VectorQuery(text="solar", mode="keyword")
+    assert await cache.search(query) == []
+
+    await cache.write_chunks([chunk("solar", 0, "solar panels on the roof")])
+
+    assert [r["document_title"] for r in await cache.search(query)] == ["solar"]
+    assert store.searches == 2
+    assert cache.get_stats()["stale"] == 1
+
+    cache.invalidate()
+    await cache.search(query)
+    assert store.searches == 3
+
+
+async def test_result_fetched_across_a_write_is_not_cached():
+    store, cache = await seeded_cache()
+    query = VectorQuery(text="tidal", mode="keyword")
+    store.release.clear()
+    pending = asyncio.create_task(cache.search(query))
+    await asyncio.sleep(0)
+    cache.invalidate()
+    store.release.set()
+    await pending
+
+    await cache.search(query)
+    assert store.searches == 2
+
+
+async def test_identical_queries_in_flight_share_one_request():
+    store, cache = await seeded_cache()
+    store.release.clear()
+    query = VectorQuery(text="wind", mode="keyword")
+    waiting = [asyncio.create_task(cache.search(query)) for _ in range(5)]
+    await asyncio.sleep(0)
+    # One waiter going away does not cancel the shared request
+    waiting[0].cancel()
+    store.release.set()
+
+    results = await asyncio.gather(*waiting[1:])
+
+    assert store.searches == 1
+    assert all([r["document_title"] for r in result] == ["wind"] for result in results)
+    assert cache.get_stats()["shared"] == 4
+    assert cache.get_stats()["in_flight"] == 0
+
+
+async def test_failed_search_returns_nothing_and_is_not_cached():
+    class BrokenStore(InMemoryAsyncVectorStore):
+        async def search(self, query):
+            raise ConnectionError("weaviate is down")
+
+    cache = CachingVectorStore(BrokenStore())
+    query = VectorQuery(text="tidal", mode="keyword")
+
+    assert await cache.search(query) == []
+    assert await cache.search(query) == []
+    assert cache.get_stats()["errors"] == 2
+
+
+async def test_pool_bounds_concurrent_clients_and_reuses_them():
+    created, closed, active, peak = [], [], [0], [0]
+
+    async def connect():
+        created.append(object())
+        return created[-1]
+
+    async def disconnect(client):
+        closed.append(client)
+
+    pool = AsyncClientPool(connect, disconnect, size=2, acquire_timeout=1.0)
+
+    async def request():
+        async with pool.client():
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.01)
+            active[0] -= 1
+
+    await asyncio.gather(*(request() for _ in range(8)))
+
+    assert peak[0] == 2
+    stats = pool.get_stats()
+    assert stats["created"] == 2 and stats["reused"] == 6
+    assert stats["in_use"] == 0 and stats["idle"] == 2
+
+    with pytest.raises(RuntimeError):
+        async with pool.client():
+            raise RuntimeError("broken connection")
+    assert len(closed) == 1 and pool.get_stats()["idle"] == 1
+
+    await pool.close()
+    assert len(closed) == 2
+
+
+async def test_pool_times_out_when_every_client_is_busy():
+    async def connect():
+        return object()
+
+    async def disconnect(client):
+        pass
+
+    pool = AsyncClientPool(connect, disconnect, size=1, acquire_timeout=0.05)
+    async with pool.client():
+        with pytest.raises(asyncio.TimeoutError):
+            async with pool.client():
+                pass
+    assert pool.get_stats()["timeouts"] == 1
+
+
+def test_building_the_store_does_not_touch_ingestion(monkeypatch):
+    from dryad.infrastructure import ingestion
+
+    def unavailable():
+        raise AssertionError("retrieval must not build the ingestion pipeline")
+
+    monkeypatch.setattr(ingestion, "get_ingestion_pipeline", unavailable)
+    monkeypatch.setattr(ingestion, "get_chunk_store", unavailable)
+    monkeypatch.setattr(async_vector_store, "_store", None)
+
+    store = async_vector_store.get_async_vector_store()
+
+    assert isinstance(store, CachingVectorStore)
+    assert async_vector_store.get_async_vector_store() is store
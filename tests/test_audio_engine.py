@@ -0,0 +1,59 @@
+"""Tests for the streaming audio feature engine"""
+
+import io
+import math
+import wave
+
+import numpy as np
+
+from dryad.university.services.audio_engine import StreamingAudioAnalyzer
+
+RATE = 16000
+
+
+def wav_bytes(samples: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes((np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes())
+    return buffer.getvalue()
+
+
+def tone(seconds: float, amplitude: float, frequency: float = 220.0) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def hum(seconds: float, amplitude: float) -> np.ndarray:
+    # Low-frequency background: quiet, but with a speech-like zero-crossing rate
+    return tone(seconds, amplitude, frequency=60.0)
+
+
+def final_result(audio: np.ndarray):
+    segments, final = [], None
+    for partial in StreamingAudioAnalyzer(window_seconds=1.0).iter_analysis(wav_bytes(audio)):
+        segments.extend(partial['speech_segments'])
+        final = partial
+    return segments, final['summary']
+
+
+def test_speech_from_the_first_frame_is_detected():
+    audio = np.concatenate([tone(6.0, 0.3), hum(4.0, 0.003)])
+    segments, summary = final_result(audio)
+
+    assert len(segments) == 1
+    assert segments[0]['start'] == 0.0
+    assert abs(segments[0]['end'] - 6.0) < 0.1
+    assert abs(summary['speech_seconds'] - 6.0) < 0.1
+
+
+def test_signal_to_noise_ratio_compares_speech_with_background():
+    audio = np.concatenate([hum(2.0, 0.003), tone(4.0, 0.3), hum(2.0, 0.003), tone(2.0, 0.3)])
+    segments, summary = final_result(audio)
+
+    assert [round(s['start']) for s in segments] == [2, 8]
+    # Equal-amplitude sines: the power ratio is the squared amplitude ratio, 40 dB
+    expected = 20 * math.log10(0.3 / 0.003)
+    assert abs(summary['signal_to_noise_ratio'] - expected) < 1.0
@@ -0,0 +1,158 @@
+"""Tests for the segmented audit log store"""
+
+import json
+import os
+import threading
+
+from dryad.university.services.audit_store import INDEX_SUFFIX, SEGMENT_SUFFIX, AuditSegmentStore
+
+
+def event(ts, agent_id="agent-1", tool_id="search", **extra):
+    return {"ts": ts, "agent_id": agent_id, "tool_id": tool_id, **extra}
+
+
+def segment_files(directory, suffix=SEGMENT_SUFFIX):
+    return sorted(name for name in os.listdir(directory) if name.endswith(suffix))
+
+
+def filled_store(directory, count=100, **options):
+    options = {"block_records": 10, "fsync": False, **options}
+    store = AuditSegmentStore(str(directory), **options)
+    for i in range(count):
+        store.append(event(1000.0 + i, agent_id=f"agent-{i % 4}", tool_id=f"tool-{i // 50}", seq=i))
+    assert store.flush(timeout=5)
+    return store
+
+
+def test_records_are_readable_after_flush_and_filtered_by_index(tmp_path):
+    store = filled_store(tmp_path)
+    assert [r["seq"] for r in store.scan()] == list(range(100))
+    assert [r["seq"] for r in store.scan(start_ts=1010, end_ts=1019)] == list(range(10, 20))
+    assert [r["seq"] for r in store.scan(agent_id="agent-2", tool_id="tool-1")] == list(range(50, 100, 4))
+    store.close()
+
+
+def test_block_index_prunes_reads(tmp_path):
+    store = filled_store(tmp_path)
+    store.close()
+    segment, = store._segments
+    assert len(segment.blocks) == 10
+
+    # tool-1 only appears in the last five blocks, and the time range narrows it to two
+    ranges = segment.candidate_blocks(1065.0, 1079.0, None, "tool-1")
+    assert ranges == [(int(segment.blocks[6][0]), int(segment.blocks[7][0])),
+                      (int(segment.blocks[7][0]), int(segment.blocks[8][0]))]
+    assert segment.candidate_blocks(0.0, 999.0, None, None) == []
+    assert segment.candidate_blocks(0.0, 2000.0, "agent-9", None) == []
+    assert [r["seq"] for r in store.scan(start_ts=1065, end_ts=1079, tool_id="tool-1", agent_id="agent-1")] \
+        == [65, 69, 73, 77]
+
+
+def test_segments_rotate_by_size_and_persist_indexes(tmp_path):
+    store = filled_store(tmp_path, max_segment_bytes=2000)
+    store.close()
+
+    assert len(store._segments) > 1
+    assert all(s.sealed and s.size <= 2000 + 200 for s in store._segments)
+    assert len(segment_files(tmp_path, INDEX_SUFFIX)) == len(store._segments)
+
+    reopened = AuditSegmentStore(str(tmp_path), fsync=False)
+    assert [r["seq"] for r in reopened.scan()] == list(range(100))
+    assert reopened.get_stats()["segments"] == len(store._segments)
+
+
+def test_recovery_truncates_a_torn_write_and_rebuilds_the_index(tmp_path):
+    store = filled_store(tmp_path, count=30)
+    # Simulate a crash: the writer stops without sealing, mid-way through a record
+    store._stopping.set()
+    store._writer.join()
+    path = store._active.path
+    with open(path, "ab") as f:
+        f.write(b'{"ts":2000.0,"agent_id":"agent-1"')
+    assert not os.path.exists(path[: -len(SEGMENT_SUFFIX)] + INDEX_SUFFIX)
+
+    recovered = AuditSegmentStore(str(tmp_path), block_records=10, fsync=False)
+
+    assert [r["seq"] for r in recovered.scan()] == list(range(30))
+    segment, = recovered._segments
+    assert segment.size == os.path.getsize(path)
+    assert len(segment.blocks) == 3
+    assert os.path.exists(segment.index_path)
+
+    # New records go to a fresh segment next to the recovered one
+    recovered.append(event(2000.0, seq=30))
+    recovered.close()
+    assert [r["seq"] for r in AuditSegmentStore(str(tmp_path), fsync=False).scan()] == list(range(31))
+
+
+def test_stale_or_corrupt_indexes_are_rebuilt(tmp_path):
+    store = filled_store(tmp_path, count=20)
+    store.close()
+    segment, = store._segments
+
+    # Appended after the index was written: sizes disagree
+    with open(segment.path, "ab") as f:
+        f.write((json.dumps(event(1020.0, seq=20)) + "\n").encode())
+    assert [r["seq"] for r in AuditSegmentStore(str(tmp_path), fsync=False).scan()] == list(range(21))
+
+    with open(segment.index_path, "w") as f:
+        f.write("{not json")
+    assert [r["seq"] for r in AuditSegmentStore(str(tmp_path), fsync=False).scan()] == list(range(21))
+
+    # A segment holding nothing but a torn write is removed
+    empty = os.path.join(str(tmp_path), "audit-9999999999999" + SEGMENT_SUFFIX)
+    with open(empty, "wb") as f:
+        f.write(b'{"ts":')
+    AuditSegmentStore(str(tmp_path), fsync=False)
+    assert not os.path.exists(empty)
+
+
+def test_compaction_removes_only_expired_sealed_segments(tmp_path):
+    day = 86400.0
+    store = AuditSegmentStore(str(tmp_path), retention_days=30, max_segment_bytes=1, fsync=False)
+    for ts in (0.0, 10 * day, 40 * day):
+        store.append(event(ts))
+    assert store.flush(timeout=5)
+    assert store.get_stats()["segments"] == 3
+
+    # The newest segment is still active and is never removed
+    assert store.compact(now=80 * day) == 2
+    assert [r["ts"] for r in store.scan()] == [40 * day]
+    assert len(segment_files(tmp_path)) == 1
+    assert store.get_stats()["segments_removed"] == 2
+
+    store.close()
+    assert store.compact(now=60 * day) == 0
+    assert store.compact(now=71 * day) == 1
+    assert segment_files(tmp_path) == [] and segment_files(tmp_path, INDEX_SUFFIX) == []
+
+
+def test_full_queue_drops_and_counts(tmp_path):
+    store = AuditSegmentStore(str(tmp_path), queue_size=2, fsync=False)
+    store._ensure_writer = lambda: None  # keep the writer from draining the queue
+    results = [store.append(event(1000.0 + i)) for i in range(5)]
+
+    assert results == [True, True, False, False, False]
+    stats = store.get_stats()
+    assert (stats["appended"], stats["dropped"], stats["queued"]) == (2, 3, 2)
+
+
+def test_counters_stay_exact_under_concurrent_appends(tmp_path):
+    store = AuditSegmentStore(str(tmp_path), group_commit_size=16, fsync=True)
+
+    def produce(worker):
+        for i in range(500):
+            store.append(event(1000.0 + i, agent_id=f"agent-{worker}"))
+
+    threads = [threading.Thread(target=produce, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.close()
+
+    stats = store.get_stats()
+    assert stats["appended"] + stats["dropped"] == 4000
+    assert stats["committed"] == stats["appended"]
+    assert 0 < stats["fsyncs"] <= stats["committed"]
+    assert sum(1 for _ in store.scan()) == stats["committed"]
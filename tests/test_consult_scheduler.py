@@ -0,0 +1,107 @@
+"""Tests for hedged, quorum-aware multi-provider scheduling"""
+
+import asyncio
+
+from dryad.core.consult_scheduler import (
+    CANCELLED, FAILED, SUCCEEDED, TIMED_OUT, ConsultScheduler, LatencyWindow
+)
+
+
+class FakeProviders:
+    """Provider calls whose n-th attempt per provider takes the given delay (None fails it)"""
+
+    def __init__(self, delays):
+        self.delays = {provider_id: list(values) for provider_id, values in delays.items()}
+        self.started = {provider_id: 0 for provider_id in delays}
+        self.cancelled = []
+
+    async def __call__(self, provider_id):
+        attempt = self.started[provider_id]
+        self.started[provider_id] += 1
+        delay = self.delays[provider_id][attempt]
+        try:
+            await asyncio.sleep(abs(delay))
+        except asyncio.CancelledError:
+            self.cancelled.append((provider_id, attempt))
+            raise
+        if delay < 0:
+            raise RuntimeError(f"{provider_id} failed")
+        return f"{provider_id}#{attempt}"
+
+
+def scheduler_with_history(history, min_samples=1):
+    latencies = LatencyWindow(min_samples=min_samples)
+    for provider_id, seconds in history.items():
+        latencies.record(provider_id, seconds)
+    return ConsultScheduler(latencies=latencies, hedge_min_delay=0.01)
+
+
+async def test_slow_call_is_hedged_after_its_p95():
+    scheduler = scheduler_with_history({"slow": 0.05})
+    providers = FakeProviders({"slow": [2.0, 0.02]})
+
+    outcome = await scheduler.run(["slow"], providers, timeout=5.0)
+
+    result = outcome.outcomes["slow"]
+    assert outcome.successes == ["slow#1"]
+    assert result.hedged and result.hedge_won and result.attempts == 2
+    assert outcome.hedges_sent == 1
+    assert providers.cancelled == [("slow", 0)]
+    # Measured from the request start: the hedge delay plus the hedge's own call
+    assert 65 <= result.latency_ms < 500
+    assert outcome.elapsed_ms < 500
+
+
+async def test_no_hedge_without_latency_history():
+    scheduler = ConsultScheduler(latencies=LatencyWindow(min_samples=5))
+    providers = FakeProviders({"new": [0.1]})
+
+    outcome = await scheduler.run(["new"], providers, timeout=5.0)
+
+    assert outcome.hedges_sent == 0
+    assert outcome.outcomes["new"].attempts == 1
+    assert outcome.successes == ["new#0"]
+
+
+async def test_early_quorum_cancels_the_rest():
+    scheduler = ConsultScheduler(hedging_enabled=False)
+    providers = FakeProviders({"a": [0.01], "b": [0.03], "c": [2.0]})
+
+    outcome = await scheduler.run(
+        ["a", "b", "c"], providers, timeout=5.0,
+        decided=lambda successes, pending: len(successes) >= 2
+    )
+
+    assert outcome.quorum_reached and not outcome.deadline_exceeded
+    assert outcome.successes == ["a#0", "b#0"]
+    assert outcome.statuses == {"a": SUCCEEDED, "b": SUCCEEDED, "c": CANCELLED}
+    assert providers.cancelled == [("c", 0)]
+    assert outcome.elapsed_ms < 500
+    # A provider cancelled by the quorum says nothing about its latency
+    assert "c" not in scheduler.latencies.get_stats()
+
+
+async def test_deadline_returns_partial_results():
+    scheduler = ConsultScheduler(hedging_enabled=False)
+    providers = FakeProviders({"fast": [0.01], "broken": [-0.02], "stuck": [5.0]})
+
+    outcome = await scheduler.run(["fast", "broken", "stuck"], providers, timeout=0.2)
+
+    assert outcome.deadline_exceeded
+    assert outcome.successes == ["fast#0"]
+    assert outcome.statuses == {"fast": SUCCEEDED, "broken": FAILED, "stuck": TIMED_OUT}
+    assert outcome.outcomes["broken"].error == "broken failed"
+    assert outcome.outcomes["stuck"].latency_ms >= 200
+    assert providers.cancelled == [("stuck", 0)]
+
+
+async def test_failures_and_timeouts_count_towards_the_p95():
+    scheduler = ConsultScheduler(latencies=LatencyWindow(min_samples=1), hedging_enabled=False)
+    providers = FakeProviders({"fast": [0.01], "broken": [-0.05], "stuck": [5.0]})
+
+    await scheduler.run(["fast", "broken", "stuck"], providers, timeout=0.15)
+
+    stats = scheduler.latencies.get_stats()
+    assert stats["fast"]["samples"] == stats["broken"]["samples"] == stats["stuck"]["samples"] == 1
+    assert stats["broken"]["p95_ms"] >= 50
+    assert stats["stuck"]["p95_ms"] >= 150
@@ -0,0 +1,169 @@
+"""Tests for the one-statement consultation context loader and its cache"""
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from dryad.core import consultation_context
+from dryad.core.consultation_context import ConsultationContextCache, load_consultation_context
+from dryad.database.models import Branch, Grove, Vessel
+from dryad.infrastructure.database import Base
+
+
+class Clock:
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+async def lineage_engine(url="sqlite+aiosqlite:///:memory:", **options):
+    """root <- design <- storage, each with a vessel; 'loose' has no vessel"""
+    engine = create_async_engine(url, **options)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        db.add(Grove(id="grove", name="test"))
+        parent = None
+        for depth, name in enumerate(["root", "design", "storage"]):
+            db.add(Branch(id=name, grove_id="grove", parent_id=parent, name=name.title(),
+                          description=f"{name} exploration", path_depth=depth))
+            db.add(Vessel(id=f"vessel-{name}", branch_id=name, storage_path=f"vessels/{name}",
+                          file_references={"notes.md": f"{name}/notes.md", f"{name}.md": f"files/{name}.md"}))
+            parent = name
+        db.add(Branch(id="loose", grove_id="grove", parent_id="root", name="Loose", path_depth=1))
+        await db.commit()
+    return engine
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    # The mapper and commit events invalidate the process-wide cache
+    fresh = ConsultationContextCache(ttl_seconds=30.0, clock=Clock())
+    monkeypatch.setattr(consultation_context, "_cache", fresh)
+    return fresh
+
+
+async def test_lineage_loads_in_one_statement_nearest_first():
+    engine = await lineage_engine(poolclass=StaticPool)
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    async with AsyncSession(engine) as db:
+        exists, context = await load_consultation_context(db, "storage")
+
+    assert len(statements) == 1
+    assert exists and context.vessel_id == "vessel-storage"
+    assert [ancestor.branch_id for ancestor in context.ancestors] == ["design", "root"]
+    assert context.lineage_ids == {"storage", "design", "root"}
+    # Nearer branches override the references they inherit
+    assert context.inherited_file_references() == {
+        "notes.md": "storage/notes.md", "root.md": "files/root.md",
+        "design.md": "files/design.md", "storage.md": "files/storage.md"
+    }
+    await engine.dispose()
+
+
+async def test_missing_branch_and_missing_vessel():
+    engine = await lineage_engine(poolclass=StaticPool)
+    async with AsyncSession(engine) as db:
+        assert await load_consultation_context(db, "nowhere") == (False, None)
+        assert await load_consultation_context(db, "loose") == (True, None)
+    await engine.dispose()
+
+
+async def test_parent_cycle_stops_at_the_depth_limit(monkeypatch):
+    monkeypatch.setattr(consultation_context, "MAX_LINEAGE_DEPTH", 5)
+    engine = await lineage_engine(poolclass=StaticPool)
+    async with AsyncSession(engine) as db:
+        root = await db.get(Branch, "root")
+        root.parent_id = "storage"
+        await db.commit()
+
+        exists, context = await load_consultation_context(db, "storage")
+
+    assert exists
+    assert [ancestor.branch_id for ancestor in context.ancestors] == ["design", "root", "storage", "design", "root"]
+    await engine.dispose()
+
+
+async def test_cached_contexts_expire_and_stay_bounded():
+    engine = await lineage_engine(poolclass=StaticPool)
+    clock = Clock()
+    cache = ConsultationContextCache(ttl_seconds=30.0, max_size=2, clock=clock)
+    async with AsyncSession(engine) as db:
+        first = await cache.get(db, "storage")
+        assert await cache.get(db, "storage") == first
+        assert (cache.get_stats()["hits"], cache.get_stats()["misses"]) == (1, 1)
+
+        clock.now += 31
+        await cache.get(db, "storage")
+        assert cache.get_stats()["misses"] == 2
+
+        await cache.get(db, "design")
+        await cache.get(db, "root")
+        assert cache.get_stats()["size"] == 2
+        # Missing contexts are not cached
+        await cache.get(db, "loose")
+        await cache.get(db, "loose")
+        assert cache.get_stats()["size"] == 2 and cache.get_stats()["misses"] == 6
+    await engine.dispose()
+
+
+async def test_ancestor_update_invalidates_descendants(cache):
+    engine = await lineage_engine(poolclass=StaticPool)
+    async with AsyncSession(engine) as db:
+        for branch_id in ("storage", "design", "root"):
+            await cache.get(db, branch_id)
+
+        vessel = await db.get(Vessel, "vessel-design")
+        vessel.file_references = {"design.md": "files/design-v2.md"}
+        await db.flush()
+        # The design vessel is in the lineage of design and storage, not of root
+        assert cache.get_stats()["size"] == 1
+
+        root = await db.get(Branch, "root")
+        root.description = "rewritten"
+        await db.commit()
+        assert cache.get_stats()["size"] == 0
+
+        _, context = await cache.get(db, "storage")
+    assert context.ancestors[-1].description == "rewritten"
+    assert context.inherited_file_references()["design.md"] == "files/design-v2.md"
+    await engine.dispose()
+
+
+async def test_commit_drops_contexts_read_before_it(cache, tmp_path):
+    engine = await lineage_engine(f"sqlite+aiosqlite:///{tmp_path / 'dryad.db'}")
+    async with AsyncSession(engine) as writer, AsyncSession(engine) as reader:
+        root = (await writer.execute(select(Branch).where(Branch.id == "root"))).scalar_one()
+        root.description = "rewritten"
+        await writer.flush()
+
+        # Another session reads the committed state between the flush and the commit
+        _, stale = await cache.get(reader, "storage")
+        assert stale.ancestors[-1].description == "root exploration"
+        await reader.rollback()
+
+        await writer.commit()
+        _, fresh = await cache.get(reader, "storage")
+    assert fresh.ancestors[-1].description == "rewritten"
+    await engine.dispose()
+
+
+async def test_rollback_discards_pending_invalidations(cache):
+    engine = await lineage_engine(poolclass=StaticPool)
+    async with AsyncSession(engine) as db:
+        root = await db.get(Branch, "root")
+        root.description = "abandoned"
+        await db.flush()
+        await db.rollback()
+        assert consultation_context._PENDING_KEY not in db.sync_session.info
+
+        await cache.get(db, "storage")
+        await db.commit()
+        assert cache.get_stats()["size"] == 1
+    await engine.dispose()
@@ -0,0 +1,221 @@
+"""Tests for the per-agent BM25 learning-context index"""
+
+import math
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from dryad.university.services import context_index
+from dryad.university.services.context_index import (
+    ContextIndexRegistry, ContextRetrievalIndex, flatten_text, tokenize
+)
+
+NOW = datetime(2025, 11, 1, tzinfo=timezone.utc)
+TYPES = ["problem_solving", "decision_making", "insight"]
+
+
+def make_contexts(count, seed=1, vocabulary=3000):
+    """Zipfian word ids so the most frequent terms appear in most contexts"""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, vocabulary + 1) ** 1.1
+    weights /= weights.sum()
+    contexts = {}
+    for i in range(count):
+        words = [f"w{n}" for n in rng.choice(vocabulary, rng.integers(8, 30), p=weights)]
+        contexts[f"ctx-{i}"] = (
+            f"ctx-{i}",
+            TYPES[i % len(TYPES)],
+            {"outcome": {"summary": " ".join(words[:-3])}, "context": {"task": f"task {i}"}},
+            [" ".join(words[-3:])],
+            round(float(rng.random()), 3),
+            NOW - timedelta(days=float(rng.exponential(40.0)))
+        )
+    return contexts
+
+
+class BruteForce:
+    """BM25 with the index's boosts, scored directly from the live contexts"""
+
+    def __init__(self, index, contexts):
+        self.index = index
+        self.contexts = contexts
+        self.documents = {}
+        for context_id, _, data, scenarios, _, _ in contexts.values():
+            counts = Counter(tokenize(" ".join(flatten_text(data))))
+            for token in tokenize(" ".join(scenarios)):
+                counts[token] += index.scenario_weight
+            self.documents[context_id] = counts
+        self.avg_len = sum(sum(c.values()) for c in self.documents.values()) / len(self.documents)
+
+    def search(self, query, context_types=None, min_confidence=0.0):
+        """Every matching context as (score, context_id), best first"""
+        index, documents = self.index, self.documents
+        live = len(documents)
+        terms = set(tokenize(query))
+        df = {t: sum(1 for c in documents.values() if t in c) for t in terms}
+
+        scored = []
+        for context_id, context_type, _, _, confidence, updated_at in self.contexts.values():
+            counts = documents[context_id]
+            if context_types is not None and context_type not in context_types:
+                continue
+            if confidence < min_confidence or not terms & counts.keys():
+                continue
+            length = sum(counts.values())
+            score = 0.0
+            for term in terms & counts.keys():
+                idf = math.log(1.0 + (live - df[term] + 0.5) / (df[term] + 0.5))
+                tf = counts[term]
+                norm = index.k1 * (1.0 - index.b + index.b * length / self.avg_len)
+                score += idf * tf * (index.k1 + 1.0) / (tf + norm)
+            age = max(NOW.timestamp() - updated_at.timestamp(), 0.0)
+            score *= (1.0 + index.confidence_weight * confidence
+                      + index.recency_weight * 2 ** (-age / index.recency_half_life))
+            scored.append((score, context_id))
+        scored.sort(reverse=True)
+        return scored
+
+
+def assert_same_ranking(index, contexts, query, limit=10, reference=None, **filters):
+    reference = reference or BruteForce(index, contexts)
+    found = index.search(query, limit=limit, now=NOW.timestamp(), **filters)
+    everything = reference.search(query, **filters)
+    expected = everything[:limit]
+    assert len(found) == len(expected)
+    # Scores agree to float32 precision; ids agree except where scores tie
+    assert [score for _, score in found] == pytest.approx([score for score, _ in expected], rel=1e-4)
+    exact = {context_id: score for score, context_id in everything}
+    for context_id, score in found:
+        assert exact[context_id] == pytest.approx(score, rel=1e-4)
+
+def filled_index(contexts, **options):
+    index = ContextRetrievalIndex("agent", **options)
+    for row in contexts.values():
+        index.upsert(*row)
+    return index
+
+
+def test_tokenize_and_flatten():
+    assert tokenize("The API-v2 failed, a retry WORKED") == ["api", "v2", "failed", "retry", "worked"]
+    assert flatten_text({"outcome": {"status": "ok", "steps": [1, None, "two"]}}) == \
+        ["outcome", "status", "ok", "steps", "1", "two"]
+
+
+def test_maxscore_ranking_matches_brute_force(monkeypatch):
+    contexts = make_contexts(6000)
+    index = filled_index(contexts)
+    # The most frequent terms have postings long enough for MaxScore pruning
+    assert index._df[index._vocab["w0"]] > 4096
+
+    # Pruned terms look up existing candidates by binary search
+    pruned = []
+    searchsorted = np.searchsorted
+    monkeypatch.setattr(context_index.np, "searchsorted", lambda *args: pruned.append(1) or searchsorted(*args))
+
+    reference = BruteForce(index, contexts)
+    rng = np.random.default_rng(2)
+    queries = ["w0 w1", "w0 w1 w2 w3", "w5 w0", "task w0 w1"]
+    queries += [f"w{rng.integers(20, 3000)} w{rng.integers(20, 3000)} w0 w1" for _ in range(20)]
+    for query in queries:
+        assert_same_ranking(index, contexts, query, reference=reference)
+    assert len(pruned) >= len(queries)
+    assert_same_ranking(index, contexts, "w40 w0 w1", limit=5, reference=reference,
+                        context_types=["insight"], min_confidence=0.5)
+    assert_same_ranking(index, contexts, "w0 w7", limit=3, reference=reference,
+                        context_types=["decision_making", "unknown"])
+    assert index.search("nothing matches", now=NOW.timestamp()) == []
+
+
+def test_updates_tombstone_the_previous_version():
+    contexts = make_contexts(200, seed=3)
+    index = filled_index(contexts)
+
+    _, context_type, _, _, _, updated_at = contexts["ctx-7"]
+    contexts["ctx-7"] = ("ctx-7", context_type, {"outcome": "zebra migration"}, ["savanna"], 0.9,
+                         updated_at + timedelta(hours=1))
+    index.upsert(*contexts["ctx-7"])
+    assert index.get_stats()["tombstones"] == 1 and len(index) == 200
+    assert index.search("zebra", now=NOW.timestamp())[0][0] == "ctx-7"
+
+    # Re-indexing an unchanged row is a no-op
+    index.upsert(*contexts["ctx-7"])
+    assert index.get_stats()["tombstones"] == 1
+
+    assert index.remove("ctx-8") and not index.remove("ctx-8")
+    del contexts["ctx-8"]
+    assert "ctx-8" not in index and len(index) == 199
+    # Document frequencies and the average length only count live versions
+    reference = BruteForce(index, contexts)
+    for query in ("w0 w1", "w3 task", "w2 w9 w11"):
+        assert_same_ranking(index, contexts, query, reference=reference)
+        assert "ctx-8" not in [context_id for context_id, _ in index.search(query, limit=200, now=NOW.timestamp())]
+
+
+def test_compaction_drops_tombstoned_postings():
+    contexts = make_contexts(400, seed=4)
+    index = filled_index(contexts)
+    rng = np.random.default_rng(5)
+    compactions = 0
+    for round_ in range(3):
+        for context_id, (_, context_type, data, scenarios, confidence, updated_at) in list(contexts.items()):
+            words = " ".join(f"w{n}" for n in rng.integers(0, 60, 10))
+            contexts[context_id] = (context_id, context_type, {"outcome": words}, scenarios,
+                                    confidence, updated_at + timedelta(minutes=round_ + 1))
+            tombstones = index.get_stats()["tombstones"]
+            index.upsert(*contexts[context_id])
+            if index.get_stats()["tombstones"] < tombstones:
+                compactions += 1
+                # Only live slots remain, each posting once per term
+                assert len(index._ids) == len(index) == 400
+                assert index.get_stats()["postings"] == sum(len(terms) for terms, _ in index._doc_terms)
+                assert all(list(docs) == sorted(docs) for docs in index._postings_docs)
+
+    # Tombstones passed 1000 (and the live count) once
+    assert compactions == 1
+    stats = index.get_stats()
+    assert stats["contexts"] == 400 and stats["tombstones"] == 1200 - 1001
+    reference = BruteForce(index, contexts)
+    for query in ("w0 w1", "w17 w3", "w59"):
+        assert_same_ranking(index, contexts, query, reference=reference)
+
+
+def test_embeddings_rerank_lexical_candidates():
+    contexts = {
+        "near": ("near", "insight", {"outcome": "database timeout retry"}, [], 0.5, NOW),
+        "far": ("far", "insight", {"outcome": "database timeout retry backoff"}, [], 0.5, NOW),
+    }
+    vectors = {"near": [1.0, 0.0], "far": [0.0, 1.0]}
+
+    def embed(text):
+        return vectors["far"] if "backoff" in text else vectors["near"] if "outcome" in text else [1.0, 0.1]
+
+    index = filled_index(contexts, embed=embed, vector_weight=0.9)
+    assert [context_id for context_id, _ in index.search("database timeout", now=NOW.timestamp())] == ["near", "far"]
+    lexical = filled_index(contexts)
+    assert lexical.search("database backoff", now=NOW.timestamp())[0][0] == "far"
+
+
+def test_registry_syncs_from_the_watermark():
+    rows = make_contexts(5, seed=6)
+    watermarks = []
+
+    def loader(watermark):
+        watermarks.append(watermark)
+        return [row for row in rows.values() if watermark is None or row[5] >= watermark]
+
+    registry = ContextIndexRegistry(max_agents=2, refresh_interval=0.0)
+    index = registry.get("agent", loader)
+    assert len(index) == 5 and watermarks == [None]
+
+    latest = max(row[5] for row in rows.values())
+    rows["ctx-new"] = ("ctx-new", "insight", {"outcome": "fresh lesson"}, [], 0.5, latest + timedelta(seconds=1))
+    assert registry.get("agent", loader) is index
+    assert watermarks[1] == latest and "ctx-new" in index
+
+    registry.get("other", loader)
+    registry.get("third", loader)
+    assert registry.peek("agent") is None
+    registry.invalidate()
+    assert registry.peek("third") is None
@@ -0,0 +1,27 @@
+"""Tests for token-budgeted RAG context packing"""
+
+from dryad.core.context_packing import ContextPacker, TokenCounter
+
+
+def long_chunk(words=300):
+    return {"id": "a", "content": " ".join(f"finding{i}" for i in range(words)), "score": 0.9, "document_title": "Tides"}
+
+
+def test_truncated_context_fits_the_budget():
+    counter = TokenCounter()
+    packer = ContextPacker(max_tokens=1000, counter=counter)
+    for budget in (20, 30, 60, 100):
+        packed = packer.pack([long_chunk()], "tides", max_tokens=budget)
+        assert packed.diagnostics.truncated
+        assert packed.text.startswith("Document 1")
+        assert "finding0" in packed.text
+        assert counter.count(packed.text) <= budget
+        assert packed.diagnostics.tokens_used == packed.passages[0]["tokens"] <= budget
+
+
+def test_budget_smaller_than_the_header_gives_empty_context():
+    counter = TokenCounter()
+    packed = ContextPacker(max_tokens=5, counter=counter).pack([long_chunk()], "tides")
+    assert packed.text == ""
+    assert packed.passages == []
+    assert packed.diagnostics.tokens_used == 0
@@ -0,0 +1,200 @@
+"""Tests for compiled skill graphs, cached agent progress and the curriculum engine"""
+
+import random
+import uuid
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from dryad.university.database.models_university import (
+    Base, CurriculumPath, SkillNode, SkillProgress, SkillTree, University, UniversityAgent
+)
+from dryad.university.services.curriculum_engine import CurriculumEngine
+from dryad.university.services.curriculum_graph import CurriculumGraphRegistry, SkillGraph, bit_positions
+
+
+def row(skill_id, prerequisites=(), hours=1.0, order_index=0):
+    return (skill_id, skill_id.title(), list(prerequisites), hours, order_index, "conceptual")
+
+
+def random_dag(rng, size=60):
+    rows = []
+    for i in range(size):
+        prerequisites = [f"s{j}" for j in rng.sample(range(i), min(i, rng.randint(0, 3)))]
+        rows.append(row(f"s{i}", prerequisites, hours=float(i % 5), order_index=rng.randint(0, 5)))
+    rng.shuffle(rows)
+    return rows
+
+
+def transitive(rows, skill_id):
+    """Brute force: every prerequisite reachable from a skill"""
+    direct = {r[0]: r[2] for r in rows}
+    seen, stack = set(), list(direct[skill_id])
+    while stack:
+        prerequisite = stack.pop()
+        if prerequisite not in seen:
+            seen.add(prerequisite)
+            stack.extend(direct[prerequisite])
+    return seen
+
+
+def test_bit_positions():
+    assert bit_positions(0) == []
+    assert bit_positions(0b101001) == [0, 3, 5]
+    assert bit_positions(1 << 200 | 1 << 7, limit=1) == [7]
+
+
+def test_topological_order_and_closures_match_brute_force():
+    rng = random.Random(3)
+    rows = random_dag(rng)
+    graph = SkillGraph("tree", rows)
+
+    assert sorted(graph.ids) == sorted(r[0] for r in rows) and not graph.cyclic
+    for skill_id, _, prerequisites, _, _, _ in rows:
+        assert all(graph.position[p] < graph.position[skill_id] for p in prerequisites)
+        expected = transitive(rows, skill_id)
+        assert set(graph.prerequisites(skill_id)) == expected
+        assert set(graph.prerequisites(skill_id, transitive=False)) == set(prerequisites)
+    assert graph.total_hours == sum(r[3] for r in rows)
+
+
+def test_ready_skills_follow_order_index():
+    graph = SkillGraph("tree", [
+        row("intro", order_index=2), row("setup", order_index=1),
+        row("basics", ["setup"], order_index=0), row("advanced", ["basics", "intro"], order_index=0)
+    ])
+    assert graph.ids == ["setup", "basics", "intro", "advanced"]
+
+
+def test_cycles_and_unknown_prerequisites_do_not_break_compilation():
+    graph = SkillGraph("tree", [
+        row("a"), row("b", ["a", "c"]), row("c", ["b"]), row("d", ["a", "missing", "d"])
+    ])
+    assert graph.ids[:2] == ["a", "d"]
+    assert graph.cyclic == {"b", "c"}
+    assert graph.unknown_prerequisites == 2
+    # The edge closing the cycle is dropped, so every skill is still reachable
+    progress = graph.progress(["a"])
+    progress.complete(graph.position["b"])
+    assert progress.next_skills() == ["d", "c"]
+
+
+def test_incremental_progress_matches_a_rebuild():
+    rng = random.Random(11)
+    rows = random_dag(rng)
+    graph = SkillGraph("tree", rows)
+    progress = graph.progress([])
+    completed = []
+
+    while True:
+        unlocked = progress.next_skills()
+        assert unlocked == [
+            skill_id for skill_id in graph.ids
+            if skill_id not in completed and set(graph.prerequisites(skill_id, transitive=False)) <= set(completed)
+        ]
+        rebuilt = graph.progress(completed)
+        assert (rebuilt.completed, rebuilt.unlocked, rebuilt.completed_hours) == \
+            (progress.completed, progress.unlocked, progress.completed_hours)
+        if not unlocked:
+            break
+        skill_id = rng.choice(unlocked)
+        assert progress.complete(graph.position[skill_id])
+        assert not progress.complete(graph.position[skill_id])
+        completed.append(skill_id)
+
+    assert progress.percentage == 100.0 and progress.remaining_hours == 0.0
+
+
+def test_missing_prerequisites_in_learning_order():
+    graph = SkillGraph("tree", [row("a"), row("b", ["a"]), row("c", ["b"]), row("d", ["c", "a"])])
+    progress = graph.progress(["b"])
+    assert progress.missing_prerequisites(graph.position["d"]) == ["a", "c"]
+    assert not progress.is_unlocked(graph.position["d"])
+    assert progress.is_unlocked(graph.position["c"])
+
+
+def test_registry_recompiles_changed_trees_and_drops_their_progress():
+    registry = CurriculumGraphRegistry(refresh_interval=0.0)
+    version, builds = [1], []
+
+    def rows():
+        builds.append(version[0])
+        return [row("a"), row("b", ["a"])] + ([row("c", ["b"])] if version[0] > 1 else [])
+
+    graph = registry.graph("tree", lambda: version[0], rows)
+    progress = registry.progress(graph, "agent", lambda: ["a"])
+    assert registry.graph("tree", lambda: version[0], rows) is graph
+    assert registry.progress(graph, "agent", lambda: []) is progress
+    assert builds == [1]
+
+    assert registry.record_completion("tree", "agent", "b")
+    assert progress.completed_count == 2
+    assert not registry.record_completion("tree", "other-agent", "b")
+
+    version[0] = 2
+    recompiled = registry.graph("tree", lambda: version[0], rows)
+    assert recompiled is not graph and len(recompiled) == 3
+    assert registry.get_stats() == {"trees": 1, "skills": 3, "agents": 0}
+    assert registry.progress(recompiled, "agent", lambda: ["a", "b"]).next_skills() == ["c"]
+
+
+def test_registry_bounds_trees_and_agents():
+    registry = CurriculumGraphRegistry(max_trees=2, max_agents=3, progress_ttl=0.0)
+    graphs = [registry.graph(f"tree-{i}", lambda: 1, lambda: [row("a")]) for i in range(3)]
+    assert registry.get_stats()["trees"] == 2
+
+    loads = []
+    for agent in range(5):
+        registry.progress(graphs[2], f"agent-{agent}", lambda: loads.append(1) or [])
+    assert registry.get_stats()["agents"] == 3
+    # A zero TTL reloads progress on every read
+    registry.progress(graphs[2], "agent-4", lambda: loads.append(1) or ["a"])
+    assert len(loads) == 6
+
+    registry.invalidate(agent_id="agent-4")
+    assert registry.get_stats()["agents"] == 2
+    registry.invalidate()
+    assert registry.get_stats() == {"trees": 0, "skills": 0, "agents": 0}
+
+
+def seeded_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = Session(engine)
+    ids = {name: str(uuid.uuid4()) for name in ("university", "tree", "curriculum", "agent", "a", "b", "c")}
+    db.add(University(id=ids["university"], name="Uni0", owner_user_id="owner"))
+    db.add(SkillTree(id=ids["tree"], university_id=ids["university"], name="Python"))
+    for order_index, (name, prerequisites) in enumerate((("a", []), ("b", ["a"]), ("c", ["a", "b"]))):
+        db.add(SkillNode(id=ids[name], skill_tree_id=ids["tree"], name=name.upper(), order_index=order_index,
+                         prerequisites=[ids[p] for p in prerequisites], estimated_duration_hours=2.0))
+    db.add(CurriculumPath(id=ids["curriculum"], university_id=ids["university"], name="Python",
+                          skill_tree_id=ids["tree"]))
+    db.add(UniversityAgent(id=ids["agent"], university_id=ids["university"], name="student",
+                           current_curriculum_id=ids["curriculum"]))
+    db.commit()
+    return db, ids
+
+
+def test_engine_serves_progress_for_uuid_ids():
+    db, ids = seeded_session()
+    engine = CurriculumEngine(db, graphs=CurriculumGraphRegistry())
+
+    path = engine.generate_learning_path(ids["curriculum"])
+    assert [skill["skill_node_id"] for skill in path] == [ids["a"], ids["b"], ids["c"]]
+    assert [skill["all_prerequisites_count"] for skill in path] == [0, 1, 2]
+
+    assert not engine.complete_skill(ids["agent"], ids["c"], enforce_prerequisites=True)
+    assert engine.complete_skill(ids["agent"], ids["a"], enforce_prerequisites=True)
+    assert [s["skill_node_id"] for s in engine.get_next_skills(ids["agent"])] == [ids["b"]]
+    assert [s["skill_node_id"] for s in engine.get_skill_path(ids["agent"], ids["c"])] == [ids["b"], ids["c"]]
+
+    progress = engine.get_curriculum_progress(ids["agent"])
+    assert progress["curriculum_id"] == ids["curriculum"]
+    assert (progress["completed_skills"], progress["total_skills"]) == (1, 3)
+    assert progress["estimated_remaining_hours"] == 4.0
+    assert db.query(SkillProgress).count() == 1
+
+    assert engine.get_curriculum_progress(str(uuid.uuid4())) is None
+    assert engine.get_next_skills(str(uuid.uuid4())) == []
+    db.close()
@@ -0,0 +1,76 @@
+"""Tests for document ingestion into the chunk store"""
+
+import pytest
+
+from dryad.core.exceptions import ExternalServiceException
+from dryad.infrastructure import ingestion
+from dryad.infrastructure.ingestion import IngestionPipeline
+from dryad.infrastructure.vector_store import InMemoryVectorStore
+
+
+def document(topic, sentences=12):
+    return " ".join(f"{topic} note {i} covers a separate finding in detail." for i in range(sentences))
+
+
+def keyword(store, text, **filters):
+    return store.search_keyword(text, limit=10, filters=filters or None)
+
+
+async def test_chunks_carry_title_type_and_filterable_metadata():
+    store = InMemoryVectorStore()
+    pipeline = IngestionPipeline(store, chunk_size=200, overlap=20)
+    text = document("Tidal")
+    try:
+        report = await pipeline.ingest(
+            "doc-1", text, source="Tides", title="Tides", content_type="text/markdown",
+            metadata={"year": 2024, "tags": ["energy", "ocean"], "author": {"name": "nested"}, "content": "reserved"}
+        )
+        await pipeline.ingest("doc-2", text, source="Tides", title="Tides", metadata={"year": 2019})
+    finally:
+        pipeline.close()
+
+    assert report.chunks > 1 and report.written == report.chunks
+    hits = keyword(store, "tidal", year=2024)
+    assert {hit["document_id"] for hit in hits} == {"doc-1"}
+    hit = hits[0]
+    assert hit["title"] == "Tides"
+    assert hit["content_type"] == "text/markdown"
+    assert hit["tags"] == ["energy", "ocean"]
+    assert "author" not in hit
+    assert "Tidal" in hit["content"]
+    assert {h["document_id"] for h in keyword(store, "tidal", tags="ocean")} == {"doc-1"}
+    assert {h["document_id"] for h in keyword(store, "tidal", year=[2019, 2024])} == {"doc-1", "doc-2"}
+
+
+async def test_changed_metadata_rewrites_chunks():
+    store = InMemoryVectorStore()
+    pipeline = IngestionPipeline(store, chunk_size=200, overlap=20)
+    text = document("Carbon")
+    try:
+        first = await pipeline.ingest("doc", text, title="Marshes", metadata={"status": "draft"})
+        unchanged = await pipeline.ingest("doc", text, title="Marshes", metadata={"status": "draft"})
+        changed = await pipeline.ingest("doc", text, title="Marshes", metadata={"status": "final"})
+    finally:
+        pipeline.close()
+
+    assert unchanged.written == 0 and unchanged.unchanged == first.chunks
+    assert changed.written == first.chunks and changed.deleted == first.chunks
+    assert keyword(store, "carbon", status="draft") == []
+    assert len(keyword(store, "carbon", status="final")) == store.count()
+
+
+def test_unreachable_weaviate_fails_instead_of_falling_back(monkeypatch):
+    class UnreachableStore:
+        def __init__(self, url, api_key=None):
+            self.client = None
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(ingestion, "WEAVIATE_AVAILABLE", True)
+    monkeypatch.setattr(ingestion, "VectorStoreService", UnreachableStore)
+    monkeypatch.setattr(ingestion, "_pipeline", None)
+    with pytest.raises(ExternalServiceException):
+        ingestion.get_ingestion_pipeline()
+    # Nothing was cached, so the next call checks Weaviate again
+    assert ingestion._pipeline is None
@@ -0,0 +1,160 @@
+"""Tests for materialized knowledge graphs and the topic candidate index"""
+
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from dryad.university.database.database import Base
+from dryad.university.services import knowledge_graph_store
+from dryad.university.services.knowledge_graph_store import KnowledgeGraphStore
+
+GRAPH = "domain:math"
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    monkeypatch.setattr(knowledge_graph_store, "_candidate_indexes", knowledge_graph_store._CandidateIndexCache())
+    engine = create_engine(f"sqlite:///{tmp_path / 'graph.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    opened = []
+
+    def open_session():
+        opened.append(factory())
+        return opened[-1]
+
+    yield open_session
+    for session in opened:
+        session.close()
+    engine.dispose()
+
+
+def node(node_id, node_type="concept", confidence=0.9, topics=(), prerequisites=()):
+    return {"node_id": node_id, "node_type": node_type, "name": node_id.title(), "confidence": confidence,
+            "topics": list(topics), "prerequisites": list(prerequisites)}
+
+
+def edge(source_id, target_id, relationship_type="related"):
+    return {"source_id": source_id, "target_id": target_id, "relationship_type": relationship_type, "strength": 0.7}
+
+
+def jaccard(a, b):
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def test_materialize_keeps_counters_and_degrees(sessions):
+    store = KnowledgeGraphStore(sessions())
+    written = store.materialize(
+        GRAPH,
+        [node("a"), node("b", "skill", 0.6), node("c", "skill", 0.3)],
+        [edge("a", "b"), edge("a", "c"), edge("b", "c"), edge("a", "b")]
+    )
+
+    assert written == {"nodes": 3, "edges": 3}
+    assert store.is_materialized(GRAPH)
+    assert store.node_count(GRAPH) == 3 and store.node_count(GRAPH, min_confidence=0.5) == 2
+    assert store.type_histogram(GRAPH) == {"concept": 1, "skill": 2}
+    assert store.type_histogram(GRAPH, min_confidence=0.8) == {"concept": 1}
+    degrees = {n.node_id: (n.out_degree, n.in_degree) for n in store.nodes(GRAPH)}
+    assert degrees == {"a": (2, 0), "b": (1, 1), "c": (0, 2)}
+    assert len(store.edges(GRAPH, min_source_confidence=0.8)) == 2
+    # A second materialization is a no-op
+    assert store.materialize(GRAPH, [node("d")], []) == {"nodes": 0, "edges": 0}
+
+
+def test_incremental_writes_and_neighborhood(sessions):
+    store = KnowledgeGraphStore(sessions())
+    store.materialize(GRAPH, [node("a"), node("b"), node("c")], [edge("a", "b"), edge("b", "c")])
+
+    store.upsert_node(GRAPH, "d", node_type="skill", confidence=0.4)
+    assert store.add_edge(GRAPH, "c", "d")
+    assert not store.add_edge(GRAPH, "c", "d", strength=0.9)
+    assert store.counters(GRAPH)["edges"] == 3
+
+    hood = store.neighborhood(GRAPH, "a", hops=2, direction="out")
+    assert [(n["id"], n["hop"]) for n in hood["nodes"]] == [("a", 0), ("b", 1), ("c", 2)]
+    assert store.neighborhood(GRAPH, "d", hops=3, direction="in")["nodes"][-1]["id"] == "a"
+    assert store.neighborhood(GRAPH, "a", hops=3, max_nodes=2)["truncated"]
+
+    assert store.remove_node(GRAPH, "b")
+    counters = store.counters(GRAPH)
+    assert (counters["nodes"], counters["edges"]) == (3, 1)
+    degrees = {n.node_id: (n.out_degree, n.in_degree) for n in store.nodes(GRAPH)}
+    assert degrees == {"a": (0, 0), "c": (1, 0), "d": (0, 1)}
+
+    store.upsert_node(GRAPH, "d", node_type="concept", confidence=0.9)
+    assert store.type_histogram(GRAPH) == {"concept": 3}
+
+
+def test_links_match_a_brute_force_scan(sessions):
+    rng = random.Random(11)
+    words = [f"w{i}" for i in range(12)]
+    prereqs = [f"p{i}" for i in range(6)]
+    features = {
+        f"n{i}": (rng.sample(words, rng.randint(1, 3)), rng.sample(prereqs, rng.randint(0, 2)))
+        for i in range(300)
+    }
+    store = KnowledgeGraphStore(sessions())
+    store.materialize(GRAPH, [node(i, topics=t, prerequisites=p) for i, (t, p) in features.items()], [])
+    store.db.commit()
+
+    for threshold in (0.6, 0.3):
+        for i in range(20):
+            node_id, topics, prerequisites = f"new-{threshold}-{i}", rng.sample(words, 2), rng.sample(prereqs, 1)
+            store.upsert_node(GRAPH, node_id, topics=topics, prerequisites=prerequisites)
+            linked = store.link_similar(GRAPH, node_id, threshold=threshold)
+
+            expected = {
+                other for other, (t, p) in features.items()
+                if (jaccard(topics, t) + jaccard(prerequisites, p)) / 2 > threshold
+            }
+            assert {c["related_knowledge_id"] for c in linked} == expected
+            assert [c["similarity_score"] for c in linked] == sorted((c["similarity_score"] for c in linked), reverse=True)
+            features[node_id] = (topics, prerequisites)
+
+
+def test_shared_index_only_sees_committed_nodes(sessions):
+    writer, reader = KnowledgeGraphStore(sessions()), KnowledgeGraphStore(sessions())
+    writer.materialize(GRAPH, [node("x", topics=["tides"], prerequisites=["waves"])], [])
+    writer.db.commit()
+    index = reader.candidate_index(GRAPH)
+    assert index.features("x") is not None
+
+    writer.upsert_node(GRAPH, "new", topics=["tides"], prerequisites=["waves"], commit=False)
+    # The writer links against its own uncommitted node; nobody else sees it
+    assert [c["related_knowledge_id"] for c in writer.link_similar(GRAPH, "new", commit=False)] == ["x"]
+    assert index.features("new") is None
+    writer.db.rollback()
+    assert index.features("new") is None
+    assert reader.candidate_index(GRAPH).features("new") is None
+
+    writer.upsert_node(GRAPH, "new", topics=["tides"], prerequisites=["waves"], commit=False)
+    writer.remove_node(GRAPH, "x", commit=False)
+    assert index.features("x") is not None
+    assert writer.link_similar(GRAPH, "new", commit=False) == []
+    writer.db.commit()
+
+    assert index.features("new") is not None and index.features("x") is None
+    assert reader.candidate_index(GRAPH) is index and len(index) == 1
+
+
+def test_racing_materialization_writes_the_graph_once(sessions):
+    first, second = KnowledgeGraphStore(sessions()), KnowledgeGraphStore(sessions())
+    nodes, edges = [node("a"), node("b")], [edge("a", "b")]
+    assert not second.is_materialized(GRAPH)
+
+    first.materialize(GRAPH, nodes, edges)
+    # The second writer checked before the first committed
+    second.is_materialized = lambda graph_id: False
+    second.upsert_node("domain:art", "sketch", topics=["ink"], commit=False)
+
+    assert second.materialize(GRAPH, nodes, edges) == {"nodes": 0, "edges": 0}
+    # The lost claim rolled back a savepoint, not the session's other work
+    assert second._pending_index("domain:art") is not None
+    second.db.commit()
+    counters = first.counters(GRAPH)
+    assert (counters["nodes"], counters["edges"], counters["materialized"]) == (2, 1, 1)
+    assert first.counters("domain:art")["nodes"] == 1
@@ -0,0 +1,55 @@
+"""Tests for the literature search pipeline and paper index"""
+
+from dryad.university.services.literature_engine import LiteratureReviewPipeline, LiteratureSource, PaperIndex
+
+
+def fake_source(name, pages):
+    """A source that serves ``pages`` one cursor at a time"""
+    async def fetch(query, cursor):
+        page = cursor or 0
+        return {'papers': pages[page], 'next_cursor': page + 1 if page + 1 < len(pages) else None}
+    return LiteratureSource(name=name, fetch=fetch, rate_limit=0)
+
+
+async def test_merged_fields_are_searchable():
+    pipeline = LiteratureReviewPipeline([
+        fake_source('crossref', [[{'doi': '10.1/abc', 'title': 'Courts and algorithms'}]]),
+        fake_source('arxiv', [[{'doi': 'https://doi.org/10.1/ABC', 'title': 'Courts and algorithms',
+                                'abstract': 'Sentencing guidelines under machine learning'}]]),
+    ])
+    index, reports = await pipeline.search('courts')
+
+    assert len(index) == 1
+    assert index.duplicates == 1
+    assert sorted(index.papers()[0]['sources']) == ['arxiv', 'crossref']
+    assert sum(report['new_papers'] for report in reports.values()) == 1
+
+    included, scores = pipeline.select(index, 'sentencing guidelines', min_terms=2)
+    assert included == set(index.ids)
+    assert index.term_frequency['sentencing'] == 1
+    assert index.term_frequency['courts'] == 1
+
+
+async def test_short_query_terms_match():
+    pipeline = LiteratureReviewPipeline([
+        fake_source('crossref', [
+            [{'doi': '10.1/1', 'title': 'AI in law: a survey'}],
+            [{'doi': '10.1/2', 'title': 'Soil chemistry in the tropics'}],
+        ]),
+    ])
+    index, reports = await pipeline.search('ai law')
+    assert reports['crossref']['pages'] == 2
+
+    included, scores = pipeline.select(index, 'AI in law')
+    assert included == {index.ids[0]}
+    assert scores[index.ids[0]] == 2
+    # Short words are matchable but are not themes
+    assert 'ai' not in dict(index.top_terms())
+
+
+def test_duplicate_without_new_fields_keeps_frequencies():
+    index = PaperIndex()
+    index.add({'doi': '10.1/x', 'title': 'Neural retrieval', 'abstract': 'Dense retrieval models'})
+    index.add({'doi': '10.1/x', 'title': 'Neural retrieval'})
+    assert index.term_frequency['retrieval'] == 2
+    assert len(index.papers_with_term('retrieval')) == 1
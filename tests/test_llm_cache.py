@@ -0,0 +1,124 @@
+"""Tests for the two-level LLM response cache"""
+
+import asyncio
+
+import pytest
+
+from dryad.core.config import Settings
+from dryad.core.llm_cache import LLMResponseCache
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class Model:
+    """compute() stand-in that counts calls and can be held until released"""
+
+    def __init__(self, answer="answer", delay=0.0):
+        self.answer = answer
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.answer
+
+
+async def test_concurrent_misses_share_one_call():
+    cache = LLMResponseCache()
+    model = Model(delay=0.05)
+
+    answers = await asyncio.gather(*(cache.get_or_compute("gpt", "What is a dryad?", model) for _ in range(10)))
+
+    assert answers == ["answer"] * 10
+    assert model.calls == 1
+    metrics = cache.get_metrics()
+    assert metrics["coalesced"] == 9 and metrics["misses"] == 1
+
+
+async def test_waiter_takes_over_when_the_leader_is_cancelled():
+    cache = LLMResponseCache()
+    slow, fast = Model("leader", delay=5.0), Model("follower")
+
+    leader = asyncio.create_task(cache.get_or_compute("gpt", "prompt", slow))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_compute("gpt", "prompt", fast))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await follower == "follower"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert (slow.calls, fast.calls) == (1, 1)
+    assert await cache.get("gpt", "prompt") == "follower"
+
+
+async def test_entries_expire_after_their_ttl():
+    clock = Clock()
+    cache = LLMResponseCache(ttl_seconds=60.0, clock=clock)
+    model = Model()
+
+    await cache.get_or_compute("gpt", "prompt", model)
+    clock.now += 59
+    await cache.get_or_compute("gpt", "prompt", model)
+    assert model.calls == 1
+
+    clock.now += 2
+    await cache.get_or_compute("gpt", "prompt", model)
+    assert model.calls == 2
+
+
+async def test_l2_survives_a_restart(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    first = LLMResponseCache(path=path)
+    try:
+        await first.get_or_compute("gpt", [("system", "Be brief"), ("human", "Hello")], Model({"text": "hi"}))
+    finally:
+        first.close()
+
+    second = LLMResponseCache(path=path)
+    model = Model()
+    try:
+        # Whitespace differences normalize to the same key
+        answer = await second.get_or_compute("gpt", [("system", "Be  brief"), ("human", "Hello ")], model)
+    finally:
+        second.close()
+
+    assert answer == {"text": "hi"}
+    assert model.calls == 0
+    assert second.get_metrics()["hits_l2"] == 1
+
+
+async def test_uncacheable_answers_are_returned_but_not_stored():
+    cache = LLMResponseCache()
+    fallback = Model("Please try again")
+
+    answer = await cache.get_or_compute("gpt", "prompt", fallback, cacheable=lambda text: text != "Please try again")
+    assert answer == "Please try again"
+    assert await cache.get("gpt", "prompt") is None
+    assert cache.get_metrics()["not_cacheable"] == 1
+
+    real = Model("forty-two")
+    await cache.get_or_compute("gpt", "prompt", real, cacheable=lambda text: text != "Please try again")
+    assert await cache.get("gpt", "prompt") == "forty-two"
+
+
+async def test_params_and_namespaces_separate_entries():
+    cache = LLMResponseCache()
+    model = Model()
+    await cache.get_or_compute("gpt", "prompt", model, params={"branch": "a"})
+    await cache.get_or_compute("gpt", "prompt", model, params={"branch": "b"})
+    await cache.get_or_compute("gpt", "prompt", model, params={"branch": "a"}, namespace="other")
+    assert model.calls == 3
+
+
+def test_process_cache_is_opt_in_and_memory_only_by_default():
+    fields = Settings.model_fields
+    assert fields["LLM_CACHE_ENABLED"].default is False
+    assert fields["LLM_CACHE_PATH"].default is None
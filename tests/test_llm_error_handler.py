@@ -0,0 +1,202 @@
+"""Tests for the LLM call guard: breakers, retry budgets, AIMD limits and deadlines"""
+
+import asyncio
+
+import pytest
+
+from dryad.core.llm_error_handler import (
+    AdaptiveConcurrencyLimit,
+    LLMCallGuard,
+    LLMDeadlineExceeded,
+    LLMUnavailableError,
+    RetryBudget,
+    llm_deadline,
+    remaining_deadline,
+)
+from dryad.core.provider_telemetry import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ProviderTelemetry
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class ProviderError(Exception):
+    """Error shaped like an SDK exception carrying an HTTP status"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeProvider:
+    """Async LLM call that fails with the queued errors, then answers"""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def make_guard(clock, config=None, **breaker_options):
+    options = {"consecutive_failures": 3, "cooldown_seconds": 10.0, "probe_successes": 1, **breaker_options}
+    telemetry = ProviderTelemetry(
+        breaker_factory=lambda name: CircuitBreaker(name, **options),
+        clock=clock
+    )
+    config = {"LLM_RETRY_BACKOFF_SECONDS": 0.0, "LLM_QUEUE_TIMEOUT_SECONDS": 0.1, **(config or {})}
+    return LLMCallGuard(telemetry=telemetry, call_timeout=1.0, max_retries=0, config=config), telemetry
+
+
+async def test_breaker_opens_then_admits_one_half_open_probe():
+    clock = FakeClock()
+    guard, telemetry = make_guard(clock)
+    failing = FakeProvider([ProviderError(503)] * 3)
+    for _ in range(3):
+        with pytest.raises(ProviderError):
+            await guard.call("openai", failing)
+    assert telemetry.circuit_state("openai") == OPEN
+
+    untouched = FakeProvider()
+    with pytest.raises(LLMUnavailableError) as rejected:
+        await guard.call("openai", untouched)
+    assert rejected.value.reason == "circuit_open"
+    assert untouched.calls == 0
+
+    clock.advance(11)
+    assert telemetry.circuit_state("openai") == HALF_OPEN
+    release = asyncio.Event()
+
+    async def slow_probe():
+        await release.wait()
+        return "probe"
+
+    probe = asyncio.create_task(guard.call("openai", slow_probe))
+    await asyncio.sleep(0)
+    # Only one probe is let through while half-open
+    with pytest.raises(LLMUnavailableError):
+        await guard.call("openai", untouched)
+    release.set()
+    assert await probe == "probe"
+    assert telemetry.circuit_state("openai") == CLOSED
+    assert await guard.call("openai", untouched) == "ok"
+    assert guard.get_metrics()["openai"]["circuit_rejected"] == 2
+
+
+async def test_retries_stop_when_the_budget_is_spent():
+    clock = FakeClock()
+    guard, _ = make_guard(
+        clock,
+        config={"LLM_RETRY_BUDGET_RATIO": 0.0, "LLM_RETRY_MIN_PER_SECOND": 0.0},
+        consecutive_failures=1000,
+        min_requests=1000
+    )
+    # The bucket starts with 10 tokens: two calls with 5 retries each drain it
+    for _ in range(2):
+        provider = FakeProvider([ProviderError(502)] * 6)
+        with pytest.raises(ProviderError):
+            await guard.call("anthropic", provider, max_retries=5)
+        assert provider.calls == 6
+
+    provider = FakeProvider([ProviderError(502)] * 6)
+    with pytest.raises(ProviderError):
+        await guard.call("anthropic", provider, max_retries=5)
+    assert provider.calls == 1
+    metrics = guard.get_metrics()["anthropic"]
+    assert metrics["retries"] == 10
+    assert metrics["retry_budget_exhausted"] == 1
+
+
+def test_retry_budget_refills_from_first_attempts():
+    clock = FakeClock()
+    budget = RetryBudget(ratio=0.5, min_per_second=0.0, max_tokens=2.0, clock=clock)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+async def test_aimd_limit_grows_additively_and_halves_on_overload():
+    clock = FakeClock()
+    limit = AdaptiveConcurrencyLimit(initial=4, min_limit=1, max_limit=8, clock=clock)
+    for _ in range(4):
+        assert await limit.acquire(timeout=0)
+    assert not await limit.acquire(timeout=0)
+
+    for _ in range(4):
+        clock.advance(0.1)
+        limit.release(latency=0.1)
+    assert 4.8 < limit.limit < 5.0
+
+    for _ in range(20):
+        assert await limit.acquire(timeout=0)
+        clock.advance(0.1)
+        limit.release(latency=0.1)
+    assert int(limit.limit) > 5
+
+    before = limit.limit
+    assert await limit.acquire(timeout=0)
+    limit.release(overloaded=True)
+    assert limit.limit == pytest.approx(before / 2)
+    # A second overload within one round trip is the same burst
+    assert await limit.acquire(timeout=0)
+    limit.release(overloaded=True)
+    assert limit.limit == pytest.approx(before / 2)
+
+    clock.advance(1.0)
+    assert await limit.acquire(timeout=0)
+    limit.release(overloaded=True)
+    assert limit.limit == pytest.approx(before / 4)
+
+
+async def test_nested_deadlines_only_tighten():
+    assert remaining_deadline() is None
+    with llm_deadline(10.0):
+        assert 9.0 < remaining_deadline() <= 10.0
+        with llm_deadline(1.0):
+            assert remaining_deadline() <= 1.0
+            with llm_deadline(100.0):
+                assert remaining_deadline() <= 1.0
+            with llm_deadline(None):
+                assert remaining_deadline() <= 1.0
+        assert remaining_deadline() > 9.0
+    assert remaining_deadline() is None
+
+
+async def test_expired_deadline_refuses_the_call():
+    guard, _ = make_guard(FakeClock())
+    provider = FakeProvider()
+    with llm_deadline(0.0):
+        with pytest.raises(LLMDeadlineExceeded):
+            await guard.call("openai", provider)
+    assert provider.calls == 0
+
+
+async def test_client_errors_do_not_count_against_the_provider():
+    clock = FakeClock()
+    guard, telemetry = make_guard(clock)
+    for _ in range(5):
+        provider = FakeProvider([ProviderError(400)])
+        with pytest.raises(ProviderError) as raised:
+            await guard.call("openai", provider, max_retries=3)
+        assert raised.value.status_code == 400
+        assert provider.calls == 1
+
+    assert telemetry.circuit_state("openai") == CLOSED
+    metrics = guard.get_metrics()["openai"]
+    assert metrics["client_errors"] == 5
+    assert "failures" not in metrics and "retries" not in metrics
+    assert telemetry.totals("openai")["failed_requests"] == 0
+    assert await guard.call("openai", FakeProvider()) == "ok"
@@ -0,0 +1,85 @@
+"""Tests for the LLM client registry and its shared connection pool"""
+
+import threading
+
+from dryad.infrastructure.llm.providers import LLMConfig
+from dryad.infrastructure.llm.registry import HTTPClientPool, ModelRegistry, model_key
+
+
+class Builder:
+    """Registry builder that records the pool it was given"""
+
+    def __init__(self, name):
+        self.name = name
+        self.pools = []
+
+    def __call__(self, pool):
+        self.pools.append(pool)
+        return object()
+
+
+def test_least_recently_used_model_is_evicted():
+    registry = ModelRegistry(max_size=2)
+    a, b, c = Builder("a"), Builder("b"), Builder("c")
+    model_a = registry.get("a", a)
+    registry.get("b", b)
+    assert registry.get("a", a) is model_a  # a is now the most recent
+
+    registry.get("c", c)
+    assert registry.get("a", a) is model_a
+    registry.get("b", b)
+
+    assert (len(a.pools), len(b.pools), len(c.pools)) == (1, 2, 1)
+    stats = registry.get_stats()
+    assert stats["evictions"] == 2 and stats["size"] == 2
+    assert (stats["hits"], stats["misses"]) == (2, 4)
+    # Every model is built around the same pool
+    assert a.pools[0] is b.pools[0] is registry.pool
+
+
+def test_api_keys_separate_models_by_fingerprint():
+    config = dict(provider="openai", model_name="gpt-4o", temperature=0.7)
+    alice = model_key(LLMConfig(**config, api_key="sk-alice-secret"))
+    bob = model_key(LLMConfig(**config, api_key="sk-bob-secret"))
+
+    assert alice != bob
+    assert alice == model_key(LLMConfig(**config, api_key="sk-alice-secret"))
+    assert model_key(LLMConfig(**config)) != alice
+    # The key itself never ends up in the registry
+    assert not any("secret" in str(part) for part in alice + bob)
+
+    registry = ModelRegistry()
+    assert registry.get(alice, Builder("alice")) is not registry.get(bob, Builder("bob"))
+    assert registry.get_stats()["size"] == 2
+
+
+def test_racing_builds_register_one_model():
+    registry = ModelRegistry()
+    started, release = threading.Barrier(2), threading.Event()
+
+    def slow_build(pool):
+        started.wait()
+        release.wait()
+        return object()
+
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get("key", slow_build))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert models[0] is models[1]
+    assert registry.get_stats()["size"] == 1
+
+
+async def test_pool_clients_are_shared_and_recreated_after_close():
+    pool = HTTPClientPool(max_connections=4)
+    client = pool.async_client
+    assert pool.async_client is client and pool.sync_client is pool.sync_client
+
+    await pool.aclose()
+    assert client.is_closed
+    assert pool.async_client is not client
+    await pool.aclose()
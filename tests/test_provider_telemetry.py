@@ -0,0 +1,149 @@
+"""Tests for sliding-window provider telemetry, circuit breaking and routing"""
+
+import asyncio
+import json
+import random
+import threading
+
+from dryad.core.provider_telemetry import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ProviderTelemetry
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_telemetry(clock, **options):
+    breaker = lambda name: CircuitBreaker(name, consecutive_failures=3, cooldown_seconds=30.0, probe_successes=1)
+    return ProviderTelemetry(clock=clock, breaker_factory=breaker, rng=random.Random(1), **options)
+
+
+def test_windows_only_count_recent_outcomes():
+    clock = Clock()
+    telemetry = make_telemetry(clock)
+    for _ in range(4):
+        telemetry.record("openai", False, 100.0, admitted=False)
+    clock.now += 120
+    for _ in range(6):
+        telemetry.record("openai", True, 100.0, admitted=False)
+
+    last_minute = telemetry.window_summary("openai", "1m")
+    last_five = telemetry.window_summary("openai", "5m")
+    assert (last_minute["requests"], last_minute["error_rate"]) == (6, 0.0)
+    assert (last_five["requests"], last_five["failures"]) == (10, 4)
+    assert last_five["error_rate"] == 0.4
+
+    clock.now += 3600
+    assert telemetry.window_summary("openai", "1h")["requests"] == 0
+    assert telemetry.totals("openai")["total_requests"] == 10
+
+
+def test_latency_percentiles_from_the_histogram():
+    clock = Clock()
+    telemetry = make_telemetry(clock)
+    for latency in [100.0] * 90 + [2000.0] * 10:
+        telemetry.record("anthropic", True, latency, admitted=False)
+
+    summary = telemetry.window_summary("anthropic", "1m")
+    # Log-spaced bins with 20% resolution
+    assert abs(summary["p50_ms"] - 100.0) / 100.0 < 0.2
+    assert abs(summary["p95_ms"] - 2000.0) / 2000.0 < 0.2
+    assert abs(summary["p99_ms"] - 2000.0) / 2000.0 < 0.2
+    # Failed calls count as requests but not as latency samples
+    telemetry.record("anthropic", False, 60000.0, admitted=False)
+    assert telemetry.window_summary("anthropic", "1m")["p99_ms"] < 3000
+
+
+def test_breaker_opens_probes_and_closes():
+    clock = Clock()
+    telemetry = make_telemetry(clock)
+    for _ in range(3):
+        assert telemetry.acquire("openai")
+        telemetry.record("openai", False, 50.0)
+
+    assert telemetry.circuit_state("openai") == OPEN
+    assert telemetry.window_summary("openai")["circuit_state"] == OPEN
+    assert not telemetry.acquire("openai")
+
+    clock.now += 31
+    # Both views agree the circuit is due for a probe
+    assert telemetry.circuit_state("openai") == HALF_OPEN
+    assert telemetry.window_summary("openai")["circuit_state"] == HALF_OPEN
+    assert telemetry.acquire("openai")
+    assert not telemetry.acquire("openai")  # one probe at a time
+
+    telemetry.record("openai", False, 50.0)
+    assert telemetry.circuit_state("openai") == OPEN
+    clock.now += 31
+    assert telemetry.circuit_state("openai") == OPEN  # cooldown doubled after a failed probe
+    clock.now += 30
+    assert telemetry.acquire("openai")
+    telemetry.record("openai", True, 50.0)
+    assert telemetry.circuit_state("openai") == CLOSED
+    assert telemetry.window_summary("openai")["circuit_trips"] == 2
+
+
+def test_power_of_two_choices_prefers_the_faster_provider():
+    clock = Clock()
+    telemetry = make_telemetry(clock)
+    for provider_id, latency in (("fast", 100.0), ("medium", 400.0), ("slow", 1600.0)):
+        telemetry.record(provider_id, True, latency, admitted=False)
+
+    picks = [telemetry.choose(["slow", "medium", "fast"]) for _ in range(300)]
+
+    # The slowest provider never wins a comparison; the fastest wins every one it is in
+    assert picks.count("slow") == 0
+    assert picks.count("fast") > 150
+    assert telemetry.choose(["slow", "medium", "fast"], best_of_all=True) == "fast"
+
+
+def test_router_skips_open_circuits_and_spreads_in_flight_load():
+    clock = Clock()
+    telemetry = make_telemetry(clock)
+    telemetry.record("a", True, 100.0, admitted=False)
+    telemetry.record("b", True, 120.0, admitted=False)
+    for _ in range(3):
+        telemetry.record("c", False, 10.0, admitted=False)
+
+    assert telemetry.choose(["a", "b", "c"], best_of_all=True) == "a"
+    assert telemetry.choose(["c"]) is None
+    # Calls in flight make a provider look slower until they complete
+    for _ in range(5):
+        telemetry.acquire("a")
+    assert telemetry.choose(["a", "b"]) == "b"
+
+
+async def test_persistence_runs_off_the_event_loop(tmp_path):
+    clock = Clock()
+    path = tmp_path / "telemetry.json"
+    telemetry = make_telemetry(clock, persist_path=str(path), persist_interval=30.0)
+    written = []
+    persist = telemetry.persist
+
+    def tracked_persist():
+        written.append(threading.current_thread() is threading.main_thread())
+        persist()
+
+    telemetry.persist = tracked_persist
+    telemetry.record("openai", True, 100.0, admitted=False)
+    assert written == []  # not due yet
+
+    clock.now += 31
+    telemetry.record("openai", True, 200.0, admitted=False)
+    telemetry.record("openai", True, 300.0, admitted=False)
+    for _ in range(100):
+        if path.exists():
+            break
+        await asyncio.sleep(0.01)
+
+    # One write for the interval, from a worker thread
+    assert written == [False]
+    saved = json.loads(path.read_text())["providers"]["openai"]["totals"][0]
+    assert saved in (2, 3)
+
+    reloaded = make_telemetry(clock, persist_path=str(path))
+    assert reloaded.totals("openai")["total_requests"] == saved
+    assert reloaded.window_summary("openai")["requests"] == saved
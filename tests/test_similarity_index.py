@@ -0,0 +1,126 @@
+"""Tests for the MinHash-LSH passage index behind plagiarism checks"""
+
+import numpy as np
+
+from dryad.university.services import similarity_index
+from dryad.university.services.similarity_index import MinHasher, SimilarityIndex, shingle_hashes, tokenize
+
+
+def essay(rng, words=200):
+    return " ".join(f"w{i}" for i in rng.integers(0, 5000, words))
+
+
+def reword(text, rng, fraction):
+    """Replace a fraction of the words with words outside the corpus vocabulary"""
+    words = text.split()
+    for position in rng.choice(len(words), int(len(words) * fraction), replace=False):
+        words[position] = f"edit{position}"
+    return " ".join(words)
+
+
+def best_passage_jaccard(index, query, text):
+    """Brute force: exact Jaccard over every pair of query and document passages"""
+    query_passages = [set(p[0].tolist()) for p in index._passages(*tokenize(query))]
+    passages = [set(p[0].tolist()) for p in index._passages(*tokenize(text))]
+    return max(len(q & p) / len(q | p) for q in query_passages for p in passages)
+
+
+def test_signatures_estimate_jaccard():
+    rng = np.random.default_rng(0)
+    hasher = MinHasher(num_perm=256)
+    shared = rng.integers(0, 2**62, 600, dtype=np.uint64)
+    for extra in (0, 200, 600, 1800):
+        a = np.concatenate([shared, rng.integers(0, 2**62, extra, dtype=np.uint64)])
+        b = np.concatenate([shared, rng.integers(0, 2**62, extra, dtype=np.uint64)])
+        exact = len(shared) / (len(shared) + 2 * extra)
+        estimate = np.mean(hasher.signature(a) == hasher.signature(b))
+        assert abs(estimate - exact) < 0.1
+
+
+def test_shingles_ignore_case_and_punctuation():
+    first = shingle_hashes(tokenize("The Tide turns, slowly; at dusk.")[0], 3)
+    second = shingle_hashes(tokenize("the tide turns slowly at dusk")[0], 3)
+    assert len(first) == 4 and np.array_equal(first, second)
+    # Texts shorter than one shingle still hash to one
+    assert len(shingle_hashes(tokenize("tide")[0], 3)) == 1
+
+
+def test_lsh_finds_what_brute_force_finds():
+    rng = np.random.default_rng(42)
+    index = SimilarityIndex()
+    corpus = {f"doc-{i}": essay(rng) for i in range(40)}
+    index.add_documents((doc_id, text, doc_id.upper(), "library") for doc_id, text in corpus.items())
+
+    for fraction in (0.0, 0.05, 0.15):
+        source = corpus["doc-7"]
+        copied = reword(" ".join(source.split()[50:130]), rng, fraction)
+        query = f"{essay(rng, 60)} {copied} {essay(rng, 60)}"
+
+        result = index.query(query, top_k=10, threshold=0.2)
+        found = {match["document_id"] for match in result["matches"]}
+        expected = {doc_id for doc_id, text in corpus.items() if best_passage_jaccard(index, query, text) >= 0.2}
+
+        assert expected == {"doc-7"}
+        assert found == expected
+        match = result["matches"][0]
+        assert match["title"] == "DOC-7" and match["source"] == "library"
+        assert match["jaccard"] == round(best_passage_jaccard(index, query, source), 4)
+        # The reported spans cover the copied words
+        assert match["source_span"]["start"] <= source.index(" ".join(source.split()[60:70]))
+        assert query[match["query_span"]["start"]:match["query_span"]["end"]].count("w") > 40
+        assert 0.0 < result["similarity_score"] < 1.0
+        # Only candidates sharing a band were loaded, not the whole corpus
+        assert result["candidates_checked"] < index.get_stats()["passages"]
+
+
+def test_unrelated_text_does_not_match():
+    rng = np.random.default_rng(5)
+    index = SimilarityIndex()
+    index.add_document("essay", essay(rng))
+
+    result = index.query(essay(np.random.default_rng(6)))
+    assert result["matches"] == [] and result["similarity_score"] == 0.0
+    assert index.query("")["query_passages"] == 0
+
+
+def test_reindexing_and_removal_keep_the_bands_consistent():
+    rng = np.random.default_rng(9)
+    index = SimilarityIndex()
+    first, second = essay(rng), essay(rng)
+
+    index.add_document("essay", first)
+    index.add_document("essay", second)
+    assert index.get_stats()["documents"] == 1
+    assert index.query(first)["matches"] == []
+    assert index.query(second)["matches"][0]["jaccard"] == 1.0
+
+    assert index.remove_document("essay")
+    assert not index.remove_document("essay")
+    assert index._conn.execute("SELECT COUNT(*) FROM bands").fetchone()[0] == 0
+    assert index.query(second)["matches"] == []
+
+
+def test_index_survives_a_restart_with_its_stored_parameters(tmp_path):
+    path = str(tmp_path / "plagiarism.db")
+    text = essay(np.random.default_rng(11))
+    first = SimilarityIndex(path, shingle_size=4, num_perm=32, bands=16)
+    first.add_document("thesis", text)
+    first.close()
+
+    # Signatures are only comparable with the parameters they were built with
+    reopened = SimilarityIndex(path, shingle_size=5, num_perm=64, bands=32)
+    stats = reopened.get_stats()
+    assert (stats["shingle_size"], stats["num_perm"], stats["bands"]) == (4, 32, 16)
+    assert stats["documents"] == 1
+    assert reopened.query(text)["matches"][0]["document_id"] == "thesis"
+    reopened.close()
+
+
+def test_one_index_per_path(monkeypatch, tmp_path):
+    monkeypatch.setattr(similarity_index, "_indexes", {})
+    path = str(tmp_path / "plagiarism.db")
+
+    index = similarity_index.get_similarity_index(path)
+    assert similarity_index.get_similarity_index(path) is index
+    assert similarity_index.get_similarity_index(":memory:") is not index
+    index.close()
@@ -0,0 +1,130 @@
+"""Tests for streaming dataset statistics and the spilling result cache"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dryad.university.services import stats_engine
+from dryad.university.services.stats_engine import SpillingLRUCache, StreamingStatsEngine
+
+
+def research_frame(rows=5000, seed=7):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(1e6, 25.0, rows)
+    frame = pd.DataFrame({
+        "x": x,
+        "y": 3.0 * (x - 1e6) + rng.normal(0, 5.0, rows),
+        "z": rng.exponential(2.0, rows),
+        "trend": np.arange(rows) * 0.5 + rng.normal(0, 1.0, rows),
+        "label": rng.choice(["a", "b", None], rows)
+    })
+    frame.loc[rng.choice(rows, 400, replace=False), "z"] = np.nan
+    frame.loc[rng.choice(rows, 50, replace=False), "y"] = np.nan
+    return frame
+
+
+def assert_matches_pandas(profile, frame):
+    numeric = frame.select_dtypes(include=[np.number])
+    described = numeric.describe()
+    assert profile["row_count"] == len(frame)
+    assert profile["numeric_columns"] == list(numeric.columns)
+    assert profile["missing_values"] == frame.isna().sum().to_dict()
+    for column in numeric.columns:
+        summary = profile["summary"][column]
+        assert summary["count"] == described[column]["count"]
+        for stat in ("mean", "std", "min", "max"):
+            assert summary[stat] == pytest.approx(described[column][stat], rel=1e-9, abs=1e-9)
+        # Quantiles come from the t-digest: central ones are good to about one centroid,
+        # and partial digests from workers merge in completion order
+        spread = described[column]["max"] - described[column]["min"]
+        for stat in ("25%", "50%", "75%"):
+            assert abs(summary[stat] - described[column][stat]) < 0.02 * spread
+
+    expected = numeric.corr()
+    for a in numeric.columns:
+        for b in numeric.columns:
+            assert profile["correlation_matrix"][a][b] == pytest.approx(expected[a][b], abs=1e-9)
+
+
+def test_batched_profile_matches_pandas():
+    frame = research_frame()
+    profile = StreamingStatsEngine(batch_rows=700, max_workers=1).profile(frame)
+
+    assert_matches_pandas(profile, frame)
+    assert [t["column"] for t in profile["trends"]] == ["trend"]
+    assert profile["trends"][0]["slope_per_row"] == pytest.approx(0.5, rel=0.01)
+    assert {(c["var1"], c["var2"]) for c in profile["strong_correlations"]} == {("x", "y")}
+
+
+def test_csv_source_is_streamed_across_workers(tmp_path):
+    frame = research_frame()
+    path = tmp_path / "survey.csv"
+    frame.to_csv(path, index=False)
+
+    serial = StreamingStatsEngine(batch_rows=600, max_workers=1).profile(str(path))
+    parallel = StreamingStatsEngine(batch_rows=600, max_workers=2).profile(str(path))
+
+    loaded = pd.read_csv(path)
+    assert_matches_pandas(serial, loaded)
+    assert_matches_pandas(parallel, loaded)
+    # The row sample does not depend on how batches were spread over workers
+    assert parallel["sample"] == serial["sample"]
+
+
+def test_row_sample_is_bounded_and_uniform():
+    frame = pd.DataFrame({"position": np.arange(50_000, dtype=float)})
+    profile = StreamingStatsEngine(batch_rows=1000, max_workers=1).profile(frame)
+
+    positions = profile["sample"]["row_positions"]
+    assert len(positions) == stats_engine.DEFAULT_SAMPLE_ROWS
+    assert positions == sorted(positions)
+    assert profile["sample"]["values"]["position"] == [float(p) for p in positions]
+    # Uniform over the whole file, not just the first batches
+    assert np.histogram(positions, bins=5, range=(0, 50_000))[0].min() > 150
+
+
+def test_npy_memmap_source(tmp_path):
+    values = np.random.default_rng(3).normal(10.0, 2.0, (3000, 2))
+    path = tmp_path / "readings.npy"
+    np.save(path, values)
+
+    profile = StreamingStatsEngine(batch_rows=512, max_workers=1).profile(str(path))
+
+    assert profile["summary"]["column_0"]["mean"] == pytest.approx(values[:, 0].mean())
+    assert profile["summary"]["column_1"]["std"] == pytest.approx(values[:, 1].std(ddof=1))
+
+
+def test_cache_spills_each_value_with_one_pickle(tmp_path, monkeypatch):
+    pickled = []
+    dumps = pickle.dumps
+    monkeypatch.setattr(stats_engine.pickle, "dumps", lambda value, **kw: pickled.append(value) or dumps(value, **kw))
+    cache = SpillingLRUCache(max_items=2, spill_dir=tmp_path)
+
+    for i in range(4):
+        cache[f"k{i}"] = {"value": i}
+
+    assert len(pickled) == 4
+    assert cache.get_stats()["spilled_items"] == 2
+    assert len(list(tmp_path.iterdir())) == 2
+    # Spilled entries load back, and spill again without another pickle
+    assert cache["k0"] == {"value": 0}
+    assert len(pickled) == 4
+    assert cache.get_stats()["disk_hits"] == 1
+
+
+def test_temporary_spill_directory_is_removed():
+    cache = SpillingLRUCache(max_items=1)
+    cache["a"], cache["b"] = 1, 2
+    spill_dir = cache._spill_dir
+    assert spill_dir.exists()
+
+    cache.close()
+    assert not spill_dir.exists()
+
+    collected = SpillingLRUCache(max_items=1)
+    collected["a"], collected["b"] = 1, 2
+    spill_dir = collected._spill_dir
+    del collected
+    assert not spill_dir.exists()
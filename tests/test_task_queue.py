@@ -0,0 +1,169 @@
+"""Tests for the local task queue worker pool"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from dryad.core import task_queue
+from dryad.core.task_queue import (
+    COMPLETED, FAILED, PENDING, RUNNING, TaskNotSupportedError, TaskQueue, TaskWorkerPool
+)
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(task_queue, "time", SimpleNamespace(time=fake, strftime=time.strftime, gmtime=time.gmtime))
+    return fake
+
+
+async def wait_for_attempt(queue, task_id, status, timeout=5.0):
+    """The task once its first attempt has been recorded with ``status``"""
+    async def poll():
+        while True:
+            task = await queue.get(task_id)
+            if task.status == status and task.error:
+                return task
+            await asyncio.sleep(0.01)
+    return await asyncio.wait_for(poll(), timeout)
+
+
+async def test_unsupported_task_fails_without_retry():
+    queue = TaskQueue(path=":memory:", backoff_base=60.0)
+
+    async def unsupported(payload):
+        raise TaskNotSupportedError("document_processing is not supported in asynchronous mode")
+
+    async def flaky(payload):
+        raise RuntimeError("temporary outage")
+
+    pool = TaskWorkerPool(queue, {"document_processing": unsupported, "rag_query": flaky}, poll_interval=0.05)
+    try:
+        unsupported_id = await queue.enqueue(task_type="document_processing", payload={})
+        flaky_id = await queue.enqueue(task_type="rag_query", payload={})
+        await pool.start()
+
+        failed = await wait_for_attempt(queue, unsupported_id, FAILED)
+        assert failed.attempts == 1
+        assert "not supported" in failed.error
+
+        retried = await wait_for_attempt(queue, flaky_id, PENDING)
+        assert retried.attempts == 1
+        assert retried.error == "temporary outage"
+        assert pool.stats["failed"] == 1
+        assert pool.stats["retried"] == 1
+    finally:
+        await pool.stop()
+        queue.close()
+
+
+async def test_expired_lease_is_recovered_by_another_worker(clock):
+    queue = TaskQueue(path=":memory:", visibility_timeout=10.0)
+    try:
+        task_id = await queue.enqueue(task_type="rag_query", payload={"query": "tides"})
+        first, = await queue.lease("worker-1")
+        assert (first.task_id, first.status, first.attempts) == (task_id, RUNNING, 1)
+        assert await queue.lease("worker-2") == []
+
+        # A heartbeat keeps the lease past its original deadline
+        clock.now += 8
+        assert await queue.extend_lease(task_id, "worker-1")
+        clock.now += 8
+        assert await queue.lease("worker-2") == []
+
+        # The worker stops heartbeating and its lease runs out
+        clock.now += 11
+        second, = await queue.lease("worker-2")
+        assert (second.task_id, second.attempts, second.lease_owner) == (task_id, 2, "worker-2")
+        assert second.error == "Lease expired"
+
+        # The first worker has lost the task and cannot finish it
+        assert not await queue.extend_lease(task_id, "worker-1")
+        assert not await queue.complete(task_id, "worker-1", {"answer": "stale"})
+        assert await queue.fail(task_id, "worker-1", "late failure") is None
+        assert await queue.complete(task_id, "worker-2", {"answer": "fresh"})
+        done = await queue.get(task_id)
+        assert (done.status, done.result, done.error) == (COMPLETED, {"answer": "fresh"}, None)
+    finally:
+        queue.close()
+
+
+async def test_lease_expiring_on_the_final_attempt_fails_the_task(clock):
+    queue = TaskQueue(path=":memory:", visibility_timeout=10.0)
+    try:
+        task_id = await queue.enqueue(task_type="rag_query", payload={}, max_attempts=1)
+        await queue.lease("worker-1")
+        clock.now += 11
+        assert await queue.lease("worker-2") == []
+
+        task = await queue.get(task_id)
+        assert (task.status, task.attempts) == (FAILED, 1)
+        assert task.error == "Lease expired after final attempt"
+        assert (await queue.counts())[FAILED] == 1
+    finally:
+        queue.close()
+
+
+async def test_running_tasks_survive_a_restart(clock, tmp_path):
+    path = str(tmp_path / "tasks.db")
+    queue = TaskQueue(path=path, visibility_timeout=10.0)
+    task_id = await queue.enqueue(task_type="rag_query", payload={"query": "tides"})
+    await queue.lease("worker-1")
+    # The process dies with the task leased
+    queue.close()
+
+    restarted = TaskQueue(path=path, visibility_timeout=10.0)
+    try:
+        assert await restarted.lease("worker-2") == []
+        clock.now += 11
+        recovered, = await restarted.lease("worker-2")
+        assert (recovered.task_id, recovered.attempts, recovered.payload) == (task_id, 2, {"query": "tides"})
+    finally:
+        restarted.close()
+
+
+async def test_keyset_pages_are_stable_while_tasks_arrive(clock):
+    queue = TaskQueue(path=":memory:")
+    try:
+        # Tasks enqueued together share created_at; seq breaks the tie
+        batch = await queue.enqueue_many([("rag_query", {"n": n}) for n in range(15)])
+        clock.now += 1
+        singles = [await queue.enqueue(task_type="agent_chat", payload={"n": n}) for n in range(7)]
+        newest_first = singles[::-1] + batch[::-1]
+
+        first = await queue.list_tasks(limit=10)
+        assert [t.task_id for t in first["tasks"]] == newest_first[:10]
+
+        # New tasks land before the cursor and do not shift later pages
+        clock.now += 1
+        await queue.enqueue(task_type="agent_chat", payload={})
+        seen, cursor = [t.task_id for t in first["tasks"]], first["next_cursor"]
+        while cursor:
+            page = await queue.list_tasks(limit=10, cursor=cursor)
+            seen.extend(t.task_id for t in page["tasks"])
+            cursor = page["next_cursor"]
+        assert seen == newest_first
+
+        # An exactly full last page has no next cursor
+        assert (await queue.list_tasks(limit=23))["next_cursor"] is None
+
+        filtered = await queue.list_tasks(task_type="rag_query", status="PENDING", limit=4)
+        assert [t.task_id for t in filtered["tasks"]] == batch[::-1][:4]
+        rest = await queue.list_tasks(task_type="rag_query", status="pending", limit=20,
+                                      cursor=filtered["next_cursor"])
+        assert [t.task_id for t in rest["tasks"]] == batch[::-1][4:] and rest["next_cursor"] is None
+
+        with pytest.raises(ValueError):
+            await queue.list_tasks(cursor="not-a-cursor")
+    finally:
+        queue.close()
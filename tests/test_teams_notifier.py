@@ -0,0 +1,135 @@
+"""Tests for Teams notification delivery against a local stub webhook"""
+
+import asyncio
+import json
+
+import pytest
+
+from dryad.integrations.dryad_teams_notifier import DRYADTeamsNotifier
+
+
+class StubWebhook:
+    """Minimal HTTP/1.1 webhook endpoint with keep-alive and 429/503 injection"""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        self.cards = []
+        self.rate_limit_next = 0
+        self.retry_after = "0.3"
+        self.failing = False
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/webhook"
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                body = await reader.readexactly(length)
+                self.requests += 1
+
+                headers = ""
+                if self.failing:
+                    status = "503 Service Unavailable"
+                elif self.rate_limit_next > 0:
+                    self.rate_limit_next -= 1
+                    status = "429 Too Many Requests"
+                    headers = f"Retry-After: {self.retry_after}\r\n"
+                else:
+                    status = "200 OK"
+                    self.cards.append(json.loads(body))
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n{headers}Content-Length: 1\r\nConnection: keep-alive\r\n\r\n1".encode()
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+async def webhook():
+    stub = StubWebhook()
+    url = await stub.start()
+    yield stub, url
+    await stub.close()
+
+
+async def test_burst_is_coalesced_over_pooled_connections(webhook, tmp_path):
+    stub, url = webhook
+    notifier = DRYADTeamsNotifier(url, coalesce_window=0.1, spool_path=str(tmp_path / "spool.jsonl"))
+    await notifier.start()
+    instruction = {"action": "restart", "endpoint": "/api/run", "method": "POST"}
+    for c in range(5):
+        for _ in range(4):
+            await notifier.send_instruction_sent(f"client-{c}", instruction)
+    assert await notifier.flush(timeout=10)
+    stats = notifier.get_stats()
+    await notifier.stop()
+
+    assert stats["notifications_delivered"] == 20
+    assert stats["digests_sent"] == 5
+    assert stub.requests == 5
+    assert stub.connections <= 4
+    assert stats["spooled"] == 0
+
+
+async def test_rate_limit_honours_retry_after(webhook):
+    stub, url = webhook
+    stub.rate_limit_next = 3
+    notifier = DRYADTeamsNotifier(url, coalesce_window=0.0, spool_path="", backoff_base=0.05)
+    await notifier.start()
+    started = asyncio.get_running_loop().time()
+    for c in range(5):
+        await notifier.send_client_startup(f"client-{c}", f"http://client-{c}/hook")
+    assert await notifier.flush(timeout=10)
+    elapsed = asyncio.get_running_loop().time() - started
+    stats = notifier.get_stats()
+    await notifier.stop()
+
+    assert stats["notifications_delivered"] == 5
+    assert stats["rate_limited"] == 3
+    assert elapsed >= float(stub.retry_after)
+
+
+async def test_spooled_notifications_are_replayed_after_restart(webhook, tmp_path):
+    stub, url = webhook
+    spool = str(tmp_path / "spool.jsonl")
+    stub.failing = True
+    first = DRYADTeamsNotifier(url, coalesce_window=0.0, spool_path=spool, backoff_base=0.05, max_retries=50)
+    await first.start()
+    for c in range(3):
+        await first.send_instruction_sent(f"client-{c}", {"action": "restart", "endpoint": "/", "method": "POST"})
+    await asyncio.sleep(0.2)
+    await first.stop(timeout=0.1)
+    assert stub.cards == []
+
+    stub.failing = False
+    second = DRYADTeamsNotifier(url, coalesce_window=0.0, spool_path=spool)
+    await second.start()
+    assert await second.flush(timeout=10)
+    stats = second.get_stats()
+    await second.stop()
+
+    assert stats["replayed"] == 3
+    assert len(stub.cards) == 3
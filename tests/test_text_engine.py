@@ -0,0 +1,138 @@
+"""Tests for the single-pass streaming text analyzer"""
+
+import pytest
+
+from dryad.university.services.document_processing import DocumentProcessingService
+from dryad.university.services.text_engine import (
+    BoundedCounter, StreamingTextAnalyzer, TextAccumulator, count_syllables, iter_text_chunks
+)
+
+DOCUMENT = """# Research Overview
+
+INTRODUCTION
+John Smith and Maria Garcia met at Stanford University in New York on 03/14/2024.
+The research study was excellent, and the analysis of the software system was good!
+Was the market strategy bad? Contact john.smith@example.org or see https://example.org/paper today.
+
+1. Methods
+- collect survey data
+- analyze survey data with the algorithm
+
+Results:
+The study shows that students learn faster with adaptive software. Chicago was next.
+"""
+
+
+def analyze(source, chunk_size=1 << 20, include=None):
+    return StreamingTextAnalyzer(chunk_size=chunk_size).analyze(source, include=include)
+
+
+def test_chunks_end_on_line_boundaries_and_rejoin():
+    text = DOCUMENT * 20
+    chunks = list(iter_text_chunks(text, 100))
+
+    assert "".join(chunks) == text
+    assert all(chunk.endswith("\n") for chunk in chunks[:-1])
+    assert max(len(chunk) for chunk in chunks) <= 100
+    # A line longer than the chunk size is cut at a space
+    assert list(iter_text_chunks("alpha beta gamma", 8)) == ["alpha ", "beta ", "gamma"]
+
+
+def test_results_do_not_depend_on_chunking_or_source(tmp_path):
+    text = DOCUMENT * 30
+    path = tmp_path / "document.txt"
+    path.write_text(text, encoding="utf-8")
+    pages = [text[i:i + 333] for i in range(0, len(text), 333)]
+
+    whole = analyze(text)
+    assert analyze(text, chunk_size=200) == whole
+    assert analyze(path, chunk_size=500) == whole
+    assert analyze(iter(pages), chunk_size=400) == whole
+    assert analyze(text.encode("utf-8"), chunk_size=300) == whole
+
+
+def test_statistics_and_readability():
+    statistics = analyze("The cat sat.\nThe table was made of stone!\n\nAnother line", include=["statistics"])["statistics"]
+
+    assert statistics["word_count"] == 11
+    assert statistics["sentence_count"] == 2
+    assert statistics["line_count"] == 4
+    assert statistics["paragraph_count"] == 2
+    readability = statistics["readability"]
+    assert readability["avg_sentence_length"] == pytest.approx(5.5)
+    assert 0.0 <= readability["flesch_score"] <= 100.0
+    assert (count_syllables("table"), count_syllables("make"), count_syllables("analysis")) == (2, 1, 4)
+
+
+def test_content_accumulators():
+    results = analyze(DOCUMENT)
+
+    entities = {(entity["text"], entity["label"]) for entity in results["entities"]}
+    assert {("John Smith", "PERSON"), ("Maria Garcia", "PERSON"), ("Stanford University", "ORG"),
+            ("New York", "LOCATION"), ("Chicago", "LOCATION")} <= entities
+    assert results["sentiment"]["sentiment"] == "positive"
+    assert results["language"]["detected_language"] == "en"
+    assert results["category"]["primary_category"] == "academic"
+    assert {"study", "survey", "data"} <= {k["keyword"] for k in results["keywords"]["keywords"]}
+
+    metadata = results["metadata"]
+    assert metadata["urls"] == ["https://example.org/paper"]
+    assert metadata["emails"] == ["john.smith@example.org"]
+    assert metadata["dates"] == ["03/14/2024"]
+
+
+def test_structure_sections():
+    structure = analyze(DOCUMENT, include=["structure"])["structure"]
+
+    titles = [(section["title"], section["line_number"]) for section in structure["sections"]]
+    assert titles == [("INTRODUCTION", 3), ("1. Methods", 8), ("Results:", 12)]
+    assert structure["sections"][0]["content_preview"].startswith("John Smith")
+    analysis = structure["structure_analysis"]
+    assert analysis["has_headings"] and analysis["list_count"] == 3
+
+
+def test_language_profiles():
+    spanish = "El estudio de la universidad y los resultados del curso en la ciudad se publican en las noticias."
+    assert analyze(spanish, include=["language"])["language"]["detected_language"] == "es"
+    assert analyze("1234 5678", include=["language"])["language"]["detected_language"] == "unknown"
+
+
+def test_custom_accumulators_and_unknown_names():
+    class LineLengths(TextAccumulator):
+        name = "longest_line"
+
+        def __init__(self):
+            self.longest = 0
+
+        def feed(self, chunk):
+            self.longest = max([self.longest] + [len(line) for line in chunk.text.split("\n")])
+
+        def result(self):
+            return self.longest
+
+    analyzer = StreamingTextAnalyzer(chunk_size=64)
+    analyzer.register(LineLengths.name, LineLengths)
+    assert analyzer.analyze("short\na much longer line\n", include=["longest_line"]) == {"longest_line": 18}
+    with pytest.raises(ValueError):
+        analyzer.analyze("text", include=["statistics", "nonexistent"])
+
+
+def test_bounded_counter_keeps_the_heaviest_keys():
+    counter = BoundedCounter(capacity=2)
+    counter.update({"a": 5, "b": 4, "c": 1, "d": 1, "e": 1})
+    counter.prune()
+    assert counter == {"a": 5, "b": 4}
+
+
+async def test_document_service_streams_files(tmp_path):
+    path = tmp_path / "document.txt"
+    path.write_text(DOCUMENT * 5, encoding="utf-8")
+    service = DocumentProcessingService(None)
+
+    streamed = await service.analyze_document_stream(str(path))
+    in_memory = await service.analyze_text_content(DOCUMENT * 5)
+
+    assert streamed["word_count"] == in_memory["word_count"]
+    assert streamed["sentiment"] == in_memory["sentiment"]
+    assert streamed["headings_sections"][0]["title"] == "INTRODUCTION"
+    assert 0.0 <= streamed["structure_score"] <= 1.0
@@ -0,0 +1,131 @@
+"""Tests for guarded token streams: disconnects, cancellation, idle timeouts and persistence"""
+
+import asyncio
+from contextlib import aclosing
+from types import SimpleNamespace
+
+import pytest
+
+from dryad.core.llm_error_handler import LLMCallGuard, LLMDeadlineExceeded, llm_deadline
+from dryad.core.provider_telemetry import ProviderTelemetry
+from dryad.core.token_stream import CANCELLED, ERROR, STOP, TokenStream
+
+
+class FakeStreamingModel:
+    """Chat model that streams ``tokens`` with ``delay`` between them, then stalls after ``stall_after``"""
+
+    def __init__(self, tokens, delay: float = 0.01, stall_after: int = None):
+        self.tokens = tokens
+        self.delay = delay
+        self.stall_after = stall_after
+        self.closed = False
+
+    async def astream(self, messages):
+        try:
+            for i, token in enumerate(self.tokens):
+                if i == self.stall_after:
+                    await asyncio.Event().wait()
+                await asyncio.sleep(self.delay)
+                yield SimpleNamespace(content=token)
+        finally:
+            self.closed = True
+
+
+def make_guard(**config):
+    config = {"LLM_QUEUE_TIMEOUT_SECONDS": 0.1, **config}
+    return LLMCallGuard(telemetry=ProviderTelemetry(), call_timeout=1.0, config=config)
+
+
+def start_reply(guard, model, saved):
+    """A reply stream wired the way AgentRunner.stream_chat wires it, persisting into ``saved``"""
+    llm = guard.guard_model(model, "openai")
+
+    async def deltas():
+        async with aclosing(llm.astream(["hello"])) as chunks:
+            async for chunk in chunks:
+                yield chunk.content
+
+    async def persist(reply, stats):
+        saved.append((reply, stats))
+
+    return TokenStream(deltas(), on_finish=persist)
+
+
+async def test_completed_reply_is_persisted_once():
+    guard, model, saved = make_guard(), FakeStreamingModel(["Hel", "lo", "!"]), []
+    stream = start_reply(guard, model, saved)
+    assert [delta async for delta in stream] == ["Hel", "lo", "!"]
+
+    assert len(saved) == 1
+    reply, stats = saved[0]
+    assert reply == "Hello!"
+    assert stats.finish_reason == STOP and stats.tokens == 3
+    assert guard.get_metrics()["openai"]["successes"] == 1
+
+
+async def test_disconnect_closes_upstream_and_keeps_partial_reply():
+    guard, model, saved = make_guard(), FakeStreamingModel(["a", "b", "c", "d"]), []
+    stream = start_reply(guard, model, saved)
+    # What the server does when the client goes away: stop iterating and close the generator
+    received = []
+    async with aclosing(stream.__aiter__()) as deltas:
+        async for delta in deltas:
+            received.append(delta)
+            if len(received) == 2:
+                break
+
+    assert model.closed
+    assert saved == [("ab", stream.stats)]
+    assert stream.stats.finish_reason == CANCELLED
+    metrics = guard.get_metrics()["openai"]
+    assert metrics["streams_abandoned"] == 1
+    assert "failures" not in metrics
+    assert metrics["in_flight"] == 0
+
+
+async def test_cancelled_turn_is_persisted_as_cancelled():
+    guard, model, saved = make_guard(), FakeStreamingModel(["a", "b", "c"], delay=0.05), []
+    stream = start_reply(guard, model, saved)
+    first = asyncio.Event()
+
+    async def send():
+        async for _ in stream:
+            first.set()
+
+    task = asyncio.create_task(send())
+    await first.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert model.closed
+    assert [(reply, stats.finish_reason) for reply, stats in saved] == [("a", CANCELLED)]
+
+
+async def test_stream_that_goes_quiet_times_out():
+    guard = make_guard(LLM_STREAM_IDLE_TIMEOUT_SECONDS=0.05)
+    model, saved = FakeStreamingModel(["a", "b"], stall_after=1), []
+    stream = start_reply(guard, model, saved)
+    received = []
+    with pytest.raises(asyncio.TimeoutError):
+        async for delta in stream:
+            received.append(delta)
+
+    assert received == ["a"]
+    assert model.closed
+    assert [(reply, stats.finish_reason) for reply, stats in saved] == [("a", ERROR)]
+    assert guard.get_metrics()["openai"]["timeouts"] == 1
+
+
+async def test_stream_stops_at_the_request_deadline():
+    guard = make_guard(LLM_STREAM_IDLE_TIMEOUT_SECONDS=5.0)
+    model, saved = FakeStreamingModel(["a"] * 50, delay=0.02), []
+    with llm_deadline(0.1):
+        stream = start_reply(guard, model, saved)
+        with pytest.raises(LLMDeadlineExceeded):
+            async for _ in stream:
+                pass
+
+    assert model.closed
+    assert saved[0][1].finish_reason == ERROR
+    assert guard.get_metrics()["openai"]["deadline_exceeded"] == 1
@@ -0,0 +1,81 @@
+"""Tests for the tool execution scheduler"""
+
+import asyncio
+import threading
+
+import pytest
+
+from dryad.university.services.tool_scheduler import SchedulingPriority, ToolExecutionScheduler
+
+
+def blocker(release: asyncio.Event, result: str = "done"):
+    async def call():
+        await release.wait()
+        return result
+    return call
+
+
+async def test_queued_call_expires_without_other_dispatches():
+    scheduler = ToolExecutionScheduler(max_concurrent_per_tool=1)
+    release = asyncio.Event()
+    running = scheduler.submit_nowait(blocker(release), "search", "agent-a")
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(scheduler.submit(blocker(release), "search", "agent-b", timeout=0.05), 1.0)
+
+    metrics = scheduler.get_metrics()
+    assert metrics["expired"] == 1
+    assert metrics["queue_depth"] == 0
+    assert metrics["tools"]["search"]["queue_depth"] == 0
+
+    release.set()
+    assert await running == "done"
+
+
+async def test_capped_agent_does_not_block_other_agents():
+    scheduler = ToolExecutionScheduler(max_concurrent_per_tool=4, max_concurrent_per_agent=1)
+    release_a = asyncio.Event()
+    first = scheduler.submit_nowait(blocker(release_a, "a1"), "search", "agent-a")
+    # Higher priority, but agent-a is at its cap
+    second = scheduler.submit_nowait(blocker(release_a, "a2"), "search", "agent-a",
+                                     priority=SchedulingPriority.CRITICAL)
+    other = scheduler.submit_nowait(blocker(asyncio.Event(), "b"), "search", "agent-b")
+    other_done = scheduler.submit_nowait(lambda: asyncio.sleep(0, "b2"), "search", "agent-c")
+
+    assert await asyncio.wait_for(other_done, 1.0) == "b2"
+    assert scheduler.get_metrics()["running"] == 2
+    assert not second.done()
+
+    release_a.set()
+    assert await first == "a1"
+    assert await second == "a2"
+    other.cancel()
+
+
+async def test_cancelled_entries_leave_the_queue():
+    scheduler = ToolExecutionScheduler(max_concurrent_per_tool=1)
+    release = asyncio.Event()
+    running = scheduler.submit_nowait(blocker(release), "search", "agent-a")
+    queued = [scheduler.submit_nowait(blocker(release), "search", "agent-a") for _ in range(5)]
+
+    for future in queued[:4]:
+        future.cancel()
+    await asyncio.sleep(0)
+
+    metrics = scheduler.get_metrics()
+    assert metrics["cancelled"] == 4
+    assert metrics["queue_depth"] == 1
+    assert metrics["tools"]["search"]["queue_depth"] == 1
+
+    release.set()
+    assert await running == "done"
+    assert await queued[4] == "done"
+
+
+async def test_run_blocking_uses_the_tool_class_pool():
+    scheduler = ToolExecutionScheduler(pool_workers_per_class=2)
+    try:
+        name = await scheduler.run_blocking("research_tool", lambda: threading.current_thread().name)
+        assert name.startswith("tool-research_tool")
+    finally:
+        scheduler.shutdown(wait=True)
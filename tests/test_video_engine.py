@@ -0,0 +1,62 @@
+"""Tests for the streaming video frame pipeline"""
+
+import numpy as np
+
+from dryad.university.services.video_engine import AdaptiveFrameSampler, VideoFramePipeline, Y4MReader, write_synthetic_y4m
+
+
+def flat(value, shape=(24, 32)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def test_cut_between_samples_is_located_by_bisection():
+    frames = [flat(40)] * 37 + [flat(200)] * 20
+    sampler = AdaptiveFrameSampler(min_step=1, max_step=16, scene_threshold=0.3)
+    reads, cuts = [], []
+    for index, luma in enumerate(frames):
+        if sampler.wants(index):
+            scene_change, _, cut_index = sampler.observe(index, luma, lambda i: reads.append(i) or frames[i])
+            if scene_change:
+                cuts.append((index, cut_index))
+
+    # Samples at 0, 2, 6, 14, 30, 46: the cut at 37 is seen at 46 and bisected back
+    assert cuts == [(46, 37)]
+    assert 0 < len(reads) <= 4
+    assert all(30 < i < 46 for i in reads)
+
+
+def test_cut_without_random_access_is_reported_where_seen():
+    sampler = AdaptiveFrameSampler(min_step=1, max_step=4, scene_threshold=0.3)
+    for index in (0, 1, 3):
+        sampler.observe(index, flat(40))
+    assert sampler.observe(7, flat(200)) == (True, 1.0, 7)
+
+
+async def test_scenes_start_at_the_cut_frame(tmp_path):
+    path = write_synthetic_y4m(str(tmp_path / "clip.y4m"), width=64, height=48, frame_count=300, scene_length=90)
+    pipeline = VideoFramePipeline(max_step=15, workers=2)
+    try:
+        final = await pipeline.analyze(path)
+    finally:
+        pipeline.shutdown()
+
+    assert [scene['start_frame'] for scene in final['scenes']] == [0, 90, 180, 270]
+    assert [scene['end_frame'] for scene in final['scenes']] == [90, 180, 270, 300]
+    assert final['frames_decoded'] == 300
+    assert final['frames_sampled'] < 150
+    for key in ('brightness', 'contrast', 'sharpness', 'noise_level', 'motion'):
+        stats = final['frame_statistics'][key]
+        assert 0.0 <= stats['min'] <= stats['max'] <= 1.0, key
+
+
+def test_random_access_does_not_move_sequential_reading(tmp_path):
+    path = write_synthetic_y4m(str(tmp_path / "clip.y4m"), width=32, height=16, frame_count=10, scene_length=5)
+    with Y4MReader(path) as reader:
+        sequential = [luma.copy() for _, luma in reader.frames()]
+    with Y4MReader(path) as reader:
+        interleaved = []
+        for index, luma in reader.frames():
+            interleaved.append(luma.copy())
+            assert np.array_equal(reader.read_frame(9 - index), sequential[9 - index])
+
+    assert all(np.array_equal(a, b) for a, b in zip(sequential, interleaved))
@@ -0,0 +1,44 @@
+"""Tests for image analysis in the vision processing service"""
+
+import io
+
+from PIL import Image
+
+from dryad.university.services import vision_processing
+from dryad.university.services.vision_processing import VisionProcessingService
+
+
+def png_bytes(color, size=(64, 48)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+async def test_repeated_image_is_not_decoded_again(monkeypatch):
+    monkeypatch.setattr(vision_processing, "_analysis_cache", vision_processing.OrderedDict())
+    decoded = []
+    decode = VisionProcessingService._decode_image
+
+    def counting_decode(image_bytes, convert=True):
+        decoded.append(convert)
+        return decode(image_bytes, convert)
+
+    monkeypatch.setattr(VisionProcessingService, "_decode_image", staticmethod(counting_decode))
+    service = VisionProcessingService(db=None)
+    image = png_bytes((200, 30, 30))
+
+    first = await service.analyze_image(image)
+    second = await service.analyze_image(image)
+
+    assert decoded == [True]
+    assert first['image_dimensions'] == second['image_dimensions'] == {'width': 64, 'height': 48}
+    assert first['format'] == 'PNG'
+    assert second['color_analysis'] == first['color_analysis']
+    # Cached results are copies; a caller's edits do not leak into the next hit
+    second['objects'].clear()
+    assert (await service.analyze_image(image))['objects'] == first['objects']
+
+    # Different content or options are separate entries
+    await service.analyze_image(png_bytes((30, 30, 200)))
+    await service.analyze_image(image, {'detect_objects': False, 'analyze_scene': False})
+    assert decoded == [True, True, False]
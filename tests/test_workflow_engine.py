@@ -0,0 +1,78 @@
+"""Tests for the workflow step-graph executor"""
+
+import asyncio
+from types import SimpleNamespace
+
+from dryad.core.workflow_engine import WorkflowEngine, WorkflowGraph, WorkflowStep
+
+
+class FakeChatModel:
+    """Chat model that answers after ``delay`` and counts its calls"""
+
+    model_name = "fake-chat"
+
+    def __init__(self, delay: float = 0.01, cancel_on: str = None):
+        self.delay = delay
+        self.cancel_on = cancel_on
+        self.calls = 0
+        self.started = asyncio.Event()
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        self.started.set()
+        await asyncio.sleep(self.delay)
+        if self.cancel_on and self.cancel_on in prompt:
+            raise asyncio.CancelledError()
+        return SimpleNamespace(content=f"answer: {prompt}", usage_metadata={"input_tokens": 3, "output_tokens": 2})
+
+
+def single_step(name="research"):
+    return WorkflowGraph("single", [WorkflowStep(name, "researcher", "Research {topic}")], output_step=name)
+
+
+async def test_identical_steps_share_one_call():
+    llm = FakeChatModel()
+    engine = WorkflowEngine({"researcher": {"llm": llm}})
+    first, second = await asyncio.gather(
+        engine.run(single_step(), {"topic": "tides"}),
+        engine.run(single_step(), {"topic": "tides"}),
+    )
+    assert llm.calls == 1
+    assert first["output"] == second["output"] == "answer: Research tides"
+    assert first["success"] and second["success"]
+
+
+async def test_follower_takes_over_when_leader_is_cancelled():
+    llm = FakeChatModel(delay=0.2)
+    engine = WorkflowEngine({"researcher": {"llm": llm}})
+    leader = asyncio.create_task(engine.run(single_step(), {"topic": "tides"}))
+    await llm.started.wait()
+    follower = asyncio.create_task(engine.run(single_step(), {"topic": "tides"}))
+    await asyncio.sleep(0.01)
+
+    leader.cancel()
+    result = await asyncio.wait_for(follower, 2.0)
+
+    assert result["success"]
+    assert result["output"] == "answer: Research tides"
+    assert llm.calls == 2
+    assert leader.cancelled()
+
+
+async def test_cancelled_step_fails_the_workflow():
+    llm = FakeChatModel(cancel_on="summary")
+    engine = WorkflowEngine({"researcher": {"llm": llm}})
+    graph = WorkflowGraph("two", [
+        WorkflowStep("research", "researcher", "Research {topic}"),
+        WorkflowStep("summary", "researcher", "Write a summary of {research}", depends_on=["research"]),
+    ], output_step="summary")
+
+    events = [event async for event in engine.stream(graph, {"topic": "tides"})]
+
+    failed = [event for event in events if event["event"] == "step_failed"]
+    assert [event["step"] for event in failed] == ["summary"]
+    final = events[-1]
+    assert final["event"] == "workflow_completed"
+    assert not final["success"]
+    assert final["errors"] == {"summary": "cancelled"}
+    assert engine.get_stats()["failed_workflows"] == 1